@@ -0,0 +1,21 @@
+from .harness import (
+    BENCH_MODES,
+    NullSinks,
+    compare_reports,
+    format_report_table,
+    headless_runtime,
+    run_bench,
+)
+from .synthetic_journal import generate_session, iter_session_lines, write_session
+
+__all__ = [
+    "BENCH_MODES",
+    "NullSinks",
+    "compare_reports",
+    "format_report_table",
+    "headless_runtime",
+    "run_bench",
+    "generate_session",
+    "iter_session_lines",
+    "write_session",
+]
@@ -0,0 +1,380 @@
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import queue
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List
+from unittest.mock import patch
+
+import config
+from logic import player_local_db
+from logic.utils import MSG_QUEUE
+from logic.utils import notify as notify_module
+
+REPORT_SCHEMA_VERSION = 1
+MODE_FAST = "fast"
+MODE_REALTIME = "realtime"
+MODE_BURST = "burst"
+BENCH_MODES = (MODE_FAST, MODE_REALTIME, MODE_BURST)
+
+# Progi --compare: regresja = wolniej o threshold_pct ORAZ o co najmniej
+# min_delta_us (pojedyncze mikrosekundy to szum, nie regresja).
+DEFAULT_COMPARE_THRESHOLD_PCT = 25.0
+DEFAULT_COMPARE_MIN_DELTA_US = 50.0
+DEFAULT_COMPARE_MIN_COUNT = 20
+COMPARE_METRICS = ("mean_us", "p95_us")
+
+_PLAYERDB_WRITERS = ("ingest_journal_event", "ingest_market_json", "ingest_star_metadata_event")
+_REALTIME_MAX_GAP_SEC = 60.0
+
+
+class _StubResponse:
+    """Odpowiedz lokalnego stuba providerow: pusty, poprawny JSON."""
+
+    status_code = 200
+    ok = True
+    text = "{}"
+    content = b"{}"
+    headers: Dict[str, str] = {}
+
+    def json(self) -> Dict[str, Any]:
+        return {}
+
+    def raise_for_status(self) -> None:
+        return None
+
+
+class NullSinks:
+    """
+    Liczniki wyjsc, ktore w benchmarku sa wylaczone: TTS (nic nie mowimy),
+    siec (stuby providerow) i GUI (kolejka drenowana po kazdym evencie).
+    """
+
+    def __init__(self) -> None:
+        self.tts_calls = 0
+        self.network_calls = 0
+        self.gui_messages: Dict[str, int] = {}
+
+    def tts(self, *_args: Any, **_kwargs: Any) -> bool:
+        self.tts_calls += 1
+        return True
+
+    def network(self, *_args: Any, **_kwargs: Any) -> _StubResponse:
+        self.network_calls += 1
+        return _StubResponse()
+
+    def drain_gui(self) -> int:
+        drained = 0
+        while True:
+            try:
+                item = MSG_QUEUE.get_nowait()
+            except queue.Empty:
+                return drained
+            kind = str(item[0]) if isinstance(item, tuple) and item else "unknown"
+            self.gui_messages[kind] = self.gui_messages.get(kind, 0) + 1
+            drained += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "tts_calls": self.tts_calls,
+            "network_calls": self.network_calls,
+            "gui_messages": dict(sorted(self.gui_messages.items())),
+        }
+
+
+@contextlib.contextmanager
+def headless_runtime(work_dir: str, *, quiet: bool = True) -> Iterator[NullSinks]:
+    """
+    Izolowane srodowisko benchmarku: PlayerDB i stan aplikacji w `work_dir`,
+    TTS/siec/GUI podmienione na NullSinks. Kontrakt stanu jest przywracany
+    po wyjsciu, wiec przebieg nie zostawia sladow w prawdziwym app_state.
+    quiet=True wycisza stdout (powiedz() drukuje kazdy komunikat).
+    """
+    os.makedirs(work_dir, exist_ok=True)
+    sinks = NullSinks()
+    db_path = os.path.join(work_dir, "player_local.db")
+    saved_contract = config.get_state_contract()
+    saved_state_file = config.STATE_FILE
+    sinks.drain_gui()
+    sinks.gui_messages.clear()
+    try:
+        with contextlib.ExitStack() as stack:
+            stack.enter_context(patch.object(notify_module, "_start_tts_thread", side_effect=sinks.tts))
+            stack.enter_context(patch("requests.get", side_effect=sinks.network))
+            stack.enter_context(patch("requests.post", side_effect=sinks.network))
+            stack.enter_context(patch("requests.request", side_effect=sinks.network))
+            stack.enter_context(patch.object(player_local_db, "default_playerdb_path", return_value=db_path))
+            if quiet:
+                devnull = stack.enter_context(open(os.devnull, "w", encoding="utf-8"))
+                stack.enter_context(contextlib.redirect_stdout(devnull))
+            config.STATE_FILE = os.path.join(work_dir, "app_state.json")
+            yield sinks
+            config.flush_state(timeout=5.0)
+    finally:
+        config.STATE_FILE = saved_state_file
+        config.save_state_contract(saved_contract)
+        sinks.drain_gui()
+
+
+def _percentile_ns(sorted_ns: List[int], pct: float) -> int:
+    if not sorted_ns:
+        return 0
+    rank = max(0, min(len(sorted_ns) - 1, int(round(pct / 100.0 * len(sorted_ns) + 0.5)) - 1))
+    return sorted_ns[rank]
+
+
+def _timing_summary(samples: List[int]) -> Dict[str, Any]:
+    ordered = sorted(samples)
+    total = sum(ordered)
+    count = len(ordered)
+    return {
+        "count": count,
+        "total_ms": round(total / 1e6, 3),
+        "mean_us": round(total / count / 1e3, 3) if count else 0.0,
+        "p50_us": round(_percentile_ns(ordered, 50) / 1e3, 3),
+        "p95_us": round(_percentile_ns(ordered, 95) / 1e3, 3),
+        "p99_us": round(_percentile_ns(ordered, 99) / 1e3, 3),
+        "max_us": round((ordered[-1] if ordered else 0) / 1e3, 3),
+    }
+
+
+class _Recorder:
+    """Dispatcher owijajacy handle_event i zapisy PlayerDB (perf_counter_ns)."""
+
+    def __init__(self, handler: Any) -> None:
+        self._handler = handler
+        self.samples: Dict[str, List[int]] = {}
+        self.playerdb_ns: Dict[str, List[int]] = {}
+        self.state_puts = 0
+        self.state_changed_puts = 0
+
+    def dispatch(self, line: str, event_type: str) -> int:
+        started = time.perf_counter_ns()
+        self._handler.handle_event(line, gui_ref=None)
+        elapsed = time.perf_counter_ns() - started
+        self.samples.setdefault(event_type, []).append(elapsed)
+        return elapsed
+
+    def wrap_playerdb(self, name: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+        bucket = self.playerdb_ns.setdefault(name, [])
+
+        def _timed(*args: Any, **kwargs: Any) -> Any:
+            started = time.perf_counter_ns()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                bucket.append(time.perf_counter_ns() - started)
+
+        return _timed
+
+    def wrap_state_put(self, fn: Callable[..., bool]) -> Callable[..., bool]:
+        def _counted(*args: Any, **kwargs: Any) -> bool:
+            changed = fn(*args, **kwargs)
+            self.state_puts += 1
+            if changed:
+                self.state_changed_puts += 1
+            return changed
+
+        return _counted
+
+
+def _event_type(line: str) -> tuple[str, float | None]:
+    try:
+        row = json.loads(line)
+    except (json.JSONDecodeError, TypeError, ValueError):
+        return "<invalid>", None
+    if not isinstance(row, dict):
+        return "<invalid>", None
+    ts = None
+    raw_ts = row.get("timestamp")
+    if isinstance(raw_ts, str):
+        try:
+            ts = datetime.strptime(raw_ts, "%Y-%m-%dT%H:%M:%SZ").timestamp()
+        except ValueError:
+            ts = None
+    return str(row.get("event") or "<none>"), ts
+
+
+def run_bench(
+    lines: Iterable[str],
+    *,
+    mode: str = MODE_FAST,
+    speed: float = 1.0,
+    burst: int = 0,
+    handler: Any = None,
+    sinks: NullSinks | None = None,
+    sleep: Callable[[float], None] = time.sleep,
+    label: str = "",
+) -> Dict[str, Any]:
+    """
+    Odtwarza linie journala przez prawdziwy EventHandler i zwraca raport.
+
+    - fast: bez przerw miedzy eventami,
+    - realtime: odstepy z timestampow journala podzielone przez `speed`
+      (raport mowi, jak daleko Renata zostala w tyle za gra),
+    - burst: paczki po `burst` linii naraz (jak po dlugiej sesji offline);
+      raport zawiera czas drenazu paczki.
+
+    Wolajacy odpowiada za srodowisko (zob. headless_runtime).
+    """
+    if mode not in BENCH_MODES:
+        raise ValueError(f"unknown bench mode: {mode}")
+    if handler is None:
+        from logic.event_handler import handler as default_handler
+
+        handler = default_handler
+    speed = max(1e-6, float(speed))
+    burst = max(1, int(burst)) if mode == MODE_BURST else 0
+
+    rows = [str(line).strip() for line in lines]
+    rows = [line for line in rows if line]
+    typed = [(line,) + _event_type(line) for line in rows]
+
+    recorder = _Recorder(handler)
+    sinks = sinks if sinks is not None else NullSinks()
+    sinks_drain = sinks.drain_gui
+    state_before = config.get_state_store_stats()
+    lag_ns: List[int] = []
+    burst_ns: List[int] = []
+
+    with contextlib.ExitStack() as stack:
+        for name in _PLAYERDB_WRITERS:
+            stack.enter_context(patch.object(player_local_db, name, recorder.wrap_playerdb(name, getattr(player_local_db, name))))
+        stack.enter_context(patch.object(config._STATE_STORE, "put", recorder.wrap_state_put(config._STATE_STORE.put)))
+
+        wall_started = time.perf_counter_ns()
+        if mode == MODE_REALTIME:
+            first_ts = next((ts for _line, _typ, ts in typed if ts is not None), None)
+            schedule_game = 0.0
+            prev_ts = first_ts
+            for line, typ, ts in typed:
+                if ts is not None and prev_ts is not None:
+                    schedule_game += min(_REALTIME_MAX_GAP_SEC, max(0.0, ts - prev_ts)) / speed
+                    prev_ts = ts
+                due_ns = wall_started + int(schedule_game * 1e9)
+                ahead = (due_ns - time.perf_counter_ns()) / 1e9
+                if ahead > 0:
+                    sleep(ahead)
+                lag_ns.append(max(0, time.perf_counter_ns() - due_ns))
+                recorder.dispatch(line, typ)
+                sinks_drain()
+        elif mode == MODE_BURST:
+            for offset in range(0, len(typed), burst):
+                started = time.perf_counter_ns()
+                for line, typ, _ts in typed[offset : offset + burst]:
+                    recorder.dispatch(line, typ)
+                burst_ns.append(time.perf_counter_ns() - started)
+                sinks_drain()
+        else:
+            for line, typ, _ts in typed:
+                recorder.dispatch(line, typ)
+                sinks_drain()
+        wall_ns = time.perf_counter_ns() - wall_started
+
+    state_after = config.get_state_store_stats()
+    handler_ns = sum(sum(values) for values in recorder.samples.values())
+    events = len(typed)
+    all_playerdb = [ns for values in recorder.playerdb_ns.values() for ns in values]
+
+    report: Dict[str, Any] = {
+        "schema_version": REPORT_SCHEMA_VERSION,
+        "label": label,
+        "mode": mode,
+        "speed": speed if mode == MODE_REALTIME else None,
+        "burst": burst or None,
+        "events": events,
+        "wall_sec": round(wall_ns / 1e9, 4),
+        "handler_sec": round(handler_ns / 1e9, 4),
+        "events_per_sec": round(events / (handler_ns / 1e9), 1) if handler_ns else 0.0,
+        "event_types": {typ: _timing_summary(samples) for typ, samples in sorted(recorder.samples.items())},
+        "playerdb": {
+            "total": _timing_summary(all_playerdb),
+            "by_call": {name: _timing_summary(values) for name, values in sorted(recorder.playerdb_ns.items()) if values},
+        },
+        "state": {
+            "puts": recorder.state_puts,
+            "changed_puts": recorder.state_changed_puts,
+            "writes": int(state_after.get("writes", 0)) - int(state_before.get("writes", 0)),
+            "bytes_written": int(state_after.get("bytes_written", 0)) - int(state_before.get("bytes_written", 0)),
+        },
+    }
+    report["sinks"] = sinks.as_dict()
+    if lag_ns:
+        report["realtime_lag"] = _timing_summary(lag_ns)
+    if burst_ns:
+        report["bursts"] = _timing_summary(burst_ns)
+    return report
+
+
+def compare_reports(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    *,
+    threshold_pct: float = DEFAULT_COMPARE_THRESHOLD_PCT,
+    min_delta_us: float = DEFAULT_COMPARE_MIN_DELTA_US,
+    min_count: int = DEFAULT_COMPARE_MIN_COUNT,
+) -> List[Dict[str, Any]]:
+    """
+    Lista regresji per typ eventu (mean/p95 wolniejsze o > threshold_pct
+    i > min_delta_us). Typy z malo probkami pomijamy - percentyle sa wtedy szumem.
+    """
+    factor = 1.0 + max(0.0, float(threshold_pct)) / 100.0
+    out: List[Dict[str, Any]] = []
+    base_types = baseline.get("event_types") or {}
+    for typ, cur in sorted((current.get("event_types") or {}).items()):
+        base = base_types.get(typ)
+        if not isinstance(base, dict):
+            continue
+        if min(int(cur.get("count") or 0), int(base.get("count") or 0)) < int(min_count):
+            continue
+        for metric in COMPARE_METRICS:
+            before = float(base.get(metric) or 0.0)
+            after = float(cur.get(metric) or 0.0)
+            if after > before * factor and (after - before) > float(min_delta_us):
+                out.append(
+                    {
+                        "event": typ,
+                        "metric": metric,
+                        "baseline": before,
+                        "current": after,
+                        "ratio": round(after / before, 2) if before > 0 else None,
+                    }
+                )
+    return out
+
+
+def format_report_table(report: Dict[str, Any], *, regressions: List[Dict[str, Any]] | None = None) -> str:
+    flagged = {row["event"] for row in regressions or []}
+    lines = [
+        f"mode={report.get('mode')} events={report.get('events')} "
+        f"wall={report.get('wall_sec')}s handler={report.get('handler_sec')}s "
+        f"throughput={report.get('events_per_sec')} ev/s",
+        f"{'event':<28}{'count':>8}{'total_ms':>12}{'mean_us':>11}{'p50_us':>11}{'p95_us':>11}{'p99_us':>11}",
+    ]
+    types = report.get("event_types") or {}
+    for typ, row in sorted(types.items(), key=lambda item: -float(item[1].get("total_ms") or 0.0)):
+        mark = " !" if typ in flagged else ""
+        lines.append(
+            f"{typ[:27]:<28}{row['count']:>8}{row['total_ms']:>12.2f}{row['mean_us']:>11.1f}"
+            f"{row['p50_us']:>11.1f}{row['p95_us']:>11.1f}{row['p99_us']:>11.1f}{mark}"
+        )
+    db = (report.get("playerdb") or {}).get("total") or {}
+    state = report.get("state") or {}
+    lines.append(
+        f"playerdb: calls={db.get('count', 0)} total_ms={db.get('total_ms', 0.0)} p95_us={db.get('p95_us', 0.0)}"
+    )
+    lines.append(
+        f"state: puts={state.get('puts', 0)} changed={state.get('changed_puts', 0)} "
+        f"writes={state.get('writes', 0)} bytes={state.get('bytes_written', 0)}"
+    )
+    for key in ("realtime_lag", "bursts"):
+        row = report.get(key)
+        if row:
+            lines.append(f"{key}: p50_ms={row['p50_us'] / 1000:.2f} p95_ms={row['p95_us'] / 1000:.2f} max_ms={row['max_us'] / 1000:.2f}")
+    sinks = report.get("sinks")
+    if sinks:
+        lines.append(f"sinks: tts={sinks.get('tts_calls', 0)} network={sinks.get('network_calls', 0)}")
+    return "\n".join(lines)
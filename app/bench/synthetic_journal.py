@@ -0,0 +1,309 @@
+from __future__ import annotations
+
+import json
+import os
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List
+
+# Proporcje blokow aktywnosci w typowej, mieszanej sesji (eksploracja dominuje).
+ACTIVITY_WEIGHTS: Dict[str, float] = {
+    "jump": 0.55,
+    "exobio": 0.10,
+    "market": 0.15,
+    "combat": 0.12,
+    "idle": 0.08,
+}
+DEFAULT_START = "2026-01-01T18:00:00Z"
+
+_STAR_CLASSES = ("K", "G", "M", "F", "A", "B", "DA", "N", "H")
+_PLANET_CLASSES = (
+    "Icy body",
+    "Rocky body",
+    "High metal content body",
+    "Rocky ice body",
+    "Sudarsky class I gas giant",
+    "Water world",
+    "Earthlike body",
+    "Ammonia world",
+)
+_GENUSES = (
+    ("$Codex_Ent_Bacterial_Genus_Name;", "Bacterium", "$Codex_Ent_Bacterial_01_Name;", "Bacterium Aurasus"),
+    ("$Codex_Ent_Stratum_Genus_Name;", "Stratum", "$Codex_Ent_Stratum_07_Name;", "Stratum Tectonicas"),
+    ("$Codex_Ent_Osseus_Genus_Name;", "Osseus", "$Codex_Ent_Osseus_01_Name;", "Osseus Fractus"),
+    ("$Codex_Ent_Fonticulus_Genus_Name;", "Fonticulua", "$Codex_Ent_Fonticulus_02_Name;", "Fonticulua Campestris"),
+)
+_COMMODITIES = ("gold", "silver", "palladium", "tritium", "bertrandite", "indite")
+_PILOT_RANKS = ("Harmless", "Competent", "Expert", "Master", "Dangerous")
+
+
+def _iso(ts: datetime) -> str:
+    return ts.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _parse_start(value: str) -> datetime:
+    return datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+
+
+class _Session:
+    """Stan generatora: czas gry, biezacy system i licznik id (deterministycznie z seeda)."""
+
+    def __init__(self, seed: int, start: str) -> None:
+        self.rng = random.Random(seed)
+        self.now = _parse_start(start)
+        self.events: List[Dict[str, Any]] = []
+        self.system_idx = 0
+        self.system = "Bench Sector AA-A h0"
+        self.address = 10_000_000
+        self.pos = [0.0, 0.0, 0.0]
+        self.fuel = 32.0
+        self.credits = 50_000_000
+
+    def emit(self, event: str, advance_sec: float = 1.0, **fields: Any) -> None:
+        self.now += timedelta(seconds=max(0.0, advance_sec))
+        row: Dict[str, Any] = {"timestamp": _iso(self.now), "event": event}
+        row.update(fields)
+        self.events.append(row)
+
+
+def _jump_block(s: _Session) -> None:
+    rng = s.rng
+    s.system_idx += 1
+    s.system = f"Bench Sector {chr(65 + s.system_idx % 26)}{chr(65 + s.system_idx // 26 % 26)}-A h{s.system_idx}"
+    s.address = 10_000_000 + s.system_idx
+    dist = round(rng.uniform(8.0, 60.0), 2)
+    s.pos = [round(s.pos[0] + rng.uniform(-dist, dist), 3), round(s.pos[1] + rng.uniform(-3, 3), 3), round(s.pos[2] + dist, 3)]
+    fuel_used = round(dist / 12.0, 3)
+    s.fuel = max(2.0, s.fuel - fuel_used)
+    star_class = rng.choice(_STAR_CLASSES)
+    s.emit("StartJump", rng.uniform(5, 25), JumpType="Hyperspace", StarSystem=s.system, SystemAddress=s.address, StarClass=star_class)
+    s.emit(
+        "FSDJump",
+        rng.uniform(12, 16),
+        StarSystem=s.system,
+        SystemAddress=s.address,
+        StarPos=list(s.pos),
+        Body=f"{s.system} A",
+        BodyID=0,
+        BodyType="Star",
+        JumpDist=dist,
+        FuelUsed=fuel_used,
+        FuelLevel=round(s.fuel, 3),
+        SystemAllegiance="",
+        SystemEconomy="$economy_None;",
+        SystemSecurity="$GAlAXY_MAP_INFO_state_anarchy;",
+        Population=0,
+    )
+    if star_class in ("K", "G", "M", "F", "A", "B") and s.fuel < 24.0:
+        scooped = round(min(32.0 - s.fuel, rng.uniform(4.0, 12.0)), 3)
+        s.fuel += scooped
+        s.emit("FuelScoop", rng.uniform(5, 20), Scooped=scooped, Total=round(s.fuel, 3))
+    bodies = rng.randint(1, 18)
+    s.emit("FSSDiscoveryScan", rng.uniform(2, 6), Progress=rng.random(), BodyCount=bodies, NonBodyCount=rng.randint(0, 6), SystemName=s.system, SystemAddress=s.address)
+    s.emit(
+        "Scan",
+        rng.uniform(1, 3),
+        ScanType="AutoScan",
+        BodyName=f"{s.system} A",
+        BodyID=0,
+        StarSystem=s.system,
+        SystemAddress=s.address,
+        DistanceFromArrivalLS=0.0,
+        StarType=star_class,
+        Subclass=rng.randint(0, 9),
+        StellarMass=round(rng.uniform(0.2, 3.0), 4),
+        Radius=round(rng.uniform(2e8, 9e8), 1),
+        AbsoluteMagnitude=round(rng.uniform(2.0, 12.0), 4),
+        Luminosity="V",
+        WasDiscovered=rng.random() < 0.8,
+        WasMapped=False,
+    )
+    # Czesc systemow skanowana w FSS (pelny zestaw planet), reszta tylko honk.
+    if rng.random() < 0.35:
+        for body_id in range(1, bodies):
+            planet_class = rng.choice(_PLANET_CLASSES)
+            s.emit(
+                "Scan",
+                rng.uniform(3, 12),
+                ScanType="Detailed",
+                BodyName=f"{s.system} {body_id}",
+                BodyID=body_id,
+                StarSystem=s.system,
+                SystemAddress=s.address,
+                DistanceFromArrivalLS=round(rng.uniform(10.0, 5000.0), 2),
+                TidalLock=rng.random() < 0.3,
+                TerraformState="Terraformable" if rng.random() < 0.1 else "",
+                PlanetClass=planet_class,
+                Atmosphere="thin carbon dioxide atmosphere" if rng.random() < 0.3 else "",
+                Volcanism="",
+                MassEM=round(rng.uniform(0.01, 5.0), 4),
+                Radius=round(rng.uniform(1e6, 7e6), 1),
+                SurfaceGravity=round(rng.uniform(0.5, 25.0), 4),
+                SurfaceTemperature=round(rng.uniform(40.0, 900.0), 2),
+                Landable=planet_class in ("Icy body", "Rocky body", "High metal content body", "Rocky ice body"),
+                WasDiscovered=rng.random() < 0.7,
+                WasMapped=rng.random() < 0.2,
+            )
+        s.emit("FSSAllBodiesFound", rng.uniform(1, 4), SystemName=s.system, SystemAddress=s.address, Count=bodies)
+    s.emit("Music", 0.5, MusicTrack="Supercruise")
+
+
+def _exobio_block(s: _Session) -> None:
+    rng = s.rng
+    body_id = rng.randint(1, 12)
+    body = f"{s.system} {body_id}"
+    picks = rng.sample(_GENUSES, rng.randint(1, 3))
+    s.emit(
+        "SAAScanComplete",
+        rng.uniform(30, 90),
+        BodyName=body,
+        SystemAddress=s.address,
+        BodyID=body_id,
+        ProbesUsed=rng.randint(4, 12),
+        EfficiencyTarget=8,
+    )
+    s.emit(
+        "SAASignalsFound",
+        0.5,
+        BodyName=body,
+        SystemAddress=s.address,
+        BodyID=body_id,
+        Signals=[{"Type": "$SAA_SignalType_Biological;", "Type_Localised": "Biological", "Count": len(picks)}],
+        Genuses=[{"Genus": genus, "Genus_Localised": genus_name} for genus, genus_name, _species, _species_name in picks],
+    )
+    s.emit("ApproachBody", rng.uniform(60, 180), StarSystem=s.system, SystemAddress=s.address, Body=body, BodyID=body_id)
+    s.emit("Touchdown", rng.uniform(30, 90), PlayerControlled=True, Body=body, BodyID=body_id, StarSystem=s.system, SystemAddress=s.address, Latitude=rng.uniform(-60, 60), Longitude=rng.uniform(-180, 180))
+    for genus, genus_name, species, species_name in picks:
+        for scan_type in ("Log", "Sample", "Analyse"):
+            s.emit(
+                "ScanOrganic",
+                rng.uniform(60, 240),
+                ScanType=scan_type,
+                Genus=genus,
+                Genus_Localised=genus_name,
+                Species=species,
+                Species_Localised=species_name,
+                SystemAddress=s.address,
+                Body=body_id,
+            )
+    s.emit("Liftoff", rng.uniform(10, 40), PlayerControlled=True, Body=body, BodyID=body_id, StarSystem=s.system, SystemAddress=s.address)
+    s.emit("LeaveBody", rng.uniform(20, 60), StarSystem=s.system, SystemAddress=s.address, Body=body, BodyID=body_id)
+
+
+def _market_block(s: _Session) -> None:
+    rng = s.rng
+    station = f"Bench Port {s.system_idx % 97}"
+    market_id = 3_200_000_000 + s.system_idx % 97
+    s.emit("SupercruiseExit", rng.uniform(60, 300), StarSystem=s.system, SystemAddress=s.address, Body=station, BodyType="Station")
+    s.emit("DockingRequested", rng.uniform(20, 60), MarketID=market_id, StationName=station, StationType="Coriolis")
+    s.emit("DockingGranted", 2.0, LandingPad=rng.randint(1, 40), MarketID=market_id, StationName=station, StationType="Coriolis")
+    s.emit(
+        "Docked",
+        rng.uniform(40, 120),
+        StationName=station,
+        StationType="Coriolis",
+        StarSystem=s.system,
+        SystemAddress=s.address,
+        MarketID=market_id,
+        DistFromStarLS=round(rng.uniform(10.0, 3000.0), 2),
+        StationServices=["dock", "commodities", "refuel", "repair", "rearm"],
+    )
+    s.emit("Market", 3.0, MarketID=market_id, StationName=station, StarSystem=s.system)
+    for _ in range(rng.randint(1, 3)):
+        commodity = rng.choice(_COMMODITIES)
+        count = rng.randint(8, 256)
+        price = rng.randint(2_000, 60_000)
+        if rng.random() < 0.5:
+            s.credits -= count * price
+            s.emit("MarketBuy", rng.uniform(5, 30), MarketID=market_id, Type=commodity, Count=count, BuyPrice=price, TotalCost=count * price)
+        else:
+            s.credits += count * price
+            s.emit("MarketSell", rng.uniform(5, 30), MarketID=market_id, Type=commodity, Count=count, SellPrice=price, TotalSale=count * price, AvgPricePaid=price // 2)
+    s.emit("RefuelAll", rng.uniform(2, 10), Cost=rng.randint(100, 2000), Amount=round(32.0 - s.fuel, 3))
+    s.fuel = 32.0
+    s.emit("Undocked", rng.uniform(20, 120), StationName=station, StationType="Coriolis", MarketID=market_id)
+
+
+def _combat_block(s: _Session) -> None:
+    rng = s.rng
+    for _ in range(rng.randint(2, 6)):
+        target = f"Bench Pirate {rng.randint(1, 999)}"
+        s.emit("ShipTargeted", rng.uniform(5, 30), TargetLocked=True, Ship="viper", ScanStage=3, PilotName_Localised=target, PilotRank=rng.choice(_PILOT_RANKS), ShieldHealth=100.0, HullHealth=100.0, LegalStatus="Wanted", Bounty=rng.randint(5_000, 300_000))
+        if rng.random() < 0.4:
+            s.emit("UnderAttack", rng.uniform(1, 5), Target="You")
+        if rng.random() < 0.2:
+            s.emit("HullDamage", rng.uniform(1, 5), Health=round(rng.uniform(0.4, 0.95), 4), PlayerPilot=True, Fighter=False)
+        s.emit(
+            "Bounty",
+            rng.uniform(10, 60),
+            Rewards=[{"Faction": "Bench Defence Force", "Reward": rng.randint(5_000, 300_000)}],
+            Target="viper",
+            TotalReward=rng.randint(5_000, 300_000),
+            VictimFaction="Bench Pirates",
+        )
+    s.emit("ReceiveText", rng.uniform(5, 30), From="Bench Control", Message="$STATION_NoFireZone_exited;", Channel="npc")
+
+
+def _idle_block(s: _Session) -> None:
+    rng = s.rng
+    s.emit("Music", rng.uniform(30, 300), MusicTrack="Exploration")
+    s.emit("ReceiveText", rng.uniform(10, 120), From="Bench Wing", Message="o7", Channel="wing")
+    s.emit("Friends", rng.uniform(10, 120), Status="Online", Name="Bench Friend")
+
+
+_BLOCKS = {
+    "jump": _jump_block,
+    "exobio": _exobio_block,
+    "market": _market_block,
+    "combat": _combat_block,
+    "idle": _idle_block,
+}
+
+
+def generate_session(
+    *,
+    hours: float | None = None,
+    events: int | None = None,
+    seed: int = 0,
+    start: str = DEFAULT_START,
+) -> List[Dict[str, Any]]:
+    """
+    Syntetyczna sesja journala (lista eventow) o realistycznych proporcjach:
+    skoki + skany dominuja, do tego exobio, handel i walka. Konczy sie po
+    `hours` godzinach czasu gry albo po `events` eventach (co nastapi pierwsze).
+    Ten sam seed daje ten sam journal - benchmarki nie zaleza od prywatnych logow.
+    """
+    if hours is None and events is None:
+        hours = 1.0
+    s = _Session(seed, start)
+    s.emit("Fileheader", 0.0, part=1, language="English/UK", Odyssey=True, gameversion="4.0.0.1904", build="r300000/r0 ")
+    s.emit("Commander", 1.0, FID="F0000000", Name="BENCH")
+    s.emit("LoadGame", 1.0, FID="F0000000", Commander="BENCH", Ship="DiamondBackXL", ShipID=1, FuelLevel=s.fuel, FuelCapacity=32.0, GameMode="Solo", Credits=s.credits)
+    s.emit("Location", 2.0, StarSystem=s.system, SystemAddress=s.address, StarPos=list(s.pos), Docked=False, Body=f"{s.system} A", BodyType="Star")
+
+    deadline = None if hours is None else s.now + timedelta(hours=float(hours))
+    limit = None if events is None else max(1, int(events))
+    names = list(ACTIVITY_WEIGHTS)
+    weights = [ACTIVITY_WEIGHTS[name] for name in names]
+    while True:
+        if limit is not None and len(s.events) >= limit:
+            break
+        if deadline is not None and s.now >= deadline:
+            break
+        _BLOCKS[s.rng.choices(names, weights)[0]](s)
+    return s.events[:limit] if limit is not None else s.events
+
+
+def iter_session_lines(events: List[Dict[str, Any]]) -> Iterator[str]:
+    for row in events:
+        yield json.dumps(row, ensure_ascii=False)
+
+
+def write_session(path: str, events: List[Dict[str, Any]]) -> str:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as handle:
+        for line in iter_session_lines(events):
+            handle.write(line + "\n")
+    return path
@@ -1,6 +1,7 @@
 import time
 import os
 import glob
+import threading
 from collections import deque
 
 from logic.event_handler import handler
@@ -10,8 +11,100 @@ from app.state import app_state
 import config
 
 from app.status_watchers import StatusWatcher, MarketWatcher, CargoWatcher, NavRouteWatcher
+from logic.speculative_routes import speculative_route_planner
 from logic.utils.renata_log import log_event_throttled
 
+# Wywolania handlerow odlozone do zbudowania okna (bootstrap replay journala).
+_DEFERRED_GUI_CALLS_MAX = 256
+
+
+class DeferredGuiRef:
+    """
+    Referencja GUI dla MainLoop startujacego rownolegle z budowa okna.
+
+    Do czasu attach() zachowuje sie jak brak GUI (falsy, brak atrybutow).
+    Handlery, ktore potrzebuja danych okna (np. carto_df), odkladaja swoje
+    wywolanie przez defer_until_attached(); attach() odtwarza je w kolejnosci.
+    """
+
+    __slots__ = ("_target", "_pending", "_lock", "_replay_thread")
+
+    def __init__(self, target=None) -> None:
+        object.__setattr__(self, "_target", target)
+        object.__setattr__(self, "_pending", deque())
+        object.__setattr__(self, "_lock", threading.Lock())
+        # Watek odtwarzajacy kolejke po attach(); do jej oproznienia nowe
+        # wywolania z innych watkow nadal sie kolejkuja (zachowana kolejnosc).
+        object.__setattr__(self, "_replay_thread", None)
+
+    def attach(self, target) -> None:
+        lock = object.__getattribute__(self, "_lock")
+        pending = object.__getattribute__(self, "_pending")
+        with lock:
+            object.__setattr__(self, "_target", target)
+            object.__setattr__(self, "_replay_thread", threading.get_ident())
+        while True:
+            with lock:
+                if not pending:
+                    object.__setattr__(self, "_replay_thread", None)
+                    return
+                fn, args, kwargs = pending.popleft()
+            try:
+                fn(*args, **kwargs)
+            except Exception as exc:
+                log_event_throttled(
+                    "MAINLOOP_DEFERRED_GUI_CALL_FAILED",
+                    5000,
+                    "WARN",
+                    "MainLoop: deferred GUI call failed after attach",
+                    call=getattr(fn, "__name__", str(fn)),
+                    error=f"{type(exc).__name__}: {exc}",
+                )
+
+    def defer_until_attached(self, fn, *args, **kwargs) -> bool:
+        """
+        Bez GUI (lub w trakcie odtwarzania kolejki przez attach()) kolejkuje
+        fn(*args, **kwargs) i zwraca True; potem zwraca False, a wywolujacy
+        dziala od razu.
+        """
+        lock = object.__getattribute__(self, "_lock")
+        with lock:
+            if object.__getattribute__(self, "_target") is not None:
+                replay_thread = object.__getattribute__(self, "_replay_thread")
+                if replay_thread is None or replay_thread == threading.get_ident():
+                    return False
+            pending = object.__getattribute__(self, "_pending")
+            if len(pending) >= _DEFERRED_GUI_CALLS_MAX:
+                pending.popleft()
+                log_event_throttled(
+                    "MAINLOOP_DEFERRED_GUI_CALLS_DROPPED",
+                    30000,
+                    "WARN",
+                    "MainLoop: deferred GUI call queue full; dropping oldest",
+                    limit=_DEFERRED_GUI_CALLS_MAX,
+                )
+            pending.append((fn, args, kwargs))
+        return True
+
+    @property
+    def is_attached(self) -> bool:
+        return object.__getattribute__(self, "_target") is not None
+
+    def __bool__(self) -> bool:
+        return self.is_attached
+
+    def __getattr__(self, name: str):
+        target = object.__getattribute__(self, "_target")
+        if target is None:
+            raise AttributeError(name)
+        return getattr(target, name)
+
+    def __setattr__(self, name: str, value) -> None:
+        target = object.__getattribute__(self, "_target")
+        if target is None:
+            raise AttributeError(name)
+        setattr(target, name, value)
+
 
 class MainLoop:
     """
@@ -214,6 +307,7 @@ class MainLoop:
                         self.market_watcher.poll()
                         self.cargo_watcher.poll()
                         self.navroute_watcher.poll()
+                        self._tick_speculative_routes()
 
                         newer = self._find_latest_file()
                         if newer and newer != path:
@@ -224,6 +318,7 @@ class MainLoop:
                             return
                         continue
 
+                    speculative_route_planner.note_activity()
                     try:
                         handler.handle_event(line, self.gui_ref)
                     except Exception as e:
@@ -249,6 +344,20 @@ class MainLoop:
             )
             time.sleep(1)
 
+    # ------------------------------------------------------------------ #
+    def _tick_speculative_routes(self) -> None:
+        # Journal stoi - okazja na spekulatywne trasy neutron (budzet w serwisie).
+        try:
+            speculative_route_planner.maybe_run()
+        except Exception:
+            log_event_throttled(
+                "MAINLOOP_SPECULATIVE_ROUTES_FAILED",
+                120_000,
+                "WARN",
+                "MainLoop: speculative route tick failed",
+                context="main_loop.speculative_routes",
+            )
+
     # ------------------------------------------------------------------ #
     def _find_latest_file(self):
         try:
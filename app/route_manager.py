@@ -3,10 +3,49 @@
 from __future__ import annotations
 
 import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
 from typing import Callable, Iterable, Optional, Any
 
+from logic.utils.cancellation import CancelToken, RouteCancelled, bind_cancel_token
 from logic.utils.renata_log import log_event, log_event_throttled
 
+# Priorytet jobów: przy braku slotu job o wyższym priorytecie wywłaszcza
+# najniższy. Neutron (szybki plotter, cash-in) przed ciężkimi plannerami.
+_MODE_PRIORITY: dict[str, int] = {
+    "neutron": 20,
+    "trade": 10,
+}
+_JOB_HISTORY_LIMIT = 32
+
+
+@dataclass(eq=False)
+class RouteJob:
+    job_id: int
+    mode: str
+    priority: int = 0
+    state: str = "running"  # running | done | failed | cancelled | timed_out
+    started_ts: float = field(default_factory=time.monotonic)
+    finished_ts: float | None = None
+    cancel_reason: str = ""
+    token: CancelToken = field(default_factory=CancelToken)
+    thread: Optional[threading.Thread] = None
+
+    def duration_ms(self) -> int:
+        end = self.finished_ts if self.finished_ts is not None else time.monotonic()
+        return int(round((end - self.started_ts) * 1000.0))
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "mode": self.mode,
+            "priority": self.priority,
+            "state": self.state,
+            "duration_ms": self.duration_ms(),
+            "cancel_reason": self.cancel_reason,
+        }
+
 
 class RouteManager:
     """Centralny menedżer tras dla Renaty.
@@ -20,8 +59,9 @@ class RouteManager:
 
     2) Cienka warstwa uruchamiania jobów tras (D2-A)
        - startuje wątki robocze dla tras (neutron, riches, trade itd.),
-       - trzyma prosty stan *busy* / *current_mode*,
-       - sygnalizuje do logów początek i koniec obliczania trasy.
+       - do max_parallel_jobs jobów naraz, z priorytetem i supersede,
+       - token anulowania per job (supersede / timeout / cancel_route),
+       - sygnalizuje do logów początek, koniec i czas obliczania trasy.
 
     Uwaga: RouteManager *nie* zna szczegółów SPANSH, payloadów ani JSON-ów.
     Worker przekazany do start_route_thread odpowiada za:
@@ -34,7 +74,7 @@ class RouteManager:
     #  Konstruktor
     # ---------------------------------------------------------
 
-    def __init__(self, *, route_job_timeout_s: float = 120.0) -> None:
+    def __init__(self, *, route_job_timeout_s: float = 120.0, max_parallel_jobs: int = 2) -> None:
         # Nawigacja po trasie
         self.lock = threading.Lock()
         self.route: list[str] = []
@@ -42,11 +82,12 @@ class RouteManager:
         self.current_index: int = 0
 
         # Lifecycle jobów tras (D2-A)
-        self._busy: bool = False
-        self._current_mode: Optional[str] = None
+        self._jobs: dict[int, RouteJob] = {}
+        self._job_history: deque[RouteJob] = deque(maxlen=_JOB_HISTORY_LIMIT)
         self._worker_thread: Optional[threading.Thread] = None
         self._active_job_token: int = 0
         self._route_job_timeout_s: float = max(0.0, float(route_job_timeout_s or 0.0))
+        self._max_parallel_jobs: int = max(1, int(max_parallel_jobs or 1))
 
     # ---------------------------------------------------------
     #  API: zarządzanie trasą (nawigacja)
@@ -71,6 +112,28 @@ class RouteManager:
             route_type=route_type,
             route_len=len(route_list),
         )
+        self._warm_tts_cache(route_list)
+
+    def _warm_tts_cache(self, route_list: list[str]) -> None:
+        """W tle werbalizuje nazwy systemów trasy, zanim padnie pierwszy next-hop."""
+        if not route_list:
+            return
+
+        def _warm() -> None:
+            try:
+                from logic.tts.text_preprocessor import warm_cache
+
+                warm_cache(route_list)
+            except Exception as exc:
+                log_event_throttled(
+                    "route_manager_tts_warm",
+                    30000,
+                    "WARN",
+                    "route_manager TTS cache warm-up failed",
+                    error=f"{type(exc).__name__}: {exc}",
+                )
+
+        threading.Thread(target=_warm, daemon=True, name="route_tts_warm").start()
 
     def clear_route(self) -> None:
         """Czyści aktualną trasę i resetuje stan nawigacji."""
@@ -159,18 +222,66 @@ class RouteManager:
     #  API: lifecycle jobów tras (threading / busy)
     # ---------------------------------------------------------
 
-    def is_busy(self) -> bool:
-        """Zwraca True, jeśli *jakikolwiek* job trasy jest w toku.
+    def _active_jobs_locked(self, mode: Optional[str] = None) -> list[RouteJob]:
+        jobs = [job for job in self._jobs.values() if job.state == "running"]
+        if mode is not None:
+            jobs = [job for job in jobs if job.mode == mode]
+        return jobs
 
-        Uwaga: to prosta flaga, nie ma tu zarządzania kolejką jobów.
-        """
+    def is_busy(self, mode: Optional[str] = None) -> bool:
+        """Zwraca True, jeśli job trasy (dowolny albo danego trybu) jest w toku."""
         with self.lock:
-            return self._busy
+            return bool(self._active_jobs_locked(mode))
 
     def current_mode(self) -> Optional[str]:
-        """Zwraca tryb aktualnie liczonej trasy (np. 'neutron', 'riches') lub None."""
+        """Tryb ostatnio wystartowanego, wciąż liczonego joba (np. 'neutron') lub None."""
+        with self.lock:
+            active = self._active_jobs_locked()
+            if not active:
+                return None
+            return max(active, key=lambda job: job.job_id).mode
+
+    def active_modes(self) -> list[str]:
         with self.lock:
-            return self._current_mode
+            return [job.mode for job in sorted(self._active_jobs_locked(), key=lambda job: job.job_id)]
+
+    def jobs_snapshot(self) -> list[dict[str, Any]]:
+        """Stan i czasy trwania jobów: aktywne + ostatnie zakończone."""
+        with self.lock:
+            active = sorted(self._jobs.values(), key=lambda job: job.job_id)
+            history = list(self._job_history)
+        return [job.snapshot() for job in history + active]
+
+    @staticmethod
+    def _resolve_priority(mode: str, priority: Optional[int]) -> int:
+        if priority is not None:
+            return int(priority)
+        return int(_MODE_PRIORITY.get(mode, 0))
+
+    def _plan_start_locked(self, mode: str, priority: int, supersede: bool) -> tuple[bool, list[RouteJob]]:
+        """(czy można wystartować, joby do anulowania)."""
+        active = self._active_jobs_locked()
+        to_cancel: list[RouteJob] = []
+        if supersede:
+            to_cancel.extend(job for job in active if job.mode == mode)
+        remaining = [job for job in active if job not in to_cancel]
+        if len(remaining) >= self._max_parallel_jobs:
+            victims = sorted(
+                (job for job in remaining if job.priority < priority),
+                key=lambda job: (job.priority, job.job_id),
+            )
+            overflow = len(remaining) - self._max_parallel_jobs + 1
+            if len(victims) < overflow:
+                return False, []
+            to_cancel.extend(victims[:overflow])
+        return True, to_cancel
+
+    def can_start(self, mode: str, *, priority: Optional[int] = None, supersede: bool = True) -> bool:
+        """Czy start_route_thread(mode) zostałby przyjęty (wolny slot, supersede albo wywłaszczenie)."""
+        mode_text = str(mode or "").strip() or "unknown"
+        with self.lock:
+            ok, _ = self._plan_start_locked(mode_text, self._resolve_priority(mode_text, priority), supersede)
+        return ok
 
     def start_route_thread(
         self,
@@ -179,121 +290,175 @@ class RouteManager:
         *,
         args: tuple = (),
         gui_ref: Any | None = None,
+        priority: Optional[int] = None,
+        supersede: bool = True,
     ) -> bool:
         """Uruchamia job trasy w osobnym wątku.
 
         - *nie* zna szczegółów SPANSH,
         - odpowiada tylko za:
-          • ustawienie flag busy / current_mode,
-          • wystartowanie wątku,
-          • zalogowanie początku i końca joba.
+          • limit równoległych jobów, priorytety i supersede (nowy job
+            tego samego trybu anuluje poprzedni),
+          • token anulowania dostępny w wątku workera
+            (logic.utils.cancellation.current_cancel_token),
+          • wystartowanie wątku i zalogowanie początku/końca joba.
 
         Docelowy worker (target) powinien:
-        - wywołać backend (SpanshClient / logika routes),
+        - wywołać backend (SpanshClient / logika routes) – SpanshClient sam
+          podejmuje token z wątku i przerywa polling po anulowaniu,
         - ustawić trasę przez set_route(...),
         - wrzucić odpowiednie komunikaty do MSG_QUEUE / zaktualizować GUI.
         """
 
         _ = gui_ref
         mode_text = str(mode or "").strip() or "unknown"
+        job_priority = self._resolve_priority(mode_text, priority)
 
         with self.lock:
-            if self._busy:
+            ok, to_cancel = self._plan_start_locked(mode_text, job_priority, supersede)
+            if not ok:
                 log_event_throttled(
                     "route_job_start_rejected_busy",
                     5000,
                     "PLANNER",
-                    "route job start rejected because another job is busy",
+                    "route job start rejected because planner capacity is busy",
                     requested_mode=mode_text,
-                    busy_mode=str(self._current_mode or ""),
+                    busy_mode=",".join(job.mode for job in self._active_jobs_locked()),
                 )
                 return False
-            self._busy = True
-            self._current_mode = mode_text
             self._active_job_token += 1
-            job_token = int(self._active_job_token)
+            job = RouteJob(job_id=int(self._active_job_token), mode=mode_text, priority=job_priority)
+            self._jobs[job.job_id] = job
+            for victim in to_cancel:
+                reason = "superseded" if victim.mode == mode_text else "preempted"
+                self._finish_job_locked(victim, state="cancelled", reason=reason)
+
+        for victim in to_cancel:
+            log_event(
+                "PLANNER",
+                "route_job_cancelled",
+                mode=victim.mode,
+                job_id=victim.job_id,
+                reason=victim.cancel_reason,
+                by_job_id=job.job_id,
+            )
 
-        def _runner(token: int, mode_name: str) -> None:
+        def _runner(route_job: RouteJob) -> None:
             try:
-                target(*args)
+                with bind_cancel_token(route_job.token):
+                    target(*args)
+            except RouteCancelled:
+                pass
             except Exception as exc:
                 log_event_throttled(
                     "route_job_worker_exception",
                     2000,
                     "PLANNER",
                     "route job worker raised exception",
-                    mode=mode_name,
+                    mode=route_job.mode,
                     error=f"{type(exc).__name__}: {exc}",
                 )
+                with self.lock:
+                    self._finish_job_locked(route_job, state="failed")
             finally:
-                # Koniec joba – reset stanu busy
+                # Koniec joba – zwolnienie slotu (o ile nie zrobił tego
+                # już cancel / watchdog).
                 should_emit_done = False
                 with self.lock:
-                    if self._active_job_token == token:
-                        self._busy = False
-                        self._current_mode = None
-                        self._worker_thread = None
+                    if route_job.state == "running":
+                        self._finish_job_locked(route_job, state="done")
                         should_emit_done = True
+                    if self._worker_thread is route_job.thread:
+                        self._worker_thread = None
                 if should_emit_done:
-                    log_event("PLANNER", "route_job_done", mode=mode_name)
-
+                    log_event(
+                        "PLANNER",
+                        "route_job_done",
+                        mode=route_job.mode,
+                        job_id=route_job.job_id,
+                        duration_ms=route_job.duration_ms(),
+                    )
 
         # Prosty log dla diagnostyki (nie zmienia UX zakładek)
-        log_event("PLANNER", "route_job_start", mode=mode_text)
+        log_event("PLANNER", "route_job_start", mode=mode_text, job_id=job.job_id, priority=job_priority)
         t = threading.Thread(
             target=_runner,
-            args=(job_token, mode_text),
+            args=(job,),
             daemon=True,
-            name=f"route_job:{mode_text}:{job_token}",
+            name=f"route_job:{mode_text}:{job.job_id}",
         )
-        t.start()
-
+        job.thread = t
         with self.lock:
             self._worker_thread = t
-        self._start_route_job_watchdog(mode=mode_text, token=job_token, worker=t)
+        t.start()
+
+        self._start_route_job_watchdog(job)
         return True
 
-    def _start_route_job_watchdog(self, *, mode: str, token: int, worker: threading.Thread) -> None:
+    def _finish_job_locked(self, job: RouteJob, *, state: str, reason: str = "") -> None:
+        if job.state != "running":
+            return
+        job.state = state
+        job.finished_ts = time.monotonic()
+        if reason:
+            job.cancel_reason = reason
+            job.token.cancel(reason)
+        self._jobs.pop(job.job_id, None)
+        self._job_history.append(job)
+
+    def _start_route_job_watchdog(self, job: RouteJob) -> None:
         timeout_s = float(self._route_job_timeout_s or 0.0)
         if timeout_s <= 0.0:
             return
+        worker = job.thread
 
         def _watchdog() -> None:
             try:
-                worker.join(timeout=timeout_s)
+                if worker is not None:
+                    worker.join(timeout=timeout_s)
             except Exception:
                 return
-            if not worker.is_alive():
+            if worker is not None and not worker.is_alive():
                 return
             with self.lock:
-                if self._active_job_token != token:
+                if job.state != "running":
                     return
-                self._busy = False
-                self._current_mode = None
-                self._worker_thread = None
+                # Token budzi polling SPANSH, więc osierocony worker kończy
+                # się zamiast generować ruch do końca pętli.
+                self._finish_job_locked(job, state="timed_out", reason="timeout")
+                if self._worker_thread is worker:
+                    self._worker_thread = None
             log_event_throttled(
                 "route_job_timeout",
                 2000,
                 "PLANNER",
-                "route job exceeded timeout and was detached from busy state",
-                mode=mode,
+                "route job exceeded timeout and was cancelled",
+                mode=job.mode,
+                job_id=job.job_id,
                 timeout_s=timeout_s,
             )
 
         threading.Thread(
             target=_watchdog,
             daemon=True,
-            name=f"route_watchdog:{mode}:{token}",
+            name=f"route_watchdog:{job.mode}:{job.job_id}",
         ).start()
 
-    def cancel_route(self) -> None:
-        """Placeholder pod ewentualne anulowanie trasy w przyszłości.
+    def cancel_route(self, mode: Optional[str] = None, *, reason: str = "user") -> int:
+        """Anuluje aktywne joby (wszystkie albo danego trybu); zwraca ich liczbę.
 
-        Aktualnie nie ma bezpiecznego sposobu na przerwanie wątku obliczeń
-        (standardowe ograniczenie Pythona), więc metoda jedynie loguje zamiast
-        próbować ubijać wątek na siłę.
+        Wątek workera nie jest zabijany – token anulowania przerywa polling
+        SPANSH, a wynik anulowanego joba worker powinien zignorować.
         """
-        log_event("PLANNER", "route_cancel_ignored")
+        with self.lock:
+            victims = self._active_jobs_locked(mode)
+            for job in victims:
+                self._finish_job_locked(job, state="cancelled", reason=reason)
+        for job in victims:
+            log_event("PLANNER", "route_job_cancelled", mode=job.mode, job_id=job.job_id, reason=reason)
+        if not victims:
+            log_event("PLANNER", "route_cancel_no_active_job", mode=str(mode or ""))
+        return len(victims)
 
 
 # Globalny, współdzielony menedżer dla całej aplikacji
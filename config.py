@@ -10,13 +10,18 @@ from contextlib import contextmanager
 from typing import Any, Dict
 
 from logic.context_state_contract import (
-    contract_with_runtime_state,
-    load_state_contract_file,
+    STATE_CORE_SEGMENT,
+    STATE_RUNTIME_SEGMENT,
+    anti_spam_domains,
+    anti_spam_section_domain,
+    assemble_state_contract,
     migrate_state_contract_payload,
+    normalize_runtime_domain_state,
     restart_loss_audit_contract,
     runtime_state_from_contract,
-    save_state_contract_file,
+    split_state_contract,
 )
+from logic.state_segments import STATE_STORE_DOMAINS, StateSegmentStore
 
 # --- ŚCIEŻKI / PLIKI ---------------------------------------------------------
 
@@ -348,6 +353,14 @@ DEFAULT_SETTINGS: Dict[str, Any] = {
     "cash_in.cross_system_discovery_enabled": True,
     "cash_in.cross_system_radius_ly": 120.0,
     "cash_in.cross_system_max_systems": 12,
+    "cash_in.cross_system_workers": 4,
+    "cash_in.cross_system_deadline_sec": 8.0,
+    "cash_in.provider_hedge_after_sec": 0.8,
+    "cash_in.provider_request_timeout_sec": 4.0,
+    "cash_in.provider_race_deadline_sec": 2.5,         # auto (journal/StartJump)
+    "cash_in.provider_race_deadline_manual_sec": 12.0, # reczny trigger (worker GUI)
+    "cash_in.provider_race_late_window_sec": 20.0,     # spoznione wyniki -> odswiezenie panelu
+    "cash_in.provider_race_late_window_manual_sec": 0.0,
     "cash_in.swr_cache_enabled": True,
     "cash_in.swr_cache_fresh_ttl_sec": 900.0,
     "cash_in.swr_cache_stale_ttl_sec": 21600.0,
@@ -407,6 +420,18 @@ DEFAULT_SETTINGS: Dict[str, Any] = {
     "anti_spam.trade_jackpot.max_items": 1024,
     "anti_spam.smuggler_warned.ttl_sec": 1200.0,
     "anti_spam.smuggler_warned.max_targets": 512,
+    # Segmenty stanu: min. odstep zapisu domeny runtime (config.STATE).
+    "state.flush.runtime_min_interval_sec": 1.0,
+    # Log sink (renata_log): ring buffer, sampling debug/info, limit linii do GUI.
+    "log_sink.ring_capacity": 5000,
+    "log_sink.sample_rate_per_sec": 20.0,
+    "log_sink.sample_burst": 60,
+    "log_sink.gui_rate_per_sec": 20.0,
+    "log_sink.gui_burst": 200,
+    "log_sink.summary_interval_sec": 10.0,
+    "log_sink.jsonl_enabled": False,
+    "log_sink.jsonl_path": "",
+    "log_sink.jsonl_max_bytes": 5242880,
     # F7 risk/rebuy value thresholds (credits).
     "risk.threshold.exploration.low_cr": DEFAULT_RISK_VALUE_THRESHOLDS["exploration"]["low"],
     "risk.threshold.exploration.med_cr": DEFAULT_RISK_VALUE_THRESHOLDS["exploration"]["med"],
@@ -444,6 +469,16 @@ DEFAULT_SETTINGS: Dict[str, Any] = {
     "features.spansh.neutron_via_enabled": True,
     "features.spansh.neutron_overcharge_enabled": True,
     "features.spansh.trade_market_age_enabled": True,
+    "features.spansh.speculative_neutron_enabled": True,
+    "spansh.speculative.max_concurrent": 1,
+    "spansh.speculative.max_per_hour": 6,
+    "spansh.speculative.eval_interval_sec": 15.0,
+    "spansh.speculative.idle_after_sec": 10.0,   # journal bez nowych linii
+    "spansh.speculative.neutron_efficiency": 60.0,  # domyslne eff zakladki Neutron
+    # Lokalny plotter neutronowy (fallback bez SPANSH, katalog z tools/build_star_catalogue.py)
+    "neutron.local_plotter_enabled": True,
+    "neutron.local_catalogue_path": renata_user_home_file("neutron_star_catalogue.bin"),
+    "neutron.local_plotter_max_expansions": 50_000,
 
     # UI / zachowanie
     "use_system_theme": True,
@@ -488,6 +523,8 @@ DEFAULT_SETTINGS: Dict[str, Any] = {
     "ship_state_use_status_json": True,
     "ship_state_use_cargo_json": True,
     "ship_state_debug": False,
+    # Fuel/Cargo: max. emisji ship_state na sekunde (0 = kazda zmiana od razu).
+    "ship_state_emit_max_per_sec": 4.0,
 
     # FIT RESOLVER (JR-3)
     "fit_resolver_enabled": True,
@@ -506,11 +543,17 @@ DEFAULT_SETTINGS: Dict[str, Any] = {
     "jump_range_validate_debug": False,
     "jump_range_validate_tolerance_ly": 0.05,
     "jump_range_validate_log_only": True,
+    # Memo zasiegu: masa kwantowana do kroku (t), LRU, prog zmiany do emisji.
+    "jump_range_memo_mass_quantum_t": 0.05,
+    "jump_range_memo_max_items": 256,
+    "jump_range_emit_epsilon_ly": 0.01,
 
     # PLANNERS (JR-6)
     "planner_auto_use_ship_jump_range": True,
     "planner_allow_manual_range_override": True,
     "planner_fallback_range_ly": 30.0,
+    "route_fuel_simulation_enabled": True,
+    "route_fuel_refuel_threshold": 0.5,  # scoop gdy bak < 50%
 
     # UI (JR-7)
     "ui_show_jump_range": True,
@@ -545,6 +588,7 @@ DEFAULT_SETTINGS: Dict[str, Any] = {
     "features.trade.station_autocomplete_by_system": True,
     "features.trade.station_lookup_online": True,
     "features.trade.market_age_slider": True,
+    "features.trade.offline_solver_mode": "fallback",  # off | fallback | race (PlayerDB)
 
     # DEBUG
     "debug_autocomplete": False,
@@ -823,44 +867,52 @@ class _PersistentStateDict(dict):
 
 
 _STATE_LOCK = threading.RLock()
-_STATE_WRITE_ERROR_LOGGED = False
 
 
-def _load_state_contract() -> Dict[str, Any]:
-    _migrate_state_if_needed(STATE_FILE)
-    contract = load_state_contract_file(STATE_FILE)
-    normalized = migrate_state_contract_payload(contract)
+def state_segment_min_interval_sec(domain: str) -> float:
+    """
+    Minimalny odstep miedzy zapisami segmentu domeny (flusher).
+    Klucz per domena: "state.flush.<domena>_min_interval_sec"; domeny anti-spam
+    bez wlasnego klucza dziedzicza "anti_spam.persist_min_interval_sec".
+    """
+    if domain == STATE_CORE_SEGMENT:
+        return 0.0
+    fallback_key = (
+        "state.flush.runtime_min_interval_sec"
+        if domain == STATE_RUNTIME_SEGMENT
+        else "anti_spam.persist_min_interval_sec"
+    )
     try:
-        save_state_contract_file(STATE_FILE, normalized)
+        value = config.get(f"state.flush.{domain}_min_interval_sec")
+        if value is None:
+            value = config.get(fallback_key, 2.0)
+        return max(0.5, float(value))
     except Exception:
-        pass
-    return normalized
+        return 2.0
+
+
+_STATE_STORE = StateSegmentStore(lambda: STATE_FILE, min_interval_provider=state_segment_min_interval_sec)
+
+
+def _load_runtime_state() -> Dict[str, Any]:
+    _migrate_state_if_needed(STATE_FILE)
+    return _STATE_STORE.get(STATE_RUNTIME_SEGMENT)
 
 
 def _persist_runtime_state_snapshot(snapshot: Dict[str, Any]) -> None:
-    global _STATE_CONTRACT, _STATE_WRITE_ERROR_LOGGED
-    with _STATE_LOCK:
-        candidate = contract_with_runtime_state(_STATE_CONTRACT, snapshot or {})
-        _STATE_CONTRACT = candidate
-        try:
-            save_state_contract_file(STATE_FILE, candidate)
-            _STATE_WRITE_ERROR_LOGGED = False
-        except Exception as exc:
-            if not _STATE_WRITE_ERROR_LOGGED:
-                _STATE_WRITE_ERROR_LOGGED = True
-                print(f"[CONFIG] State persistence error: {exc}")
+    # Zmiany config.STATE sa czeste; segment runtime zapisuje flusher.
+    _STATE_STORE.put(STATE_RUNTIME_SEGMENT, snapshot or {})
 
 
-_STATE_CONTRACT = _load_state_contract()
 STATE = _PersistentStateDict(
-    runtime_state_from_contract(_STATE_CONTRACT),
+    _load_runtime_state(),
     on_change=_persist_runtime_state_snapshot,
 )
 
 
 def get_state_contract() -> Dict[str, Any]:
     with _STATE_LOCK:
-        return copy.deepcopy(migrate_state_contract_payload(_STATE_CONTRACT))
+        return assemble_state_contract({domain: _STATE_STORE.get(domain) for domain in STATE_STORE_DOMAINS})
 
 
 def _deep_merge_dict(base: Dict[str, Any], patch: Dict[str, Any]) -> Dict[str, Any]:
@@ -876,38 +928,51 @@ def _deep_merge_dict(base: Dict[str, Any], patch: Dict[str, Any]) -> Dict[str, A
 def save_state_contract(contract_payload: Dict[str, Any]) -> Dict[str, Any]:
     """
     Persist layered state contract and refresh legacy config.STATE snapshot.
+    Zapisywane sa tylko segmenty, ktorych zawartosc sie zmienila.
     """
-    global _STATE_CONTRACT, _STATE_WRITE_ERROR_LOGGED
     normalized = migrate_state_contract_payload(contract_payload)
+    segments = split_state_contract(normalized)
     with _STATE_LOCK:
-        _STATE_CONTRACT = normalized
-        try:
-            save_state_contract_file(STATE_FILE, normalized)
-            _STATE_WRITE_ERROR_LOGGED = False
-        except Exception as exc:
-            if not _STATE_WRITE_ERROR_LOGGED:
-                _STATE_WRITE_ERROR_LOGGED = True
-                print(f"[CONFIG] State persistence error: {exc}")
-        STATE.replace_all(runtime_state_from_contract(_STATE_CONTRACT), notify=False)
-        return copy.deepcopy(_STATE_CONTRACT)
+        for domain in STATE_STORE_DOMAINS:
+            _STATE_STORE.put(domain, segments[domain])
+        _STATE_STORE.flush()
+        STATE.replace_all(runtime_state_from_contract(normalized), notify=False)
+        return copy.deepcopy(normalized)
+
+
+def flush_state(timeout: float | None = None) -> bool:
+    """
+    Zapisuje wszystkie brudne segmenty stanu od razu (np. przy zamykaniu aplikacji).
+    """
+    return _STATE_STORE.flush_all(timeout)
+
+
+def get_state_store_stats() -> Dict[str, Any]:
+    return _STATE_STORE.stats()
+
+
+def _get_core_layer(layer: str) -> Dict[str, Any]:
+    value = _STATE_STORE.peek(STATE_CORE_SEGMENT).get(layer)
+    return copy.deepcopy(value) if isinstance(value, dict) else {}
+
+
+def _save_core_layer(layer: str, value: Any) -> Dict[str, Any]:
+    with _STATE_LOCK:
+        core = dict(_STATE_STORE.peek(STATE_CORE_SEGMENT))
+        core[layer] = dict(value or {}) if isinstance(value, dict) else {}
+        _STATE_STORE.put(STATE_CORE_SEGMENT, core, flush=True)
+        return _get_core_layer(layer)
 
 
 def get_ui_state(default: Dict[str, Any] | None = None) -> Dict[str, Any]:
-    contract = get_state_contract()
-    value = contract.get("ui_state")
-    if not isinstance(value, dict):
-        value = {}
+    value = _get_core_layer("ui_state")
     if isinstance(default, dict):
         return _deep_merge_dict(default, value)
-    return copy.deepcopy(value)
+    return value
 
 
 def save_ui_state(ui_state: Dict[str, Any]) -> Dict[str, Any]:
-    contract = get_state_contract()
-    contract["ui_state"] = dict(ui_state or {}) if isinstance(ui_state, dict) else {}
-    saved = save_state_contract(contract)
-    out = saved.get("ui_state")
-    return copy.deepcopy(out) if isinstance(out, dict) else {}
+    return _save_core_layer("ui_state", ui_state)
 
 
 def update_ui_state(patch: Dict[str, Any]) -> Dict[str, Any]:
@@ -917,21 +982,18 @@ def update_ui_state(patch: Dict[str, Any]) -> Dict[str, Any]:
 
 
 def get_domain_state(default: Dict[str, Any] | None = None) -> Dict[str, Any]:
-    contract = get_state_contract()
-    value = contract.get("domain_state")
-    if not isinstance(value, dict):
-        value = {}
+    value = _STATE_STORE.get(STATE_RUNTIME_SEGMENT)
     if isinstance(default, dict):
         return _deep_merge_dict(default, value)
-    return copy.deepcopy(value)
+    return value
 
 
 def save_domain_state(domain_state: Dict[str, Any]) -> Dict[str, Any]:
-    contract = get_state_contract()
-    contract["domain_state"] = dict(domain_state or {}) if isinstance(domain_state, dict) else {}
-    saved = save_state_contract(contract)
-    out = saved.get("domain_state")
-    return copy.deepcopy(out) if isinstance(out, dict) else {}
+    normalized = normalize_runtime_domain_state(domain_state if isinstance(domain_state, dict) else {})
+    with _STATE_LOCK:
+        _STATE_STORE.put(STATE_RUNTIME_SEGMENT, normalized, flush=True)
+        STATE.replace_all(copy.deepcopy(normalized), notify=False)
+    return copy.deepcopy(normalized)
 
 
 def update_domain_state(patch: Dict[str, Any]) -> Dict[str, Any]:
@@ -976,30 +1038,52 @@ def update_last_context(
     return get_last_context()
 
 
+def get_anti_spam_section(section: str, default: Any = None) -> Any:
+    """
+    Jedna sekcja anti_spam_state; czyta (leniwie) tylko segment jej domeny.
+    """
+    value = _STATE_STORE.peek(anti_spam_section_domain(section)).get(section)
+    if value is None:
+        return copy.deepcopy(default)
+    return copy.deepcopy(value)
+
+
 def get_anti_spam_state(default: Dict[str, Any] | None = None) -> Dict[str, Any]:
-    contract = get_state_contract()
-    value = contract.get("anti_spam_state")
-    if not isinstance(value, dict):
-        value = {}
+    value: Dict[str, Any] = {}
+    for domain in anti_spam_domains():
+        value.update(_STATE_STORE.get(domain))
     if isinstance(default, dict):
         return _deep_merge_dict(default, value)
-    return copy.deepcopy(value)
+    return value
 
 
 def save_anti_spam_state(anti_spam_state: Dict[str, Any]) -> Dict[str, Any]:
-    contract = get_state_contract()
-    contract["anti_spam_state"] = (
-        dict(anti_spam_state or {}) if isinstance(anti_spam_state, dict) else {}
-    )
-    saved = save_state_contract(contract)
-    out = saved.get("anti_spam_state")
-    return copy.deepcopy(out) if isinstance(out, dict) else {}
+    source = anti_spam_state if isinstance(anti_spam_state, dict) else {}
+    by_domain: Dict[str, Dict[str, Any]] = {domain: {} for domain in anti_spam_domains()}
+    for section, value in source.items():
+        by_domain[anti_spam_section_domain(section)][section] = value
+    with _STATE_LOCK:
+        for domain, payload in by_domain.items():
+            _STATE_STORE.put(domain, payload, flush=True)
+    return get_anti_spam_state()
 
 
-def update_anti_spam_state(patch: Dict[str, Any]) -> Dict[str, Any]:
-    base = get_anti_spam_state(default={})
-    merged = _deep_merge_dict(base, patch if isinstance(patch, dict) else {})
-    return save_anti_spam_state(merged)
+def update_anti_spam_state(patch: Dict[str, Any], *, flush: bool = False) -> Dict[str, Any]:
+    """
+    Deep-merge sekcji do anti_spam_state. Dotkniete domeny trafiaja do flushera
+    (flush=True: zapis od razu). Zwraca scalone, zaktualizowane sekcje.
+    """
+    by_domain: Dict[str, Dict[str, Any]] = {}
+    for section, value in (patch if isinstance(patch, dict) else {}).items():
+        by_domain.setdefault(anti_spam_section_domain(section), {})[section] = value
+    out: Dict[str, Any] = {}
+    with _STATE_LOCK:
+        for domain, domain_patch in by_domain.items():
+            merged = _deep_merge_dict(_STATE_STORE.peek(domain), domain_patch)
+            _STATE_STORE.put(domain, merged, flush=flush)
+            for section in domain_patch:
+                out[section] = copy.deepcopy(_STATE_STORE.peek(domain).get(section))
+    return out
 
 
 _PREFERENCES_DEFAULTS: Dict[str, Any] = {
@@ -1094,8 +1178,7 @@ def _apply_preferences_to_runtime_settings(preferences: Any, *, explicit_only: b
 
 
 def get_preferences(default: Dict[str, Any] | None = None) -> Dict[str, Any]:
-    contract = get_state_contract()
-    raw = contract.get("preferences")
+    raw = _get_core_layer("preferences")
     resolved = _normalize_preferences_payload(raw, fill_defaults=True)
     if isinstance(default, dict):
         return _deep_merge_dict(default, resolved)
@@ -1104,9 +1187,7 @@ def get_preferences(default: Dict[str, Any] | None = None) -> Dict[str, Any]:
 
 def save_preferences(preferences: Dict[str, Any]) -> Dict[str, Any]:
     normalized = _normalize_preferences_payload(preferences, fill_defaults=True)
-    contract = get_state_contract()
-    contract["preferences"] = copy.deepcopy(normalized)
-    save_state_contract(contract)
+    _save_core_layer("preferences", normalized)
     _apply_preferences_to_runtime_settings(normalized, explicit_only=False)
     return copy.deepcopy(normalized)
 
@@ -1121,8 +1202,7 @@ def update_preferences(patch: Dict[str, Any]) -> Dict[str, Any]:
 
 def _bootstrap_preferences_from_state_contract() -> None:
     try:
-        with _STATE_LOCK:
-            raw = (_STATE_CONTRACT or {}).get("preferences", {})
+        raw = _get_core_layer("preferences")
         if isinstance(raw, dict) and raw:
             _apply_preferences_to_runtime_settings(raw, explicit_only=True)
     except Exception:
@@ -1133,7 +1213,7 @@ def persist_runtime_state() -> Dict[str, Any]:
     """
     Force flush of current legacy runtime state into layered contract.
     """
-    _persist_runtime_state_snapshot(dict(STATE))
+    _STATE_STORE.put(STATE_RUNTIME_SEGMENT, dict(STATE), flush=True)
     return get_state_contract()
 
 
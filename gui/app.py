@@ -2,6 +2,8 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import os
 import queue
+import time
+from collections import deque
 import config
 from logic import utils
 from gui import common
@@ -9,6 +11,7 @@ from gui import strings as ui
 from gui.tabs import pulpit, engineer
 from gui.tabs import spansh
 from gui.menu_bar import RenataMenuBar
+from gui.lazy_tab import LazyTab
 from gui.tabs.settings_window import SettingsWindow
 from gui.window_positions import restore_window_geometry, bind_window_geometry, save_window_geometry
 from gui.window_chrome import apply_renata_orange_window_chrome
@@ -21,12 +24,24 @@ from app.route_manager import route_manager
 import threading
 from logic.science_data import load_science_data
 from logic.modules_data import load_modules_data
+from logic.utils import renata_log
 from logic.utils.renata_log import log_event, log_event_throttled
 from logic.capabilities import CAP_UI_EXTENDED_TABS, has_capability
 
 _QUEUE_TICK_MAX_ITEMS = 20
 _QUEUE_TICK_IDLE_DELAY_MS = 100
 _QUEUE_TICK_BACKLOG_DELAY_MS = 0
+# Feed dziennika buforowany do czasu zbudowania zakladki "Dziennik".
+_LAZY_JOURNAL_FEED_BUFFER_MAX = 500
+_STATE_FLUSH_ON_CLOSE_TIMEOUT_SEC = 2.0
+_SPANSH_TAB_MESSAGES = frozenset(
+    {
+        "status_neu", "list_nav", "select_nav",
+        "status_rtr", "list_rtr", "select_rtr",
+        "status_amm", "list_amm", "select_amm",
+        "status_trade",
+    }
+)
 
 
 def _exc_text(exc: Exception) -> str:
@@ -318,7 +333,18 @@ class RenataApp:
         self.main_nb.pack(fill="both", expand=1)
         self.main_nb.bind("<<NotebookTabChanged>>", self._on_tab_changed)
 
+        # Zakladki inne niz Pulpit budujemy leniwie (przy pierwszym wyborze),
+        # zeby MainLoop i pierwsze komunikaty nie czekaly na cale drzewo widgetow.
+        self.startup_timings: dict[str, float] = {}
+        self._lazy_tabs: dict[str, LazyTab] = {}
+        self._lazy_tab_attrs: dict[str, str] = {}
+        self._pending_spansh_start_label = None
+        self._pending_spansh_jump_range = None
+        self._pending_spansh_messages: dict = {}
+        self._pending_journal_feed: deque = deque(maxlen=_LAZY_JOURNAL_FEED_BUFFER_MAX)
+
         # --- Pulpit ---
+        started = time.perf_counter()
         self.tab_pulpit = pulpit.PulpitTab(
             self.main_nb,
             on_generate_science_excel=self.on_generate_science_excel,
@@ -331,10 +357,16 @@ class RenataApp:
             route_manager=route_manager,
         )
         self.main_nb.add(self.tab_pulpit, text=ui.TAB_MAIN_PULPIT)
+        self.startup_timings["tab.pulpit"] = (time.perf_counter() - started) * 1000.0
 
         # --- SPANSH ---
-        self.tab_spansh = spansh.SpanshTab(self.main_nb, self.root)
-        self.main_nb.add(self.tab_spansh, text=ui.TAB_MAIN_SPANSH)
+        self.tab_spansh = None
+        self._add_lazy_main_tab(
+            "spansh",
+            ui.TAB_MAIN_SPANSH,
+            lambda parent: spansh.SpanshTab(parent, self.root),
+            attr="tab_spansh",
+        )
 
         # --- Inara / EDTools / Inżynier (ukryte w FREE) ---
         self.tab_inara = None
@@ -357,27 +389,36 @@ class RenataApp:
                 font=("Arial", 14),
             ).pack(pady=50)
 
-            self.tab_engi = engineer.EngineerTab(self.main_nb, self)
-            self.main_nb.add(self.tab_engi, text=ui.TAB_MAIN_ENGINEER)
+            self._add_lazy_main_tab(
+                "engineer",
+                ui.TAB_MAIN_ENGINEER,
+                lambda parent: engineer.EngineerTab(parent, self),
+                attr="tab_engi",
+            )
 
         # --- Dziennik ---
         from logic.logbook_manager import LogbookManager
         self.logbook_manager = LogbookManager()
-        self.tab_journal = LogbookTab(self.main_nb, app=self, manager=self.logbook_manager)
-        self.main_nb.add(self.tab_journal, text=ui.TAB_MAIN_JOURNAL)
+        self.tab_journal = None
+        self._add_lazy_main_tab(
+            "journal",
+            ui.TAB_MAIN_JOURNAL,
+            lambda parent: LogbookTab(parent, app=self, manager=self.logbook_manager),
+            attr="tab_journal",
+        )
 
         # Mapa kluczy -> zakładek (do obsługi menu "Nawigacja")
         self._tab_map = {
             "pulpit": self.tab_pulpit,
-            "spansh": self.tab_spansh,
-            "journal": self.tab_journal,
+            "spansh": self._lazy_tabs["spansh"],
+            "journal": self._lazy_tabs["journal"],
         }
         if self.tab_inara is not None:
             self._tab_map["inara"] = self.tab_inara
         if self.tab_edtools is not None:
             self._tab_map["edtools"] = self.tab_edtools
-        if self.tab_engi is not None:
-            self._tab_map["engineer"] = self.tab_engi
+        if "engineer" in self._lazy_tabs:
+            self._tab_map["engineer"] = self._lazy_tabs["engineer"]
         self._tab_widget_to_key = {str(tab): key for key, tab in self._tab_map.items()}
         self._restore_main_tab_from_ui_state()
 
@@ -396,7 +437,7 @@ class RenataApp:
                 "pulpit": ui.TAB_MAIN_PULPIT,
                 "spansh": ui.TAB_MAIN_SPANSH,
                 "journal": ui.TAB_MAIN_JOURNAL,
-                **({"engineer": ui.TAB_MAIN_ENGINEER} if self.tab_engi is not None else {}),
+                **({"engineer": ui.TAB_MAIN_ENGINEER} if "engineer" in self._tab_map else {}),
                 **({"inara": ui.TAB_MAIN_INARA} if self.tab_inara is not None else {}),
                 **({"edtools": ui.TAB_MAIN_EDTOOLS} if self.tab_edtools is not None else {}),
             },
@@ -496,10 +537,112 @@ class RenataApp:
             )
             return None
 
+    def _add_lazy_main_tab(self, key: str, text: str, factory, *, attr: str) -> LazyTab:
+        placeholder = LazyTab(self.main_nb, key=key, factory=factory, on_built=self._on_lazy_tab_built)
+        self.main_nb.add(placeholder, text=text)
+        self._lazy_tabs[key] = placeholder
+        self._lazy_tab_attrs[key] = attr
+        return placeholder
+
+    def _materialize_main_tab(self, tab_key: str | None):
+        lazy_tabs = getattr(self, "_lazy_tabs", None)
+        if not isinstance(lazy_tabs, dict):
+            return None
+        placeholder = lazy_tabs.get(str(tab_key or ""))
+        if placeholder is None:
+            return None
+        return placeholder.materialize()
+
+    def _on_lazy_tab_built(self, key: str, widget, build_ms: float) -> None:
+        attr = self._lazy_tab_attrs.get(key)
+        if attr:
+            setattr(self, attr, widget)
+        self.startup_timings[f"tab.{key}"] = float(build_ms)
+        if key == "spansh":
+            self._replay_pending_spansh_state()
+        elif key == "journal":
+            self._replay_pending_journal_feed()
+
+    def _replay_pending_spansh_state(self) -> None:
+        tab = self.tab_spansh
+        start_label = self._pending_spansh_start_label
+        jump_range = self._pending_spansh_jump_range
+        self._pending_spansh_start_label = None
+        self._pending_spansh_jump_range = None
+        pending = list(self._pending_spansh_messages.items())
+        self._pending_spansh_messages.clear()
+        try:
+            if start_label is not None and hasattr(tab, "update_start_label"):
+                tab.update_start_label(start_label)
+            if jump_range is not None and hasattr(tab, "update_jump_range"):
+                tab.update_jump_range(jump_range)
+        except Exception as exc:
+            _log_app_fallback("lazy_tab.spansh.replay", "failed to replay pending Spansh state", exc)
+        for msg_type, content in pending:
+            try:
+                self._apply_spansh_tab_message(msg_type, content)
+            except Exception as exc:
+                _log_app_fallback(
+                    "lazy_tab.spansh.replay_message",
+                    "failed to replay pending Spansh tab message",
+                    exc,
+                    interval_ms=5000,
+                )
+
+    def _apply_spansh_tab_message(self, msg_type: str, content) -> None:
+        tab = self.tab_spansh
+        if msg_type == "status_neu":
+            txt, col = content
+            if hasattr(tab.tab_neutron, "set_status_text"):
+                tab.tab_neutron.set_status_text(txt, col)
+            else:
+                tab.tab_neutron.lbl_status.config(text=txt, foreground=col)
+        elif msg_type == "list_nav":
+            common.wypelnij_liste(tab.tab_neutron.lst_nav, content)
+        elif msg_type == "select_nav":
+            common.podswietl_cel(tab.tab_neutron.lst_nav, content)
+        elif msg_type == "status_rtr":
+            txt, col = content
+            tab.tab_riches.lbl_status.config(text=txt, foreground=col)
+        elif msg_type == "list_rtr":
+            common.wypelnij_liste(tab.tab_riches.lst_rtr, content)
+        elif msg_type == "select_rtr":
+            common.podswietl_cel(tab.tab_riches.lst_rtr, content)
+        elif msg_type == "status_amm":
+            txt, col = content
+            tab.tab_ammonia.lbl_status.config(text=txt, foreground=col)
+        elif msg_type == "list_amm":
+            common.wypelnij_liste(tab.tab_ammonia.lst_amm, content)
+        elif msg_type == "select_amm":
+            common.podswietl_cel(tab.tab_ammonia.lst_amm, content)
+        elif msg_type == "status_trade":
+            txt, col = content
+            tab.tab_trade.lbl_status.config(text=txt, foreground=col)
+
+    def _replay_pending_journal_feed(self) -> None:
+        callback = getattr(self.tab_journal, "append_logbook_feed_item", None)
+        pending = list(self._pending_journal_feed)
+        self._pending_journal_feed.clear()
+        if not callable(callback):
+            return
+        for item in pending:
+            try:
+                callback(item)
+            except Exception as exc:
+                _log_app_fallback(
+                    "lazy_tab.journal.replay",
+                    "failed to replay pending journal feed item",
+                    exc,
+                    interval_ms=5000,
+                )
+
     def _on_tab_changed(self, _event):
+        active_tab_key = self._resolve_active_main_tab_key()
+        materialize = getattr(self, "_materialize_main_tab", None)
+        if callable(materialize):
+            materialize(active_tab_key)
         if hasattr(self.tab_spansh, "hide_suggestions"):
             self.tab_spansh.hide_suggestions()
-        active_tab_key = self._resolve_active_main_tab_key()
         if str(active_tab_key or "") == "journal":
             callback = getattr(self.tab_journal, "on_parent_main_tab_activated", None)
             if callable(callback):
@@ -533,6 +676,7 @@ class RenataApp:
             tab_key = str((main_state or {}).get("active_tab_key") or "").strip().lower()
             tab = self._tab_map.get(tab_key)
             if tab is not None:
+                self._materialize_main_tab(tab_key)
                 self.main_nb.select(tab)
         except Exception as exc:
             _log_app_fallback("ui_state.main.restore", "failed to restore main tab state", exc)
@@ -554,6 +698,7 @@ class RenataApp:
     def _switch_tab(self, tab_key: str):
         tab = self._tab_map.get(tab_key)
         if tab is not None:
+            self._materialize_main_tab(tab_key)
             self.main_nb.select(tab)
 
     def _show_about_dialog(self):
@@ -634,6 +779,17 @@ class RenataApp:
             self._cancel_queue_check()
         except Exception:
             pass
+        try:
+            # Odlozone zapisy stanu (okna debouncera, segmenty domen) nie moga
+            # zginac razem z watkami daemon przy wyjsciu.
+            utils.DEBOUNCER.persist_to_contract(force=True)
+            config.flush_state(timeout=_STATE_FLUSH_ON_CLOSE_TIMEOUT_SEC)
+            flush_feed_cache = getattr(getattr(self, "tab_journal", None), "flush_feed_cache", None)
+            if callable(flush_feed_cache):
+                flush_feed_cache(timeout=_STATE_FLUSH_ON_CLOSE_TIMEOUT_SEC)
+            renata_log.close_log_sink(timeout=_STATE_FLUSH_ON_CLOSE_TIMEOUT_SEC)
+        except Exception as flush_exc:
+            _log_app_fallback("main_close.state_flush", "state flush on close failed", flush_exc)
         try:
             self.root.quit()
         except Exception as quit_exc:
@@ -1057,7 +1213,10 @@ class RenataApp:
 
                 elif msg_type == "logbook_journal_feed":
                     try:
-                        if hasattr(self.tab_journal, "append_logbook_feed_item"):
+                        if getattr(self, "tab_journal", None) is None and hasattr(self, "_pending_journal_feed"):
+                            # Zakladka jeszcze niezbudowana - odtworzymy feed przy materializacji.
+                            self._pending_journal_feed.append(content)
+                        elif hasattr(self.tab_journal, "append_logbook_feed_item"):
                             self.tab_journal.append_logbook_feed_item(content)
                     except Exception as exc:
                         _log_app_fallback(
@@ -1179,36 +1338,14 @@ class RenataApp:
                             interval_ms=3000,
                         )
 
-                elif msg_type == "status_neu":
-                    txt, col = content
-                    if hasattr(self.tab_spansh.tab_neutron, "set_status_text"):
-                        self.tab_spansh.tab_neutron.set_status_text(txt, col)
+                elif msg_type in _SPANSH_TAB_MESSAGES:
+                    if getattr(self, "tab_spansh", None) is None:
+                        # Zakladka Spansh jeszcze niezbudowana: ostatni stan kazdego
+                        # typu (status/lista/zaznaczenie) czeka na materializacje.
+                        self._pending_spansh_messages.pop(msg_type, None)
+                        self._pending_spansh_messages[msg_type] = content
                     else:
-                        self.tab_spansh.tab_neutron.lbl_status.config(text=txt, foreground=col)
-                elif msg_type == "list_nav":
-                    common.wypelnij_liste(self.tab_spansh.tab_neutron.lst_nav, content)
-                elif msg_type == "select_nav":
-                    common.podswietl_cel(self.tab_spansh.tab_neutron.lst_nav, content)
-
-                elif msg_type == "status_rtr":
-                    txt, col = content
-                    self.tab_spansh.tab_riches.lbl_status.config(text=txt, foreground=col)
-                elif msg_type == "list_rtr":
-                    common.wypelnij_liste(self.tab_spansh.tab_riches.lst_rtr, content)
-                elif msg_type == "select_rtr":
-                    common.podswietl_cel(self.tab_spansh.tab_riches.lst_rtr, content)
-
-                elif msg_type == "status_amm":
-                    txt, col = content
-                    self.tab_spansh.tab_ammonia.lbl_status.config(text=txt, foreground=col)
-                elif msg_type == "list_amm":
-                    common.wypelnij_liste(self.tab_spansh.tab_ammonia.lst_amm, content)
-                elif msg_type == "select_amm":
-                    common.podswietl_cel(self.tab_spansh.tab_ammonia.lst_amm, content)
-
-                elif msg_type == "status_trade":
-                    txt, col = content
-                    self.tab_spansh.tab_trade.lbl_status.config(text=txt, foreground=col)
+                        self._apply_spansh_tab_message(msg_type, content)
 
                 elif msg_type == "status_event":
                     self._overlay_set_status(content)
@@ -1224,7 +1361,10 @@ class RenataApp:
                             interval_ms=3000,
                         )
                     try:
-                        self.tab_spansh.update_jump_range(content.get("jump_range_current_ly"))
+                        if getattr(self, "tab_spansh", None) is None:
+                            self._pending_spansh_jump_range = content.get("jump_range_current_ly")
+                        else:
+                            self.tab_spansh.update_jump_range(content.get("jump_range_current_ly"))
                     except Exception as exc:
                         _log_app_fallback(
                             "queue.ship_state.spansh",
@@ -1251,7 +1391,10 @@ class RenataApp:
                     live_ready = bool(app_state.has_live_system_event_flag())
                     # Prefill "Start" should also work after bootstrap replay.
                     # Live gating remains in places where true live-state is required.
-                    self.tab_spansh.update_start_label(content)
+                    if getattr(self, "tab_spansh", None) is None:
+                        self._pending_spansh_start_label = content
+                    else:
+                        self.tab_spansh.update_start_label(content)
                     try:
                         self.tab_pulpit.set_system_runtime_state(str(content), live_ready=live_ready)
                     except Exception as exc:
@@ -2012,7 +2155,8 @@ class RenataApp:
 
     def _open_spansh_neutron_tab(self) -> None:
         try:
-            self.main_nb.select(self.tab_spansh)
+            self._materialize_main_tab("spansh")
+            self.main_nb.select(self._tab_map.get("spansh", self.tab_spansh))
         except Exception as e:
             _log_app_fallback(
                 "OPEN_SPANSH_MAIN_TAB",
@@ -2038,13 +2182,14 @@ class RenataApp:
         if not target:
             return {"ok": False, "reason": "target_missing"}
 
+        materialize = getattr(self, "_materialize_main_tab", None)
+        if callable(materialize):
+            materialize("spansh")
         neutron_tab = getattr(getattr(self, "tab_spansh", None), "tab_neutron", None)
         if neutron_tab is None:
             return {"ok": False, "reason": "neutron_tab_unavailable"}
 
-        busy_before = bool(route_manager.is_busy())
-        mode_before = str(route_manager.current_mode() or "").strip().lower()
-        if busy_before and mode_before and mode_before != "neutron":
+        if not route_manager.can_start("neutron"):
             return {"ok": False, "reason": "planner_busy_other_mode"}
 
         current_system = str(app_state.get_current_system_name() or "").strip()
@@ -2066,8 +2211,7 @@ class RenataApp:
             )
             return {"ok": False, "reason": "neutron_start_failed"}
 
-        mode_after = str(route_manager.current_mode() or "").strip().lower()
-        started = mode_after == "neutron"
+        started = bool(route_manager.is_busy("neutron"))
         ready_now = self._has_ready_neutron_route_for_target(target)
         return {
             "ok": bool(started or ready_now),
@@ -2086,8 +2230,7 @@ class RenataApp:
 
         def _poll(attempt: int = 0) -> None:
             try:
-                mode_now = str(route_manager.current_mode() or "").strip().lower()
-                if bool(route_manager.is_busy()) and mode_now == "neutron" and attempt < max_attempts:
+                if bool(route_manager.is_busy("neutron")) and attempt < max_attempts:
                     self.root.after(interval_ms, lambda: _poll(attempt + 1))
                     return
 
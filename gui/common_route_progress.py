@@ -49,7 +49,6 @@ _ROUTE_MILESTONE_CACHE_SCHEMA_VERSION = 1
 _ROUTE_MILESTONE_CACHE_SECTION = "route_milestone_progress_cache"
 _ROUTE_MILESTONE_CACHE: dict[str, dict] = {}
 _ROUTE_MILESTONE_CACHE_LOADED = False
-_ROUTE_MILESTONE_CACHE_LAST_PERSIST_TS = 0.0
 
 
 def _log_route_progress_soft_failure(key: str, msg: str, **fields) -> None:
@@ -79,13 +78,6 @@ def _route_milestone_max_routes() -> int:
         return 24
 
 
-def _route_milestone_persist_min_interval_sec() -> float:
-    try:
-        return max(0.5, float(config.get("anti_spam.persist_min_interval_sec", 2.0)))
-    except Exception:
-        return 2.0
-
-
 def _safe_int(value, default: int = 0) -> int:
     try:
         return int(value)
@@ -151,17 +143,10 @@ def _snapshot_route_milestone_cache(*, now: float | None = None) -> dict:
 
 
 def _persist_route_milestone_cache(*, force: bool = False) -> bool:
-    global _ROUTE_MILESTONE_CACHE_LAST_PERSIST_TS
-
-    now = time.time()
-    if (not force) and (_ROUTE_MILESTONE_CACHE_LAST_PERSIST_TS > 0.0):
-        if (now - _ROUTE_MILESTONE_CACHE_LAST_PERSIST_TS) < _route_milestone_persist_min_interval_sec():
-            return False
-
-    payload = _snapshot_route_milestone_cache(now=now)
+    # Odstep miedzy zapisami pilnuje flusher segmentu "route_milestones".
+    payload = _snapshot_route_milestone_cache(now=time.time())
     try:
-        config.update_anti_spam_state({_ROUTE_MILESTONE_CACHE_SECTION: payload})
-        _ROUTE_MILESTONE_CACHE_LAST_PERSIST_TS = now
+        config.update_anti_spam_state({_ROUTE_MILESTONE_CACHE_SECTION: payload}, flush=force)
         return True
     except Exception:
         return False
@@ -175,8 +160,7 @@ def _load_route_milestone_cache(*, force: bool = False) -> dict:
 
     payload = {}
     try:
-        anti_spam_state = config.get_anti_spam_state(default={})
-        raw = anti_spam_state.get(_ROUTE_MILESTONE_CACHE_SECTION) if isinstance(anti_spam_state, dict) else {}
+        raw = config.get_anti_spam_section(_ROUTE_MILESTONE_CACHE_SECTION, {})
         if isinstance(raw, dict):
             payload = raw
     except Exception:
@@ -317,6 +301,7 @@ STATUS_TEXTS = {
     "ROUTE_FOUND": "Znaleziono trasę.",
     "ROUTE_CLEARED": "Wyczyszczono.",
     "ROUTE_ERROR": "Błąd trasy.",
+    "ROUTE_FUEL_SHORTAGE": "Paliwo może się skończyć na trasie.",
     "TRADE_FOUND": "Znaleziono propozycje.",
     "TRADE_NO_RESULTS": "Brak wyników lub błąd API.",
     "TRADE_INPUT_MISSING": "Podaj system startowy.",
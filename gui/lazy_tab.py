@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import time
+from collections.abc import Callable
+from tkinter import ttk
+from typing import Any
+
+from logic.utils.renata_log import log_event, log_event_throttled
+
+
+class LazyTab(ttk.Frame):
+    """
+    Placeholder zakladki Notebooka budujacy wlasciwy widget dopiero przy
+    pierwszym wyborze (albo jawnym materialize()).
+
+    factory(parent) dostaje ten placeholder jako rodzica; widget, ktory sam
+    sie nie spakowal, jest pakowany na cala powierzchnie.
+    """
+
+    def __init__(
+        self,
+        parent: Any,
+        *,
+        key: str,
+        factory: Callable[[Any], Any],
+        on_built: Callable[[str, Any, float], None] | None = None,
+    ) -> None:
+        super().__init__(parent)
+        self.key = str(key)
+        self._factory = factory
+        self._on_built = on_built
+        self._building = False
+        self.widget: Any | None = None
+        self.build_ms: float | None = None
+
+    @property
+    def is_materialized(self) -> bool:
+        return self.widget is not None
+
+    def materialize(self) -> Any | None:
+        if self.widget is not None or self._building:
+            return self.widget
+        self._building = True
+        started = time.perf_counter()
+        try:
+            widget = self._factory(self)
+            try:
+                if not widget.winfo_manager():
+                    widget.pack(fill="both", expand=1)
+            except Exception as exc:
+                log_event_throttled(
+                    f"GUI:lazy_tab.pack:{self.key}",
+                    5000,
+                    "GUI",
+                    "lazy tab widget pack failed",
+                    tab=self.key,
+                    error=f"{type(exc).__name__}: {exc}",
+                )
+            self.widget = widget
+        except Exception as exc:
+            log_event_throttled(
+                f"GUI:lazy_tab.build:{self.key}",
+                5000,
+                "GUI",
+                "lazy tab build failed",
+                tab=self.key,
+                error=f"{type(exc).__name__}: {exc}",
+            )
+            return None
+        finally:
+            self._building = False
+
+        self.build_ms = (time.perf_counter() - started) * 1000.0
+        log_event("APP", "lazy tab built", tab=self.key, build_ms=round(self.build_ms, 1))
+        if callable(self._on_built):
+            try:
+                self._on_built(self.key, self.widget, self.build_ms)
+            except Exception as exc:
+                log_event_throttled(
+                    f"GUI:lazy_tab.on_built:{self.key}",
+                    5000,
+                    "GUI",
+                    "lazy tab on_built callback failed",
+                    tab=self.key,
+                    error=f"{type(exc).__name__}: {exc}",
+                )
+        return self.widget
@@ -11,7 +11,9 @@ from app.route_manager import route_manager
 from app.state import app_state
 from gui import common
 from gui.window_focus import bring_window_to_front
-from logic.personal_map_data_provider import MapDataProvider
+from logic import player_local_db
+from logic.personal_map_data_provider import LAYER_MASK_ROW_KEYS, MapDataProvider, decode_layer_flags
+from logic.personal_map_model import MapNodeModel
 from logic.utils.renata_log import log_event_throttled
 
 COLOR_BG = "#0b0c10"
@@ -40,6 +42,8 @@ TIME_RANGE_ALLOWED = set(TIME_RANGE_VALUES) | {"forever"}
 TIME_RANGE_SLIDER_VALUES = ("forever", "365d", "180d", "90d", "30d", "7d", "3d", "1d")
 FRESHNESS_VALUES = ("<=6h", "<=24h", "<=7d", "any")
 FRESHNESS_SLIDER_VALUES = ("any", "<=7d", "<=24h", "<=6h")
+# Powyzej tylu zmienionych nodow delta rysuje cala scene zamiast pojedynczych tagow.
+MAP_DELTA_PARTIAL_REDRAW_MAX_NODES = 64
 
 
 def _log_map_soft_failure(key: str, msg: str, **fields: Any) -> None:
@@ -243,6 +247,10 @@ class JournalMapTab(tk.Frame):
         self._filter_reload_debounce_ms = 90
         self._filter_reload_after_id: str | None = None
         self._prefetched_system_stations: dict[str, dict[str, Any]] = {}
+        # Delty PlayerDB (`playerdb_updated` z change setem) zbierane do jednego ticku Tk.
+        self._map_model = MapNodeModel()
+        self._auto_refresh_pending_changes: player_local_db.PlayerDbChangeSet | None = None
+        self._auto_refresh_full_pending = False
 
         # Filters (UI shell)
         self.layer_travel_var = tk.BooleanVar(value=True)
@@ -1105,8 +1113,8 @@ class JournalMapTab(tk.Frame):
         has_node = node is not None
         has_app = self.app is not None
         has_owner = self.logbook_owner is not None
-        neutron_tab = getattr(getattr(self.app, "tab_spansh", None), "tab_neutron", None) if has_app else None
-        neutron_busy_other = bool(route_manager.is_busy()) and str(route_manager.current_mode() or "").strip().lower() not in {"", "neutron"}
+        neutron_tab = self._map_app_neutron_tab() if has_app else None
+        neutron_busy_other = not route_manager.can_start("neutron")
         neutron_ready = bool(has_node and neutron_tab is not None and not neutron_busy_other)
 
         self._map_context_menu.entryconfigure("Ustaw cel", state=("normal" if has_node else "disabled"))
@@ -1202,16 +1210,21 @@ class JournalMapTab(tk.Frame):
                 )
         return {"ok": True, "target": target, "route": "normal", "copied": copied}
 
+    def _map_app_neutron_tab(self) -> Any:
+        # Zakladka Spansh jest budowana leniwie - dociagamy ja przed uzyciem plannera.
+        materialize = getattr(self.app, "_materialize_main_tab", None)
+        if callable(materialize):
+            materialize("spansh")
+        return getattr(getattr(self.app, "tab_spansh", None), "tab_neutron", None)
+
     def _map_ppm_action_set_neutron_route(self, target: str) -> dict[str, Any]:
-        neutron_tab = getattr(getattr(self.app, "tab_spansh", None), "tab_neutron", None)
+        neutron_tab = self._map_app_neutron_tab()
         if neutron_tab is None:
             self.map_status_var.set("Mapa: planner neutronowy jest niedostępny.")
             return {"ok": False, "reason": "neutron_tab_unavailable"}
-        if bool(route_manager.is_busy()):
-            mode_now = str(route_manager.current_mode() or "").strip().lower()
-            if mode_now and mode_now != "neutron":
-                self.map_status_var.set("Mapa: planner jest zajęty innym trybem. Spróbuj za chwilę.")
-                return {"ok": False, "reason": "planner_busy_other_mode"}
+        if not route_manager.can_start("neutron"):
+            self.map_status_var.set("Mapa: planner jest zajęty innym trybem. Spróbuj za chwilę.")
+            return {"ok": False, "reason": "planner_busy_other_mode"}
         current_system = str(getattr(app_state, "current_system", "") or "").strip()
         try:
             if current_system and hasattr(neutron_tab, "var_start"):
@@ -1919,16 +1932,50 @@ class JournalMapTab(tk.Frame):
         except Exception:
             self._auto_refresh_after_id = None
 
+    def _schedule_auto_refresh_idle(self) -> None:
+        # Delty z jednego ticku Tk (np. FSDJump + Scan z jednej paczki kolejki) ida razem.
+        if self._auto_refresh_after_id:
+            return
+        try:
+            self._auto_refresh_after_id = str(self.after_idle(self._run_debounced_auto_refresh))
+        except Exception:
+            self._auto_refresh_after_id = None
+
     def notify_playerdb_updated(self, payload: dict | None = None) -> dict[str, Any]:
         data = dict(payload or {}) if isinstance(payload, dict) else {}
         source = _as_text(data.get("source")) or "unknown"
         event_name = _as_text(data.get("event_name")) or "unknown"
+        changes = player_local_db.PlayerDbChangeSet.from_payload(data.get("changes"))
         self._auto_refresh_last_update = {"source": source, "event_name": event_name}
         self._auto_refresh_dirty = True
+        if changes is None:
+            self._auto_refresh_full_pending = True
+        elif self._auto_refresh_pending_changes is None:
+            self._auto_refresh_pending_changes = player_local_db.PlayerDbChangeSet().merge(changes)
+        else:
+            self._auto_refresh_pending_changes.merge(changes)
+        delta = not bool(self._auto_refresh_full_pending) and bool(self._map_model.loaded)
         if self._is_map_runtime_visible_for_auto_refresh():
-            self._schedule_auto_refresh_debounce()
-            return {"ok": True, "scheduled": True, "deferred": False, "source": source, "event_name": event_name}
-        return {"ok": True, "scheduled": False, "deferred": True, "source": source, "event_name": event_name}
+            if delta:
+                self._schedule_auto_refresh_idle()
+            else:
+                self._schedule_auto_refresh_debounce()
+            return {
+                "ok": True,
+                "scheduled": True,
+                "deferred": False,
+                "delta": delta,
+                "source": source,
+                "event_name": event_name,
+            }
+        return {
+            "ok": True,
+            "scheduled": False,
+            "deferred": True,
+            "delta": delta,
+            "source": source,
+            "event_name": event_name,
+        }
 
     def on_parent_map_subtab_activated(self) -> None:
         if bool(self._auto_refresh_dirty):
@@ -1948,15 +1995,35 @@ class JournalMapTab(tk.Frame):
             if prev_node is not None:
                 selected_system_name = _as_text(getattr(prev_node, "system_name", ""))
         self._auto_refresh_dirty = False
-        result = self.reload_from_playerdb()
+        changes = self._auto_refresh_pending_changes
+        full_pending = bool(self._auto_refresh_full_pending) or changes is None
+        self._auto_refresh_pending_changes = None
+        self._auto_refresh_full_pending = False
+        if full_pending:
+            result = self.reload_from_playerdb()
+        else:
+            result = self._apply_playerdb_changes(changes)
+        delta_applied = isinstance(result, dict) and bool(result.get("delta"))
 
         reselected = False
         compare_refreshed = False
         reselect_key: str | None = None
-        if selected_key and selected_key in self._nodes:
-            reselect_key = selected_key
-        elif selected_system_name:
-            reselect_key = self._find_node_key_by_system_name(selected_system_name)
+        if delta_applied:
+            renamed = dict(result.get("renamed_keys") or {})
+            if selected_key and selected_key in renamed:
+                selected_key = renamed[selected_key]
+                self._selected_node_key = selected_key
+            # Porownanie cen zalezy tylko od rynku; delta bez snapshotow go nie rusza.
+            compare_refreshed = not bool(result.get("market_changed"))
+            # Delta nie czysci panelu; odswiezamy go tylko, gdy dotknela zaznaczonego systemu.
+            touched = set(result.get("touched_keys") or ())
+            if selected_key and selected_key in self._nodes and selected_key not in touched:
+                reselected = True
+        if not reselected:
+            if selected_key and selected_key in self._nodes:
+                reselect_key = selected_key
+            elif selected_system_name:
+                reselect_key = self._find_node_key_by_system_name(selected_system_name)
         if reselect_key:
             try:
                 sel_result = self.select_system_node(reselect_key)
@@ -1987,6 +2054,9 @@ class JournalMapTab(tk.Frame):
         source = _as_text(info.get("source")) or "playerdb"
         if isinstance(result, dict) and bool(result.get("ok")):
             parts = ["Mapa: auto-refresh po update playerdb"]
+            if delta_applied:
+                parts[0] = "Mapa: delta po update playerdb"
+                parts.append(f"dotkniete systemy={len(set(result.get('touched_keys') or ()))}")
             if event_name:
                 parts.append(f"{event_name}/{source}")
             if reselected:
@@ -2014,46 +2084,56 @@ class JournalMapTab(tk.Frame):
                 return str(key)
         return None
 
+    def _map_node_from_row(self, row: dict[str, Any]) -> _MapNode | None:
+        key = self._node_key_from_row(row)
+        if not key:
+            return None
+        x = self._safe_float(row.get("x"))
+        y = self._safe_float(row.get("y"))
+        if x is None or y is None:
+            return None
+        try:
+            return _MapNode(
+                key=key,
+                system_name=str(row.get("system_name") or key),
+                x=x,
+                y=y,
+                z=self._safe_float(row.get("z")),
+                system_address=int(row["system_address"]) if row.get("system_address") is not None else None,
+                system_id64=int(row["system_id64"]) if row.get("system_id64") is not None else None,
+                source=str(row.get("source") or "playerdb"),
+                confidence=str(row.get("confidence") or "observed"),
+                freshness_ts=str(row.get("freshness_ts") or ""),
+                first_seen_ts=str(row.get("first_seen_ts") or ""),
+                last_seen_ts=str(row.get("last_seen_ts") or ""),
+                primary_star_type=str(row.get("primary_star_type") or ""),
+                is_neutron=int(bool(row.get("is_neutron"))) if row.get("is_neutron") is not None else 0,
+                is_black_hole=int(bool(row.get("is_black_hole"))) if row.get("is_black_hole") is not None else 0,
+            )
+        except Exception:
+            return None
+
+    @staticmethod
+    def _map_edge_from_row(row: dict[str, Any]) -> _MapEdge | None:
+        from_key = str(row.get("from_key") or row.get("from") or "").strip()
+        to_key = str(row.get("to_key") or row.get("to") or "").strip()
+        key = str(row.get("key") or f"{from_key}->{to_key}")
+        if not from_key or not to_key:
+            return None
+        return _MapEdge(key=key, from_key=from_key, to_key=to_key)
+
     def set_graph_data(self, *, nodes: list[dict[str, Any]] | None = None, edges: list[dict[str, Any]] | None = None) -> None:
         self._nodes.clear()
         self._edges.clear()
         self._selected_node_key = None
         for row in nodes or []:
-            key = self._node_key_from_row(row)
-            if not key:
-                continue
-            x = self._safe_float(row.get("x"))
-            y = self._safe_float(row.get("y"))
-            if x is None or y is None:
-                continue
-            try:
-                node = _MapNode(
-                    key=key,
-                    system_name=str(row.get("system_name") or key),
-                    x=x,
-                    y=y,
-                    z=self._safe_float(row.get("z")),
-                    system_address=int(row["system_address"]) if row.get("system_address") is not None else None,
-                    system_id64=int(row["system_id64"]) if row.get("system_id64") is not None else None,
-                    source=str(row.get("source") or "playerdb"),
-                    confidence=str(row.get("confidence") or "observed"),
-                    freshness_ts=str(row.get("freshness_ts") or ""),
-                    first_seen_ts=str(row.get("first_seen_ts") or ""),
-                    last_seen_ts=str(row.get("last_seen_ts") or ""),
-                    primary_star_type=str(row.get("primary_star_type") or ""),
-                    is_neutron=int(bool(row.get("is_neutron"))) if row.get("is_neutron") is not None else 0,
-                    is_black_hole=int(bool(row.get("is_black_hole"))) if row.get("is_black_hole") is not None else 0,
-                )
-            except Exception:
-                continue
-            self._nodes[key] = node
+            node = self._map_node_from_row(row)
+            if node is not None:
+                self._nodes[node.key] = node
         for row in edges or []:
-            from_key = str(row.get("from_key") or row.get("from") or "").strip()
-            to_key = str(row.get("to_key") or row.get("to") or "").strip()
-            key = str(row.get("key") or f"{from_key}->{to_key}")
-            if not from_key or not to_key:
-                continue
-            self._edges.append(_MapEdge(key=key, from_key=from_key, to_key=to_key))
+            edge = self._map_edge_from_row(row)
+            if edge is not None:
+                self._edges.append(edge)
         self._redraw_scene()
 
     def _source_filter_mode(self) -> str:
@@ -2434,6 +2514,7 @@ class JournalMapTab(tk.Frame):
         self._sync_time_filter_controls_from_vars()
         self._sync_time_filter_controls_enabled()
         if not bool(self.layer_travel_var.get()):
+            self._map_model.reset()
             self.set_graph_data(nodes=[], edges=[])
             self._node_layer_flags = {}
             self._clear_prefetched_system_stations()
@@ -2448,9 +2529,13 @@ class JournalMapTab(tk.Frame):
         time_range = self._effective_time_range_filter()
         freshness_filter = self._effective_freshness_filter()
         source_filter = self._source_filter_mode()
-        nodes_rows, nodes_meta = self.data_provider.get_system_nodes(time_range=time_range, source_filter=source_filter)
+        raw_nodes_rows, nodes_meta, mask_flags_by_key = self._load_system_nodes(
+            time_range=time_range,
+            source_filter=source_filter,
+            freshness_filter=freshness_filter,
+        )
         edges_rows, edges_meta = self.data_provider.get_edges(time_range=time_range)
-        nodes_rows = self._filter_rows_by_freshness(nodes_rows, ts_keys=("freshness_ts", "last_seen_ts", "first_seen_ts"))
+        nodes_rows = self._filter_rows_by_freshness(raw_nodes_rows, ts_keys=("freshness_ts", "last_seen_ts", "first_seen_ts"))
 
         render_mode = _as_text(self.render_mode_var.get() or "Trasa")
         hidden_without_coords = 0
@@ -2475,8 +2560,24 @@ class JournalMapTab(tk.Frame):
         self._travel_nodes_meta = dict(nodes_meta or {})
         self._travel_edges_meta = dict(edges_meta or {})
         self._travel_edges_meta["render_mode"] = edges_mode
-        self._node_layer_flags = self._compute_layer_flags_for_nodes(render_nodes)
+        if mask_flags_by_key is not None:
+            self._node_layer_flags = {
+                key: dict(mask_flags_by_key[key])
+                for key in (self._node_key_from_row(row) for row in render_nodes)
+                if key in mask_flags_by_key
+            }
+            self._action_layers_meta = {"source": "system_layer_flags"}
+        else:
+            self._node_layer_flags = self._compute_layer_flags_for_nodes(render_nodes)
         self._prime_prefetched_system_stations(render_nodes)
+        self._load_map_model(
+            raw_nodes_rows,
+            edges_rows=edges_rows if edges_mode == "provider" else None,
+            nodes_meta=nodes_meta,
+            time_range=time_range,
+            source_filter=source_filter,
+            freshness_filter=freshness_filter,
+        )
 
         self.set_graph_data(nodes=render_nodes, edges=edges_final)
         startup_center = self._try_startup_autocenter()
@@ -2531,6 +2632,214 @@ class JournalMapTab(tk.Frame):
             "edges_meta": dict(edges_meta or {}),
         }
 
+    def _load_system_nodes(
+        self,
+        *,
+        time_range: str,
+        source_filter: str,
+        freshness_filter: str,
+    ) -> tuple[list[dict[str, Any]], dict[str, Any], dict[str, dict[str, Any]] | None]:
+        """
+        Nody do reloadu; przy freshness `any` razem z bitmaskami `system_layer_flags`
+        (flagi warstw bez dodatkowych zapytan). Trzeci element None = flagi liczy
+        `_compute_layer_flags_for_nodes`.
+        """
+        getter = getattr(self.data_provider, "get_system_nodes_with_flags", None)
+        if freshness_filter == "any" and callable(getter):
+            try:
+                rows, meta = getter(time_range=time_range, source_filter=source_filter)
+            except Exception as exc:
+                _log_map_soft_failure(
+                    "system_nodes_with_flags",
+                    "nodes with layer masks failed, falling back to per-layer queries",
+                    error=f"{type(exc).__name__}: {exc}",
+                )
+            else:
+                meta = dict(meta or {})
+                flags_by_key: dict[str, dict[str, Any]] = {}
+                clean_rows: list[dict[str, Any]] = []
+                for row in rows or []:
+                    item = dict(row)
+                    key = self._node_key_from_row(item)
+                    if key and item.get("layer_mask") is not None:
+                        flags_by_key[key] = decode_layer_flags(
+                            item.get("layer_mask"),
+                            stations_count=item.get("layer_stations_count"),
+                            last_exploration_ts=item.get("layer_last_exploration_ts"),
+                            last_exobio_ts=item.get("layer_last_exobio_ts"),
+                            time_range=time_range,
+                        )
+                    # Wiersze modelu mapy maja ksztalt `get_system_nodes` (jak delty).
+                    for mask_key in LAYER_MASK_ROW_KEYS:
+                        item.pop(mask_key, None)
+                    clean_rows.append(item)
+                if not bool(meta.get("layer_flags_available")):
+                    return clean_rows, meta, None
+                return clean_rows, meta, flags_by_key
+        rows, meta = self.data_provider.get_system_nodes(time_range=time_range, source_filter=source_filter)
+        return list(rows or []), dict(meta or {}), None
+
+    def _load_map_model(
+        self,
+        raw_nodes_rows: list[dict[str, Any]],
+        *,
+        edges_rows: list[dict[str, Any]] | None,
+        nodes_meta: dict[str, Any] | None,
+        time_range: str,
+        source_filter: str,
+        freshness_filter: str,
+    ) -> None:
+        # Delty wymagaja providera z lookupami po id i krawedzi z rollupu skokow
+        # (fallback sekwencyjny zalezy od calej kolejnosci nodow -> tylko pelny reload).
+        provider = self.data_provider
+        supports_delta = callable(getattr(provider, "get_nodes_by_ids", None)) and callable(
+            getattr(provider, "get_layer_flags_for", None)
+        )
+        if not supports_delta or edges_rows is None:
+            self._map_model.reset()
+            return
+        limit = (nodes_meta or {}).get("limit")
+        self._map_model.load(
+            raw_nodes_rows,
+            edges=edges_rows,
+            flags_by_key=self._node_layer_flags,
+            time_range=time_range,
+            source_filter=source_filter,
+            freshness_filter=freshness_filter,
+            limit=int(limit) if limit else None,
+        )
+
+    def _apply_playerdb_changes(self, changes: player_local_db.PlayerDbChangeSet) -> dict[str, Any]:
+        """
+        Naklada delte PlayerDB na model mapy i przerysowuje tylko dotkniete nody
+        (tagi `node:<key>` + ich krawedzie). Pelny reload tylko gdy model go zada
+        (zmiana schematu, granica limitu nodow) albo filtry rozjechaly sie z modelem.
+        """
+        model = self._map_model
+        filters_now = (
+            self._effective_time_range_filter(),
+            self._source_filter_mode(),
+            self._effective_freshness_filter(),
+        )
+        if (
+            not bool(model.loaded)
+            or not bool(self.layer_travel_var.get())
+            or filters_now != (model.time_range, model.source_filter, model.freshness_filter)
+        ):
+            return self.reload_from_playerdb()
+        if changes.is_empty():
+            return {"ok": True, "delta": True, "touched_keys": set(), "renamed_keys": {}, "market_changed": False}
+        try:
+            delta = model.apply_changes(self.data_provider, changes)
+        except Exception as exc:
+            _log_map_soft_failure(
+                "apply_playerdb_changes",
+                "map delta apply failed, falling back to full reload",
+                error=f"{type(exc).__name__}: {exc}",
+            )
+            model.reset()
+            return self.reload_from_playerdb()
+        if bool(delta.get("full_reload")):
+            return self.reload_from_playerdb()
+
+        touched_keys = set(delta.get("touched_keys") or set())
+        renamed_keys = dict(delta.get("renamed_keys") or {})
+        self._node_layer_flags = model.flags_by_key()
+
+        rows = self._filter_rows_by_freshness(
+            model.ordered_rows(),
+            ts_keys=("freshness_ts", "last_seen_ts", "first_seen_ts"),
+        )
+        if _as_text(self.render_mode_var.get() or "Trasa") == "Mapa":
+            laid_out_nodes = self._coords_layout_from_system_rows(rows)
+        else:
+            laid_out_nodes = self._travel_layout_from_system_rows(rows)
+        render_nodes, _dropped = self._prepare_renderable_nodes(laid_out_nodes)
+        new_nodes: dict[str, _MapNode] = {}
+        for row in render_nodes:
+            node = self._map_node_from_row(row)
+            if node is not None:
+                new_nodes[node.key] = node
+        old_nodes = self._nodes
+        # Layout (skala Mapa / kolejnosc Trasa) moze przesunac tez nody spoza delty.
+        dirty_keys = set(touched_keys)
+        for key, node in new_nodes.items():
+            if old_nodes.get(key) != node:
+                dirty_keys.add(key)
+        dirty_keys |= set(old_nodes) - set(new_nodes)
+        self._nodes = new_nodes
+
+        for key in dirty_keys:
+            for lookup_key in (f"addr:{key}", f"name:{key.casefold()}"):
+                self._prefetched_system_stations.pop(lookup_key, None)
+        for old_key in renamed_keys:
+            self._prefetched_system_stations.pop(f"addr:{old_key}", None)
+
+        added_edges = [
+            edge
+            for edge in (self._map_edge_from_row(row) for row in list(delta.get("added_edges") or []))
+            if edge is not None
+        ]
+        if renamed_keys:
+            self._edges = [
+                edge
+                for edge in (self._map_edge_from_row(row) for row in model.edge_rows())
+                if edge is not None
+            ]
+        else:
+            known_edge_keys = {edge.key for edge in self._edges}
+            added_edges = [edge for edge in added_edges if edge.key not in known_edge_keys]
+            self._edges.extend(added_edges)
+
+        full_redraw = (
+            bool(renamed_keys)
+            or not old_nodes
+            or not new_nodes
+            or len(dirty_keys) > MAP_DELTA_PARTIAL_REDRAW_MAX_NODES
+        )
+        if full_redraw:
+            self._redraw_scene()
+        else:
+            self._redraw_nodes_partial(dirty_keys, added_edges=added_edges)
+        market_changed = bool(changes.market_snapshots)
+        if market_changed:
+            self._refresh_trade_commodity_values()
+        return {
+            "ok": True,
+            "delta": True,
+            "touched_keys": touched_keys,
+            "renamed_keys": renamed_keys,
+            "redrawn_nodes": len(self._nodes) if full_redraw else len(dirty_keys),
+            "full_redraw": full_redraw,
+            "market_changed": market_changed,
+            "fetched_nodes": int(delta.get("fetched_nodes") or 0),
+            "flag_systems": int(delta.get("flag_systems") or 0),
+        }
+
+    def _redraw_nodes_partial(self, dirty_keys: set[str], *, added_edges: list[_MapEdge]) -> None:
+        c = self.map_canvas
+        self._hide_map_tooltip()
+        # Pierscien "aktualny system" wisi na starym nodzie - tez do przerysowania.
+        for item_id in c.find_withtag("node_current_ring"):
+            key = self._node_key_from_tags(c.gettags(item_id) or ())
+            if key:
+                dirty_keys.add(key)
+        for key in dirty_keys:
+            c.delete(f"node:{key}")
+        added_keys = {edge.key for edge in added_edges}
+        for edge in self._edges:
+            if edge.key in added_keys or edge.from_key in dirty_keys or edge.to_key in dirty_keys:
+                c.delete(f"edge:{edge.key}")
+                self._draw_edge(edge)
+        if c.find_withtag("map_node"):
+            c.tag_lower("map_edge", "map_node")
+        show_labels = self.view_scale >= 0.90
+        for key in dirty_keys:
+            node = self._nodes.get(key)
+            if node is not None:
+                self._draw_node(node, show_labels=show_labels)
+        c.itemconfigure("map_hud", text=self._map_hud_text())
+
     def _block_startup_autocenter_by_user(self) -> None:
         if bool(getattr(self, "_startup_autocenter_done", False)):
             self._startup_autocenter_recenter_pending = False
@@ -4074,8 +4383,13 @@ class JournalMapTab(tk.Frame):
             )
 
         # View HUD
-        hud = f"scale={self.view_scale:.2f}  offset=({int(self.view_offset_x)},{int(self.view_offset_y)})  nodes={len(self._nodes)}  edges={len(self._edges)}"
-        c.create_text(10, 10, text=hud, anchor="nw", fill=COLOR_FG, font=("Consolas", 9))
+        c.create_text(10, 10, text=self._map_hud_text(), anchor="nw", fill=COLOR_FG, font=("Consolas", 9), tags=("map_hud",))
+
+    def _map_hud_text(self) -> str:
+        return (
+            f"scale={self.view_scale:.2f}  offset=({int(self.view_offset_x)},{int(self.view_offset_y)})  "
+            f"nodes={len(self._nodes)}  edges={len(self._edges)}"
+        )
 
     def _draw_grid(self, w: int, h: int) -> None:
         # World-space grid step adapted to zoom to keep visual spacing usable.
@@ -4125,93 +4439,99 @@ class JournalMapTab(tk.Frame):
 
     def _draw_edges(self) -> None:
         for edge in self._edges:
-            a = self._nodes.get(edge.from_key)
-            b = self._nodes.get(edge.to_key)
-            if a is None or b is None:
-                continue
-            x1, y1 = self.world_to_screen(a.x, a.y)
-            x2, y2 = self.world_to_screen(b.x, b.y)
-            self.map_canvas.create_line(
-                x1,
-                y1,
-                x2,
-                y2,
-                fill=COLOR_EDGE,
-                width=1.0,
-                tags=("map_edge", f"edge:{edge.key}"),
-            )
+            self._draw_edge(edge)
+
+    def _draw_edge(self, edge: _MapEdge) -> None:
+        a = self._nodes.get(edge.from_key)
+        b = self._nodes.get(edge.to_key)
+        if a is None or b is None:
+            return
+        x1, y1 = self.world_to_screen(a.x, a.y)
+        x2, y2 = self.world_to_screen(b.x, b.y)
+        self.map_canvas.create_line(
+            x1,
+            y1,
+            x2,
+            y2,
+            fill=COLOR_EDGE,
+            width=1.0,
+            tags=("map_edge", f"edge:{edge.key}"),
+        )
 
     def _draw_nodes(self) -> None:
         show_labels = self.view_scale >= 0.90
         for node in self._nodes.values():
-            sx, sy = self.world_to_screen(node.x, node.y)
-            r = 5 if self.view_scale < 1.2 else 6
-            star_color = self._star_color_for_node(node)
-            # Keep click hitbox tight: only the star glyph should carry map_node events.
-            node_hit_tags = ("map_node", f"node:{node.key}")
-            node_label_tags = ("map_node_label", f"node:{node.key}")
-            base_fill = star_color
+            self._draw_node(node, show_labels=show_labels)
+
+    def _draw_node(self, node: _MapNode, *, show_labels: bool) -> None:
+        sx, sy = self.world_to_screen(node.x, node.y)
+        r = 5 if self.view_scale < 1.2 else 6
+        star_color = self._star_color_for_node(node)
+        # Keep click hitbox tight: only the star glyph should carry map_node events.
+        node_hit_tags = ("map_node", f"node:{node.key}")
+        node_label_tags = ("map_node_label", f"node:{node.key}")
+        base_fill = star_color
+        base_outline = star_color
+        if int(getattr(node, "is_black_hole", 0) or 0):
+            base_fill = COLOR_BG
+            base_outline = star_color
+        elif int(getattr(node, "is_neutron", 0) or 0):
+            base_fill = COLOR_BG
             base_outline = star_color
-            if int(getattr(node, "is_black_hole", 0) or 0):
-                base_fill = COLOR_BG
-                base_outline = star_color
-            elif int(getattr(node, "is_neutron", 0) or 0):
-                base_fill = COLOR_BG
-                base_outline = star_color
+        self.map_canvas.create_oval(
+            sx - r,
+            sy - r,
+            sx + r,
+            sy + r,
+            outline=base_outline,
+            fill=base_fill,
+            tags=node_hit_tags,
+        )
+        # Distinguish special stars while preserving click hitbox on base glyph.
+        if int(getattr(node, "is_black_hole", 0) or 0):
+            inner = max(1, r - 2)
             self.map_canvas.create_oval(
-                sx - r,
-                sy - r,
-                sx + r,
-                sy + r,
-                outline=base_outline,
-                fill=base_fill,
-                tags=node_hit_tags,
+                sx - inner,
+                sy - inner,
+                sx + inner,
+                sy + inner,
+                outline=star_color,
+                width=1.2,
+                tags=("map_star_marker", f"node:{node.key}"),
+            )
+        elif int(getattr(node, "is_neutron", 0) or 0):
+            burst = r + 2
+            self.map_canvas.create_line(
+                sx - burst,
+                sy,
+                sx + burst,
+                sy,
+                fill=star_color,
+                width=1.0,
+                tags=("map_star_marker", f"node:{node.key}"),
+            )
+            self.map_canvas.create_line(
+                sx,
+                sy - burst,
+                sx,
+                sy + burst,
+                fill=star_color,
+                width=1.0,
+                tags=("map_star_marker", f"node:{node.key}"),
+            )
+        self._draw_node_layer_badges(node, sx, sy, r)
+        self._draw_trade_compare_highlight(node, sx, sy, r)
+        self._draw_node_state_rings(node, sx, sy, r)
+        if show_labels:
+            self.map_canvas.create_text(
+                sx + 8,
+                sy - 8,
+                text=node.system_name,
+                anchor="sw",
+                fill=COLOR_SEC,
+                font=("Segoe UI", 8),
+                tags=node_label_tags,
             )
-            # Distinguish special stars while preserving click hitbox on base glyph.
-            if int(getattr(node, "is_black_hole", 0) or 0):
-                inner = max(1, r - 2)
-                self.map_canvas.create_oval(
-                    sx - inner,
-                    sy - inner,
-                    sx + inner,
-                    sy + inner,
-                    outline=star_color,
-                    width=1.2,
-                    tags=("map_star_marker", f"node:{node.key}"),
-                )
-            elif int(getattr(node, "is_neutron", 0) or 0):
-                burst = r + 2
-                self.map_canvas.create_line(
-                    sx - burst,
-                    sy,
-                    sx + burst,
-                    sy,
-                    fill=star_color,
-                    width=1.0,
-                    tags=("map_star_marker", f"node:{node.key}"),
-                )
-                self.map_canvas.create_line(
-                    sx,
-                    sy - burst,
-                    sx,
-                    sy + burst,
-                    fill=star_color,
-                    width=1.0,
-                    tags=("map_star_marker", f"node:{node.key}"),
-                )
-            self._draw_node_layer_badges(node, sx, sy, r)
-            self._draw_trade_compare_highlight(node, sx, sy, r)
-            self._draw_node_state_rings(node, sx, sy, r)
-            if show_labels:
-                self.map_canvas.create_text(
-                    sx + 8,
-                    sy - 8,
-                    text=node.system_name,
-                    anchor="sw",
-                    fill=COLOR_SEC,
-                    font=("Segoe UI", 8),
-                    tags=node_label_tags,
-                )
 
     def _is_current_system_node(self, node: _MapNode) -> bool:
         current_name = _as_text(getattr(app_state, "current_system", ""))
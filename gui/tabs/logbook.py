@@ -27,10 +27,14 @@ from logic.logbook_feed import (
     classify_logbook_event,
 )
 from logic.logbook_feed_cache import (
-    append_logbook_feed_cache_item,
-    clear_logbook_feed_cache,
+    LogbookFeedCacheWriter,
     load_logbook_feed_cache,
 )
+from logic.logbook_feed_model import (
+    LogbookFeedModel,
+    logbook_feed_item_class,
+    logbook_feed_item_location,
+)
 from logic.utils.renata_log import log_event_throttled
 
 try:
@@ -200,22 +204,6 @@ def _maybe_station_name(body_text: str) -> str | None:
     return None
 
 
-def _logbook_feed_item_signature(item: dict | None) -> str:
-    if not isinstance(item, dict):
-        return ""
-    parts = [
-        str(item.get("timestamp") or "").strip(),
-        str(item.get("event_name") or "").strip(),
-        str(item.get("system_name") or "").strip(),
-        str(item.get("station_name") or "").strip(),
-        str(item.get("body_name") or "").strip(),
-        str(item.get("summary") or "").strip(),
-    ]
-    if not any(parts):
-        return ""
-    return "\x1f".join(parts)
-
-
 class LogbookTab(tk.Frame):
     DEFAULT_CATEGORIES = [
         "Gornictwo",
@@ -258,7 +246,14 @@ class LogbookTab(tk.Frame):
         self.logbook_show_tech_var = tk.BooleanVar(value=False)
         self._logbook_feed_sort_column = "time"
         self._logbook_feed_sort_desc = True
-        self._logbook_feed_items: list[dict] = []
+        self._logbook_feed_model = LogbookFeedModel(
+            limit=self._logbook_feed_limit,
+            sort_column=self._logbook_feed_sort_column,
+            sort_desc=self._logbook_feed_sort_desc,
+            class_order=_LOGBOOK_FEED_CLASS_ORDER,
+        )
+        self._logbook_feed_cache_writer = LogbookFeedCacheWriter(limit=self._logbook_feed_limit)
+        self._logbook_seq_to_iid: dict[int, str] = {}
         self._selected_filter_tags: set[str] = set()
         self._active_popover: tk.Widget | None = None
         self._active_popover_anchor: tk.Widget | None = None
@@ -980,28 +975,80 @@ class LogbookTab(tk.Frame):
         if not str(row.get("event_class") or "").strip():
             row["event_class"] = classify_logbook_event(event_name)
 
-        incoming_sig = _logbook_feed_item_signature(row)
-        if incoming_sig:
-            for existing in self._logbook_feed_items:
-                if _logbook_feed_item_signature(existing) == incoming_sig:
-                    return
-        self._logbook_feed_items.append(row)
-        if len(self._logbook_feed_items) > self._logbook_feed_limit:
-            self._logbook_feed_items = self._logbook_feed_items[-self._logbook_feed_limit :]
-        self._render_logbook_feed_tree()
+        change = self._logbook_feed_model.add(row)
+        if not change.added:
+            return
+        if not self._logbook_feed_restore_in_progress:
+            self._apply_logbook_feed_change(change, row)
         if persist_cache and not self._logbook_feed_restore_in_progress:
-            append_logbook_feed_cache_item(row, limit=self._logbook_feed_limit)
+            self._logbook_feed_cache_writer.submit(row)
+
+    def flush_feed_cache(self, timeout: float | None = None) -> bool:
+        """Dopisuje zalegly feed na dysk (wywolywane przy zamykaniu okna)."""
+        return self._logbook_feed_cache_writer.flush(timeout)
+
+    def _apply_logbook_feed_change(self, change, row: dict) -> None:
+        # Jeden event = co najwyzej jedno wstawienie + usuniecie wypchnietych
+        # z limitu; reszta drzewa zostaje nietknieta.
+        for seq in change.evicted_seqs:
+            iid = self._logbook_seq_to_iid.pop(seq, None)
+            if iid is None:
+                continue
+            self._logbook_item_to_payload.pop(iid, None)
+            if iid == self._selected_logbook_item_id:
+                self._selected_logbook_item_id = None
+                self._refresh_logbook_nav_chips(None)
+                self._refresh_logbook_info_panel(None)
+            try:
+                self.logbook_feed_tree.delete(iid)
+            except Exception:
+                log_event_throttled(
+                    "logbook.feed.evict",
+                    3000,
+                    "WARN",
+                    "Logbook: failed to delete evicted feed row",
+                )
+        if change.visible_index is not None and change.seq is not None:
+            self._insert_logbook_feed_row(change.seq, row, change.visible_index)
+        self._refresh_logbook_summary_panel(self._logbook_feed_model.summary_snapshot())
+        self._update_logbook_feed_status()
+
+    def _insert_logbook_feed_row(self, seq: int, row: dict, index: int | str) -> str:
+        event_name = str(row.get("event_name") or "").strip() or "-"
+        event_class = self._logbook_item_class(row)
+        timestamp = _format_ts(str(row.get("timestamp") or ""))
+        system_name = str(row.get("system_name") or "").strip() or "-"
+        location = self._logbook_item_location(row)
+        summary = str(row.get("summary") or "").strip() or event_name
+        iid = self.logbook_feed_tree.insert(
+            "",
+            index,
+            values=(timestamp, event_class, event_name, system_name, location, summary),
+        )
+        self._logbook_item_to_payload[iid] = dict(row)
+        self._logbook_seq_to_iid[seq] = iid
+        return iid
+
+    def _update_logbook_feed_status(self) -> None:
+        visible_count = self._logbook_feed_model.visible_count
+        total_count = len(self._logbook_feed_model)
+        class_filter = str(self.logbook_class_filter_var.get() or _LOGBOOK_CLASS_ALL)
+        sort_label = f"{self._logbook_feed_sort_column}{' desc' if self._logbook_feed_sort_desc else ' asc'}"
+        self.logbook_status_var.set(
+            f"Eventow w feedzie: {visible_count}/{total_count} (limit {self._logbook_feed_limit}) | Klasa: {class_filter} | Sort: {sort_label}"
+        )
 
     def _clear_logbook_feed(self) -> None:
         self.logbook_feed_tree.delete(*self.logbook_feed_tree.get_children())
         self._logbook_item_to_payload.clear()
-        self._logbook_feed_items.clear()
+        self._logbook_seq_to_iid.clear()
+        self._logbook_feed_model.clear()
         self._selected_logbook_item_id = None
         self._refresh_logbook_nav_chips(None)
         self._refresh_logbook_info_panel(None)
-        self._refresh_logbook_summary_panel([])
+        self._refresh_logbook_summary_panel(build_logbook_summary_snapshot([]))
         self.logbook_status_var.set("Feed wyczyszczony.")
-        clear_logbook_feed_cache()
+        self._logbook_feed_cache_writer.clear()
 
     def _restore_logbook_feed_from_cache(self) -> None:
         rows = load_logbook_feed_cache(limit=self._logbook_feed_limit)
@@ -1009,12 +1056,13 @@ class LogbookTab(tk.Frame):
             return
         self._logbook_feed_restore_in_progress = True
         try:
-            # File order is chronological (oldest -> newest). Inserting each item at index 0
-            # restores the visible feed with newest items on top.
+            # File order is chronological (oldest -> newest); model trzyma
+            # kolejnosc naplywu, a drzewo rysujemy raz po calym odtworzeniu.
             for row in rows:
                 self.append_logbook_feed_item(row, persist_cache=False)
         finally:
             self._logbook_feed_restore_in_progress = False
+        self._render_logbook_feed_tree()
         count = len(self.logbook_feed_tree.get_children())
         self.logbook_status_var.set(
             f"Przywrocono feed z cache: {count} (limit {self._logbook_feed_limit})"
@@ -1052,61 +1100,23 @@ class LogbookTab(tk.Frame):
             )
 
     def _logbook_item_class(self, item: dict) -> str:
-        event_class = str(item.get("event_class") or "").strip()
-        if event_class:
-            return event_class
-        event_name = str(item.get("event_name") or "").strip()
-        if event_name:
-            return str(classify_logbook_event(event_name) or "TECH").strip() or "TECH"
-        return "TECH"
+        return logbook_feed_item_class(item)
 
     def _logbook_item_location(self, item: dict) -> str:
-        station_name = str(item.get("station_name") or "").strip()
-        body_name = str(item.get("body_name") or "").strip()
-        return station_name or body_name or "-"
+        return logbook_feed_item_location(item)
 
     def _filtered_sorted_logbook_items(self) -> list[dict]:
-        selected_class = str(self.logbook_class_filter_var.get() or "").strip()
-        show_tech = bool(self.logbook_show_tech_var.get())
-
-        rows: list[dict] = []
-        for item in self._logbook_feed_items:
-            if not isinstance(item, dict):
-                continue
-            event_class = self._logbook_item_class(item)
-            if not show_tech and event_class == "TECH":
-                continue
-            if selected_class and selected_class != _LOGBOOK_CLASS_ALL and event_class != selected_class:
-                continue
-            rows.append(item)
-
-        sort_col = str(self._logbook_feed_sort_column or "time")
-        desc = bool(self._logbook_feed_sort_desc)
-
-        def _sort_key(row: dict) -> tuple:
-            if sort_col == "time":
-                return (str(row.get("timestamp") or ""), str(row.get("event_name") or ""))
-            if sort_col == "class":
-                cls = self._logbook_item_class(row)
-                try:
-                    idx = _LOGBOOK_FEED_CLASS_ORDER.index(cls)
-                except ValueError:
-                    idx = len(_LOGBOOK_FEED_CLASS_ORDER)
-                return (idx, cls, str(row.get("timestamp") or ""))
-            if sort_col == "event":
-                return (str(row.get("event_name") or "").casefold(), str(row.get("timestamp") or ""))
-            if sort_col == "system":
-                return (str(row.get("system_name") or "").casefold(), str(row.get("timestamp") or ""))
-            if sort_col == "location":
-                return (self._logbook_item_location(row).casefold(), str(row.get("timestamp") or ""))
-            if sort_col == "summary":
-                return (str(row.get("summary") or "").casefold(), str(row.get("timestamp") or ""))
-            return (str(row.get("timestamp") or ""),)
-
-        rows.sort(key=_sort_key, reverse=desc)
-        return rows
+        self._logbook_feed_model.configure(
+            sort_column=str(self._logbook_feed_sort_column or "time"),
+            sort_desc=bool(self._logbook_feed_sort_desc),
+            class_filter=str(self.logbook_class_filter_var.get() or "").strip() or _LOGBOOK_CLASS_ALL,
+            show_tech=bool(self.logbook_show_tech_var.get()),
+        )
+        return self._logbook_feed_model.visible_rows()
 
     def _render_logbook_feed_tree(self) -> None:
+        # Pelne przerysowanie tylko przy zmianie sortu/filtrow i po restore;
+        # nowe eventy ida przez _apply_logbook_feed_change.
         selected_payload = self._selected_logbook_item()
         selected_signature = None
         if isinstance(selected_payload, dict):
@@ -1118,24 +1128,15 @@ class LogbookTab(tk.Frame):
 
         self.logbook_feed_tree.delete(*self.logbook_feed_tree.get_children())
         self._logbook_item_to_payload.clear()
+        self._logbook_seq_to_iid.clear()
         self._selected_logbook_item_id = None
 
-        rows = self._filtered_sorted_logbook_items()
-        self._refresh_logbook_summary_panel(rows)
+        self._filtered_sorted_logbook_items()
+        self._refresh_logbook_summary_panel(self._logbook_feed_model.summary_snapshot())
         restore_iid: str | None = None
-        for row in rows:
-            event_name = str(row.get("event_name") or "").strip() or "-"
-            event_class = self._logbook_item_class(row)
-            timestamp = _format_ts(str(row.get("timestamp") or ""))
-            system_name = str(row.get("system_name") or "").strip() or "-"
-            location = self._logbook_item_location(row)
-            summary = str(row.get("summary") or "").strip() or event_name
-            iid = self.logbook_feed_tree.insert(
-                "",
-                "end",
-                values=(timestamp, event_class, event_name, system_name, location, summary),
-            )
-            self._logbook_item_to_payload[iid] = dict(row)
+        for seq in self._logbook_feed_model.visible_seqs():
+            row = self._logbook_feed_model.get(seq) or {}
+            iid = self._insert_logbook_feed_row(seq, row, "end")
             row_signature = (
                 str(row.get("timestamp") or ""),
                 str(row.get("event_name") or ""),
@@ -1160,13 +1161,7 @@ class LogbookTab(tk.Frame):
             self._refresh_logbook_nav_chips(None)
             self._refresh_logbook_info_panel(None)
 
-        visible_count = len(rows)
-        total_count = len(self._logbook_feed_items)
-        class_filter = str(self.logbook_class_filter_var.get() or _LOGBOOK_CLASS_ALL)
-        sort_label = f"{self._logbook_feed_sort_column}{' desc' if self._logbook_feed_sort_desc else ' asc'}"
-        self.logbook_status_var.set(
-            f"Eventow w feedzie: {visible_count}/{total_count} (limit {self._logbook_feed_limit}) | Klasa: {class_filter} | Sort: {sort_label}"
-        )
+        self._update_logbook_feed_status()
 
     def _on_logbook_feed_selected(self, _event=None) -> None:
         selected = self.logbook_feed_tree.selection()
@@ -1223,8 +1218,8 @@ class LogbookTab(tk.Frame):
             value = str((row or {}).get("value") or "").strip() or "-"
             self.logbook_info_tree.insert("", "end", values=(label, value))
 
-    def _refresh_logbook_summary_panel(self, feed_items: list[dict]) -> None:
-        snapshot = build_logbook_summary_snapshot(feed_items or [])
+    def _refresh_logbook_summary_panel(self, snapshot: dict[str, Any]) -> None:
+        snapshot = snapshot if isinstance(snapshot, dict) else build_logbook_summary_snapshot([])
         total_events = int(snapshot.get("total_events") or 0)
         if total_events <= 0:
             self.logbook_summary_var.set("Brak danych dla aktualnego filtra.")
@@ -2224,15 +2219,12 @@ class LogbookTab(tk.Frame):
         self._refresh_entries()
 
     def _refresh_categories(self) -> None:
-        all_entries = self.repository.list_entries(sort="title_az")
         counts: dict[str, int] = {}
-        total = 0
-        for entry in all_entries:
-            total += 1
-            category = str(entry.get("category_path") or "").strip()
-            if not category:
-                continue
-            counts[category] = counts.get(category, 0) + 1
+        for category, count in self.repository.category_counts().items():
+            category = str(category or "").strip()
+            if category:
+                counts[category] = counts.get(category, 0) + int(count)
+        total = self.repository.count_entries()
 
         for base in self._saved_categories:
             counts.setdefault(base, 0)
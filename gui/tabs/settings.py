@@ -12,7 +12,10 @@ from gui.window_positions import restore_window_geometry, bind_window_geometry,
 from gui.window_chrome import apply_renata_orange_window_chrome
 from gui.window_focus import bring_window_to_front
 from logic.utils.renata_log import log_event_throttled
-from logic.cash_in_offline_index_builder import build_offline_index_from_spansh_dump
+from logic.cash_in_offline_index_builder import (
+    apply_offline_index_delta_from_spansh_dump,
+    build_offline_index_from_spansh_dump,
+)
 from logic.capabilities import (
     CAP_SETTINGS_FULL,
     CAP_TTS_ADVANCED_POLICY,
@@ -1112,12 +1115,20 @@ class SettingsTab(ttk.Frame):
             justify="left",
         ).grid(row=8, column=0, columnspan=5, padx=8, pady=(0, 4), sticky="w")
 
+        index_buttons = ttk.Frame(lf_cash_in)
+        index_buttons.grid(row=9, column=0, padx=8, pady=4, sticky="w")
         self.btn_cash_in_build_index = ttk.Button(
-            lf_cash_in,
+            index_buttons,
             text="Zbuduj offline index",
             command=self._on_build_cash_in_offline_index,
         )
-        self.btn_cash_in_build_index.grid(row=9, column=0, padx=8, pady=4, sticky="w")
+        self.btn_cash_in_build_index.pack(side="left")
+        self.btn_cash_in_apply_index_delta = ttk.Button(
+            index_buttons,
+            text="Zastosuj delte",
+            command=lambda: self._on_build_cash_in_offline_index(delta=True),
+        )
+        self.btn_cash_in_apply_index_delta.pack(side="left", padx=(6, 0))
 
         self.pb_cash_in_index_build = ttk.Progressbar(
             lf_cash_in,
@@ -2641,10 +2652,10 @@ class SettingsTab(ttk.Frame):
 
     def _set_cash_in_index_build_ui_busy(self, busy: bool) -> None:
         self._cash_in_index_build_active = bool(busy)
-        if hasattr(self, "btn_cash_in_build_index"):
-            self.btn_cash_in_build_index.configure(
-                state=("disabled" if busy else "normal")
-            )
+        for button_name in ("btn_cash_in_build_index", "btn_cash_in_apply_index_delta"):
+            button = getattr(self, button_name, None)
+            if button is not None:
+                button.configure(state=("disabled" if busy else "normal"))
 
     def _on_download_cash_in_dump(self) -> None:
         if self._cash_in_dump_download_active or self._cash_in_index_build_active:
@@ -2777,7 +2788,11 @@ class SettingsTab(ttk.Frame):
         )
         self._cash_in_dump_download_thread.start()
 
-    def _on_build_cash_in_offline_index(self) -> None:
+    def _on_build_cash_in_offline_index(self, delta: bool = False) -> None:
+        """
+        Pelna konwersja dumpa do offline indexu albo (delta=True) nalozenie
+        dumpa "zmienionych systemow" na istniejacy index.
+        """
         if self._cash_in_dump_download_active or self._cash_in_index_build_active:
             return
 
@@ -2798,6 +2813,12 @@ class SettingsTab(ttk.Frame):
         if not index_path:
             messagebox.showwarning("Cash-In index", "Podaj sciezke wyjsciowa offline indexu.")
             return
+        if delta and not os.path.isfile(index_path):
+            messagebox.showwarning(
+                "Cash-In index",
+                f"Brak offline indexu:\n{index_path}\n\nDelte mozna nalozyc tylko na zbudowany index.",
+            )
+            return
 
         out_dir = os.path.dirname(index_path)
         if out_dir:
@@ -2814,7 +2835,11 @@ class SettingsTab(ttk.Frame):
         self.var_cash_in_offline_index_path.set(index_path)
         self._persist_cash_in_paths_silent()
         self.var_cash_in_index_build_progress.set(0.0)
-        self.var_cash_in_index_build_status.set("Start konwersji dumpa do offline index...")
+        self.var_cash_in_index_build_status.set(
+            "Start aktualizacji offline index z delty..."
+            if delta
+            else "Start konwersji dumpa do offline index..."
+        )
         self._set_cash_in_index_build_ui_busy(True)
 
         def _worker(source_dump: str, target_index: str) -> None:
@@ -2828,18 +2853,32 @@ class SettingsTab(ttk.Frame):
                         ),
                     )
 
-                result = build_offline_index_from_spansh_dump(
-                    source_dump,
-                    target_index,
-                    progress_callback=_progress,
-                )
-                stations = int(result.get("stations_written") or 0)
-                systems = int(result.get("systems_with_relevant_stations") or 0)
-                elapsed = float(result.get("duration_sec") or 0.0)
-                done_msg = (
-                    "Offline index gotowy: "
-                    f"{stations} stacji, {systems} systemow, czas {elapsed:.1f}s."
-                )
+                if delta:
+                    result = apply_offline_index_delta_from_spansh_dump(
+                        source_dump,
+                        target_index,
+                        progress_callback=_progress,
+                    )
+                    done_msg = (
+                        "Delta offline index zastosowana: "
+                        f"upsert {int(result.get('stations_upserted') or 0)}, "
+                        f"usuniete {int(result.get('stations_tombstoned') or 0)}, "
+                        f"generacja {int(result.get('generation') or 0)}, "
+                        f"czas {float(result.get('duration_sec') or 0.0):.1f}s."
+                    )
+                else:
+                    result = build_offline_index_from_spansh_dump(
+                        source_dump,
+                        target_index,
+                        progress_callback=_progress,
+                    )
+                    stations = int(result.get("stations_written") or 0)
+                    systems = int(result.get("systems_with_relevant_stations") or 0)
+                    elapsed = float(result.get("duration_sec") or 0.0)
+                    done_msg = (
+                        "Offline index gotowy: "
+                        f"{stations} stacji, {systems} systemow, czas {elapsed:.1f}s."
+                    )
                 self.after(
                     0,
                     lambda: (
@@ -7,6 +7,7 @@ import config
 from logic import neutron
 from logic import neutron_via
 from logic.rows_normalizer import normalize_neutron_rows
+from logic.route_fuel_simulator import simulate_route_fuel
 from logic import utils
 from logic.spansh_client import client as spansh_client
 from gui import common
@@ -17,6 +18,7 @@ from gui.ui_thread import run_on_ui_thread
 from gui.common_autocomplete import AutocompleteController, edsm_single_system_lookup
 from app.route_manager import route_manager
 from app.state import app_state
+from logic.utils.cancellation import current_cancel_token
 from logic.utils.renata_log import log_event_throttled
 
 
@@ -408,6 +410,8 @@ class NeutronTab(ttk.Frame):
         tr = []
         details = []
         worker_error = None
+        fuel_sim = None
+        cancel_token = current_cancel_token()
         try:
             tr, details = neutron.oblicz_spansh_with_details(
                 s,
@@ -418,11 +422,24 @@ class NeutronTab(ttk.Frame):
                 supercharge_mode=supercharge_mode,
                 via=via,
             )
+            fuel_sim = self._simulate_route_fuel(tr, details)
         except Exception as exc:
             worker_error = exc
         finally:
             def _apply_result() -> None:
+                if cancel_token is not None and cancel_token.reason == "superseded":
+                    # Nowsze zapytanie neutron juz trwa i samo zarzadza UI.
+                    return
                 try:
+                    if cancel_token is not None and cancel_token.cancelled:
+                        common.emit_status(
+                            "WARN",
+                            "ROUTE_CANCELLED",
+                            text="Wyznaczanie trasy przerwane.",
+                            source="spansh.neutron",
+                            ui_target="neu",
+                        )
+                        return
                     if worker_error is not None:
                         common.emit_status(
                             "ERROR",
@@ -546,6 +563,17 @@ class NeutronTab(ttk.Frame):
                             source="spansh.neutron",
                             ui_target="neu",
                         )
+                        if fuel_sim is not None and not fuel_sim.ok and fuel_sim.error is None:
+                            common.emit_status(
+                                "WARN",
+                                "ROUTE_FUEL_SHORTAGE",
+                                text=(
+                                    "Uwaga: przy obecnym paliwie trasa urwie sie przed "
+                                    f"{fuel_sim.runs_dry_system or 'celem'}."
+                                ),
+                                source="spansh.neutron",
+                                ui_target="neu",
+                            )
                     else:
                         try:
                             intent_target = str(cel or "").strip()
@@ -596,11 +624,27 @@ class NeutronTab(ttk.Frame):
 
             run_on_ui_thread(self.root, _apply_result)
 
+    def _simulate_route_fuel(self, tr, details):
+        if not tr or not details or not config.get("route_fuel_simulation_enabled", True):
+            return None
+        try:
+            return simulate_route_fuel(details)
+        except Exception as exc:
+            _log_neutron_soft_failure(
+                "route_fuel_simulation",
+                "neutron route fuel simulation failed",
+                route_len=len(tr),
+                error=f"{type(exc).__name__}: {exc}",
+            )
+            return None
+
     def _can_start(self) -> bool:
-        if self._busy:
+        # Trwajacy job neutron nie blokuje nowego zapytania - RouteManager
+        # anuluje go (supersede) przy starcie nowego.
+        if self._busy and not route_manager.is_busy("neutron"):
             common.emit_status("WARN", "ROUTE_BUSY", text="Laduje...", source="spansh.neutron", ui_target="neu")
             return False
-        if route_manager.is_busy():
+        if not route_manager.can_start("neutron"):
             common.emit_status("WARN", "ROUTE_BUSY", text="Inny planner juz liczy.", source="spansh.neutron", ui_target="neu")
             return False
         return True
@@ -526,7 +526,7 @@ class SpanshPlannerBase(ttk.Frame):
                 ui_target=self._status_target,
             )
             return False
-        if route_manager.is_busy():
+        if not route_manager.can_start(self._mode_key):
             common.emit_status(
                 "WARN",
                 "ROUTE_BUSY",
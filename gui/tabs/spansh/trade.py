@@ -1325,7 +1325,7 @@ class TradeTab(ttk.Frame):
         if self._busy:
             common.emit_status("WARN", "ROUTE_BUSY", text="Laduje...", source="spansh.trade", ui_target="trade")
             return False
-        if route_manager.is_busy():
+        if not route_manager.can_start("trade"):
             common.emit_status("WARN", "ROUTE_BUSY", text="Inny planner juz liczy.", source="spansh.trade", ui_target="trade")
             return False
         return True
@@ -2559,6 +2559,7 @@ class TradeTab(ttk.Frame):
             "CACHE_TTL_HIT": "cache",
             "OFFLINE_CACHE_FALLBACK": "offline-fallback",
             "ERROR_NO_DATA": "brak danych",
+            "LOCAL_PLAYERDB": "lokalne",
             "UNKNOWN": "-",
         }
         return mapping.get(raw, raw.lower() if raw else "-")
@@ -25,11 +25,18 @@ _RUNTIME: dict[str, Any] = {
     "cargo_inventory": {},
     "cargo_tons_hint": 0.0,
     "last_signature": "",
+    # Rosnie przy kazdej zmianie cen/ladunku (klucz cache value_at_risk).
+    "version": 0,
 }
 
 
+def runtime_version() -> int:
+    return int(_RUNTIME["version"])
+
+
 def reset_runtime() -> None:
     with _RUNTIME_LOCK:
+        _RUNTIME["version"] = int(_RUNTIME["version"]) + 1
         _RUNTIME["market_current"] = {}
         _RUNTIME["market_cache"] = {}
         _RUNTIME["cargo_inventory"] = {}
@@ -203,6 +210,7 @@ def update_market_snapshot(data: dict | None, *, source: str = "market_json") ->
         for key, value in current_prices.items():
             cached[key] = dict(value)
         _RUNTIME["market_cache"] = cached
+        _RUNTIME["version"] = int(_RUNTIME["version"]) + 1
 
 
 def update_cargo_snapshot(data: dict | None, *, source: str = "cargo_json") -> None:
@@ -243,6 +251,7 @@ def update_cargo_snapshot(data: dict | None, *, source: str = "cargo_json") -> N
     with _RUNTIME_LOCK:
         _RUNTIME["cargo_inventory"] = cargo_inventory
         _RUNTIME["cargo_tons_hint"] = float(max(0.0, cargo_tons_hint))
+        _RUNTIME["version"] = int(_RUNTIME["version"]) + 1
 
 
 def estimate_cargo_value(*, cargo_tons: float | None = None) -> CargoValueEstimate:
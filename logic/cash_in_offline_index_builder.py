@@ -1,18 +1,48 @@
 from __future__ import annotations
 
 import gzip
-import io
 import json
 import os
+import queue
+import re
 import tempfile
+import threading
 import time
+import uuid
+from collections import deque
+from contextlib import closing
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
-from typing import Any, Callable, Dict
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator
 
 from logic.utils.renata_log import log_event_throttled
 
 ProgressCallback = Callable[[float, str], None]
 
+OFFLINE_INDEX_DELTA_FORMAT = "renata_offline_index_delta_v1"
+# Nakladka delta jest wchlaniana do bazy, gdy urosnie albo zestarzeje sie
+# (liczba generacji od ostatniego pelnego buildu/kompaktowania).
+OFFLINE_INDEX_DELTA_COMPACT_MAX_SYSTEMS = 20_000
+OFFLINE_INDEX_DELTA_COMPACT_MAX_GENERATIONS = 14
+
+_READ_CHUNK_BYTES = 1_048_576
+_BATCH_TARGET_BYTES = 4_194_304
+_BATCH_MAX_SYSTEMS = 50_000
+_LINE_MODE_PROBE_BYTES = 4_194_304
+_READER_QUEUE_SIZE = 8
+_MAX_AUTO_WORKERS = 8
+
+_SEPARATOR_BYTES = b" \r\n\t,"
+_LINE_TRAILER_BYTES = b" \r\t,"
+_STRUCTURAL_RE = re.compile(rb'["{}\[\]]')
+_STRING_SPECIAL_RE = re.compile(rb'["\\]')
+# Pre-scan: system bez tokenu UC/Vista nie moze dac zadnego wpisu indexu,
+# wiec nie parsujemy go jako JSON (wiekszosc galaktyki).
+_RELEVANT_RECORD_NEEDLES = (b"artographics", b"enomics", b"ARTOGRAPHICS", b"ENOMICS")
+_SYSTEM_DATE_RE = re.compile(rb'"date"\s*:\s*"([^"\\]*)"')
+
 
 def _as_text(value: Any) -> str:
     return str(value or "").strip()
@@ -57,11 +87,19 @@ def _normalize_station_type(value: Any) -> str:
     return "station"
 
 
-def _service_token(value: Any) -> str:
-    raw = _as_text(value).casefold()
+@lru_cache(maxsize=4096)
+def _service_token_text(text: str) -> str:
+    raw = text.strip().casefold()
     return "".join(ch for ch in raw if ch.isalnum())
 
 
+def _service_token(value: Any) -> str:
+    # Slownik uslug jest maly i powtarzalny, a dump ma ich miliony.
+    if isinstance(value, str):
+        return _service_token_text(value)
+    return _service_token_text(_as_text(value))
+
+
 def _has_uc_service(services: list[Any]) -> bool:
     for item in services:
         token = _service_token(item)
@@ -82,56 +120,621 @@ def _has_vista_service(services: list[Any]) -> bool:
     return False
 
 
-def _iter_json_array_objects(
-    text_stream: io.TextIOBase,
-    *,
-    chunk_size: int = 262_144,
-):
-    decoder = json.JSONDecoder()
-    buffer = ""
-    in_array = False
-
-    while True:
-        chunk = text_stream.read(chunk_size)
-        eof = chunk == ""
-        if chunk:
-            buffer += chunk
-
-        pos = 0
-        while True:
-            size = len(buffer)
-            while pos < size and buffer[pos] in " \r\n\t,":
-                pos += 1
+def _later_date(current: str, candidate: str) -> str:
+    if candidate and (not current or candidate > current):
+        return candidate
+    return current
+
 
-            if not in_array:
-                if pos >= size:
+def _is_relevant_record(raw: bytes) -> bool:
+    for needle in _RELEVANT_RECORD_NEEDLES:
+        if needle in raw:
+            return True
+    return False
+
+
+class _DumpRecordSplitter:
+    """
+    Dzieli bajty dumpa (tablica JSON) na surowe rekordy systemow bez parsowania.
+
+    Dump Spansh ma jeden system na linie, wiec glowna sciezka to ciecie po
+    `\\n`. Dla dumpow bez podzialu na linie (albo pojedynczych rekordow
+    wielolinijkowych) splitter przechodzi na skan struktury: nawiasy i
+    stringi sa liczone regexem, bez budowania obiektow Pythona.
+    """
+
+    def __init__(self) -> None:
+        self._buf = bytearray()
+        self._pos = 0
+        self._started = False
+        self._finished = False
+        self._line_mode: bool | None = None
+        self._depth = 0
+        self._in_string = False
+        self._record_start = -1
+
+    @property
+    def finished(self) -> bool:
+        return self._finished
+
+    def feed(self, data: bytes, *, eof: bool = False) -> list[bytes]:
+        buf = self._buf
+        if data:
+            buf += data
+        records: list[bytes] = []
+        pos = self._pos
+        size = len(buf)
+
+        while pos < size and not self._finished:
+            if self._depth > 0:
+                pos = self._scan_record(buf, pos, size, records)
+                if self._depth > 0:
                     break
-                if buffer[pos] == "[":
-                    in_array = True
-                    pos += 1
-                    continue
-                raise ValueError("Spansh dump is not a JSON array.")
+                continue
 
+            while pos < size and buf[pos] in _SEPARATOR_BYTES:
+                pos += 1
             if pos >= size:
                 break
-            if buffer[pos] == "]":
-                return
 
-            try:
-                item, end = decoder.raw_decode(buffer, pos)
-            except json.JSONDecodeError:
+            head = buf[pos]
+            if not self._started:
+                if head == 0xEF and buf[pos:pos + 3] == b"\xef\xbb\xbf":
+                    pos += 3
+                    continue
+                if head != 0x5B:
+                    raise ValueError("Spansh dump is not a JSON array.")
+                self._started = True
+                pos += 1
+                continue
+            if head == 0x5D:
+                self._finished = True
+                pos += 1
                 break
-            yield item
-            pos = end
+            if head not in (0x7B, 0x5B):
+                raise ValueError("Malformed or truncated Spansh dump payload.")
 
-        if pos > 0:
-            buffer = buffer[pos:]
+            if self._line_mode is not False and not eof:
+                newline = buf.find(b"\n", pos)
+                if newline < 0:
+                    if self._line_mode is None and size - pos > _LINE_MODE_PROBE_BYTES:
+                        self._line_mode = False
+                    else:
+                        break
+                else:
+                    end = newline
+                    while end > pos and buf[end - 1] in _LINE_TRAILER_BYTES:
+                        end -= 1
+                    closing = 0x7D if head == 0x7B else 0x5D
+                    if end - pos >= 2 and buf[end - 1] == closing:
+                        if self._line_mode is None:
+                            self._line_mode = True
+                        records.append(bytes(buf[pos:end]))
+                        pos = newline + 1
+                        continue
+                    if self._line_mode is None:
+                        self._line_mode = False
 
-        if eof:
-            tail = buffer.strip()
-            if not tail or tail == "]":
-                return
+            self._record_start = pos
+            pos = self._scan_record(buf, pos, size, records)
+
+        cut = self._record_start if self._depth > 0 else min(pos, size)
+        if cut > 0:
+            del buf[:cut]
+            pos -= cut
+            if self._record_start >= 0:
+                self._record_start -= cut
+        self._pos = pos
+        return records
+
+    def _scan_record(self, buf: bytearray, pos: int, size: int, records: list[bytes]) -> int:
+        while pos < size:
+            if self._in_string:
+                match = _STRING_SPECIAL_RE.search(buf, pos)
+                if match is None:
+                    return size
+                if buf[match.start()] == 0x5C:
+                    pos = match.end() + 1
+                else:
+                    self._in_string = False
+                    pos = match.end()
+                continue
+
+            match = _STRUCTURAL_RE.search(buf, pos)
+            if match is None:
+                return size
+            token = buf[match.start()]
+            pos = match.end()
+            if token == 0x22:
+                self._in_string = True
+            elif token in (0x7B, 0x5B):
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._depth == 0:
+                    records.append(bytes(buf[self._record_start:pos]))
+                    self._record_start = -1
+                    return pos
+        return pos
+
+    def finish(self) -> list[bytes]:
+        records = self.feed(b"", eof=True) if not self._finished else []
+        if self._depth > 0 or self._in_string:
             raise ValueError("Malformed or truncated Spansh dump payload.")
+        return records
+
+
+@dataclass
+class _DumpBatch:
+    records: list[bytes] = field(default_factory=list)
+    record_bytes: int = 0
+    systems_seen: int = 0
+    systems_skipped: int = 0
+    skipped_latest_date: str = ""
+    compressed_offset: int = 0
+    decompressed_bytes: int = 0
+
+
+@dataclass
+class _BatchResult:
+    systems_parsed: int = 0
+    systems_with_relevant_stations: int = 0
+    station_rows_json: list[str] = field(default_factory=list)
+    systems_coords: list[tuple[str, float, float, float]] = field(default_factory=list)
+    systems: list[tuple[str, tuple[float, float, float] | None, list[dict[str, Any]]]] = field(
+        default_factory=list
+    )
+    latest_index_date: str = ""
+
+
+def _station_rows_for_system(
+    system_obj: dict[str, Any],
+) -> tuple[str, tuple[float, float, float] | None, str, list[dict[str, Any]]]:
+    system_name = _as_text(system_obj.get("name"))
+    coords_obj = system_obj.get("coords") or {}
+    cx = _safe_float(coords_obj.get("x") if isinstance(coords_obj, dict) else None)
+    cy = _safe_float(coords_obj.get("y") if isinstance(coords_obj, dict) else None)
+    cz = _safe_float(coords_obj.get("z") if isinstance(coords_obj, dict) else None)
+    coords: tuple[float, float, float] | None = None
+    if system_name != "" and cx is not None and cy is not None and cz is not None:
+        coords = (float(cx), float(cy), float(cz))
+
+    system_date = _to_iso_date(system_obj.get("date"))
+
+    stations = system_obj.get("stations")
+    if not isinstance(stations, list):
+        stations = []
+
+    rows: list[dict[str, Any]] = []
+    for station in stations:
+        if not isinstance(station, dict):
+            continue
+
+        station_name = _as_text(station.get("name"))
+        if not station_name or not system_name:
+            continue
+
+        services_raw = station.get("services")
+        services: list[Any]
+        if isinstance(services_raw, list):
+            services = list(services_raw)
+        elif isinstance(services_raw, dict):
+            services = list(services_raw.keys())
+        else:
+            services = []
+
+        has_uc = _has_uc_service(services)
+        has_vista = _has_vista_service(services)
+        if not has_uc and not has_vista:
+            continue
+        if coords is None:
+            continue
+
+        freshness_ts = _as_text(
+            station.get("updateTime")
+            or station.get("updatedAt")
+            or station.get("updated_at")
+            or system_obj.get("date")
+        )
+        rows.append(
+            {
+                "name": station_name,
+                "system_name": system_name,
+                "type": _normalize_station_type(station.get("type")),
+                "services": {
+                    "has_uc": bool(has_uc),
+                    "has_vista": bool(has_vista),
+                },
+                "distance_ls": _safe_float(station.get("distanceToArrival")),
+                "freshness_ts": freshness_ts,
+            }
+        )
+    return system_name, coords, system_date, rows
+
+
+def _parse_system_records(records: list[bytes], keep_systems: bool = False) -> _BatchResult:
+    """
+    Worker (takze w procesie potomnym): parsuje i filtruje paczke rekordow.
+
+    `keep_systems=True` zwraca wiersze per system (takze puste) zamiast
+    gotowego JSON-a - tego potrzebuje delta, zeby wykryc usuniete stacje.
+    """
+    result = _BatchResult()
+    for raw in records:
+        result.systems_parsed += 1
+        try:
+            system_obj = json.loads(raw)
+        except ValueError as exc:
+            raise ValueError("Malformed or truncated Spansh dump payload.") from exc
+        if not isinstance(system_obj, dict):
+            continue
+
+        system_name, coords, system_date, rows = _station_rows_for_system(system_obj)
+        result.latest_index_date = _later_date(result.latest_index_date, system_date)
+        if keep_systems:
+            if system_name:
+                result.systems.append((system_name, coords, rows))
+            if rows:
+                result.systems_with_relevant_stations += 1
+            continue
+        if not rows:
+            continue
+
+        result.systems_with_relevant_stations += 1
+        if coords is not None:
+            result.systems_coords.append((system_name, coords[0], coords[1], coords[2]))
+        for row in rows:
+            result.station_rows_json.append(
+                json.dumps(row, ensure_ascii=False, separators=(",", ":"))
+            )
+    return result
+
+
+class _DumpBatchReader(threading.Thread):
+    """Etap 1: dekompresja + ciecie rekordow + pre-scan, paczki do kolejki."""
+
+    _DONE = object()
+
+    def __init__(
+        self,
+        input_path: str,
+        *,
+        prescan: bool = True,
+        batch_bytes: int | None = None,
+    ) -> None:
+        super().__init__(name="OfflineIndexDumpReader", daemon=True)
+        self._input_path = input_path
+        self._prescan = bool(prescan)
+        self._batch_bytes = max(1, int(batch_bytes or _BATCH_TARGET_BYTES))
+        self._queue: queue.Queue[Any] = queue.Queue(maxsize=_READER_QUEUE_SIZE)
+        self._stop_event = threading.Event()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def _put(self, item: Any) -> bool:
+        while not self._stop_event.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def run(self) -> None:
+        try:
+            self._read()
+            self._put(self._DONE)
+        except BaseException as exc:
+            self._put(exc)
+
+    def _read(self) -> None:
+        splitter = _DumpRecordSplitter()
+        batch = _DumpBatch()
+        decompressed_total = 0
+        with open(self._input_path, "rb") as raw_handle:
+            with gzip.GzipFile(fileobj=raw_handle, mode="rb") as gz_handle:
+                while not self._stop_event.is_set():
+                    chunk = gz_handle.read(_READ_CHUNK_BYTES)
+                    if chunk:
+                        decompressed_total += len(chunk)
+                        records = splitter.feed(chunk)
+                    else:
+                        records = splitter.finish()
+
+                    for raw in records:
+                        batch.systems_seen += 1
+                        if self._prescan and not _is_relevant_record(raw):
+                            batch.systems_skipped += 1
+                            date_match = _SYSTEM_DATE_RE.search(raw)
+                            if date_match is not None:
+                                batch.skipped_latest_date = _later_date(
+                                    batch.skipped_latest_date,
+                                    _to_iso_date(date_match.group(1).decode("utf-8", "replace")),
+                                )
+                            continue
+                        batch.records.append(raw)
+                        batch.record_bytes += len(raw)
+
+                    if (
+                        batch.record_bytes >= self._batch_bytes
+                        or batch.systems_seen >= _BATCH_MAX_SYSTEMS
+                        or (not chunk and batch.systems_seen)
+                    ):
+                        batch.compressed_offset = int(raw_handle.tell())
+                        batch.decompressed_bytes = decompressed_total
+                        if not self._put(batch):
+                            return
+                        batch = _DumpBatch()
+
+                    if not chunk or splitter.finished:
+                        break
+
+                if batch.systems_seen:
+                    batch.compressed_offset = int(raw_handle.tell())
+                    batch.decompressed_bytes = decompressed_total
+                    self._put(batch)
+
+    def batches(self) -> Iterator[_DumpBatch]:
+        while True:
+            item = self._queue.get()
+            if item is self._DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+
+
+def _resolve_worker_count(workers: int | None) -> int:
+    if workers is not None:
+        return max(1, int(workers))
+    cpu_total = int(os.cpu_count() or 1)
+    return max(1, min(_MAX_AUTO_WORKERS, cpu_total - 1))
+
+
+def _iter_dump_results(
+    input_path: str,
+    *,
+    worker_count: int,
+    prescan: bool = True,
+    keep_systems: bool = False,
+) -> Iterator[tuple[_DumpBatch, _BatchResult]]:
+    """Etapy 2-3: parsowanie paczek (pula procesow) i oddawanie wynikow w kolejnosci dumpa."""
+    reader = _DumpBatchReader(input_path, prescan=prescan)
+    executor: ProcessPoolExecutor | None = None
+    in_flight: deque[tuple[_DumpBatch, Future | _BatchResult]] = deque()
+    try:
+        reader.start()
+        batches_seen = 0
+        for batch in reader.batches():
+            batches_seen += 1
+            # Pierwsza paczka liczona lokalnie: maly dump nie placi za start puli.
+            if worker_count > 1 and batches_seen > 1 and executor is None:
+                executor = ProcessPoolExecutor(max_workers=worker_count)
+            if executor is not None:
+                in_flight.append(
+                    (batch, executor.submit(_parse_system_records, batch.records, keep_systems))
+                )
+            else:
+                in_flight.append((batch, _parse_system_records(batch.records, keep_systems)))
+            while len(in_flight) > worker_count * 2:
+                done_batch, outcome = in_flight.popleft()
+                yield done_batch, (outcome.result() if isinstance(outcome, Future) else outcome)
+        while in_flight:
+            done_batch, outcome = in_flight.popleft()
+            yield done_batch, (outcome.result() if isinstance(outcome, Future) else outcome)
+    finally:
+        reader.stop()
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _throughput_message(
+    prefix: str,
+    *,
+    systems: int,
+    stations: int,
+    decompressed_bytes: int,
+    elapsed_sec: float,
+) -> str:
+    elapsed = max(1e-6, float(elapsed_sec))
+    return (
+        f"{prefix}: systemy={systems}, wpisy={stations}, "
+        f"{decompressed_bytes / 1_048_576.0 / elapsed:.1f} MB/s, "
+        f"{systems / elapsed:.0f} sys/s"
+    )
+
+
+def offline_index_delta_path(index_path: str) -> str:
+    """Sciezka nakladki delta (generacji) obok bazowego offline indexu."""
+    return f"{_as_text(index_path)}.delta.json"
+
+
+def _base_generation_id(base_payload: Any) -> str:
+    if not isinstance(base_payload, dict):
+        return ""
+    meta = base_payload.get("meta")
+    if not isinstance(meta, dict):
+        return ""
+    return _as_text(meta.get("build_id") or meta.get("built_at"))
+
+
+def _system_key(value: Any) -> str:
+    return _as_text(value).casefold()
+
+
+def _payload_index_date(payload: Any) -> str:
+    if not isinstance(payload, dict):
+        return ""
+    meta = payload.get("meta")
+    if isinstance(meta, dict) and _as_text(meta.get("index_date")):
+        return _as_text(meta.get("index_date"))
+    return _as_text(payload.get("index_date"))
+
+
+def _discard_stale_delta(index_path: str) -> None:
+    delta_path = offline_index_delta_path(index_path)
+    try:
+        if os.path.isfile(delta_path):
+            os.remove(delta_path)
+    except Exception as exc:
+        log_event_throttled(
+            "cash_in_offline_index.cleanup.delta",
+            5000,
+            "WARN",
+            "Offline index builder: failed to remove stale delta file",
+            path=str(delta_path or ""),
+            error=f"{type(exc).__name__}: {exc}",
+        )
+
+
+def merge_offline_index_delta(base_payload: Any, delta_payload: Any) -> Any:
+    """
+    Naklada nakladke delta na bazowy index i zwraca nowy payload (wejscie bez zmian).
+
+    Wpis systemu w delcie zastepuje wszystkie jego stacje z bazy; pusta lista
+    stacji dziala jak tombstone. Delta zbudowana dla innej bazy jest ignorowana.
+    """
+    if not isinstance(base_payload, dict) or not isinstance(delta_payload, dict):
+        return base_payload
+    if _as_text(delta_payload.get("format")) != OFFLINE_INDEX_DELTA_FORMAT:
+        return base_payload
+    base_id = _base_generation_id(base_payload)
+    if not base_id or _as_text(delta_payload.get("base_build_id")) != base_id:
+        return base_payload
+    base_rows = base_payload.get("stations")
+    if not isinstance(base_rows, list):
+        return base_payload
+
+    entries = [
+        entry
+        for entry in (delta_payload.get("systems") or [])
+        if isinstance(entry, dict) and _as_text(entry.get("name"))
+    ]
+    replaced = {_system_key(entry.get("name")) for entry in entries}
+
+    stations = [
+        row
+        for row in base_rows
+        if not (isinstance(row, dict) and _system_key(row.get("system_name")) in replaced)
+    ]
+    systems_rows = [
+        row
+        for row in (base_payload.get("systems_rows") or [])
+        if not (isinstance(row, dict) and _system_key(row.get("name")) in replaced)
+    ]
+    for entry in entries:
+        rows = entry.get("stations")
+        if isinstance(rows, list):
+            stations.extend(row for row in rows if isinstance(row, dict))
+        coords = entry.get("coords")
+        if isinstance(coords, dict):
+            systems_rows.append({"name": _as_text(entry.get("name")), "coords": dict(coords)})
+
+    index_date = _later_date(
+        _payload_index_date(base_payload),
+        _as_text(delta_payload.get("index_date")),
+    )
+    merged = dict(base_payload)
+    meta = dict(base_payload.get("meta") or {})
+    meta["index_date"] = index_date
+    meta["delta_generation"] = int(delta_payload.get("generation") or 0)
+    meta["delta_updated_at"] = _as_text(delta_payload.get("updated_at"))
+    merged["meta"] = meta
+    merged["index_date"] = index_date
+    merged["stations"] = stations
+    merged["systems_rows"] = systems_rows
+    return merged
+
+
+def _load_delta_for_base(delta_path: str, base_payload: Any) -> dict[str, Any] | None:
+    if not os.path.isfile(delta_path):
+        return None
+    try:
+        with open(delta_path, "r", encoding="utf-8") as handle:
+            payload = json.load(handle)
+    except Exception as exc:
+        log_event_throttled(
+            "cash_in_offline_index.delta.load",
+            5000,
+            "WARN",
+            "Offline index delta: unreadable delta file ignored",
+            path=str(delta_path or ""),
+            error=f"{type(exc).__name__}: {exc}",
+        )
+        return None
+    if not isinstance(payload, dict):
+        return None
+    if _as_text(payload.get("format")) != OFFLINE_INDEX_DELTA_FORMAT:
+        return None
+    if _as_text(payload.get("base_build_id")) != _base_generation_id(base_payload):
+        return None
+    return payload
+
+
+def _atomic_write_json_text(path: str, text: str) -> None:
+    # Unikalny tmp w katalogu docelowym: rownolegle zapisy nie nadpisuja sobie pliku.
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(prefix=f"{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="\n") as out_handle:
+            out_handle.write(text)
+        os.replace(tmp_path, path)
+    finally:
+        try:
+            if os.path.isfile(tmp_path):
+                os.remove(tmp_path)
+        except Exception as exc:
+            log_event_throttled(
+                "cash_in_offline_index.cleanup.atomic_tmp",
+                5000,
+                "WARN",
+                "Offline index builder: failed to remove temp file",
+                path=str(tmp_path or ""),
+                error=f"{type(exc).__name__}: {exc}",
+            )
+
+
+def _compact_delta_into_base(base_path: str, base_payload: Any, delta_payload: Any) -> Dict[str, Any]:
+    merged = merge_offline_index_delta(base_payload, delta_payload)
+    if merged is base_payload:
+        return {"compacted": False, "index_path": base_path}
+    meta = dict(merged.get("meta") or {})
+    generation = int(meta.pop("delta_generation", 0) or 0)
+    meta.pop("delta_updated_at", None)
+    meta["build_id"] = uuid.uuid4().hex
+    meta["compacted_at"] = datetime.now(timezone.utc).replace(microsecond=0).isoformat()
+    meta["compacted_delta_generation"] = generation
+    meta["stations_written"] = len(merged.get("stations") or [])
+    meta["systems_with_coords"] = len(merged.get("systems_rows") or [])
+    merged["meta"] = meta
+    # Nowa baza ma nowe build_id, wiec stara nakladka przestaje do niej pasowac
+    # jeszcze przed usunieciem - czytelnik nie nalozy jej drugi raz.
+    _atomic_write_json_text(base_path, json.dumps(merged, ensure_ascii=False, separators=(",", ":")))
+    _discard_stale_delta(base_path)
+    return {
+        "compacted": True,
+        "index_path": base_path,
+        "build_id": meta["build_id"],
+        "delta_generation": generation,
+        "stations": meta["stations_written"],
+    }
+
+
+def compact_offline_index_delta(index_path: str) -> Dict[str, Any]:
+    """
+    Wchlania nakladke `<index>.delta.json` do bazowego indexu (nowe build_id)
+    i usuwa nakladke. Bez pasujacej nakladki nic nie zmienia.
+    """
+    base_path = os.path.abspath(_as_text(index_path))
+    if not os.path.isfile(base_path):
+        raise FileNotFoundError(f"Offline index not found: {base_path}")
+    with open(base_path, "r", encoding="utf-8") as handle:
+        base_payload = json.load(handle)
+    delta_payload = _load_delta_for_base(offline_index_delta_path(base_path), base_payload)
+    if delta_payload is None:
+        return {"compacted": False, "index_path": base_path}
+    return _compact_delta_into_base(base_path, base_payload, delta_payload)
 
 
 def _emit_progress(
@@ -150,7 +753,15 @@ def build_offline_index_from_spansh_dump(
     output_path: str,
     *,
     progress_callback: ProgressCallback | None = None,
+    workers: int | None = None,
 ) -> Dict[str, Any]:
+    """
+    Konwertuje dump Spansh (galaxy_stations .json.gz) do offline indexu Cash-In.
+
+    Pipeline: watek czytajacy dekompresuje i tnie rekordy systemow (z pre-scanem
+    UC/Vista), pula procesow parsuje paczki, a watek wywolujacy scala wyniki
+    w kolejnosci dumpa. `workers=1` liczy wszystko w procesie biezacym.
+    """
     input_path = os.path.abspath(_as_text(dump_path))
     out_path = os.path.abspath(_as_text(output_path))
     if not input_path:
@@ -164,8 +775,10 @@ def build_offline_index_from_spansh_dump(
     if output_dir:
         os.makedirs(output_dir, exist_ok=True)
 
+    worker_count = _resolve_worker_count(workers)
     total_bytes = max(1, int(os.path.getsize(input_path)))
     systems_processed = 0
+    systems_skipped_prescan = 0
     systems_with_relevant_stations = 0
     stations_written = 0
     latest_index_date = ""
@@ -173,9 +786,12 @@ def build_offline_index_from_spansh_dump(
     started_at = time.monotonic()
     temp_station_path = ""
     output_tmp = f"{out_path}.tmp"
+    compressed_done = 0
+    decompressed_done = 0
 
     _emit_progress(progress_callback, 0.0, "Start konwersji dumpa do offline index...")
 
+    dump_results = _iter_dump_results(input_path, worker_count=worker_count)
     try:
         with tempfile.NamedTemporaryFile(
             mode="w",
@@ -187,115 +803,39 @@ def build_offline_index_from_spansh_dump(
             temp_station.write("[")
             first_station_row = True
 
-            with open(input_path, "rb") as raw_handle:
-                with gzip.GzipFile(fileobj=raw_handle, mode="rb") as gz_handle:
-                    text_handle = io.TextIOWrapper(gz_handle, encoding="utf-8")
-                    for system_obj in _iter_json_array_objects(text_handle):
-                        systems_processed += 1
-                        if not isinstance(system_obj, dict):
-                            continue
+            for batch, parsed in dump_results:
+                systems_processed += batch.systems_seen
+                systems_skipped_prescan += batch.systems_skipped
+                systems_with_relevant_stations += parsed.systems_with_relevant_stations
+                latest_index_date = _later_date(latest_index_date, batch.skipped_latest_date)
+                latest_index_date = _later_date(latest_index_date, parsed.latest_index_date)
+                for name, cx, cy, cz in parsed.systems_coords:
+                    if name not in systems_coords:
+                        systems_coords[name] = (cx, cy, cz)
+                if parsed.station_rows_json:
+                    if not first_station_row:
+                        temp_station.write(",")
+                    temp_station.write(",".join(parsed.station_rows_json))
+                    first_station_row = False
+                    stations_written += len(parsed.station_rows_json)
 
-                        system_name = _as_text(system_obj.get("name"))
-                        coords_obj = system_obj.get("coords") or {}
-                        cx = _safe_float(
-                            coords_obj.get("x") if isinstance(coords_obj, dict) else None
-                        )
-                        cy = _safe_float(
-                            coords_obj.get("y") if isinstance(coords_obj, dict) else None
-                        )
-                        cz = _safe_float(
-                            coords_obj.get("z") if isinstance(coords_obj, dict) else None
-                        )
-                        has_system_coords = (
-                            system_name != ""
-                            and cx is not None
-                            and cy is not None
-                            and cz is not None
-                        )
-
-                        system_date = _to_iso_date(system_obj.get("date"))
-                        if system_date and (not latest_index_date or system_date > latest_index_date):
-                            latest_index_date = system_date
-
-                        stations = system_obj.get("stations")
-                        if not isinstance(stations, list):
-                            stations = []
-
-                        wrote_in_this_system = False
-                        for station in stations:
-                            if not isinstance(station, dict):
-                                continue
-
-                            station_name = _as_text(station.get("name"))
-                            if not station_name or not system_name:
-                                continue
-
-                            services_raw = station.get("services")
-                            services: list[Any]
-                            if isinstance(services_raw, list):
-                                services = list(services_raw)
-                            elif isinstance(services_raw, dict):
-                                services = list(services_raw.keys())
-                            else:
-                                services = []
-
-                            has_uc = _has_uc_service(services)
-                            has_vista = _has_vista_service(services)
-                            if not has_uc and not has_vista:
-                                continue
-                            if not has_system_coords:
-                                continue
-
-                            if has_system_coords and system_name not in systems_coords:
-                                systems_coords[system_name] = (float(cx), float(cy), float(cz))
-
-                            freshness_ts = _as_text(
-                                station.get("updateTime")
-                                or station.get("updatedAt")
-                                or station.get("updated_at")
-                                or system_obj.get("date")
-                            )
-                            station_row = {
-                                "name": station_name,
-                                "system_name": system_name,
-                                "type": _normalize_station_type(station.get("type")),
-                                "services": {
-                                    "has_uc": bool(has_uc),
-                                    "has_vista": bool(has_vista),
-                                },
-                                "distance_ls": _safe_float(station.get("distanceToArrival")),
-                                "freshness_ts": freshness_ts,
-                            }
-
-                            if not first_station_row:
-                                temp_station.write(",")
-                            json.dump(
-                                station_row,
-                                temp_station,
-                                ensure_ascii=False,
-                                separators=(",", ":"),
-                            )
-                            first_station_row = False
-                            stations_written += 1
-                            wrote_in_this_system = True
-
-                        if wrote_in_this_system:
-                            systems_with_relevant_stations += 1
-
-                        if systems_processed % 64 == 0:
-                            consumed = int(raw_handle.tell())
-                            percent = min(95.0, (consumed * 95.0) / float(total_bytes))
-                            _emit_progress(
-                                progress_callback,
-                                percent,
-                                (
-                                    "Konwersja dumpa: systemy="
-                                    f"{systems_processed}, wpisy={stations_written}"
-                                ),
-                            )
+                compressed_done = max(compressed_done, batch.compressed_offset)
+                decompressed_done = max(decompressed_done, batch.decompressed_bytes)
+                _emit_progress(
+                    progress_callback,
+                    min(95.0, (compressed_done * 95.0) / float(total_bytes)),
+                    _throughput_message(
+                        "Konwersja dumpa",
+                        systems=systems_processed,
+                        stations=stations_written,
+                        decompressed_bytes=decompressed_done,
+                        elapsed_sec=time.monotonic() - started_at,
+                    ),
+                )
 
             temp_station.write("]")
 
+        elapsed_total = max(1e-6, time.monotonic() - started_at)
         built_at = datetime.now(timezone.utc).replace(microsecond=0).isoformat()
         if not latest_index_date:
             latest_index_date = built_at[:10]
@@ -315,6 +855,7 @@ def build_offline_index_from_spansh_dump(
             "dump_path": input_path,
             "output_path": out_path,
             "built_at": built_at,
+            "build_id": uuid.uuid4().hex,
             "index_date": latest_index_date,
             "systems_processed": systems_processed,
             "systems_with_relevant_stations": systems_with_relevant_stations,
@@ -336,23 +877,31 @@ def build_offline_index_from_spansh_dump(
                         break
                     out_handle.write(chunk)
             out_handle.write(',"systems_rows":')
-            json.dump(systems_rows, out_handle, ensure_ascii=False, separators=(",", ":"))
+            # json.dumps (encoder C) zamiast json.dump (iterencode w Pythonie).
+            out_handle.write(json.dumps(systems_rows, ensure_ascii=False, separators=(",", ":")))
             out_handle.write("}")
 
         os.replace(output_tmp, out_path)
+        _discard_stale_delta(out_path)
         elapsed_sec = round(max(0.0, time.monotonic() - started_at), 3)
         result = dict(meta)
         result["duration_sec"] = elapsed_sec
+        result["workers"] = worker_count
+        result["systems_skipped_prescan"] = systems_skipped_prescan
+        result["throughput_mb_s"] = round(decompressed_done / 1_048_576.0 / elapsed_total, 2)
+        result["systems_per_sec"] = round(systems_processed / elapsed_total, 1)
         _emit_progress(
             progress_callback,
             100.0,
             (
                 "Konwersja zakonczona: "
-                f"stations={stations_written}, systems={systems_with_relevant_stations}"
+                f"stations={stations_written}, systems={systems_with_relevant_stations}, "
+                f"{result['throughput_mb_s']:.1f} MB/s, {result['systems_per_sec']:.0f} sys/s"
             ),
         )
         return result
     finally:
+        dump_results.close()
         try:
             if temp_station_path and os.path.isfile(temp_station_path):
                 os.remove(temp_station_path)
@@ -377,3 +926,178 @@ def build_offline_index_from_spansh_dump(
                 path=str(output_tmp or ""),
                 error=f"{type(exc).__name__}: {exc}",
             )
+
+
+def apply_offline_index_delta_from_spansh_dump(
+    delta_dump_path: str,
+    index_path: str,
+    *,
+    progress_callback: ProgressCallback | None = None,
+    workers: int | None = None,
+    compact: bool | None = None,
+) -> Dict[str, Any]:
+    """
+    Aplikuje dump Spansh "systemy zmienione w ostatnich N dniach" do istniejacego indexu.
+
+    Bazowy index nie jest przepisywany: zmienione systemy (upsert stacji albo
+    tombstone usunietych) trafiaja do nakladki `<index>.delta.json`. Kazde
+    wywolanie zapisuje nowa generacje nakladki przez unikalny plik tymczasowy
+    i `os.replace`, wiec czytelnik widzi zawsze pelna stara albo pelna nowa
+    wersje. `compact=None` wchlania nakladke do bazy po przekroczeniu progow
+    OFFLINE_INDEX_DELTA_COMPACT_*; True/False wymusza albo blokuje kompaktowanie.
+    """
+    input_path = os.path.abspath(_as_text(delta_dump_path))
+    base_path = os.path.abspath(_as_text(index_path))
+    if not input_path:
+        raise ValueError("Missing dump path.")
+    if not base_path:
+        raise ValueError("Missing index path.")
+    if not os.path.isfile(input_path):
+        raise FileNotFoundError(f"Dump file not found: {input_path}")
+    if not os.path.isfile(base_path):
+        raise FileNotFoundError(f"Offline index not found: {base_path}")
+
+    started_at = time.monotonic()
+    worker_count = _resolve_worker_count(workers)
+    total_bytes = max(1, int(os.path.getsize(input_path)))
+    _emit_progress(progress_callback, 0.0, "Start aktualizacji offline index z delty...")
+
+    with open(base_path, "r", encoding="utf-8") as handle:
+        base_payload = json.load(handle)
+    base_id = _base_generation_id(base_payload)
+    if not isinstance(base_payload, dict) or not isinstance(base_payload.get("stations"), list) or not base_id:
+        raise ValueError("Offline index format does not support delta updates; rebuild it from a full dump.")
+
+    delta_path = offline_index_delta_path(base_path)
+    previous = _load_delta_for_base(delta_path, base_payload)
+    overlay: dict[str, dict[str, Any]] = {}
+    for entry in (previous or {}).get("systems") or []:
+        if isinstance(entry, dict) and _as_text(entry.get("name")):
+            overlay[_system_key(entry.get("name"))] = entry
+
+    effective: dict[str, list[dict[str, Any]]] = {}
+    for row in base_payload.get("stations") or []:
+        if isinstance(row, dict):
+            effective.setdefault(_system_key(row.get("system_name")), []).append(row)
+    for key, entry in overlay.items():
+        effective[key] = [row for row in (entry.get("stations") or []) if isinstance(row, dict)]
+
+    systems_processed = 0
+    systems_updated = 0
+    systems_unchanged = 0
+    stations_upserted = 0
+    stations_tombstoned = 0
+    latest_dump_date = ""
+    compressed_done = 0
+    decompressed_done = 0
+
+    with closing(
+        _iter_dump_results(
+            input_path,
+            worker_count=worker_count,
+            prescan=False,
+            keep_systems=True,
+        )
+    ) as dump_results:
+        for batch, parsed in dump_results:
+            systems_processed += batch.systems_seen
+            latest_dump_date = _later_date(latest_dump_date, parsed.latest_index_date)
+            for system_name, coords, rows in parsed.systems:
+                key = _system_key(system_name)
+                current_rows = effective.get(key) or []
+                if not rows and not current_rows:
+                    continue
+                if rows == current_rows:
+                    systems_unchanged += 1
+                    continue
+
+                current_by_name = {_system_key(row.get("name")): row for row in current_rows}
+                new_names = {_system_key(row.get("name")) for row in rows}
+                stations_upserted += sum(
+                    1 for row in rows if current_by_name.get(_system_key(row.get("name"))) != row
+                )
+                stations_tombstoned += len(set(current_by_name) - new_names)
+                overlay[key] = {
+                    "name": system_name,
+                    "coords": (
+                        {"x": coords[0], "y": coords[1], "z": coords[2]}
+                        if coords is not None
+                        else None
+                    ),
+                    "stations": rows,
+                }
+                effective[key] = rows
+                systems_updated += 1
+
+            compressed_done = max(compressed_done, batch.compressed_offset)
+            decompressed_done = max(decompressed_done, batch.decompressed_bytes)
+            _emit_progress(
+                progress_callback,
+                min(95.0, (compressed_done * 95.0) / float(total_bytes)),
+                _throughput_message(
+                    "Delta offline index",
+                    systems=systems_processed,
+                    stations=stations_upserted,
+                    decompressed_bytes=decompressed_done,
+                    elapsed_sec=time.monotonic() - started_at,
+                ),
+            )
+
+    index_date = _later_date(
+        _later_date(_payload_index_date(base_payload), _as_text((previous or {}).get("index_date"))),
+        latest_dump_date,
+    )
+    generation = int((previous or {}).get("generation") or 0) + 1
+    updated_at = datetime.now(timezone.utc).replace(microsecond=0).isoformat()
+    delta_payload = {
+        "format": OFFLINE_INDEX_DELTA_FORMAT,
+        "generation": generation,
+        "base_build_id": base_id,
+        "index_date": index_date,
+        "updated_at": updated_at,
+        "source_dump": input_path,
+        "systems": list(overlay.values()),
+    }
+
+    _atomic_write_json_text(
+        delta_path,
+        json.dumps(delta_payload, ensure_ascii=False, separators=(",", ":")),
+    )
+
+    if compact is None:
+        compact = (
+            len(overlay) >= OFFLINE_INDEX_DELTA_COMPACT_MAX_SYSTEMS
+            or generation >= OFFLINE_INDEX_DELTA_COMPACT_MAX_GENERATIONS
+        )
+    compacted = False
+    if compact:
+        _emit_progress(progress_callback, 97.0, "Kompaktowanie nakladki delta do bazowego indexu...")
+        compacted = bool(_compact_delta_into_base(base_path, base_payload, delta_payload).get("compacted"))
+
+    result = {
+        "source": "spansh_delta_dump",
+        "dump_path": input_path,
+        "index_path": base_path,
+        "delta_path": delta_path,
+        "generation": generation,
+        "index_date": index_date,
+        "systems_processed": systems_processed,
+        "systems_updated": systems_updated,
+        "systems_unchanged": systems_unchanged,
+        "stations_upserted": stations_upserted,
+        "stations_tombstoned": stations_tombstoned,
+        "overlay_systems": len(overlay),
+        "compacted": compacted,
+        "workers": worker_count,
+        "duration_sec": round(max(0.0, time.monotonic() - started_at), 3),
+    }
+    _emit_progress(
+        progress_callback,
+        100.0,
+        (
+            "Delta zastosowana: "
+            f"upsert={stations_upserted}, tombstone={stations_tombstoned}, "
+            f"generacja={generation}"
+        ),
+    )
+    return result
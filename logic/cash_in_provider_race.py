@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+from logic.utils.cancellation import CancelToken, bind_cancel_token
+from logic.utils.renata_log import log_event_throttled
+
+_TELEMETRY_LOCK = threading.Lock()
+_SOURCE_TELEMETRY: dict[str, dict[str, Any]] = {}
+_WINNER_TELEMETRY: dict[str, int] = {}
+
+
+def _empty_source_row() -> dict[str, Any]:
+    return {
+        "attempts": 0,
+        "hits": 0,
+        "errors": 0,
+        "late": 0,
+        "latency_ms_total": 0.0,
+        "latency_ms_last": 0.0,
+        "latency_ms_max": 0.0,
+    }
+
+
+def _has_rows(value: Any) -> bool:
+    if isinstance(value, tuple) and value:
+        value = value[0]
+    if isinstance(value, dict):
+        return bool(value.get("hit"))
+    return bool(value)
+
+
+def record_source_result(name: str, *, latency_ms: float, hit: bool, error: bool = False, late: bool = False) -> None:
+    key = str(name or "").strip() or "unknown"
+    with _TELEMETRY_LOCK:
+        row = _SOURCE_TELEMETRY.setdefault(key, _empty_source_row())
+        row["attempts"] += 1
+        row["hits"] += 1 if hit else 0
+        row["errors"] += 1 if error else 0
+        row["late"] += 1 if late else 0
+        row["latency_ms_total"] += float(latency_ms)
+        row["latency_ms_last"] = float(latency_ms)
+        row["latency_ms_max"] = max(float(row["latency_ms_max"]), float(latency_ms))
+
+
+def record_source_winner(source_status: str) -> None:
+    key = str(source_status or "").strip() or "none"
+    with _TELEMETRY_LOCK:
+        _WINNER_TELEMETRY[key] = int(_WINNER_TELEMETRY.get(key, 0)) + 1
+
+
+def provider_race_telemetry_snapshot() -> dict[str, Any]:
+    """Latencja i hit-rate per zrodlo oraz licznik zwyciezcow rankingu."""
+    with _TELEMETRY_LOCK:
+        sources: dict[str, Any] = {}
+        for key, row in _SOURCE_TELEMETRY.items():
+            attempts = int(row["attempts"])
+            sources[key] = {
+                "attempts": attempts,
+                "hits": int(row["hits"]),
+                "errors": int(row["errors"]),
+                "late": int(row["late"]),
+                "hit_rate": round(int(row["hits"]) / attempts, 3) if attempts else 0.0,
+                "latency_ms_avg": round(float(row["latency_ms_total"]) / attempts, 1) if attempts else 0.0,
+                "latency_ms_last": round(float(row["latency_ms_last"]), 1),
+                "latency_ms_max": round(float(row["latency_ms_max"]), 1),
+            }
+        return {"sources": sources, "winners": dict(_WINNER_TELEMETRY)}
+
+
+def _reset_provider_race_telemetry_for_tests() -> None:
+    with _TELEMETRY_LOCK:
+        _SOURCE_TELEMETRY.clear()
+        _WINNER_TELEMETRY.clear()
+
+
+class _RaceEntry:
+    __slots__ = ("name", "started", "done", "value", "error", "latency_ms", "late_callbacks")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.started = time.monotonic()
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: BaseException | None = None
+        self.latency_ms = 0.0
+        self.late_callbacks: list[Callable[[Any], None]] = []
+
+
+class ProviderRace:
+    """
+    Wyscig zrodel kandydatow cash-in pod wspolnym deadline.
+
+    Kazde zrodlo startuje od razu we wlasnym watku (daemon). wait() czeka
+    na wynik najdluzej do deadline; zrodlo, ktore nie zdazylo, konczy sie
+    w tle, a on_late() pozwala doreczyc jego wynik pozniej (np. do
+    odswiezenia panelu). Latencje i trafienia ida do telemetrii modulu.
+    Zrodla biegna z tokenem wyscigu - cancel()/cancel_after() przerywa
+    porzucone lookupy (fan-out, retry EDSM).
+    """
+
+    def __init__(self, *, deadline_s: float) -> None:
+        self.deadline = time.monotonic() + max(0.0, float(deadline_s))
+        self._entries: dict[str, _RaceEntry] = {}
+        self._lock = threading.Lock()
+        self._token = CancelToken()
+
+    def start(self, name: str, fn: Callable[[], Any]) -> None:
+        entry = _RaceEntry(name)
+        self._entries[name] = entry
+        threading.Thread(
+            target=self._run,
+            args=(entry, fn),
+            name=f"RenataCashInRace-{name}",
+            daemon=True,
+        ).start()
+
+    def _run(self, entry: _RaceEntry, fn: Callable[[], Any]) -> None:
+        try:
+            with bind_cancel_token(self._token):
+                entry.value = fn()
+        except BaseException as exc:  # noqa: BLE001 - przekazujemy do wait()
+            entry.error = exc
+        entry.latency_ms = (time.monotonic() - entry.started) * 1000.0
+        with self._lock:
+            late = time.monotonic() > self.deadline
+            entry.done.set()
+            callbacks = list(entry.late_callbacks)
+        record_source_result(
+            entry.name,
+            latency_ms=entry.latency_ms,
+            hit=entry.error is None and _has_rows(entry.value),
+            error=entry.error is not None,
+            late=late,
+        )
+        if entry.error is None:
+            for callback in callbacks:
+                self._call_late(entry, callback)
+
+    def _call_late(self, entry: _RaceEntry, callback: Callable[[Any], None]) -> None:
+        try:
+            callback(entry.value)
+        except Exception as exc:
+            log_event_throttled(
+                f"cashin.provider_race.late.{entry.name}",
+                5000,
+                "CASHIN",
+                "late provider result handler failed",
+                source=entry.name,
+                error=f"{type(exc).__name__}: {exc}",
+            )
+
+    def started(self, name: str) -> bool:
+        return name in self._entries
+
+    def wait(self, name: str, *, use_deadline: bool = True) -> tuple[bool, Any]:
+        """
+        (True, wynik) gdy zrodlo zdazylo, (False, None) po deadline.
+        Wyjatek zrodla jest podnoszony tutaj, jak przy wywolaniu wprost.
+        """
+        entry = self._entries[name]
+        timeout = max(0.0, self.deadline - time.monotonic()) if use_deadline else None
+        if not entry.done.wait(timeout):
+            return False, None
+        if entry.error is not None:
+            raise entry.error
+        return True, entry.value
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        self._token.cancel(reason)
+
+    def cancel_after(self, delay_s: float, *, reason: str = "late_window") -> None:
+        """Anuluje zrodla, ktore nie skoncza sie w delay_s (okno na spoznione wyniki)."""
+        timer = threading.Timer(max(0.0, float(delay_s)), self._token.cancel, args=(reason,))
+        timer.daemon = True
+        timer.start()
+
+    def latency_ms(self, name: str) -> float | None:
+        entry = self._entries.get(name)
+        if entry is None or not entry.done.is_set():
+            return None
+        return entry.latency_ms
+
+    def on_late(self, name: str, callback: Callable[[Any], None]) -> None:
+        """Rejestruje odbiorce spoznionego wyniku (wolany w watku zrodla)."""
+        entry = self._entries[name]
+        with self._lock:
+            if not entry.done.is_set():
+                entry.late_callbacks.append(callback)
+                return
+        if entry.error is None:
+            self._call_late(entry, callback)
@@ -5,10 +5,16 @@ import math
 import os
 import time
 from datetime import datetime, timezone
-from typing import Any, Dict, Iterable, List
+from typing import Any, Callable, Dict, Iterable, List
 
 from logic import player_local_db
+from logic.cash_in_offline_index_builder import (
+    merge_offline_index_delta,
+    offline_index_delta_path,
+)
+from logic.provider_fanout import call_rate_limited, fan_out, hedged_first
 from logic.spansh_client import client as spansh_client
+from logic.utils.bounded_cache import BoundedCache
 from logic.utils.renata_log import log_event_throttled
 from logic.utils.http_edsm import (
     edsm_nearby_systems,
@@ -16,7 +22,13 @@ from logic.utils.http_edsm import (
     edsm_station_details_for_system,
 )
 
-_OFFLINE_INDEX_CACHE: dict[str, tuple[float, float, Any]] = {}
+# path -> (version, payload). Indeksy sa duze: bez zamrazania, max 2 sciezki.
+_OFFLINE_INDEX_CACHE = BoundedCache(
+    "cash_in.offline_index",
+    ttl_sec=None,
+    max_items=2,
+    freeze_values=False,
+)
 
 
 def _reset_offline_index_cache_for_tests() -> None:
@@ -508,6 +520,41 @@ def collect_then_rank_station_candidates(
     return merge_station_candidates(aggregate, limit=limit)
 
 
+def _edsm_station_rows(system: str) -> list[Dict[str, Any] | str]:
+    try:
+        return list(edsm_station_details_for_system(system) or [])
+    except Exception:
+        log_event_throttled(
+            "cashin.providers.edsm_station_details",
+            5000,
+            "CASHIN",
+            "EDSM station details provider failed",
+            system=system,
+            level="warning",
+        )
+        return []
+
+
+def _spansh_station_rows(system: str, *, deadline: float | None = None) -> list[Dict[str, Any] | str]:
+    try:
+        rows = call_rate_limited(
+            "spansh",
+            lambda: spansh_client.stations_for_system_details(system),
+            deadline=deadline,
+        )
+        return list(rows or [])
+    except Exception:
+        log_event_throttled(
+            "cashin.providers.spansh_station_details",
+            5000,
+            "CASHIN",
+            "Spansh station details provider failed",
+            system=system,
+            level="warning",
+        )
+        return []
+
+
 def station_candidates_for_system_from_providers(
     system_name: str,
     *,
@@ -515,34 +562,35 @@ def station_candidates_for_system_from_providers(
     include_spansh: bool = True,
     freshness_ts: str = "",
     limit: int = 24,
+    hedge_after_s: float | None = None,
+    timeout_s: float | None = None,
 ) -> List[Dict[str, Any]]:
+    """
+    Stacje systemu z providerow. Domyslnie sklada EDSM + Spansh; z
+    hedge_after_s bierze pierwszy niepusty wynik (EDSM, a Spansh startuje,
+    gdy EDSM nie odpowie w hedge_after_s) w limicie timeout_s.
+    """
     system = _as_text(system_name)
     if not system:
         return []
 
+    deadline = None if timeout_s is None else time.monotonic() + max(0.0, float(timeout_s))
     rows: List[Dict[str, Any] | str] = []
-    if include_edsm:
-        try:
-            rows.extend(edsm_station_details_for_system(system) or [])
-        except Exception:
-            log_event_throttled(
-                "cashin.providers.edsm_station_details",
-                5000,
-                "CASHIN",
-                "EDSM station details provider failed",
-                system=system,
-            )
-    if include_spansh:
-        try:
-            rows.extend(spansh_client.stations_for_system_details(system) or [])
-        except Exception:
-            log_event_throttled(
-                "cashin.providers.spansh_station_details",
-                5000,
-                "CASHIN",
-                "Spansh station details provider failed",
-                system=system,
-            )
+    if hedge_after_s is not None and include_edsm and include_spansh:
+        _winner, hedged_rows = hedged_first(
+            [
+                ("edsm", lambda: _edsm_station_rows(system)),
+                ("spansh", lambda: _spansh_station_rows(system, deadline=deadline)),
+            ],
+            hedge_after_s=float(hedge_after_s),
+            timeout_s=timeout_s,
+        )
+        rows.extend(hedged_rows or [])
+    else:
+        if include_edsm:
+            rows.extend(_edsm_station_rows(system))
+        if include_spansh:
+            rows.extend(_spansh_station_rows(system, deadline=deadline))
     return build_station_candidates(
         rows,
         default_system=system,
@@ -562,11 +610,19 @@ def station_candidates_cross_system_from_providers(
     origin_coords: list[float] | tuple[float, float, float] | None = None,
     freshness_ts: str = "",
     limit: int = 24,
+    max_workers: int = 4,
+    deadline_s: float | None = 8.0,
+    hedge_after_s: float | None = 0.8,
+    request_timeout_s: float | None = 4.0,
+    on_partial: Callable[[List[Dict[str, Any]], Dict[str, Any]], None] | None = None,
 ) -> tuple[List[Dict[str, Any]], Dict[str, Any]]:
     """
     Cross-system discovery:
     - znajduje sasiednie systemy (origin-centered),
-    - pobiera szczegoly stacji per system,
+    - pobiera szczegoly stacji per system rownolegle (ograniczona pula,
+      wspolny limiter per provider, hedging Spansh vs EDSM),
+    - konczy po deadline albo po zebraniu limit*3 kandydatow,
+    - on_partial dostaje scalona liste po kazdym systemie z wynikami,
     - zwraca zunifikowane `StationCandidate` gotowe do rankingu.
     """
     origin = _as_text(origin_system)
@@ -620,6 +676,7 @@ def station_candidates_cross_system_from_providers(
                 origin=origin,
                 radius_ly=radius_ly,
                 max_systems=max_systems,
+                level="warning",
             )
             nearby_rows = []
 
@@ -654,23 +711,35 @@ def station_candidates_cross_system_from_providers(
 
     aggregate: list[dict[str, Any]] = []
     systems_with_candidates = 0
-    for row in systems:
-        system_name = _as_text(row.get("system_name"))
-        if not system_name:
-            continue
+    stop_at = int(limit) * 3 if limit > 0 else 0
+    started = time.monotonic()
+    first_result_ms: float | None = None
+    partial_updates = 0
+    origin_distances = {
+        _as_text(row.get("system_name")): _safe_optional_float(row.get("distance_ly"))
+        for row in systems
+    }
+
+    def _lookup(system_name: str) -> List[Dict[str, Any]]:
         per_system = station_candidates_for_system_from_providers(
             system_name,
             include_edsm=include_edsm,
             include_spansh=include_spansh,
             freshness_ts=freshness_ts,
             limit=max(8, int(limit or 24)),
+            hedge_after_s=hedge_after_s,
+            timeout_s=request_timeout_s,
         )
         if svc in {"uc", "vista"}:
             per_system = filter_candidates_by_service(per_system, service=svc)
+        return per_system
+
+    def _on_result(system_name: str, per_system: Any) -> None:
+        nonlocal systems_with_candidates, first_result_ms, partial_updates
         if not per_system:
-            continue
+            return
         systems_with_candidates += 1
-        origin_distance = _safe_optional_float(row.get("distance_ly"))
+        origin_distance = origin_distances.get(system_name)
         for candidate in per_system:
             if not isinstance(candidate, dict):
                 continue
@@ -684,8 +753,37 @@ def station_candidates_cross_system_from_providers(
                 else:
                     out["distance_ly"] = min(float(current_distance), float(origin_distance))
             aggregate.append(out)
-        if limit > 0 and len(aggregate) >= (int(limit) * 3):
-            break
+        if first_result_ms is None:
+            first_result_ms = (time.monotonic() - started) * 1000.0
+        if on_partial is not None:
+            partial_updates += 1
+            try:
+                on_partial(
+                    merge_station_candidates(aggregate, limit=limit),
+                    {
+                        "systems_requested": len(systems),
+                        "systems_with_candidates": systems_with_candidates,
+                        "partial": True,
+                    },
+                )
+            except Exception:
+                log_event_throttled(
+                    "cashin.providers.cross_system_partial",
+                    5000,
+                    "CASHIN",
+                    "cross-system partial callback failed",
+                    origin=origin,
+                    level="warning",
+                )
+
+    system_names = [_as_text(row.get("system_name")) for row in systems if _as_text(row.get("system_name"))]
+    fan_stats = fan_out(
+        [(name, (lambda name=name: _lookup(name))) for name in system_names],
+        max_workers=max(1, min(int(max_workers or 1), len(system_names) or 1)),
+        deadline_s=deadline_s,
+        on_result=_on_result,
+        should_stop=(lambda: stop_at > 0 and len(aggregate) >= stop_at),
+    )
 
     candidates = merge_station_candidates(aggregate, limit=limit)
     meta = {
@@ -698,10 +796,19 @@ def station_candidates_cross_system_from_providers(
         "nearby_effective_radius_ly": float(nearby_effective_radius_ly),
         "nearby_provider_response_count": int(nearby_provider_response_count),
         "nearby_reason": nearby_reason,
+        "fanout_workers": int(max_workers or 1),
+        "fanout_stop_reason": _as_text(fan_stats.get("stop_reason")),
+        "fanout_systems_completed": int(fan_stats.get("completed") or 0),
+        "fanout_systems_cancelled": int(fan_stats.get("cancelled") or 0),
+        "fanout_first_result_ms": int(round(first_result_ms)) if first_result_ms is not None else -1,
+        "fanout_elapsed_ms": int(round((time.monotonic() - started) * 1000.0)),
+        "fanout_partial_updates": int(partial_updates),
     }
     return candidates, meta
 
 
+
+
 def station_candidates_from_playerdb(
     origin_system: str,
     *,
@@ -850,11 +957,18 @@ def _load_offline_index_payload(index_path: str) -> tuple[Any | None, str]:
         mtime = float(os.path.getmtime(path))
     except Exception:
         mtime = 0.0
+    delta_path = offline_index_delta_path(path)
+    try:
+        delta_mtime = float(os.path.getmtime(delta_path)) if os.path.isfile(delta_path) else 0.0
+    except Exception:
+        delta_mtime = 0.0
+    # Klucz cache obejmuje generacje delty: nowa nakladka = jeden reload.
+    version = (mtime, delta_mtime)
 
     cached = _OFFLINE_INDEX_CACHE.get(path)
-    if isinstance(cached, tuple) and len(cached) == 3:
-        cached_mtime, _cached_loaded_at, cached_payload = cached
-        if abs(float(cached_mtime) - mtime) < 1e-9:
+    if isinstance(cached, tuple) and len(cached) == 2:
+        cached_version, cached_payload = cached
+        if cached_version == version:
             return cached_payload, "ok_cache"
 
     try:
@@ -863,7 +977,21 @@ def _load_offline_index_payload(index_path: str) -> tuple[Any | None, str]:
     except Exception:
         return None, "load_error"
 
-    _OFFLINE_INDEX_CACHE[path] = (mtime, time.monotonic(), payload)
+    if delta_mtime:
+        try:
+            with open(delta_path, "r", encoding="utf-8") as handle:
+                payload = merge_offline_index_delta(payload, json.load(handle))
+        except Exception as exc:
+            log_event_throttled(
+                "cash_in.offline_index.delta_load",
+                5000,
+                "WARN",
+                "Offline index: delta overlay ignored",
+                path=delta_path,
+                error=f"{type(exc).__name__}: {exc}",
+            )
+
+    _OFFLINE_INDEX_CACHE.set(path, (version, payload))
     return payload, "ok"
 
 
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import copy
+import hashlib
 import json
 import math
 import os
@@ -13,6 +14,22 @@ from logic.utils.renata_log import log_event_throttled
 STATE_SCHEMA_VERSION = 1
 STATE_LAYER_KEYS = ("ui_state", "preferences", "domain_state", "anti_spam_state")
 
+# Segmenty stanu: kazda domena ma wlasny plik obok app_state.json, a plik bazowy
+# trzyma juz tylko "core" (ui_state + preferences). Dzieki temu zapis okna
+# debouncera nie przepisuje calego kontraktu.
+STATE_SEGMENT_SCHEMA_VERSION = 1
+STATE_CORE_SEGMENT = "core"
+STATE_SEGMENT_DOMAINS = ("anti_spam", "exobio", "route_milestones", "smuggler", "jackpot", "runtime")
+STATE_RUNTIME_SEGMENT = "runtime"
+_ANTI_SPAM_SECTION_DOMAINS: Dict[str, str] = {
+    "exobio": "exobio",
+    "route_milestone_progress_cache": "route_milestones",
+    "smuggler_warned_targets": "smuggler",
+    "trade_jackpot_cache": "jackpot",
+}
+_ANTI_SPAM_DEFAULT_DOMAIN = "anti_spam"
+_MONOLITH_BACKUP_SUFFIX = ".monolith.bak"
+
 
 # Legacy runtime defaults used by config.STATE.
 LEGACY_DOMAIN_STATE_DEFAULTS: Dict[str, Any] = {
@@ -267,29 +284,82 @@ def contract_with_runtime_state(base_contract: Any, runtime_state: Dict[str, Any
     return contract
 
 
-def load_state_contract_file(path: str) -> Dict[str, Any]:
-    if not path:
-        return default_state_contract()
-    try:
-        with open(path, "r", encoding="utf-8") as handle:
-            payload = json.load(handle)
-    except Exception:
-        log_event_throttled(
-            "state_contract.load_fallback_default",
-            5000,
-            "STATE",
-            "State contract load failed; using default contract",
-            path=path,
-        )
-        return default_state_contract()
-    return migrate_state_contract_payload(payload)
+def anti_spam_section_domain(section: str) -> str:
+    return _ANTI_SPAM_SECTION_DOMAINS.get(str(section or ""), _ANTI_SPAM_DEFAULT_DOMAIN)
 
 
-def save_state_contract_file(path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+def anti_spam_domains() -> tuple[str, ...]:
+    return tuple(domain for domain in STATE_SEGMENT_DOMAINS if domain != STATE_RUNTIME_SEGMENT)
+
+
+def normalize_runtime_domain_state(payload: Any) -> Dict[str, Any]:
+    return _merge_runtime_defaults(_sanitize_layer(payload))
+
+
+def sanitize_state_layer(payload: Any) -> Dict[str, Any]:
+    return _sanitize_layer(payload)
+
+
+def state_segments_dir(path: str) -> str:
+    root, _ext = os.path.splitext(str(path or ""))
+    return f"{root}.segments"
+
+
+def state_segment_path(path: str, domain: str) -> str:
+    if domain == STATE_CORE_SEGMENT:
+        return str(path or "")
+    return os.path.join(state_segments_dir(path), f"{domain}.json")
+
+
+def split_state_contract(payload: Any) -> Dict[str, Dict[str, Any]]:
+    """
+    Rozbija znormalizowany kontrakt na segmenty {domena: payload}.
+    """
     contract = migrate_state_contract_payload(payload)
-    if not path:
-        return contract
+    segments: Dict[str, Dict[str, Any]] = {
+        STATE_CORE_SEGMENT: {
+            "ui_state": contract["ui_state"],
+            "preferences": contract["preferences"],
+        },
+        STATE_RUNTIME_SEGMENT: contract["domain_state"],
+    }
+    for domain in anti_spam_domains():
+        segments[domain] = {}
+    for section, value in contract["anti_spam_state"].items():
+        segments[anti_spam_section_domain(section)][section] = value
+    return segments
+
+
+def assemble_state_contract(segments: Dict[str, Any]) -> Dict[str, Any]:
+    core = segments.get(STATE_CORE_SEGMENT)
+    core = core if isinstance(core, dict) else {}
+    anti_spam: Dict[str, Any] = {}
+    for domain in anti_spam_domains():
+        payload = segments.get(domain)
+        if isinstance(payload, dict):
+            anti_spam.update(payload)
+    runtime = segments.get(STATE_RUNTIME_SEGMENT)
+    return migrate_state_contract_payload(
+        {
+            "schema_version": STATE_SCHEMA_VERSION,
+            "ui_state": core.get("ui_state", {}),
+            "preferences": core.get("preferences", {}),
+            "domain_state": runtime if isinstance(runtime, dict) else {},
+            "anti_spam_state": anti_spam,
+        }
+    )
+
+
+def encode_state_segment(payload: Dict[str, Any]) -> tuple[str, str]:
+    """
+    Kanoniczny JSON segmentu + jego hash (sha1). Hash sluzy i do wykrywania
+    "nic sie nie zmienilo", i do weryfikacji pliku przy odczycie.
+    """
+    text = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return text, hashlib.sha1(text.encode("utf-8")).hexdigest()
+
 
+def _atomic_write_text(path: str, text: str, *, fsync: bool = False) -> int:
     directory = os.path.dirname(path)
     if directory:
         os.makedirs(directory, exist_ok=True)
@@ -302,7 +372,10 @@ def save_state_contract_file(path: str, payload: Dict[str, Any]) -> Dict[str, An
     )
     try:
         with os.fdopen(fd, "w", encoding="utf-8") as handle:
-            json.dump(contract, handle, indent=2, ensure_ascii=False)
+            handle.write(text)
+            if fsync:
+                handle.flush()
+                os.fsync(handle.fileno())
 
         last_error: Exception | None = None
         for attempt in range(3):
@@ -328,5 +401,167 @@ def save_state_contract_file(path: str, payload: Dict[str, Any]) -> Dict[str, An
                     "STATE",
                     "State contract temp file cleanup failed",
                     tmp_path=tmp_path,
+                    level="warning",
                 )
+    return len(text.encode("utf-8"))
+
+
+def write_state_segment_file(path: str, domain: str, text: str, digest: str) -> int:
+    """
+    Atomowy zapis jednego segmentu (tmp + fsync + rename). Zwraca liczbe bajtow.
+    """
+    if domain == STATE_CORE_SEGMENT:
+        core = json.loads(text) if text else {}
+        body = {
+            "schema_version": STATE_SCHEMA_VERSION,
+            "ui_state": core.get("ui_state", {}),
+            "preferences": core.get("preferences", {}),
+            "segments": list(STATE_SEGMENT_DOMAINS),
+        }
+        return _atomic_write_text(path, json.dumps(body, indent=2, ensure_ascii=False), fsync=True)
+    envelope = (
+        f'{{"schema_version":{STATE_SEGMENT_SCHEMA_VERSION},"domain":{json.dumps(domain)},'
+        f'"sha1":"{digest}","payload":{text}}}'
+    )
+    return _atomic_write_text(state_segment_path(path, domain), envelope, fsync=True)
+
+
+def read_state_segment_file(path: str, domain: str) -> Dict[str, Any] | None:
+    """
+    Czyta segment domeny. None = brak pliku; uszkodzony plik (zla suma, urwany
+    JSON) jest logowany i traktowany jak pusty segment.
+    """
+    segment_path = state_segment_path(path, domain)
+    if not segment_path or not os.path.isfile(segment_path):
+        return None
+    try:
+        with open(segment_path, "r", encoding="utf-8") as handle:
+            envelope = json.load(handle)
+        payload = envelope.get("payload") if isinstance(envelope, dict) else None
+        if not isinstance(payload, dict):
+            raise ValueError("segment payload is not an object")
+        if encode_state_segment(payload)[1] != str(envelope.get("sha1") or ""):
+            raise ValueError("segment checksum mismatch")
+    except Exception:
+        log_event_throttled(
+            f"state_contract.segment_load_fallback.{domain}",
+            5000,
+            "STATE",
+            "State segment load failed; using empty segment",
+            path=segment_path,
+            domain=domain,
+            level="warning",
+        )
+        return {}
+    return _sanitize_layer(payload)
+
+
+def read_state_core_file(path: str) -> Dict[str, Any] | None:
+    if not path or not os.path.isfile(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            payload = json.load(handle)
+        if not isinstance(payload, dict):
+            raise ValueError("core payload is not an object")
+    except Exception:
+        log_event_throttled(
+            "state_contract.core_load_fallback",
+            5000,
+            "STATE",
+            "State core load failed; using defaults",
+            path=path,
+            level="warning",
+        )
+        return {}
+    return {
+        "ui_state": _sanitize_layer(payload.get("ui_state")),
+        "preferences": _sanitize_layer(payload.get("preferences")),
+    }
+
+
+def _is_monolithic_state_payload(payload: Any) -> bool:
+    if not isinstance(payload, dict):
+        return False
+    return ("domain_state" in payload) or ("anti_spam_state" in payload) or not _is_state_contract_payload(payload)
+
+
+def split_monolithic_state_file(path: str) -> bool:
+    """
+    Jednorazowa migracja: stary, monolityczny app_state.json -> segmenty.
+    Oryginal zostaje jako <plik>.monolith.bak; po migracji plik bazowy trzyma
+    tylko core. Zwraca True, gdy cos zostalo rozbite.
+    """
+    if not path or not os.path.isfile(path):
+        return False
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            raw_text = handle.read()
+        payload = json.loads(raw_text)
+    except Exception:
+        return False
+    if not _is_monolithic_state_payload(payload):
+        return False
+
+    backup_path = f"{path}{_MONOLITH_BACKUP_SUFFIX}"
+    if not os.path.exists(backup_path):
+        _atomic_write_text(backup_path, raw_text)
+    segments = split_state_contract(payload)
+    # Najpierw domeny, na koncu core: przerwana migracja zostawia monolit,
+    # ktory przy nastepnym starcie zostanie rozbity jeszcze raz.
+    for domain in STATE_SEGMENT_DOMAINS:
+        write_state_segment_file(path, domain, *encode_state_segment(segments[domain]))
+    write_state_segment_file(path, STATE_CORE_SEGMENT, *encode_state_segment(segments[STATE_CORE_SEGMENT]))
+    log_event_throttled(
+        "state_contract.monolith_split",
+        5000,
+        "STATE",
+        "State contract split into per-domain segments",
+        path=path,
+        backup_path=backup_path,
+    )
+    return True
+
+
+def load_state_contract_file(path: str) -> Dict[str, Any]:
+    if not path:
+        return default_state_contract()
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            payload = json.load(handle)
+    except Exception:
+        log_event_throttled(
+            "state_contract.load_fallback_default",
+            5000,
+            "STATE",
+            "State contract load failed; using default contract",
+            path=path,
+            level="warning",
+        )
+        payload = None
+    # Monolit (stary format) jest nowszy niz ewentualne segmenty obok niego.
+    if payload is not None and _is_monolithic_state_payload(payload):
+        return migrate_state_contract_payload(payload)
+
+    segments: Dict[str, Any] = {}
+    if isinstance(payload, dict):
+        segments[STATE_CORE_SEGMENT] = payload
+    for domain in STATE_SEGMENT_DOMAINS:
+        segment = read_state_segment_file(path, domain)
+        if segment is not None:
+            segments[domain] = segment
+    if not segments:
+        return default_state_contract()
+    return assemble_state_contract(segments)
+
+
+def save_state_contract_file(path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    contract = migrate_state_contract_payload(payload)
+    if not path:
+        return contract
+
+    segments = split_state_contract(contract)
+    for domain in STATE_SEGMENT_DOMAINS:
+        write_state_segment_file(path, domain, *encode_state_segment(segments[domain]))
+    write_state_segment_file(path, STATE_CORE_SEGMENT, *encode_state_segment(segments[STATE_CORE_SEGMENT]))
     return contract
@@ -10,6 +10,7 @@ import config
 from logic.utils.renata_log import log_event_throttled
 
 ENTRY_SCHEMA_VERSION = 1
+_TEXT_GRAM_SIZE = 3
 
 _SOURCE_KINDS = {"manual", "journal_event", "stt"}
 _LOCATION_KEYS = {
@@ -202,18 +203,74 @@ def normalize_entry(entry: dict[str, Any], *, now_iso: str | None = None) -> dic
     return result
 
 
+def _iso_epoch(value: Any) -> float:
+    return _parse_iso(str(value)).timestamp()
+
+
+def _text_haystack(entry: dict[str, Any]) -> str:
+    location = entry.get("location") or {}
+    return " ".join(
+        [
+            str(entry.get("title") or ""),
+            str(entry.get("body") or ""),
+            " ".join(entry.get("tags") or []),
+            str(location.get("system_name") or ""),
+            str(location.get("station_name") or ""),
+            str(location.get("body_name") or ""),
+        ]
+    ).lower()
+
+
+def _text_grams(text: str) -> set[str]:
+    if len(text) < _TEXT_GRAM_SIZE:
+        return set()
+    return {text[idx : idx + _TEXT_GRAM_SIZE] for idx in range(len(text) - _TEXT_GRAM_SIZE + 1)}
+
+
+class _EntryIndexRow:
+    """Dane pomocnicze wpisu liczone raz przy zapisie, nie przy kazdym zapytaniu."""
+
+    __slots__ = ("seq", "created_ts", "updated_ts", "haystack", "grams")
+
+    def __init__(self, seq: int, entry: dict[str, Any]) -> None:
+        self.seq = seq
+        self.created_ts = _iso_epoch(entry.get("created_at"))
+        self.updated_ts = _iso_epoch(entry.get("updated_at"))
+        self.haystack = _text_haystack(entry)
+        self.grams = _text_grams(self.haystack)
+
+
 class EntryRepository:
     """
     Local offline-first repository for Entry records.
-    Storage backend: JSONL.
+    Storage backend: JSONL snapshot + append-only change log.
+
+    Zapytania ida przez indeksy pomocnicze (tagi, kategorie, system,
+    przypiete, trigramy tekstu); kopiowana jest tylko zwracana strona.
+    Zmiany dopisujemy do `<path>.changes.jsonl`, a snapshot przepisujemy
+    dopiero przy kompaktowaniu.
     """
 
+    COMPACT_MIN_CHANGES = 200
+
     def __init__(self, path: str | None = None) -> None:
         self.path = str(path or config.renata_user_home_file("user_entries.jsonl"))
-        self._entries: list[dict[str, Any]] = []
-        self._index: dict[str, dict[str, Any]] = {}
+        self.changes_path = f"{self.path}.changes.jsonl"
+        self._entries: dict[str, dict[str, Any]] = {}
+        self._rows: dict[str, _EntryIndexRow] = {}
+        self._next_seq = 0
+        self._by_tag: dict[str, set[str]] = {}
+        self._by_category: dict[str, set[str]] = {}
+        self._by_system: dict[str, set[str]] = {}
+        self._pinned: set[str] = set()
+        self._by_gram: dict[str, set[str]] = {}
+        self._pending_changes = 0
         self._load()
 
+    # ------------------------------------------------------------------ #
+    # Ladowanie / zapis
+    # ------------------------------------------------------------------ #
+
     def _load(self) -> None:
         directory = os.path.dirname(os.path.abspath(self.path))
         if directory and not os.path.isdir(directory):
@@ -221,11 +278,7 @@ class EntryRepository:
         if not os.path.exists(self.path):
             with open(self.path, "w", encoding="utf-8"):
                 pass
-            self._entries = []
-            self._index = {}
-            return
 
-        loaded: list[dict[str, Any]] = []
         seen_ids: set[str] = set()
         with open(self.path, "r", encoding="utf-8") as handle:
             for line in handle:
@@ -241,20 +294,49 @@ class EntryRepository:
                 if entry_id in seen_ids:
                     raise EntryValidationError(f"duplicate entry id in repository: {entry_id}")
                 seen_ids.add(entry_id)
-                loaded.append(normalized)
+                self._index_put(normalized)
 
-        self._entries = loaded
-        self._rebuild_index()
+        self._replay_changes()
+        if self._pending_changes >= max(self.COMPACT_MIN_CHANGES, len(self._entries) // 2):
+            self.compact()
 
-    def _rebuild_index(self) -> None:
-        self._index = {str(item["id"]): item for item in self._entries}
+    def _replay_changes(self) -> None:
+        if not os.path.exists(self.changes_path):
+            return
+        replayed = 0
+        with open(self.changes_path, "r", encoding="utf-8") as handle:
+            for line in handle:
+                raw = line.strip()
+                if not raw:
+                    continue
+                try:
+                    record = json.loads(raw)
+                except Exception:
+                    # Urwana ostatnia linia po awarii - poprzednie zmiany zostaja.
+                    log_event_throttled(
+                        "entry_repo.changes.invalid_line",
+                        5000,
+                        "WARN",
+                        "Entry repository: skipped invalid change-log line",
+                        path=self.changes_path,
+                    )
+                    continue
+                op = str((record or {}).get("op") or "")
+                if op == "upsert" and isinstance(record.get("entry"), dict):
+                    self._index_put(normalize_entry(record["entry"]))
+                elif op == "delete":
+                    self._index_drop(str(record.get("id") or ""))
+                else:
+                    continue
+                replayed += 1
+        self._pending_changes = replayed
 
     def _persist(self) -> None:
         directory = os.path.dirname(os.path.abspath(self.path)) or "."
         fd, temp_path = tempfile.mkstemp(prefix="entries_", suffix=".jsonl.tmp", dir=directory)
         try:
             with os.fdopen(fd, "w", encoding="utf-8") as handle:
-                for item in self._entries:
+                for item in self._ordered_entries():
                     handle.write(json.dumps(item, ensure_ascii=False) + "\n")
             os.replace(temp_path, self.path)
         finally:
@@ -271,11 +353,97 @@ class EntryRepository:
                         error=f"{type(exc).__name__}: {exc}",
                     )
 
+    def compact(self) -> None:
+        """Przepisuje snapshot i czysci change log."""
+        self._persist()
+        try:
+            with open(self.changes_path, "w", encoding="utf-8"):
+                pass
+        except OSError as exc:
+            log_event_throttled(
+                "entry_repo.compact.truncate",
+                5000,
+                "WARN",
+                "Entry repository: failed to truncate change log after compaction",
+                path=self.changes_path,
+                error=f"{type(exc).__name__}: {exc}",
+            )
+            return
+        self._pending_changes = 0
+
+    def _append_change(self, record: dict[str, Any]) -> None:
+        with open(self.changes_path, "a", encoding="utf-8") as handle:
+            handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._pending_changes += 1
+        if self._pending_changes >= max(self.COMPACT_MIN_CHANGES, len(self._entries) // 2):
+            self.compact()
+
+    # ------------------------------------------------------------------ #
+    # Indeksy
+    # ------------------------------------------------------------------ #
+
+    def _index_put(self, entry: dict[str, Any]) -> None:
+        entry_id = str(entry["id"])
+        previous = self._rows.get(entry_id)
+        if previous is not None:
+            seq = previous.seq
+            self._index_drop(entry_id)
+        else:
+            seq = self._next_seq
+            self._next_seq += 1
+        row = _EntryIndexRow(seq, entry)
+        self._entries[entry_id] = entry
+        self._rows[entry_id] = row
+        for tag in entry.get("tags") or []:
+            self._by_tag.setdefault(str(tag), set()).add(entry_id)
+        self._by_category.setdefault(str(entry.get("category_path") or ""), set()).add(entry_id)
+        system_name = str((entry.get("location") or {}).get("system_name") or "").lower()
+        if system_name:
+            self._by_system.setdefault(system_name, set()).add(entry_id)
+        if entry.get("is_pinned"):
+            self._pinned.add(entry_id)
+        for gram in row.grams:
+            self._by_gram.setdefault(gram, set()).add(entry_id)
+
+    def _index_drop(self, entry_id: str) -> dict[str, Any] | None:
+        entry = self._entries.pop(entry_id, None)
+        row = self._rows.pop(entry_id, None)
+        if entry is None or row is None:
+            return None
+
+        def _discard(index: dict[str, set[str]], key: str) -> None:
+            bucket = index.get(key)
+            if bucket is None:
+                return
+            bucket.discard(entry_id)
+            if not bucket:
+                index.pop(key, None)
+
+        for tag in entry.get("tags") or []:
+            _discard(self._by_tag, str(tag))
+        _discard(self._by_category, str(entry.get("category_path") or ""))
+        _discard(self._by_system, str((entry.get("location") or {}).get("system_name") or "").lower())
+        self._pinned.discard(entry_id)
+        for gram in row.grams:
+            _discard(self._by_gram, gram)
+        return entry
+
+    def _ordered_entries(self) -> list[dict[str, Any]]:
+        return [self._entries[entry_id] for entry_id in self._ordered_ids(self._entries.keys())]
+
+    def _ordered_ids(self, ids) -> list[str]:
+        rows = self._rows
+        return sorted(ids, key=lambda entry_id: rows[entry_id].seq)
+
     def _clone(self, entry: dict[str, Any]) -> dict[str, Any]:
         return copy.deepcopy(entry)
 
+    # ------------------------------------------------------------------ #
+    # CRUD
+    # ------------------------------------------------------------------ #
+
     def get_entry(self, entry_id: str) -> dict[str, Any] | None:
-        found = self._index.get(str(entry_id))
+        found = self._entries.get(str(entry_id))
         return self._clone(found) if found else None
 
     def create_entry(self, entry: dict[str, Any]) -> dict[str, Any]:
@@ -288,16 +456,15 @@ class EntryRepository:
         normalized = normalize_entry(payload, now_iso=now_iso)
 
         entry_id = str(normalized["id"])
-        if entry_id in self._index:
+        if entry_id in self._entries:
             raise EntryValidationError(f"entry id already exists: {entry_id}")
 
-        self._entries.append(normalized)
-        self._rebuild_index()
-        self._persist()
+        self._index_put(normalized)
+        self._append_change({"op": "upsert", "entry": normalized})
         return self._clone(normalized)
 
     def update_entry(self, entry_id: str, patch: dict[str, Any]) -> dict[str, Any]:
-        current = self._index.get(str(entry_id))
+        current = self._entries.get(str(entry_id))
         if current is None:
             raise KeyError(f"entry not found: {entry_id}")
         if not isinstance(patch, dict):
@@ -317,23 +484,17 @@ class EntryRepository:
         merged["updated_at"] = _now_iso()
         normalized = normalize_entry(merged)
 
-        for idx, item in enumerate(self._entries):
-            if str(item["id"]) == str(entry_id):
-                self._entries[idx] = normalized
-                break
-        self._rebuild_index()
-        self._persist()
+        self._index_put(normalized)
+        self._append_change({"op": "upsert", "entry": normalized})
         return self._clone(normalized)
 
     def delete_entry(self, entry_id: str) -> dict[str, Any]:
         entry_key = str(entry_id)
-        for idx, item in enumerate(self._entries):
-            if str(item["id"]) == entry_key:
-                deleted = self._entries.pop(idx)
-                self._rebuild_index()
-                self._persist()
-                return self._clone(deleted)
-        raise KeyError(f"entry not found: {entry_id}")
+        deleted = self._index_drop(entry_key)
+        if deleted is None:
+            raise KeyError(f"entry not found: {entry_id}")
+        self._append_change({"op": "delete", "id": entry_key})
+        return self._clone(deleted)
 
     def pin_entry(self, entry_id: str, pinned: bool) -> dict[str, Any]:
         if pinned:
@@ -341,7 +502,7 @@ class EntryRepository:
         return self.update_entry(entry_id, {"is_pinned": False, "pinned_at": None})
 
     def add_tags(self, entry_id: str, tags: list[str]) -> dict[str, Any]:
-        current = self._index.get(str(entry_id))
+        current = self._entries.get(str(entry_id))
         if current is None:
             raise KeyError(f"entry not found: {entry_id}")
         merged = set(_normalize_tags(current.get("tags")))
@@ -349,7 +510,7 @@ class EntryRepository:
         return self.update_entry(entry_id, {"tags": sorted(merged)})
 
     def remove_tags(self, entry_id: str, tags: list[str]) -> dict[str, Any]:
-        current = self._index.get(str(entry_id))
+        current = self._entries.get(str(entry_id))
         if current is None:
             raise KeyError(f"entry not found: {entry_id}")
         drop = set(_normalize_tags(tags))
@@ -398,6 +559,12 @@ class EntryRepository:
         }
         return self.create_entry(payload)
 
+    def category_counts(self) -> dict[str, int]:
+        return {category: len(ids) for category, ids in self._by_category.items() if category}
+
+    def count_entries(self) -> int:
+        return len(self._entries)
+
     def list_entries(
         self,
         filters: dict[str, Any] | None = None,
@@ -405,19 +572,20 @@ class EntryRepository:
         limit: int | None = None,
         offset: int = 0,
     ) -> list[dict[str, Any]]:
-        items = [self._clone(item) for item in self._entries]
-        filtered = self._apply_filters(items, filters or {})
-        sorted_items = self._apply_sort(filtered, sort)
+        matched = self._query_ids(filters or {})
+        sorted_ids = self._sort_ids(matched, sort)
 
         start = max(0, int(offset or 0))
         if limit is None:
-            return sorted_items[start:]
-        size = max(0, int(limit))
-        return sorted_items[start:start + size]
+            page = sorted_ids[start:]
+        else:
+            size = max(0, int(limit))
+            page = sorted_ids[start:start + size]
+        return [self._clone(self._entries[entry_id]) for entry_id in page]
 
-    def _apply_filters(self, items: list[dict[str, Any]], filters: dict[str, Any]) -> list[dict[str, Any]]:
+    def _query_ids(self, filters: dict[str, Any]) -> list[str]:
         if not filters:
-            return items
+            return self._ordered_ids(self._entries.keys())
 
         text = _normalize_optional_text(filters.get("text"))
         tags = _normalize_tags(filters.get("tags")) if "tags" in filters else []
@@ -435,34 +603,49 @@ class EntryRepository:
 
         date_from = filters.get("date_from")
         date_to = filters.get("date_to")
-        dt_from = _parse_iso(str(date_from)) if date_from else None
-        dt_to = _parse_iso(str(date_to)) if date_to else None
-
-        out: list[dict[str, Any]] = []
-        for item in items:
-            if text:
-                hay = " ".join(
-                    [
-                        str(item.get("title") or ""),
-                        str(item.get("body") or ""),
-                        " ".join(item.get("tags") or []),
-                        str((item.get("location") or {}).get("system_name") or ""),
-                        str((item.get("location") or {}).get("station_name") or ""),
-                        str((item.get("location") or {}).get("body_name") or ""),
-                    ]
-                ).lower()
-                if text.lower() not in hay:
-                    continue
-
-            if tags:
-                item_tags = set(_normalize_tags(item.get("tags")))
-                if tags_mode == "any":
-                    if not set(tags).intersection(item_tags):
-                        continue
-                else:
-                    if not set(tags).issubset(item_tags):
-                        continue
-
+        ts_from = _iso_epoch(date_from) if date_from else None
+        ts_to = _iso_epoch(date_to) if date_to else None
+        needle = text.lower() if text else ""
+
+        # Plan: zawezamy kandydatow indeksami, reszte predykatow sprawdzamy
+        # na oryginalnych slownikach (bez kopiowania).
+        candidates: set[str] | None = None
+
+        def _narrow(ids: set[str]) -> None:
+            nonlocal candidates
+            candidates = set(ids) if candidates is None else candidates & ids
+
+        if tags:
+            buckets = [self._by_tag.get(tag, set()) for tag in tags]
+            if tags_mode == "any":
+                _narrow(set().union(*buckets))
+            else:
+                for bucket in sorted(buckets, key=len):
+                    _narrow(bucket)
+        if pinned is True:
+            _narrow(self._pinned)
+        if has_system is True:
+            _narrow(set().union(*self._by_system.values()) if self._by_system else set())
+        if category_prefix:
+            _narrow(
+                set().union(
+                    *(ids for category, ids in self._by_category.items() if category.startswith(category_prefix))
+                )
+            )
+        if needle:
+            grams = _text_grams(needle)
+            for gram in sorted(grams, key=lambda g: len(self._by_gram.get(g, ()))):
+                _narrow(self._by_gram.get(gram, set()))
+                if not candidates:
+                    break
+
+        pool = self._entries.keys() if candidates is None else candidates
+        out: list[str] = []
+        for entry_id in pool:
+            item = self._entries[entry_id]
+            row = self._rows[entry_id]
+            if needle and needle not in row.haystack:
+                continue
             if entry_type and str(item.get("entry_type") or "").lower() != entry_type.lower():
                 continue
             if source_kind and str((item.get("source") or {}).get("kind") or "").lower() != source_kind.lower():
@@ -471,8 +654,6 @@ class EntryRepository:
                 continue
 
             loc = item.get("location") or {}
-            if has_system is True and not loc.get("system_name"):
-                continue
             if has_system is False and loc.get("system_name"):
                 continue
             if has_station is True and not loc.get("station_name"):
@@ -489,22 +670,18 @@ class EntryRepository:
             if has_coords is False and (loc.get("coords_lat") is not None and loc.get("coords_lon") is not None):
                 continue
 
-            if pinned is True and not bool(item.get("is_pinned")):
-                continue
             if pinned is False and bool(item.get("is_pinned")):
                 continue
 
-            if dt_from or dt_to:
-                created = _parse_iso(str(item.get("created_at")))
-                if dt_from and created < dt_from:
-                    continue
-                if dt_to and created > dt_to:
-                    continue
+            if ts_from is not None and row.created_ts < ts_from:
+                continue
+            if ts_to is not None and row.created_ts > ts_to:
+                continue
 
-            out.append(item)
-        return out
+            out.append(entry_id)
+        return self._ordered_ids(out)
 
-    def _apply_sort(self, items: list[dict[str, Any]], sort: dict[str, Any] | str | None) -> list[dict[str, Any]]:
+    def _sort_ids(self, ids: list[str], sort: dict[str, Any] | str | None) -> list[str]:
         sort_by = "updated_at"
         descending = True
 
@@ -530,18 +707,19 @@ class EntryRepository:
             sort_by = str(sort.get("by") or sort_by).strip().lower()
             descending = bool(sort.get("descending", descending))
 
-        def _key(item: dict[str, Any]) -> Any:
-            location = item.get("location") or {}
+        entries = self._entries
+        rows = self._rows
+
+        def _key(entry_id: str) -> Any:
+            item = entries[entry_id]
             if sort_by == "created_at":
-                return _parse_iso(str(item.get("created_at")))
-            if sort_by == "updated_at":
-                return _parse_iso(str(item.get("updated_at")))
+                return rows[entry_id].created_ts
             if sort_by == "system_name":
-                return str(location.get("system_name") or "").lower()
+                return str((item.get("location") or {}).get("system_name") or "").lower()
             if sort_by == "entry_type":
                 return str(item.get("entry_type") or "").lower()
             if sort_by == "title":
                 return str(item.get("title") or "").lower()
-            return _parse_iso(str(item.get("updated_at")))
+            return rows[entry_id].updated_ts
 
-        return sorted(items, key=_key, reverse=descending)
+        return sorted(ids, key=_key, reverse=descending)
@@ -1,4 +1,5 @@
 import json
+from typing import Any
 import config
 
 from logic.events import fuel_events
@@ -42,21 +43,33 @@ def _log_router_fallback(
     )
 
 
+def _playerdb_changes_from_result(result: Any) -> player_local_db.PlayerDbChangeSet | None:
+    # None = brak delty (stary kontrakt) -> mapa robi pelny reload.
+    if not isinstance(result, dict):
+        return None
+    changes = result.get("changes")
+    if isinstance(changes, player_local_db.PlayerDbChangeSet):
+        return changes
+    if not bool(result.get("ok")):
+        # Odrzucony ingest niczego nie zapisal.
+        return player_local_db.PlayerDbChangeSet()
+    return None
+
+
 def _emit_playerdb_updated(
     *,
     source: str,
     event_name: str,
+    changes: player_local_db.PlayerDbChangeSet | None = None,
 ) -> None:
+    payload: dict[str, Any] = {
+        "source": str(source or "").strip() or "unknown",
+        "event_name": str(event_name or "").strip() or "unknown",
+    }
+    if changes is not None:
+        payload["changes"] = changes
     try:
-        MSG_QUEUE.put(
-            (
-                "playerdb_updated",
-                {
-                    "source": str(source or "").strip() or "unknown",
-                    "event_name": str(event_name or "").strip() or "unknown",
-                },
-            )
-        )
+        MSG_QUEUE.put(("playerdb_updated", payload))
     except Exception as exc:
         _log_router_fallback(
             "playerdb_updated.emit",
@@ -315,10 +328,11 @@ class EventHandler:
 
     def on_market_update(self, market_data: dict, gui_ref=None) -> None:
         playerdb_ingest_ok = False
+        ingest_out: Any = None
         try:
             from app.state import app_state
 
-            player_local_db.ingest_market_json(
+            ingest_out = player_local_db.ingest_market_json(
                 market_data,
                 fallback_system_name=str(getattr(app_state, "current_system", "") or "").strip() or None,
                 fallback_station_name=str(getattr(app_state, "current_station", "") or "").strip() or None,
@@ -327,7 +341,11 @@ class EventHandler:
         except Exception as exc:
             _log_router_fallback("market.playerdb_ingest", "market update: playerdb ingest failed", exc)
         if playerdb_ingest_ok:
-            _emit_playerdb_updated(source="market_json", event_name="Market")
+            _emit_playerdb_updated(
+                source="market_json",
+                event_name="Market",
+                changes=_playerdb_changes_from_result(ingest_out),
+            )
         try:
             cargo_value_estimator.update_market_snapshot(market_data, source="market_json")
         except Exception as exc:
@@ -386,10 +404,11 @@ class EventHandler:
             "SellOrganicData",
         }:
             playerdb_ingest_ok = False
+            ingest_out: Any = None
             try:
                 from app.state import app_state
 
-                player_local_db.ingest_journal_event(
+                ingest_out = player_local_db.ingest_journal_event(
                     ev,
                     fallback_system_name=str(getattr(app_state, "current_system", "") or "").strip() or None,
                     fallback_station_name=str(getattr(app_state, "current_station", "") or "").strip() or None,
@@ -403,7 +422,11 @@ class EventHandler:
                     event=str(typ),
                 )
             if playerdb_ingest_ok:
-                _emit_playerdb_updated(source="journal", event_name=str(typ))
+                _emit_playerdb_updated(
+                    source="journal",
+                    event_name=str(typ),
+                    changes=_playerdb_changes_from_result(ingest_out),
+                )
 
         try:
             feed_item = build_logbook_feed_item(ev)
@@ -531,7 +554,11 @@ class EventHandler:
                     else {"ok": False, "reason": "scan_not_star_body"}
                 )
                 if bool((star_meta_out or {}).get("ok")):
-                    _emit_playerdb_updated(source="journal", event_name="Scan")
+                    _emit_playerdb_updated(
+                        source="journal",
+                        event_name="Scan",
+                        changes=_playerdb_changes_from_result(star_meta_out),
+                    )
             except Exception as exc:
                 _log_router_fallback(
                     "scan.playerdb_star_meta",
@@ -2,11 +2,13 @@
 
 from dataclasses import asdict, dataclass, field
 import os
+import threading
 import time
-from typing import Any
+from typing import Any, Callable
 
 import config
 from app.state import app_state
+from logic.cash_in_provider_race import ProviderRace, record_source_result, record_source_winner
 from logic.cash_in_station_candidates import (
     build_station_candidates,
     collect_then_rank_station_candidates,
@@ -20,7 +22,10 @@ from logic.cash_in_station_candidates import (
 from logic.route_clipboard import try_copy_to_clipboard
 from logic.insight_dispatcher import emit_insight
 from logic.utils.http_edsm import edsm_provider_resilience_snapshot
+from logic.utils.bounded_cache import BoundedCache
+from logic import utils
 from logic.utils import DEBOUNCER
+from logic.utils.renata_log import log_event_throttled
 
 
 @dataclass
@@ -48,8 +53,19 @@ class CashInAssistantPayload:
     edge_case_meta: dict[str, Any] = field(default_factory=dict)
 
 
-_CASH_IN_SWR_CACHE: dict[str, tuple[float, dict[str, Any]]] = {}
-_CASH_IN_LOCAL_KNOWN_CACHE: dict[str, tuple[float, list[dict[str, Any]]]] = {}
+# Limity i TTL ustawiane z configu przy zapisie (configure); wpisy zamrozone.
+_CASH_IN_SWR_CACHE = BoundedCache(
+    "cash_in.swr",
+    ttl_sec=2 * 21600.0,
+    max_items=64,
+    max_bytes=8 * 1024 * 1024,
+)
+_CASH_IN_LOCAL_KNOWN_CACHE = BoundedCache(
+    "cash_in.local_known",
+    ttl_sec=86400.0,
+    max_items=8,
+    max_bytes=4 * 1024 * 1024,
+)
 
 
 def _reset_cash_in_swr_cache_for_tests() -> None:
@@ -1755,6 +1771,9 @@ def _swr_cache_ttls() -> tuple[float, float]:
     return fresh_ttl, stale_ttl
 
 
+_SWR_EXPIRED_GRACE_SEC = 300.0
+
+
 def _swr_cache_max_items() -> int:
     return max(4, int(config.get("cash_in.swr_cache_max_items", 64) or 64))
 
@@ -1781,23 +1800,6 @@ def _build_swr_cache_key(
     )
 
 
-def _prune_swr_cache(*, stale_ttl_sec: float, max_items: int) -> None:
-    now = time.monotonic()
-    stale_ttl = max(0.0, float(stale_ttl_sec))
-    for key, item in list(_CASH_IN_SWR_CACHE.items()):
-        if not isinstance(item, tuple) or len(item) != 2:
-            _CASH_IN_SWR_CACHE.pop(key, None)
-            continue
-        ts = float(item[0] or 0.0)
-        if stale_ttl > 0.0 and (now - ts) > stale_ttl:
-            _CASH_IN_SWR_CACHE.pop(key, None)
-
-    if len(_CASH_IN_SWR_CACHE) <= max_items:
-        return
-    for key, _ in sorted(_CASH_IN_SWR_CACHE.items(), key=lambda kv: kv[1][0])[: len(_CASH_IN_SWR_CACHE) - max_items]:
-        _CASH_IN_SWR_CACHE.pop(key, None)
-
-
 def _store_swr_snapshot(
     *,
     cache_key: str,
@@ -1837,8 +1839,10 @@ def _store_swr_snapshot(
         "vista_count": int(vista_count),
         "candidates": snapshot_candidates,
     }
-    _CASH_IN_SWR_CACHE[cache_key] = (time.monotonic(), payload)
-    _prune_swr_cache(stale_ttl_sec=max(stale_ttl, fresh_ttl), max_items=_swr_cache_max_items())
+    # Wpis zyje w cache dluzej niz stale TTL (okno laski): po stale TTL odczyt
+    # zwraca EXPIRED (a nie MISSING), a kopiec wygasan sprzata go bez skanowania.
+    _CASH_IN_SWR_CACHE.configure(max_items=_swr_cache_max_items())
+    _CASH_IN_SWR_CACHE.set(cache_key, payload, ttl_sec=stale_ttl + max(stale_ttl, _SWR_EXPIRED_GRACE_SEC))
 
 
 def _load_swr_snapshot(
@@ -1849,15 +1853,13 @@ def _load_swr_snapshot(
         return {"status": "DISABLED", "age_sec": 0.0, "entry": {}}
 
     fresh_ttl, stale_ttl = _swr_cache_ttls()
-    item = _CASH_IN_SWR_CACHE.get(cache_key)
-    _prune_swr_cache(stale_ttl_sec=stale_ttl, max_items=_swr_cache_max_items())
+    item = _CASH_IN_SWR_CACHE.get_entry(cache_key)
     if not item:
         return {"status": "MISSING", "age_sec": 0.0, "entry": {}}
 
-    ts_mono, entry = item
-    age_sec = max(0.0, time.monotonic() - float(ts_mono or 0.0))
+    age_sec, entry = item
     if age_sec > stale_ttl:
-        _CASH_IN_SWR_CACHE.pop(cache_key, None)
+        _CASH_IN_SWR_CACHE.pop(cache_key)
         return {"status": "EXPIRED", "age_sec": age_sec, "entry": {}}
 
     status = "FRESH" if age_sec <= fresh_ttl else "STALE"
@@ -1894,26 +1896,6 @@ def _local_known_cache_key(*, service: str) -> str:
     return _normalize_cash_in_service(service)
 
 
-def _prune_local_known_cache() -> None:
-    ttl_sec = _local_known_cache_ttl_sec()
-    max_items = _local_known_cache_max_items()
-    now = time.monotonic()
-    for key, item in list(_CASH_IN_LOCAL_KNOWN_CACHE.items()):
-        if not isinstance(item, tuple) or len(item) != 2:
-            _CASH_IN_LOCAL_KNOWN_CACHE.pop(key, None)
-            continue
-        ts = float(item[0] or 0.0)
-        if (now - ts) > ttl_sec:
-            _CASH_IN_LOCAL_KNOWN_CACHE.pop(key, None)
-            continue
-        rows = item[1]
-        if not isinstance(rows, list):
-            _CASH_IN_LOCAL_KNOWN_CACHE.pop(key, None)
-            continue
-        if len(rows) > max_items:
-            _CASH_IN_LOCAL_KNOWN_CACHE[key] = (ts, [dict(r) for r in rows[:max_items] if isinstance(r, dict)])
-
-
 def _store_local_known_candidates(
     *,
     service: str,
@@ -1944,8 +1926,11 @@ def _store_local_known_candidates(
     )
     if not merged:
         return
-    _CASH_IN_LOCAL_KNOWN_CACHE[svc] = (time.monotonic(), merged[: _local_known_cache_max_items()])
-    _prune_local_known_cache()
+    _CASH_IN_LOCAL_KNOWN_CACHE.set(
+        svc,
+        merged[: _local_known_cache_max_items()],
+        ttl_sec=_local_known_cache_ttl_sec(),
+    )
 
 
 def _load_local_known_candidates(
@@ -1956,19 +1941,14 @@ def _load_local_known_candidates(
     if not _local_known_cache_enabled():
         return {"used": False, "age_sec": 0.0, "count": 0, "candidates": []}
 
-    _prune_local_known_cache()
     svc = _local_known_cache_key(service=service)
-    item = _CASH_IN_LOCAL_KNOWN_CACHE.get(svc)
+    item = _CASH_IN_LOCAL_KNOWN_CACHE.get_entry(svc)
     if not item:
         return {"used": False, "age_sec": 0.0, "count": 0, "candidates": []}
 
-    ts, rows = item
-    age_sec = max(0.0, time.monotonic() - float(ts or 0.0))
-    out = [
-        dict(row)
-        for row in (rows or [])
-        if isinstance(row, dict)
-    ]
+    age_sec, rows = item
+    # Wiersze wspoldzielone (FrozenRow) - bez kopiowania przy kazdym odczycie.
+    out = [row for row in (rows or []) if isinstance(row, dict)]
     if limit > 0:
         out = out[:limit]
     return {
@@ -2327,12 +2307,136 @@ def _provider_status_from_edsm_snapshot(
     return ""
 
 
+def _station_candidates_online_lookup(
+    *,
+    system: str,
+    service_norm: str,
+    local_candidates: list[dict[str, Any]],
+    include_edsm: bool,
+    include_spansh: bool,
+    cross_enabled: bool,
+    system_lookup_online: bool,
+    cross_radius_ly: float,
+    cross_max_systems: int,
+    cross_workers: int,
+    cross_deadline_sec: float,
+    provider_hedge_after_sec: float,
+    provider_request_timeout_sec: float,
+    origin_coords: list[float] | None,
+    freshness_ts: str,
+    limit: int,
+    on_partial_network: Callable[[dict[str, Any]], None] | None = None,
+) -> dict[str, Any]:
+    """
+    Sieciowa czesc runtime kandydatow: providerzy dla biezacego systemu,
+    a gdy brakuje uslugi - cross-system discovery. Nie zmienia stanu, wiec
+    moze dobiec w tle i zostac zastosowana po deadline. Czesciowe wyniki
+    cross-system ida do on_partial_network w tym samym formacie (partial=True).
+    """
+    provider_rows = station_candidates_for_system_from_providers(
+        system,
+        include_edsm=include_edsm,
+        include_spansh=include_spansh,
+        freshness_ts=freshness_ts,
+        limit=limit,
+    )
+    provider_rows = _tag_candidates_source(provider_rows, "PROVIDERS_LOCAL")
+    edsm_snapshot_providers: dict[str, Any] = {}
+    if include_edsm:
+        edsm_snapshot_providers = dict(edsm_provider_resilience_snapshot() or {})
+    merged = list(local_candidates or [])
+    if provider_rows:
+        if merged:
+            merged = collect_then_rank_station_candidates(
+                source_rows={
+                    "RUNTIME_LOCAL": merged,
+                    "PROVIDERS_LOCAL": provider_rows,
+                },
+                default_system=system,
+                freshness_ts=freshness_ts,
+                limit=limit,
+            )
+        else:
+            merged = provider_rows
+
+    needs_cross_system = bool(cross_enabled and system_lookup_online)
+    if needs_cross_system:
+        has_service_locally = bool(filter_candidates_by_service(merged, service=service_norm))
+        needs_cross_system = (not merged) or (not has_service_locally)
+
+    cross_candidates: list[dict[str, Any]] = []
+    cross_meta: dict[str, Any] = {}
+    edsm_snapshot = dict(edsm_snapshot_providers)
+    if needs_cross_system:
+
+        def _on_cross_partial(partial_rows: list[dict[str, Any]], partial_meta: dict[str, Any]) -> None:
+            log_event_throttled(
+                f"cashin.cross_system.partial.{system}",
+                1000,
+                "CASHIN",
+                "cross-system partial candidates",
+                system=system,
+                candidates=len(partial_rows or []),
+                systems_with_candidates=int(partial_meta.get("systems_with_candidates") or 0),
+            )
+            if on_partial_network is None or not partial_rows:
+                return
+            on_partial_network(
+                {
+                    "hit": True,
+                    "partial": True,
+                    "provider_rows": list(provider_rows or []),
+                    "edsm_snapshot_providers": edsm_snapshot_providers,
+                    "cross_attempted": True,
+                    "cross_candidates": _tag_candidates_source(list(partial_rows), "CROSS_SYSTEM"),
+                    "cross_meta": dict(partial_meta or {}),
+                    "edsm_snapshot": dict(edsm_snapshot_providers),
+                }
+            )
+
+        cross_candidates, cross_meta = station_candidates_cross_system_from_providers(
+            system,
+            service=service_norm,
+            include_edsm=include_edsm,
+            include_spansh=include_spansh,
+            radius_ly=cross_radius_ly,
+            max_systems=cross_max_systems,
+            origin_coords=origin_coords,
+            freshness_ts=freshness_ts,
+            limit=limit,
+            max_workers=cross_workers,
+            deadline_s=cross_deadline_sec,
+            hedge_after_s=provider_hedge_after_sec,
+            request_timeout_s=provider_request_timeout_sec,
+            on_partial=_on_cross_partial,
+        )
+        if include_edsm:
+            edsm_snapshot = dict(edsm_provider_resilience_snapshot() or {})
+        if cross_candidates:
+            cross_candidates = _tag_candidates_source(cross_candidates, "CROSS_SYSTEM")
+
+    return {
+        "hit": bool(provider_rows or cross_candidates),
+        "provider_rows": list(provider_rows or []),
+        "edsm_snapshot_providers": edsm_snapshot_providers,
+        "cross_attempted": needs_cross_system,
+        "cross_candidates": list(cross_candidates or []),
+        "cross_meta": dict(cross_meta or {}),
+        "edsm_snapshot": edsm_snapshot,
+    }
+
+
 def _build_station_candidates_runtime(
     *,
     raw_payload: dict[str, Any],
     system: str,
     service: str,
     freshness_ts: str,
+    network_result: dict[str, Any] | None = None,
+    on_late_network: Callable[[dict[str, Any]], None] | None = None,
+    race_deadline_sec: float | None = None,
+    race_late_window_sec: float | None = None,
+    on_partial_network: Callable[[dict[str, Any]], None] | None = None,
 ) -> tuple[list[dict[str, Any]], dict[str, Any]]:
     source_status = "none"
     provider_lookup_attempted = False
@@ -2352,6 +2456,28 @@ def _build_station_candidates_runtime(
     cross_enabled = bool(config.get("cash_in.cross_system_discovery_enabled", True))
     cross_radius_ly = float(config.get("cash_in.cross_system_radius_ly", 120.0) or 120.0)
     cross_max_systems = int(config.get("cash_in.cross_system_max_systems", 12) or 12)
+    cross_workers = int(config.get("cash_in.cross_system_workers", 4) or 4)
+    cross_deadline_sec = float(config.get("cash_in.cross_system_deadline_sec", 8.0) or 8.0)
+    provider_hedge_after_sec = float(config.get("cash_in.provider_hedge_after_sec", 0.8) or 0.8)
+    provider_request_timeout_sec = float(
+        config.get("cash_in.provider_request_timeout_sec", 4.0) or 4.0
+    )
+    cross_system_partial_updates = 0
+    cross_system_first_result_ms = -1
+    cross_system_stop_reason = ""
+    provider_race_deadline_sec = (
+        float(race_deadline_sec)
+        if race_deadline_sec is not None
+        else float(config.get("cash_in.provider_race_deadline_sec", 2.5) or 2.5)
+    )
+    provider_race_late_window_sec = (
+        float(race_late_window_sec)
+        if race_late_window_sec is not None
+        else float(config.get("cash_in.provider_race_late_window_sec", 20.0) or 0.0)
+    )
+    provider_race: ProviderRace | None = None
+    provider_race_timed_out = False
+    provider_race_started = time.monotonic()
     candidates: list[dict[str, Any]] = []
     edsm_snapshot_data: dict[str, Any] = {}
     swr_cache_key = _build_swr_cache_key(
@@ -2454,15 +2580,27 @@ def _build_station_candidates_runtime(
         nonlocal offline_index_used
 
         offline_index_lookup_attempted = True
-        offline_candidates, offline_meta = station_candidates_from_offline_index(
-            system,
-            service=service_norm,
-            origin_coords=origin_coords,
-            index_path=offline_index_path,
-            freshness_ts=freshness_ts,
-            limit=limit,
-            non_carrier_only=offline_index_non_carrier_only,
-        )
+        if provider_race is not None and provider_race.started("offline_index"):
+            _arrived, (offline_candidates, offline_meta) = provider_race.wait(
+                "offline_index",
+                use_deadline=False,
+            )
+        else:
+            lookup_started = time.monotonic()
+            offline_candidates, offline_meta = station_candidates_from_offline_index(
+                system,
+                service=service_norm,
+                origin_coords=origin_coords,
+                index_path=offline_index_path,
+                freshness_ts=freshness_ts,
+                limit=limit,
+                non_carrier_only=offline_index_non_carrier_only,
+            )
+            record_source_result(
+                "offline_index",
+                latency_ms=(time.monotonic() - lookup_started) * 1000.0,
+                hit=bool(offline_candidates),
+            )
         offline_index_lookup_status = _as_text(offline_meta.get("lookup_status")).lower() or "not_attempted"
         offline_index_date = _as_text(offline_meta.get("index_date"))
         offline_index_age_days = int(offline_meta.get("index_age_days") or -1)
@@ -2487,12 +2625,24 @@ def _build_station_candidates_runtime(
         nonlocal playerdb_coords_missing_count
 
         playerdb_lookup_attempted = True
-        playerdb_candidates, playerdb_meta = station_candidates_from_playerdb(
-            system,
-            service=service_norm,
-            origin_coords=origin_coords,
-            limit=limit,
-        )
+        if provider_race is not None and provider_race.started("playerdb"):
+            _arrived, (playerdb_candidates, playerdb_meta) = provider_race.wait(
+                "playerdb",
+                use_deadline=False,
+            )
+        else:
+            lookup_started = time.monotonic()
+            playerdb_candidates, playerdb_meta = station_candidates_from_playerdb(
+                system,
+                service=service_norm,
+                origin_coords=origin_coords,
+                limit=limit,
+            )
+            record_source_result(
+                "playerdb",
+                latency_ms=(time.monotonic() - lookup_started) * 1000.0,
+                hit=bool(playerdb_candidates),
+            )
         playerdb_lookup_status = _as_text(playerdb_meta.get("lookup_status")).lower() or "not_attempted"
         playerdb_query_mode = _as_text(playerdb_meta.get("query_mode")).lower() or "none"
         playerdb_origin_coords_used = bool(playerdb_meta.get("origin_coords_used"))
@@ -2539,70 +2689,111 @@ def _build_station_candidates_runtime(
             candidates = offline_rows
             source_status = "offline_index"
 
-    if lookup_enabled:
-        provider_lookup_attempted = True
-        provider_rows = station_candidates_for_system_from_providers(
-            system,
-            include_edsm=include_edsm,
-            include_spansh=include_spansh,
-            freshness_ts=freshness_ts,
-            limit=limit,
+    system_lookup_online = bool(config.get("features.providers.system_lookup_online", False))
+    if lookup_enabled and network_result is None:
+        # Zrodla startuja razem: siec pod wspolnym deadline, lokalne od razu
+        # (gotowe, gdyby providerzy nie zdazyli).
+        provider_race = ProviderRace(deadline_s=provider_race_deadline_sec)
+        local_rows_snapshot = list(candidates)
+        provider_race.start(
+            "providers",
+            lambda: _station_candidates_online_lookup(
+                system=system,
+                service_norm=service_norm,
+                local_candidates=local_rows_snapshot,
+                include_edsm=include_edsm,
+                include_spansh=include_spansh,
+                cross_enabled=cross_enabled,
+                system_lookup_online=system_lookup_online,
+                cross_radius_ly=cross_radius_ly,
+                cross_max_systems=cross_max_systems,
+                cross_workers=cross_workers,
+                cross_deadline_sec=cross_deadline_sec,
+                provider_hedge_after_sec=provider_hedge_after_sec,
+                provider_request_timeout_sec=provider_request_timeout_sec,
+                origin_coords=origin_coords,
+                freshness_ts=freshness_ts,
+                limit=limit,
+                on_partial_network=on_partial_network,
+            ),
         )
-        provider_rows = _tag_candidates_source(provider_rows, "PROVIDERS_LOCAL")
-        if include_edsm:
-            edsm_snapshot_data = dict(edsm_provider_resilience_snapshot() or {})
-        if provider_rows:
-            if candidates:
-                candidates = collect_then_rank_station_candidates(
-                    source_rows={
-                        "RUNTIME_LOCAL": candidates,
-                        "PROVIDERS_LOCAL": provider_rows,
-                    },
-                    default_system=system,
+        provider_race.start(
+            "playerdb",
+            lambda: station_candidates_from_playerdb(
+                system,
+                service=service_norm,
+                origin_coords=origin_coords,
+                limit=limit,
+            ),
+        )
+        if offline_index_enabled:
+            provider_race.start(
+                "offline_index",
+                lambda: station_candidates_from_offline_index(
+                    system,
+                    service=service_norm,
+                    origin_coords=origin_coords,
+                    index_path=offline_index_path,
                     freshness_ts=freshness_ts,
                     limit=limit,
-                )
+                    non_carrier_only=offline_index_non_carrier_only,
+                ),
+            )
+        arrived, network_result = provider_race.wait("providers")
+        if not arrived:
+            provider_race_timed_out = True
+            network_result = None
+            if on_late_network is not None and provider_race_late_window_sec > 0.0:
+                provider_race.on_late("providers", on_late_network)
+                provider_race.cancel_after(provider_race_late_window_sec)
             else:
-                candidates = provider_rows
-            provider_lookup_status = "providers"
-            source_status = provider_lookup_status
+                # Nikt nie czeka na spozniony wynik - przerwij fan-out/retry w tle.
+                provider_race.cancel("deadline")
+
+    if lookup_enabled:
+        provider_lookup_attempted = True
+        if network_result is None:
+            provider_lookup_status = "providers_deadline"
         else:
-            provider_lookup_status = "providers_empty"
-            status_override = _provider_status_from_edsm_snapshot(
-                edsm_snapshot_data,
-                endpoint_key="station_details",
-            )
-            if status_override:
-                provider_lookup_status = status_override
-            if not candidates:
+            provider_rows = list(network_result.get("provider_rows") or [])
+            edsm_snapshot_data = dict(network_result.get("edsm_snapshot_providers") or {})
+            if provider_rows:
+                if candidates:
+                    candidates = collect_then_rank_station_candidates(
+                        source_rows={
+                            "RUNTIME_LOCAL": candidates,
+                            "PROVIDERS_LOCAL": provider_rows,
+                        },
+                        default_system=system,
+                        freshness_ts=freshness_ts,
+                        limit=limit,
+                    )
+                else:
+                    candidates = provider_rows
+                provider_lookup_status = "providers"
                 source_status = provider_lookup_status
+            else:
+                provider_lookup_status = "providers_empty"
+                status_override = _provider_status_from_edsm_snapshot(
+                    edsm_snapshot_data,
+                    endpoint_key="station_details",
+                )
+                if status_override:
+                    provider_lookup_status = status_override
+                if not candidates:
+                    source_status = provider_lookup_status
     elif not lookup_enabled:
         provider_lookup_status = "disabled"
 
-    system_lookup_online = bool(config.get("features.providers.system_lookup_online", False))
-    needs_cross_system = bool(lookup_enabled and cross_enabled and system_lookup_online)
-    if needs_cross_system:
-        has_service_locally = bool(
-            filter_candidates_by_service(candidates, service=service_norm)
-        )
-        needs_cross_system = (not candidates) or (not has_service_locally)
-
-    if needs_cross_system:
+    if network_result is not None and bool(network_result.get("cross_attempted")):
         provider_lookup_attempted = True
         cross_system_lookup_attempted = True
-        cross_candidates, cross_meta = station_candidates_cross_system_from_providers(
-            system,
-            service=service_norm,
-            include_edsm=include_edsm,
-            include_spansh=include_spansh,
-            radius_ly=cross_radius_ly,
-            max_systems=cross_max_systems,
-            origin_coords=origin_coords,
-            freshness_ts=freshness_ts,
-            limit=limit,
-        )
-        if include_edsm:
-            edsm_snapshot_data = dict(edsm_provider_resilience_snapshot() or {})
+        cross_candidates = list(network_result.get("cross_candidates") or [])
+        cross_meta = dict(network_result.get("cross_meta") or {})
+        edsm_snapshot_data = dict(network_result.get("edsm_snapshot") or {})
+        cross_system_partial_updates = int(cross_meta.get("fanout_partial_updates") or 0)
+        cross_system_first_result_ms = int(cross_meta.get("fanout_first_result_ms", -1))
+        cross_system_stop_reason = _as_text(cross_meta.get("fanout_stop_reason"))
         cross_system_systems_requested = int(cross_meta.get("systems_requested") or 0)
         cross_system_systems_with_candidates = int(cross_meta.get("systems_with_candidates") or 0)
         nearby_requested_radius_ly = float(
@@ -2616,7 +2807,6 @@ def _build_station_candidates_runtime(
         )
         nearby_reason = _as_text(cross_meta.get("nearby_reason")).lower()
         if cross_candidates:
-            cross_candidates = _tag_candidates_source(cross_candidates, "CROSS_SYSTEM")
             candidates = collect_then_rank_station_candidates(
                 source_rows={
                     "RUNTIME_LOCAL": candidates,
@@ -2640,6 +2830,8 @@ def _build_station_candidates_runtime(
                 if not candidates:
                     provider_lookup_status = status_override
                     source_status = status_override
+    elif lookup_enabled and network_result is None:
+        cross_system_lookup_status = "providers_deadline"
     elif not cross_enabled:
         cross_system_lookup_status = "disabled"
     elif not system_lookup_online:
@@ -2647,7 +2839,9 @@ def _build_station_candidates_runtime(
     else:
         cross_system_lookup_status = "not_needed"
 
-    if provider_lookup_attempted and candidates:
+    network_partial = bool((network_result or {}).get("partial"))
+    # Czesciowy wynik cross-system tylko odswieza panel - cache dostaje pelny wynik.
+    if provider_lookup_attempted and candidates and not network_partial:
         if source_status in {"providers", "providers_cross_system"}:
             _store_swr_snapshot(
                 cache_key=swr_cache_key,
@@ -2813,6 +3007,19 @@ def _build_station_candidates_runtime(
         "cross_system_lookup_status": cross_system_lookup_status,
         "cross_system_systems_requested": cross_system_systems_requested,
         "cross_system_systems_with_candidates": cross_system_systems_with_candidates,
+        "cross_system_partial_updates": cross_system_partial_updates,
+        "cross_system_partial": network_partial,
+        "cross_system_first_result_ms": cross_system_first_result_ms,
+        "cross_system_stop_reason": cross_system_stop_reason,
+        "provider_race_deadline_ms": int(round(provider_race_deadline_sec * 1000.0)),
+        "provider_race_timed_out": provider_race_timed_out,
+        "provider_race_late_result": network_result is not None and provider_race is None and lookup_enabled,
+        "provider_race_elapsed_ms": int(round((time.monotonic() - provider_race_started) * 1000.0)),
+        "provider_race_latency_ms": {
+            name: int(round(latency))
+            for name in ("providers", "playerdb", "offline_index")
+            if provider_race is not None and (latency := provider_race.latency_ms(name)) is not None
+        },
         "cross_system_origin_coords_used": bool(origin_coords),
         "nearby_requested_radius_ly": float(nearby_requested_radius_ly),
         "nearby_effective_radius_ly": float(nearby_effective_radius_ly),
@@ -2889,6 +3096,7 @@ def _build_station_candidates_runtime(
             playerdb_query_mode=playerdb_query_mode,
         ),
     }
+    record_source_winner(source_status)
     return candidates, meta
 
 
@@ -3219,20 +3427,29 @@ def trigger_startjump_cash_in_callout(
     return True
 
 
-def trigger_cash_in_assistant(
-    *,
-    gui_ref=None,
-    mode: str = "auto",
-    summary_payload: dict[str, Any] | None = None,
-    suppress_tts: bool = False,
-) -> bool:
-    if not bool(config.get("cash_in_assistant_enabled", True)):
-        return False
+def _provider_race_deadline_for_mode(mode_norm: str) -> float:
+    # Auto (journal, StartJump) musi zmiescic sie w oknie callout; reczny
+    # trigger biegnie w workerze GUI i moze poczekac na pelna odpowiedz.
+    if mode_norm in {"manual", "manual_hotkey"}:
+        return float(config.get("cash_in.provider_race_deadline_manual_sec", 12.0) or 12.0)
+    return float(config.get("cash_in.provider_race_deadline_sec", 2.5) or 2.5)
+
+
+def _provider_race_late_window_for_mode(mode_norm: str) -> float:
+    # Reczny trigger odczekal juz pelny deadline - bez odswiezania w tle.
+    if mode_norm in {"manual", "manual_hotkey"}:
+        return float(config.get("cash_in.provider_race_late_window_manual_sec", 0.0) or 0.0)
+    return float(config.get("cash_in.provider_race_late_window_sec", 20.0) or 0.0)
 
-    mode_norm = _as_text(mode).lower() or "auto"
-    is_manual_mode = mode_norm in {"manual", "manual_hotkey"}
-    raw = dict(summary_payload or {})
 
+def _build_cash_in_assistant_payload(
+    *,
+    raw: dict[str, Any],
+    mode_norm: str,
+    network_result: dict[str, Any] | None = None,
+    on_late_network: Callable[[dict[str, Any]], None] | None = None,
+    on_partial_network: Callable[[dict[str, Any]], None] | None = None,
+) -> CashInAssistantPayload:
     system = _as_text(raw.get("system")) or _as_text(app_state.get_current_system_name()) or "unknown"
     scanned = _safe_int(raw.get("scanned_bodies"))
     total = _safe_int(raw.get("total_bodies"))
@@ -3277,6 +3494,11 @@ def trigger_cash_in_assistant(
         system=system,
         service=service,
         freshness_ts=freshness_ts,
+        network_result=network_result,
+        on_late_network=on_late_network,
+        race_deadline_sec=_provider_race_deadline_for_mode(mode_norm),
+        race_late_window_sec=_provider_race_late_window_for_mode(mode_norm),
+        on_partial_network=on_partial_network,
     )
     options, ranking_meta = _build_profiled_options(
         service=service,
@@ -3348,11 +3570,93 @@ def trigger_cash_in_assistant(
     )
     payload.note = _append_edge_case_note(payload.note, edge_case_meta)
     payload.signature = _signature(payload)
+    return payload
+
+
+def _publish_refined_cash_in_payload(
+    *,
+    raw: dict[str, Any],
+    mode_norm: str,
+    network_result: dict[str, Any],
+    partial: bool = False,
+) -> bool:
+    """
+    Spozniony wynik providerow (po deadline): przelicza ranking i odswieza
+    panel cash-in bez ponownego callout TTS. partial=True oznacza czesciowy
+    wynik cross-system (station_candidates_meta.cross_system_partial) - nie
+    przesuwa sygnatury auto, wiec pelny wynik nadal trafi do panelu.
+    """
+    if not bool((network_result or {}).get("hit")):
+        return False
+    payload = _build_cash_in_assistant_payload(
+        raw=raw,
+        mode_norm=mode_norm,
+        network_result=network_result,
+    )
+    if mode_norm == "auto":
+        skip_sig = _as_text(getattr(app_state, "cash_in_skip_signature", ""))
+        if skip_sig and payload.signature == skip_sig:
+            return False
+        if not partial:
+            app_state.last_cash_in_signature = payload.signature
+    utils.MSG_QUEUE.put(("cash_in_assistant", asdict(payload)))
+    log_event_throttled(
+        f"cashin.provider_race.{'partial' if partial else 'refined'}.{payload.system}",
+        2000,
+        "CASHIN",
+        "cash-in panel updated with partial cross-system result"
+        if partial
+        else "cash-in panel refined with late provider result",
+        system=payload.system,
+        source_status=_as_text((payload.station_candidates_meta or {}).get("source_status")),
+        candidates=len(payload.station_candidates or []),
+    )
+    return True
+
+
+def trigger_cash_in_assistant(
+    *,
+    gui_ref=None,
+    mode: str = "auto",
+    summary_payload: dict[str, Any] | None = None,
+    suppress_tts: bool = False,
+) -> bool:
+    if not bool(config.get("cash_in_assistant_enabled", True)):
+        return False
+
+    mode_norm = _as_text(mode).lower() or "auto"
+    is_manual_mode = mode_norm in {"manual", "manual_hotkey"}
+    raw = dict(summary_payload or {})
+
+    panel_ready = threading.Event()
+
+    def _on_late_network(late_result: dict[str, Any]) -> None:
+        _publish_refined_cash_in_payload(raw=raw, mode_norm=mode_norm, network_result=late_result)
+
+    def _on_partial_network(partial_result: dict[str, Any]) -> None:
+        # Przed publikacja glownego payloadu czesciowy wynik i tak wejdzie do
+        # rankingu (race jeszcze czeka); pozniej odswieza panel na biezaco.
+        if panel_ready.is_set():
+            _publish_refined_cash_in_payload(
+                raw=raw,
+                mode_norm=mode_norm,
+                network_result=partial_result,
+                partial=True,
+            )
+
+    payload = _build_cash_in_assistant_payload(
+        raw=raw,
+        mode_norm=mode_norm,
+        on_late_network=_on_late_network,
+        on_partial_network=_on_partial_network,
+    )
+    signal = payload.signal
 
     if mode_norm == "auto":
         last_sig = _as_text(getattr(app_state, "last_cash_in_signature", ""))
         skip_sig = _as_text(getattr(app_state, "cash_in_skip_signature", ""))
         if payload.signature == last_sig:
+            panel_ready.set()
             return False
         if skip_sig and payload.signature == skip_sig:
             return False
@@ -3406,4 +3710,5 @@ def trigger_cash_in_assistant(
         cooldown_scope="entity",
         cooldown_seconds=cooldown_seconds,
     )
+    panel_ready.set()
     return True
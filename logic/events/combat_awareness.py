@@ -5,7 +5,7 @@ from typing import Any, Dict
 
 import config
 from app.state import app_state
-from logic.cargo_value_estimator import estimate_cargo_value
+from logic import value_at_risk
 from logic.insight_dispatcher import emit_insight
 
 
@@ -49,6 +49,7 @@ _RUNTIME: Dict[str, Any] = {
     "active_patterns": set(),
     "pattern_hits": {},
     "emitted_patterns": set(),
+    "gate_key": None,
 }
 
 _PATTERN_THRESHOLDS: Dict[str, int] = {
@@ -67,6 +68,7 @@ _PATTERN_LEVELS: Dict[str, str] = {
 
 
 def reset_combat_awareness_state() -> None:
+    _RUNTIME["gate_key"] = None
     _RUNTIME["system"] = ""
     _RUNTIME["hull_percent"] = None
     _RUNTIME["shields_up"] = None
@@ -166,70 +168,6 @@ def _status_fsd_cooldown(status: Dict[str, Any]) -> float | None:
     return None
 
 
-def _value_snapshot() -> tuple[float, float, float, float, float, float, float, str, str]:
-    session_value = 0.0
-    system_value = 0.0
-    cargo_tons = 0.0
-    exploration_value = 0.0
-    exobio_value = 0.0
-    cargo_floor_cr = 0.0
-    cargo_expected_cr = 0.0
-    cargo_value_confidence = "LOW"
-    cargo_value_source = "fallback"
-
-    try:
-        totals = app_state.system_value_engine.calculate_totals()
-        totals = totals or {}
-        session_value = float(totals.get("total") or 0.0)
-        cartography_value = float(totals.get("c_cartography") or 0.0)
-        exobio_value = float(totals.get("c_exobiology") or 0.0)
-        discovery_bonus = float(totals.get("bonus_discovery") or 0.0)
-        exploration_value = max(0.0, cartography_value + discovery_bonus)
-    except Exception:
-        session_value = 0.0
-        exploration_value = 0.0
-        exobio_value = 0.0
-
-    try:
-        system = _as_text(_RUNTIME.get("system")) or _as_text(getattr(app_state, "current_system", ""))
-        if system:
-            data = app_state.exit_summary.build_summary_data(system_name=system)
-            if data is not None:
-                system_value = float(getattr(data, "total_value", 0.0) or 0.0)
-    except Exception:
-        system_value = 0.0
-
-    try:
-        cargo_tons = float(getattr(app_state.ship_state, "cargo_mass_t", 0.0) or 0.0)
-    except Exception:
-        cargo_tons = 0.0
-
-    try:
-        cargo_estimate = estimate_cargo_value(cargo_tons=cargo_tons)
-        cargo_tons = max(cargo_tons, float(cargo_estimate.cargo_tons))
-        cargo_floor_cr = float(cargo_estimate.cargo_floor_cr)
-        cargo_expected_cr = float(cargo_estimate.cargo_expected_cr)
-        cargo_value_confidence = str(cargo_estimate.confidence or "LOW").upper()
-        cargo_value_source = str(cargo_estimate.source or "fallback").lower()
-    except Exception:
-        cargo_floor_cr = 0.0
-        cargo_expected_cr = 0.0
-        cargo_value_confidence = "LOW"
-        cargo_value_source = "fallback"
-
-    return (
-        max(0.0, session_value),
-        max(0.0, system_value),
-        max(0.0, cargo_tons),
-        max(0.0, exploration_value),
-        max(0.0, exobio_value),
-        max(0.0, cargo_floor_cr),
-        max(0.0, cargo_expected_cr),
-        cargo_value_confidence,
-        cargo_value_source,
-    )
-
-
 def _var_status(session_value: float, system_value: float, cargo_floor_cr: float) -> str:
     reference = max(session_value, system_value, cargo_floor_cr)
     if reference >= 20_000_000:
@@ -282,17 +220,16 @@ def _build_payload(mode: str) -> CombatAwarenessPayload | None:
     if not in_combat:
         return None
 
-    (
-        session_value,
-        system_value,
-        cargo_tons,
-        exploration_value,
-        exobio_value,
-        cargo_floor_cr,
-        cargo_expected_cr,
-        cargo_value_confidence,
-        cargo_value_source,
-    ) = _value_snapshot()
+    snapshot = value_at_risk.get_snapshot(_as_text(_RUNTIME.get("system")))
+    session_value = snapshot.session_value
+    system_value = snapshot.system_value
+    cargo_tons = snapshot.cargo_tons
+    exploration_value = snapshot.exploration_value
+    exobio_value = snapshot.exobio_value
+    cargo_floor_cr = snapshot.cargo_floor_cr
+    cargo_expected_cr = snapshot.cargo_expected_cr
+    cargo_value_confidence = snapshot.cargo_value_confidence
+    cargo_value_source = snapshot.cargo_value_source
     var_status = _var_status(session_value, system_value, cargo_floor_cr)
     active = _active_patterns(var_status)
     _record_pattern_hits(active)
@@ -462,6 +399,24 @@ def handle_status_update(status: Dict[str, Any], gui_ref=None) -> None:
     if not _RUNTIME["in_combat"]:
         _RUNTIME["active_patterns"] = set()
 
+    # Bez zmiany stanu walki/kadłuba i wartości (snapshot) wynik bramki byłby
+    # identyczny - pomijamy ocenę. Zmiana snapshotu czyści gate_key.
+    gate_key = (
+        _RUNTIME.get("system"),
+        _RUNTIME.get("hull_percent"),
+        _RUNTIME.get("shields_up"),
+        _RUNTIME.get("in_combat"),
+        _RUNTIME.get("under_attack"),
+        _RUNTIME.get("being_interdicted"),
+        _RUNTIME.get("fsd_cooldown_sec"),
+        bool(config.get("combat_awareness_enabled", True)),
+        getattr(app_state, "last_combat_awareness_signature", None),
+    )
+    if _RUNTIME["in_combat"]:
+        value_at_risk.get_snapshot(_as_text(_RUNTIME.get("system")))
+    if gate_key == _RUNTIME.get("gate_key"):
+        return
+    _RUNTIME["gate_key"] = gate_key
     trigger_combat_awareness(gui_ref=gui_ref, mode="auto")
 
 
@@ -484,3 +439,12 @@ def handle_journal_event(ev: Dict[str, Any], gui_ref=None) -> None:
         _RUNTIME["pattern_hits"] = {}
         _RUNTIME["emitted_patterns"] = set()
         app_state.last_combat_awareness_signature = None
+    if event_name in {"LoadGame", "Resurrect", "Died", "Docked", "Undocked"}:
+        _RUNTIME["gate_key"] = None
+
+
+def _on_value_changed(_snapshot: value_at_risk.ValueSnapshot) -> None:
+    _RUNTIME["gate_key"] = None
+
+
+value_at_risk.subscribe(_on_value_changed)
@@ -28,8 +28,6 @@ EXOBIO_RECOVERY_UNCERTAIN_KEYS = set()  # (system, body, species) -> numbering u
 EXOBIO_FIRST_LOGGED_ALERTED_BODIES = set()  # (system, body) -> one first-logged alert per body
 
 _EXOBIO_KEY_DELIM = "||"
-_EXOBIO_PERSIST_MIN_INTERVAL_SEC = 2.0
-_EXOBIO_LAST_PERSIST_TS = 0.0
 
 
 def _exc_text(exc: Exception) -> str:
@@ -214,17 +212,11 @@ def _snapshot_exobio_state_payload() -> Dict[str, Any]:
 
 
 def _persist_exobio_state(*, force: bool = False) -> bool:
-    global _EXOBIO_LAST_PERSIST_TS
-
-    now = time.time()
-    if (not force) and (_EXOBIO_LAST_PERSIST_TS > 0.0):
-        if (now - _EXOBIO_LAST_PERSIST_TS) < _EXOBIO_PERSIST_MIN_INTERVAL_SEC:
-            return False
-
+    # Bez force zapis odklada flusher segmentu "exobio" (min. odstep per domena);
+    # force (probka, reset) zapisuje od razu.
     payload = _snapshot_exobio_state_payload()
     try:
-        config.update_anti_spam_state({"exobio": payload})
-        _EXOBIO_LAST_PERSIST_TS = now
+        config.update_anti_spam_state({"exobio": payload}, flush=force)
         # Success persists can happen often during active sampling; keep this visible
         # only in debug sessions to avoid gameplay log spam while preserving diagnostics.
         if bool(config.get("debug_logging", False)):
@@ -246,7 +238,6 @@ def _persist_exobio_state(*, force: bool = False) -> bool:
         )
         try:
             config.STATE["exobio_state"] = payload
-            _EXOBIO_LAST_PERSIST_TS = now
             return True
         except Exception as exc2:
             _log_exobio_fallback(
@@ -372,8 +363,7 @@ def load_exobio_state_from_contract(*, force: bool = False) -> Dict[str, Any]:
 
     payload: Dict[str, Any] = {}
     try:
-        anti_spam_state = config.get_anti_spam_state(default={})
-        raw = anti_spam_state.get("exobio") if isinstance(anti_spam_state, dict) else {}
+        raw = config.get_anti_spam_section("exobio", {})
         if isinstance(raw, dict):
             payload = raw
     except Exception as exc:
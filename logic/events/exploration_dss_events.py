@@ -179,6 +179,11 @@ def handle_dss_target_hint(ev: Dict[str, Any], gui_ref=None) -> None:
     if body_id in DSS_TARGET_HINT_BODIES:
         return
 
+    # MainLoop rusza przed zbudowaniem okna: ocena z carto_df czeka na attach() GUI.
+    defer = getattr(gui_ref, "defer_until_attached", None)
+    if callable(defer) and defer(handle_dss_target_hint, ev, gui_ref):
+        return
+
     if not _is_worth_mapping(ev, gui_ref):
         return
 
@@ -57,6 +57,10 @@ def check_high_value_planet(ev: Dict[str, Any], gui_ref=None):
     S2-LOGIC-03 - Detect high-value planets:
     ELW / Water World / Terraformable HMC.
     """
+    # MainLoop rusza przed zbudowaniem okna: analiza czeka na attach() GUI.
+    defer = getattr(gui_ref, "defer_until_attached", None)
+    if callable(defer) and defer(check_high_value_planet, ev, gui_ref):
+        return
     # No GUI/dataframe -> no-op
     if gui_ref is None or not hasattr(gui_ref, "carto_df"):
         return
@@ -16,7 +16,6 @@ CARGO_HAS_ILLEGAL = False           # czy na pokładzie jest nielegalny/stolen t
 SMUGGLER_WARNED_TARGETS = set()     # stacje/osady, dla których już padł alert
 _SMUGGLER_WARNED_TS: dict[str, float] = {}
 _SMUGGLER_STATE_LOADED = False
-_SMUGGLER_LAST_PERSIST_TS = 0.0
 
 _SMUGGLER_STATE_SCHEMA_VERSION = 1
 _SMUGGLER_STATE_SECTION = "smuggler_warned_targets"
@@ -36,13 +35,6 @@ def _smuggler_max_targets() -> int:
         return 512
 
 
-def _smuggler_persist_min_interval_sec() -> float:
-    try:
-        return max(0.5, float(config.get("anti_spam.persist_min_interval_sec", 2.0)))
-    except Exception:
-        return 2.0
-
-
 def _coerce_ts(value: Any) -> float | None:
     try:
         ts = float(value)
@@ -100,17 +92,10 @@ def _snapshot_smuggler_cache(*, now: float | None = None) -> dict[str, Any]:
 
 
 def _persist_smuggler_cache(*, force: bool = False) -> bool:
-    global _SMUGGLER_LAST_PERSIST_TS
-
-    now = time.time()
-    if (not force) and (_SMUGGLER_LAST_PERSIST_TS > 0.0):
-        if (now - _SMUGGLER_LAST_PERSIST_TS) < _smuggler_persist_min_interval_sec():
-            return False
-
-    payload = _snapshot_smuggler_cache(now=now)
+    # Odstep miedzy zapisami pilnuje flusher segmentu "smuggler".
+    payload = _snapshot_smuggler_cache(now=time.time())
     try:
-        config.update_anti_spam_state({_SMUGGLER_STATE_SECTION: payload})
-        _SMUGGLER_LAST_PERSIST_TS = now
+        config.update_anti_spam_state({_SMUGGLER_STATE_SECTION: payload}, flush=force)
         return True
     except Exception:
         return False
@@ -125,8 +110,7 @@ def _load_smuggler_cache(*, force: bool = False) -> dict[str, Any]:
 
     payload: dict[str, Any] = {}
     try:
-        anti_spam_state = config.get_anti_spam_state(default={})
-        raw = anti_spam_state.get(_SMUGGLER_STATE_SECTION) if isinstance(anti_spam_state, dict) else {}
+        raw = config.get_anti_spam_section(_SMUGGLER_STATE_SECTION, {})
         if isinstance(raw, dict):
             payload = raw
     except Exception:
@@ -152,13 +136,12 @@ def _load_smuggler_cache(*, force: bool = False) -> dict[str, Any]:
 
 def reset_smuggler_runtime_state(*, persist: bool = False) -> None:
     global CARGO_HAS_ILLEGAL, SMUGGLER_WARNED_TARGETS
-    global _SMUGGLER_WARNED_TS, _SMUGGLER_STATE_LOADED, _SMUGGLER_LAST_PERSIST_TS
+    global _SMUGGLER_WARNED_TS, _SMUGGLER_STATE_LOADED
 
     CARGO_HAS_ILLEGAL = False
     SMUGGLER_WARNED_TARGETS = set()
     _SMUGGLER_WARNED_TS = {}
     _SMUGGLER_STATE_LOADED = False
-    _SMUGGLER_LAST_PERSIST_TS = 0.0
     if persist:
         _persist_smuggler_cache(force=True)
 
@@ -5,7 +5,7 @@ from typing import Any, Dict
 
 import config
 from app.state import app_state
-from logic.cargo_value_estimator import estimate_cargo_value
+from logic import value_at_risk
 from logic.insight_dispatcher import emit_insight
 
 
@@ -44,10 +44,12 @@ _RUNTIME: Dict[str, Any] = {
     "hull_percent": None,
     "shields_up": None,
     "in_combat": False,
+    "gate_key": None,
 }
 
 
 def reset_survival_rebuy_state() -> None:
+    _RUNTIME["gate_key"] = None
     _RUNTIME["system"] = ""
     _RUNTIME["credits"] = None
     _RUNTIME["rebuy_cost"] = None
@@ -146,70 +148,6 @@ def _extract_rebuy_cost(payload: Dict[str, Any]) -> float | None:
     return None
 
 
-def _value_snapshot() -> tuple[float, float, float, float, float, float, float, str, str]:
-    session_value = 0.0
-    system_value = 0.0
-    cargo_tons = 0.0
-    exploration_value = 0.0
-    exobio_value = 0.0
-    cargo_floor_cr = 0.0
-    cargo_expected_cr = 0.0
-    cargo_value_confidence = "LOW"
-    cargo_value_source = "fallback"
-
-    try:
-        totals = app_state.system_value_engine.calculate_totals()
-        totals = totals or {}
-        session_value = float(totals.get("total") or 0.0)
-        cartography_value = float(totals.get("c_cartography") or 0.0)
-        exobio_value = float(totals.get("c_exobiology") or 0.0)
-        discovery_bonus = float(totals.get("bonus_discovery") or 0.0)
-        exploration_value = max(0.0, cartography_value + discovery_bonus)
-    except Exception:
-        session_value = 0.0
-        exploration_value = 0.0
-        exobio_value = 0.0
-
-    try:
-        system = _as_text(_RUNTIME.get("system")) or _as_text(getattr(app_state, "current_system", ""))
-        if system:
-            data = app_state.exit_summary.build_summary_data(system_name=system)
-            if data is not None:
-                system_value = float(getattr(data, "total_value", 0.0) or 0.0)
-    except Exception:
-        system_value = 0.0
-
-    try:
-        cargo_tons = float(getattr(app_state.ship_state, "cargo_mass_t", 0.0) or 0.0)
-    except Exception:
-        cargo_tons = 0.0
-
-    try:
-        cargo_estimate = estimate_cargo_value(cargo_tons=cargo_tons)
-        cargo_tons = max(cargo_tons, float(cargo_estimate.cargo_tons))
-        cargo_floor_cr = float(cargo_estimate.cargo_floor_cr)
-        cargo_expected_cr = float(cargo_estimate.cargo_expected_cr)
-        cargo_value_confidence = str(cargo_estimate.confidence or "LOW").upper()
-        cargo_value_source = str(cargo_estimate.source or "fallback").lower()
-    except Exception:
-        cargo_floor_cr = 0.0
-        cargo_expected_cr = 0.0
-        cargo_value_confidence = "LOW"
-        cargo_value_source = "fallback"
-
-    return (
-        max(0.0, session_value),
-        max(0.0, system_value),
-        max(0.0, cargo_tons),
-        max(0.0, exploration_value),
-        max(0.0, exobio_value),
-        max(0.0, cargo_floor_cr),
-        max(0.0, cargo_expected_cr),
-        cargo_value_confidence,
-        cargo_value_source,
-    )
-
-
 def _var_status(session_value: float, system_value: float, cargo_floor_cr: float) -> str:
     reference = max(session_value, system_value, cargo_floor_cr)
     if reference >= 20_000_000:
@@ -231,17 +169,16 @@ def _build_payload(mode: str) -> SurvivalRebuyPayload | None:
         shields_up = bool(shields_up)
     in_combat = bool(_RUNTIME.get("in_combat"))
 
-    (
-        session_value,
-        system_value,
-        cargo_tons,
-        exploration_value,
-        exobio_value,
-        cargo_floor_cr,
-        cargo_expected_cr,
-        cargo_value_confidence,
-        cargo_value_source,
-    ) = _value_snapshot()
+    snapshot = value_at_risk.get_snapshot(_as_text(_RUNTIME.get("system")))
+    session_value = snapshot.session_value
+    system_value = snapshot.system_value
+    cargo_tons = snapshot.cargo_tons
+    exploration_value = snapshot.exploration_value
+    exobio_value = snapshot.exobio_value
+    cargo_floor_cr = snapshot.cargo_floor_cr
+    cargo_expected_cr = snapshot.cargo_expected_cr
+    cargo_value_confidence = snapshot.cargo_value_confidence
+    cargo_value_source = snapshot.cargo_value_source
     var_status = _var_status(session_value, system_value, cargo_floor_cr)
 
     rebuy_ratio = None
@@ -441,6 +378,22 @@ def handle_status_update(status: Dict[str, Any], gui_ref=None) -> None:
     if rebuy is not None:
         _RUNTIME["rebuy_cost"] = rebuy
 
+    # Bez zmiany stanu kadłuba/kredytów i wartości (snapshot) wynik bramki
+    # byłby identyczny - pomijamy ocenę. Zmiana snapshotu czyści gate_key.
+    gate_key = (
+        _RUNTIME.get("system"),
+        _RUNTIME.get("hull_percent"),
+        _RUNTIME.get("shields_up"),
+        _RUNTIME.get("in_combat"),
+        _RUNTIME.get("credits"),
+        _RUNTIME.get("rebuy_cost"),
+        bool(config.get("survival_rebuy_awareness_enabled", True)),
+        getattr(app_state, "last_survival_rebuy_signature", None),
+    )
+    value_at_risk.get_snapshot(_as_text(_RUNTIME.get("system")))
+    if gate_key == _RUNTIME.get("gate_key"):
+        return
+    _RUNTIME["gate_key"] = gate_key
     trigger_survival_rebuy_awareness(gui_ref=gui_ref, mode="auto")
 
 
@@ -469,4 +422,12 @@ def handle_journal_event(ev: Dict[str, Any], gui_ref=None) -> None:
         changed = True
 
     if changed:
+        _RUNTIME["gate_key"] = None
         trigger_survival_rebuy_awareness(gui_ref=gui_ref, mode="auto")
+
+
+def _on_value_changed(_snapshot: value_at_risk.ValueSnapshot) -> None:
+    _RUNTIME["gate_key"] = None
+
+
+value_at_risk.subscribe(_on_value_changed)
@@ -16,7 +16,6 @@ JACKPOT_CACHE = set()
 _JACKPOT_WARNED_TS: dict[tuple[str, str], float] = {}
 _JACKPOT_CACHE_TS: dict[tuple[str, str, str, int], float] = {}
 _JACKPOT_STATE_LOADED = False
-_JACKPOT_LAST_PERSIST_TS = 0.0
 
 _JACKPOT_STATE_SCHEMA_VERSION = 1
 _JACKPOT_STATE_SECTION = "trade_jackpot_cache"
@@ -43,13 +42,6 @@ def _jackpot_max_items() -> int:
         return 1024
 
 
-def _jackpot_persist_min_interval_sec() -> float:
-    try:
-        return max(0.5, float(config.get("anti_spam.persist_min_interval_sec", 2.0)))
-    except Exception:
-        return 2.0
-
-
 def _coerce_ts(value: Any) -> float | None:
     try:
         ts = float(value)
@@ -150,17 +142,10 @@ def _snapshot_jackpot_cache(*, now: float | None = None) -> dict[str, Any]:
 
 
 def _persist_jackpot_cache(*, force: bool = False) -> bool:
-    global _JACKPOT_LAST_PERSIST_TS
-
-    now = time.time()
-    if (not force) and (_JACKPOT_LAST_PERSIST_TS > 0.0):
-        if (now - _JACKPOT_LAST_PERSIST_TS) < _jackpot_persist_min_interval_sec():
-            return False
-
-    payload = _snapshot_jackpot_cache(now=now)
+    # Odstep miedzy zapisami pilnuje flusher segmentu "jackpot".
+    payload = _snapshot_jackpot_cache(now=time.time())
     try:
-        config.update_anti_spam_state({_JACKPOT_STATE_SECTION: payload})
-        _JACKPOT_LAST_PERSIST_TS = now
+        config.update_anti_spam_state({_JACKPOT_STATE_SECTION: payload}, flush=force)
         return True
     except Exception:
         return False
@@ -176,8 +161,7 @@ def _load_jackpot_cache(*, force: bool = False) -> dict[str, Any]:
 
     payload: dict[str, Any] = {}
     try:
-        anti_spam_state = config.get_anti_spam_state(default={})
-        raw = anti_spam_state.get(_JACKPOT_STATE_SECTION) if isinstance(anti_spam_state, dict) else {}
+        raw = config.get_anti_spam_section(_JACKPOT_STATE_SECTION, {})
         if isinstance(raw, dict):
             payload = raw
     except Exception:
@@ -230,14 +214,13 @@ def _load_jackpot_cache(*, force: bool = False) -> dict[str, Any]:
 def reset_jackpot_runtime_state(*, persist: bool = False) -> None:
     global JACKPOT_WARNED_STATIONS, JACKPOT_CACHE
     global _JACKPOT_WARNED_TS, _JACKPOT_CACHE_TS
-    global _JACKPOT_STATE_LOADED, _JACKPOT_LAST_PERSIST_TS
+    global _JACKPOT_STATE_LOADED
 
     JACKPOT_WARNED_STATIONS = set()
     JACKPOT_CACHE = set()
     _JACKPOT_WARNED_TS = {}
     _JACKPOT_CACHE_TS = {}
     _JACKPOT_STATE_LOADED = False
-    _JACKPOT_LAST_PERSIST_TS = 0.0
     if persist:
         _persist_jackpot_cache(force=True)
 
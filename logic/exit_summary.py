@@ -82,8 +82,19 @@ class ExitSummaryGenerator:
     """
 
     def __init__(self, system_value_engine: Any):
+        self.version = 0
         self.engine = system_value_engine
 
+    @property
+    def engine(self) -> Any:
+        return self._engine
+
+    @engine.setter
+    def engine(self, value: Any) -> None:
+        # Podmiana silnika = inne dane wejsciowe; wlasny licznik dla value_at_risk.
+        self._engine = value
+        self.version += 1
+
     # ------------------------------------------------------------------
     # Publiczny interfejs
     # ------------------------------------------------------------------
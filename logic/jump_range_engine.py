@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+import json
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass, field
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 
 import config
 from logic.utils import MSG_QUEUE
@@ -183,22 +186,6 @@ def _apply_engineering_modifiers(
     return params, applied, source
 
 
-def _compute_jump_range(
-    mass_current_t: float,
-    fuel_limit_t: float,
-    opt_mass_t: float,
-    fuel_power: float,
-    fuel_multiplier: float,
-) -> Optional[float]:
-    if mass_current_t <= 0 or fuel_limit_t <= 0:
-        return 0.0
-    if opt_mass_t <= 0 or fuel_power <= 0 or fuel_multiplier <= 0:
-        return None
-    return (fuel_limit_t / fuel_multiplier) ** (1.0 / fuel_power) * (
-        opt_mass_t / mass_current_t
-    )
-
-
 def _resolve_fsd_params(
     ship_state: Any, modules_data: Dict[str, Any]
 ) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]], Optional[str]]:
@@ -254,23 +241,212 @@ def _resolve_fsd_params(
     )
 
 
-def _compute_jump_range_from_params(
-    mass_current_t: float,
-    fuel_limit_t: float,
-    fsd_params: Dict[str, Any],
-) -> Optional[float]:
+@dataclass
+class JumpRangeCurve:
+    """
+    Krzywa zasiegu dla jednego loadoutu: parametry FSD (po engineeringu),
+    masa bez ladunku i bonus boostera rozwiazane raz. Zasieg dla dowolnej
+    kombinacji paliwa/ladunku to juz tylko wzor zamkniety (bez interpolacji).
+    """
+
+    opt_mass_t: float
+    max_fuel_t: float
+    fuel_power: float
+    fuel_multiplier: float
+    unladen_mass_t: Optional[float]
+    booster_bonus_ly: float
+    meta: Dict[str, Any] = field(default_factory=dict)
+    _valid: bool = field(init=False, repr=False, default=False)
+    _inv_power: float = field(init=False, repr=False, default=0.0)
+    _full_tank_coeff: float = field(init=False, repr=False, default=0.0)
+
+    def __post_init__(self) -> None:
+        self._valid = self.opt_mass_t > 0 and self.fuel_power > 0 and self.fuel_multiplier > 0
+        if self._valid:
+            self._inv_power = 1.0 / self.fuel_power
+            if self.max_fuel_t > 0:
+                self._full_tank_coeff = (self.max_fuel_t / self.fuel_multiplier) ** self._inv_power
+
+    def fuel_limit(self, fuel_main_t: float) -> float:
+        return min(float(fuel_main_t), self.max_fuel_t)
+
+    def base_range(self, mass_current_t: float, fuel_limit_t: float) -> Optional[float]:
+        """Wzor FSD: (paliwo / mnoznik)^(1/moc) * masa_opt / masa; 0.0 bez paliwa/masy."""
+        if mass_current_t <= 0 or fuel_limit_t <= 0:
+            return 0.0
+        if not self._valid:
+            return None
+        if fuel_limit_t == self.max_fuel_t and self._full_tank_coeff:
+            coeff = self._full_tank_coeff
+        else:
+            coeff = (fuel_limit_t / self.fuel_multiplier) ** self._inv_power
+        return coeff * (self.opt_mass_t / mass_current_t)
+
+    def ranges(
+        self,
+        fuel_main_t: Sequence[float],
+        cargo_t: Sequence[float] | float = 0.0,
+        *,
+        fuel_reservoir_t: float = 0.0,
+    ) -> List[Optional[float]]:
+        """
+        Zasiegi (z boosterem, bez zaokraglenia) dla serii stanow paliwa/ladunku,
+        np. kolejnych skokow trasy. cargo_t moze byc liczba albo sekwencja.
+        """
+        if self.unladen_mass_t is None:
+            return [None] * len(fuel_main_t)
+        if isinstance(cargo_t, (int, float)):
+            cargo_seq: Iterable[float] = [float(cargo_t)] * len(fuel_main_t)
+        else:
+            if len(cargo_t) != len(fuel_main_t):
+                raise ValueError("fuel_main_t and cargo_t must have the same length")
+            cargo_seq = cargo_t
+        dry = float(self.unladen_mass_t) + float(fuel_reservoir_t or 0.0)
+        max_fuel = self.max_fuel_t
+        bonus = self.booster_bonus_ly
+        out: List[Optional[float]] = []
+        for fuel, cargo in zip(fuel_main_t, cargo_seq):
+            fuel = float(fuel)
+            base = self.base_range(dry + float(cargo) + fuel, fuel if fuel < max_fuel else max_fuel)
+            if base is None:
+                out.append(None)
+            else:
+                out.append(base + bonus if base > 0 else 0.0)
+        return out
+
+
+_CURVE_CACHE_LIMIT = 8
+# LRU: trafienie przesuwa wpis na koniec, eviction zdejmuje najdawniej uzyty.
+_CURVE_CACHE: "OrderedDict[str, Tuple[Any, JumpRangeCurve]]" = OrderedDict()
+_CURVE_CACHE_LOCK = threading.Lock()
+
+
+def _loadout_curve_key(ship_state: Any) -> str:
+    fsd = getattr(ship_state, "fsd", {}) or {}
+    booster = getattr(ship_state, "fsd_booster", {}) or {}
+    return json.dumps(
+        [
+            fsd.get("class"),
+            fsd.get("rating"),
+            fsd.get("item"),
+            fsd.get("engineering"),
+            fsd.get("experimental"),
+            booster.get("bonus_ly"),
+            getattr(ship_state, "unladen_mass_t", None),
+            bool(config.get("jump_range_engineering_enabled", True)),
+        ],
+        sort_keys=True,
+        default=str,
+    )
+
+
+def _booster_bonus(ship_state: Any) -> float:
+    booster = getattr(ship_state, "fsd_booster", {}) or {}
+    try:
+        return float(booster.get("bonus_ly", 0.0) or 0.0)
+    except Exception:
+        return 0.0
+
+
+def _resolve_curve(
+    ship_state: Any, modules_data: Dict[str, Any]
+) -> Tuple[Optional[JumpRangeCurve], Optional[str]]:
+    key = _loadout_curve_key(ship_state)
+    with _CURVE_CACHE_LOCK:
+        cached = _CURVE_CACHE.get(key)
+        if cached is not None and cached[0] is modules_data:
+            _CURVE_CACHE.move_to_end(key)
+            return cached[1], None
+
+    fsd_params, fsd_meta, error = _resolve_fsd_params(ship_state, modules_data)
+    if error or not fsd_params or not fsd_meta:
+        return None, error or "missing_fsd_params"
+    try:
+        curve = JumpRangeCurve(
+            opt_mass_t=float(fsd_params.get("opt_mass", 0.0)),
+            max_fuel_t=float(fsd_params.get("max_fuel", 0.0)),
+            fuel_power=float(fsd_params.get("fuel_power", 0.0)),
+            fuel_multiplier=float(fsd_params.get("fuel_multiplier", 0.0)),
+            unladen_mass_t=_optional_float(getattr(ship_state, "unladen_mass_t", None)),
+            booster_bonus_ly=_booster_bonus(ship_state),
+            meta=dict(fsd_meta),
+        )
+    except Exception:
+        return None, "invalid_fsd_params"
+
+    with _CURVE_CACHE_LOCK:
+        _CURVE_CACHE[key] = (modules_data, curve)
+        _CURVE_CACHE.move_to_end(key)
+        while len(_CURVE_CACHE) > _CURVE_CACHE_LIMIT:
+            _CURVE_CACHE.popitem(last=False)
+    return curve, None
+
+
+def _optional_float(value: Any) -> Optional[float]:
     try:
-        opt_mass_t = float(fsd_params.get("opt_mass", 0.0))
-        fuel_power = float(fsd_params.get("fuel_power", 0.0))
-        fuel_multiplier = float(fsd_params.get("fuel_multiplier", 0.0))
+        return float(value) if value is not None else None
     except Exception:
         return None
-    return _compute_jump_range(
-        mass_current_t, fuel_limit_t, opt_mass_t, fuel_power, fuel_multiplier
-    )
 
 
-def compute_jump_range_current(ship_state: Any, modules_data: Dict[str, Any]) -> JumpRangeResult:
+def get_jump_range_curve(ship_state: Any, modules_data: Dict[str, Any]) -> Optional[JumpRangeCurve]:
+    """Krzywa zasiegu aktualnego loadoutu (cache po sygnaturze FSD/boostera/masy)."""
+    if ship_state is None or not modules_data:
+        return None
+    curve, _error = _resolve_curve(ship_state, modules_data)
+    return curve
+
+
+def clear_jump_range_curve_cache() -> None:
+    with _CURVE_CACHE_LOCK:
+        _CURVE_CACHE.clear()
+
+
+def compute_jump_range_batch(
+    ship_state: Any,
+    modules_data: Dict[str, Any],
+    fuel_main_t: Sequence[float],
+    cargo_t: Sequence[float] | float | None = None,
+) -> Optional[List[Optional[float]]]:
+    """
+    Zasiegi dla serii stanow paliwa/ladunku (planery modelujace zuzycie
+    paliwa na trasie). cargo_t=None -> biezacy ladunek statku. Rezerwuar
+    i zaokraglenie jak w compute_jump_range_current(). None gdy brak krzywej.
+    """
+    curve = get_jump_range_curve(ship_state, modules_data)
+    if curve is None or curve.unladen_mass_t is None:
+        return None
+    if cargo_t is None:
+        cargo_t = _optional_float(getattr(ship_state, "cargo_mass_t", None)) or 0.0
+    reservoir = 0.0
+    if bool(config.get("jump_range_include_reservoir_mass", True)):
+        reservoir = _optional_float(getattr(ship_state, "fuel_reservoir_t", None)) or 0.0
+    ranges = curve.ranges(fuel_main_t, cargo_t, fuel_reservoir_t=reservoir)
+    rounding = _rounding_digits()
+    if rounding is None or rounding < 0:
+        return ranges
+    return [round(value, rounding) if value is not None else None for value in ranges]
+
+
+def _rounding_digits() -> Optional[int]:
+    rounding = config.get("jump_range_rounding", 2)
+    try:
+        return int(rounding)
+    except Exception:
+        return 2
+
+
+def compute_jump_range_current(
+    ship_state: Any,
+    modules_data: Dict[str, Any],
+    *,
+    curve: Optional[JumpRangeCurve] = None,
+) -> JumpRangeResult:
+    """
+    Zasieg dla biezacego paliwa/ladunku. curve = krzywa rozwiazana wczesniej
+    dla tego loadoutu (ShipState trzyma ja miedzy tickami Status.json) -
+    pomija wtedy wyliczanie sygnatury loadoutu.
+    """
     if ship_state is None:
         return JumpRangeResult(
             ok=False,
@@ -280,8 +456,10 @@ def compute_jump_range_current(ship_state: Any, modules_data: Dict[str, Any]) ->
             error="missing_ship_state",
         )
 
-    fsd_params, fsd_meta, error = _resolve_fsd_params(ship_state, modules_data)
-    if error or not fsd_params or not fsd_meta:
+    error = None
+    if curve is None:
+        curve, error = _resolve_curve(ship_state, modules_data)
+    if error or curve is None:
         return JumpRangeResult(
             ok=False,
             jump_range_ly=None,
@@ -289,6 +467,7 @@ def compute_jump_range_current(ship_state: Any, modules_data: Dict[str, Any]) ->
             jump_range_fuel_needed_t=None,
             error=error or "missing_fsd_params",
         )
+    fsd_meta = curve.meta
 
     unladen = getattr(ship_state, "unladen_mass_t", None)
     cargo = getattr(ship_state, "cargo_mass_t", None)
@@ -327,18 +506,8 @@ def compute_jump_range_current(ship_state: Any, modules_data: Dict[str, Any]) ->
             error="invalid_mass_data",
         )
 
-    try:
-        max_fuel_t = float(fsd_params.get("max_fuel", 0.0))
-    except Exception:
-        return JumpRangeResult(
-            ok=False,
-            jump_range_ly=None,
-            jump_range_limited_by="unknown",
-            jump_range_fuel_needed_t=None,
-            error="invalid_fsd_params",
-        )
-
-    fuel_limit_t = min(float(fuel_main), max_fuel_t) if fuel_main is not None else 0.0
+    max_fuel_t = curve.max_fuel_t
+    fuel_limit_t = curve.fuel_limit(fuel_main) if fuel_main is not None else 0.0
     if max_fuel_t <= 0 or fuel_main is None or fuel_main <= 0:
         limited_by = "fuel"
     elif fuel_main < max_fuel_t:
@@ -346,7 +515,7 @@ def compute_jump_range_current(ship_state: Any, modules_data: Dict[str, Any]) ->
     else:
         limited_by = "mass"
 
-    base_range = _compute_jump_range_from_params(mass_current_t, fuel_limit_t, fsd_params)
+    base_range = curve.base_range(mass_current_t, fuel_limit_t)
     if base_range is None:
         return JumpRangeResult(
             ok=False,
@@ -356,20 +525,10 @@ def compute_jump_range_current(ship_state: Any, modules_data: Dict[str, Any]) ->
             error="compute_failed",
         )
 
-    booster = getattr(ship_state, "fsd_booster", {}) or {}
-    booster_bonus = 0.0
-    try:
-        booster_bonus = float(booster.get("bonus_ly", 0.0) or 0.0)
-    except Exception:
-        booster_bonus = 0.0
-
+    booster_bonus = curve.booster_bonus_ly
     final_range = base_range + booster_bonus if base_range > 0 else 0.0
 
-    rounding = config.get("jump_range_rounding", 2)
-    try:
-        rounding = int(rounding)
-    except Exception:
-        rounding = 2
+    rounding = _rounding_digits()
 
     if rounding is not None and rounding >= 0:
         final_range = round(final_range, rounding)
@@ -380,7 +539,7 @@ def compute_jump_range_current(ship_state: Any, modules_data: Dict[str, Any]) ->
         % (
             mass_current_t,
             fuel_limit_t,
-            float(fsd_params.get("opt_mass", 0.0)),
+            curve.opt_mass_t,
             max_fuel_t,
             base_range,
             booster_bonus,
@@ -409,8 +568,8 @@ def compute_jump_range_current(ship_state: Any, modules_data: Dict[str, Any]) ->
 def compute_jump_range_loadout_max(
     ship_state: Any, modules_data: Dict[str, Any]
 ) -> JumpRangeResult:
-    fsd_params, fsd_meta, error = _resolve_fsd_params(ship_state, modules_data)
-    if error or not fsd_params or not fsd_meta:
+    curve, error = _resolve_curve(ship_state, modules_data)
+    if error or curve is None:
         return JumpRangeResult(
             ok=False,
             jump_range_ly=None,
@@ -418,6 +577,7 @@ def compute_jump_range_loadout_max(
             jump_range_fuel_needed_t=None,
             error=error or "missing_fsd_params",
         )
+    fsd_meta = curve.meta
 
     unladen = getattr(ship_state, "unladen_mass_t", None)
     if unladen is None:
@@ -429,18 +589,7 @@ def compute_jump_range_loadout_max(
             error="missing_mass_data",
         )
 
-    try:
-        max_fuel_t = float(fsd_params.get("max_fuel", 0.0))
-    except Exception:
-        return JumpRangeResult(
-            ok=False,
-            jump_range_ly=None,
-            jump_range_limited_by="unknown",
-            jump_range_fuel_needed_t=None,
-            error="invalid_fsd_params",
-        )
-
-    fuel_limit_t = max_fuel_t
+    fuel_limit_t = curve.max_fuel_t
     try:
         mass_current_t = float(unladen) + float(fuel_limit_t)
     except Exception:
@@ -452,7 +601,7 @@ def compute_jump_range_loadout_max(
             error="invalid_mass_data",
         )
 
-    base_range = _compute_jump_range_from_params(mass_current_t, fuel_limit_t, fsd_params)
+    base_range = curve.base_range(mass_current_t, fuel_limit_t)
     if base_range is None:
         return JumpRangeResult(
             ok=False,
@@ -462,20 +611,10 @@ def compute_jump_range_loadout_max(
             error="compute_failed",
         )
 
-    booster = getattr(ship_state, "fsd_booster", {}) or {}
-    booster_bonus = 0.0
-    try:
-        booster_bonus = float(booster.get("bonus_ly", 0.0) or 0.0)
-    except Exception:
-        booster_bonus = 0.0
-
+    booster_bonus = curve.booster_bonus_ly
     final_range = base_range + booster_bonus if base_range > 0 else 0.0
 
-    rounding = config.get("jump_range_rounding", 2)
-    try:
-        rounding = int(rounding)
-    except Exception:
-        rounding = 2
+    rounding = _rounding_digits()
 
     if rounding is not None and rounding >= 0:
         final_range = round(final_range, rounding)
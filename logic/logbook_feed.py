@@ -509,8 +509,8 @@ def build_logbook_info_rows(feed_item: dict[str, Any] | None) -> list[dict[str,
     return rows
 
 
-def build_logbook_summary_snapshot(feed_items: list[dict[str, Any]]) -> dict[str, Any]:
-    summary = {
+def empty_logbook_summary() -> dict[str, Any]:
+    return {
         "total_events": 0,
         "class_counts": {},
         "jump_count": 0,
@@ -522,36 +522,51 @@ def build_logbook_summary_snapshot(feed_items: list[dict[str, Any]]) -> dict[str
         "interdiction_escapes": 0,
         "uc_sold_cr": 0,
         "vista_sold_cr": 0,
+        "total_sold_cr": 0,
     }
-    class_counts: dict[str, int] = {}
 
-    for item in feed_items:
-        if not isinstance(item, dict):
-            continue
-        summary["total_events"] += 1
-        event_name = _as_text(item.get("event_name"))
-        event_class = _as_text(item.get("event_class")) or "TECH"
-        class_counts[event_class] = int(class_counts.get(event_class, 0)) + 1
-
-        if event_name in {"FSDJump", "CarrierJump"}:
-            summary["jump_count"] += 1
-        elif event_name == "Touchdown":
-            summary["landing_count"] += 1
-        elif event_name == "Docked":
-            summary["dock_count"] += 1
-        elif event_name == "JetConeBoost":
-            summary["neutron_boosts"] += 1
-        elif event_name == "HullDamage":
-            summary["hull_incidents"] += 1
-        elif event_name == "Interdicted":
-            summary["interdictions"] += 1
-        elif event_name == "EscapeInterdiction":
-            summary["interdiction_escapes"] += 1
-        elif event_name == "SellExplorationData":
-            summary["uc_sold_cr"] += _credit_value_from_feed_item(item)
-        elif event_name == "SellOrganicData":
-            summary["vista_sold_cr"] += _credit_value_from_feed_item(item)
-
-    summary["class_counts"] = class_counts
+
+def apply_logbook_summary_item(summary: dict[str, Any], item: dict[str, Any], *, sign: int = 1) -> None:
+    """
+    Dodaje (sign=1) albo odejmuje (sign=-1) jeden event z agregatow summary.
+    Pozwala utrzymywac podsumowanie feedu przyrostowo, bez przeliczania listy.
+    """
+    if not isinstance(item, dict):
+        return
+    step = 1 if int(sign) >= 0 else -1
+    summary["total_events"] += step
+    event_name = _as_text(item.get("event_name"))
+    event_class = _as_text(item.get("event_class")) or "TECH"
+    class_counts = summary.setdefault("class_counts", {})
+    count = int(class_counts.get(event_class, 0)) + step
+    if count > 0:
+        class_counts[event_class] = count
+    else:
+        class_counts.pop(event_class, None)
+
+    if event_name in {"FSDJump", "CarrierJump"}:
+        summary["jump_count"] += step
+    elif event_name == "Touchdown":
+        summary["landing_count"] += step
+    elif event_name == "Docked":
+        summary["dock_count"] += step
+    elif event_name == "JetConeBoost":
+        summary["neutron_boosts"] += step
+    elif event_name == "HullDamage":
+        summary["hull_incidents"] += step
+    elif event_name == "Interdicted":
+        summary["interdictions"] += step
+    elif event_name == "EscapeInterdiction":
+        summary["interdiction_escapes"] += step
+    elif event_name == "SellExplorationData":
+        summary["uc_sold_cr"] += step * _credit_value_from_feed_item(item)
+    elif event_name == "SellOrganicData":
+        summary["vista_sold_cr"] += step * _credit_value_from_feed_item(item)
     summary["total_sold_cr"] = int(summary["uc_sold_cr"]) + int(summary["vista_sold_cr"])
+
+
+def build_logbook_summary_snapshot(feed_items: list[dict[str, Any]]) -> dict[str, Any]:
+    summary = empty_logbook_summary()
+    for item in feed_items:
+        apply_logbook_summary_item(summary, item)
     return summary
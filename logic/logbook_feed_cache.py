@@ -2,6 +2,8 @@ from __future__ import annotations
 
 import json
 import os
+import queue
+import threading
 from typing import Any
 
 from logic.utils.renata_log import log_event_throttled
@@ -61,7 +63,7 @@ def _read_all_items(path: str) -> list[dict[str, Any]]:
                     # Tolerate a partially written/truncated line after crash.
                     log_event_throttled(
                         "logbook_feed_cache_jsonl_line",
-                        30.0,
+                        30000,
                         "WARN",
                         "logbook feed cache: invalid/truncated jsonl line skipped",
                         path=path,
@@ -72,7 +74,7 @@ def _read_all_items(path: str) -> list[dict[str, Any]]:
     except Exception:
         log_event_throttled(
             "logbook_feed_cache_read_all",
-            30.0,
+            30000,
             "WARN",
             "logbook feed cache: read failed; using empty cache",
             path=path,
@@ -106,23 +108,30 @@ def _write_all_items(path: str, items: list[dict[str, Any]]) -> None:
     os.replace(tmp_path, path)
 
 
-def append_logbook_feed_cache_item(
-    item: dict[str, Any],
+def append_logbook_feed_cache_items(
+    items: list[dict[str, Any]],
     *,
     path: str | None = None,
     limit: int = _DEFAULT_LIMIT,
 ) -> bool:
-    if not _is_valid_feed_item(item):
+    incoming = [dict(item) for item in items if _is_valid_feed_item(item)]
+    if not incoming:
         return False
     cache_path = path or _default_logbook_cache_file()
     max_items = max(1, int(limit or _DEFAULT_LIMIT))
     rows = _read_all_items(cache_path)
-    incoming_sig = _feed_item_signature(item)
-    if incoming_sig:
-        for row in rows:
-            if _feed_item_signature(row) == incoming_sig:
-                return True
-    rows.append(dict(item))
+    seen = {sig for sig in (_feed_item_signature(row) for row in rows) if sig}
+    appended = 0
+    for item in incoming:
+        sig = _feed_item_signature(item)
+        if sig:
+            if sig in seen:
+                continue
+            seen.add(sig)
+        rows.append(item)
+        appended += 1
+    if appended <= 0:
+        return True
     if len(rows) > max_items:
         rows = rows[-max_items:]
     try:
@@ -131,7 +140,7 @@ def append_logbook_feed_cache_item(
     except Exception:
         log_event_throttled(
             "logbook_feed_cache_append",
-            30.0,
+            30000,
             "WARN",
             "logbook feed cache: append/write failed",
             path=cache_path,
@@ -139,6 +148,17 @@ def append_logbook_feed_cache_item(
         return False
 
 
+def append_logbook_feed_cache_item(
+    item: dict[str, Any],
+    *,
+    path: str | None = None,
+    limit: int = _DEFAULT_LIMIT,
+) -> bool:
+    if not _is_valid_feed_item(item):
+        return False
+    return append_logbook_feed_cache_items([item], path=path, limit=limit)
+
+
 def clear_logbook_feed_cache(*, path: str | None = None) -> None:
     cache_path = path or _default_logbook_cache_file()
     try:
@@ -147,9 +167,102 @@ def clear_logbook_feed_cache(*, path: str | None = None) -> None:
     except Exception:
         log_event_throttled(
             "logbook_feed_cache_clear",
-            30.0,
+            30000,
             "WARN",
             "logbook feed cache: clear failed",
             path=cache_path,
         )
         return
+
+
+_WRITER_CLEAR = object()
+
+
+class LogbookFeedCacheWriter:
+    """
+    Zapis cache feedu poza watkiem Tk.
+
+    submit()/clear() tylko wrzucaja do kolejki; watek roboczy zbiera
+    wszystko, co sie nazbieralo, i zapisuje plik raz na paczke eventow.
+    """
+
+    def __init__(self, *, path: str | None = None, limit: int = _DEFAULT_LIMIT) -> None:
+        self.path = path
+        self.limit = max(1, int(limit or _DEFAULT_LIMIT))
+        self._queue: queue.Queue[Any] = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def submit(self, item: dict[str, Any]) -> None:
+        if not _is_valid_feed_item(item):
+            return
+        self._queue.put(dict(item))
+        self._ensure_worker()
+
+    def clear(self) -> None:
+        self._queue.put(_WRITER_CLEAR)
+        self._ensure_worker()
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Czeka, az kolejka zostanie zapisana (dla testow i zamykania)."""
+        done = threading.Event()
+        self._queue.put(done)
+        self._ensure_worker()
+        return done.wait(timeout)
+
+    def _ensure_worker(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._worker_loop,
+                name="RenataLogbookFeedCache",
+                daemon=True,
+            )
+            self._thread.start()
+
+    def _worker_loop(self) -> None:
+        while True:
+            try:
+                first = self._queue.get(timeout=5.0)
+            except queue.Empty:
+                with self._lock:
+                    if self._queue.empty():
+                        self._thread = None
+                        return
+                continue
+            batch = [first]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write_batch(batch)
+            except Exception:
+                log_event_throttled(
+                    "logbook_feed_cache_writer",
+                    30000,
+                    "WARN",
+                    "logbook feed cache: background write failed",
+                    path=self.path,
+                )
+                for entry in batch:
+                    if isinstance(entry, threading.Event):
+                        entry.set()
+
+    def _write_batch(self, batch: list[Any]) -> None:
+        pending: list[dict[str, Any]] = []
+        waiters: list[threading.Event] = []
+        for entry in batch:
+            if entry is _WRITER_CLEAR:
+                pending.clear()
+                clear_logbook_feed_cache(path=self.path)
+            elif isinstance(entry, threading.Event):
+                waiters.append(entry)
+            elif isinstance(entry, dict):
+                pending.append(entry)
+        if pending:
+            append_logbook_feed_cache_items(pending, path=self.path, limit=self.limit)
+        for waiter in waiters:
+            waiter.set()
@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import bisect
+import copy
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any
+
+from logic.logbook_feed import (
+    apply_logbook_summary_item,
+    classify_logbook_event,
+    empty_logbook_summary,
+)
+
+LOGBOOK_FEED_SORT_COLUMNS = ("time", "class", "event", "system", "location", "summary")
+LOGBOOK_FEED_CLASS_ALL = "Wszystkie (ALL)"
+
+
+def logbook_feed_item_signature(item: dict | None) -> str:
+    if not isinstance(item, dict):
+        return ""
+    parts = [
+        str(item.get("timestamp") or "").strip(),
+        str(item.get("event_name") or "").strip(),
+        str(item.get("system_name") or "").strip(),
+        str(item.get("station_name") or "").strip(),
+        str(item.get("body_name") or "").strip(),
+        str(item.get("summary") or "").strip(),
+    ]
+    if not any(parts):
+        return ""
+    return "\x1f".join(parts)
+
+
+def logbook_feed_item_class(item: dict) -> str:
+    event_class = str(item.get("event_class") or "").strip()
+    if event_class:
+        return event_class
+    event_name = str(item.get("event_name") or "").strip()
+    if event_name:
+        return str(classify_logbook_event(event_name) or "TECH").strip() or "TECH"
+    return "TECH"
+
+
+def logbook_feed_item_location(item: dict) -> str:
+    station_name = str(item.get("station_name") or "").strip()
+    body_name = str(item.get("body_name") or "").strip()
+    return station_name or body_name or "-"
+
+
+@dataclass
+class LogbookFeedChange:
+    """Wynik add(): gdzie wstawic nowy wiersz i ktore wiersze zniknely."""
+
+    added: bool = False
+    seq: int | None = None
+    visible_index: int | None = None
+    evicted_seqs: list[int] = field(default_factory=list)
+
+
+class LogbookFeedModel:
+    """
+    Przyrostowy model feedu dziennika.
+
+    - dedupe po sygnaturze w secie (O(1) zamiast skanu listy),
+    - widoczne wiersze trzymane posortowane po kluczu aktywnej kolumny
+      (bisect), wiec nowy event daje jedna pozycje do wstawienia w Treeview,
+    - agregaty podsumowania aktualizowane przy dodaniu/usunieciu wiersza.
+
+    Pelne przeliczenie (rebuild) zostaje tylko dla zmiany sortu/filtrow.
+    """
+
+    def __init__(
+        self,
+        *,
+        limit: int = 250,
+        sort_column: str = "time",
+        sort_desc: bool = True,
+        class_filter: str = LOGBOOK_FEED_CLASS_ALL,
+        show_tech: bool = False,
+        class_order: tuple[str, ...] = (),
+    ) -> None:
+        self.limit = max(1, int(limit or 1))
+        self.sort_column = sort_column if sort_column in LOGBOOK_FEED_SORT_COLUMNS else "time"
+        self.sort_desc = bool(sort_desc)
+        self.class_filter = str(class_filter or LOGBOOK_FEED_CLASS_ALL)
+        self.show_tech = bool(show_tech)
+        self._class_rank = {name: idx for idx, name in enumerate(class_order)}
+
+        self._next_seq = 0
+        self._items: OrderedDict[int, dict] = OrderedDict()
+        self._seq_signature: dict[int, str] = {}
+        self._signatures: set[str] = set()
+        self._visible_keys: list[tuple] = []
+        self._visible_seqs: list[int] = []
+        self._visible_key_by_seq: dict[int, tuple] = {}
+        self._summary = empty_logbook_summary()
+
+    # ------------------------------------------------------------------ #
+    # Odczyt
+    # ------------------------------------------------------------------ #
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @property
+    def visible_count(self) -> int:
+        return len(self._visible_seqs)
+
+    def items(self) -> list[dict]:
+        """Wszystkie eventy w kolejnosci naplywu (najstarszy pierwszy)."""
+        return list(self._items.values())
+
+    def get(self, seq: int) -> dict | None:
+        return self._items.get(seq)
+
+    def visible_seqs(self) -> list[int]:
+        """Widoczne wiersze w kolejnosci wyswietlania."""
+        if self.sort_desc:
+            return list(reversed(self._visible_seqs))
+        return list(self._visible_seqs)
+
+    def visible_rows(self) -> list[dict]:
+        return [self._items[seq] for seq in self.visible_seqs()]
+
+    def summary_snapshot(self) -> dict[str, Any]:
+        return copy.deepcopy(self._summary)
+
+    def contains(self, item: dict) -> bool:
+        sig = logbook_feed_item_signature(item)
+        return bool(sig) and sig in self._signatures
+
+    # ------------------------------------------------------------------ #
+    # Zmiany
+    # ------------------------------------------------------------------ #
+
+    def add(self, row: dict) -> LogbookFeedChange:
+        change = LogbookFeedChange()
+        if not isinstance(row, dict):
+            return change
+        sig = logbook_feed_item_signature(row)
+        if sig and sig in self._signatures:
+            return change
+
+        seq = self._next_seq
+        self._next_seq += 1
+        self._items[seq] = row
+        if sig:
+            self._signatures.add(sig)
+            self._seq_signature[seq] = sig
+
+        while len(self._items) > self.limit:
+            old_seq, _old_row = next(iter(self._items.items()))
+            self._drop(old_seq)
+            change.evicted_seqs.append(old_seq)
+
+        change.added = True
+        change.seq = seq
+        if self._is_visible(row):
+            change.visible_index = self._insert_visible(seq, row)
+        return change
+
+    def clear(self) -> None:
+        self._items.clear()
+        self._seq_signature.clear()
+        self._signatures.clear()
+        self._visible_keys.clear()
+        self._visible_seqs.clear()
+        self._visible_key_by_seq.clear()
+        self._summary = empty_logbook_summary()
+
+    def configure(
+        self,
+        *,
+        sort_column: str | None = None,
+        sort_desc: bool | None = None,
+        class_filter: str | None = None,
+        show_tech: bool | None = None,
+    ) -> bool:
+        """Zmienia sort/filtry; zwraca True, jesli trzeba przerysowac widok."""
+        changed = False
+        if sort_column is not None and sort_column in LOGBOOK_FEED_SORT_COLUMNS and sort_column != self.sort_column:
+            self.sort_column = sort_column
+            changed = True
+        if sort_desc is not None and bool(sort_desc) != self.sort_desc:
+            self.sort_desc = bool(sort_desc)
+            changed = True
+        if class_filter is not None and str(class_filter) != self.class_filter:
+            self.class_filter = str(class_filter)
+            changed = True
+        if show_tech is not None and bool(show_tech) != self.show_tech:
+            self.show_tech = bool(show_tech)
+            changed = True
+        if changed:
+            self._rebuild_visible()
+        return changed
+
+    # ------------------------------------------------------------------ #
+    # Wewnetrzne
+    # ------------------------------------------------------------------ #
+
+    def _is_visible(self, row: dict) -> bool:
+        event_class = logbook_feed_item_class(row)
+        if not self.show_tech and event_class == "TECH":
+            return False
+        if self.class_filter and self.class_filter != LOGBOOK_FEED_CLASS_ALL and event_class != self.class_filter:
+            return False
+        return True
+
+    def _sort_key(self, seq: int, row: dict) -> tuple:
+        col = self.sort_column
+        ts = str(row.get("timestamp") or "")
+        if col == "time":
+            base: tuple = (ts, str(row.get("event_name") or ""))
+        elif col == "class":
+            cls = logbook_feed_item_class(row)
+            base = (self._class_rank.get(cls, len(self._class_rank)), cls, ts)
+        elif col == "event":
+            base = (str(row.get("event_name") or "").casefold(), ts)
+        elif col == "system":
+            base = (str(row.get("system_name") or "").casefold(), ts)
+        elif col == "location":
+            base = (logbook_feed_item_location(row).casefold(), ts)
+        else:
+            base = (str(row.get("summary") or "").casefold(), ts)
+        # Remisy zostaja w kolejnosci naplywu niezaleznie od kierunku sortu
+        # (jak stabilny sort z reverse=True).
+        return base + ((-seq) if self.sort_desc else seq,)
+
+    def _display_index(self, pos: int) -> int:
+        if self.sort_desc:
+            return len(self._visible_seqs) - 1 - pos
+        return pos
+
+    def _insert_visible(self, seq: int, row: dict) -> int:
+        key = self._sort_key(seq, row)
+        pos = bisect.bisect_left(self._visible_keys, key)
+        self._visible_keys.insert(pos, key)
+        self._visible_seqs.insert(pos, seq)
+        self._visible_key_by_seq[seq] = key
+        apply_logbook_summary_item(self._summary, row)
+        return self._display_index(pos)
+
+    def _drop(self, seq: int) -> None:
+        row = self._items.pop(seq, None)
+        sig = self._seq_signature.pop(seq, None)
+        if sig:
+            self._signatures.discard(sig)
+        key = self._visible_key_by_seq.pop(seq, None)
+        if key is None or row is None:
+            return
+        pos = bisect.bisect_left(self._visible_keys, key)
+        if pos < len(self._visible_seqs) and self._visible_seqs[pos] == seq:
+            del self._visible_keys[pos]
+            del self._visible_seqs[pos]
+            apply_logbook_summary_item(self._summary, row, sign=-1)
+
+    def _rebuild_visible(self) -> None:
+        entries = [
+            (self._sort_key(seq, row), seq, row)
+            for seq, row in self._items.items()
+            if self._is_visible(row)
+        ]
+        entries.sort(key=lambda entry: entry[0])
+        self._visible_keys = [entry[0] for entry in entries]
+        self._visible_seqs = [entry[1] for entry in entries]
+        self._visible_key_by_seq = {entry[1]: entry[0] for entry in entries}
+        self._summary = empty_logbook_summary()
+        for entry in entries:
+            apply_logbook_summary_item(self._summary, entry[2])
@@ -13,8 +13,10 @@ from __future__ import annotations
 
 from typing import Any, List, Tuple, Dict
 
+import config
 from logic.spansh_client import client, spansh_error, resolve_planner_jump_range
 from logic.utils import powiedz
+from logic.utils.cancellation import current_cancel_token
 
 
 def oblicz_spansh(
@@ -126,6 +128,17 @@ def oblicz_spansh_with_details(
     )
 
     if not systems:
+        systems, details = _local_route_fallback(
+            start,
+            cel,
+            zasieg,
+            eff,
+            gui_ref,
+            supercharge_mode=supercharge_mode,
+            via=via,
+        )
+        if systems:
+            return systems, details
         spansh_error(
             "NEUTRON: SPANSH nie zwrócił żadnej trasy.",
             gui_ref,
@@ -134,3 +147,58 @@ def oblicz_spansh_with_details(
         return [], []
 
     return systems, details
+
+
+def _local_route_fallback(
+    start: str,
+    cel: str,
+    zasieg: float,
+    eff: float,
+    gui_ref: Any | None,
+    *,
+    supercharge_mode: str | None,
+    via: List[str] | None,
+) -> Tuple[List[str], List[Dict[str, Any]]]:
+    """
+    Trasa z lokalnego katalogu gwiazd, gdy SPANSH nie odpowiedział.
+    Tylko prosty wariant: bez via i bez trybu overcharge (inne mnożniki).
+    """
+    if not config.get("neutron.local_plotter_enabled", True):
+        return [], []
+    if via or str(supercharge_mode or "normal").strip().lower() not in ("", "normal"):
+        return [], []
+    token = current_cancel_token()
+    if token is not None and token.cancelled:
+        return [], []
+
+    from logic.neutron_local_plotter import default_catalogue, plot_neutron_route_local
+
+    catalogue = default_catalogue()
+    if catalogue is None:
+        return [], []
+
+    start_coords = None
+    try:
+        from app.state import app_state
+
+        current = str(app_state.get_current_system_name() or "").strip()
+        if current and current.casefold() == start.casefold():
+            start_coords = getattr(app_state, "current_star_pos", None)
+    except Exception:
+        start_coords = None
+
+    systems, details = plot_neutron_route_local(
+        start,
+        cel,
+        zasieg,
+        catalogue=catalogue,
+        efficiency=eff,
+        max_expansions=int(config.get("neutron.local_plotter_max_expansions", 50_000)),
+        start_coords=start_coords,
+    )
+    if systems:
+        powiedz(
+            f"Trasa neutronowa wyliczona lokalnie (offline): {len(systems) - 1} skoków.",
+            gui_ref,
+        )
+    return systems, details
@@ -0,0 +1,268 @@
+"""
+Lokalny plotter autostrady neutronowej (bez SPANSH).
+
+Plotter szuka trasy po zwartym katalogu gwiazd (logic.star_catalogue):
+weighted A*, gdzie koszt to liczba skokow, a heurystyka to dystans do celu
+podzielony przez zasieg z supercharge (4x przy gwiezdzie neutronowej).
+Wynik ma ten sam ksztalt co SpanshClient.neutron_route(return_details=True),
+wiec zakladka Neutron i normalize_neutron_rows() dzialaja bez zmian.
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+import time
+from typing import Any, Dict, List, Sequence, Tuple
+
+import config
+from logic.star_catalogue import (
+    STAR_NEUTRON,
+    STAR_WHITE_DWARF,
+    StarCatalogue,
+    load_star_catalogue,
+)
+from logic.utils.renata_log import log_event
+
+NEUTRON_SUPERCHARGE_MULTIPLIER = 4.0
+WHITE_DWARF_SUPERCHARGE_MULTIPLIER = 1.5
+DEFAULT_MAX_EXPANSIONS = 50_000
+# Limit sasiadow na wezel (osobno dla NS/WD i zwyklych) - trzyma czas
+# plotowania w ryzach w gestych rejonach (bubble).
+_MAX_BOOST_NEIGHBOURS = 48
+_MAX_FIELD_NEIGHBOURS = 16
+_KIND_STAR_CLASS = {STAR_NEUTRON: "Neutron Star", STAR_WHITE_DWARF: "White Dwarf"}
+_START = -1
+_TARGET = -2
+
+Coords = Tuple[float, float, float]
+
+
+def _distance(a: Coords, b: Coords) -> float:
+    return math.sqrt((a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2 + (a[2] - b[2]) ** 2)
+
+
+def _weight_from_efficiency(efficiency: float) -> float:
+    # Jak eff w SPANSH: 100% = najkrotsza trasa, nizej = szybsze, mniej dokladne liczenie.
+    try:
+        eff = max(1.0, min(100.0, float(efficiency)))
+    except Exception:
+        eff = 60.0
+    return 1.0 + (100.0 - eff) / 50.0
+
+
+def _resolve_jump_range(jump_range_ly: float | None) -> float | None:
+    """Zasieg skoku: jawny -> ShipState -> jump_range_engine (aktualny loadout)."""
+    try:
+        if jump_range_ly is not None and float(jump_range_ly) > 0.0:
+            return float(jump_range_ly)
+    except Exception:
+        pass
+    try:
+        from app.state import app_state
+        from logic.jump_range_engine import compute_jump_range_current
+
+        ship_state = getattr(app_state, "ship_state", None)
+        current = getattr(ship_state, "jump_range_current_ly", None)
+        if current is not None and float(current) > 0.0:
+            return float(current)
+        result = compute_jump_range_current(ship_state, getattr(app_state, "modules_data", None) or {})
+        if result.ok and result.jump_range_ly:
+            return float(result.jump_range_ly)
+    except Exception:
+        return None
+    return None
+
+
+def _resolve_coords(
+    catalogue: StarCatalogue,
+    name: str,
+    explicit: Sequence[float] | None,
+) -> tuple[Coords | None, int | None]:
+    idx = catalogue.find(name)
+    if explicit is not None:
+        try:
+            return (float(explicit[0]), float(explicit[1]), float(explicit[2])), idx
+        except Exception:
+            pass
+    if idx is not None:
+        return catalogue.coords(idx), idx
+    return None, None
+
+
+def default_catalogue() -> StarCatalogue | None:
+    return load_star_catalogue(str(config.get("neutron.local_catalogue_path", "") or ""))
+
+
+def plot_neutron_route_local(
+    start: str,
+    target: str,
+    jump_range_ly: float | None = None,
+    *,
+    catalogue: StarCatalogue | None = None,
+    efficiency: float = 60.0,
+    supercharge_multiplier: float = NEUTRON_SUPERCHARGE_MULTIPLIER,
+    use_white_dwarfs: bool = False,
+    max_expansions: int = DEFAULT_MAX_EXPANSIONS,
+    start_coords: Sequence[float] | None = None,
+    target_coords: Sequence[float] | None = None,
+) -> Tuple[List[str], List[Dict[str, Any]]]:
+    """
+    Trasa neutronowa policzona lokalnie. Zwraca (systemy, szczegoly) jak
+    SpanshClient.neutron_route(return_details=True); ([], []) gdy brak
+    katalogu, wspolrzednych, zasiegu albo trasy w limicie ekspansji.
+    """
+    start_name = str(start or "").strip()
+    target_name = str(target or "").strip()
+    cat = catalogue if catalogue is not None else default_catalogue()
+    jump_range = _resolve_jump_range(jump_range_ly)
+    if cat is None or not start_name or not target_name or jump_range is None:
+        return [], []
+
+    start_pos, start_idx = _resolve_coords(cat, start_name, start_coords)
+    target_pos, target_idx = _resolve_coords(cat, target_name, target_coords)
+    if start_pos is None or target_pos is None:
+        log_event(
+            "NEUTRON",
+            "local plotter missing coords",
+            start_known=start_pos is not None,
+            target_known=target_pos is not None,
+        )
+        return [], []
+
+    started = time.perf_counter()
+    boost = max(1.0, float(supercharge_multiplier))
+    weight = _weight_from_efficiency(efficiency)
+    max_reach = jump_range * boost
+    kinds = cat.kinds
+
+    def _reach(node: int) -> float:
+        if node >= 0:
+            kind = kinds[node]
+            if kind == STAR_NEUTRON:
+                return max_reach
+            if use_white_dwarfs and kind == STAR_WHITE_DWARF:
+                return jump_range * WHITE_DWARF_SUPERCHARGE_MULTIPLIER
+        elif node == _START and start_idx is not None:
+            return _reach(start_idx)
+        return jump_range
+
+    def _pos(node: int) -> Coords:
+        if node == _START:
+            return start_pos
+        if node == _TARGET:
+            return target_pos
+        return cat.coords(node)
+
+    def _is_boost(idx: int) -> bool:
+        kind = kinds[idx]
+        return kind == STAR_NEUTRON or (use_white_dwarfs and kind == STAR_WHITE_DWARF)
+
+    def _heuristic(remaining: float) -> float:
+        return remaining / max_reach
+
+    start_remaining = _distance(start_pos, target_pos)
+    g_score: dict[int, int] = {_START: 0}
+    parent: dict[int, int] = {}
+    open_heap: list[tuple[float, float, int, int]] = [
+        (weight * _heuristic(start_remaining), start_remaining, 0, _START)
+    ]
+    closed: set[int] = set()
+    expansions = 0
+    found = False
+
+    while open_heap:
+        _f, remaining, g, node = heapq.heappop(open_heap)
+        if node == _TARGET:
+            found = True
+            break
+        if node in closed or g > g_score.get(node, g):
+            continue
+        closed.add(node)
+        expansions += 1
+        if expansions > max(1, int(max_expansions)):
+            break
+
+        here = _pos(node)
+        reach = _reach(node)
+        if remaining <= reach:
+            if g + 1 < g_score.get(_TARGET, 1 << 30):
+                g_score[_TARGET] = g + 1
+                parent[_TARGET] = node
+                heapq.heappush(open_heap, (float(g + 1), 0.0, g + 1, _TARGET))
+            continue
+
+        boost_rows: list[tuple[float, int]] = []
+        field_rows: list[tuple[float, int]] = []
+        for idx, _dist in cat.within(here, reach):
+            if idx in closed or idx == start_idx or idx == target_idx:
+                continue
+            left = _distance(cat.coords(idx), target_pos)
+            # Tylko skoki, ktore przyblizaja do celu.
+            if left >= remaining:
+                continue
+            (boost_rows if _is_boost(idx) else field_rows).append((left, idx))
+        candidates = heapq.nsmallest(_MAX_BOOST_NEIGHBOURS, boost_rows)
+        candidates += heapq.nsmallest(_MAX_FIELD_NEIGHBOURS, field_rows)
+
+        next_g = g + 1
+        for left, idx in candidates:
+            if next_g >= g_score.get(idx, 1 << 30):
+                continue
+            g_score[idx] = next_g
+            parent[idx] = node
+            heapq.heappush(open_heap, (next_g + weight * _heuristic(left), left, next_g, idx))
+
+    duration_ms = int((time.perf_counter() - started) * 1000)
+    if not found:
+        log_event(
+            "NEUTRON",
+            "local plotter no route",
+            expansions=expansions,
+            duration_ms=duration_ms,
+        )
+        return [], []
+
+    path = [_TARGET]
+    while path[-1] != _START:
+        path.append(parent[path[-1]])
+    path.reverse()
+
+    systems: List[str] = []
+    details: List[Dict[str, Any]] = []
+    prev_pos: Coords | None = None
+    for node in path:
+        if node == _START:
+            name = start_name if start_idx is None else cat.name(start_idx)
+        elif node == _TARGET:
+            name = target_name if target_idx is None else cat.name(target_idx)
+        else:
+            name = cat.name(node)
+        pos = _pos(node)
+        real_idx = node if node >= 0 else (start_idx if node == _START else target_idx)
+        kind = kinds[real_idx] if real_idx is not None else None
+        systems.append(name)
+        details.append(
+            {
+                "system": name,
+                "distance": round(_distance(prev_pos, pos), 2) if prev_pos is not None else 0.0,
+                "remaining": round(_distance(pos, target_pos), 2),
+                "neutron": kind == STAR_NEUTRON,
+                "jumps": 0 if prev_pos is None else 1,
+                # Katalog zna tylko NS/WD (nie do scoopowania); reszta = nieznana.
+                "star_class": _KIND_STAR_CLASS.get(kind),
+                "x": pos[0],
+                "y": pos[1],
+                "z": pos[2],
+            }
+        )
+        prev_pos = pos
+
+    log_event(
+        "NEUTRON",
+        "local plotter route",
+        jumps=len(path) - 1,
+        expansions=expansions,
+        duration_ms=duration_ms,
+    )
+    return systems, details
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from datetime import datetime, timedelta, timezone
-from typing import Any
+from typing import Any, Iterable, Iterator
 
 from logic import player_local_db
 from logic.utils.renata_log import log_event_throttled
@@ -88,6 +88,167 @@ def _max_age_for_freshness_filter(value: Any) -> timedelta | None:
     return None
 
 
+# Paczki id dla zapytan `IN (...)` (limit zmiennych SQLite jest wyzszy, ale krotsze SQL-e sa tansze).
+_ID_CHUNK_SIZE = 500
+
+_SYSTEM_NODES_SELECT_SQL = """
+    SELECT
+        id,
+        system_name,
+        system_address,
+        system_id64,
+        x, y, z,
+        primary_star_type,
+        is_neutron,
+        is_black_hole,
+        source,
+        confidence,
+        first_seen_ts,
+        last_seen_ts
+    FROM systems
+    WHERE 1=1
+"""
+
+
+def _system_nodes_where_sql(time_range: Any, source_filter: Any) -> tuple[str, list[Any]]:
+    cutoff = _cutoff_for_time_range(time_range)
+    sql = ""
+    params: list[Any] = []
+    if cutoff is not None:
+        sql += " AND COALESCE(last_seen_ts, first_seen_ts) >= ?"
+        params.append(cutoff.isoformat().replace("+00:00", "Z"))
+    # PlayerDB baseline jest observed-only; `include enriched` zostawiamy jako future-ready no-op.
+    if _as_text(source_filter).lower() in {"observed_only", "observed-only"}:
+        sql += " AND (source IS NULL OR source = '' OR lower(source) IN ('journal','market_json','playerdb'))"
+    return sql, params
+
+
+_SYSTEM_NODES_WITH_FLAGS_SELECT_SQL = """
+    SELECT
+        systems.id,
+        system_name,
+        system_address,
+        system_id64,
+        x, y, z,
+        primary_star_type,
+        is_neutron,
+        is_black_hole,
+        source,
+        confidence,
+        first_seen_ts,
+        last_seen_ts,
+        f.flags AS layer_mask,
+        f.stations_count AS layer_stations_count,
+        f.last_exploration_ts AS layer_last_exploration_ts,
+        f.last_exobio_ts AS layer_last_exobio_ts
+    FROM systems
+    LEFT JOIN system_layer_flags f ON f.system_id = systems.id
+    WHERE 1=1
+"""
+
+# Kolumny bitmaski doklejane do wierszy `get_system_nodes_with_flags`.
+LAYER_MASK_ROW_KEYS = (
+    "layer_mask",
+    "layer_stations_count",
+    "layer_last_exploration_ts",
+    "layer_last_exobio_ts",
+)
+
+
+def decode_layer_flags(
+    mask: Any,
+    *,
+    stations_count: Any = 0,
+    last_exploration_ts: Any = None,
+    last_exobio_ts: Any = None,
+    time_range: str = "all",
+) -> dict[str, Any]:
+    """
+    Bitmaska `system_layer_flags` -> flagi warstw mapy (klucze jak `get_layer_flags_for`).
+
+    Flagi stacji sa all-time (filtr freshness `any`); cash-in przycina `time_range`
+    po ostatnim ts uslugi, tak jak `get_system_action_flags`.
+    """
+    return _decode_layer_flags(
+        mask,
+        stations_count,
+        last_exploration_ts,
+        last_exobio_ts,
+        cutoff_iso=_layer_action_cutoff_iso(time_range),
+    )
+
+
+def _layer_action_cutoff_iso(time_range: Any) -> str:
+    cutoff = _cutoff_for_time_range(time_range)
+    return cutoff.isoformat().replace("+00:00", "Z") if cutoff is not None else ""
+
+
+def _decode_layer_flags(
+    mask: Any,
+    stations_count: Any,
+    last_exploration_ts: Any,
+    last_exobio_ts: Any,
+    *,
+    cutoff_iso: str,
+) -> dict[str, Any]:
+    bits = int(mask or 0)
+    exploration_ts = _as_text(last_exploration_ts) if bits & player_local_db.LAYER_FLAG_EXPLORATION else ""
+    if cutoff_iso and exploration_ts < cutoff_iso:
+        exploration_ts = ""
+    exobio_ts = _as_text(last_exobio_ts) if bits & player_local_db.LAYER_FLAG_EXOBIO else ""
+    if cutoff_iso and exobio_ts < cutoff_iso:
+        exobio_ts = ""
+    count = int(stations_count or 0) if bits & player_local_db.LAYER_FLAG_STATION else 0
+    return {
+        "has_station": count > 0,
+        "has_market": bool(bits & player_local_db.LAYER_FLAG_MARKET),
+        "has_cashin": bool(bits & player_local_db.LAYER_FLAG_CASHIN),
+        "has_exobio": bool(exobio_ts),
+        "has_exploration": bool(exploration_ts),
+        "has_incident": False,
+        "has_combat": False,
+        "stations_count": count,
+        "action_freshness_ts": max(exploration_ts, exobio_ts),
+        "error": False,
+    }
+
+
+def _system_node_from_row(row: Any) -> dict[str, Any]:
+    freshness_ts = _as_text(row["last_seen_ts"] or row["first_seen_ts"])
+    return {
+        "system_id": int(row["id"]),
+        "system_name": _as_text(row["system_name"]),
+        "system_address": row["system_address"],
+        "system_id64": row["system_id64"],
+        "x": float(row["x"]) if row["x"] is not None else None,
+        "y": float(row["y"]) if row["y"] is not None else None,
+        "z": float(row["z"]) if row["z"] is not None else None,
+        "primary_star_type": _as_text(row["primary_star_type"]),
+        "is_neutron": int(bool(row["is_neutron"])) if row["is_neutron"] is not None else 0,
+        "is_black_hole": int(bool(row["is_black_hole"])) if row["is_black_hole"] is not None else 0,
+        "first_seen_ts": _as_text(row["first_seen_ts"]),
+        "last_seen_ts": _as_text(row["last_seen_ts"]),
+        "source": _as_text(row["source"]) or "playerdb",
+        "confidence": _as_text(row["confidence"]) or "observed",
+        "freshness_ts": freshness_ts,
+    }
+
+
+def _unique_int_ids(ids: Iterable[Any] | None) -> list[int]:
+    out: set[int] = set()
+    for item in ids or []:
+        try:
+            out.add(int(item))
+        except Exception:
+            continue
+    return sorted(out)
+
+
+def _chunked(values: list[int], size: int) -> Iterator[list[int]]:
+    for start in range(0, len(values), max(1, int(size))):
+        yield values[start:start + size]
+
+
 def _age_hours(ts: str) -> float | None:
     dt = _parse_iso_ts(ts)
     if dt is None:
@@ -114,85 +275,415 @@ class MapDataProvider:
         source_filter: str = "observed_only",
         *,
         limit: int = 5000,
+        after: tuple[Any, Any] | None = None,
     ) -> tuple[list[dict[str, Any]], dict[str, Any]]:
-        cutoff = _cutoff_for_time_range(time_range)
+        """
+        Nody mapy posortowane od najswiezszych. `after=(ts, system_name)` to keyset:
+        tylko wiersze za wskazanym w tej samej kolejnosci (dobranie nodow przez delte).
+        """
         max_rows = max(1, int(limit or 5000))
-        sql = """
-            SELECT
-                system_name,
-                system_address,
-                system_id64,
-                x, y, z,
-                primary_star_type,
-                is_neutron,
-                is_black_hole,
-                source,
-                confidence,
-                first_seen_ts,
-                last_seen_ts
-            FROM systems
-            WHERE 1=1
+        where_sql, params = _system_nodes_where_sql(time_range, source_filter)
+        if after is not None:
+            after_ts = _as_text(after[0])
+            after_name = _as_text(after[1])
+            if after_ts:
+                where_sql += (
+                    " AND (COALESCE(last_seen_ts, first_seen_ts) < ?"
+                    " OR (COALESCE(last_seen_ts, first_seen_ts) = ? AND system_name > ?)"
+                    " OR COALESCE(last_seen_ts, first_seen_ts) IS NULL)"
+                )
+                params.extend([after_ts, after_ts, after_name])
+            else:
+                where_sql += " AND COALESCE(last_seen_ts, first_seen_ts) IS NULL AND system_name > ?"
+                params.append(after_name)
+        sql = _SYSTEM_NODES_SELECT_SQL + where_sql
+        sql += " ORDER BY COALESCE(last_seen_ts, first_seen_ts) DESC, system_name COLLATE NOCASE LIMIT ?"
+        params.append(max_rows)
+
+        with player_local_db.playerdb_connection(path=self.db_path, ensure_schema=True) as conn:
+            rows = conn.execute(sql, tuple(params)).fetchall()
+        rows_out = [_system_node_from_row(row) for row in rows]
+
+        return rows_out, {
+            "count": len(rows_out),
+            "limit": max_rows,
+            "time_range": _as_text(time_range) or "all",
+            "source_filter": _as_text(source_filter) or "observed_only",
+            "db_path": self.db_path,
+        }
+
+    def get_system_nodes_with_flags(
+        self,
+        bbox: tuple[float, float, float, float, float, float] | None = None,
+        limit: int = 5000,
+        *,
+        time_range: str = "all",
+        source_filter: str = "observed_only",
+    ) -> tuple[list[dict[str, Any]], dict[str, Any]]:
         """
-        params: list[Any] = []
-        if cutoff is not None:
-            sql += " AND COALESCE(last_seen_ts, first_seen_ts) >= ?"
-            params.append(cutoff.isoformat().replace("+00:00", "Z"))
-        # PlayerDB baseline jest observed-only; `include enriched` zostawiamy jako future-ready no-op.
-        if _as_text(source_filter).lower() in {"observed_only", "observed-only"}:
-            sql += " AND (source IS NULL OR source = '' OR lower(source) IN ('journal','market_json','playerdb'))"
+        Nody jak `get_system_nodes` + bitmaska `system_layer_flags` w tym samym zapytaniu
+        (`layer_mask`, `layer_stations_count`, `layer_last_*_ts`; dekoduje `decode_layer_flags`).
+
+        - `bbox` = (x_min, y_min, z_min, x_max, y_max, z_max) jak w `get_edges`,
+        - `layer_flags_available=False` (odroczony import masowy): maski sa puste,
+          flagi trzeba policzyc `get_layer_flags_for`.
+        """
+        max_rows = max(1, int(limit or 5000))
+        where_sql, params = _system_nodes_where_sql(time_range, source_filter)
+        meta: dict[str, Any] = {
+            "limit": max_rows,
+            "time_range": _as_text(time_range) or "all",
+            "source_filter": _as_text(source_filter) or "observed_only",
+            "db_path": self.db_path,
+        }
+        if bbox is not None:
+            x_min, y_min, z_min, x_max, y_max, z_max = (float(v) for v in bbox)
+            box = (
+                min(x_min, x_max), max(x_min, x_max),
+                min(y_min, y_max), max(y_min, y_max),
+                min(z_min, z_max), max(z_min, z_max),
+            )
+            where_sql += " AND x BETWEEN ? AND ? AND y BETWEEN ? AND ? AND z BETWEEN ? AND ?"
+            params.extend(box)
+            meta["bbox"] = list(box)
+        sql = _SYSTEM_NODES_WITH_FLAGS_SELECT_SQL + where_sql
         sql += " ORDER BY COALESCE(last_seen_ts, first_seen_ts) DESC, system_name COLLATE NOCASE LIMIT ?"
         params.append(max_rows)
 
-        rows_out: list[dict[str, Any]] = []
         with player_local_db.playerdb_connection(path=self.db_path, ensure_schema=True) as conn:
+            available = player_local_db.layer_flags_available(conn)
             rows = conn.execute(sql, tuple(params)).fetchall()
+        rows_out: list[dict[str, Any]] = []
         for row in rows:
-            freshness_ts = _as_text(row["last_seen_ts"] or row["first_seen_ts"])
-            rows_out.append(
-                {
-                    "system_name": _as_text(row["system_name"]),
-                    "system_address": row["system_address"],
-                    "system_id64": row["system_id64"],
-                    "x": float(row["x"]) if row["x"] is not None else None,
-                    "y": float(row["y"]) if row["y"] is not None else None,
-                    "z": float(row["z"]) if row["z"] is not None else None,
-                    "primary_star_type": _as_text(row["primary_star_type"]),
-                    "is_neutron": int(bool(row["is_neutron"])) if row["is_neutron"] is not None else 0,
-                    "is_black_hole": int(bool(row["is_black_hole"])) if row["is_black_hole"] is not None else 0,
-                    "first_seen_ts": _as_text(row["first_seen_ts"]),
-                    "last_seen_ts": _as_text(row["last_seen_ts"]),
-                    "source": _as_text(row["source"]) or "playerdb",
-                    "confidence": _as_text(row["confidence"]) or "observed",
-                    "freshness_ts": freshness_ts,
-                }
-            )
+            item = _system_node_from_row(row)
+            if available:
+                item["layer_mask"] = int(row["layer_mask"] or 0)
+                item["layer_stations_count"] = int(row["layer_stations_count"] or 0)
+                item["layer_last_exploration_ts"] = _as_text(row["layer_last_exploration_ts"])
+                item["layer_last_exobio_ts"] = _as_text(row["layer_last_exobio_ts"])
+            else:
+                item.update({key: None for key in LAYER_MASK_ROW_KEYS})
+            rows_out.append(item)
+        meta["count"] = len(rows_out)
+        meta["layer_flags_available"] = bool(available)
+        return rows_out, meta
+
+    def get_nodes_by_ids(
+        self,
+        ids: Iterable[Any],
+        time_range: str = "all",
+        source_filter: str = "observed_only",
+    ) -> tuple[list[dict[str, Any]], dict[str, Any]]:
+        """
+        Nody mapy dla wskazanych `systems.id` (delta po `playerdb_updated`).
 
+        Filtry i ksztalt wierszy jak w `get_system_nodes`; id odrzucone przez filtry
+        po prostu nie wracaja. Zapytania ida paczkami `IN (...)`, bez lookupow per node.
+        """
+        id_list = _unique_int_ids(ids)
+        where_sql, where_params = _system_nodes_where_sql(time_range, source_filter)
+        rows_out: list[dict[str, Any]] = []
+        if id_list:
+            with player_local_db.playerdb_connection(path=self.db_path, ensure_schema=True) as conn:
+                for chunk in _chunked(id_list, _ID_CHUNK_SIZE):
+                    placeholders = ",".join("?" for _ in chunk)
+                    sql = _SYSTEM_NODES_SELECT_SQL + f" AND id IN ({placeholders})" + where_sql
+                    rows = conn.execute(sql, (*chunk, *where_params)).fetchall()
+                    rows_out.extend(_system_node_from_row(row) for row in rows)
         return rows_out, {
             "count": len(rows_out),
+            "requested": len(id_list),
             "time_range": _as_text(time_range) or "all",
             "source_filter": _as_text(source_filter) or "observed_only",
             "db_path": self.db_path,
         }
 
+    def get_layer_flags_for(
+        self,
+        ids: Iterable[Any],
+        time_range: str = "all",
+        freshness_filter: str = "any",
+        *,
+        limit_per_system: int = 200,
+    ) -> tuple[dict[int, dict[str, Any]], dict[str, Any]]:
+        """
+        Flagi warstw mapy dla wskazanych `systems.id` jednym zapytaniem na paczke id.
+
+        Semantyka jak `get_station_layer_flags_for_systems` + `get_system_action_flags`:
+        stacje po adresie systemu (po nazwie, gdy adresu brak), top-N stacji per system,
+        cash-in po nazwie systemu. Klucze flag jak w `_compute_layer_flags_for_nodes` mapy.
+        """
+        id_list = _unique_int_ids(ids)
+        max_rows_per_system = max(1, int(limit_per_system or 200))
+        cutoff = _cutoff_for_time_range(time_range)
+        max_age = _max_age_for_freshness_filter(freshness_filter)
+        now = datetime.now(timezone.utc)
+
+        station_fresh_sql = "1=1"
+        station_fresh_params: list[Any] = []
+        if max_age is not None:
+            station_fresh_sql = "fresh_ts >= ?"
+            cutoff_iso = (now - max_age).isoformat().replace("+00:00", "Z")
+            # wyrazenie powtarza sie w trzech agregatach
+            station_fresh_params = [cutoff_iso, cutoff_iso, cutoff_iso]
+        cashin_time_sql = ""
+        cashin_time_params: list[Any] = []
+        if cutoff is not None:
+            cashin_time_sql = " AND c.event_ts >= ?"
+            cashin_time_params.append(cutoff.isoformat().replace("+00:00", "Z"))
+
+        meta: dict[str, Any] = {
+            "requested": len(id_list),
+            "time_range": _as_text(time_range) or "all",
+            "freshness_filter": _as_text(freshness_filter) or "any",
+            "limit_per_system": max_rows_per_system,
+            "source": "query",
+            "db_path": self.db_path,
+        }
+        # Bez filtra freshness i z domyslnym top-N flagi sa gotowe w `system_layer_flags`.
+        if id_list and max_age is None and max_rows_per_system == player_local_db.LAYER_FLAGS_STATIONS_PER_SYSTEM:
+            table_flags = self._layer_flags_from_table(id_list, time_range=time_range)
+            if table_flags is not None:
+                meta.update({"count": len(table_flags), "source": "system_layer_flags"})
+                return table_flags, meta
+
+        out: dict[int, dict[str, Any]] = {}
+        if id_list:
+            with player_local_db.playerdb_connection(path=self.db_path, ensure_schema=True) as conn:
+                for chunk in _chunked(id_list, _ID_CHUNK_SIZE):
+                    placeholders = ",".join("?" for _ in chunk)
+                    sql = f"""
+                        WITH picked AS (
+                            SELECT id, system_name, system_address FROM systems WHERE id IN ({placeholders})
+                        ),
+                        matched AS (
+                            SELECT p.id AS system_id, s.*
+                            FROM picked p JOIN stations s ON s.system_address = p.system_address
+                            WHERE p.system_address IS NOT NULL
+                            UNION ALL
+                            SELECT p.id AS system_id, s.*
+                            FROM picked p JOIN stations s ON s.system_name = p.system_name
+                            WHERE p.system_address IS NULL
+                        ),
+                        scoped AS (
+                            SELECT
+                                system_id,
+                                has_uc,
+                                has_vista,
+                                has_market,
+                                COALESCE(services_freshness_ts, last_seen_ts, first_seen_ts) AS fresh_ts,
+                                ROW_NUMBER() OVER (
+                                    PARTITION BY system_id
+                                    ORDER BY
+                                        COALESCE(distance_ls, 1e18),
+                                        COALESCE(services_freshness_ts, last_seen_ts) DESC,
+                                        station_name COLLATE NOCASE
+                                ) AS rn
+                            FROM matched
+                        ),
+                        station_flags AS (
+                            SELECT
+                                system_id,
+                                SUM(CASE WHEN {station_fresh_sql} THEN 1 ELSE 0 END) AS stations_count,
+                                MAX(CASE WHEN {station_fresh_sql} AND COALESCE(has_market, 0) != 0 THEN 1 ELSE 0 END)
+                                    AS has_market,
+                                MAX(
+                                    CASE
+                                        WHEN {station_fresh_sql} AND (COALESCE(has_uc, 0) != 0 OR COALESCE(has_vista, 0) != 0)
+                                        THEN 1
+                                        ELSE 0
+                                    END
+                                ) AS has_cashin
+                            FROM scoped
+                            WHERE rn <= ?
+                            GROUP BY system_id
+                        ),
+                        actions AS (
+                            SELECT
+                                lower(c.system_name) AS name_cf,
+                                MAX(CASE WHEN upper(c.service) = 'UC' THEN 1 ELSE 0 END) AS has_exploration,
+                                MAX(CASE WHEN upper(c.service) = 'VISTA' THEN 1 ELSE 0 END) AS has_exobio,
+                                MAX(c.event_ts) AS last_action_ts
+                            FROM cashin_history c
+                            WHERE lower(c.system_name) IN (SELECT lower(system_name) FROM picked){cashin_time_sql}
+                            GROUP BY lower(c.system_name)
+                        )
+                        SELECT
+                            p.id AS system_id,
+                            sf.stations_count,
+                            sf.has_market,
+                            sf.has_cashin,
+                            a.has_exploration,
+                            a.has_exobio,
+                            a.last_action_ts
+                        FROM picked p
+                        LEFT JOIN station_flags sf ON sf.system_id = p.id
+                        LEFT JOIN actions a ON a.name_cf = lower(p.system_name)
+                    """
+                    params = (
+                        *chunk,
+                        *station_fresh_params,
+                        max_rows_per_system,
+                        *cashin_time_params,
+                    )
+                    for row in conn.execute(sql, params).fetchall():
+                        last_action_ts = _as_text(row["last_action_ts"])
+                        has_activity = bool(last_action_ts)
+                        if has_activity and max_age is not None:
+                            dt = _parse_iso_ts(last_action_ts)
+                            has_activity = dt is not None and (now - dt) <= max_age
+                        stations_count = int(row["stations_count"] or 0)
+                        out[int(row["system_id"])] = {
+                            "has_station": stations_count > 0,
+                            "has_market": bool(int(row["has_market"] or 0)),
+                            "has_cashin": bool(int(row["has_cashin"] or 0)),
+                            "has_exobio": has_activity and bool(int(row["has_exobio"] or 0)),
+                            "has_exploration": has_activity and bool(int(row["has_exploration"] or 0)),
+                            "has_incident": False,
+                            "has_combat": False,
+                            "stations_count": stations_count,
+                            "action_freshness_ts": last_action_ts if has_activity else "",
+                            "error": False,
+                        }
+        meta["count"] = len(out)
+        return out, meta
+
+    def _layer_flags_from_table(self, id_list: list[int], *, time_range: str) -> dict[int, dict[str, Any]] | None:
+        # Triggery trzymaja wiersz flag dla kazdego systemu; brak wiersza = brak systemu.
+        cutoff_iso = _layer_action_cutoff_iso(time_range)
+        # Wiekszosc systemow ma te same flagi (np. same skoki) - dekodujemy raz na kombinacje.
+        decoded: dict[tuple[Any, ...], dict[str, Any]] = {}
+        out: dict[int, dict[str, Any]] = {}
+        with player_local_db.playerdb_connection(path=self.db_path, ensure_schema=True) as conn:
+            if not player_local_db.layer_flags_available(conn):
+                return None
+            for chunk in _chunked(id_list, _ID_CHUNK_SIZE):
+                placeholders = ",".join("?" for _ in chunk)
+                rows = conn.execute(
+                    f"""
+                    SELECT system_id, flags, stations_count, last_exploration_ts, last_exobio_ts
+                    FROM system_layer_flags
+                    WHERE system_id IN ({placeholders})
+                    """,
+                    tuple(chunk),
+                ).fetchall()
+                for system_id, *values in rows:
+                    key = tuple(values)
+                    flags = decoded.get(key)
+                    if flags is None:
+                        flags = decoded[key] = _decode_layer_flags(*values, cutoff_iso=cutoff_iso)
+                    out[int(system_id)] = dict(flags)
+        return out
+
     def get_edges(
         self,
         time_range: str = "all",
         *,
+        bbox: tuple[float, float, float, float, float, float] | None = None,
+        min_count: int = 1,
         limit: int = 10000,
     ) -> tuple[list[dict[str, Any]], dict[str, Any]]:
         """
-        F20-1 kontrakt adaptera:
-        - zwraca meta nawet jesli brak danych skokow w aktualnym schema baseline.
-        - realny renderer travel edges w F20-3 moze rozszerzyc to o ingest/query jumps.
+        Krawedzie travel grafu z rollupu `jump_edges` (para nieskierowana).
+
+        - `bbox` = (x_min, y_min, z_min, x_max, y_max, z_max); krawedz wchodzi,
+          gdy choc jeden koniec lezy w boksie (linie wychodzace poza viewport),
+        - `time_range` filtruje po `last_ts` krawedzi, `count` jest all-time,
+        - `from_key`/`to_key` sa zgodne z kluczami nodow mapy (system_address/nazwa).
+        Bez ingestu skokow zwraca pusta liste z `available=False`.
         """
-        _ = (time_range, limit)
-        return [], {
+        cutoff = _cutoff_for_time_range(time_range)
+        max_rows = max(1, int(limit or 10000))
+        meta: dict[str, Any] = {
             "count": 0,
             "time_range": _as_text(time_range) or "all",
             "available": False,
             "reason": "playerdb_jumps_not_ingested",
             "db_path": self.db_path,
         }
+        params: list[Any] = []
+        where = ["e.count >= ?"]
+        params.append(max(1, int(min_count or 1)))
+        if cutoff is not None:
+            where.append("e.last_ts >= ?")
+            params.append(cutoff.isoformat().replace("+00:00", "Z"))
+        if bbox is not None:
+            x_min, y_min, z_min, x_max, y_max, z_max = (float(v) for v in bbox)
+            box = (
+                min(x_min, x_max), max(x_min, x_max),
+                min(y_min, y_max), max(y_min, y_max),
+                min(z_min, z_max), max(z_min, z_max),
+            )
+            # Systemy z boksu z idx_systems_xyz, potem krawedzie po PK (a) i indeksie (b).
+            sql = """
+                WITH box AS (
+                    SELECT id FROM systems
+                    WHERE x BETWEEN ? AND ? AND y BETWEEN ? AND ? AND z BETWEEN ? AND ?
+                ),
+                picked AS (
+                    SELECT a_system_id, b_system_id FROM jump_edges WHERE a_system_id IN (SELECT id FROM box)
+                    UNION
+                    SELECT a_system_id, b_system_id FROM jump_edges WHERE b_system_id IN (SELECT id FROM box)
+                )
+                SELECT e.a_system_id, e.b_system_id, e.count, e.first_ts, e.last_ts,
+                       sa.system_name AS a_name, sa.system_address AS a_address,
+                       sb.system_name AS b_name, sb.system_address AS b_address
+                FROM picked p
+                JOIN jump_edges e ON e.a_system_id = p.a_system_id AND e.b_system_id = p.b_system_id
+                JOIN systems sa ON sa.id = e.a_system_id
+                JOIN systems sb ON sb.id = e.b_system_id
+            """
+            params = [*box, *params]
+            meta["bbox"] = list(box)
+        else:
+            sql = """
+                SELECT e.a_system_id, e.b_system_id, e.count, e.first_ts, e.last_ts,
+                       sa.system_name AS a_name, sa.system_address AS a_address,
+                       sb.system_name AS b_name, sb.system_address AS b_address
+                FROM jump_edges e
+                JOIN systems sa ON sa.id = e.a_system_id
+                JOIN systems sb ON sb.id = e.b_system_id
+            """
+        sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY e.last_ts DESC, e.count DESC LIMIT ?"
+        params.append(max_rows)
+
+        rows_out: list[dict[str, Any]] = []
+        with player_local_db.playerdb_connection(path=self.db_path, ensure_schema=True) as conn:
+            if conn.execute("SELECT 1 FROM jump_edges LIMIT 1;").fetchone() is None:
+                return rows_out, meta
+            rows = conn.execute(sql, tuple(params)).fetchall()
+        for row in rows:
+            from_key = _as_text(row["a_address"] if row["a_address"] is not None else row["a_name"])
+            to_key = _as_text(row["b_address"] if row["b_address"] is not None else row["b_name"])
+            if not from_key or not to_key:
+                continue
+            rows_out.append(
+                {
+                    "key": f"{from_key}->{to_key}",
+                    "from_key": from_key,
+                    "to_key": to_key,
+                    "from_system_id": int(row["a_system_id"]),
+                    "to_system_id": int(row["b_system_id"]),
+                    "from_system_name": _as_text(row["a_name"]),
+                    "to_system_name": _as_text(row["b_name"]),
+                    "count": int(row["count"] or 0),
+                    "first_ts": _as_text(row["first_ts"]),
+                    "last_ts": _as_text(row["last_ts"]),
+                    "source": "playerdb_jumps",
+                    "confidence": "observed",
+                    "freshness_ts": _as_text(row["last_ts"]),
+                }
+            )
+        meta.update(
+            {
+                "count": len(rows_out),
+                "available": True,
+                "reason": "",
+                "min_count": max(1, int(min_count or 1)),
+            }
+        )
+        return rows_out, meta
 
     def get_stations_for_system(
         self,
@@ -706,70 +1197,67 @@ class MapDataProvider:
         except Exception:
             market_filter = None
 
-        sql = """
+        price_column = "ml.buy_price" if mode_norm == "buy" else "ml.sell_price"
+        # market_latest trzyma juz last-seen per stacja; top-k idzie z indeksu
+        # idx_market_latest_best_sell / idx_market_latest_best_buy.
+        sql = f"""
             SELECT
-                ms.id AS snapshot_id,
-                ms.system_name,
-                ms.station_name,
-                ms.station_market_id,
-                ms.snapshot_ts,
-                ms.freshness_ts,
-                ms.source,
-                ms.confidence,
-                msi.commodity,
-                msi.buy_price,
-                msi.sell_price,
+                ml.snapshot_id,
+                ml.system_name,
+                ml.station_name,
+                ml.station_market_id,
+                ml.snapshot_ts,
+                ml.freshness_ts,
+                ml.source,
+                ml.confidence,
+                ml.commodity,
+                ml.buy_price,
+                ml.sell_price,
                 s.distance_ls,
                 s.distance_ls_confidence,
                 s.has_uc,
                 s.has_vista,
                 s.has_market
-            FROM market_snapshot_items msi
-            JOIN market_snapshots ms ON ms.id = msi.snapshot_id
+            FROM market_latest ml
             LEFT JOIN stations s
-              ON ms.station_market_id IS NOT NULL AND s.market_id = ms.station_market_id
-            WHERE msi.commodity = ? COLLATE NOCASE
+              ON ml.station_market_id IS NOT NULL AND s.market_id = ml.station_market_id
+            WHERE ml.commodity = ? COLLATE NOCASE
+              AND {price_column} IS NOT NULL
         """
         params: list[Any] = [commodity_name]
         if system_filter:
-            sql += " AND ms.system_name = ? COLLATE NOCASE"
+            sql += " AND ml.system_name = ? COLLATE NOCASE"
             params.append(system_filter)
         if market_filter is not None:
-            sql += " AND ms.station_market_id = ?"
+            sql += " AND ml.station_market_id = ?"
             params.append(market_filter)
         elif station_filter:
-            sql += " AND ms.station_name = ? COLLATE NOCASE"
+            sql += " AND ml.station_name = ? COLLATE NOCASE"
             params.append(station_filter)
         if cutoff is not None:
-            sql += " AND ms.snapshot_ts >= ?"
+            sql += " AND ml.snapshot_ts >= ?"
             params.append(cutoff.isoformat().replace("+00:00", "Z"))
+        now = datetime.now(timezone.utc)
+        if max_age is not None:
+            sql += " AND ml.freshness_ts >= ?"
+            params.append((now - max_age).isoformat().replace("+00:00", "Z"))
         if mode_norm == "sell":
-            sql += " AND msi.sell_price IS NOT NULL"
+            sql += " ORDER BY ml.sell_price DESC, ml.freshness_ts ASC, ml.station_name COLLATE NOCASE ASC"
         else:
-            sql += " AND msi.buy_price IS NOT NULL"
-        sql += " ORDER BY ms.snapshot_ts DESC, ms.id DESC"
+            sql += " ORDER BY ml.buy_price ASC, ml.freshness_ts ASC, ml.station_name COLLATE NOCASE ASC"
+        sql += " LIMIT ?"
+        params.append(max_rows)
 
         with player_local_db.playerdb_connection(path=self.db_path, ensure_schema=True) as conn:
             rows = conn.execute(sql, tuple(params)).fetchall()
 
-        # Last-seen per station (market_id; fallback system+station)
-        seen_keys: set[str] = set()
         filtered: list[dict[str, Any]] = []
-        now = datetime.now(timezone.utc)
         for row in rows:
             freshness_ts = _as_text(row["freshness_ts"] or row["snapshot_ts"])
             if max_age is not None:
                 dt = _parse_iso_ts(freshness_ts)
                 if dt is None or (now - dt) > max_age:
                     continue
-            key = (
-                f"mid:{int(row['station_market_id'])}"
-                if row["station_market_id"] is not None
-                else f"{_as_text(row['system_name']).casefold()}::{_as_text(row['station_name']).casefold()}"
-            )
-            if key in seen_keys:
-                continue
-            seen_keys.add(key)
             price_value = row["buy_price"] if mode_norm == "buy" else row["sell_price"]
             filtered.append(
                 {
@@ -797,12 +1285,6 @@ class MapDataProvider:
                 }
             )
 
-        if mode_norm == "sell":
-            filtered.sort(key=lambda r: (-int(r["price"]), _as_text(r["freshness_ts"]), _as_text(r["station_name"]).casefold()))
-        else:
-            filtered.sort(key=lambda r: (int(r["price"]) if r["price"] is not None else 10**18, _as_text(r["freshness_ts"]), _as_text(r["station_name"]).casefold()))
-        filtered = filtered[:max_rows]
-
         return filtered, {
             "count": len(filtered),
             "commodity": commodity_name,
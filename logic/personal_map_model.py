@@ -0,0 +1,350 @@
+from __future__ import annotations
+
+import bisect
+import string
+from typing import Any
+
+from logic import player_local_db
+from logic.utils.renata_log import log_event_throttled
+
+# Limit nodow jak domyslny `MapDataProvider.get_system_nodes(limit=...)`.
+MAP_NODES_LIMIT = 5000
+
+_NOCASE_TABLE = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+def _as_text(value: Any) -> str:
+    return str(value or "").strip()
+
+
+def _as_optional_int(value: Any) -> int | None:
+    try:
+        if value is None:
+            return None
+        return int(value)
+    except Exception:
+        return None
+
+
+def node_key_from_row(row: dict[str, Any]) -> str:
+    # Ten sam klucz co `JournalMapTab._node_key_from_row` i krawedzie `get_edges`.
+    return _as_text(row.get("key") or row.get("system_address") or row.get("system_name"))
+
+
+def _node_rank(row: dict[str, Any]) -> tuple[tuple[int, ...], str]:
+    """
+    Klucz rosnacy zgodny z `ORDER BY COALESCE(last_seen_ts, first_seen_ts) DESC,
+    system_name COLLATE NOCASE` z `get_system_nodes`.
+
+    DESC na tekscie = odwrocone kody znakow (+ znacznik konca, zeby dluzszy tekst
+    z tym samym prefiksem byl wczesniej); brak ts laduje na koncu jak NULL w SQLite.
+    """
+    ts = _as_text(row.get("last_seen_ts") or row.get("first_seen_ts"))
+    ts_key: tuple[int, ...] = (1,) if not ts else tuple(-ord(ch) for ch in ts) + (0,)
+    return ts_key, _as_text(row.get("system_name")).translate(_NOCASE_TABLE)
+
+
+class MapNodeModel:
+    """
+    Model nodow Personal Galaxy Map: `systems.id` -> wiersz noda + flagi warstw.
+
+    Trzyma top-`limit` wierszy w kolejnosci `get_system_nodes` (przed filtrem freshness,
+    ktory UI naklada przy renderze) i krawedzie jako pary id z `jump_edges`. Delty
+    `PlayerDbChangeSet` dociagaja tylko dotkniete systemy (`get_nodes_by_ids`,
+    `get_layer_flags_for`); gdy delta nie da sie zastosowac wiernie, wynik prosi
+    o pelny reload.
+    """
+
+    def __init__(self, *, limit: int = MAP_NODES_LIMIT) -> None:
+        self.limit = max(1, int(limit))
+        self.loaded = False
+        self.time_range = "all"
+        self.source_filter = "observed_only"
+        self.freshness_filter = "any"
+        self.schema_version = 0
+        self.rows_by_id: dict[int, dict[str, Any]] = {}
+        self.flags_by_id: dict[int, dict[str, Any]] = {}
+        self.edge_pairs: set[tuple[int, int]] = set()
+        self._ranked: list[tuple[tuple[tuple[int, ...], str], int]] = []
+
+    def reset(self) -> None:
+        self.loaded = False
+        self.rows_by_id = {}
+        self.flags_by_id = {}
+        self.edge_pairs = set()
+        self._ranked = []
+
+    def load(
+        self,
+        rows: list[dict[str, Any]] | None,
+        *,
+        edges: list[dict[str, Any]] | None = None,
+        flags_by_key: dict[str, dict[str, Any]] | None = None,
+        time_range: str = "all",
+        source_filter: str = "observed_only",
+        freshness_filter: str = "any",
+        limit: int | None = None,
+    ) -> bool:
+        """
+        Stan po pelnym reloadzie. Zwraca False (model nieaktywny), gdy provider
+        nie daje `system_id` nodow/krawedzi - wtedy kazdy update to pelny reload.
+        """
+        self.reset()
+        if limit is not None:
+            self.limit = max(1, int(limit))
+        self.time_range = _as_text(time_range) or "all"
+        self.source_filter = _as_text(source_filter) or "observed_only"
+        self.freshness_filter = _as_text(freshness_filter) or "any"
+        self.schema_version = int(player_local_db.PLAYERDB_SCHEMA_VERSION)
+        flags_source = dict(flags_by_key or {})
+        for row in rows or []:
+            if not isinstance(row, dict):
+                continue
+            system_id = _as_optional_int(row.get("system_id"))
+            if system_id is None:
+                self.reset()
+                return False
+            item = dict(row)
+            self.rows_by_id[system_id] = item
+            self._ranked.append((_node_rank(item), system_id))
+            flags = flags_source.get(node_key_from_row(item))
+            if isinstance(flags, dict):
+                self.flags_by_id[system_id] = dict(flags)
+        self._ranked.sort()
+        for edge in edges or []:
+            if not isinstance(edge, dict):
+                continue
+            a_id = _as_optional_int(edge.get("from_system_id"))
+            b_id = _as_optional_int(edge.get("to_system_id"))
+            if a_id is None or b_id is None:
+                self.reset()
+                return False
+            self.edge_pairs.add((min(a_id, b_id), max(a_id, b_id)))
+        self.loaded = True
+        return True
+
+    def node_key(self, system_id: int) -> str | None:
+        row = self.rows_by_id.get(int(system_id))
+        return node_key_from_row(row) if row is not None else None
+
+    def ordered_rows(self) -> list[dict[str, Any]]:
+        return [dict(self.rows_by_id[system_id]) for _rank, system_id in self._ranked]
+
+    def flags_by_key(self) -> dict[str, dict[str, Any]]:
+        out: dict[str, dict[str, Any]] = {}
+        for system_id, flags in self.flags_by_id.items():
+            key = self.node_key(system_id)
+            if key:
+                out[key] = dict(flags)
+        return out
+
+    def _edge_row(self, pair: tuple[int, int]) -> dict[str, Any] | None:
+        from_key = self.node_key(pair[0])
+        to_key = self.node_key(pair[1])
+        if not from_key or not to_key:
+            return None
+        return {
+            "key": f"{from_key}->{to_key}",
+            "from_key": from_key,
+            "to_key": to_key,
+            "from_system_id": int(pair[0]),
+            "to_system_id": int(pair[1]),
+            "source": "playerdb_jumps",
+        }
+
+    def edge_rows(self) -> list[dict[str, Any]]:
+        # Tylko krawedzie z oboma koncami w modelu (reszta i tak sie nie rysuje).
+        out: list[dict[str, Any]] = []
+        for pair in sorted(self.edge_pairs):
+            row = self._edge_row(pair)
+            if row is not None:
+                out.append(row)
+        return out
+
+    def snapshot(self) -> dict[str, Any]:
+        rows = self.ordered_rows()
+        return {
+            "order": [node_key_from_row(row) for row in rows],
+            "nodes": {node_key_from_row(row): row for row in rows},
+            "flags": self.flags_by_key(),
+            "edges": sorted(row["key"] for row in self.edge_rows()),
+        }
+
+    def _remove(self, system_id: int) -> dict[str, Any] | None:
+        row = self.rows_by_id.pop(system_id, None)
+        self.flags_by_id.pop(system_id, None)
+        if row is None:
+            return None
+        entry = (_node_rank(row), system_id)
+        idx = bisect.bisect_left(self._ranked, entry)
+        if idx < len(self._ranked) and self._ranked[idx] == entry:
+            del self._ranked[idx]
+        return row
+
+    def _refill_below(self, provider: Any, boundary_row: dict[str, Any], above: int) -> set[int] | None:
+        # Pod granica model nie zna kolejnosci - zostawiamy tylko wiersze nad nia
+        # i dociagamy brakujace z bazy w kolejnosci `get_system_nodes`.
+        for _rank, system_id in self._ranked[above:]:
+            self.rows_by_id.pop(system_id, None)
+            self.flags_by_id.pop(system_id, None)
+        del self._ranked[above:]
+        after = (
+            _as_text(boundary_row.get("last_seen_ts") or boundary_row.get("first_seen_ts")),
+            _as_text(boundary_row.get("system_name")),
+        )
+        try:
+            rows, _meta = provider.get_system_nodes(
+                time_range=self.time_range,
+                source_filter=self.source_filter,
+                limit=self.limit - above,
+                after=after,
+            )
+        except TypeError:
+            # Provider bez keysetu `after`.
+            return None
+        refill: set[int] = set()
+        for row in rows or []:
+            item = dict(row)
+            system_id = _as_optional_int(item.get("system_id"))
+            if system_id is None:
+                return None
+            self.rows_by_id[system_id] = item
+            bisect.insort(self._ranked, (_node_rank(item), system_id))
+            refill.add(system_id)
+        return refill
+
+    def _needs_full_reload(self, reason: str) -> dict[str, Any]:
+        self.loaded = False
+        return {"ok": True, "full_reload": True, "reason": reason}
+
+    def apply_changes(self, provider: Any, changes: player_local_db.PlayerDbChangeSet) -> dict[str, Any]:
+        """
+        Naklada delte na model. Wynik: `touched_keys` (nody do przerysowania, takze
+        usuniete), `removed_keys`, `renamed_keys` (stary -> nowy klucz), `added_edges`,
+        oraz liczniki `fetched_nodes`/`flag_systems` (ile systemow dotknelo SQL).
+        `full_reload=True` = model porzucony, trzeba zrobic pelny reload.
+        """
+        if not self.loaded:
+            return {"ok": False, "full_reload": True, "reason": "model_not_loaded"}
+        if int(changes.schema_version) != int(self.schema_version):
+            return self._needs_full_reload("schema_changed")
+        if any((min(pair), max(pair)) in self.edge_pairs for pair in changes.edges_removed):
+            # Rzadkie (journal nie po kolei): widok nie zdejmuje pojedynczych krawedzi.
+            return self._needs_full_reload("edges_removed")
+
+        node_ids = changes.system_ids()
+        for a_id, b_id in changes.edges:
+            node_ids.add(int(a_id))
+            node_ids.add(int(b_id))
+        fetched: dict[int, dict[str, Any]] = {}
+        if node_ids:
+            rows, _meta = provider.get_nodes_by_ids(
+                sorted(node_ids),
+                time_range=self.time_range,
+                source_filter=self.source_filter,
+            )
+            for row in rows or []:
+                system_id = _as_optional_int(dict(row).get("system_id"))
+                if system_id is not None:
+                    fetched[system_id] = dict(row)
+
+        was_full = len(self._ranked) >= self.limit
+        boundary = self._ranked[-1] if self._ranked else None
+        boundary_row = dict(self.rows_by_id[boundary[1]]) if boundary is not None else {}
+        touched_keys: set[str] = set()
+        removed_keys: set[str] = set()
+        renamed_keys: dict[str, str] = {}
+        old_keys: dict[int, str] = {}
+        for system_id in node_ids:
+            old_row = self._remove(system_id)
+            if old_row is not None:
+                old_keys[system_id] = node_key_from_row(old_row)
+        old_flags = {sid: self.flags_by_id.get(sid) for sid in changes.layer_systems}
+        for system_id, row in fetched.items():
+            self.rows_by_id[system_id] = row
+            bisect.insort(self._ranked, (_node_rank(row), system_id))
+
+        if was_full and boundary is not None:
+            # Wiersze spoza modelu rankuja nizej niz stara granica; gdy nad granica
+            # zostalo < limit wierszy (np. system odpadl z filtra zrodla), dobieramy
+            # kolejne wiersze keysetem zamiast pelnego reloadu.
+            above = bisect.bisect_right(self._ranked, boundary)
+            if above < self.limit:
+                refill = self._refill_below(provider, boundary_row, above)
+                if refill is None:
+                    return self._needs_full_reload("limit_boundary")
+                node_ids |= refill
+                fetched.update({sid: self.rows_by_id[sid] for sid in refill})
+        while len(self._ranked) > self.limit:
+            _rank, system_id = self._ranked.pop()
+            row = self.rows_by_id.pop(system_id, None)
+            self.flags_by_id.pop(system_id, None)
+            if row is not None and system_id not in fetched:
+                removed_keys.add(node_key_from_row(row))
+            fetched.pop(system_id, None)
+
+        for system_id in node_ids:
+            old_key = old_keys.get(system_id)
+            new_key = self.node_key(system_id)
+            if old_key:
+                touched_keys.add(old_key)
+                if not new_key:
+                    removed_keys.add(old_key)
+                elif new_key != old_key:
+                    renamed_keys[old_key] = new_key
+            if new_key:
+                touched_keys.add(new_key)
+        touched_keys |= removed_keys
+
+        flag_ids = sorted((node_ids | set(changes.layer_systems)) & set(self.rows_by_id))
+        if flag_ids:
+            try:
+                flags, _meta = provider.get_layer_flags_for(
+                    flag_ids,
+                    time_range=self.time_range,
+                    freshness_filter=self.freshness_filter,
+                )
+            except Exception as exc:
+                log_event_throttled(
+                    "personal_map_model:layer_flags",
+                    5000,
+                    "WARN",
+                    "map model: layer flags delta failed",
+                    error=f"{type(exc).__name__}: {exc}",
+                )
+                return self._needs_full_reload("layer_flags_failed")
+            for system_id in flag_ids:
+                new_flags = dict((flags or {}).get(system_id) or {})
+                self.flags_by_id[system_id] = new_flags
+                if system_id not in node_ids and old_flags.get(system_id) != new_flags:
+                    key = self.node_key(system_id)
+                    if key:
+                        touched_keys.add(key)
+
+        new_pairs: set[tuple[int, int]] = set()
+        for pair in changes.edges:
+            pair_norm = (min(pair), max(pair))
+            if pair_norm not in self.edge_pairs:
+                self.edge_pairs.add(pair_norm)
+                new_pairs.add(pair_norm)
+        # Nod, ktory dopiero wszedl do modelu, odslania tez swoje starsze krawedzie.
+        entered_ids = {sid for sid in node_ids if sid not in old_keys and sid in self.rows_by_id}
+        if entered_ids:
+            new_pairs |= {pair for pair in self.edge_pairs if pair[0] in entered_ids or pair[1] in entered_ids}
+        added_edges: list[dict[str, Any]] = []
+        for pair in sorted(new_pairs):
+            row = self._edge_row(pair)
+            if row is not None:
+                added_edges.append(row)
+
+        return {
+            "ok": True,
+            "full_reload": False,
+            "reason": "",
+            "touched_keys": touched_keys,
+            "removed_keys": removed_keys,
+            "renamed_keys": renamed_keys,
+            "added_edges": added_edges,
+            "fetched_nodes": len(node_ids),
+            "flag_systems": len(flag_ids),
+        }
@@ -0,0 +1,989 @@
+from __future__ import annotations
+
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import sqlite3
+import time
+from collections import deque
+from typing import Any, Callable, Iterable
+
+from logic import player_local_db
+from logic.player_local_db import (
+    _as_optional_float,
+    _as_optional_int,
+    _as_text,
+    _cashin_service_for_event,
+    _event_primary_star_type,
+    _event_starpos_xyz,
+    _event_station_type,
+    _infer_is_fleet_carrier,
+    _jump_type_for_event,
+    _journal_station_name,
+    _journal_system_address,
+    _journal_system_id64,
+    _journal_system_name,
+    _services_flags_from_list,
+    _utc_now_iso,
+)
+
+# Eventy, z ktorych import buduje wiersze PlayerDB. SAASignalsFound nie ma
+# (jeszcze) tabeli docelowej, wiec odpada juz na pre-filtrze.
+BULK_IMPORT_EVENTS = frozenset(
+    {
+        "Location",
+        "FSDJump",
+        "CarrierJump",
+        "Docked",
+        "Market",
+        "Scan",
+        "SellExplorationData",
+        "MultiSellExplorationData",
+        "SellOrganicData",
+    }
+)
+# Eventy, ktore tylko przesuwaja stan "gdzie jestem" (fallback systemu/stacji dla Sell*).
+_STATE_EVENTS = frozenset({"Location", "FSDJump", "CarrierJump", "Docked", "Undocked"})
+_PARSE_EVENTS = BULK_IMPORT_EVENTS | _STATE_EVENTS
+
+BULK_IMPORT_TXN_RECORDS = 50_000
+BULK_IMPORT_WORKER_CHUNK_RECORDS = 20_000
+# Duzy import (liczony w bajtach journali do przetworzenia) zdejmuje indeksy
+# pomocnicze na czas ladowania i odbudowuje je na koncu.
+DEFER_INDEXES_MIN_BYTES = 32 * 1024 * 1024
+_HEAD_SIG_MAX_BYTES = 1024
+_PENDING_PER_PROCESS = 4
+
+# Indeksy niepotrzebne do lookupow importu (unikalne i uzywane do dopasowan zostaja).
+DEFERRED_INDEXES = (
+    "idx_systems_last_seen_ts",
+    "idx_systems_xyz",
+    "idx_systems_seen_order",
+    "idx_stations_system",
+    "idx_stations_system_address",
+    "idx_stations_last_seen_ts",
+    "idx_stations_services",
+    "idx_jumps_from_system",
+    "idx_jumps_to_system",
+    "idx_jump_edges_b_system",
+    "idx_jump_edges_last_ts",
+    "idx_cashin_history_service",
+)
+_STATE_DEFERRED_INDEXES = "deferred_indexes"
+_STATE_PENDING_JUMPS_FROM_TS = "pending_jumps_from_ts"
+
+_JOURNAL_NAME_NEW = re.compile(r"^Journal\.(\d{4}-\d{2}-\d{2}T\d{6})\.(\d+)\.log$")
+_JOURNAL_NAME_OLD = re.compile(r"^Journal\.(\d{2})(\d{2})(\d{2})(\d{6})\.(\d+)\.log$")
+
+ProgressCallback = Callable[[dict[str, Any]], None]
+
+
+# ---------------------------------------------------------------------- #
+# Plan: ktore pliki i od jakiego offsetu
+# ---------------------------------------------------------------------- #
+
+
+def journal_sort_key(file_name: str) -> tuple[str, int, str]:
+    """Klucz chronologiczny; stary format (Journal.YYMMDDhhmmss.NN.log) przed nowym."""
+    name = os.path.basename(str(file_name))
+    match = _JOURNAL_NAME_NEW.match(name)
+    if match:
+        return (match.group(1).replace("-", ""), int(match.group(2)), name)
+    match = _JOURNAL_NAME_OLD.match(name)
+    if match:
+        yy, mm, dd, hms, part = match.groups()
+        return (f"20{yy}{mm}{dd}T{hms}", int(part), name)
+    return ("", 0, name)
+
+
+def list_journal_files(log_dir: str) -> list[str]:
+    files = glob.glob(os.path.join(str(log_dir), "Journal.*.log"))
+    return sorted(files, key=journal_sort_key)
+
+
+def _file_head_sig(path: str) -> str:
+    # Pierwsza linia (Fileheader z timestampem) identyfikuje plik; dopisywanie jej nie zmienia.
+    with open(path, "rb") as handle:
+        head = handle.readline(_HEAD_SIG_MAX_BYTES)
+    return hashlib.sha1(head).hexdigest()
+
+
+# ---------------------------------------------------------------------- #
+# Worker: plik -> kompaktowe krotki
+# ---------------------------------------------------------------------- #
+
+
+def _event_name_fast(raw: bytes) -> str:
+    idx = raw.find(b'"event":"')
+    if idx >= 0:
+        start = idx + 9
+    else:
+        idx = raw.find(b'"event":')
+        if idx < 0:
+            return ""
+        start = idx + 8
+        while start < len(raw) and raw[start] == 0x20:
+            start += 1
+        if start >= len(raw) or raw[start] != 0x22:
+            return ""
+        start += 1
+    end = raw.find(b'"', start)
+    if end < 0:
+        return ""
+    return raw[start:end].decode("ascii", "replace")
+
+
+def _track_location(state: dict[str, Any], event_name: str, ev: dict[str, Any]) -> None:
+    if event_name in ("Location", "FSDJump", "CarrierJump"):
+        state["system"] = _journal_system_name(ev) or state["system"]
+        state["address"] = _journal_system_address(ev)
+        docked = event_name == "Location" and bool(ev.get("Docked"))
+        state["station"] = _journal_station_name(ev) if docked else ""
+        state["market_id"] = _as_optional_int(ev.get("MarketID")) if docked else None
+    elif event_name == "Docked":
+        state["system"] = _journal_system_name(ev) or state["system"]
+        state["address"] = _journal_system_address(ev) or state["address"]
+        state["station"] = _journal_station_name(ev)
+        state["market_id"] = _as_optional_int(ev.get("MarketID"))
+    elif event_name == "Undocked":
+        state["station"] = ""
+        state["market_id"] = None
+
+
+def _records_for_event(event_name: str, ev: dict[str, Any], state: dict[str, Any], out: list[tuple[Any, ...]]) -> None:
+    """
+    Krotki: ("S", ts, name, address, id64, x, y, z, star_type, is_neutron, is_black_hole)
+            ("J", ts, address, name, dist, fuel, jump_type)
+            ("L", ts, address, name)  -- pozycja z Location (regula poprzednika skoku)
+            ("T", ts, system, address, station, market_id, station_type, dist_ls, services, has_uc, has_vista, has_market)
+            ("C", ts, system, station, service, earnings)
+    Semantyka jak w ingest_journal_event / ingest_star_metadata_event.
+    """
+    ts = _as_text(ev.get("timestamp"))
+    if not ts:
+        return
+    if event_name in ("Location", "FSDJump", "CarrierJump", "Scan"):
+        system_name = _journal_system_name(ev)
+        if not system_name:
+            return
+        star_type, is_neutron, is_black_hole = _event_primary_star_type(ev, event_name=event_name)
+        if event_name == "Scan" and not star_type:
+            return
+        address = _journal_system_address(ev)
+        x, y, z = _event_starpos_xyz(ev)
+        out.append(
+            (
+                "S",
+                ts,
+                system_name,
+                address,
+                _journal_system_id64(ev, fallback_address=address),
+                x,
+                y,
+                z,
+                star_type,
+                is_neutron,
+                is_black_hole,
+            )
+        )
+        if event_name == "Location":
+            out.append(("L", ts, address, system_name))
+        if event_name in ("FSDJump", "CarrierJump"):
+            out.append(
+                (
+                    "J",
+                    ts,
+                    address,
+                    system_name,
+                    _as_optional_float(ev.get("JumpDist")),
+                    _as_optional_float(ev.get("FuelUsed")),
+                    _jump_type_for_event(ev, event_name=event_name),
+                )
+            )
+        if not (event_name == "Location" and bool(ev.get("Docked"))):
+            return
+
+    if event_name in ("Location", "Docked"):
+        system_name = _journal_system_name(ev)
+        station_name = _as_text(ev.get("StationName"))
+        if not system_name or not station_name:
+            return
+        has_services = isinstance(ev.get("StationServices"), list)
+        flags = _services_flags_from_list(ev.get("StationServices")) if has_services else {}
+        out.append(
+            (
+                "T",
+                ts,
+                system_name,
+                _journal_system_address(ev),
+                station_name,
+                _as_optional_int(ev.get("MarketID") or ev.get("StationMarketID")),
+                _event_station_type(ev),
+                _as_optional_float(ev.get("DistFromStarLS") or ev.get("DistanceFromArrivalLS")),
+                bool(has_services and flags),
+                flags.get("has_uc") if has_services else None,
+                flags.get("has_vista") if has_services else None,
+                flags.get("has_market") if has_services else None,
+            )
+        )
+        return
+
+    if event_name == "Market":
+        system_name = _journal_system_name(ev) or state["system"]
+        station_name = _journal_station_name(ev) or state["station"]
+        if not system_name or not station_name:
+            return
+        out.append(
+            (
+                "T",
+                ts,
+                system_name,
+                _journal_system_address(ev) or state["address"],
+                station_name,
+                _as_optional_int(ev.get("MarketID")) or state["market_id"],
+                _as_text(ev.get("StationType")),
+                None,
+                False,
+                None,
+                None,
+                1,
+            )
+        )
+        return
+
+    service = _cashin_service_for_event(event_name)
+    if service:
+        earnings = _as_optional_int(ev.get("TotalEarnings") or ev.get("Earnings") or ev.get("Value") or ev.get("Total"))
+        if earnings is None:
+            return
+        system_name = _journal_system_name(ev) or state["system"]
+        station_name = _journal_station_name(ev) or state["station"]
+        out.append(("C", ts, system_name or None, station_name or None, service, int(earnings)))
+        if system_name and station_name:
+            out.append(
+                (
+                    "T",
+                    ts,
+                    system_name,
+                    _journal_system_address(ev) or state["address"],
+                    station_name,
+                    _as_optional_int(ev.get("MarketID") or ev.get("StationMarketID")) or state["market_id"],
+                    _as_text(ev.get("StationType")),
+                    None,
+                    False,
+                    1 if service == "UC" else None,
+                    1 if service == "VISTA" else None,
+                    None,
+                )
+            )
+
+
+def scan_journal_file(task: tuple[str, int, int]) -> dict[str, Any]:
+    """
+    Worker puli: czyta plik od `start_offset`, odsiewa linie po nazwie eventu
+    (bez json.loads) i zwraca kompaktowe krotki w kawalkach z offsetem konca.
+    Prefiks przed `start_offset` przechodzimy tylko po eventy stanu (system/stacja).
+    """
+    path, start_offset, chunk_records = task
+    state: dict[str, Any] = {"system": "", "address": None, "station": "", "market_id": None}
+    chunks: list[tuple[int, list[tuple[Any, ...]]]] = []
+    records: list[tuple[Any, ...]] = []
+    lines = 0
+    relevant = 0
+    offset = 0
+    with open(path, "rb") as handle:
+        for raw in handle:
+            if not raw.endswith(b"\n"):
+                try:
+                    json.loads(raw)
+                except Exception:
+                    break  # niedopisana ostatnia linia: wrocimy do niej przy nastepnym imporcie
+            line_start = offset
+            offset += len(raw)
+            emit = line_start >= start_offset
+            if emit:
+                lines += 1
+            event_name = _event_name_fast(raw)
+            if event_name not in _PARSE_EVENTS or (not emit and event_name not in _STATE_EVENTS):
+                continue
+            try:
+                ev = json.loads(raw)
+            except Exception:
+                continue
+            if not isinstance(ev, dict):
+                continue
+            if emit and event_name in BULK_IMPORT_EVENTS:
+                relevant += 1
+                _records_for_event(event_name, ev, state, records)
+            _track_location(state, event_name, ev)
+            if emit and len(records) >= chunk_records:
+                chunks.append((offset, records))
+                records = []
+    chunks.append((max(offset, start_offset), records))
+    return {
+        "path": path,
+        "file_name": os.path.basename(path),
+        "start_offset": int(start_offset),
+        "end_offset": max(offset, start_offset),
+        "chunks": chunks,
+        "lines": lines,
+        "relevant": relevant,
+    }
+
+
+# ---------------------------------------------------------------------- #
+# Writer: jedna transakcja na paczke, executemany
+# ---------------------------------------------------------------------- #
+
+
+def _fold_system(entry: dict[str, Any], rec: tuple[Any, ...]) -> None:
+    # Jak UPDATE w _upsert_system_observed: nowe wartosci wygrywaja, puste nie kasuja.
+    _kind, ts, name, address, id64, x, y, z, star_type, is_neutron, is_black_hole = rec
+    entry["system_name"] = name
+    if address is not None:
+        entry["system_address"] = address
+    if id64 is not None:
+        entry["system_id64"] = id64
+    if x is not None:
+        entry["x"] = x
+    if y is not None:
+        entry["y"] = y
+    if z is not None:
+        entry["z"] = z
+    if star_type:
+        entry["primary_star_type"] = star_type
+        entry["is_neutron"] = int(bool(is_neutron))
+        entry["is_black_hole"] = int(bool(is_black_hole))
+    entry["first_seen_ts"] = entry.get("first_seen_ts") or ts
+    entry["last_seen_ts"] = ts
+
+
+def _fold_station(entry: dict[str, Any], rec: tuple[Any, ...]) -> None:
+    # Jak UPDATE w _upsert_station_observed (kolejnosc chronologiczna).
+    _kind, ts, system, address, station, market_id, station_type, dist, services, has_uc, has_vista, has_market = rec
+    entry["system_name"] = system
+    if address is not None:
+        entry["system_address"] = address
+    entry["station_name"] = station
+    if market_id is not None:
+        entry["market_id"] = market_id
+    if station_type:
+        entry["station_type"] = station_type
+    entry["is_fleet_carrier"] = _infer_is_fleet_carrier(station, _as_text(station_type or "station"))
+    if dist is not None:
+        entry["distance_ls"] = dist
+        entry["distance_ls_confidence"] = "observed"
+    if has_uc is not None:
+        entry["has_uc"] = int(bool(has_uc))
+    if has_vista is not None:
+        entry["has_vista"] = int(bool(has_vista))
+    if has_market is not None:
+        entry["has_market"] = int(bool(has_market))
+    entry["first_seen_ts"] = entry.get("first_seen_ts") or ts
+    entry["last_seen_ts"] = ts
+    if services:
+        entry["services_freshness_ts"] = ts
+
+
+_SYSTEM_COLUMNS = (
+    "system_name",
+    "system_address",
+    "system_id64",
+    "x",
+    "y",
+    "z",
+    "primary_star_type",
+    "is_neutron",
+    "is_black_hole",
+    "first_seen_ts",
+    "last_seen_ts",
+)
+_STATION_COLUMNS = (
+    "system_name",
+    "system_address",
+    "station_name",
+    "market_id",
+    "station_type",
+    "is_fleet_carrier",
+    "distance_ls",
+    "distance_ls_confidence",
+    "has_uc",
+    "has_vista",
+    "has_market",
+    "first_seen_ts",
+    "last_seen_ts",
+    "services_freshness_ts",
+)
+
+
+def _select_in(conn: sqlite3.Connection, sql_prefix: str, values: list[Any]) -> list[sqlite3.Row]:
+    rows: list[sqlite3.Row] = []
+    for start in range(0, len(values), 500):
+        part = values[start:start + 500]
+        rows.extend(conn.execute(f"{sql_prefix} IN ({','.join('?' * len(part))});", tuple(part)).fetchall())
+    return rows
+
+
+class _BulkWriter:
+    """
+    Jedyny proces piszacy do SQLite. Kawalki z workerow buforuje do
+    `txn_records` krotek i zapisuje je jedna transakcja razem z checkpointami
+    plikow (offset do ktorego dane sa zatwierdzone).
+    """
+
+    def __init__(self, conn: sqlite3.Connection, *, txn_records: int) -> None:
+        self.conn = conn
+        self.txn_records = max(1, int(txn_records))
+        self.records: list[tuple[Any, ...]] = []
+        self.checkpoints: dict[str, tuple[str, int, int, int]] = {}
+        self.address_by_name: dict[str, int] = {}
+        self.stats = {
+            "transactions": 0,
+            "inserted_systems": 0,
+            "inserted_stations": 0,
+            "inserted_jumps": 0,
+            "inserted_cashin": 0,
+        }
+
+    def add_chunk(self, file_name: str, head_sig: str, end_offset: int, file_size: int, records: list[tuple[Any, ...]], lines: int) -> None:
+        self.records.extend(records)
+        prev = self.checkpoints.get(file_name)
+        events = (prev[3] if prev else 0) + int(lines)
+        self.checkpoints[file_name] = (head_sig, int(end_offset), int(file_size), events)
+        if len(self.records) >= self.txn_records:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.records and not self.checkpoints:
+            return
+        conn = self.conn
+        conn.execute("BEGIN;")
+        try:
+            ids = self._write_systems()
+            jumps_from_ts = self._write_jumps(ids)
+            self._write_stations()
+            self._write_cashin()
+            if jumps_from_ts is not None:
+                row = conn.execute(
+                    "SELECT value FROM bulk_import_state WHERE key = ?;", (_STATE_PENDING_JUMPS_FROM_TS,)
+                ).fetchone()
+                if row is None or str(row[0]) > jumps_from_ts:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO bulk_import_state(key, value) VALUES (?, ?);",
+                        (_STATE_PENDING_JUMPS_FROM_TS, jumps_from_ts),
+                    )
+            now_ts = _utc_now_iso()
+            conn.executemany(
+                """
+                INSERT INTO journal_import_progress(file_name, head_sig, file_offset, file_size, events, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(file_name) DO UPDATE SET
+                    head_sig = excluded.head_sig,
+                    file_offset = excluded.file_offset,
+                    file_size = excluded.file_size,
+                    events = journal_import_progress.events + excluded.events,
+                    updated_at = excluded.updated_at;
+                """,
+                [(name, sig, offset, size, events, now_ts) for name, (sig, offset, size, events) in self.checkpoints.items()],
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        self.records = []
+        self.checkpoints = {}
+        self.stats["transactions"] += 1
+
+    def _write_systems(self) -> tuple[dict[int, int], dict[str, int]]:
+        conn = self.conn
+        # Obserwacja bez SystemAddress laczy sie z ta z adresem po nazwie, zeby
+        # jeden system nie trafil do paczki pod dwoma kluczami.
+        address_by_name: dict[str, int] = {}
+        for rec in self.records:
+            if rec[0] == "S" and rec[3] is not None:
+                address_by_name[str(rec[2]).casefold()] = rec[3]
+        folded: dict[Any, dict[str, Any]] = {}
+        for rec in self.records:
+            if rec[0] != "S":
+                continue
+            name_key = str(rec[2]).casefold()
+            key = rec[3] if rec[3] is not None else address_by_name.get(name_key, name_key)
+            entry = folded.get(key)
+            if entry is None:
+                entry = folded[key] = {}
+            _fold_system(entry, rec)
+        self.address_by_name = address_by_name
+        if not folded:
+            return {}, {}
+
+        existing: dict[Any, sqlite3.Row] = {}
+        addresses = [key for key in folded if not isinstance(key, str)]
+        for row in _select_in(conn, "SELECT * FROM systems WHERE system_address", addresses):
+            existing[row["system_address"]] = row
+        missing = {str(entry["system_name"]).casefold(): key for key, entry in folded.items() if key not in existing}
+        for row in _select_in(conn, "SELECT * FROM systems WHERE system_name", list(missing)):
+            key = missing.get(_as_text(row["system_name"]).casefold())
+            if key is not None:
+                existing[key] = row
+
+        now_ts = _utc_now_iso()
+        inserts: list[tuple[Any, ...]] = []
+        updates: list[tuple[Any, ...]] = []
+        for key, entry in folded.items():
+            row = existing.get(key)
+            if row is None:
+                base = {"is_neutron": 0, "is_black_hole": 0}
+                base.update(entry)
+                inserts.append(tuple(base.get(col) for col in _SYSTEM_COLUMNS) + (now_ts, now_ts))
+                continue
+            merged = {col: row[col] for col in _SYSTEM_COLUMNS}
+            first_seen = merged["first_seen_ts"]
+            merged.update(entry)
+            merged["first_seen_ts"] = first_seen or entry.get("first_seen_ts")
+            updates.append(tuple(merged[col] for col in _SYSTEM_COLUMNS) + (now_ts, int(row["id"])))
+        if updates:
+            conn.executemany(
+                f"""
+                UPDATE systems SET {', '.join(f'{col} = ?' for col in _SYSTEM_COLUMNS)},
+                    source = 'journal', confidence = 'observed', updated_at = ?
+                WHERE id = ?;
+                """,
+                updates,
+            )
+        if inserts:
+            before = conn.total_changes
+            conn.executemany(
+                f"""
+                INSERT OR IGNORE INTO systems({', '.join(_SYSTEM_COLUMNS)}, source, confidence, created_at, updated_at)
+                VALUES ({', '.join('?' * len(_SYSTEM_COLUMNS))}, 'journal', 'observed', ?, ?);
+                """,
+                inserts,
+            )
+            self.stats["inserted_systems"] += int(conn.total_changes - before)
+
+        ids_by_address: dict[int, int] = {}
+        for row in _select_in(conn, "SELECT id, system_address FROM systems WHERE system_address", addresses):
+            ids_by_address[int(row["system_address"])] = int(row["id"])
+        names = [str(entry["system_name"]) for entry in folded.values()]
+        ids_by_name = {
+            _as_text(row["system_name"]).casefold(): int(row["id"])
+            for row in _select_in(conn, "SELECT id, system_name FROM systems WHERE system_name", names)
+        }
+        return ids_by_address, ids_by_name
+
+    def _write_jumps(self, ids: tuple[dict[int, int], dict[str, int]]) -> str | None:
+        # Skoki bez from_system_id i pozycje z Location; poprzednika liczy finalize
+        # (player_local_db.assign_jump_origins - ta sama regula co zywy ingest).
+        # Zwraca najstarszy ts, od ktorego poprzednicy moga byc nieaktualni.
+        ids_by_address, ids_by_name = ids
+        rows = []
+        locations = []
+        for rec in self.records:
+            if rec[0] != "J" and rec[0] != "L":
+                continue
+            name_key = str(rec[3]).casefold()
+            address = rec[2] if rec[2] is not None else self.address_by_name.get(name_key)
+            system_id = ids_by_address.get(address) if address is not None else None
+            if system_id is None:
+                system_id = ids_by_name.get(name_key)
+            if system_id is None:
+                continue
+            if rec[0] == "J":
+                rows.append((system_id, rec[1], rec[4], rec[5], rec[6]))
+            else:
+                locations.append((rec[1], system_id))
+        changed_ts: list[str] = []
+        if locations:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO journal_locations(ts, system_id) VALUES (?, ?);",
+                locations,
+            )
+            if self.conn.total_changes != before:
+                changed_ts.append(min(row[0] for row in locations))
+        if rows:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                """
+                INSERT OR IGNORE INTO jumps(from_system_id, to_system_id, ts, jump_dist, fuel_used, jump_type)
+                VALUES (NULL, ?, ?, ?, ?, ?);
+                """,
+                rows,
+            )
+            inserted = int(self.conn.total_changes - before)
+            self.stats["inserted_jumps"] += inserted
+            if inserted:
+                changed_ts.append(min(row[1] for row in rows))
+        return min(changed_ts) if changed_ts else None
+
+    def _write_stations(self) -> None:
+        conn = self.conn
+        market_by_pair: dict[tuple[str, str], int] = {}
+        for rec in self.records:
+            if rec[0] == "T" and rec[5] is not None:
+                market_by_pair[(str(rec[2]).casefold(), str(rec[4]).casefold())] = int(rec[5])
+        grouped: dict[Any, list[tuple[Any, ...]]] = {}
+        for rec in self.records:
+            if rec[0] != "T":
+                continue
+            pair = (str(rec[2]).casefold(), str(rec[4]).casefold())
+            market_id = rec[5] if rec[5] is not None else market_by_pair.get(pair)
+            key: Any = ("m", int(market_id)) if market_id is not None else ("n",) + pair
+            grouped.setdefault(key, []).append(rec)
+        if not grouped:
+            return
+
+        existing: dict[Any, sqlite3.Row] = {}
+        market_ids = [key[1] for key in grouped if key[0] == "m"]
+        for row in _select_in(conn, "SELECT * FROM stations WHERE market_id", market_ids):
+            existing[("m", int(row["market_id"]))] = row
+        # Bez dopasowania po MarketID szukamy po (system, stacja) - to tez klucz UNIQUE.
+        pending = {key: recs for key, recs in grouped.items() if key not in existing}
+        if pending:
+            station_names = sorted({str(recs[0][4]) for recs in pending.values()})
+            by_pair = {
+                (_as_text(r["system_name"]).casefold(), _as_text(r["station_name"]).casefold()): r
+                for r in _select_in(conn, "SELECT * FROM stations WHERE station_name", station_names)
+            }
+            for key, recs in pending.items():
+                row = by_pair.get((str(recs[0][2]).casefold(), str(recs[0][4]).casefold()))
+                if row is not None:
+                    existing[key] = row
+
+        now_ts = _utc_now_iso()
+        inserts: list[tuple[Any, ...]] = []
+        updates: list[tuple[Any, ...]] = []
+        for key, recs in grouped.items():
+            row = existing.get(key)
+            if row is not None:
+                entry: dict[str, Any] = {col: row[col] for col in _STATION_COLUMNS}
+            else:
+                entry = {
+                    "system_address": None,
+                    "market_id": None,
+                    "station_type": "",
+                    "distance_ls": None,
+                    "distance_ls_confidence": "unknown",
+                    "has_uc": 0,
+                    "has_vista": 0,
+                    "has_market": 0,
+                    "services_freshness_ts": None,
+                }
+            for rec in recs:
+                _fold_station(entry, rec)
+            entry["station_type"] = entry.get("station_type") or "station"
+            values = tuple(entry.get(col) for col in _STATION_COLUMNS)
+            if row is None:
+                inserts.append(values + (now_ts, now_ts))
+            else:
+                updates.append(values + (now_ts, int(row["id"])))
+        if updates:
+            conn.executemany(
+                f"""
+                UPDATE stations SET {', '.join(f'{col} = ?' for col in _STATION_COLUMNS)},
+                    source = 'journal', confidence = 'observed', updated_at = ?
+                WHERE id = ?;
+                """,
+                updates,
+            )
+        if inserts:
+            before = conn.total_changes
+            conn.executemany(
+                f"""
+                INSERT OR IGNORE INTO stations({', '.join(_STATION_COLUMNS)}, source, confidence, created_at, updated_at)
+                VALUES ({', '.join('?' * len(_STATION_COLUMNS))}, 'journal', 'observed', ?, ?);
+                """,
+                inserts,
+            )
+            self.stats["inserted_stations"] += int(conn.total_changes - before)
+
+    def _write_cashin(self) -> None:
+        rows = [rec[1:] for rec in self.records if rec[0] == "C"]
+        if not rows:
+            return
+        # Historia mogla juz wejsc zywym ingestem albo z podmienionego pliku: ten sam
+        # (ts, usluga, kwota, system) traktujemy jako duplikat.
+        before = self.conn.total_changes
+        self.conn.executemany(
+            """
+            INSERT INTO cashin_history(event_ts, system_name, station_name, service, total_earnings, source, confidence)
+            SELECT ?1, ?2, ?3, ?4, ?5, 'journal', 'observed'
+            WHERE NOT EXISTS (
+                SELECT 1 FROM cashin_history
+                WHERE event_ts = ?1 AND service = ?4 AND total_earnings = ?5 AND system_name IS ?2
+            );
+            """,
+            rows,
+        )
+        self.stats["inserted_cashin"] += int(self.conn.total_changes - before)
+
+
+# ---------------------------------------------------------------------- #
+# Indeksy i finalizacja
+# ---------------------------------------------------------------------- #
+
+
+def _state_get(conn: sqlite3.Connection, key: str) -> str | None:
+    row = conn.execute("SELECT value FROM bulk_import_state WHERE key = ?;", (key,)).fetchone()
+    return None if row is None else str(row[0])
+
+
+def _defer_indexes(conn: sqlite3.Connection) -> int:
+    rows = conn.execute(
+        f"SELECT name, sql FROM sqlite_master WHERE type = 'index' AND name IN ({','.join('?' * len(DEFERRED_INDEXES))});",
+        DEFERRED_INDEXES,
+    ).fetchall()
+    if not rows:
+        return 0
+    saved = json.loads(_state_get(conn, _STATE_DEFERRED_INDEXES) or "{}")
+    saved.update({str(row["name"]): str(row["sql"]) for row in rows if row["sql"]})
+    conn.execute("BEGIN;")
+    try:
+        # Definicje zapisujemy w tej samej transakcji co DROP: przerwany import
+        # odbuduje je przy nastepnym przebiegu.
+        conn.execute(
+            "INSERT OR REPLACE INTO bulk_import_state(key, value) VALUES (?, ?);",
+            (_STATE_DEFERRED_INDEXES, json.dumps(saved, sort_keys=True)),
+        )
+        for row in rows:
+            conn.execute(f'DROP INDEX IF EXISTS "{row["name"]}";')
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return len(rows)
+
+
+def _restore_indexes(conn: sqlite3.Connection) -> int:
+    saved = json.loads(_state_get(conn, _STATE_DEFERRED_INDEXES) or "{}")
+    if not saved:
+        return 0
+    conn.execute("BEGIN;")
+    try:
+        for sql in saved.values():
+            conn.execute(sql.replace("CREATE INDEX ", "CREATE INDEX IF NOT EXISTS ", 1) if "IF NOT EXISTS" not in sql else sql)
+        conn.execute("DELETE FROM bulk_import_state WHERE key = ?;", (_STATE_DEFERRED_INDEXES,))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return len(saved)
+
+
+def _finalize_jumps(conn: sqlite3.Connection) -> bool:
+    """
+    Poprzednik skoku wg wspolnej reguly PlayerDB (ostatni Location/FSDJump/
+    CarrierJump przed skokiem), liczony od najstarszej nowej obserwacji; potem
+    przebudowa jump_edges z tabeli jumps.
+    """
+    from_ts = _state_get(conn, _STATE_PENDING_JUMPS_FROM_TS)
+    if from_ts is None:
+        return False
+    conn.execute("BEGIN;")
+    try:
+        player_local_db.assign_jump_origins(conn, from_ts=from_ts)
+        conn.execute("DELETE FROM jump_edges;")
+        conn.execute(
+            """
+            INSERT INTO jump_edges(a_system_id, b_system_id, count, first_ts, last_ts)
+            SELECT MIN(from_system_id, to_system_id), MAX(from_system_id, to_system_id), COUNT(*), MIN(ts), MAX(ts)
+            FROM jumps
+            WHERE from_system_id IS NOT NULL AND from_system_id <> to_system_id
+            GROUP BY 1, 2;
+            """
+        )
+        conn.execute("DELETE FROM bulk_import_state WHERE key = ?;", (_STATE_PENDING_JUMPS_FROM_TS,))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return True
+
+
+def _finalize_layer_flags(conn: sqlite3.Connection) -> bool:
+    # Takze po przerwanym imporcie: odroczenie zostaje w bulk_import_state do skutku.
+    if player_local_db.layer_flags_available(conn):
+        return False
+    conn.execute("BEGIN;")
+    try:
+        player_local_db.rebuild_layer_flags(conn=conn)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return True
+
+
+# ---------------------------------------------------------------------- #
+# API
+# ---------------------------------------------------------------------- #
+
+
+def plan_bulk_import(conn: sqlite3.Connection, journal_files: Iterable[str]) -> tuple[list[tuple[str, int, str, int]], dict[str, int]]:
+    """(path, start_offset, head_sig, size) dla plikow nowych/zmienionych + statystyki pominietych."""
+    checkpoints = {
+        str(row["file_name"]): row
+        for row in conn.execute("SELECT file_name, head_sig, file_offset FROM journal_import_progress;").fetchall()
+    }
+    plan: list[tuple[str, int, str, int]] = []
+    stats = {"skipped_files": 0, "resumed_files": 0, "replaced_files": 0}
+    for path in sorted(journal_files, key=journal_sort_key):
+        try:
+            size = os.path.getsize(path)
+            head_sig = _file_head_sig(path)
+        except OSError:
+            stats["skipped_files"] += 1
+            continue
+        row = checkpoints.get(os.path.basename(path))
+        start = 0
+        if row is not None:
+            if str(row["head_sig"]) != head_sig:
+                stats["replaced_files"] += 1
+            else:
+                start = int(row["file_offset"] or 0)
+                if start >= size:
+                    stats["skipped_files"] += 1
+                    continue
+                if start > 0:
+                    stats["resumed_files"] += 1
+        plan.append((str(path), start, head_sig, size))
+    return plan, stats
+
+
+def _iter_scanned(
+    plan: list[tuple[str, int, str, int]],
+    *,
+    processes: int,
+    chunk_records: int,
+) -> Iterable[tuple[tuple[str, int, str, int], dict[str, Any]]]:
+    if processes <= 1:
+        for item in plan:
+            yield item, scan_journal_file((item[0], item[1], chunk_records))
+        return
+    # Kolejka plikow z ograniczonym oknem: workerzy parsuja do przodu, ale wyniki
+    # konsumujemy chronologicznie (ta sama semantyka co import jednoprocesowy),
+    # a pamiec nie rosnie z liczba plikow.
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(processes=processes) as pool:
+        window: deque[tuple[tuple[str, int, str, int], Any]] = deque()
+        pending = iter(plan)
+        limit = processes * _PENDING_PER_PROCESS
+        for item in pending:
+            window.append((item, pool.apply_async(scan_journal_file, ((item[0], item[1], chunk_records),))))
+            if len(window) >= limit:
+                break
+        while window:
+            item, async_result = window.popleft()
+            result = async_result.get()
+            nxt = next(pending, None)
+            if nxt is not None:
+                window.append((nxt, pool.apply_async(scan_journal_file, ((nxt[0], nxt[1], chunk_records),))))
+            yield item, result
+
+
+def bulk_import_journals(
+    journal_files: Iterable[str],
+    *,
+    path: str | None = None,
+    processes: int | None = None,
+    txn_records: int = BULK_IMPORT_TXN_RECORDS,
+    chunk_records: int = BULK_IMPORT_WORKER_CHUNK_RECORDS,
+    defer_indexes: bool | None = None,
+    unsafe_memory_journal: bool = False,
+    progress: ProgressCallback | None = None,
+) -> dict[str, Any]:
+    """
+    Import calej historii journali do PlayerDB.
+
+    Pliki parsuja workery puli (processes <= 1: w biezacym procesie, import
+    referencyjny), zapisuje tylko wolajacy. Checkpoint pliku (offset do ktorego
+    dane sa zatwierdzone) idzie w tej samej transakcji co dane, wiec przerwany
+    import wznawia sie od ostatniej paczki, a ponowny przebieg przetwarza tylko
+    nowe/zmienione pliki. Na czas importu synchronous=OFF; journal_mode=MEMORY
+    tylko na zadanie (unsafe_memory_journal), bo zabicie procesu w trakcie
+    commitu w tym trybie moze uszkodzic baze - domyslnie zostaje WAL.
+    """
+    db_path = str(path or player_local_db.default_playerdb_path())
+    workers = max(1, int(processes if processes is not None else max(1, (os.cpu_count() or 2) - 1)))
+    started = time.perf_counter()
+    files = list(journal_files)
+    summary: dict[str, Any] = {
+        "ok": True,
+        "path": db_path,
+        "files_total": len(files),
+        "files_processed": 0,
+        "lines": 0,
+        "relevant_events": 0,
+        "processes": workers,
+    }
+    with player_local_db.playerdb_connection(path=db_path, ensure_schema=True) as conn:
+        conn.execute("PRAGMA busy_timeout = 5000;")
+        plan, plan_stats = plan_bulk_import(conn, files)
+        summary.update(plan_stats)
+        bytes_total = sum(size - start for _path, start, _sig, size in plan)
+        if defer_indexes is None:
+            defer_indexes = bytes_total >= DEFER_INDEXES_MIN_BYTES
+        summary["deferred_indexes"] = _defer_indexes(conn) if (defer_indexes and plan) else 0
+        if plan:
+            # Triggery flag warstw liczylyby system per wiersz (na zdjetych indeksach);
+            # po imporcie jeden przebieg `rebuild_layer_flags`.
+            player_local_db.defer_layer_flags(conn)
+            conn.commit()
+
+        conn.execute("PRAGMA synchronous = OFF;")
+        conn.execute("PRAGMA cache_size = -65536;")
+        conn.execute("PRAGMA temp_store = MEMORY;")
+        if unsafe_memory_journal:
+            conn.execute("PRAGMA journal_mode = MEMORY;")
+        summary["journal_mode"] = str(conn.execute("PRAGMA journal_mode;").fetchone()[0])
+
+        writer = _BulkWriter(conn, txn_records=txn_records)
+        bytes_done = 0
+        try:
+            for (file_path, start, head_sig, size), result in _iter_scanned(
+                plan, processes=workers, chunk_records=chunk_records
+            ):
+                file_name = os.path.basename(file_path)
+                chunks = result["chunks"]
+                for idx, (end_offset, records) in enumerate(chunks):
+                    lines = result["lines"] if idx == len(chunks) - 1 else 0
+                    writer.add_chunk(file_name, head_sig, end_offset, size, records, lines)
+                summary["files_processed"] += 1
+                summary["lines"] += int(result["lines"])
+                summary["relevant_events"] += int(result["relevant"])
+                bytes_done += max(0, int(result["end_offset"]) - int(start))
+                if progress is not None:
+                    elapsed = max(1e-9, time.perf_counter() - started)
+                    rate = bytes_done / elapsed
+                    progress(
+                        {
+                            "phase": "import",
+                            "files_done": summary["files_processed"],
+                            "files_total": len(plan),
+                            "events": summary["lines"],
+                            "events_per_sec": round(summary["lines"] / elapsed, 1),
+                            "bytes_done": bytes_done,
+                            "bytes_total": bytes_total,
+                            "eta_sec": round(max(0, bytes_total - bytes_done) / rate, 1) if rate > 0 else None,
+                        }
+                    )
+            writer.flush()
+        finally:
+            if unsafe_memory_journal:
+                conn.execute("PRAGMA journal_mode = WAL;")
+            conn.execute("PRAGMA synchronous = NORMAL;")
+
+        if progress is not None:
+            progress({"phase": "finalize", "files_done": summary["files_processed"], "files_total": len(plan)})
+        summary["finalized_jumps"] = _finalize_jumps(conn)
+        summary["restored_indexes"] = _restore_indexes(conn)
+        summary["rebuilt_layer_flags"] = _finalize_layer_flags(conn)
+        summary.update(writer.stats)
+
+    elapsed = max(1e-9, time.perf_counter() - started)
+    summary["elapsed_sec"] = round(elapsed, 3)
+    summary["events_per_sec"] = round(summary["lines"] / elapsed, 1)
+    return summary
@@ -7,15 +7,36 @@ import hashlib
 import math
 import argparse
 import threading
+import time
 from contextlib import contextmanager
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from typing import Any, Iterator
 
-PLAYERDB_SCHEMA_VERSION = 4
+PLAYERDB_SCHEMA_VERSION = 9
 PLAYERDB_SCHEMA_NAME_V1 = "player_local_db_v1"
 PLAYERDB_SCHEMA_NAME_V2 = "player_local_db_v2_market_snapshot_unique"
 PLAYERDB_SCHEMA_NAME_V3 = "player_local_db_v3_system_star_metadata"
 PLAYERDB_SCHEMA_NAME_V4 = "player_local_db_v4_visited_nav_beacons"
+PLAYERDB_SCHEMA_NAME_V5 = "player_local_db_v5_market_latest"
+PLAYERDB_SCHEMA_NAME_V6 = "player_local_db_v6_jumps_travel_graph"
+PLAYERDB_SCHEMA_NAME_V7 = "player_local_db_v7_bulk_import_checkpoints"
+PLAYERDB_SCHEMA_NAME_V8 = "player_local_db_v8_cashin_system_index"
+PLAYERDB_SCHEMA_NAME_V9 = "player_local_db_v9_system_layer_flags"
+
+# Bity `system_layer_flags.flags` (warstwy Personal Galaxy Map).
+LAYER_FLAG_STATION = 1 << 0
+LAYER_FLAG_MARKET = 1 << 1
+LAYER_FLAG_CASHIN = 1 << 2
+LAYER_FLAG_EXPLORATION = 1 << 3
+LAYER_FLAG_EXOBIO = 1 << 4
+LAYER_FLAG_MARKET_DATA = 1 << 5
+LAYER_FLAG_TRADE = 1 << 6
+LAYER_FLAG_NAV_BEACON = 1 << 7
+# Flagi stacji licza top-N stacji systemu (jak `get_station_layer_flags_for_systems`).
+LAYER_FLAGS_STATIONS_PER_SYSTEM = 200
+# Klucz w `bulk_import_state`: utrzymanie flag wstrzymane do `rebuild_layer_flags`.
+LAYER_FLAGS_DEFERRED_STATE_KEY = "layer_flags_deferred"
 DEFAULT_FIXTURE_PREFIXES: tuple[str, ...] = (
     "F19_",
     "F20_",
@@ -33,6 +54,10 @@ DEFAULT_FIXTURE_PREFIXES: tuple[str, ...] = (
     "TEST_",
 )
 MAX_REASONABLE_MARKET_PRICE = 9_999_999
+# Ile ostatnich snapshotow rynku trzymamy per stacja (historia dla "last seen").
+MARKET_SNAPSHOT_RETENTION_PER_STATION = 12
+# Skoki na transakcje w backfillu historii (backfill_jumps_from_journals).
+JUMP_BACKFILL_CHUNK_SIZE = 20000
 _PLAYERDB_SCHEMA_ENSURED_PATHS: set[str] = set()
 _PLAYERDB_SCHEMA_ENSURED_LOCK = threading.Lock()
 
@@ -593,6 +618,514 @@ def _migrate_to_v4(conn: sqlite3.Connection) -> None:
     )
 
 
+def _migrate_to_v5(conn: sqlite3.Connection) -> None:
+    # Zmaterializowany "ostatni znany" cennik per (stacja, towar). Trade compare
+    # czyta top-k z indeksow zamiast skanowac cala historie snapshotow.
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS market_latest (
+            station_key TEXT NOT NULL,
+            commodity TEXT NOT NULL COLLATE NOCASE,
+            system_name TEXT NOT NULL COLLATE NOCASE,
+            station_name TEXT NOT NULL COLLATE NOCASE,
+            station_market_id INTEGER,
+            buy_price INTEGER,
+            sell_price INTEGER,
+            stock INTEGER,
+            demand INTEGER,
+            snapshot_id INTEGER NOT NULL,
+            snapshot_ts TEXT NOT NULL,
+            freshness_ts TEXT NOT NULL,
+            source TEXT NOT NULL DEFAULT 'market_json',
+            confidence TEXT NOT NULL DEFAULT 'observed',
+            PRIMARY KEY(station_key, commodity)
+        );
+        """
+    )
+    conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_market_latest_best_sell
+        ON market_latest(commodity, sell_price DESC, freshness_ts, snapshot_ts)
+        WHERE sell_price IS NOT NULL;
+        """
+    )
+    conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_market_latest_best_buy
+        ON market_latest(commodity, buy_price ASC, freshness_ts, snapshot_ts)
+        WHERE buy_price IS NOT NULL;
+        """
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_market_latest_snapshot ON market_latest(snapshot_id);"
+    )
+
+    # Backfill: najnowszy snapshot kazdej stacji (ta sama kolejnosc co last-seen w providerze).
+    seen_keys: set[str] = set()
+    rows = conn.execute(
+        """
+        SELECT id, system_name, station_name, station_market_id, freshness_ts
+        FROM market_snapshots
+        ORDER BY snapshot_ts DESC, id DESC;
+        """
+    ).fetchall()
+    for row in rows:
+        key = _market_station_key(
+            market_id=row["station_market_id"],
+            system_name=row["system_name"],
+            station_name=row["station_name"],
+        )
+        if key in seen_keys:
+            continue
+        seen_keys.add(key)
+        _replace_market_latest_for_station(
+            conn,
+            station_key=key,
+            snapshot_id=int(row["id"]),
+            freshness_ts=_as_text(row["freshness_ts"]),
+        )
+
+
+def _migrate_to_v6(conn: sqlite3.Connection) -> None:
+    # Graf podrozy: pojedyncze skoki + rollup krawedzi per para nieskierowana.
+    # UNIQUE(ts, to_system_id) jest kluczem idempotencji (ten sam journal drugi raz
+    # nie dubluje skokow) i jednoczesnie indeksem po ts.
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS jumps (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            from_system_id INTEGER REFERENCES systems(id) ON DELETE CASCADE,
+            to_system_id INTEGER NOT NULL REFERENCES systems(id) ON DELETE CASCADE,
+            ts TEXT NOT NULL,
+            jump_dist REAL,
+            fuel_used REAL,
+            jump_type TEXT NOT NULL DEFAULT 'hyperspace',
+            UNIQUE(ts, to_system_id)
+        );
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jumps_from_system ON jumps(from_system_id);")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jumps_to_system ON jumps(to_system_id);")
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS jump_edges (
+            a_system_id INTEGER NOT NULL REFERENCES systems(id) ON DELETE CASCADE,
+            b_system_id INTEGER NOT NULL REFERENCES systems(id) ON DELETE CASCADE,
+            count INTEGER NOT NULL DEFAULT 0,
+            first_ts TEXT NOT NULL,
+            last_ts TEXT NOT NULL,
+            PRIMARY KEY(a_system_id, b_system_id),
+            CHECK(a_system_id < b_system_id)
+        ) WITHOUT ROWID;
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jump_edges_b_system ON jump_edges(b_system_id);")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jump_edges_last_ts ON jump_edges(last_ts);")
+    # Pozycje z Location (start gry, respawn, transfer): skok po nich startuje z
+    # systemu Location, a nie z celu poprzedniego skoku (patrz _JUMP_ORIGIN_SQL).
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS journal_locations (
+            ts TEXT NOT NULL,
+            system_id INTEGER NOT NULL REFERENCES systems(id) ON DELETE CASCADE,
+            PRIMARY KEY(ts, system_id)
+        ) WITHOUT ROWID;
+        """
+    )
+    # Offset pliku journala zatwierdzony razem z danymi (wznawianie importu historii).
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS journal_import_progress (
+            file_name TEXT PRIMARY KEY,
+            file_offset INTEGER NOT NULL DEFAULT 0,
+            updated_at TEXT NOT NULL
+        );
+        """
+    )
+
+
+def _migrate_to_v7(conn: sqlite3.Connection) -> None:
+    # Checkpointy importu masowego (logic/player_db_bulk_import.py) rozszerzaja
+    # journal_import_progress z v6 o podpis naglowka (wykrywa podmieniony plik).
+    # Stare wiersze maja pusty podpis, wiec plik zostanie raz przetworzony od zera.
+    columns = {str(row[1]) for row in conn.execute("PRAGMA table_info(journal_import_progress);").fetchall()}
+    for name, ddl in (
+        ("head_sig", "TEXT NOT NULL DEFAULT ''"),
+        ("file_size", "INTEGER NOT NULL DEFAULT 0"),
+        ("events", "INTEGER NOT NULL DEFAULT 0"),
+    ):
+        if name not in columns:
+            conn.execute(f"ALTER TABLE journal_import_progress ADD COLUMN {name} {ddl};")
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS bulk_import_state (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+        """
+    )
+
+
+def _migrate_to_v8(conn: sqlite3.Connection) -> None:
+    # Flagi warstw mapy (cash-in per system) szukaja po lower(system_name); bez indeksu
+    # kazda delta mapy skanowalaby cala historie cash-in.
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_cashin_history_system_lower ON cashin_history(lower(system_name));"
+    )
+
+
+# Flagi warstw dla systemow `sy` spelniajacych {where}. Bez CTE (niedozwolone w
+# triggerach); stacje po adresie systemu, po nazwie tylko gdy adresu brak.
+_LAYER_FLAGS_COMPUTE_SQL = f"""
+    SELECT
+        id AS system_id,
+        (CASE WHEN station_pack >= 4 THEN {LAYER_FLAG_STATION} ELSE 0 END)
+        | (CASE WHEN station_pack & 2 THEN {LAYER_FLAG_MARKET} ELSE 0 END)
+        | (CASE WHEN station_pack & 1 THEN {LAYER_FLAG_CASHIN} ELSE 0 END)
+        | (CASE WHEN last_exploration_ts IS NOT NULL THEN {LAYER_FLAG_EXPLORATION} ELSE 0 END)
+        | (CASE WHEN last_exobio_ts IS NOT NULL THEN {LAYER_FLAG_EXOBIO} ELSE 0 END)
+        | (CASE WHEN has_market_data THEN {LAYER_FLAG_MARKET_DATA} ELSE 0 END)
+        | (CASE WHEN has_trade THEN {LAYER_FLAG_TRADE} ELSE 0 END)
+        | (CASE WHEN has_nav_beacon THEN {LAYER_FLAG_NAV_BEACON} ELSE 0 END) AS flags,
+        station_pack >> 2 AS stations_count,
+        last_exploration_ts,
+        last_exobio_ts
+    FROM (
+        SELECT
+            sy.id,
+            (
+                SELECT COUNT(*) * 4 + COALESCE(MAX(has_market_i), 0) * 2 + COALESCE(MAX(has_cashin_i), 0)
+                FROM (
+                    SELECT
+                        COALESCE(st.has_market, 0) != 0 AS has_market_i,
+                        (COALESCE(st.has_uc, 0) != 0 OR COALESCE(st.has_vista, 0) != 0) AS has_cashin_i,
+                        COALESCE(st.distance_ls, 1e18) AS dist_order,
+                        COALESCE(st.services_freshness_ts, st.last_seen_ts) AS fresh_order,
+                        st.station_name AS name_order
+                    FROM stations st
+                    WHERE st.system_address = sy.system_address
+                    UNION ALL
+                    SELECT
+                        COALESCE(st.has_market, 0) != 0,
+                        (COALESCE(st.has_uc, 0) != 0 OR COALESCE(st.has_vista, 0) != 0),
+                        COALESCE(st.distance_ls, 1e18),
+                        COALESCE(st.services_freshness_ts, st.last_seen_ts),
+                        st.station_name
+                    FROM stations st
+                    WHERE sy.system_address IS NULL AND st.system_name = sy.system_name
+                    ORDER BY dist_order, fresh_order DESC, name_order
+                    LIMIT {LAYER_FLAGS_STATIONS_PER_SYSTEM}
+                )
+            ) AS station_pack,
+            (
+                SELECT MAX(c.event_ts) FROM cashin_history c
+                WHERE lower(c.system_name) = lower(sy.system_name) AND upper(c.service) = 'UC'
+            ) AS last_exploration_ts,
+            (
+                SELECT MAX(c.event_ts) FROM cashin_history c
+                WHERE lower(c.system_name) = lower(sy.system_name) AND upper(c.service) = 'VISTA'
+            ) AS last_exobio_ts,
+            EXISTS (SELECT 1 FROM market_snapshots m WHERE m.system_name = sy.system_name) AS has_market_data,
+            EXISTS (SELECT 1 FROM trade_history t WHERE t.system_name = sy.system_name) AS has_trade,
+            EXISTS (
+                SELECT 1 FROM visited_nav_beacons v WHERE v.system_address = sy.system_address
+            ) AS has_nav_beacon
+        FROM systems sy
+        WHERE {{where}}
+        -- bez flatteningu: podzapytanie stacji liczy sie raz, nie per uzycie w flags
+        LIMIT -1 OFFSET 0
+    )
+"""
+
+_LAYER_FLAGS_COLUMNS = "system_id, flags, stations_count, last_exploration_ts, last_exobio_ts"
+
+# (tabela, zdarzenia, predykat na `sy` dla wiersza NEW/OLD).
+_LAYER_FLAGS_STATION_MATCH = (
+    "sy.system_address = {row}.system_address"
+    " OR (sy.system_address IS NULL AND sy.system_name = {row}.system_name)"
+)
+_LAYER_FLAGS_TRIGGER_SOURCES: tuple[tuple[str, str, str], ...] = (
+    ("stations", "INSERT", _LAYER_FLAGS_STATION_MATCH.format(row="NEW")),
+    (
+        "stations",
+        "UPDATE",
+        _LAYER_FLAGS_STATION_MATCH.format(row="NEW") + " OR " + _LAYER_FLAGS_STATION_MATCH.format(row="OLD"),
+    ),
+    ("stations", "DELETE", _LAYER_FLAGS_STATION_MATCH.format(row="OLD")),
+    ("cashin_history", "INSERT", "sy.system_name = NEW.system_name"),
+    ("cashin_history", "DELETE", "sy.system_name = OLD.system_name"),
+    ("market_snapshots", "INSERT", "sy.system_name = NEW.system_name"),
+    ("market_snapshots", "DELETE", "sy.system_name = OLD.system_name"),
+    ("trade_history", "INSERT", "sy.system_name = NEW.system_name"),
+    ("trade_history", "DELETE", "sy.system_name = OLD.system_name"),
+    ("visited_nav_beacons", "INSERT", "sy.system_address = NEW.system_address"),
+    ("visited_nav_beacons", "DELETE", "sy.system_address = OLD.system_address"),
+    ("systems", "INSERT", "sy.id = NEW.id"),
+)
+_LAYER_FLAGS_NOT_DEFERRED_SQL = (
+    f"NOT EXISTS (SELECT 1 FROM bulk_import_state WHERE key = '{LAYER_FLAGS_DEFERRED_STATE_KEY}')"
+)
+
+
+def _layer_flags_refresh_statements(where: str) -> str:
+    # DELETE + zwykly INSERT: polityka konfliktu instrukcji zewnetrznej (np. INSERT OR
+    # IGNORE w ingest) nadpisuje OR REPLACE w ciele triggera.
+    return (
+        f"DELETE FROM system_layer_flags WHERE system_id IN (SELECT sy.id FROM systems sy WHERE {where});\n"
+        f"INSERT INTO system_layer_flags({_LAYER_FLAGS_COLUMNS}) "
+        + _LAYER_FLAGS_COMPUTE_SQL.format(where=where)
+        + ";"
+    )
+
+
+def _migrate_to_v9(conn: sqlite3.Connection) -> None:
+    # Flagi warstw mapy utrzymywane triggerami przy kazdym zapisie zrodel (ingest,
+    # import masowy, sprzatanie) - odczyt mapy to lookup po PK zamiast agregacji.
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS system_layer_flags (
+            system_id INTEGER PRIMARY KEY,
+            flags INTEGER NOT NULL DEFAULT 0,
+            stations_count INTEGER NOT NULL DEFAULT 0,
+            last_exploration_ts TEXT,
+            last_exobio_ts TEXT
+        );
+        """
+    )
+    # Kolejnosc nodow mapy (`ORDER BY COALESCE(last_seen_ts, first_seen_ts) DESC,
+    # system_name`) - top-5000 z indeksu zamiast sortowania calej tabeli.
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_systems_seen_order ON systems("
+        "COALESCE(last_seen_ts, first_seen_ts) DESC, system_name COLLATE NOCASE);"
+    )
+    for table, event, where in _LAYER_FLAGS_TRIGGER_SOURCES:
+        conn.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_layer_flags_{table}_{event.lower()}
+            AFTER {event} ON {table}
+            WHEN {_LAYER_FLAGS_NOT_DEFERRED_SQL}
+            BEGIN
+                {_layer_flags_refresh_statements(where)}
+            END;
+            """
+        )
+    conn.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_layer_flags_systems_update
+        AFTER UPDATE OF system_name, system_address ON systems
+        WHEN (OLD.system_name IS NOT NEW.system_name OR OLD.system_address IS NOT NEW.system_address)
+            AND {_LAYER_FLAGS_NOT_DEFERRED_SQL}
+        BEGIN
+            {_layer_flags_refresh_statements("sy.id = NEW.id")}
+        END;
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_layer_flags_systems_delete
+        AFTER DELETE ON systems
+        BEGIN
+            DELETE FROM system_layer_flags WHERE system_id = OLD.id;
+        END;
+        """
+    )
+    _rebuild_layer_flags(conn)
+
+
+def _rebuild_layer_flags(conn: sqlite3.Connection) -> int:
+    conn.execute("DELETE FROM system_layer_flags;")
+    cur = conn.execute(
+        f"INSERT INTO system_layer_flags({_LAYER_FLAGS_COLUMNS}) " + _LAYER_FLAGS_COMPUTE_SQL.format(where="1=1") + ";"
+    )
+    conn.execute("DELETE FROM bulk_import_state WHERE key = ?;", (LAYER_FLAGS_DEFERRED_STATE_KEY,))
+    return max(0, int(cur.rowcount or 0))
+
+
+def defer_layer_flags(conn: sqlite3.Connection) -> None:
+    """Wstrzymuje triggery flag warstw (import masowy); koniec: `rebuild_layer_flags`."""
+    conn.execute(
+        "INSERT OR REPLACE INTO bulk_import_state(key, value) VALUES (?, ?);",
+        (LAYER_FLAGS_DEFERRED_STATE_KEY, _utc_now_iso()),
+    )
+
+
+def layer_flags_available(conn: sqlite3.Connection) -> bool:
+    """True, gdy `system_layer_flags` jest aktualna (nie trwa odroczony import)."""
+    if not _table_exists(conn, "system_layer_flags"):
+        return False
+    row = conn.execute(
+        "SELECT 1 FROM bulk_import_state WHERE key = ?;", (LAYER_FLAGS_DEFERRED_STATE_KEY,)
+    ).fetchone()
+    return row is None
+
+
+def rebuild_layer_flags(*, path: str | None = None, conn: sqlite3.Connection | None = None) -> dict[str, Any]:
+    """
+    Przelicza cala `system_layer_flags` jednym zapytaniem grupujacym i zdejmuje
+    odroczenie triggerow. Z `conn` dziala w transakcji wolajacego.
+    """
+    started = time.perf_counter()
+    if conn is not None:
+        systems = _rebuild_layer_flags(conn)
+    else:
+        with playerdb_connection(path=path, ensure_schema=True) as own_conn:
+            own_conn.execute("BEGIN;")
+            try:
+                systems = _rebuild_layer_flags(own_conn)
+                own_conn.commit()
+            except Exception:
+                own_conn.rollback()
+                raise
+    return {"ok": True, "systems": systems, "elapsed_ms": round((time.perf_counter() - started) * 1000.0, 1)}
+
+
+def check_layer_flags_consistency(
+    *,
+    path: str | None = None,
+    conn: sqlite3.Connection | None = None,
+    max_samples: int = 20,
+) -> dict[str, Any]:
+    """
+    Porownuje `system_layer_flags` z przeliczeniem od zera. `mismatched` to systemy
+    z innymi wartosciami, `missing` bez wiersza flag, `orphaned` flagi bez systemu.
+    """
+
+    def _check(c: sqlite3.Connection) -> dict[str, Any]:
+        expected = {
+            int(row[0]): tuple(row[1:])
+            for row in c.execute(_LAYER_FLAGS_COMPUTE_SQL.format(where="1=1")).fetchall()
+        }
+        stored = {
+            int(row[0]): tuple(row[1:])
+            for row in c.execute(f"SELECT {_LAYER_FLAGS_COLUMNS} FROM system_layer_flags;").fetchall()
+        }
+        missing = sorted(set(expected) - set(stored))
+        orphaned = sorted(set(stored) - set(expected))
+        mismatched = sorted(sid for sid in set(expected) & set(stored) if expected[sid] != stored[sid])
+        samples = [
+            {"system_id": sid, "expected": list(expected[sid]), "stored": list(stored[sid])}
+            for sid in mismatched[: max(0, int(max_samples))]
+        ]
+        return {
+            "ok": not (missing or orphaned or mismatched),
+            "deferred": not layer_flags_available(c),
+            "systems": len(expected),
+            "missing": len(missing),
+            "orphaned": len(orphaned),
+            "mismatched": len(mismatched),
+            "samples": samples,
+        }
+
+    if conn is not None:
+        return _check(conn)
+    with playerdb_connection(path=path, ensure_schema=True) as own_conn:
+        return _check(own_conn)
+
+
+def _market_station_key(*, market_id: Any, system_name: Any, station_name: Any) -> str:
+    market_id_int = _as_optional_int(market_id)
+    if market_id_int is not None:
+        return f"mid:{market_id_int}"
+    return f"name:{_as_text(system_name).casefold()}::{_as_text(station_name).casefold()}"
+
+
+def _replace_market_latest_for_station(
+    conn: sqlite3.Connection,
+    *,
+    station_key: str,
+    snapshot_id: int,
+    freshness_ts: str,
+) -> int:
+    conn.execute("DELETE FROM market_latest WHERE station_key = ?;", (station_key,))
+    cursor = conn.execute(
+        """
+        INSERT OR REPLACE INTO market_latest(
+            station_key, commodity, system_name, station_name, station_market_id,
+            buy_price, sell_price, stock, demand,
+            snapshot_id, snapshot_ts, freshness_ts, source, confidence
+        )
+        SELECT
+            ?, msi.commodity, ms.system_name, ms.station_name, ms.station_market_id,
+            msi.buy_price, msi.sell_price, msi.stock, msi.demand,
+            ms.id, ms.snapshot_ts, ?, ms.source, ms.confidence
+        FROM market_snapshot_items msi
+        JOIN market_snapshots ms ON ms.id = msi.snapshot_id
+        WHERE ms.id = ?
+        ORDER BY msi.id;
+        """,
+        (station_key, freshness_ts, int(snapshot_id)),
+    )
+    return int(getattr(cursor, "rowcount", 0) or 0)
+
+
+def _touch_market_latest_for_snapshot(
+    conn: sqlite3.Connection,
+    *,
+    station_key: str,
+    snapshot_id: int,
+    freshness_ts: str,
+) -> None:
+    # Dedupe hit: jesli market_latest juz wskazuje ten snapshot, wystarczy odswiezyc
+    # freshness; inaczej rynek wrocil do starszego stanu i trzeba go przepisac.
+    row = conn.execute(
+        "SELECT snapshot_id, freshness_ts FROM market_latest WHERE station_key = ? LIMIT 1;",
+        (station_key,),
+    ).fetchone()
+    if row is not None and int(row["snapshot_id"]) == int(snapshot_id):
+        conn.execute(
+            "UPDATE market_latest SET freshness_ts = ? WHERE station_key = ?;",
+            (freshness_ts, station_key),
+        )
+        return
+    if row is not None and _as_text(row["freshness_ts"]) > _as_text(freshness_ts):
+        # Stary Market.json wczytany ponownie - nie cofamy biezacego cennika.
+        return
+    _replace_market_latest_for_station(
+        conn,
+        station_key=station_key,
+        snapshot_id=int(snapshot_id),
+        freshness_ts=freshness_ts,
+    )
+
+
+def _prune_market_snapshot_history(
+    conn: sqlite3.Connection,
+    *,
+    station_key: str,
+    market_id: int | None,
+    system_name: str,
+    station_name: str,
+    keep: int,
+) -> int:
+    keep_count = int(keep or 0)
+    if keep_count <= 0:
+        return 0
+    if market_id is not None:
+        station_where = "station_market_id = ?"
+        station_params: tuple[Any, ...] = (int(market_id),)
+    else:
+        station_where = (
+            "station_market_id IS NULL AND system_name = ? COLLATE NOCASE AND station_name = ? COLLATE NOCASE"
+        )
+        station_params = (system_name, station_name)
+    # Snapshot wskazywany przez market_latest nigdy nie jest usuwany (items sa ON DELETE CASCADE).
+    cursor = conn.execute(
+        f"""
+        DELETE FROM market_snapshots
+        WHERE {station_where}
+          AND id NOT IN (
+              SELECT id FROM market_snapshots
+              WHERE {station_where}
+              ORDER BY snapshot_ts DESC, id DESC
+              LIMIT ?
+          )
+          AND id NOT IN (SELECT snapshot_id FROM market_latest WHERE station_key = ?);
+        """,
+        (*station_params, *station_params, keep_count, station_key),
+    )
+    return int(getattr(cursor, "rowcount", 0) or 0)
+
+
 def ensure_playerdb_schema(*, path: str | None = None) -> dict[str, Any]:
     db_path = str(path or default_playerdb_path())
     created_new_file = not os.path.isfile(db_path)
@@ -622,6 +1155,31 @@ def ensure_playerdb_schema(*, path: str | None = None) -> dict[str, Any]:
                 _record_migration(conn, version=4, name=PLAYERDB_SCHEMA_NAME_V4)
                 _write_user_version(conn, 4)
                 version = 4
+            if version < 5:
+                _migrate_to_v5(conn)
+                _record_migration(conn, version=5, name=PLAYERDB_SCHEMA_NAME_V5)
+                _write_user_version(conn, 5)
+                version = 5
+            if version < 6:
+                _migrate_to_v6(conn)
+                _record_migration(conn, version=6, name=PLAYERDB_SCHEMA_NAME_V6)
+                _write_user_version(conn, 6)
+                version = 6
+            if version < 7:
+                _migrate_to_v7(conn)
+                _record_migration(conn, version=7, name=PLAYERDB_SCHEMA_NAME_V7)
+                _write_user_version(conn, 7)
+                version = 7
+            if version < 8:
+                _migrate_to_v8(conn)
+                _record_migration(conn, version=8, name=PLAYERDB_SCHEMA_NAME_V8)
+                _write_user_version(conn, 8)
+                version = 8
+            if version < 9:
+                _migrate_to_v9(conn)
+                _record_migration(conn, version=9, name=PLAYERDB_SCHEMA_NAME_V9)
+                _write_user_version(conn, 9)
+                version = 9
             conn.commit()
         except Exception:
             conn.rollback()
@@ -645,6 +1203,147 @@ def ensure_playerdb_schema(*, path: str | None = None) -> dict[str, Any]:
     }
 
 
+@dataclass
+class PlayerDbChangeSet:
+    """
+    Delta jednego ingestu PlayerDB, wysylana z `playerdb_updated` (mapa aplikuje ja
+    zamiast pelnego reloadu).
+
+    Id to klucze wierszy: `systems.id`, `stations.id`, `market_snapshots.id`.
+    `layer_systems` = systemy, ktorym mogly sie zmienic flagi warstw (stacje, rynek,
+    cash-in); `edges` = pary (a_system_id, b_system_id) jak w `jump_edges`;
+    `edges_removed` = pary, ktorych wiersz zniknal (skok dostal innego poprzednika).
+    """
+
+    systems_inserted: set[int] = field(default_factory=set)
+    systems_updated: set[int] = field(default_factory=set)
+    stations: set[int] = field(default_factory=set)
+    market_snapshots: set[int] = field(default_factory=set)
+    layer_systems: set[int] = field(default_factory=set)
+    edges: set[tuple[int, int]] = field(default_factory=set)
+    edges_removed: set[tuple[int, int]] = field(default_factory=set)
+    schema_version: int = PLAYERDB_SCHEMA_VERSION
+
+    def system_ids(self) -> set[int]:
+        return set(self.systems_inserted) | set(self.systems_updated)
+
+    def is_empty(self) -> bool:
+        return not (
+            self.systems_inserted
+            or self.systems_updated
+            or self.stations
+            or self.market_snapshots
+            or self.layer_systems
+            or self.edges
+            or self.edges_removed
+        )
+
+    def merge(self, other: "PlayerDbChangeSet") -> "PlayerDbChangeSet":
+        self.systems_inserted |= set(other.systems_inserted)
+        self.systems_updated |= set(other.systems_updated)
+        self.stations |= set(other.stations)
+        self.market_snapshots |= set(other.market_snapshots)
+        self.layer_systems |= set(other.layer_systems)
+        # `other` jest pozniejsza delta: wygrywa jej stan pary (jest / usunieta).
+        self.edges = (self.edges - set(other.edges_removed)) | set(other.edges)
+        self.edges_removed = (self.edges_removed - set(other.edges)) | set(other.edges_removed)
+        self.schema_version = max(int(self.schema_version), int(other.schema_version))
+        return self
+
+    def to_payload(self) -> dict[str, Any]:
+        return {
+            "systems_inserted": sorted(self.systems_inserted),
+            "systems_updated": sorted(self.systems_updated),
+            "stations": sorted(self.stations),
+            "market_snapshots": sorted(self.market_snapshots),
+            "layer_systems": sorted(self.layer_systems),
+            "edges": [list(pair) for pair in sorted(self.edges)],
+            "edges_removed": [list(pair) for pair in sorted(self.edges_removed)],
+            "schema_version": int(self.schema_version),
+        }
+
+    @classmethod
+    def from_payload(cls, value: Any) -> "PlayerDbChangeSet | None":
+        if isinstance(value, cls):
+            return value
+        if not isinstance(value, dict):
+            return None
+
+        def _ids(key: str) -> set[int]:
+            out: set[int] = set()
+            for item in value.get(key) or []:
+                item_int = _as_optional_int(item)
+                if item_int is not None:
+                    out.add(item_int)
+            return out
+
+        def _pairs(key: str) -> set[tuple[int, int]]:
+            out: set[tuple[int, int]] = set()
+            for pair in value.get(key) or []:
+                try:
+                    a_id, b_id = (int(v) for v in pair)
+                except Exception:
+                    continue
+                out.add((min(a_id, b_id), max(a_id, b_id)))
+            return out
+
+        return cls(
+            systems_inserted=_ids("systems_inserted"),
+            systems_updated=_ids("systems_updated"),
+            stations=_ids("stations"),
+            market_snapshots=_ids("market_snapshots"),
+            layer_systems=_ids("layer_systems"),
+            edges=_pairs("edges"),
+            edges_removed=_pairs("edges_removed"),
+            schema_version=_as_optional_int(value.get("schema_version")) or PLAYERDB_SCHEMA_VERSION,
+        )
+
+
+def _layer_system_ids_for(
+    conn: sqlite3.Connection,
+    *,
+    system_address: int | None,
+    system_name: str,
+) -> set[int]:
+    # Warstwy mapy dopasowuja stacje po adresie, a cash-in po nazwie - bierzemy oba trafienia.
+    out: set[int] = set()
+    if system_address is not None:
+        row = conn.execute(
+            "SELECT id FROM systems WHERE system_address = ? LIMIT 1;",
+            (system_address,),
+        ).fetchone()
+        if row is not None:
+            out.add(int(row["id"]))
+    if system_name:
+        row = conn.execute(
+            "SELECT id FROM systems WHERE system_name = ? COLLATE NOCASE LIMIT 1;",
+            (system_name,),
+        ).fetchone()
+        if row is not None:
+            out.add(int(row["id"]))
+    return out
+
+
+def _track_station_change(
+    conn: sqlite3.Connection,
+    changes: PlayerDbChangeSet | None,
+    station_id: int | None,
+) -> None:
+    if changes is None or station_id is None:
+        return
+    changes.stations.add(int(station_id))
+    row = conn.execute(
+        "SELECT system_address, system_name FROM stations WHERE id = ? LIMIT 1;",
+        (int(station_id),),
+    ).fetchone()
+    if row is not None:
+        changes.layer_systems |= _layer_system_ids_for(
+            conn,
+            system_address=_as_optional_int(row["system_address"]),
+            system_name=_as_text(row["system_name"]),
+        )
+
+
 def _upsert_system_observed(
     conn: sqlite3.Connection,
     *,
@@ -660,9 +1359,10 @@ def _upsert_system_observed(
     seen_ts: str,
     source: str = "journal",
     confidence: str = "observed",
-) -> None:
+    changes: PlayerDbChangeSet | None = None,
+) -> int | None:
     if not system_name:
-        return
+        return None
 
     now_ts = _utc_now_iso()
     if system_address is not None:
@@ -677,7 +1377,7 @@ def _upsert_system_observed(
         ).fetchone()
 
     if row is None:
-        conn.execute(
+        cursor = conn.execute(
             """
             INSERT INTO systems(
                 system_name, system_address, system_id64, x, y, z,
@@ -703,7 +1403,10 @@ def _upsert_system_observed(
                 now_ts,
             ),
         )
-        return
+        inserted_id = _as_optional_int(cursor.lastrowid)
+        if changes is not None and inserted_id is not None:
+            changes.systems_inserted.add(inserted_id)
+        return inserted_id
 
     existing_name = _as_text(row["system_name"])
     first_seen_ts = _as_text(row["first_seen_ts"]) or seen_ts
@@ -746,6 +1449,9 @@ def _upsert_system_observed(
             int(row["id"]),
         ),
     )
+    if changes is not None:
+        changes.systems_updated.add(int(row["id"]))
+    return int(row["id"])
 
 
 def _upsert_station_observed(
@@ -765,9 +1471,10 @@ def _upsert_station_observed(
     services_freshness_ts: str | None,
     source: str,
     confidence: str,
-) -> None:
+    changes: PlayerDbChangeSet | None = None,
+) -> int | None:
     if not system_name or not station_name:
-        return
+        return None
     now_ts = _utc_now_iso()
     if market_id is not None:
         row = conn.execute(
@@ -787,7 +1494,7 @@ def _upsert_station_observed(
     is_fc = _infer_is_fleet_carrier(station_name, _as_text(station_type or "station"))
 
     if row is None:
-        conn.execute(
+        cursor = conn.execute(
             """
             INSERT INTO stations(
                 system_name, system_address, station_name, market_id, station_type, is_fleet_carrier,
@@ -818,7 +1525,9 @@ def _upsert_station_observed(
                 now_ts,
             ),
         )
-        return
+        station_id = _as_optional_int(cursor.lastrowid)
+        _track_station_change(conn, changes, station_id)
+        return station_id
 
     conn.execute(
         """
@@ -870,6 +1579,222 @@ def _upsert_station_observed(
             int(row["id"]),
         ),
     )
+    _track_station_change(conn, changes, int(row["id"]))
+    return int(row["id"])
+
+
+def _jump_type_for_event(ev: dict[str, Any], *, event_name: str) -> str:
+    if event_name == "CarrierJump":
+        return "carrier"
+    if bool(ev.get("Taxi")):
+        return "taxi"
+    return "hyperspace"
+
+
+def _rollup_jump_edges_since(conn: sqlite3.Connection, *, after_jump_id: int) -> None:
+    # Dolicza do jump_edges tylko skoki wstawione po `after_jump_id` (AUTOINCREMENT
+    # gwarantuje rosnace id), wiec INSERT OR IGNORE duplikatu nie rusza licznikow.
+    conn.execute(
+        """
+        INSERT INTO jump_edges(a_system_id, b_system_id, count, first_ts, last_ts)
+        SELECT
+            MIN(from_system_id, to_system_id),
+            MAX(from_system_id, to_system_id),
+            COUNT(*),
+            MIN(ts),
+            MAX(ts)
+        FROM jumps
+        WHERE id > ? AND from_system_id IS NOT NULL AND from_system_id <> to_system_id
+        GROUP BY 1, 2
+        ON CONFLICT(a_system_id, b_system_id) DO UPDATE SET
+            count = count + excluded.count,
+            first_ts = MIN(first_ts, excluded.first_ts),
+            last_ts = MAX(last_ts, excluded.last_ts);
+        """,
+        (int(after_jump_id),),
+    )
+
+
+# Journal nie podaje systemu startowego skoku. Jedyna regula (zywy ingest i import
+# masowy): system ostatniego Location/FSDJump/CarrierJump sprzed `ts`. Dwa
+# seeki po indeksach ts zamiast UNION calej historii; przy remisie ts wygrywa skok.
+_JUMP_ORIGIN_SQL = """
+    SELECT system_id FROM (
+        SELECT * FROM (
+            SELECT ts, 1 AS kind, to_system_id AS system_id FROM jumps
+            WHERE ts < {ts} ORDER BY ts DESC LIMIT 1
+        )
+        UNION ALL
+        SELECT * FROM (
+            SELECT ts, 0 AS kind, system_id FROM journal_locations
+            WHERE ts < {ts} ORDER BY ts DESC LIMIT 1
+        )
+    )
+    ORDER BY ts DESC, kind DESC LIMIT 1
+"""
+
+
+def _jump_origin(conn: sqlite3.Connection, *, ts: str, to_system_id: int) -> int | None:
+    row = conn.execute(_JUMP_ORIGIN_SQL.format(ts="?") + ";", (ts, ts)).fetchone()
+    from_system_id = _as_optional_int(row[0]) if row is not None else None
+    return None if from_system_id == to_system_id else from_system_id
+
+
+def assign_jump_origins(conn: sqlite3.Connection, *, from_ts: str, upto_ts: str | None = None) -> int:
+    """
+    Ta sama regula co `_jump_origin`, wsadowo: przelicza from_system_id skokow z ts
+    w [from_ts, upto_ts] (import wstawia skoki i pozycje Location bez poprzednika).
+    Nie rusza jump_edges. Dziala w transakcji wolajacego.
+    """
+    origin = _JUMP_ORIGIN_SQL.format(ts="cur.ts")
+    params: tuple[str, ...] = (str(from_ts),) if upto_ts is None else (str(from_ts), str(upto_ts))
+    cur = conn.execute(
+        f"""
+        UPDATE jumps AS cur SET from_system_id = (
+            SELECT NULLIF(o.system_id, cur.to_system_id) FROM ({origin}) AS o
+        )
+        WHERE cur.ts >= ?{"" if upto_ts is None else " AND cur.ts <= ?"};
+        """,
+        params,
+    )
+    return max(0, int(cur.rowcount or 0))
+
+
+def _next_jump_ts(conn: sqlite3.Connection, *, after_ts: str) -> str | None:
+    row = conn.execute("SELECT MIN(ts) FROM jumps WHERE ts > ?;", (after_ts,)).fetchone()
+    return None if row is None or row[0] is None else str(row[0])
+
+
+def _refresh_jump_edge_pairs(conn: sqlite3.Connection, pairs: set[tuple[int, int]]) -> set[tuple[int, int]]:
+    # Licznik i first/last_ts pary od zera z jumps (para, z ktorej skok odszedl).
+    # Zwraca pary, po ktorych nie zostal zaden skok (wiersz usuniety).
+    removed: set[tuple[int, int]] = set()
+    for a_id, b_id in sorted(pairs):
+        conn.execute("DELETE FROM jump_edges WHERE a_system_id = ? AND b_system_id = ?;", (a_id, b_id))
+        cursor = conn.execute(
+            """
+            INSERT INTO jump_edges(a_system_id, b_system_id, count, first_ts, last_ts)
+            SELECT ?, ?, COUNT(*), MIN(ts), MAX(ts)
+            FROM jumps
+            WHERE (from_system_id = ? AND to_system_id = ?) OR (from_system_id = ? AND to_system_id = ?)
+            HAVING COUNT(*) > 0;
+            """,
+            (a_id, b_id, a_id, b_id, b_id, a_id),
+        )
+        if not int(getattr(cursor, "rowcount", 0) or 0):
+            removed.add((a_id, b_id))
+    return removed
+
+
+def _reassign_jump_origins(
+    conn: sqlite3.Connection, *, from_ts: str, upto_ts: str
+) -> tuple[set[tuple[int, int]], set[tuple[int, int]]]:
+    """
+    `assign_jump_origins` dla [from_ts, upto_ts] z korekta jump_edges: skok z nowym
+    poprzednikiem dolicza sie do nowej pary, a pary, z ktorych odszedl, sa
+    przeliczane z jumps. Zwraca (zmienione pary, usuniete pary), a < b.
+    Transakcja wolajacego.
+    """
+    conn.execute(
+        "CREATE TEMP TABLE IF NOT EXISTS jump_origin_before (id INTEGER PRIMARY KEY, from_system_id INTEGER);"
+    )
+    conn.execute("DELETE FROM temp.jump_origin_before;")
+    conn.execute(
+        "INSERT INTO temp.jump_origin_before SELECT id, from_system_id FROM jumps WHERE ts >= ? AND ts <= ?;",
+        (from_ts, upto_ts),
+    )
+    assign_jump_origins(conn, from_ts=from_ts, upto_ts=upto_ts)
+    changed = conn.execute(
+        """
+        SELECT o.from_system_id, j.from_system_id, j.to_system_id
+        FROM temp.jump_origin_before AS o JOIN jumps AS j ON j.id = o.id
+        WHERE j.from_system_id IS NOT o.from_system_id;
+        """
+    ).fetchall()
+    if changed:
+        conn.execute(
+            """
+            INSERT INTO jump_edges(a_system_id, b_system_id, count, first_ts, last_ts)
+            SELECT
+                MIN(j.from_system_id, j.to_system_id),
+                MAX(j.from_system_id, j.to_system_id),
+                COUNT(*),
+                MIN(j.ts),
+                MAX(j.ts)
+            FROM temp.jump_origin_before AS o JOIN jumps AS j ON j.id = o.id
+            WHERE j.from_system_id IS NOT o.from_system_id AND j.from_system_id IS NOT NULL
+            GROUP BY 1, 2
+            ON CONFLICT(a_system_id, b_system_id) DO UPDATE SET
+                count = count + excluded.count,
+                first_ts = MIN(first_ts, excluded.first_ts),
+                last_ts = MAX(last_ts, excluded.last_ts);
+            """
+        )
+    conn.execute("DELETE FROM temp.jump_origin_before;")
+    touched: set[tuple[int, int]] = set()
+    stale: set[tuple[int, int]] = set()
+    for old_from, new_from, to_id in changed:
+        if old_from is not None:
+            stale.add((min(int(old_from), int(to_id)), max(int(old_from), int(to_id))))
+        if new_from is not None:
+            touched.add((min(int(new_from), int(to_id)), max(int(new_from), int(to_id))))
+    removed = _refresh_jump_edge_pairs(conn, stale) if stale else set()
+    return (touched | stale) - removed, removed
+
+
+def _reassign_following_jump(conn: sqlite3.Connection, *, ts: str, changes: PlayerDbChangeSet | None) -> None:
+    # Spozniony skok/Location (journal nie po kolei) zmienia poprzednika tylko
+    # pierwszego skoku po nim; kolejne startuja juz z tamtego skoku.
+    next_ts = _next_jump_ts(conn, after_ts=ts)
+    if next_ts is None:
+        return
+    pairs, removed = _reassign_jump_origins(conn, from_ts=next_ts, upto_ts=next_ts)
+    if changes is not None:
+        changes.edges |= pairs
+        changes.edges_removed |= removed
+
+
+def _record_location(
+    conn: sqlite3.Connection,
+    *,
+    system_id: int,
+    ts: str,
+    changes: PlayerDbChangeSet | None = None,
+) -> None:
+    cursor = conn.execute(
+        "INSERT OR IGNORE INTO journal_locations(ts, system_id) VALUES (?, ?);",
+        (ts, int(system_id)),
+    )
+    if int(getattr(cursor, "rowcount", 0) or 0):
+        _reassign_following_jump(conn, ts=ts, changes=changes)
+
+
+def _record_jump(
+    conn: sqlite3.Connection,
+    *,
+    to_system_id: int,
+    ts: str,
+    jump_dist: float | None,
+    fuel_used: float | None,
+    jump_type: str,
+    changes: PlayerDbChangeSet | None = None,
+) -> bool:
+    from_system_id = _jump_origin(conn, ts=ts, to_system_id=int(to_system_id))
+    cursor = conn.execute(
+        """
+        INSERT OR IGNORE INTO jumps(from_system_id, to_system_id, ts, jump_dist, fuel_used, jump_type)
+        VALUES (?, ?, ?, ?, ?, ?);
+        """,
+        (from_system_id, int(to_system_id), ts, jump_dist, fuel_used, jump_type),
+    )
+    if not int(getattr(cursor, "rowcount", 0) or 0):
+        return False
+    if from_system_id is not None:
+        _rollup_jump_edges_since(conn, after_jump_id=int(cursor.lastrowid) - 1)
+        if changes is not None:
+            changes.edges.add((min(from_system_id, int(to_system_id)), max(from_system_id, int(to_system_id))))
+    _reassign_following_jump(conn, ts=ts, changes=changes)
+    return True
 
 
 def ingest_journal_event(
@@ -914,16 +1839,18 @@ def ingest_journal_event(
             }
 
     db_path = str(path or default_playerdb_path())
+    changes = PlayerDbChangeSet()
     with playerdb_connection(path=db_path, ensure_schema=True) as conn:
         conn.execute("BEGIN;")
         try:
             touched_system = False
             touched_station = False
             touched_cashin = False
+            touched_jump = False
             if event_name in {"Location", "FSDJump", "CarrierJump", "Scan"} and system_name:
                 x, y, z = _event_starpos_xyz(ev)
                 star_type, is_neutron, is_black_hole = _event_primary_star_type(ev, event_name=event_name)
-                _upsert_system_observed(
+                system_id = _upsert_system_observed(
                     conn,
                     system_name=system_name,
                     system_address=system_address,
@@ -937,8 +1864,21 @@ def ingest_journal_event(
                     seen_ts=ts,
                     source="journal",
                     confidence="observed",
+                    changes=changes,
                 )
                 touched_system = True
+                if event_name == "Location" and system_id is not None:
+                    _record_location(conn, system_id=system_id, ts=ts, changes=changes)
+                if event_name in {"FSDJump", "CarrierJump"} and system_id is not None:
+                    touched_jump = _record_jump(
+                        conn,
+                        to_system_id=system_id,
+                        ts=ts,
+                        jump_dist=_as_optional_float(ev.get("JumpDist")),
+                        fuel_used=_as_optional_float(ev.get("FuelUsed")),
+                        jump_type=_jump_type_for_event(ev, event_name=event_name),
+                        changes=changes,
+                    )
 
             # Location może zawierać dane stacji gdy startujemy już zadokowani.
             if event_name in {"Location", "Docked"} and bool(ev.get("Docked") or event_name == "Docked"):
@@ -967,6 +1907,7 @@ def ingest_journal_event(
                         services_freshness_ts=ts if (has_services_list and services) else None,
                         source="journal",
                         confidence="observed",
+                        changes=changes,
                     )
                     touched_station = True
 
@@ -1005,6 +1946,12 @@ def ingest_journal_event(
                     ),
                 )
                 touched_cashin = True
+                if system_name:
+                    changes.layer_systems |= _layer_system_ids_for(
+                        conn,
+                        system_address=system_address,
+                        system_name=system_name,
+                    )
                 if system_name and station_name:
                     _upsert_station_observed(
                         conn,
@@ -1022,6 +1969,7 @@ def ingest_journal_event(
                         services_freshness_ts=None,
                         source="journal",
                         confidence="observed",
+                        changes=changes,
                     )
                     touched_station = True
             conn.commit()
@@ -1037,10 +1985,42 @@ def ingest_journal_event(
         "ingested_system": bool(touched_system),
         "ingested_station": bool(touched_station),
         "ingested_cashin": bool(touched_cashin),
+        "ingested_jump": bool(touched_jump),
+        "changes": changes,
         "path": db_path,
     }
 
 
+def backfill_jumps_from_journals(
+    journal_files: list[str] | tuple[str, ...],
+    *,
+    path: str | None = None,
+    chunk_size: int | None = None,
+) -> dict[str, Any]:
+    """
+    Odtwarza tabele jumps/jump_edges z historycznych journali.
+
+    Import masowy w jednym procesie: checkpointy plikow (journal_import_progress)
+    ida w tej samej transakcji co dane, wiec przerwany backfill wznawia sie od
+    ostatniego zatwierdzonego chunka, a ponowny przebieg nie dubluje licznikow.
+    """
+    from logic import player_db_bulk_import  # cykl: import masowy uzywa tego modulu
+
+    limit = max(1, int(chunk_size or JUMP_BACKFILL_CHUNK_SIZE))
+    result = player_db_bulk_import.bulk_import_journals(
+        list(journal_files),
+        path=path,
+        processes=1,
+        txn_records=limit,
+        # Paczki parsera nie wieksze niz chunk: checkpoint moze wypasc w srodku pliku.
+        chunk_records=min(limit, player_db_bulk_import.BULK_IMPORT_WORKER_CHUNK_RECORDS),
+    )
+    result["files"] = int(result.get("files_processed") or 0)
+    result["chunks"] = int(result.get("transactions") or 0)
+    result["jumps_per_sec"] = round(int(result.get("inserted_jumps") or 0) / max(1e-9, result["elapsed_sec"]), 1)
+    return result
+
+
 def ingest_star_metadata_event(
     ev: dict[str, Any] | None,
     *,
@@ -1071,6 +2051,7 @@ def ingest_star_metadata_event(
     system_id64 = _journal_system_id64(ev, fallback_address=system_address)
     x, y, z = _event_starpos_xyz(ev)
     db_path = str(path or default_playerdb_path())
+    changes = PlayerDbChangeSet()
 
     with playerdb_connection(path=db_path, ensure_schema=True) as conn:
         conn.execute("BEGIN;")
@@ -1089,6 +2070,7 @@ def ingest_star_metadata_event(
                 seen_ts=ts,
                 source="journal_backfill",
                 confidence="observed",
+                changes=changes,
             )
             conn.commit()
         except Exception:
@@ -1103,6 +2085,7 @@ def ingest_star_metadata_event(
         "is_neutron": int(bool(is_neutron)),
         "is_black_hole": int(bool(is_black_hole)),
         "ingested_system": True,
+        "changes": changes,
         "path": db_path,
     }
 
@@ -1181,6 +2164,7 @@ def ingest_market_json(
     path: str | None = None,
     fallback_system_name: str | None = None,
     fallback_station_name: str | None = None,
+    snapshot_retention: int | None = None,
 ) -> dict[str, Any]:
     if not isinstance(data, dict):
         return {"ok": False, "reason": "invalid_market_payload"}
@@ -1204,7 +2188,10 @@ def ingest_market_json(
     market_id = _as_optional_int(data.get("MarketID") or data.get("marketId"))
     items = _market_items_list(data)
     hash_sig, commodities_count = _normalized_market_items_hash(items)
+    station_key = _market_station_key(market_id=market_id, system_name=system_name, station_name=station_name)
+    retention = MARKET_SNAPSHOT_RETENTION_PER_STATION if snapshot_retention is None else int(snapshot_retention)
     db_path = str(path or default_playerdb_path())
+    changes = PlayerDbChangeSet()
 
     with playerdb_connection(path=db_path, ensure_schema=True) as conn:
         conn.execute("BEGIN;")
@@ -1225,6 +2212,7 @@ def ingest_market_json(
                 services_freshness_ts=None,
                 source="market_json",
                 confidence="observed",
+                changes=changes,
             )
 
             def _find_dedupe_row() -> sqlite3.Row | None:
@@ -1261,13 +2249,21 @@ def ingest_market_json(
                     """,
                     (ts, commodities_count, "market_json", "observed", int(dedupe_row["id"])),
                 )
+                _touch_market_latest_for_snapshot(
+                    conn,
+                    station_key=station_key,
+                    snapshot_id=int(dedupe_row["id"]),
+                    freshness_ts=ts,
+                )
                 conn.commit()
+                changes.market_snapshots.add(int(dedupe_row["id"]))
                 return {
                     "ok": True,
                     "deduped": True,
                     "snapshot_id": int(dedupe_row["id"]),
                     "commodities_count": commodities_count,
                     "hash_sig": hash_sig,
+                    "changes": changes,
                     "path": db_path,
                 }
 
@@ -1303,13 +2299,21 @@ def ingest_market_json(
                         """,
                         (ts, commodities_count, "market_json", "observed", int(dedupe_row["id"])),
                     )
+                    _touch_market_latest_for_snapshot(
+                        conn,
+                        station_key=station_key,
+                        snapshot_id=int(dedupe_row["id"]),
+                        freshness_ts=ts,
+                    )
                     conn.commit()
+                    changes.market_snapshots.add(int(dedupe_row["id"]))
                     return {
                         "ok": True,
                         "deduped": True,
                         "snapshot_id": int(dedupe_row["id"]),
                         "commodities_count": commodities_count,
                         "hash_sig": hash_sig,
+                        "changes": changes,
                         "path": db_path,
                     }
                 raise RuntimeError("market_snapshot_insert_ignored_without_dedupe_row")
@@ -1339,10 +2343,31 @@ def ingest_market_json(
                             _as_optional_int(item.get("DemandBracket") or item.get("demandBracket")),
                         ),
                     )
+            latest_rows = 0
+            current_latest = conn.execute(
+                "SELECT snapshot_ts FROM market_latest WHERE station_key = ? LIMIT 1;",
+                (station_key,),
+            ).fetchone()
+            if current_latest is None or _as_text(current_latest["snapshot_ts"]) <= ts:
+                latest_rows = _replace_market_latest_for_station(
+                    conn,
+                    station_key=station_key,
+                    snapshot_id=snapshot_id,
+                    freshness_ts=ts,
+                )
+            pruned = _prune_market_snapshot_history(
+                conn,
+                station_key=station_key,
+                market_id=market_id,
+                system_name=system_name,
+                station_name=station_name,
+                keep=retention,
+            )
             conn.commit()
         except Exception:
             conn.rollback()
             raise
+    changes.market_snapshots.add(int(snapshot_id))
 
     return {
         "ok": True,
@@ -1350,6 +2375,9 @@ def ingest_market_json(
         "snapshot_id": snapshot_id,
         "commodities_count": commodities_count,
         "hash_sig": hash_sig,
+        "market_latest_rows": latest_rows,
+        "snapshots_pruned": pruned,
+        "changes": changes,
         "path": db_path,
     }
 
@@ -1674,6 +2702,12 @@ def cleanup_fixture_test_data(
                     f"DELETE FROM market_snapshots WHERE id IN ({placeholders});",
                     tuple(snapshot_ids),
                 )
+                conn.execute(
+                    f"DELETE FROM market_latest WHERE snapshot_id IN ({placeholders});",
+                    tuple(snapshot_ids),
+                )
+            # market_latest jest pochodna snapshotow; czyscimy ja razem z nimi (bez osobnego licznika).
+            conn.execute(f"DELETE FROM market_latest WHERE {stations_where};", tuple(stations_params))
             conn.execute(f"DELETE FROM cashin_history WHERE {cashin_where};", tuple(cashin_params))
             conn.execute(f"DELETE FROM trade_history WHERE {trade_where};", tuple(trade_params))
             conn.execute(f"DELETE FROM stations WHERE {stations_where};", tuple(stations_params))
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from collections.abc import Callable, Iterable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any
+
+from logic.utils.cancellation import CancelToken, bind_cancel_token, current_cancel_token
+from logic.utils.rate_limiter import provider_rate_limiter
+from logic.utils.renata_log import log_event_throttled
+
+
+def _is_empty_result(value: Any) -> bool:
+    return value is None or (hasattr(value, "__len__") and len(value) == 0)
+
+
+def call_rate_limited(provider: str, fn: Callable[[], Any], *, deadline: float | None = None) -> Any:
+    """Wywoluje fn po pobraniu tokena providera; None gdy token nie zdazy przed deadline."""
+    timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+    if not provider_rate_limiter(provider).acquire(timeout=timeout):
+        return None
+    return fn()
+
+
+def hedged_first(
+    calls: list[tuple[str, Callable[[], Any]]],
+    *,
+    hedge_after_s: float,
+    timeout_s: float | None = None,
+) -> tuple[str | None, Any]:
+    """
+    Hedging: start pierwszego wywolania, kolejne dopiero gdy poprzednie nie
+    odpowiedzialo w hedge_after_s (albo zwrocilo pusto). Zwraca pierwszy
+    niepusty wynik jako (nazwa, wynik); (None, None) gdy nic nie zdazylo.
+    Spoznione wywolania koncza sie w tle (watki daemon).
+    """
+    if not calls:
+        return None, None
+    results: "queue.Queue[tuple[str, Any]]" = queue.Queue()
+    deadline = None if timeout_s is None else time.monotonic() + max(0.0, float(timeout_s))
+    parent_token = current_cancel_token()
+
+    def _worker(name: str, fn: Callable[[], Any]) -> None:
+        try:
+            with bind_cancel_token(parent_token):
+                value = fn()
+        except Exception as exc:
+            log_event_throttled(
+                f"provider_fanout.hedge.{name}",
+                5000,
+                "WARN",
+                "provider hedge call failed",
+                provider=name,
+                error=f"{type(exc).__name__}: {exc}",
+            )
+            value = None
+        results.put((name, value))
+
+    started = 0
+    finished = 0
+    while True:
+        if started < len(calls):
+            name, fn = calls[started]
+            threading.Thread(target=_worker, args=(name, fn), name=f"RenataHedge-{name}", daemon=True).start()
+            started += 1
+        remaining = None if deadline is None else deadline - time.monotonic()
+        if remaining is not None and remaining <= 0.0:
+            return None, None
+        wait_s = remaining
+        if started < len(calls):
+            wait_s = max(0.0, float(hedge_after_s)) if remaining is None else min(remaining, max(0.0, float(hedge_after_s)))
+        try:
+            name, value = results.get(timeout=wait_s)
+        except queue.Empty:
+            if started >= len(calls):
+                return None, None
+            continue
+        finished += 1
+        if not _is_empty_result(value):
+            return name, value
+        if finished >= len(calls):
+            return None, None
+
+
+def fan_out(
+    tasks: Iterable[tuple[Any, Callable[[], Any]]],
+    *,
+    max_workers: int = 4,
+    deadline_s: float | None = None,
+    on_result: Callable[[Any, Any], None] | None = None,
+    should_stop: Callable[[], bool] | None = None,
+) -> dict[str, Any]:
+    """
+    Uruchamia zadania w ograniczonej puli watkow i przekazuje wyniki do
+    on_result w kolejnosci naplywu (w watku wywolujacym). Konczy sie po
+    wszystkich zadaniach, po deadline albo gdy should_stop() zwroci True;
+    niewystartowane zadania sa wtedy anulowane, a trwajace dostaja
+    anulowany token (current_cancel_token), zeby nie ponawialy zapytan.
+    """
+    task_list = list(tasks)
+    stats = {"submitted": len(task_list), "completed": 0, "failed": 0, "cancelled": 0, "stop_reason": "done"}
+    if not task_list:
+        return stats
+    deadline = None if deadline_s is None else time.monotonic() + max(0.0, float(deadline_s))
+    executor = ThreadPoolExecutor(max_workers=max(1, int(max_workers)), thread_name_prefix="RenataFanOut")
+    parent_token = current_cancel_token()
+    token = parent_token.child() if parent_token is not None else CancelToken()
+
+    def _bound(fn: Callable[[], Any]) -> Any:
+        with bind_cancel_token(token):
+            return fn()
+
+    pending: dict[Future, Any] = {executor.submit(_bound, fn): key for key, fn in task_list}
+    try:
+        while pending:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0.0:
+                stats["stop_reason"] = "deadline"
+                break
+            done, _ = wait(list(pending.keys()), timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                key = pending.pop(future)
+                try:
+                    value = future.result()
+                except Exception as exc:
+                    stats["failed"] += 1
+                    log_event_throttled(
+                        "provider_fanout.task",
+                        5000,
+                        "WARN",
+                        "provider fan-out task failed",
+                        task=str(key),
+                        error=f"{type(exc).__name__}: {exc}",
+                    )
+                    continue
+                stats["completed"] += 1
+                if on_result is not None:
+                    on_result(key, value)
+            if should_stop is not None and pending and should_stop():
+                stats["stop_reason"] = "enough_results"
+                break
+    finally:
+        token.cancel(f"fanout_{stats['stop_reason']}")
+        for future in pending:
+            if future.cancel():
+                stats["cancelled"] += 1
+        executor.shutdown(wait=False, cancel_futures=True)
+    return stats
@@ -0,0 +1,300 @@
+"""
+Symulacja paliwa i skokow dla zaplanowanej trasy (neutron / riches / ELW).
+
+Na bazie krzywej zasiegu loadoutu (jump_range_engine.JumpRangeCurve) i
+biezacego stanu statku (paliwo, ladunek, zbiornik) liczy dla kazdego odcinka:
+ile skokow naprawde potrzeba, ile paliwa zejdzie, jaki bedzie zasieg i gdzie
+trzeba tankowac (scoop). Model:
+- paliwo na skok: fuel_multiplier * (d * masa / opt_mass) ^ fuel_power,
+- supercharge (NS x4, WD x1.5) dzieli dystans pierwszego skoku z gwiazdy,
+- booster Guardian skraca efektywny dystans proporcjonalnie do bonusu,
+- na gwiezdzie scoopowalnej (KGBFOAM) tankujemy do pelna, gdy paliwa jest
+  mniej niz prog albo nie starczy na nastepny odcinek,
+- wiersz bez danych o gwiezdzie (typowy wynik neutron plottera) i gwiazdy
+  posrednie odcinka wieloskokowego to scoopowalnosc nieznana, nie "nie":
+  symulacja zaklada tankowanie, oznacza je jako refuel_assumed i nie zglasza
+  braku paliwa, ktorego nie umie stwierdzic.
+Jedna petla po odcinkach na stalych z krzywej - 1000 hopow to milisekundy,
+wiec symulacje mozna powtarzac na zywo przy kazdej zmianie paliwa.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+import config
+from logic.jump_range_engine import JumpRangeCurve, get_jump_range_curve
+
+NEUTRON_BOOST = 4.0
+WHITE_DWARF_BOOST = 1.5
+SCOOPABLE_CLASSES = frozenset("KGBFOAM")
+DEFAULT_REFUEL_THRESHOLD = 0.5
+_EPS = 1e-9
+
+
+@dataclass
+class RouteFuelSimulation:
+    ok: bool
+    hops: List[Dict[str, Any]] = field(default_factory=list)
+    total_jumps: int = 0
+    fuel_used_t: float = 0.0
+    refuel_points: List[str] = field(default_factory=list)
+    runs_dry_at: Optional[int] = None
+    error: Optional[str] = None
+    # True, gdy wynik opiera sie na tankowaniu w systemie bez danych o gwiezdzie.
+    fuel_unknown: bool = False
+
+    @property
+    def runs_dry_system(self) -> Optional[str]:
+        if self.runs_dry_at is None or self.runs_dry_at >= len(self.hops):
+            return None
+        return self.hops[self.runs_dry_at].get("system")
+
+
+def _coords(entry: Any) -> Optional[tuple[float, float, float]]:
+    if isinstance(entry, dict):
+        src = entry.get("coords") if isinstance(entry.get("coords"), dict) else entry
+        try:
+            return (float(src["x"]), float(src["y"]), float(src["z"]))
+        except Exception:
+            return None
+    try:
+        return (float(entry[0]), float(entry[1]), float(entry[2]))
+    except Exception:
+        return None
+
+
+def _flag(entry: Any, keys: Sequence[str]) -> bool:
+    if not isinstance(entry, dict):
+        return False
+    for key in keys:
+        value = entry.get(key)
+        if isinstance(value, str):
+            if value.strip().lower() in ("1", "true", "yes", "tak"):
+                return True
+        elif value:
+            return True
+    return False
+
+
+def _star_class(entry: Any) -> str:
+    if not isinstance(entry, dict):
+        return ""
+    for key in ("star_class", "star_type", "primary_star_type"):
+        value = str(entry.get(key) or "").strip()
+        if value:
+            return value
+    return ""
+
+
+def _is_scoopable(entry: Any) -> Optional[bool]:
+    """True/False z flag SPANSH albo klasy gwiazdy; None = brak danych."""
+    if isinstance(entry, dict):
+        for key in ("scoopable", "is_scoopable", "fuel_scoopable"):
+            if key in entry and entry.get(key) is not None:
+                return _flag(entry, (key,))
+        # SPANSH oznacza postoj na tankowanie tylko przy gwiezdzie scoopowalnej.
+        if _flag(entry, ("refuel", "must_refuel")):
+            return True
+    star = _star_class(entry)
+    if not star:
+        return None
+    return star[0].upper() in SCOOPABLE_CLASSES and "dwarf" not in star.lower()
+
+
+def _boost_from(entry: Any) -> float:
+    if _flag(entry, ("neutron", "is_neutron", "neutron_star", "neutron_jump")):
+        return NEUTRON_BOOST
+    if _flag(entry, ("white_dwarf", "is_white_dwarf")) or "white dwarf" in _star_class(entry).lower():
+        return WHITE_DWARF_BOOST
+    return 1.0
+
+
+def _planned_jumps(entry: Any) -> int:
+    if not isinstance(entry, dict):
+        return 0
+    try:
+        return int(entry.get("jumps") or 0)
+    except Exception:
+        return 0
+
+
+def _fuel_for_distance(curve: JumpRangeCurve, distance: float, mass: float, boost: float, bonus: float) -> float:
+    """Paliwo na jeden skok o dystansie distance (po supercharge i boosterze)."""
+    if distance <= 0.0:
+        return 0.0
+    effective = distance / boost
+    if bonus > 0.0:
+        base_max = curve.base_range(mass, curve.max_fuel_t) or 0.0
+        if base_max > 0.0:
+            effective *= base_max / (base_max + bonus)
+    return curve.fuel_multiplier * (effective * mass / curve.opt_mass_t) ** curve.fuel_power
+
+
+def _max_jump(curve: JumpRangeCurve, mass: float, fuel: float, boost: float, bonus: float) -> float:
+    base = curve.base_range(mass, min(fuel, curve.max_fuel_t)) or 0.0
+    if base <= 0.0:
+        return 0.0
+    return (base + bonus) * boost
+
+
+def simulate_route_fuel(
+    route: Sequence[Any],
+    *,
+    ship_state: Any | None = None,
+    modules_data: Dict[str, Any] | None = None,
+    curve: JumpRangeCurve | None = None,
+    fuel_t: float | None = None,
+    cargo_t: float | None = None,
+    tank_t: float | None = None,
+    refuel_threshold: float | None = None,
+) -> RouteFuelSimulation:
+    """
+    Symuluje trase (wiersze details z planerow SPANSH albo krotki x,y,z).
+    Pierwszy wiersz to system startowy. Brakujace parametry bierze z
+    app_state (ship_state, modules_data) - wynik zmienia sie razem z paliwem.
+    """
+    if ship_state is None or (curve is None and modules_data is None):
+        try:
+            from app.state import app_state
+
+            ship_state = ship_state if ship_state is not None else getattr(app_state, "ship_state", None)
+            if modules_data is None:
+                modules_data = getattr(app_state, "modules_data", None)
+        except Exception:
+            pass
+    if curve is None:
+        curve = get_jump_range_curve(ship_state, modules_data or {}) if ship_state is not None else None
+    if curve is None or curve.unladen_mass_t is None or curve.opt_mass_t <= 0 or curve.max_fuel_t <= 0:
+        return RouteFuelSimulation(ok=False, error="missing_jump_range_curve")
+
+    def _ship_float(value: float | None, attr: str) -> Optional[float]:
+        if value is not None:
+            return float(value)
+        raw = getattr(ship_state, attr, None)
+        try:
+            return float(raw) if raw is not None else None
+        except Exception:
+            return None
+
+    fuel = _ship_float(fuel_t, "fuel_main_t")
+    cargo = _ship_float(cargo_t, "cargo_mass_t") or 0.0
+    tank = _ship_float(tank_t, "fuel_capacity_main_t")
+    if fuel is None:
+        return RouteFuelSimulation(ok=False, error="missing_fuel")
+    if tank is None or tank <= 0.0:
+        tank = max(fuel, curve.max_fuel_t)
+    threshold = refuel_threshold
+    if threshold is None:
+        try:
+            threshold = float(config.get("route_fuel_refuel_threshold", DEFAULT_REFUEL_THRESHOLD))
+        except Exception:
+            threshold = DEFAULT_REFUEL_THRESHOLD
+    reservoir = 0.0
+    if bool(config.get("jump_range_include_reservoir_mass", True)):
+        reservoir = _ship_float(None, "fuel_reservoir_t") or 0.0
+
+    points = [_coords(entry) for entry in route]
+    if len(points) < 2 or any(point is None for point in points):
+        return RouteFuelSimulation(ok=False, error="missing_coords")
+    distances = [math.dist(points[i], points[i + 1]) for i in range(len(points) - 1)]
+    dry_mass = float(curve.unladen_mass_t) + cargo + reservoir
+    bonus = curve.booster_bonus_ly
+    max_fuel = curve.max_fuel_t
+
+    def _hop_need(index: int, fuel_now: float) -> tuple[int, float, bool, float]:
+        """
+        (skoki, paliwo, wykonalny, dotankowane) dla odcinka index przy paliwie
+        fuel_now. Gwiazdy posrednie odcinka wieloskokowego nie sa w trasie
+        SPANSH - gdy paliwo konczy sie po drodze, zakladamy dotankowanie.
+        """
+        remaining = distances[index]
+        boost = _boost_from(route[index])
+        full_range = _max_jump(curve, dry_mass + tank, tank, boost, bonus)
+        multi_jump = remaining > full_range + _EPS or _planned_jumps(route[index + 1]) > 1
+        jumps = 0
+        used = 0.0
+        scooped = 0.0
+        left = fuel_now
+        while remaining > _EPS:
+            mass = dry_mass + left
+            # Z niepelnym paliwem skok jest krotszy; przy pustym baku koniec.
+            step = min(remaining, _max_jump(curve, mass, left, boost, bonus))
+            need = min(_fuel_for_distance(curve, step, mass, boost, bonus), max_fuel) if step > _EPS else 0.0
+            if step <= _EPS or need > left + _EPS:
+                if not multi_jump or jumps == 0 or left >= tank - _EPS:
+                    return jumps, used, False, scooped
+                scooped += tank - left
+                left = tank
+                continue
+            used += need
+            left -= need
+            jumps += 1
+            remaining -= step
+            boost = 1.0
+        return jumps, used, True, scooped
+
+    hops: List[Dict[str, Any]] = []
+    refuel_points: List[str] = []
+    total_jumps = 0
+    total_used = 0.0
+    runs_dry_at: Optional[int] = None
+    fuel_unknown = False
+
+    for index in range(len(distances)):
+        entry = route[index + 1]
+        name = str(entry.get("system") or entry.get("name") or "") if isinstance(entry, dict) else ""
+        fuel_before = fuel
+        range_before = _max_jump(curve, dry_mass + fuel, fuel, _boost_from(route[index]), bonus)
+        jumps, used, feasible, scooped_mid = _hop_need(index, fuel)
+        fuel += scooped_mid - used
+        total_used += used
+        total_jumps += jumps
+        row: Dict[str, Any] = {
+            "system": name,
+            "distance_ly": round(distances[index], 2),
+            "boost": _boost_from(route[index]),
+            "jumps": jumps,
+            "fuel_before_t": round(fuel_before, 3),
+            "fuel_used_t": round(used, 3),
+            "fuel_after_t": round(fuel, 3),
+            "range_ly": round(range_before, 2),
+            "refuel": False,
+            "refuel_assumed": scooped_mid > 0.0,
+            "scooped_t": round(scooped_mid, 3),
+            "ok": feasible,
+        }
+        hops.append(row)
+        fuel_unknown = fuel_unknown or scooped_mid > 0.0
+        if not feasible:
+            runs_dry_at = index
+            break
+
+        scoopable = _is_scoopable(entry)
+        if scoopable is not False and fuel < tank - _EPS:
+            low = fuel < tank * float(threshold)
+            if not low and index + 1 < len(distances):
+                _jumps, _need, next_ok, next_scoop = _hop_need(index + 1, fuel)
+                low = not next_ok or next_scoop > 0.0
+            if low:
+                row["scooped_t"] = round(row["scooped_t"] + tank - fuel, 3)
+                fuel = tank
+                row["fuel_after_t"] = round(fuel, 3)
+                if scoopable:
+                    row["refuel"] = True
+                    refuel_points.append(name)
+                else:
+                    row["refuel_assumed"] = True
+                    fuel_unknown = True
+
+    return RouteFuelSimulation(
+        ok=runs_dry_at is None,
+        hops=hops,
+        total_jumps=total_jumps,
+        fuel_used_t=round(total_used, 3),
+        refuel_points=refuel_points,
+        runs_dry_at=runs_dry_at,
+        fuel_unknown=fuel_unknown,
+    )
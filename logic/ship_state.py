@@ -1,13 +1,26 @@
 from __future__ import annotations
 
+import threading
 import time
 from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional
 
 import config
 from logic.utils import MSG_QUEUE, DEBOUNCER
+from logic.utils.bounded_cache import BoundedCache
 from logic.utils.renata_log import log_event_throttled
 
+# Minimalne opoznienie "domkniecia" zasiegu po ostatnim ticku paliwa, gdy
+# limit emisji jest wylaczony (ship_state_emit_max_per_sec = 0).
+_SETTLE_MIN_SEC = 0.25
+
+
+def _config_float(key: str, default: float) -> float:
+    try:
+        return float(config.get(key, default))
+    except Exception:
+        return float(default)
+
 
 @dataclass
 class ShipState:
@@ -17,6 +30,7 @@ class ShipState:
     cargo_mass_t: Optional[float] = None
     fuel_main_t: Optional[float] = None
     fuel_reservoir_t: Optional[float] = None
+    fuel_capacity_main_t: Optional[float] = None
     modules: List[Dict[str, Any]] = field(default_factory=list)
     fsd: Dict[str, Any] = field(
         default_factory=lambda: {
@@ -46,6 +60,28 @@ class ShipState:
     jump_range_validate_delta_ly: Optional[float] = None
     _jump_range_last_status_code: Optional[str] = None
 
+    # Liczniki memo zasiegu / emisji (diagnostyka).
+    jump_range_computes: int = field(default=0, repr=False, compare=False)
+    jump_range_cache_hits: int = field(default=0, repr=False, compare=False)
+    emit_suppressed: int = field(default=0, repr=False, compare=False)
+
+    # Krzywa FSD rozwiazana raz na loadout + memo wynikow po skwantowanej masie.
+    _jr_curve: Any = field(default=None, init=False, repr=False, compare=False)
+    _jr_modules_id: Optional[int] = field(default=None, init=False, repr=False, compare=False)
+    _jr_memo: Optional[BoundedCache] = field(default=None, init=False, repr=False, compare=False)
+    _jr_from_memo: bool = field(default=False, init=False, repr=False, compare=False)
+    _jr_settle_pending: bool = field(default=False, init=False, repr=False, compare=False)
+
+    # Zbiorcza emisja ship_state dla tickow Fuel/Cargo.
+    _emit_lock: Any = field(default_factory=threading.RLock, init=False, repr=False, compare=False)
+    _emit_pending: bool = field(default=False, init=False, repr=False, compare=False)
+    _emit_last_mono: float = field(default=0.0, init=False, repr=False, compare=False)
+    _emit_tick_mono: float = field(default=0.0, init=False, repr=False, compare=False)
+    _emit_timer: Any = field(default=None, init=False, repr=False, compare=False)
+    _emit_timer_due: float = field(default=0.0, init=False, repr=False, compare=False)
+    _last_emitted_jr: Optional[float] = field(default=None, init=False, repr=False, compare=False)
+    _last_emitted_complete: Optional[bool] = field(default=None, init=False, repr=False, compare=False)
+
     last_update_ts: Optional[float] = None
     last_update_by: Dict[str, float] = field(default_factory=dict)
 
@@ -60,6 +96,7 @@ class ShipState:
         self.last_update_by[source] = now
 
     def _emit_update(self) -> None:
+        completeness = self.get_completeness()
         payload = {
             "ship_id": self.ship_id,
             "ship_type": self.ship_type,
@@ -67,6 +104,7 @@ class ShipState:
             "cargo_mass_t": self.cargo_mass_t,
             "fuel_main_t": self.fuel_main_t,
             "fuel_reservoir_t": self.fuel_reservoir_t,
+            "fuel_capacity_main_t": self.fuel_capacity_main_t,
             "fsd": self.fsd,
             "fsd_booster": self.fsd_booster,
             "fit_ready_for_jr": self.fit_ready_for_jr,
@@ -77,11 +115,99 @@ class ShipState:
             "jump_range_fuel_needed_t": self.jump_range_fuel_needed_t,
             "loadout_max_jump_range_ly": self.loadout_max_jump_range_ly,
             "jump_range_validate_delta_ly": self.jump_range_validate_delta_ly,
-            "completeness": self.get_completeness(),
+            "completeness": completeness,
             "ts": self.last_update_ts,
         }
+        with self._emit_lock:
+            self._emit_pending = False
+            self._emit_last_mono = time.monotonic()
+            self._last_emitted_jr = self.jump_range_current_ly
+            self._last_emitted_complete = all(completeness.values())
         MSG_QUEUE.put(("ship_state", payload))
 
+    def _emit_interval_sec(self) -> float:
+        per_sec = _config_float("ship_state_emit_max_per_sec", 4.0)
+        return 1.0 / per_sec if per_sec > 0 else 0.0
+
+    def _emit_significant(self) -> bool:
+        """Zasieg przesunal sie o wiecej niz epsilon albo zmienil sie is_complete()."""
+        if self.is_complete() != self._last_emitted_complete:
+            return True
+        previous = self._last_emitted_jr
+        current = self.jump_range_current_ly
+        if previous is None or current is None:
+            return previous is not current
+        return abs(float(current) - float(previous)) > _config_float("jump_range_emit_epsilon_ly", 0.01)
+
+    def _request_emit_update(self) -> None:
+        """
+        Emisja po zmianie paliwa/ladunku: od razu tylko przy istotnej zmianie
+        i wolnym oknie limitu; pozostale zmiany ida zbiorczo (trailing flush),
+        wiec ostatni stan zawsze trafia do GUI.
+        """
+        interval = self._emit_interval_sec()
+        with self._emit_lock:
+            now = time.monotonic()
+            self._emit_tick_mono = now
+            if self._jr_from_memo:
+                self._jr_settle_pending = True
+                self._schedule_flush_locked(max(interval, _SETTLE_MIN_SEC))
+            if interval <= 0 or (
+                now - self._emit_last_mono >= interval and self._emit_significant()
+            ):
+                self._emit_update()
+                return
+            self.emit_suppressed += 1
+            self._emit_pending = True
+            due = self._emit_last_mono + interval
+            self._schedule_flush_locked(due - now if due > now else interval)
+
+    def _schedule_flush_locked(self, delay: float) -> None:
+        delay = max(0.0, float(delay))
+        due = time.monotonic() + delay
+        timer = self._emit_timer
+        if timer is not None:
+            if self._emit_timer_due <= due:
+                return
+            timer.cancel()
+        timer = threading.Timer(delay, self.flush_pending_update)
+        timer.daemon = True
+        self._emit_timer = timer
+        self._emit_timer_due = due
+        timer.start()
+
+    def flush_pending_update(self, *, force: bool = False) -> None:
+        """
+        Trailing flush zbiorczej emisji. Gdy ticki ucichly, zasieg wziety z memo
+        (skwantowana masa) jest przeliczany dokladnie, zeby ostatnia emitowana
+        wartosc byla rowna niecachowanej. force=True: bez czekania na okno.
+        """
+        with self._emit_lock:
+            if self._emit_timer is threading.current_thread():
+                self._emit_timer = None
+            now = time.monotonic()
+            interval = self._emit_interval_sec()
+            settle_delay = max(interval, _SETTLE_MIN_SEC)
+            quiet_for = now - self._emit_tick_mono
+            if self._jr_settle_pending and (force or quiet_for >= settle_delay):
+                self._jr_settle_pending = False
+                if self._jr_from_memo:
+                    before = (self.jump_range_current_ly, self.jump_range_limited_by)
+                    self._compute_jump_range("status_change", use_memo=False)
+                    if (self.jump_range_current_ly, self.jump_range_limited_by) != before:
+                        self._emit_pending = True
+            if self._emit_pending:
+                wait = self._emit_last_mono + interval - now
+                if wait > 0 and not force:
+                    self._schedule_flush_locked(wait)
+                else:
+                    self._emit_update()
+            if self._jr_settle_pending:
+                self._schedule_flush_locked(settle_delay - quiet_for)
+            elif not self._emit_pending and self._emit_timer is not None and force:
+                self._emit_timer.cancel()
+                self._emit_timer = None
+
     def _should_compute_jump_range(self, trigger: str) -> bool:
         if not config.get("jump_range_engine_enabled", True):
             return False
@@ -128,7 +254,82 @@ class ShipState:
         if trigger == "loadout":
             self._validate_jump_range()
 
-    def _compute_jump_range(self, trigger: str) -> None:
+    def _refresh_jump_range_loadout(self, modules_data: Dict[str, Any]) -> None:
+        """Krzywa FSD (ResolvedFsd) liczona raz na loadout; czysci memo zasiegu."""
+        from logic.jump_range_engine import get_jump_range_curve
+
+        curve = get_jump_range_curve(self, modules_data)
+        changed = curve is not self._jr_curve
+        self._jr_curve = curve
+        self._jr_modules_id = id(modules_data)
+        max_items = int(_config_float("jump_range_memo_max_items", 256))
+        if self._jr_memo is None:
+            self._jr_memo = BoundedCache(
+                "ship_state.jump_range",
+                ttl_sec=None,
+                max_items=max_items,
+                freeze_values=False,
+                register=False,
+            )
+        else:
+            self._jr_memo.configure(max_items=max_items)
+        self._jr_memo.clear()
+        self._jr_from_memo = False
+        if changed:
+            self._log_debug(
+                f"JR cache: loadout changed, memo cleared "
+                f"(computes={self.jump_range_computes}, hits={self.jump_range_cache_hits}, "
+                f"suppressed_emits={self.emit_suppressed})"
+            )
+
+    def _jump_range_memo_key(self) -> Optional[tuple]:
+        curve = self._jr_curve
+        step = _config_float("jump_range_memo_mass_quantum_t", 0.05)
+        if curve is None or step <= 0:
+            return None
+        if self.unladen_mass_t is None or self.cargo_mass_t is None or self.fuel_main_t is None:
+            return None
+        include_res = bool(config.get("jump_range_include_reservoir_mass", True))
+        if include_res and self.fuel_reservoir_t is None:
+            return None
+        try:
+            fuel_main = float(self.fuel_main_t)
+            mass = float(self.unladen_mass_t) + float(self.cargo_mass_t) + fuel_main
+            if include_res:
+                mass += float(self.fuel_reservoir_t or 0.0)
+        except Exception:
+            return None
+        max_fuel = curve.max_fuel_t
+        # Ponizej max_fuel zasieg zalezy tez od paliwa, nie tylko od masy.
+        return (
+            include_res,
+            config.get("jump_range_rounding", 2),
+            round(mass / step),
+            round(min(fuel_main, max_fuel) / step),
+            fuel_main > 0,
+            fuel_main < max_fuel,
+        )
+
+    def _compute_jump_range_result(self, modules_data: Dict[str, Any], use_memo: bool) -> Any:
+        from logic.jump_range_engine import compute_jump_range_current
+
+        key = self._jump_range_memo_key() if use_memo and self._jr_memo is not None else None
+        if key is not None:
+            cached = self._jr_memo.get(key)
+            if cached is not None:
+                self.jump_range_cache_hits += 1
+                self._jr_from_memo = True
+                return cached
+        result = compute_jump_range_current(self, modules_data, curve=self._jr_curve)
+        self.jump_range_computes += 1
+        self._jr_from_memo = False
+        if self._jr_memo is not None and self._jr_curve is not None:
+            key = key if key is not None else self._jump_range_memo_key()
+            if key is not None:
+                self._jr_memo.set(key, result)
+        return result
+
+    def _compute_jump_range(self, trigger: str, *, use_memo: bool = True) -> None:
         if not self._should_compute_jump_range(trigger):
             return
         try:
@@ -154,9 +355,13 @@ class ShipState:
             return
 
         try:
-            from logic.jump_range_engine import compute_jump_range_current
-
-            result = compute_jump_range_current(self, modules_data)
+            if (
+                trigger == "loadout"
+                or self._jr_curve is None
+                or self._jr_modules_id != id(modules_data)
+            ):
+                self._refresh_jump_range_loadout(modules_data)
+            result = self._compute_jump_range_result(modules_data, use_memo)
         except Exception as exc:
             self.jump_range_current_ly = None
             self.jump_range_current_source = None
@@ -310,6 +515,17 @@ class ShipState:
             self.unladen_mass_t = unladen_mass
             changed = True
 
+        fuel_capacity = event.get("FuelCapacity")
+        capacity_main = fuel_capacity.get("Main") if isinstance(fuel_capacity, dict) else None
+        if capacity_main is not None:
+            try:
+                capacity_main = float(capacity_main)
+            except Exception:
+                capacity_main = None
+        if capacity_main is not None and capacity_main != self.fuel_capacity_main_t:
+            self.fuel_capacity_main_t = capacity_main
+            changed = True
+
         if max_jump_range is not None:
             try:
                 max_jump_range = float(max_jump_range)
@@ -356,8 +572,9 @@ class ShipState:
                 f"Loadout: ship_id={self.ship_id}, ship_type={self.ship_type}, "
                 f"unladen={self.unladen_mass_t}"
             )
-            self.recompute_jump_range("loadout")
-            self._emit_update()
+            with self._emit_lock:
+                self.recompute_jump_range("loadout")
+                self._emit_update()
 
     def update_from_status_json(self, data: Dict[str, Any], source: str = "status_json") -> None:
         if not data:
@@ -393,8 +610,9 @@ class ShipState:
             self._log_debug(
                 f"Fuel: main={self.fuel_main_t}, reservoir={self.fuel_reservoir_t}"
             )
-            self._compute_jump_range("status_change")
-            self._emit_update()
+            with self._emit_lock:
+                self._compute_jump_range("status_change")
+                self._request_emit_update()
 
     def update_from_cargo_json(self, data: Dict[str, Any], source: str = "cargo_json") -> None:
         if not data:
@@ -440,8 +658,9 @@ class ShipState:
             self.cargo_mass_t = cargo_mass
             self._mark_updated(source)
             self._log_debug(f"Cargo: mass={self.cargo_mass_t}")
-            self._compute_jump_range("status_change")
-            self._emit_update()
+            with self._emit_lock:
+                self._compute_jump_range("status_change")
+                self._request_emit_update()
 
     def get_completeness(self) -> Dict[str, bool]:
         return {
@@ -456,3 +675,10 @@ class ShipState:
     def is_complete(self) -> bool:
         comp = self.get_completeness()
         return all(comp.values())
+
+    def get_jump_range_stats(self) -> Dict[str, int]:
+        return {
+            "computes": self.jump_range_computes,
+            "cache_hits": self.jump_range_cache_hits,
+            "suppressed_emits": self.emit_suppressed,
+        }
@@ -12,8 +12,10 @@ from __future__ import annotations
 
 import time
 import json
+import threading
+from contextlib import contextmanager
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 import copy
 
 import requests
@@ -26,6 +28,7 @@ from logic.spansh_payloads import SpanshPayload
 from logic.utils.notify import powiedz, DEBOUNCER, MSG_QUEUE
 from logic.utils.http_edsm import is_edsm_enabled
 from logic.utils.renata_log import log_event, log_event_throttled
+from logic.utils.cancellation import CancelToken, current_cancel_token
 from logic.request_dedup import make_request_key, run_deduped
 
 
@@ -67,6 +70,21 @@ class _RouteCacheSnapshot:
 
 # --- Wspólny helper do obsługi błędów SPANSH --------------------------------
 
+_QUIET_ERRORS = threading.local()
+# Prefiks kluczy run_deduped dla prefetchu - osobno od zapytan uzytkownika.
+_SPECULATIVE_DEDUP_PREFIX = "speculative:"
+
+
+@contextmanager
+def _quiet_spansh_errors() -> Iterator[None]:
+    """W tym wątku błędy SPANSH idą tylko do logu (zapytania spekulatywne)."""
+    previous = getattr(_QUIET_ERRORS, "active", False)
+    _QUIET_ERRORS.active = True
+    try:
+        yield
+    finally:
+        _QUIET_ERRORS.active = previous
+
 
 def spansh_error(message: str, gui_ref: Any | None = None, *, context: str | None = None) -> None:
     """
@@ -79,6 +97,10 @@ def spansh_error(message: str, gui_ref: Any | None = None, *, context: str | Non
     if context:
         key = f"{key}:{context}"
 
+    if getattr(_QUIET_ERRORS, "active", False):
+        log_event_throttled(key, 5000, "SPANSH", "quiet spansh error", context=context or "", message=message)
+        return
+
     # delikatny cooldown – ten sam błąd max raz na kilka sekund
     if not DEBOUNCER.is_allowed(key, cooldown_sec=5.0, context=context):
         return
@@ -592,15 +614,18 @@ class SpanshClient:
         poll_seconds: Optional[float] = None,
         polls: Optional[int] = None,
         endpoint_path: str | None = None,
+        cancel_token: CancelToken | None = None,
     ) -> Optional[Any]:
         """
         Ogólny klient jobowy:
         - riches / ammonia / elw / hmc / exomastery / trade
         - neutron (przez specjalny path)
 
-        Zwraca js.get("result", ...) lub None jeśli błąd.
+        Zwraca js.get("result", ...) lub None jeśli błąd albo job anulowano
+        (cancel_token, domyślnie token joba RouteManagera z bieżącego wątku).
         """
         self._reload_config()
+        token = cancel_token if cancel_token is not None else current_cancel_token()
         try:
             poll_seconds = float(poll_seconds) if poll_seconds is not None else float(self.default_poll_interval)
         except Exception:
@@ -634,6 +659,15 @@ class SpanshClient:
             )
             return cache_snapshot.fresh_value
 
+        if token is not None and token.cancelled:
+            self._record_route_telemetry(
+                ctx,
+                status="CANCELLED",
+                start_ts=start_ts,
+                freshness=self._freshness_from_source("ERROR_NO_DATA", ttl_seconds=ctx.ttl_seconds),
+            )
+            return None
+
         try:
             result = run_deduped(
                 ctx.cache_key,
@@ -642,6 +676,7 @@ class SpanshClient:
                     gui_ref=gui_ref,
                     poll_seconds=poll_seconds,
                     polls=polls,
+                    cancel_token=token,
                 ),
             )
         except Exception:
@@ -666,6 +701,15 @@ class SpanshClient:
             )
             return None
 
+        if result is None and token is not None and token.cancelled:
+            self._record_route_telemetry(
+                ctx,
+                status="CANCELLED",
+                start_ts=start_ts,
+                freshness=self._freshness_from_source("ERROR_NO_DATA", ttl_seconds=ctx.ttl_seconds),
+            )
+            return None
+
         if result is None:
             if cache_snapshot.stale_available:
                 freshness = self._freshness_from_source(
@@ -700,6 +744,78 @@ class SpanshClient:
         self._route_cache_store(ctx, result)
         return result
 
+    def route_cache_key(
+        self,
+        mode: str,
+        payload: Any,
+        referer: str,
+        *,
+        endpoint_path: str | None = None,
+    ) -> str:
+        """Klucz cache, pod którym route() zapisze/odczyta wynik dla tego payloadu."""
+        return self._build_route_context(mode, payload, referer, endpoint_path=endpoint_path).cache_key
+
+    def prefetch_route(
+        self,
+        mode: str,
+        payload: Any,
+        referer: str,
+        *,
+        endpoint_path: str | None = None,
+        cancel_token: CancelToken | None = None,
+        polls: int = 60,
+    ) -> str:
+        """
+        Spekulatywne wyliczenie trasy do cache pod kluczem route().
+
+        Bez komunikatów GUI/TTS i bez DEBOUNCER-a zapytań użytkownika.
+        Dedup w osobnej przestrzeni kluczy: route() użytkownika nigdy nie
+        dołącza do zadania spekulatywnego, które może zostać anulowane.
+        Zwraca: "cached" | "stored" | "cancelled" | "failed".
+        """
+        self._reload_config()
+        ctx = self._build_route_context(mode, payload, referer, endpoint_path=endpoint_path)
+        hit, _cached, _meta = self.cache.get(ctx.cache_key)
+        if hit:
+            return "cached"
+        if cancel_token is not None and cancel_token.cancelled:
+            return "cancelled"
+
+        def _pipeline() -> Optional[Any]:
+            job = self._request_route_job(ctx, gui_ref=None)
+            if not job:
+                return None
+            js = self._poll_results(
+                job,
+                mode=ctx.mode,
+                gui_ref=None,
+                poll_seconds=float(self.default_poll_interval),
+                polls=max(1, int(polls)),
+                cancel_token=cancel_token,
+            )
+            if js is None:
+                return None
+            result = self._extract_route_result(js)
+            self._route_cache_store(ctx, result)
+            return result
+
+        try:
+            with _quiet_spansh_errors():
+                result = run_deduped(_SPECULATIVE_DEDUP_PREFIX + ctx.cache_key, _pipeline)
+        except Exception as exc:
+            log_event_throttled(
+                f"SPANSH:prefetch:{ctx.mode}",
+                10_000,
+                "SPANSH",
+                "speculative route prefetch failed",
+                mode=ctx.mode,
+                error=f"{type(exc).__name__}: {exc}",
+            )
+            return "failed"
+        if result is None:
+            return "cancelled" if cancel_token is not None and cancel_token.cancelled else "failed"
+        return "stored"
+
     def _build_route_context(
         self,
         mode: str,
@@ -830,6 +946,7 @@ class SpanshClient:
         gui_ref: Any | None,
         poll_seconds: float,
         polls: int,
+        cancel_token: CancelToken | None = None,
     ) -> Optional[Any]:
         if not DEBOUNCER.is_allowed("spansh_route", cooldown_sec=1.0, context=ctx.mode):
             spansh_error("Odczekaj chwilę przed kolejnym zapytaniem SPANSH.", gui_ref, context=ctx.mode)
@@ -845,6 +962,7 @@ class SpanshClient:
             gui_ref=gui_ref,
             poll_seconds=poll_seconds,
             polls=polls,
+            cancel_token=cancel_token,
         )
         if js is None:
             return None
@@ -1034,6 +1152,7 @@ class SpanshClient:
         return_details: bool = False,
         supercharge_mode: str | None = None,
         via: List[str] | None = None,
+        cancel_token: CancelToken | None = None,
     ) -> List[str] | tuple[List[str], List[dict[str, Any]]]:
         """
         Wersja dedykowana dla Neutron Plottera.
@@ -1063,6 +1182,7 @@ class SpanshClient:
             payload=payload,
             referer="https://spansh.co.uk/plotter",
             gui_ref=gui_ref,
+            cancel_token=cancel_token,
         )
         if not result:
             return ([], []) if return_details else []
@@ -1137,6 +1257,11 @@ class SpanshClient:
                                 "jumps_remaining",
                             ],
                         ),
+                        # Dane o gwiezdzie dla symulacji paliwa; neutron plotter
+                        # zwykle ich nie zwraca (None = scoopowalnosc nieznana).
+                        "refuel": _pick(entry, ["refuel", "must_refuel"]),
+                        "scoopable": _pick(entry, ["is_scoopable", "scoopable", "fuel_scoopable"]),
+                        "star_class": _pick(entry, ["star_class", "star_type", "primary_star_type"]),
                         "x": entry.get("x"),
                         "y": entry.get("y"),
                         "z": entry.get("z"),
@@ -1189,15 +1314,27 @@ class SpanshClient:
         gui_ref: Any | None,
         poll_seconds: float,
         polls: int,
+        cancel_token: CancelToken | None = None,
     ) -> Optional[Any]:
         """
         Polling wyniku joba:
         GET /api/results/<job>
+
+        Anulowany cancel_token przerywa polling (takze w trakcie odczekiwania).
         """
         url = f"{self.base_url}/results/{job}"
         headers = self._headers(referer="https://spansh.co.uk")
 
+        def _sleep_or_cancelled() -> bool:
+            if cancel_token is None:
+                time.sleep(poll_seconds)
+                return False
+            return cancel_token.wait(poll_seconds)
+
         for _ in range(polls):
+            if cancel_token is not None and cancel_token.cancelled:
+                self._log_cancelled(mode, job, cancel_token)
+                return None
             try:
                 r = requests.get(
                     url,
@@ -1209,9 +1346,9 @@ class SpanshClient:
                 return None
 
             if r.status_code == 202:
-
-                time.sleep(poll_seconds)
-
+                if _sleep_or_cancelled():
+                    self._log_cancelled(mode, job, cancel_token)
+                    return None
                 continue
 
 
@@ -1227,7 +1364,9 @@ class SpanshClient:
 
             status = js.get("status")
             if status in ("queued", "running"):
-                time.sleep(poll_seconds)
+                if _sleep_or_cancelled():
+                    self._log_cancelled(mode, job, cancel_token)
+                    return None
                 continue
 
             if status != "ok":
@@ -1239,6 +1378,15 @@ class SpanshClient:
         spansh_error(f"{mode.upper()}: timeout pollingu wyników.", gui_ref, context=mode)
         return None
 
+    def _log_cancelled(self, mode: str, job: str, cancel_token: CancelToken | None) -> None:
+        log_event(
+            "SPANSH",
+            "route polling cancelled",
+            mode=mode,
+            job=job,
+            reason=str(getattr(cancel_token, "reason", "") or "cancelled"),
+        )
+
     def _headers(self, referer: Optional[str] = None) -> Dict[str, str]:
         """
         Buduje nagłówki dla zapytań SPANSH:
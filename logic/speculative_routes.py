@@ -0,0 +1,346 @@
+"""
+Spekulatywne wyliczanie tras neutronowych SPANSH.
+
+Gdy Renata jest bezczynna (journal stoi, żaden planner nie liczy), serwis
+wysyła w tle zapytanie neutron do najbardziej prawdopodobnych celów:
+- endpoint NavRoute z gry,
+- system stacji wybranej przez asystenta cash-in.
+
+Wynik trafia do cache SpanshClient pod dokładnie tym kluczem, którego użyje
+route() dla tego samego payloadu z zakładki Neutron, więc "Wyznacz trasę"
+kończy się zwykle trafieniem w cache. Serwis ma budżet (równoległe joby,
+limit na godzinę) i unieważnia joby, gdy zmieni się zasięg skoku albo cel.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+import config
+from logic import spansh_payloads
+from logic.spansh_client import SpanshClient, client as default_client
+from logic.utils.cancellation import CancelToken
+from logic.utils.renata_log import log_event, log_event_throttled
+
+NEUTRON_REFERER = "https://spansh.co.uk/plotter"
+# Domyślne ustawienia zakładki Neutron (var_eff / var_supercharge / via).
+DEFAULT_NEUTRON_EFFICIENCY = 60.0
+DEFAULT_SUPERCHARGE_MODE = "normal"
+
+
+@dataclass(eq=False)
+class _SpeculativeJob:
+    cache_key: str
+    source: str
+    start: str
+    target: str
+    jump_range: float
+    token: CancelToken = field(default_factory=CancelToken)
+    started_ts: float = field(default_factory=time.monotonic)
+
+
+class SpeculativeRoutePlanner:
+    """
+    Serwis spekulatywnych tras neutron. maybe_run() jest tani i może być
+    wołany często (np. z pętli bezczynności MainLoop) - sam pilnuje
+    interwału, bezczynności i budżetu.
+    """
+
+    def __init__(
+        self,
+        *,
+        spansh: SpanshClient | None = None,
+        state: Any | None = None,
+        route_manager: Any | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._spansh = spansh
+        self._state = state
+        self._route_manager = route_manager
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._jobs: dict[str, _SpeculativeJob] = {}
+        self._starts: deque[float] = deque()
+        # source -> (cel, zasięg, klucz cache) ostatnio zaplanowanego wyliczenia
+        self._planned: dict[str, tuple[str, float, str]] = {}
+        self._stored_keys: set[str] = set()
+        self._last_activity = clock()
+        self._last_eval = 0.0
+        self._stats: dict[str, int] = {
+            "started": 0,
+            "stored": 0,
+            "cached": 0,
+            "cancelled": 0,
+            "failed": 0,
+            "invalidated": 0,
+            "budget_skipped": 0,
+        }
+
+    # ------------------------------------------------------------------ #
+    def _client(self) -> SpanshClient:
+        return self._spansh if self._spansh is not None else default_client
+
+    def _app_state(self) -> Any:
+        if self._state is not None:
+            return self._state
+        from app.state import app_state
+
+        return app_state
+
+    def _manager(self) -> Any:
+        if self._route_manager is not None:
+            return self._route_manager
+        from app.route_manager import route_manager
+
+        return route_manager
+
+    @staticmethod
+    def _enabled() -> bool:
+        return bool(config.get("features.spansh.speculative_neutron_enabled", True))
+
+    @staticmethod
+    def _cfg_float(key: str, default: float) -> float:
+        try:
+            return float(config.get(key, default))
+        except Exception:
+            return float(default)
+
+    # ------------------------------------------------------------------ #
+    def note_activity(self) -> None:
+        """Sygnał aktywności (nowa linia journala) - resetuje licznik bezczynności."""
+        self._last_activity = self._clock()
+
+    def candidate_targets(self) -> list[tuple[str, str]]:
+        """(źródło, cel) w kolejności ważności; bez duplikatów i bez bieżącego systemu."""
+        state = self._app_state()
+        current = str(state.get_current_system_name() or "").strip()
+        out: list[tuple[str, str]] = []
+        seen: set[str] = set()
+
+        nav_route = dict(getattr(state, "nav_route", None) or {})
+        pending = {}
+        getter = getattr(state, "get_pending_station_clipboard_snapshot", None)
+        if callable(getter):
+            pending = dict(getter() or {})
+        rows = [
+            ("navroute", str(nav_route.get("endpoint") or "").strip()),
+            ("cash_in", str(pending.get("target_system") or "").strip() if pending.get("active") else ""),
+        ]
+        for source, target in rows:
+            key = target.casefold()
+            if not target or key in seen or key == current.casefold():
+                continue
+            seen.add(key)
+            out.append((source, target))
+        return out
+
+    def _jump_range(self) -> float | None:
+        ship_state = getattr(self._app_state(), "ship_state", None)
+        value = getattr(ship_state, "jump_range_current_ly", None)
+        try:
+            jr = float(value) if value is not None else None
+        except Exception:
+            return None
+        if jr is None or jr <= 0.0:
+            return None
+        return jr
+
+    def build_payload(self, start: str, target: str, jump_range: float) -> spansh_payloads.SpanshPayload:
+        """Payload identyczny z tym, który zbuduje zakładka Neutron z domyślnymi ustawieniami."""
+        return spansh_payloads.build_neutron_payload(
+            start=start,
+            cel=target,
+            jump_range=jump_range,
+            eff=self._cfg_float("spansh.speculative.neutron_efficiency", DEFAULT_NEUTRON_EFFICIENCY),
+            supercharge_mode=DEFAULT_SUPERCHARGE_MODE,
+            via=[],
+        )
+
+    # ------------------------------------------------------------------ #
+    def maybe_run(self) -> int:
+        """Jedna ewaluacja (o ile minął interwał); zwraca liczbę wystartowanych jobów."""
+        now = self._clock()
+        interval = self._cfg_float("spansh.speculative.eval_interval_sec", 15.0)
+        if now - self._last_eval < interval:
+            return 0
+        self._last_eval = now
+        if not self._enabled():
+            self.invalidate_all(reason="disabled")
+            return 0
+        if now - self._last_activity < self._cfg_float("spansh.speculative.idle_after_sec", 10.0):
+            return 0
+        if self._manager().is_busy():
+            return 0
+        return self.plan()
+
+    def plan(self) -> int:
+        """Unieważnia nieaktualne joby i startuje nowe w ramach budżetu."""
+        state = self._app_state()
+        start = str(state.get_current_system_name() or "").strip()
+        jump_range = self._jump_range()
+        targets = self.candidate_targets() if start and jump_range is not None else []
+
+        desired: dict[str, tuple[str, str, str, float, Any]] = {}
+        for source, target in targets:
+            payload = self.build_payload(start, target, float(jump_range or 0.0))
+            key = self._client().route_cache_key("neutron", payload, NEUTRON_REFERER)
+            desired[key] = (source, start, target, float(jump_range or 0.0), payload)
+
+        self._invalidate_outdated(desired)
+
+        started = 0
+        for key, (source, start_name, target, jr, payload) in desired.items():
+            # Trasa już w cache nie jest nowym zapytaniem do Spansh - nie zużywa budżetu.
+            cached = self._is_cached(key)
+            with self._lock:
+                self._planned[source] = (target, jr, key)
+                if key in self._jobs:
+                    continue
+                if cached:
+                    self._stored_keys.add(key)
+                    continue
+                self._stored_keys.discard(key)
+                if not self._reserve_budget_locked():
+                    self._stats["budget_skipped"] += 1
+                    log_event_throttled(
+                        "spansh.speculative.budget",
+                        60_000,
+                        "SPANSH",
+                        "speculative route skipped by budget",
+                        source=source,
+                        target=target,
+                    )
+                    break
+                job = _SpeculativeJob(
+                    cache_key=key,
+                    source=source,
+                    start=start_name,
+                    target=target,
+                    jump_range=jr,
+                )
+                self._jobs[key] = job
+                self._stats["started"] += 1
+            threading.Thread(
+                target=self._run_job,
+                args=(job, payload),
+                name=f"spansh_speculative:{source}",
+                daemon=True,
+            ).start()
+            started += 1
+        return started
+
+    def _is_cached(self, key: str) -> bool:
+        try:
+            hit, _value, _meta = self._client().cache.get(key)
+        except Exception:
+            return False
+        return bool(hit)
+
+    def _reserve_budget_locked(self) -> bool:
+        now = self._clock()
+        while self._starts and now - self._starts[0] >= 3600.0:
+            self._starts.popleft()
+        max_concurrent = max(0, int(self._cfg_float("spansh.speculative.max_concurrent", 1)))
+        max_per_hour = max(0, int(self._cfg_float("spansh.speculative.max_per_hour", 6)))
+        if len(self._jobs) >= max_concurrent or len(self._starts) >= max_per_hour:
+            return False
+        self._starts.append(now)
+        return True
+
+    def _invalidate_outdated(self, desired: dict[str, Any]) -> None:
+        cancelled: list[_SpeculativeJob] = []
+        stale_keys: list[str] = []
+        with self._lock:
+            for key, job in list(self._jobs.items()):
+                if key not in desired:
+                    self._jobs.pop(key, None)
+                    cancelled.append(job)
+            desired_sources = {row[0]: key for key, row in desired.items()}
+            for source, (_target, _jr, key) in list(self._planned.items()):
+                if desired_sources.get(source) == key:
+                    continue
+                self._planned.pop(source, None)
+                if key in self._stored_keys and key not in desired:
+                    self._stored_keys.discard(key)
+                    stale_keys.append(key)
+            self._stats["invalidated"] += len(cancelled)
+        for job in cancelled:
+            job.token.cancel("invalidated")
+            log_event(
+                "SPANSH",
+                "speculative route invalidated",
+                source=job.source,
+                target=job.target,
+                jump_range=round(job.jump_range, 2),
+            )
+        # Spekulatywny wynik dla starego celu/zasięgu nie będzie już trafiony.
+        for key in stale_keys:
+            try:
+                self._client().cache.delete(key)
+            except Exception:
+                log_event_throttled(
+                    "spansh.speculative.cache_delete",
+                    60_000,
+                    "WARN",
+                    "speculative route cache delete failed",
+                )
+
+    def invalidate_all(self, *, reason: str = "invalidated") -> None:
+        with self._lock:
+            jobs = list(self._jobs.values())
+            self._jobs.clear()
+            self._planned.clear()
+        for job in jobs:
+            job.token.cancel(reason)
+
+    def _run_job(self, job: _SpeculativeJob, payload: Any) -> None:
+        try:
+            status = self._client().prefetch_route(
+                "neutron",
+                payload,
+                NEUTRON_REFERER,
+                cancel_token=job.token,
+            )
+        except Exception as exc:
+            status = "failed"
+            log_event_throttled(
+                "spansh.speculative.job",
+                10_000,
+                "WARN",
+                "speculative route job failed",
+                error=f"{type(exc).__name__}: {exc}",
+            )
+        with self._lock:
+            if self._jobs.get(job.cache_key) is job:
+                self._jobs.pop(job.cache_key, None)
+            if job.token.cancelled:
+                status = "cancelled"
+            self._stats[status] = int(self._stats.get(status, 0)) + 1
+            if status == "stored":
+                self._stored_keys.add(job.cache_key)
+        log_event(
+            "SPANSH",
+            "speculative route finished",
+            source=job.source,
+            target=job.target,
+            status=status,
+            duration_ms=int((time.monotonic() - job.started_ts) * 1000),
+        )
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "active": [
+                    {"source": job.source, "target": job.target, "jump_range": job.jump_range}
+                    for job in self._jobs.values()
+                ],
+                "starts_last_hour": len(self._starts),
+                "stats": dict(self._stats),
+            }
+
+
+speculative_route_planner = SpeculativeRoutePlanner()
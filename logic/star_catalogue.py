@@ -0,0 +1,419 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+import re
+import struct
+import time
+import zlib
+from array import array
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator
+
+from logic.cash_in_offline_index_builder import _DumpBatchReader
+from logic.utils.renata_log import log_event_throttled
+
+ProgressCallback = Callable[[float, str], None]
+
+STAR_FIELD = 0
+STAR_NEUTRON = 1
+STAR_WHITE_DWARF = 2
+
+CATALOGUE_MAGIC = b"RNSC"
+CATALOGUE_VERSION = 1
+DEFAULT_CELL_SIZE_LY = 100.0
+DEFAULT_FIELD_SAMPLE_RATE = 0.02
+
+_HEADER = struct.Struct("<4sHI")
+_CELL_BIAS = 1 << 20
+_CELL_MASK = (1 << 21) - 1
+# Pre-scan: tylko rekordy z NS/WD (albo wylosowane tlo) ida do json.loads.
+_BOOST_NEEDLES = (b"Neutron Star", b"White Dwarf")
+_SYSTEM_NAME_RE = re.compile(rb'"name"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+
+def _cell_of(x: float, y: float, z: float, cell_size: float) -> tuple[int, int, int]:
+    return (
+        int(math.floor(x / cell_size)),
+        int(math.floor(y / cell_size)),
+        int(math.floor(z / cell_size)),
+    )
+
+
+def _pack_cell(ix: int, iy: int, iz: int) -> int:
+    return (((ix + _CELL_BIAS) & _CELL_MASK) << 42) | (((iy + _CELL_BIAS) & _CELL_MASK) << 21) | (
+        (iz + _CELL_BIAS) & _CELL_MASK
+    )
+
+
+def star_kind_from_type(star_type: Any) -> int | None:
+    """Klasa gwiazdy katalogu z typu gwiazdy glownej (Spansh/journal); None = zwykla."""
+    text = str(star_type or "").strip().lower()
+    if not text:
+        return None
+    if "neutron" in text or text == "n":
+        return STAR_NEUTRON
+    if "white dwarf" in text or (text.startswith("d") and len(text) <= 3):
+        return STAR_WHITE_DWARF
+    return None
+
+
+def _primary_star_type(system_obj: dict[str, Any]) -> str:
+    primary = system_obj.get("primaryStar")
+    if isinstance(primary, dict) and primary.get("type"):
+        return str(primary.get("type"))
+    for body in system_obj.get("bodies") or []:
+        if isinstance(body, dict) and body.get("mainStar"):
+            return str(body.get("subType") or body.get("type") or "")
+    return ""
+
+
+def _keep_field_star(name: bytes, sample_rate: float) -> bool:
+    # Deterministycznie po nazwie: kolejne buildy wybieraja to samo tlo.
+    if sample_rate <= 0.0:
+        return False
+    if sample_rate >= 1.0:
+        return True
+    return (zlib.crc32(name) & 0xFFFFFFFF) < int(sample_rate * 0x100000000)
+
+
+class StarCatalogue:
+    """
+    Zwarty katalog gwiazd (NS, WD i probka zwyklych) na tablicach `array`.
+
+    Gwiazdy sa posortowane po komorce siatki przestrzennej (cell_size ly),
+    wiec zapytanie o sasiedztwo czyta tylko ciagle zakresy indeksow.
+    """
+
+    def __init__(
+        self,
+        *,
+        xs: array,
+        ys: array,
+        zs: array,
+        kinds: array,
+        name_offsets: array,
+        names_blob: bytes,
+        cell_keys: array,
+        cell_starts: array,
+        cell_size: float,
+        meta: Dict[str, Any] | None = None,
+    ) -> None:
+        self.xs = xs
+        self.ys = ys
+        self.zs = zs
+        self.kinds = kinds
+        self._name_offsets = name_offsets
+        self._names_blob = names_blob
+        self.cell_size = float(cell_size)
+        self.meta = dict(meta or {})
+        self._cells: dict[int, tuple[int, int]] = {
+            int(cell_keys[i]): (int(cell_starts[i]), int(cell_starts[i + 1])) for i in range(len(cell_keys))
+        }
+        self._cell_keys = cell_keys
+        self._cell_starts = cell_starts
+        self._name_index: dict[str, int] | None = None
+
+    # ------------------------------------------------------------------ #
+    @classmethod
+    def from_stars(
+        cls,
+        stars: Iterable[tuple[str, float, float, float, int]],
+        *,
+        cell_size: float = DEFAULT_CELL_SIZE_LY,
+        meta: Dict[str, Any] | None = None,
+    ) -> "StarCatalogue":
+        """Buduje katalog z krotek (nazwa, x, y, z, klasa)."""
+        size = float(cell_size) if cell_size and cell_size > 0 else DEFAULT_CELL_SIZE_LY
+        keyed = []
+        seen: set[str] = set()
+        for name, x, y, z, kind in stars:
+            text = str(name or "").strip()
+            if not text or text.casefold() in seen:
+                continue
+            seen.add(text.casefold())
+            keyed.append((_pack_cell(*_cell_of(float(x), float(y), float(z), size)), text, x, y, z, kind))
+        keyed.sort(key=lambda row: row[0])
+
+        xs, ys, zs = array("f"), array("f"), array("f")
+        kinds = array("B")
+        name_offsets = array("I", [0])
+        blob = bytearray()
+        cell_keys = array("q")
+        cell_starts = array("I")
+        last_key: int | None = None
+        for idx, (key, text, x, y, z, kind) in enumerate(keyed):
+            if key != last_key:
+                cell_keys.append(key)
+                cell_starts.append(idx)
+                last_key = key
+            xs.append(float(x))
+            ys.append(float(y))
+            zs.append(float(z))
+            kinds.append(int(kind))
+            blob += text.encode("utf-8")
+            name_offsets.append(len(blob))
+        cell_starts.append(len(keyed))
+        return cls(
+            xs=xs,
+            ys=ys,
+            zs=zs,
+            kinds=kinds,
+            name_offsets=name_offsets,
+            names_blob=bytes(blob),
+            cell_keys=cell_keys,
+            cell_starts=cell_starts,
+            cell_size=size,
+            meta=meta,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "StarCatalogue":
+        with open(path, "rb") as handle:
+            raw = handle.read()
+        magic, version, header_len = _HEADER.unpack_from(raw, 0)
+        if magic != CATALOGUE_MAGIC or version != CATALOGUE_VERSION:
+            raise ValueError("Unsupported star catalogue file.")
+        pos = _HEADER.size
+        header = json.loads(raw[pos:pos + header_len].decode("utf-8"))
+        pos += header_len
+        count = int(header["count"])
+        cells = int(header["cells"])
+        names_len = int(header["names_bytes"])
+
+        def _take(typecode: str, length: int) -> array:
+            nonlocal pos
+            out = array(typecode)
+            nbytes = out.itemsize * length
+            out.frombytes(raw[pos:pos + nbytes])
+            pos += nbytes
+            return out
+
+        xs = _take("f", count)
+        ys = _take("f", count)
+        zs = _take("f", count)
+        kinds = _take("B", count)
+        name_offsets = _take("I", count + 1)
+        names_blob = raw[pos:pos + names_len]
+        pos += names_len
+        cell_keys = _take("q", cells)
+        cell_starts = _take("I", cells + 1)
+        return cls(
+            xs=xs,
+            ys=ys,
+            zs=zs,
+            kinds=kinds,
+            name_offsets=name_offsets,
+            names_blob=names_blob,
+            cell_keys=cell_keys,
+            cell_starts=cell_starts,
+            cell_size=float(header["cell_size"]),
+            meta=dict(header.get("meta") or {}),
+        )
+
+    def save(self, path: str) -> None:
+        header = json.dumps(
+            {
+                "count": len(self),
+                "cells": len(self._cell_keys),
+                "names_bytes": len(self._names_blob),
+                "cell_size": self.cell_size,
+                "meta": self.meta,
+            },
+            ensure_ascii=False,
+            separators=(",", ":"),
+        ).encode("utf-8")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as handle:
+            handle.write(_HEADER.pack(CATALOGUE_MAGIC, CATALOGUE_VERSION, len(header)))
+            handle.write(header)
+            for arr in (self.xs, self.ys, self.zs, self.kinds, self._name_offsets):
+                handle.write(arr.tobytes())
+            handle.write(self._names_blob)
+            handle.write(self._cell_keys.tobytes())
+            handle.write(self._cell_starts.tobytes())
+        os.replace(tmp_path, path)
+
+    # ------------------------------------------------------------------ #
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def name(self, idx: int) -> str:
+        return self._names_blob[self._name_offsets[idx]:self._name_offsets[idx + 1]].decode("utf-8")
+
+    def coords(self, idx: int) -> tuple[float, float, float]:
+        return (float(self.xs[idx]), float(self.ys[idx]), float(self.zs[idx]))
+
+    def find(self, name: str) -> int | None:
+        if self._name_index is None:
+            self._name_index = {self.name(i).casefold(): i for i in range(len(self))}
+        return self._name_index.get(str(name or "").strip().casefold())
+
+    def counts(self) -> dict[str, int]:
+        neutron = self.kinds.count(STAR_NEUTRON)
+        white_dwarf = self.kinds.count(STAR_WHITE_DWARF)
+        return {
+            "total": len(self),
+            "neutron": neutron,
+            "white_dwarf": white_dwarf,
+            "field": len(self) - neutron - white_dwarf,
+        }
+
+    def within(self, point: tuple[float, float, float], radius: float) -> Iterator[tuple[int, float]]:
+        """(indeks, dystans) gwiazd w promieniu radius od point."""
+        px, py, pz = point
+        r = max(0.0, float(radius))
+        r2 = r * r
+        size = self.cell_size
+        lo = _cell_of(px - r, py - r, pz - r, size)
+        hi = _cell_of(px + r, py + r, pz + r, size)
+        xs, ys, zs = self.xs, self.ys, self.zs
+        cells = self._cells
+        for ix in range(lo[0], hi[0] + 1):
+            for iy in range(lo[1], hi[1] + 1):
+                for iz in range(lo[2], hi[2] + 1):
+                    span = cells.get(_pack_cell(ix, iy, iz))
+                    if span is None:
+                        continue
+                    for idx in range(span[0], span[1]):
+                        dx = xs[idx] - px
+                        dy = ys[idx] - py
+                        dz = zs[idx] - pz
+                        d2 = dx * dx + dy * dy + dz * dz
+                        if d2 <= r2:
+                            yield idx, math.sqrt(d2)
+
+
+def _emit_progress(progress_callback: ProgressCallback | None, percent: float, message: str) -> None:
+    if callable(progress_callback):
+        progress_callback(max(0.0, min(100.0, float(percent))), message)
+
+
+def _catalogue_row_from_record(raw: bytes, field_sample_rate: float) -> tuple[str, float, float, float, int] | None:
+    boosted = any(needle in raw for needle in _BOOST_NEEDLES)
+    if not boosted:
+        name_match = _SYSTEM_NAME_RE.search(raw)
+        if name_match is None or not _keep_field_star(name_match.group(1), field_sample_rate):
+            return None
+    try:
+        system_obj = json.loads(raw)
+    except ValueError as exc:
+        raise ValueError("Malformed or truncated Spansh dump payload.") from exc
+    if not isinstance(system_obj, dict):
+        return None
+    name = str(system_obj.get("name") or "").strip()
+    coords = system_obj.get("coords")
+    if not name or not isinstance(coords, dict):
+        return None
+    try:
+        x, y, z = float(coords["x"]), float(coords["y"]), float(coords["z"])
+    except Exception:
+        return None
+    kind = star_kind_from_type(_primary_star_type(system_obj)) if boosted else None
+    if kind is None:
+        # Rekord z NS/WD tylko jako cialo poboczne - traktujemy jak tlo.
+        if boosted:
+            name_match = _SYSTEM_NAME_RE.search(raw)
+            if name_match is None or not _keep_field_star(name_match.group(1), field_sample_rate):
+                return None
+        kind = STAR_FIELD
+    return name, x, y, z, kind
+
+
+def build_star_catalogue_from_spansh_dump(
+    dump_path: str,
+    output_path: str,
+    *,
+    field_sample_rate: float = DEFAULT_FIELD_SAMPLE_RATE,
+    cell_size: float = DEFAULT_CELL_SIZE_LY,
+    progress_callback: ProgressCallback | None = None,
+) -> Dict[str, Any]:
+    """
+    Wyciaga z dumpa Spansh (.json.gz) katalog gwiazd dla lokalnego plottera
+    neutronowego: wszystkie NS i WD (gwiazda glowna) plus deterministyczna
+    probka zwyklych gwiazd jako tlo dla zwyklych skokow.
+    """
+    input_path = os.path.abspath(str(dump_path or "").strip())
+    out_path = os.path.abspath(str(output_path or "").strip())
+    if not os.path.isfile(input_path):
+        raise FileNotFoundError(f"Dump file not found: {input_path}")
+    output_dir = os.path.dirname(out_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    started_at = time.monotonic()
+    total_bytes = max(1, int(os.path.getsize(input_path)))
+    rate = max(0.0, min(1.0, float(field_sample_rate)))
+    stars: list[tuple[str, float, float, float, int]] = []
+    systems_seen = 0
+    _emit_progress(progress_callback, 0.0, "Start budowy katalogu gwiazd...")
+
+    reader = _DumpBatchReader(input_path, prescan=False)
+    reader.start()
+    try:
+        for batch in reader.batches():
+            systems_seen += batch.systems_seen
+            for raw in batch.records:
+                row = _catalogue_row_from_record(raw, rate)
+                if row is not None:
+                    stars.append(row)
+            _emit_progress(
+                progress_callback,
+                min(90.0, batch.compressed_offset * 90.0 / float(total_bytes)),
+                f"Katalog gwiazd: systemy={systems_seen}, gwiazdy={len(stars)}",
+            )
+    finally:
+        reader.stop()
+
+    built_at = datetime.now(timezone.utc).replace(microsecond=0).isoformat()
+    catalogue = StarCatalogue.from_stars(
+        stars,
+        cell_size=cell_size,
+        meta={
+            "source": "spansh_galaxy_dump",
+            "dump_path": input_path,
+            "built_at": built_at,
+            "field_sample_rate": rate,
+            "systems_processed": systems_seen,
+        },
+    )
+    catalogue.save(out_path)
+    result = dict(catalogue.meta)
+    result.update(catalogue.counts())
+    result["output_path"] = out_path
+    result["duration_sec"] = round(time.monotonic() - started_at, 3)
+    _emit_progress(
+        progress_callback,
+        100.0,
+        f"Katalog gwiazd gotowy: NS={result['neutron']}, WD={result['white_dwarf']}, tlo={result['field']}",
+    )
+    return result
+
+
+_LOADED: dict[str, tuple[float, StarCatalogue]] = {}
+
+
+def load_star_catalogue(path: str) -> StarCatalogue | None:
+    """Katalog z dysku (cache po mtime); None gdy pliku brak albo jest uszkodzony."""
+    text = str(path or "").strip()
+    if not text or not os.path.isfile(text):
+        return None
+    try:
+        mtime = os.path.getmtime(text)
+        cached = _LOADED.get(text)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        catalogue = StarCatalogue.load(text)
+    except Exception as exc:
+        log_event_throttled(
+            "star_catalogue.load",
+            60_000,
+            "WARN",
+            "star catalogue load failed",
+            path=os.path.basename(text),
+            error=f"{type(exc).__name__}: {exc}",
+        )
+        return None
+    _LOADED[text] = (mtime, catalogue)
+    return catalogue
@@ -0,0 +1,303 @@
+from __future__ import annotations
+
+import copy
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable
+
+from logic.context_state_contract import (
+    STATE_CORE_SEGMENT,
+    STATE_RUNTIME_SEGMENT,
+    STATE_SEGMENT_DOMAINS,
+    encode_state_segment,
+    normalize_runtime_domain_state,
+    read_state_core_file,
+    read_state_segment_file,
+    sanitize_state_layer,
+    split_monolithic_state_file,
+    write_state_segment_file,
+)
+from logic.utils.renata_log import log_event_throttled
+
+STATE_STORE_DOMAINS = (STATE_CORE_SEGMENT,) + STATE_SEGMENT_DOMAINS
+_WRITE_RETRY_BACKOFF_SEC = 1.0
+
+
+class _Segment:
+    __slots__ = (
+        "payload",
+        "text",
+        "digest",
+        "loaded",
+        "dirty",
+        "persisted_path",
+        "persisted_digest",
+        "last_write_mono",
+    )
+
+    def __init__(self) -> None:
+        self.payload: Dict[str, Any] = {}
+        self.text = ""
+        self.digest = ""
+        self.loaded = False
+        self.dirty = False
+        self.persisted_path = ""
+        self.persisted_digest = ""
+        self.last_write_mono = 0.0
+
+
+class StateSegmentStore:
+    """
+    Stan aplikacji podzielony na domeny (plik na domene).
+
+    Kazda domena trzyma w pamieci payload, jego hash i flage dirty. Jeden
+    watek flushera zapisuje tylko brudne segmenty (tmp + rename), nie czesciej
+    niz min_interval danej domeny. Odczyt jest leniwy: plik domeny czytamy
+    dopiero przy pierwszym dostepie. Sciezke bazowa podaje path_provider przy
+    kazdym zapisie/odczycie (config.STATE_FILE bywa podmieniany w runtime).
+    """
+
+    def __init__(
+        self,
+        path_provider: Callable[[], str],
+        *,
+        min_interval_provider: Callable[[str], float] | None = None,
+    ) -> None:
+        self._path_provider = path_provider
+        self._min_interval_provider = min_interval_provider
+        self._lock = threading.RLock()
+        self._cond = threading.Condition(self._lock)
+        # Kolejnosc blokad: _write_lock -> _lock (put() bierze tylko _lock).
+        self._write_lock = threading.Lock()
+        self._segments: Dict[str, _Segment] = {domain: _Segment() for domain in STATE_STORE_DOMAINS}
+        self._migrated_paths: set[str] = set()
+        self._flusher: threading.Thread | None = None
+        self._stopped = False
+        self._stats: Dict[str, int] = {
+            "writes": 0,
+            "bytes_written": 0,
+            "write_errors": 0,
+            "unchanged_puts": 0,
+        }
+
+    # ------------------------------------------------------------------ #
+    # odczyt / zapis w pamieci
+    # ------------------------------------------------------------------ #
+
+    def path(self) -> str:
+        return str(self._path_provider() or "")
+
+    def _min_interval_sec(self, domain: str) -> float:
+        provider = self._min_interval_provider
+        if provider is None:
+            return 0.0
+        try:
+            return max(0.0, float(provider(domain)))
+        except Exception:
+            return 0.0
+
+    @staticmethod
+    def _normalize(domain: str, payload: Any) -> Dict[str, Any]:
+        if domain == STATE_RUNTIME_SEGMENT:
+            return normalize_runtime_domain_state(payload)
+        return sanitize_state_layer(payload)
+
+    def _ensure_loaded_locked(self, domain: str) -> _Segment:
+        seg = self._segments[domain]
+        if seg.loaded:
+            return seg
+        path = self.path()
+        if path and path not in self._migrated_paths:
+            self._migrated_paths.add(path)
+            try:
+                split_monolithic_state_file(path)
+            except Exception as exc:
+                log_event_throttled(
+                    "state_segments.monolith_split_failed",
+                    5000,
+                    "STATE",
+                    "State monolith split failed; keeping monolithic file",
+                    path=path,
+                    error=f"{type(exc).__name__}: {exc}",
+                )
+        if domain == STATE_CORE_SEGMENT:
+            raw = read_state_core_file(path) if path else None
+        else:
+            raw = read_state_segment_file(path, domain) if path else None
+        seg.payload = self._normalize(domain, raw or {})
+        seg.text, seg.digest = encode_state_segment(seg.payload)
+        seg.loaded = True
+        if raw is not None:
+            seg.persisted_path, seg.persisted_digest = path, seg.digest
+        return seg
+
+    def peek(self, domain: str) -> Dict[str, Any]:
+        """Payload bez kopii - tylko do odczytu."""
+        with self._lock:
+            return self._ensure_loaded_locked(domain).payload
+
+    def get(self, domain: str) -> Dict[str, Any]:
+        with self._lock:
+            return copy.deepcopy(self._ensure_loaded_locked(domain).payload)
+
+    def put(self, domain: str, payload: Any, *, flush: bool = False) -> bool:
+        """
+        Podmienia payload domeny. Zmiana (inny hash) oznacza segment jako
+        dirty i budzi flusher; flush=True zapisuje go od razu w watku wolajacego.
+        """
+        clean = self._normalize(domain, payload)
+        text, digest = encode_state_segment(clean)
+        with self._cond:
+            seg = self._ensure_loaded_locked(domain)
+            changed = digest != seg.digest
+            seg.payload, seg.text, seg.digest = clean, text, digest
+            if changed:
+                seg.dirty = True
+                self._cond.notify_all()
+            else:
+                self._stats["unchanged_puts"] += 1
+        if flush:
+            self.flush([domain])
+        elif changed:
+            self._ensure_flusher()
+        return changed
+
+    # ------------------------------------------------------------------ #
+    # zapis na dysk
+    # ------------------------------------------------------------------ #
+
+    def _needs_write_locked(self, seg: _Segment, path: str) -> bool:
+        if not seg.loaded:
+            return False
+        return seg.dirty or seg.persisted_path != path
+
+    def _write_domain(self, domain: str, path: str, *, timeout: float | None = None) -> bool:
+        if not path:
+            return False
+        acquired = self._write_lock.acquire(timeout=-1 if timeout is None else max(0.0, timeout))
+        if not acquired:
+            return False
+        try:
+            with self._lock:
+                seg = self._segments[domain]
+                if not self._needs_write_locked(seg, path):
+                    return True
+                text, digest = seg.text, seg.digest
+            try:
+                written = write_state_segment_file(path, domain, text, digest)
+            except Exception as exc:
+                with self._lock:
+                    # Przesuwamy "ostatni zapis", zeby flusher nie mielil bledu w petli.
+                    seg.last_write_mono = time.monotonic() + _WRITE_RETRY_BACKOFF_SEC
+                    self._stats["write_errors"] += 1
+                log_event_throttled(
+                    f"state_segments.write_failed.{domain}",
+                    5000,
+                    "STATE",
+                    "State segment write failed",
+                    path=path,
+                    domain=domain,
+                    error=f"{type(exc).__name__}: {exc}",
+                )
+                return False
+            with self._lock:
+                seg.persisted_path, seg.persisted_digest = path, digest
+                seg.last_write_mono = time.monotonic()
+                if seg.digest == digest:
+                    seg.dirty = False
+                self._stats["writes"] += 1
+                self._stats["bytes_written"] += int(written)
+            return True
+        finally:
+            self._write_lock.release()
+
+    def flush(self, domains: Iterable[str] | None = None) -> bool:
+        """Synchroniczny zapis wskazanych (domyslnie: wszystkich) domen, bez min_interval."""
+        path = self.path()
+        ok = True
+        for domain in list(domains) if domains is not None else STATE_STORE_DOMAINS:
+            ok = self._write_domain(domain, path) and ok
+        return ok
+
+    def flush_all(self, timeout: float | None = None) -> bool:
+        """
+        Zapisuje wszystko, co brudne, ignorujac min_interval (shutdown).
+        Zwraca False, gdy nie zdazylismy przed timeoutem albo zapis padl.
+        """
+        deadline = None if timeout is None else time.monotonic() + max(0.0, float(timeout))
+        path = self.path()
+        for domain in STATE_STORE_DOMAINS:
+            with self._lock:
+                if not self._needs_write_locked(self._segments[domain], path):
+                    continue
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0.0:
+                return False
+            if not self._write_domain(domain, path, timeout=remaining):
+                return False
+        return not self.dirty_domains()
+
+    def dirty_domains(self) -> list[str]:
+        with self._lock:
+            return [domain for domain, seg in self._segments.items() if seg.dirty]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = dict(self._stats)
+            out["dirty"] = [domain for domain, seg in self._segments.items() if seg.dirty]
+            out["loaded"] = [domain for domain, seg in self._segments.items() if seg.loaded]
+            out["flusher_alive"] = bool(self._flusher is not None and self._flusher.is_alive())
+            return out
+
+    # ------------------------------------------------------------------ #
+    # flusher
+    # ------------------------------------------------------------------ #
+
+    def _ensure_flusher(self) -> None:
+        with self._lock:
+            if self._stopped:
+                return
+            current = self._flusher
+            if current is not None and current.is_alive():
+                return
+            # Martwy watek (np. ubity w trakcie zapisu) jest po prostu podmieniany;
+            # segmenty, ktorych nie zdazyl zapisac, nadal maja dirty=True.
+            thread = threading.Thread(target=self._run, name="renata-state-flusher", daemon=True)
+            self._flusher = thread
+        thread.start()
+
+    def _due_domains_locked(self, now: float) -> tuple[list[str], float | None]:
+        due: list[str] = []
+        wait: float | None = None
+        for domain, seg in self._segments.items():
+            if not seg.dirty:
+                continue
+            ready_at = seg.last_write_mono + self._min_interval_sec(domain)
+            if seg.last_write_mono <= 0.0 or ready_at <= now:
+                due.append(domain)
+            else:
+                wait = (ready_at - now) if wait is None else min(wait, ready_at - now)
+        return due, wait
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if self._stopped:
+                    return
+                due, wait = self._due_domains_locked(time.monotonic())
+                if not due:
+                    self._cond.wait(timeout=wait)
+                    continue
+            path = self.path()
+            for domain in due:
+                self._write_domain(domain, path)
+
+    def close(self, timeout: float | None = None) -> bool:
+        ok = self.flush_all(timeout)
+        with self._cond:
+            self._stopped = True
+            thread = self._flusher
+            self._cond.notify_all()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=1.0 if timeout is None else max(0.0, float(timeout)))
+        return ok
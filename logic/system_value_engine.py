@@ -112,6 +112,9 @@ class SystemValueEngine:
         # Stan per system
         self.systems: Dict[str, SystemStats] = {}
         self.current_system: Optional[str] = None
+        # Licznik zmian stanu wyceny (value_at_risk porownuje go zamiast
+        # przeliczac calculate_totals() przy kazdym ticku Status.json).
+        self.version = 0
         self._diag_counts: Dict[str, int] = {
             "scan_star_counted": 0,
             "scan_star_skipped_unmapped": 0,
@@ -150,6 +153,7 @@ class SystemValueEngine:
         - if provided: clear only this system
         - else: clear all systems
         """
+        self._bump_version()
         norm = str(domain or "all").strip().lower()
         if norm in {"carto", "cartography", "uc", "exploration"}:
             mode = "cartography"
@@ -199,6 +203,7 @@ class SystemValueEngine:
         - WasDiscovered (bool / 0/1)
         - WasMapped / Mapped (bool)
         """
+        self._bump_version()
         system_name = event.get("StarSystem") or self.current_system
         if not system_name:
             # Nie wiemy, jaki system â€“ nie liczymy
@@ -387,6 +392,7 @@ class SystemValueEngine:
         own, so this method upgrades a body that was previously seen in `Scan` based on the
         cached row/values captured during `analyze_scan_event`.
         """
+        self._bump_version()
         if str(event.get("event") or "").strip() != "SAAScanComplete":
             return
 
@@ -493,6 +499,7 @@ class SystemValueEngine:
         - FirstDiscovery / IsNewSpecies / NewSpecies
         - FirstFootfall / FirstScan
         """
+        self._bump_version()
         system_name = event.get("StarSystem") or self.current_system
         if not system_name:
             return
@@ -579,6 +586,7 @@ class SystemValueEngine:
 
         To jest "miÄ™kka" logika â€“ nie rusza kredytĂłw, tylko status.
         """
+        self._bump_version()
         system_name = event.get("StarSystem") or self.current_system
         if not system_name:
             return
@@ -710,6 +718,9 @@ class SystemValueEngine:
             "albo dict {'exobio': df, 'carto': df}"
         )
 
+    def _bump_version(self) -> None:
+        self.version += 1
+
     def _get_or_create_system(self, name: str) -> SystemStats:
         if name not in self.systems:
             self.systems[name] = SystemStats(name=name)
@@ -1,14 +1,22 @@
 from __future__ import annotations
 
 import math
+import queue
 import re
-from typing import Any, Dict
+import threading
+from typing import Any, Callable, Dict
 
 import config
 from logic.utils import powiedz, MSG_QUEUE
-from logic.spansh_client import client, spansh_error
+from logic.spansh_client import _quiet_spansh_errors, client, spansh_error
 from logic import spansh_payloads
 from logic.rows_normalizer import normalize_trade_rows
+from logic.trade_offline_solver import solve_trade_route_offline
+from logic.utils.cancellation import CancelToken, bind_cancel_token, current_cancel_token
+from logic.utils.renata_log import log_event_throttled
+
+
+_OFFLINE_SOLVER_MODES = ("off", "fallback", "race")
 
 
 _AGE_RE = re.compile(
@@ -489,6 +497,11 @@ def oblicz_trade(
     """
     Logika Trade Plannera oparta o SPANSH /api/trade/route.
 
+    Tryb features.trade.offline_solver_mode:
+        "fallback" - lokalny solver (PlayerDB) gdy SPANSH nic nie zwroci,
+        "race"     - SPANSH i lokalny solver rownolegle, wygrywa pierwszy wynik,
+        "off"      - tylko SPANSH.
+
     Parametry (z GUI):
         start_system - system startowy
         start_station - stacja startowa
@@ -546,44 +559,27 @@ def oblicz_trade(
             gui_ref,
         )
 
-        payload = spansh_payloads.build_trade_payload(
-            start_system=system,
-            start_station=station,
-            capital=capital,
-            max_hop=max_hop,
-            cargo=cargo,
-            max_hops=max_hops,
-            max_dta=max_dta,
-            max_age=max_age,
-            flags=flags,
-        )
-        if config.get("features.spansh.debug_payload", False):
-            MSG_QUEUE.put(("log", f"[SPANSH TRADE PAYLOAD] {payload.form_fields}"))
-
-        result = client.route(
-            mode="trade",
-            payload=payload,
-            referer="https://spansh.co.uk/trade",
-            gui_ref=gui_ref,
-        )
+        def _spansh() -> tuple[list[str], list[dict]]:
+            return _spansh_trade_route(
+                system, station, capital, max_hop, cargo, max_hops, max_dta, max_age, flags, gui_ref
+            )
 
-        if not result:
-            return [], []
+        def _local() -> tuple[list[str], list[dict]]:
+            return solve_trade_route_offline(
+                system, station, capital, max_hop, cargo, max_hops, max_dta, max_age, flags
+            )
 
-        getter = getattr(client, "get_last_request", None)
-        if callable(getter):
-            last_request = getter() or {}
+        mode = _offline_solver_mode()
+        if mode == "race":
+            winner, route, rows = _race_trade_solvers(_spansh, _local)
+            if winner == "local":
+                MSG_QUEUE.put(("log", "[TRADE] Wynik z lokalnych rynkow (PlayerDB) byl pierwszy."))
         else:
-            last_request = {}
-        external_meta = {
-            "source_status": last_request.get("source_status"),
-            "confidence": last_request.get("confidence"),
-            "confidence_score": last_request.get("confidence_score"),
-            "data_age": last_request.get("data_age"),
-            "data_age_seconds": last_request.get("data_age_seconds"),
-            "is_offline_fallback": bool(last_request.get("is_offline_fallback", False)),
-        }
-        route, rows = normalize_trade_rows(result, external_meta=external_meta)
+            route, rows = _spansh()
+            if not rows and mode == "fallback":
+                route, rows = _run_local_solver(_local)
+                if rows:
+                    powiedz("TRADE: SPANSH bez wyniku - trasa z lokalnych rynkow (PlayerDB).", gui_ref)
 
         if not rows:
             spansh_error(
@@ -598,3 +594,124 @@ def oblicz_trade(
     except Exception as e:  # noqa: BLE001
         powiedz(f"TRADE error: {e}", gui_ref)
         return [], []
+
+
+def _spansh_trade_route(
+    system: str,
+    station: str,
+    capital: int,
+    max_hop: float,
+    cargo: int,
+    max_hops: int,
+    max_dta: int,
+    max_age: float | None,
+    flags: Dict[str, Any],
+    gui_ref: Any | None,
+) -> tuple[list[str], list[dict]]:
+    payload = spansh_payloads.build_trade_payload(
+        start_system=system,
+        start_station=station,
+        capital=capital,
+        max_hop=max_hop,
+        cargo=cargo,
+        max_hops=max_hops,
+        max_dta=max_dta,
+        max_age=max_age,
+        flags=flags,
+    )
+    if config.get("features.spansh.debug_payload", False):
+        MSG_QUEUE.put(("log", f"[SPANSH TRADE PAYLOAD] {payload.form_fields}"))
+
+    result = client.route(
+        mode="trade",
+        payload=payload,
+        referer="https://spansh.co.uk/trade",
+        gui_ref=gui_ref,
+    )
+
+    if not result:
+        return [], []
+
+    getter = getattr(client, "get_last_request", None)
+    if callable(getter):
+        last_request = getter() or {}
+    else:
+        last_request = {}
+    external_meta = {
+        "source_status": last_request.get("source_status"),
+        "confidence": last_request.get("confidence"),
+        "confidence_score": last_request.get("confidence_score"),
+        "data_age": last_request.get("data_age"),
+        "data_age_seconds": last_request.get("data_age_seconds"),
+        "is_offline_fallback": bool(last_request.get("is_offline_fallback", False)),
+    }
+    return normalize_trade_rows(result, external_meta=external_meta)
+
+
+def _offline_solver_mode() -> str:
+    mode = str(config.get("features.trade.offline_solver_mode", "fallback") or "").strip().lower()
+    return mode if mode in _OFFLINE_SOLVER_MODES else "fallback"
+
+
+def _run_local_solver(
+    local_fn: Callable[[], tuple[list[str], list[dict]]],
+) -> tuple[list[str], list[dict]]:
+    try:
+        return local_fn()
+    except Exception as exc:
+        log_event_throttled(
+            "trade.offline_solver.error",
+            30000,
+            "WARN",
+            "trade offline solver failed",
+            error=f"{type(exc).__name__}: {exc}",
+        )
+        return [], []
+
+
+def _race_trade_solvers(
+    spansh_fn: Callable[[], tuple[list[str], list[dict]]],
+    local_fn: Callable[[], tuple[list[str], list[dict]]],
+) -> tuple[str | None, list[str], list[dict]]:
+    """
+    Uruchamia SPANSH i lokalny solver rownolegle; wygrywa pierwszy niepusty wynik.
+    SPANSH biegnie z wlasnym tokenem (anulowanym po wyborze zwyciezcy) i
+    wyciszonymi bledami - spozniona porazka nie trafia juz do GUI/TTS.
+    """
+    results: "queue.Queue[tuple[str, tuple[list[str], list[dict]]]]" = queue.Queue()
+    parent_token = current_cancel_token()
+    spansh_token = parent_token.child() if parent_token is not None else CancelToken()
+
+    def _run_spansh_solver(fn: Callable[[], tuple[list[str], list[dict]]]) -> tuple[list[str], list[dict]]:
+        try:
+            with bind_cancel_token(spansh_token), _quiet_spansh_errors():
+                return fn()
+        except Exception as exc:
+            log_event_throttled(
+                "trade.race.spansh_error",
+                30000,
+                "WARN",
+                "trade race: SPANSH solver failed",
+                error=f"{type(exc).__name__}: {exc}",
+                cancelled=spansh_token.cancelled,
+            )
+            return [], []
+
+    def _worker(name: str, fn: Callable[[], tuple[list[str], list[dict]]]) -> None:
+        if name == "local":
+            out = _run_local_solver(fn)
+        else:
+            out = _run_spansh_solver(fn)
+        results.put((name, out))
+
+    for name, fn in (("local", local_fn), ("spansh", spansh_fn)):
+        threading.Thread(target=_worker, args=(name, fn), name=f"TradeRace-{name}", daemon=True).start()
+
+    for _ in range(2):
+        name, (route, rows) = results.get()
+        if rows:
+            if name != "spansh":
+                # Przegrany SPANSH przestaje pollowac joba w tle.
+                spansh_token.cancel("trade_race_lost")
+            return name, route, rows
+    return None, [], []
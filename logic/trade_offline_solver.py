@@ -0,0 +1,474 @@
+from __future__ import annotations
+
+import math
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict
+
+from logic import player_local_db
+from logic.rows_normalizer import normalize_trade_rows
+
+
+OFFLINE_TRADE_SOURCE_STATUS = "LOCAL_PLAYERDB"
+DEFAULT_BEAM_WIDTH = 48
+# Ile najlepszych towarow (po zysku/t) trzymamy per para stacji; kapital i stock
+# wybieraja z nich faktyczny ladunek.
+_OFFERS_PER_PAIR = 6
+
+_PLANETARY_STATION_TYPES = frozenset(
+    {
+        "crateroutpost",
+        "craterport",
+        "onfootsettlement",
+        "surfacestation",
+        "planetaryport",
+        "planetaryoutpost",
+    }
+)
+_MEDIUM_PAD_ONLY_STATION_TYPES = frozenset({"outpost", "onfootsettlement"})
+
+
+@dataclass(frozen=True)
+class _TradeMarket:
+    system_name: str
+    station_name: str
+    coords: tuple[float, float, float]
+    distance_ls: float | None
+    freshness_epoch: float
+    # commodity(casefold) -> (nazwa, buy_price, stock)
+    buys: Dict[str, tuple[str, int, int]]
+    # commodity(casefold) -> sell_price
+    sells: Dict[str, int]
+
+
+@dataclass(frozen=True)
+class _TradeOffer:
+    unit_profit: int
+    commodity: str
+    buy_price: int
+    sell_price: int
+    stock: int
+
+
+@dataclass(frozen=True)
+class _TradeLeg:
+    source: int
+    target: int
+    distance_ly: float
+    offer: _TradeOffer
+    amount: int
+
+    @property
+    def profit(self) -> int:
+        return int(self.offer.unit_profit) * int(self.amount)
+
+
+@dataclass(frozen=True)
+class _BeamState:
+    station: int
+    capital: int
+    profit: int
+    legs: tuple[_TradeLeg, ...] = field(default_factory=tuple)
+    visited: frozenset[int] = field(default_factory=frozenset)
+
+
+def _as_text(value: Any) -> str:
+    return str(value or "").strip()
+
+
+def _ts_epoch(value: Any) -> float:
+    text = _as_text(value)
+    if not text:
+        return 0.0
+    try:
+        dt = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    except Exception:
+        return 0.0
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return float(dt.timestamp())
+
+
+def _station_type_token(value: Any) -> str:
+    return "".join(ch for ch in _as_text(value).casefold() if ch.isalnum())
+
+
+def _station_allowed(row: Any, flags: dict[str, Any], max_dta: float | None) -> bool:
+    station_type = _station_type_token(row["station_type"])
+    if bool(int(row["is_fleet_carrier"] or 0)) and not bool(flags.get("player_owned")):
+        return False
+    if station_type in _PLANETARY_STATION_TYPES and not bool(flags.get("planetary")):
+        return False
+    if station_type in _MEDIUM_PAD_ONLY_STATION_TYPES and bool(flags.get("large_pad")):
+        return False
+    if max_dta is not None and max_dta > 0 and row["distance_ls"] is not None:
+        if float(row["distance_ls"]) > float(max_dta):
+            return False
+    return True
+
+
+def _load_trade_markets(
+    *,
+    db_path: str | None,
+    max_dta: float | None,
+    max_age_days: float | None,
+    flags: dict[str, Any],
+    now_epoch: float,
+) -> list[_TradeMarket]:
+    with player_local_db.playerdb_connection(path=db_path, ensure_schema=True) as conn:
+        rows = conn.execute(
+            """
+            SELECT
+                ml.station_key,
+                ml.system_name,
+                ml.station_name,
+                ml.commodity,
+                ml.buy_price,
+                ml.sell_price,
+                ml.stock,
+                ml.freshness_ts,
+                sy.x, sy.y, sy.z,
+                COALESCE(st_mid.station_type, st_name.station_type) AS station_type,
+                COALESCE(st_mid.is_fleet_carrier, st_name.is_fleet_carrier) AS is_fleet_carrier,
+                COALESCE(st_mid.distance_ls, st_name.distance_ls) AS distance_ls
+            FROM market_latest ml
+            JOIN systems sy ON sy.system_name = ml.system_name
+            LEFT JOIN stations st_mid
+              ON ml.station_market_id IS NOT NULL AND st_mid.market_id = ml.station_market_id
+            LEFT JOIN stations st_name
+              ON ml.station_market_id IS NULL
+             AND st_name.system_name = ml.system_name
+             AND st_name.station_name = ml.station_name
+            WHERE sy.x IS NOT NULL AND sy.y IS NOT NULL AND sy.z IS NOT NULL
+            ORDER BY ml.station_key;
+            """
+        ).fetchall()
+
+    min_epoch = None
+    if max_age_days is not None and float(max_age_days) > 0:
+        min_epoch = now_epoch - float(max_age_days) * 86400.0
+
+    markets: list[_TradeMarket] = []
+    current_key = None
+    current: dict[str, Any] | None = None
+
+    def _flush() -> None:
+        if current is None or not current["allowed"]:
+            return
+        if not current["buys"] and not current["sells"]:
+            return
+        markets.append(
+            _TradeMarket(
+                system_name=current["system_name"],
+                station_name=current["station_name"],
+                coords=current["coords"],
+                distance_ls=current["distance_ls"],
+                freshness_epoch=current["freshness_epoch"],
+                buys=current["buys"],
+                sells=current["sells"],
+            )
+        )
+
+    for row in rows:
+        key = _as_text(row["station_key"])
+        if key != current_key:
+            _flush()
+            current_key = key
+            freshness_epoch = _ts_epoch(row["freshness_ts"])
+            allowed = _station_allowed(row, flags, max_dta) if row["station_type"] is not None else True
+            if min_epoch is not None and freshness_epoch < min_epoch:
+                allowed = False
+            current = {
+                "system_name": _as_text(row["system_name"]),
+                "station_name": _as_text(row["station_name"]),
+                "coords": (float(row["x"]), float(row["y"]), float(row["z"])),
+                "distance_ls": float(row["distance_ls"]) if row["distance_ls"] is not None else None,
+                "freshness_epoch": freshness_epoch,
+                "allowed": allowed,
+                "buys": {},
+                "sells": {},
+            }
+        if current is None or not current["allowed"]:
+            continue
+        commodity = _as_text(row["commodity"])
+        commodity_key = commodity.casefold()
+        if not commodity_key:
+            continue
+        buy_price = row["buy_price"]
+        stock = int(row["stock"] or 0)
+        if buy_price is not None and int(buy_price) > 0 and stock > 0:
+            current["buys"][commodity_key] = (commodity, int(buy_price), stock)
+        sell_price = row["sell_price"]
+        if sell_price is not None and int(sell_price) > 0:
+            current["sells"][commodity_key] = int(sell_price)
+    _flush()
+    return markets
+
+
+class _TradeGraph:
+    """Leniwie liczone sasiedztwo + oferty per para stacji (memo per stacja zrodlowa)."""
+
+    def __init__(self, markets: list[_TradeMarket], *, max_hop: float) -> None:
+        self.markets = markets
+        self.max_hop = float(max_hop)
+        self._xs = [m.coords[0] for m in markets]
+        self._ys = [m.coords[1] for m in markets]
+        self._zs = [m.coords[2] for m in markets]
+        self._edges: dict[int, list[tuple[int, float, tuple[_TradeOffer, ...]]]] = {}
+
+    def edges_from(self, source: int) -> list[tuple[int, float, tuple[_TradeOffer, ...]]]:
+        cached = self._edges.get(source)
+        if cached is not None:
+            return cached
+        src = self.markets[source]
+        out: list[tuple[int, float, tuple[_TradeOffer, ...]]] = []
+        if src.buys:
+            sx, sy, sz = src.coords
+            limit_sq = self.max_hop * self.max_hop
+            xs, ys, zs = self._xs, self._ys, self._zs
+            buys = src.buys
+            for target in range(len(self.markets)):
+                if target == source:
+                    continue
+                dx = xs[target] - sx
+                dy = ys[target] - sy
+                dz = zs[target] - sz
+                dist_sq = dx * dx + dy * dy + dz * dz
+                if dist_sq > limit_sq:
+                    continue
+                sells = self.markets[target].sells
+                if not sells:
+                    continue
+                offers: list[_TradeOffer] = []
+                # Iterujemy po krotszym slowniku.
+                if len(sells) < len(buys):
+                    pairs = ((key, sell) for key, sell in sells.items() if key in buys)
+                else:
+                    pairs = ((key, sells[key]) for key in buys if key in sells)
+                for key, sell_price in pairs:
+                    name, buy_price, stock = buys[key]
+                    unit_profit = sell_price - buy_price
+                    if unit_profit > 0:
+                        offers.append(_TradeOffer(unit_profit, name, buy_price, sell_price, stock))
+                if not offers:
+                    continue
+                offers.sort(key=lambda o: (-o.unit_profit, o.commodity.casefold()))
+                out.append((target, math.sqrt(dist_sq), tuple(offers[:_OFFERS_PER_PAIR])))
+        self._edges[source] = out
+        return out
+
+
+def _best_leg(
+    source: int,
+    target: int,
+    distance_ly: float,
+    offers: tuple[_TradeOffer, ...],
+    *,
+    capital: int,
+    cargo: int,
+) -> _TradeLeg | None:
+    best: _TradeLeg | None = None
+    for offer in offers:
+        amount = min(int(cargo), int(offer.stock), int(capital) // max(1, int(offer.buy_price)))
+        if amount <= 0:
+            continue
+        leg = _TradeLeg(source, target, distance_ly, offer, amount)
+        if best is None or leg.profit > best.profit:
+            best = leg
+    return best
+
+
+def _beam_search(
+    graph: _TradeGraph,
+    start: int,
+    *,
+    capital: int,
+    cargo: int,
+    max_hops: int,
+    avoid_loops: bool,
+    beam_width: int,
+) -> _BeamState | None:
+    beam = [_BeamState(station=start, capital=int(capital), profit=0, visited=frozenset({start}))]
+    best: _BeamState | None = None
+    for _hop in range(max(1, int(max_hops))):
+        # Dominacja: ta sama stacja + wiekszy zysk => wiekszy kapital, wiec
+        # trzymamy tylko najlepszy stan per stacja.
+        by_station: dict[int, _BeamState] = {}
+        for state in beam:
+            for target, distance_ly, offers in graph.edges_from(state.station):
+                if avoid_loops and target in state.visited:
+                    continue
+                leg = _best_leg(
+                    state.station,
+                    target,
+                    distance_ly,
+                    offers,
+                    capital=state.capital,
+                    cargo=cargo,
+                )
+                if leg is None:
+                    continue
+                profit = state.profit + leg.profit
+                previous = by_station.get(target)
+                if previous is not None and previous.profit >= profit:
+                    continue
+                by_station[target] = _BeamState(
+                    station=target,
+                    capital=state.capital + leg.profit,
+                    profit=profit,
+                    legs=state.legs + (leg,),
+                    visited=state.visited | {target},
+                )
+        if not by_station:
+            break
+        beam = sorted(by_station.values(), key=lambda s: (-s.profit, len(s.legs), s.station))[: max(1, beam_width)]
+        if best is None or beam[0].profit > best.profit:
+            best = beam[0]
+    return best
+
+
+def _compact_age(seconds: float | None) -> str:
+    if seconds is None:
+        return "-"
+    sec = max(0, int(seconds))
+    if sec < 60:
+        return "now"
+    if sec < 3600:
+        return f"{max(1, sec // 60)}m"
+    if sec < 24 * 3600:
+        return f"{max(1, sec // 3600)}h"
+    if sec < 7 * 24 * 3600:
+        return f"{max(1, sec // (24 * 3600))}d"
+    return f"{max(1, sec // (7 * 24 * 3600))}w"
+
+
+def _confidence_from_age(age_seconds: float | None) -> tuple[str, float]:
+    # Dane obserwowane przez gracza; pewnosc spada z wiekiem najstarszego rynku na trasie.
+    if age_seconds is None:
+        return "low", 0.3
+    if age_seconds <= 6 * 3600:
+        return "high", 0.8
+    if age_seconds <= 48 * 3600:
+        return "mid", 0.6
+    return "low", 0.4
+
+
+def _legs_payload(state: _BeamState, markets: list[_TradeMarket]) -> list[dict[str, Any]]:
+    payload: list[dict[str, Any]] = []
+    cumulative = 0
+    for leg in state.legs:
+        src = markets[leg.source]
+        dst = markets[leg.target]
+        cumulative += leg.profit
+        payload.append(
+            {
+                "source": {
+                    "system": src.system_name,
+                    "station": src.station_name,
+                    "market_updated_at": int(src.freshness_epoch) if src.freshness_epoch > 0 else None,
+                },
+                "destination": {
+                    "system": dst.system_name,
+                    "station": dst.station_name,
+                    "market_updated_at": int(dst.freshness_epoch) if dst.freshness_epoch > 0 else None,
+                    "distance_to_arrival": dst.distance_ls,
+                },
+                "commodities": [
+                    {
+                        "name": leg.offer.commodity,
+                        "amount": leg.amount,
+                        "buy_price": leg.offer.buy_price,
+                        "sell_price": leg.offer.sell_price,
+                        "profit": leg.offer.unit_profit,
+                        "total_profit": leg.profit,
+                    }
+                ],
+                "distance": round(float(leg.distance_ly), 2),
+                "total_profit": leg.profit,
+                "cumulative_profit": cumulative,
+            }
+        )
+    return payload
+
+
+def solve_trade_route_offline(
+    start_system: str,
+    start_station: str,
+    capital: int,
+    max_hop: float,
+    cargo: int,
+    max_hops: int,
+    max_dta: int | float | None,
+    max_age: float | None,
+    flags: Dict[str, Any] | None,
+    *,
+    db_path: str | None = None,
+    beam_width: int = DEFAULT_BEAM_WIDTH,
+    now_epoch: float | None = None,
+) -> tuple[list[str], list[dict]]:
+    """
+    Lokalny Trade Planner nad rynkami zapisanymi w PlayerDB (market_latest).
+
+    Beam search po parach stacji z ograniczeniami: kapital, ladownosc,
+    max hop [LY], max hops, max DTA, wiek danych [dni] i pady/typy stacji z flag.
+    Zwraca (route, rows) w formacie normalize_trade_rows; bez sieci.
+    """
+    system = _as_text(start_system)
+    station = _as_text(start_station)
+    if not system or not station:
+        return [], []
+    try:
+        hop_ly = float(max_hop or 0.0)
+    except Exception:
+        hop_ly = 0.0
+    if hop_ly <= 0 or int(cargo or 0) <= 0 or int(capital or 0) <= 0:
+        return [], []
+
+    opts = dict(flags or {})
+    now = float(now_epoch if now_epoch is not None else time.time())
+    markets = _load_trade_markets(
+        db_path=db_path,
+        max_dta=float(max_dta) if max_dta not in (None, "") else None,
+        max_age_days=float(max_age) if max_age is not None else None,
+        flags=opts,
+        now_epoch=now,
+    )
+    start_idx = next(
+        (
+            idx
+            for idx, market in enumerate(markets)
+            if market.system_name.casefold() == system.casefold()
+            and market.station_name.casefold() == station.casefold()
+        ),
+        None,
+    )
+    if start_idx is None:
+        return [], []
+
+    graph = _TradeGraph(markets, max_hop=hop_ly)
+    best = _beam_search(
+        graph,
+        start_idx,
+        capital=int(capital),
+        cargo=int(cargo),
+        max_hops=int(max_hops or 1),
+        avoid_loops=bool(opts.get("avoid_loops")),
+        beam_width=int(beam_width or DEFAULT_BEAM_WIDTH),
+    )
+    if best is None or not best.legs:
+        return [], []
+
+    used = {leg.source for leg in best.legs} | {leg.target for leg in best.legs}
+    oldest = min(markets[idx].freshness_epoch for idx in used)
+    age_seconds = max(0.0, now - oldest) if oldest > 0 else None
+    confidence, confidence_score = _confidence_from_age(age_seconds)
+    external_meta = {
+        "source_status": OFFLINE_TRADE_SOURCE_STATUS,
+        "confidence": confidence,
+        "confidence_score": confidence_score,
+        "data_age": _compact_age(age_seconds),
+        "data_age_seconds": age_seconds,
+        "is_offline_fallback": False,
+    }
+    return normalize_trade_rows(_legs_payload(best, markets), external_meta=external_meta)
@@ -1,16 +1,34 @@
 from __future__ import annotations
 
 import re
-from typing import Any, Dict, Optional
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, Optional, Pattern, Tuple, Union
 
 from logic.tts.message_templates import (
     allowed_message_ids,
     raw_text_first,
     template_for_message,
 )
-
 ALLOWED_MESSAGES = allowed_message_ids()
 
+# Pola contextu, z ktorych korzysta prepare_tts() - tylko one wchodza do klucza
+# cache gotowych tekstow (risk_status, confidence itp. nie zmieniaja wyniku).
+_PREPARE_CONTEXT_KEYS = (
+    "raw_text",
+    "system",
+    "station",
+    "target",
+    "next_target",
+    "body",
+    "percent",
+    "milestone_phase",
+    "version",
+)
+# Tworzone leniwie: logic.utils importuje notify -> ten modul (cykl importow).
+_CACHES: Dict[str, Any] = {}
+_ROUTE_WARM_MESSAGES = ("MSG.NEXT_HOP", "MSG.JUMPED_SYSTEM")
+_ROUTE_WARM_LIMIT = 1000
+
 
 _MOJIBAKE_REPLACEMENTS = {
     # UTF-8 decoded as latin/cp125x (common Polish diacritics).
@@ -192,6 +210,39 @@ _STANDALONE_NUMBER_RE = re.compile(
 _NUMBER_GROUP_WORD_RE = re.compile(
     r"\b(?:tysiąc|tysiące|tysięcy|milion|miliony|milionów|miliard|miliardy|miliardów|bilion|biliony|bilionów)\b"
 )
+_PERCENT_NUMBER_RE = re.compile(r"(?P<num>\d+(?:[.,]\d+)?)\s*%")
+_LY_NUMBER_RE = re.compile(r"\b(?P<num>\d+(?:[.,]\d+)?)\s*(?:LY|ly)\b")
+_GROUPED_INT_SEP_RE = re.compile(rf"[{_GROUPED_INT_SEP_CLASS}]")
+_WHITESPACE_RE = re.compile(r"\s+")
+# Ciag srednikow z otaczajacymi spacjami -> jeden " ; " (dawniej dwa przebiegi:
+# "\s*;\s*" -> " ; " i "(?:\s;\s){2,}" -> " ; ").
+_SEMICOLON_RUN_RE = re.compile(r"\s*;[\s;]*")
+_SYSTEM_SEPARATORS_RE = re.compile(r"[\s_/]+")
+_LETTER_DIGIT_BOUNDARY_RE = re.compile(r"(?<=[A-Za-z])(?=[0-9])|(?<=[0-9])(?=[A-Za-z])")
+_DECIMAL_DOT_TOKEN = "__RENATA_DECIMAL_DOT__"
+
+
+def _decimal_dot_or_stop(match: re.Match[str]) -> str:
+    # Kropka dziesietna ("100.5") chroniona tokenem; "?" i "!" -> ".".
+    return _DECIMAL_DOT_TOKEN if match.group(0) == "." else "."
+
+
+def _semicolon_run_or_stop(match: re.Match[str]) -> str:
+    # "; ;." -> "." (srednik tuz przed kropka znika), inaczej jeden " ; ".
+    return "." if match.group(1) else " ; "
+
+
+def _space_or_stop(match: re.Match[str]) -> str:
+    return ". " if "." in match.group(0) else " "
+
+
+# Etapy _finalize_tts() w kolejnosci; odpowiadaja dawnym osmiu przebiegom re.sub:
+# ochrona kropek dziesietnych + "?!", srednik(i) (+ kropka), kropki + spacje.
+_PIPELINE: Tuple[Tuple[Pattern[str], Union[str, Callable[[re.Match[str]], str]]], ...] = (
+    (re.compile(r"(?<=\d)\.(?=\d)|[?!]"), _decimal_dot_or_stop),
+    (re.compile(r"\s*;[\s;]*(\.?)"), _semicolon_run_or_stop),
+    (re.compile(r"\s*\.+\s*|\s+"), _space_or_stop),
+)
 
 
 def _repair_polish_text(value: Any) -> str:
@@ -241,6 +292,7 @@ def _int_to_words_pl_under_1000(value: int) -> str:
     return " ".join(x for x in parts if x).strip()
 
 
+@lru_cache(maxsize=4096)
 def _int_to_words_pl(value: int) -> str:
     n = int(value)
     if n == 0:
@@ -272,6 +324,7 @@ def _int_to_words_pl(value: int) -> str:
     return sign + " ".join(reversed([x for x in parts_rev if x])).strip()
 
 
+@lru_cache(maxsize=2048)
 def _decimal_to_words_pl(value_text: str) -> str:
     text = _repair_polish_text(value_text).strip()
     text = text.replace(" ", "")
@@ -306,7 +359,7 @@ def _parse_grouped_int(value_text: str) -> Optional[int]:
         return None
     if not _GROUPED_INT_PATTERN.fullmatch(text):
         return None
-    digits = re.sub(rf"[{_GROUPED_INT_SEP_CLASS}]", "", text)
+    digits = _GROUPED_INT_SEP_RE.sub("", text)
     try:
         return int(digits)
     except Exception:
@@ -329,49 +382,51 @@ def _with_tts_number_semicolon_breaks(number_words: str, *, unit: Optional[str]
     else:
         out = f"{out} ;"
     out = "; " + out.lstrip()
-    out = re.sub(r"\s*;\s*", " ; ", out)
-    out = re.sub(r"(?:\s;\s){2,}", " ; ", out)
-    out = re.sub(r"\s+", " ", out).strip()
+    out = _SEMICOLON_RUN_RE.sub(" ; ", out)
+    out = _WHITESPACE_RE.sub(" ", out).strip()
     return out
 
 
+def _credits_sub(match: re.Match[str]) -> str:
+    raw_num = str(match.group("num") or "")
+    n = _parse_grouped_int(raw_num)
+    if n is None:
+        return match.group(0)
+    unit = _plural_form_pl(n, "kredyt", "kredyty", "kredytów")
+    return _with_tts_number_semicolon_breaks(_int_to_words_pl(n), unit=unit)
+
+
+def _percent_sub(match: re.Match[str]) -> str:
+    raw_num = str(match.group("num") or "")
+    words = _decimal_to_words_pl(raw_num)
+    if not words:
+        return match.group(0)
+    return _with_tts_number_semicolon_breaks(words, unit="procent")
+
+
+def _ly_sub(match: re.Match[str]) -> str:
+    raw_num = str(match.group("num") or "")
+    words = _decimal_to_words_pl(raw_num)
+    if not words:
+        return match.group(0)
+    return _with_tts_number_semicolon_breaks(words, unit="lat świetlnych")
+
+
+def _standalone_sub(match: re.Match[str]) -> str:
+    raw_num = str(match.group("num") or "")
+    n = _parse_grouped_int(raw_num)
+    if n is None:
+        return match.group(0)
+    return _with_tts_number_semicolon_breaks(_int_to_words_pl(n))
+
+
 def _verbalize_tts_numbers(text: str) -> str:
     if not text:
         return ""
-
-    def _credits_sub(match: re.Match[str]) -> str:
-        raw_num = str(match.group("num") or "")
-        n = _parse_grouped_int(raw_num)
-        if n is None:
-            return match.group(0)
-        unit = _plural_form_pl(n, "kredyt", "kredyty", "kredytów")
-        return _with_tts_number_semicolon_breaks(_int_to_words_pl(n), unit=unit)
-
-    def _percent_sub(match: re.Match[str]) -> str:
-        raw_num = str(match.group("num") or "")
-        words = _decimal_to_words_pl(raw_num)
-        if not words:
-            return match.group(0)
-        return _with_tts_number_semicolon_breaks(words, unit="procent")
-
-    def _ly_sub(match: re.Match[str]) -> str:
-        raw_num = str(match.group("num") or "")
-        words = _decimal_to_words_pl(raw_num)
-        if not words:
-            return match.group(0)
-        return _with_tts_number_semicolon_breaks(words, unit="lat świetlnych")
-
-    def _standalone_sub(match: re.Match[str]) -> str:
-        raw_num = str(match.group("num") or "")
-        n = _parse_grouped_int(raw_num)
-        if n is None:
-            return match.group(0)
-        return _with_tts_number_semicolon_breaks(_int_to_words_pl(n))
-
     out = text
     out = _CREDITS_NUMBER_RE.sub(_credits_sub, out)
-    out = re.sub(r"(?P<num>\d+(?:[.,]\d+)?)\s*%", _percent_sub, out)
-    out = re.sub(r"\b(?P<num>\d+(?:[.,]\d+)?)\s*(?:LY|ly)\b", _ly_sub, out)
+    out = _PERCENT_NUMBER_RE.sub(_percent_sub, out)
+    out = _LY_NUMBER_RE.sub(_ly_sub, out)
     out = _STANDALONE_NUMBER_RE.sub(_standalone_sub, out)
     return out
 
@@ -392,54 +447,139 @@ def _render_template(message_id: str, **fields: Any) -> str:
     return _repair_polish_text(rendered).strip()
 
 
-def _normalize_system_name(value: Any) -> str:
+def _cache(name: str) -> Any:
+    cache = _CACHES.get(name)
+    if cache is None:
+        from logic.utils.bounded_cache import BoundedCache
+
+        max_items = 4096 if name == "names" else 2048
+        cache = _CACHES.setdefault(
+            name,
+            BoundedCache(f"tts.{name}", ttl_sec=None, max_items=max_items, freeze_values=False),
+        )
+    return cache
+
+
+def _cached_name(kind: str, value: Any, normalize: Callable[[Any], str]) -> str:
+    if not isinstance(value, str):
+        return normalize(value)
+    names = _cache("names")
+    key = (kind, value)
+    entry = names.get_entry(key)
+    if entry is not None:
+        return entry[1]
+    return names.set(key, normalize(value))
+
+
+def _normalize_system_name_uncached(value: Any) -> str:
     if value is None:
         return ""
     text = _repair_polish_text(value).strip()
     if not text:
         return ""
     text = text.replace("-", " ")
-    text = re.sub(r"[_/]+", " ", text)
-    text = re.sub(r"([A-Za-z])([0-9])", r"\1 \2", text)
-    text = re.sub(r"([0-9])([A-Za-z])", r"\1 \2", text)
-    text = re.sub(r"\s+", " ", text).strip()
+    text = _LETTER_DIGIT_BOUNDARY_RE.sub(" ", text)
+    text = _SYSTEM_SEPARATORS_RE.sub(" ", text).strip()
     return text
 
 
-def _normalize_station_name(value: Any) -> str:
+def _normalize_station_name_uncached(value: Any) -> str:
     if value is None:
         return ""
     text = _repair_polish_text(value).strip()
     if not text:
         return ""
-    text = re.sub(r"\s+", " ", text).strip()
+    text = _WHITESPACE_RE.sub(" ", text).strip()
     return text
 
 
+def _normalize_system_name(value: Any) -> str:
+    return _cached_name("system", value, _normalize_system_name_uncached)
+
+
+def _normalize_station_name(value: Any) -> str:
+    return _cached_name("station", value, _normalize_station_name_uncached)
+
+
 def _finalize_tts(text: str) -> str:
     text = _repair_polish_text(text)
     text = _verbalize_tts_numbers(text)
     # Keep commas - they improve Polish prosody (lists, clauses, number phrasing).
     # We normalize hard sentence terminators only.
-    # Protect decimal dots so "100.5" is not split into "100. 5" by sentence normalization.
-    text = re.sub(r"(?<=\d)\.(?=\d)", "__RENATA_DECIMAL_DOT__", text)
-    text = text.replace("?", ".").replace("!", ".")
-    text = re.sub(r"\s*;\s*", " ; ", text)
-    text = re.sub(r"(?:\s;\s){2,}", " ; ", text)
-    text = re.sub(r"\s*;\s*\.", ".", text)
-    text = re.sub(r"\.{2,}", ".", text)
-    text = re.sub(r"\s+", " ", text).strip()
-    text = re.sub(r"\s*\.\s*", ". ", text).strip()
-    text = text.replace("__RENATA_DECIMAL_DOT__", ".")
+    # Decimal dots are protected by a token so "100.5" is not split into "100. 5".
+    for pattern, replacement in _PIPELINE:
+        text = pattern.sub(replacement, text)
+    text = text.strip().replace(_DECIMAL_DOT_TOKEN, ".")
     if not text.endswith("."):
         text += "."
     return text
 
 
+def _context_cache_key(ctx: Dict[str, Any]) -> Optional[tuple]:
+    """Klucz z pol czytanych przez prepare_tts(); None = wartosci nie do cache."""
+    parts = []
+    for name in _PREPARE_CONTEXT_KEYS:
+        value = ctx.get(name)
+        if value is None:
+            continue
+        if not isinstance(value, (str, int, float)):
+            return None
+        # Typ w kluczu: 1, 1.0 i True sa rowne jako klucze, ale str() daje rozne teksty.
+        parts.append((name, type(value), value))
+    return tuple(parts)
+
+
 def prepare_tts(message_id: str, context: Optional[Dict[str, Any]] = None) -> Optional[str]:
     if not message_id or message_id not in ALLOWED_MESSAGES:
         return None
     ctx = context or {}
+    key = _context_cache_key(ctx)
+    if key is None:
+        return _prepare_tts_uncached(message_id, ctx)
+    prepared = _cache("prepared")
+    cache_key = (message_id, key)
+    entry = prepared.get_entry(cache_key)
+    if entry is not None:
+        return entry[1]
+    return prepared.set(cache_key, _prepare_tts_uncached(message_id, ctx))
+
+
+def warm_cache(route_systems: Iterable[Any]) -> int:
+    """
+    Wstepnie renderuje komunikaty next-hop/jumped dla systemow trasy (wywolywane
+    po przyjeciu trasy), zeby pierwszy skok nie placil za normalizacje i slowa
+    liczb przed synteza. Zwraca liczbe rozgrzanych nazw.
+    """
+    seen: set[str] = set()
+    for value in route_systems or ():
+        if not isinstance(value, str) or not value.strip() or value in seen:
+            continue
+        seen.add(value)
+        for message_id in _ROUTE_WARM_MESSAGES:
+            prepare_tts(message_id, {"system": value})
+        if len(seen) >= _ROUTE_WARM_LIMIT:
+            break
+    return len(seen)
+
+
+def tts_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Statystyki cache preprocesora (trafienia, rozmiary) dla diagnostyki."""
+    return {
+        "prepared": _cache("prepared").stats(),
+        "names": _cache("names").stats(),
+        "int_words": _int_to_words_pl.cache_info()._asdict(),
+        "decimal_words": _decimal_to_words_pl.cache_info()._asdict(),
+    }
+
+
+def _reset_tts_caches_for_tests() -> None:
+    _cache("prepared").clear()
+    _cache("names").clear()
+    _int_to_words_pl.cache_clear()
+    _decimal_to_words_pl.cache_clear()
+
+
+def _prepare_tts_uncached(message_id: str, ctx: Dict[str, Any]) -> Optional[str]:
     if raw_text_first(message_id):
         raw_text = ctx.get("raw_text")
         if raw_text:
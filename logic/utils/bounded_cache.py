@@ -0,0 +1,290 @@
+from __future__ import annotations
+
+import heapq
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict
+
+# Rejestr nazwanych cache (namespace -> BoundedCache) dla statystyk/diagnostyki.
+_REGISTRY: dict[str, "BoundedCache"] = {}
+_REGISTRY_LOCK = threading.Lock()
+_SIZE_SAMPLE = 64
+
+
+class FrozenRow(dict):
+    """
+    dict tylko do odczytu - wiersz wspoldzielony miedzy trafieniami cache
+    zamiast kopii przy kazdym get(). dict(row) daje zwykla, edytowalna kopie.
+    """
+
+    __slots__ = ()
+
+    def _readonly(self, *_args: Any, **_kwargs: Any) -> None:
+        raise TypeError("FrozenRow is read-only; copy it with dict(row) first")
+
+    __setitem__ = _readonly
+    __delitem__ = _readonly
+    __ior__ = _readonly
+    clear = _readonly
+    pop = _readonly
+    popitem = _readonly
+    setdefault = _readonly
+    update = _readonly
+
+    def __copy__(self) -> dict:
+        return dict(self)
+
+    def __deepcopy__(self, memo: dict) -> dict:
+        import copy
+
+        return {copy.deepcopy(k, memo): copy.deepcopy(v, memo) for k, v in self.items()}
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
+
+class FrozenList(list):
+    """list tylko do odczytu (isinstance(x, list) dalej dziala); list(x) = kopia."""
+
+    __slots__ = ()
+
+    def _readonly(self, *_args: Any, **_kwargs: Any) -> None:
+        raise TypeError("FrozenList is read-only; copy it with list(rows) first")
+
+    __setitem__ = _readonly
+    __delitem__ = _readonly
+    __iadd__ = _readonly
+    __imul__ = _readonly
+    append = _readonly
+    extend = _readonly
+    insert = _readonly
+    pop = _readonly
+    remove = _readonly
+    clear = _readonly
+    sort = _readonly
+    reverse = _readonly
+
+    def __copy__(self) -> list:
+        return list(self)
+
+    def __deepcopy__(self, memo: dict) -> list:
+        import copy
+
+        return [copy.deepcopy(item, memo) for item in self]
+
+    def __reduce__(self):
+        return (list, (list(self),))
+
+
+def freeze(value: Any) -> Any:
+    """Rekurencyjnie: dict -> FrozenRow, list -> FrozenList. Reszta bez zmian."""
+    if isinstance(value, (FrozenRow, FrozenList)):
+        return value
+    if isinstance(value, dict):
+        return FrozenRow((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return FrozenList(freeze(item) for item in value)
+    if isinstance(value, tuple):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def approx_size(value: Any, _depth: int = 0) -> int:
+    """
+    Przyblizony rozmiar w bajtach. Dlugie sekwencje liczone z probki
+    (_SIZE_SAMPLE elementow), zeby wycena duzego wpisu byla tania.
+    """
+    size = sys.getsizeof(value)
+    if _depth > 4:
+        return size
+    if isinstance(value, dict):
+        for key, item in value.items():
+            size += sys.getsizeof(key) + approx_size(item, _depth + 1)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        items = list(value) if not isinstance(value, (list, tuple)) else value
+        count = len(items)
+        if count:
+            sample = items[:_SIZE_SAMPLE]
+            sampled = sum(approx_size(item, _depth + 1) for item in sample)
+            size += int(sampled * count / len(sample))
+    return size
+
+
+class BoundedCache:
+    """
+    Cache w pamieci: LRU (OrderedDict) + TTL (kopiec wygasan, O(log n)) +
+    budzet pamieci na namespace. Wartosci domyslnie zamrazane (freeze), wiec
+    get() oddaje wspoldzielony obiekt bez kopiowania.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        *,
+        ttl_sec: float | None,
+        max_items: int,
+        max_bytes: int | None = None,
+        freeze_values: bool = True,
+        clock: Callable[[], float] = time.monotonic,
+        register: bool = True,
+    ) -> None:
+        self.namespace = str(namespace)
+        self.ttl_sec = float(ttl_sec) if ttl_sec is not None else None
+        self.max_items = max(1, int(max_items))
+        self.max_bytes = int(max_bytes) if max_bytes else None
+        self._freeze = bool(freeze_values)
+        self._clock = clock
+        self._lock = threading.Lock()
+        # key -> (stored_at, expires_at | None, size, value)
+        self._data: "OrderedDict[Any, tuple[float, float | None, int, Any]]" = OrderedDict()
+        self._expiry_heap: list[tuple[float, int, Any]] = []
+        self._seq = 0
+        self._bytes = 0
+        self._stats: Dict[str, int] = {
+            "hits": 0,
+            "misses": 0,
+            "sets": 0,
+            "expired": 0,
+            "evicted_lru": 0,
+            "evicted_budget": 0,
+        }
+        if register:
+            with _REGISTRY_LOCK:
+                _REGISTRY[self.namespace] = self
+
+    # ------------------------------------------------------------------ #
+    def configure(
+        self,
+        *,
+        ttl_sec: float | None = None,
+        max_items: int | None = None,
+        max_bytes: int | None = None,
+    ) -> None:
+        """Zmiana limitow w locie (np. z configu); nowy TTL dotyczy nowych wpisow."""
+        with self._lock:
+            if ttl_sec is not None:
+                self.ttl_sec = float(ttl_sec)
+            if max_items is not None:
+                self.max_items = max(1, int(max_items))
+            if max_bytes is not None:
+                self.max_bytes = int(max_bytes) or None
+            self._enforce_limits_locked()
+
+    def _drop_locked(self, key: Any) -> None:
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    def _expire_locked(self, now: float) -> None:
+        heap = self._expiry_heap
+        while heap and heap[0][0] <= now:
+            expires_at, _seq, key = heapq.heappop(heap)
+            entry = self._data.get(key)
+            # Wpis mogl byc nadpisany - wtedy ma inny expires_at.
+            if entry is not None and entry[1] == expires_at:
+                self._drop_locked(key)
+                self._stats["expired"] += 1
+        # Kopiec bez zywych wpisow - nie pozwalamy mu rosnac bez konca.
+        if len(heap) > 4 * max(16, len(self._data)):
+            self._expiry_heap = [
+                (entry[1], idx, key)
+                for idx, (key, entry) in enumerate(self._data.items())
+                if entry[1] is not None
+            ]
+            heapq.heapify(self._expiry_heap)
+            self._seq = len(self._expiry_heap)
+
+    def _enforce_limits_locked(self) -> None:
+        while len(self._data) > self.max_items:
+            key = next(iter(self._data))
+            self._drop_locked(key)
+            self._stats["evicted_lru"] += 1
+        if self.max_bytes is not None:
+            while self._bytes > self.max_bytes and len(self._data) > 1:
+                key = next(iter(self._data))
+                self._drop_locked(key)
+                self._stats["evicted_budget"] += 1
+
+    # ------------------------------------------------------------------ #
+    def get_entry(self, key: Any) -> tuple[float, Any] | None:
+        """(wiek_s, wartosc) albo None; trafienie odswieza pozycje LRU."""
+        now = self._clock()
+        with self._lock:
+            self._expire_locked(now)
+            entry = self._data.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._data.move_to_end(key)
+            self._stats["hits"] += 1
+            return max(0.0, now - entry[0]), entry[3]
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        entry = self.get_entry(key)
+        return default if entry is None else entry[1]
+
+    def set(self, key: Any, value: Any, *, ttl_sec: float | None = None) -> Any:
+        """Zapisuje wartosc (zamrozona) i zwraca to, co trafilo do cache."""
+        stored = freeze(value) if self._freeze else value
+        size = approx_size(stored) if self.max_bytes is not None else 0
+        now = self._clock()
+        ttl = self.ttl_sec if ttl_sec is None else float(ttl_sec)
+        expires_at = now + ttl if ttl is not None else None
+        with self._lock:
+            self._expire_locked(now)
+            self._drop_locked(key)
+            self._data[key] = (now, expires_at, size, stored)
+            self._bytes += size
+            if expires_at is not None:
+                self._seq += 1
+                heapq.heappush(self._expiry_heap, (expires_at, self._seq, key))
+            self._stats["sets"] += 1
+            self._enforce_limits_locked()
+        return stored
+
+    def pop(self, key: Any) -> None:
+        with self._lock:
+            self._drop_locked(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._expiry_heap.clear()
+            self._bytes = 0
+
+    def prune(self) -> None:
+        with self._lock:
+            self._expire_locked(self._clock())
+            self._enforce_limits_locked()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    def __contains__(self, key: Any) -> bool:
+        with self._lock:
+            return key in self._data
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = dict(self._stats)
+            out.update(
+                {
+                    "namespace": self.namespace,
+                    "items": len(self._data),
+                    "bytes": self._bytes,
+                    "max_items": self.max_items,
+                    "max_bytes": self.max_bytes,
+                    "ttl_sec": self.ttl_sec,
+                }
+            )
+            return out
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Statystyki wszystkich zarejestrowanych cache (namespace -> stats)."""
+    with _REGISTRY_LOCK:
+        caches = list(_REGISTRY.values())
+    return {cache.namespace: cache.stats() for cache in caches}
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+
+class RouteCancelled(Exception):
+    """Job trasy zostal anulowany (supersede / timeout / uzytkownik)."""
+
+
+class CancelToken:
+    """
+    Kooperacyjny token anulowania. Worker sprawdza `cancelled` albo spi
+    przez `wait()`, ktore budzi sie od razu po cancel(). Tokeny z child()
+    sa anulowane razem z rodzicem.
+    """
+
+    __slots__ = ("_event", "_reason", "_children", "_lock")
+
+    def __init__(self) -> None:
+        self._event = threading.Event()
+        self._reason = ""
+        self._children: list[CancelToken] = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    @property
+    def reason(self) -> str:
+        return self._reason
+
+    def cancel(self, reason: str = "cancelled") -> bool:
+        """Zwraca True tylko przy pierwszym anulowaniu."""
+        with self._lock:
+            if self._event.is_set():
+                return False
+            self._reason = str(reason or "cancelled")
+            self._event.set()
+            children = list(self._children)
+            self._children.clear()
+        for child in children:
+            child.cancel(self._reason)
+        return True
+
+    def child(self) -> "CancelToken":
+        token = CancelToken()
+        with self._lock:
+            if not self._event.is_set():
+                self._children.append(token)
+                return token
+        token.cancel(self._reason)
+        return token
+
+    def wait(self, timeout: float | None) -> bool:
+        """Spi do timeout; True gdy token zostal anulowany w tym czasie."""
+        return self._event.wait(timeout)
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise RouteCancelled(self._reason)
+
+
+_LOCAL = threading.local()
+
+
+def current_cancel_token() -> CancelToken | None:
+    """Token joba biegnacego w tym watku (ustawiany przez RouteManager)."""
+    return getattr(_LOCAL, "token", None)
+
+
+@contextmanager
+def bind_cancel_token(token: CancelToken | None) -> Iterator[CancelToken | None]:
+    previous = getattr(_LOCAL, "token", None)
+    _LOCAL.token = token
+    try:
+        yield token
+    finally:
+        _LOCAL.token = previous
@@ -4,6 +4,9 @@ from typing import Any, Dict, List
 
 import requests
 import config
+from logic.utils.bounded_cache import BoundedCache
+from logic.utils.cancellation import current_cancel_token
+from logic.utils.rate_limiter import provider_rate_limiter
 
 
 class Edsmtimeout(Exception):
@@ -23,16 +26,36 @@ class Edsmcircuitopen(Edsmunavailable):
 
 
 _LAST_REQUEST_AT = 0.0
-_THROTTLE_MS = 500
 _DEFAULT_TIMEOUT = 3.0
 _CACHE_TTL_SECONDS = 10 * 60
 _CACHE_MAX_ITEMS = 200
-_CACHE: dict[str, tuple[float, object]] = {}
-_STATIONS_CACHE: dict[str, tuple[float, list[str]]] = {}
 _STATIONS_TTL_SECONDS = 24 * 60 * 60
-_STATIONS_DETAILS_CACHE: dict[str, tuple[float, list[dict[str, Any]]]] = {}
 _NEARBY_SYSTEMS_TTL_SECONDS = 10 * 60
-_NEARBY_SYSTEMS_CACHE: dict[str, tuple[float, list[dict[str, Any]]]] = {}
+# Ograniczone cache (LRU + TTL + budzet pamieci); wiersze wspoldzielone jako FrozenRow.
+_CACHE = BoundedCache(
+    "edsm.lookup",
+    ttl_sec=_CACHE_TTL_SECONDS,
+    max_items=_CACHE_MAX_ITEMS,
+    max_bytes=2 * 1024 * 1024,
+)
+_STATIONS_CACHE = BoundedCache(
+    "edsm.stations",
+    ttl_sec=_STATIONS_TTL_SECONDS,
+    max_items=512,
+    max_bytes=2 * 1024 * 1024,
+)
+_STATIONS_DETAILS_CACHE = BoundedCache(
+    "edsm.station_details",
+    ttl_sec=_STATIONS_TTL_SECONDS,
+    max_items=256,
+    max_bytes=8 * 1024 * 1024,
+)
+_NEARBY_SYSTEMS_CACHE = BoundedCache(
+    "edsm.nearby_systems",
+    ttl_sec=_NEARBY_SYSTEMS_TTL_SECONDS,
+    max_items=128,
+    max_bytes=4 * 1024 * 1024,
+)
 _PROVIDER_ENDPOINT_STATE: dict[str, dict[str, Any]] = {}
 _NEARBY_RADIUS_PROVIDER_CAP_LY = 100.0
 
@@ -167,8 +190,20 @@ def _request_json_with_resilience(
 
     last_error_code = 0
     last_error_kind = ""
+    cancel_token = current_cancel_token()
+
+    def _backoff(attempt_no: int) -> None:
+        # Porzucony lookup (np. fan-out po deadline) nie ponawia zapytan w tle.
+        delay = min(max_delay, base_delay * (2**attempt_no)) + random.uniform(0.0, jitter)
+        if cancel_token is None:
+            time.sleep(max(0.0, delay))
+        elif cancel_token.wait(max(0.0, delay)):
+            raise Edsmunavailable(f"CANCELLED reason={cancel_token.reason}")
+
     for attempt in range(max_attempts):
         _throttle()
+        if cancel_token is not None and cancel_token.cancelled:
+            raise Edsmunavailable(f"CANCELLED reason={cancel_token.reason}")
         try:
             res = requests.get(
                 url,
@@ -186,8 +221,7 @@ def _request_json_with_resilience(
                     retry_attempts=attempt + 1,
                 )
                 raise Edsmtimeout(str(e)) from e
-            delay = min(max_delay, base_delay * (2**attempt)) + random.uniform(0.0, jitter)
-            time.sleep(max(0.0, delay))
+            _backoff(attempt)
             continue
         except requests.RequestException as e:
             last_error_kind = "request_exception"
@@ -199,8 +233,7 @@ def _request_json_with_resilience(
                     retry_attempts=attempt + 1,
                 )
                 raise Edsmunavailable(str(e)) from e
-            delay = min(max_delay, base_delay * (2**attempt)) + random.uniform(0.0, jitter)
-            time.sleep(max(0.0, delay))
+            _backoff(attempt)
             continue
 
         if res.status_code == 200:
@@ -221,8 +254,7 @@ def _request_json_with_resilience(
         last_error_kind = f"http_{last_error_code}"
         is_retryable = last_error_code in {503, 504}
         if is_retryable and attempt < (max_attempts - 1):
-            delay = min(max_delay, base_delay * (2**attempt)) + random.uniform(0.0, jitter)
-            time.sleep(max(0.0, delay))
+            _backoff(attempt)
             continue
         break
 
@@ -242,75 +274,42 @@ def _normalize_query(query: str) -> str:
 
 
 def _cache_get(key: str):
-    item = _CACHE.get(key)
-    if not item:
-        return None
-    ts, data = item
-    if time.monotonic() - ts > _CACHE_TTL_SECONDS:
-        _CACHE.pop(key, None)
-        return None
-    return data
+    return _CACHE.get(key)
 
 
 def _cache_set(key: str, data) -> None:
-    _CACHE[key] = (time.monotonic(), data)
-    if len(_CACHE) <= _CACHE_MAX_ITEMS:
-        return
-    oldest_key = min(_CACHE.items(), key=lambda kv: kv[1][0])[0]
-    _CACHE.pop(oldest_key, None)
+    _CACHE.set(key, data)
 
 
 def _stations_cache_get(key: str) -> list[str] | None:
-    item = _STATIONS_CACHE.get(key)
-    if not item:
-        return None
-    ts, data = item
-    if time.monotonic() - ts > _STATIONS_TTL_SECONDS:
-        _STATIONS_CACHE.pop(key, None)
-        return None
-    return list(data)
+    return _STATIONS_CACHE.get(key)
 
 
 def _stations_cache_set(key: str, data: list[str]) -> None:
-    _STATIONS_CACHE[key] = (time.monotonic(), list(data))
+    _STATIONS_CACHE.set(key, data)
 
 
 def _stations_details_cache_get(key: str) -> list[dict[str, Any]] | None:
-    item = _STATIONS_DETAILS_CACHE.get(key)
-    if not item:
-        return None
-    ts, data = item
-    if time.monotonic() - ts > _STATIONS_TTL_SECONDS:
-        _STATIONS_DETAILS_CACHE.pop(key, None)
-        return None
-    return [dict(row) for row in data]
+    return _STATIONS_DETAILS_CACHE.get(key)
 
 
 def _stations_details_cache_set(key: str, data: list[dict[str, Any]]) -> None:
-    _STATIONS_DETAILS_CACHE[key] = (time.monotonic(), [dict(row) for row in data])
+    _STATIONS_DETAILS_CACHE.set(key, data)
 
 
 def _nearby_systems_cache_get(key: str) -> list[dict[str, Any]] | None:
-    item = _NEARBY_SYSTEMS_CACHE.get(key)
-    if not item:
-        return None
-    ts, data = item
-    if time.monotonic() - ts > _NEARBY_SYSTEMS_TTL_SECONDS:
-        _NEARBY_SYSTEMS_CACHE.pop(key, None)
-        return None
-    return [dict(row) for row in data if isinstance(row, dict)]
+    return _NEARBY_SYSTEMS_CACHE.get(key)
 
 
 def _nearby_systems_cache_set(key: str, data: list[dict[str, Any]]) -> None:
-    _NEARBY_SYSTEMS_CACHE[key] = (time.monotonic(), [dict(row) for row in data if isinstance(row, dict)])
+    _NEARBY_SYSTEMS_CACHE.set(key, [row for row in data if isinstance(row, dict)])
 
 
 def _throttle() -> None:
+    # Wspolny token bucket zamiast globalnego "ostatniego requestu" - bezpieczny
+    # przy rownoleglym fan-oucie cash-in (kazdy watek dostaje wlasny slot).
     global _LAST_REQUEST_AT
-    now = time.monotonic()
-    delta_ms = (now - _LAST_REQUEST_AT) * 1000.0
-    if delta_ms < _THROTTLE_MS:
-        time.sleep(max(0.0, (_THROTTLE_MS - delta_ms) / 1000.0))
+    provider_rate_limiter("edsm").acquire()
     _LAST_REQUEST_AT = time.monotonic()
 
 
@@ -504,7 +503,7 @@ def fetch_system_stations_details(
     cache_key = f"stations_details:{_normalize_query(sys_name)}"
     cached = _stations_details_cache_get(cache_key)
     if isinstance(cached, list):
-        return [dict(item) for item in cached if isinstance(item, dict)]
+        return list(cached)
 
     url = "https://www.edsm.net/api-system-v1/stations"
     timeout_val = _DEFAULT_TIMEOUT if timeout is None else float(timeout)
@@ -617,7 +616,7 @@ def fetch_nearby_systems(
             effective_radius_ly=safe_radius,
             provider_response_count=len(cached),
         )
-        return [dict(item) for item in cached if isinstance(item, dict)]
+        return list(cached)
 
     url = "https://www.edsm.net/api-v1/sphere-systems"
     timeout_val = _DEFAULT_TIMEOUT if timeout is None else float(timeout)
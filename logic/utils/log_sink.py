@@ -0,0 +1,373 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, NamedTuple
+
+LEVEL_DEBUG = "debug"
+LEVEL_INFO = "info"
+LEVEL_WARNING = "warning"
+LEVEL_ERROR = "error"
+_ALWAYS_PASS_LEVELS = frozenset((LEVEL_WARNING, LEVEL_ERROR))
+
+DEFAULT_RING_CAPACITY = 5000
+DEFAULT_SAMPLE_RATE_PER_SEC = 20.0
+DEFAULT_SAMPLE_BURST = 60
+DEFAULT_GUI_RATE_PER_SEC = 20.0
+DEFAULT_GUI_BURST = 200
+DEFAULT_SUMMARY_INTERVAL_SEC = 10.0
+_MAX_SAMPLING_SOURCES = 256
+
+JSONL_FLUSH_INTERVAL_SEC = 0.25
+JSONL_MAX_BYTES = 5 * 1024 * 1024
+JSONL_BACKUPS = 3
+_JSONL_MAX_PENDING = 50_000
+
+
+class LogRecord(NamedTuple):
+    ts: float
+    level: str
+    source: str
+    code: str
+    fields: Dict[str, str]
+    line: str
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "ts": self.ts,
+            "level": self.level,
+            "source": self.source,
+            "code": self.code,
+            "fields": dict(self.fields),
+            "line": self.line,
+        }
+
+
+class _TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "last")
+
+    def __init__(self, rate: float, burst: float, now: float) -> None:
+        self.rate = max(0.0, float(rate))
+        self.burst = max(1.0, float(burst))
+        self.tokens = self.burst
+        self.last = now
+
+    def take(self, now: float) -> bool:
+        elapsed = now - self.last
+        if elapsed > 0.0:
+            self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+            self.last = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+
+_LEVEL_ALIASES = {
+    "debug": LEVEL_DEBUG,
+    "info": LEVEL_INFO,
+    "warn": LEVEL_WARNING,
+    "warning": LEVEL_WARNING,
+    "error": LEVEL_ERROR,
+    "critical": LEVEL_ERROR,
+    "fatal": LEVEL_ERROR,
+}
+
+
+def level_for(source: str, fields: Dict[str, Any] | None = None, level: str | None = None) -> str:
+    """
+    Poziom rekordu. Jawny level= (np. "warning" przy kategorii domenowej CASHIN)
+    ma pierwszenstwo; bez niego poziom wynika z kategorii: WARN/ERROR wprost,
+    pole error=... traktujemy jak ostrzezenie, *DBG/DEBUG jako debug.
+    """
+    explicit = _LEVEL_ALIASES.get(str(level or "").strip().lower())
+    if explicit:
+        return explicit
+    if source in ("ERROR", "CRITICAL", "FATAL"):
+        return LEVEL_ERROR
+    if source in ("WARN", "WARNING"):
+        return LEVEL_WARNING
+    if fields and ("error" in fields or "exc" in fields):
+        return LEVEL_WARNING
+    if source == "DEBUG" or source.endswith("DBG"):
+        return LEVEL_DEBUG
+    return LEVEL_INFO
+
+
+class _JsonlWriter:
+    """
+    Zapis rekordow do JSONL w tle: jedna paczka co flush_interval_sec,
+    rotacja po rozmiarze (plik -> plik.1 -> ... -> plik.N).
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        max_bytes: int = JSONL_MAX_BYTES,
+        backups: int = JSONL_BACKUPS,
+        flush_interval_sec: float = JSONL_FLUSH_INTERVAL_SEC,
+        fallback: Callable[[str], None] | None = None,
+    ) -> None:
+        self.path = str(path)
+        self._fallback = fallback
+        self.max_bytes = max(4096, int(max_bytes))
+        self.backups = max(0, int(backups))
+        self.flush_interval_sec = max(0.01, float(flush_interval_sec))
+        self._pending: deque[LogRecord] = deque(maxlen=_JSONL_MAX_PENDING)
+        self._wake = threading.Event()
+        self._stopped = False
+        self.batches = 0
+        self.records_written = 0
+        self._thread = threading.Thread(target=self._run, name="renata-log-jsonl", daemon=True)
+        self._thread.start()
+
+    def push(self, record: LogRecord) -> None:
+        self._pending.append(record)
+
+    def _append(self, lines: list[str]) -> None:
+        if not lines:
+            return
+        with open(self.path, "a", encoding="utf-8") as handle:
+            handle.write("".join(lines))
+
+    def _rotate(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        if self.backups <= 0:
+            os.remove(self.path)
+            return
+        for idx in range(self.backups - 1, 0, -1):
+            src = f"{self.path}.{idx}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{idx + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+    def flush(self) -> int:
+        batch: list[LogRecord] = []
+        pending = self._pending
+        while pending:
+            try:
+                batch.append(pending.popleft())
+            except IndexError:
+                break
+        if not batch:
+            return 0
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            size = 0
+        chunk: list[str] = []
+        for record in batch:
+            line = json.dumps(record.as_dict(), ensure_ascii=False) + "\n"
+            line_bytes = len(line.encode("utf-8"))
+            if size and size + line_bytes > self.max_bytes:
+                # Duza paczka moze przekroczyc limit kilka razy - dzielimy ja na pliki.
+                self._append(chunk)
+                chunk = []
+                self._rotate()
+                size = 0
+            chunk.append(line)
+            size += line_bytes
+        self._append(chunk)
+        self.batches += 1
+        self.records_written += len(batch)
+        return len(batch)
+
+    def _run(self) -> None:
+        while not self._stopped:
+            self._wake.wait(self.flush_interval_sec)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as exc:
+                if self._fallback is not None:
+                    self._fallback(f"[LOG] jsonl writer failed: {type(exc).__name__}: {exc}")
+
+    def close(self, timeout: float = 2.0) -> None:
+        self._stopped = True
+        self._wake.set()
+        self._thread.join(timeout=timeout)
+        try:
+            self.flush()
+        except Exception:
+            pass
+
+
+class LogSink:
+    """
+    Backend logow: ring buffer (deque o stalym rozmiarze) ustrukturyzowanych
+    rekordow + token bucket per zrodlo dla debug/info (warning/error zawsze
+    przechodza) + osobny limit linii debug/info przekazywanych do kolejki GUI.
+    Odrzucone linie sa liczone i raportowane zbiorczo ("N suppressed").
+    `fallback` dostaje linie, ktorych nie dalo sie oddac do kolejki GUI.
+    """
+
+    def __init__(
+        self,
+        *,
+        queue_getter: Callable[[], Any],
+        capacity: int = DEFAULT_RING_CAPACITY,
+        sample_rate_per_sec: float = DEFAULT_SAMPLE_RATE_PER_SEC,
+        sample_burst: int = DEFAULT_SAMPLE_BURST,
+        gui_rate_per_sec: float = DEFAULT_GUI_RATE_PER_SEC,
+        gui_burst: int = DEFAULT_GUI_BURST,
+        summary_interval_sec: float = DEFAULT_SUMMARY_INTERVAL_SEC,
+        clock: Callable[[], float] = time.monotonic,
+        fallback: Callable[[str], None] | None = None,
+    ) -> None:
+        self._queue_getter = queue_getter
+        self._fallback = fallback
+        self._clock = clock
+        self.capacity = max(16, int(capacity))
+        # deque(maxlen) - append jest atomowy w CPython, ring nie potrzebuje locka.
+        self._ring: deque[LogRecord] = deque(maxlen=self.capacity)
+        self._sample_rate = float(sample_rate_per_sec)
+        self._sample_burst = int(sample_burst)
+        self._summary_interval = max(0.1, float(summary_interval_sec))
+        self._lock = threading.Lock()
+        now = clock()
+        self._buckets: Dict[str, _TokenBucket] = {}
+        self._gui_bucket = _TokenBucket(gui_rate_per_sec, gui_burst, now)
+        self._last_summary = now
+        self._pending_sampled = 0
+        self._pending_gui = 0
+        self._writer: _JsonlWriter | None = None
+        self._stats: Dict[str, int] = {
+            "emitted": 0,
+            "recorded": 0,
+            "sampled_out": 0,
+            "gui_forwarded": 0,
+            "gui_suppressed": 0,
+            "summaries": 0,
+            "warnings_recorded": 0,
+        }
+
+    # ------------------------------------------------------------------ #
+    def admit(self, source: str, level: str) -> bool:
+        """
+        Decyzja samplingu - wolana PRZED formatowaniem linii, zeby odrzucenie
+        bylo tanie.
+        """
+        with self._lock:
+            self._stats["emitted"] += 1
+            if level in _ALWAYS_PASS_LEVELS:
+                return True
+            bucket = self._buckets.get(source)
+            now = self._clock()
+            if bucket is None:
+                if len(self._buckets) >= _MAX_SAMPLING_SOURCES:
+                    self._buckets.clear()
+                bucket = _TokenBucket(self._sample_rate, self._sample_burst, now)
+                self._buckets[source] = bucket
+            if bucket.take(now):
+                return True
+            self._stats["sampled_out"] += 1
+            self._pending_sampled += 1
+            return False
+
+    def record(self, level: str, source: str, code: str, fields: Dict[str, str], line: str) -> LogRecord:
+        record = LogRecord(time.time(), level, source, code, fields, line)
+        self._ring.append(record)
+        writer = self._writer
+        if writer is not None:
+            writer.push(record)
+        summary = None
+        with self._lock:
+            self._stats["recorded"] += 1
+            if level in _ALWAYS_PASS_LEVELS:
+                self._stats["warnings_recorded"] += 1
+            now = self._clock()
+            forward = level in _ALWAYS_PASS_LEVELS or self._gui_bucket.take(now)
+            if forward:
+                self._stats["gui_forwarded"] += 1
+            else:
+                self._stats["gui_suppressed"] += 1
+                self._pending_gui += 1
+            summary = self._take_summary_locked(now)
+        if forward:
+            self._put_gui(line)
+        if summary:
+            self._put_gui(summary)
+        return record
+
+    def _take_summary_locked(self, now: float) -> str | None:
+        if not (self._pending_sampled or self._pending_gui):
+            return None
+        if (now - self._last_summary) < self._summary_interval:
+            return None
+        sampled, gui = self._pending_sampled, self._pending_gui
+        self._pending_sampled = self._pending_gui = 0
+        self._last_summary = now
+        self._stats["summaries"] += 1
+        return f"[LOG] {sampled + gui} messages suppressed sampled={sampled} gui={gui} (dump_recent for details)"
+
+    def flush_summary(self) -> str | None:
+        """Wymusza podsumowanie odrzuconych linii (np. przed eksportem)."""
+        with self._lock:
+            self._last_summary -= self._summary_interval
+            summary = self._take_summary_locked(self._clock())
+        if summary:
+            self._put_gui(summary)
+        return summary
+
+    def _put_gui(self, line: str) -> None:
+        try:
+            self._queue_getter().put(("log", line))
+        except Exception:
+            if self._fallback is not None:
+                self._fallback(line)
+
+    # ------------------------------------------------------------------ #
+    def dump_recent(self, n: int = 200) -> list[Dict[str, Any]]:
+        records = list(self._ring)
+        count = max(0, int(n))
+        return [record.as_dict() for record in (records[-count:] if count else [])]
+
+    def recent_lines(self, n: int = 200) -> list[str]:
+        records = list(self._ring)
+        count = max(0, int(n))
+        return [record.line for record in (records[-count:] if count else [])]
+
+    def __len__(self) -> int:
+        return len(self._ring)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = dict(self._stats)
+            out["ring_size"] = len(self._ring)
+            out["ring_capacity"] = self.capacity
+            out["sources"] = len(self._buckets)
+            out["pending_suppressed"] = self._pending_sampled + self._pending_gui
+        writer = self._writer
+        out["jsonl_path"] = writer.path if writer is not None else ""
+        return out
+
+    # ------------------------------------------------------------------ #
+    def enable_jsonl(
+        self,
+        path: str,
+        *,
+        max_bytes: int = JSONL_MAX_BYTES,
+        backups: int = JSONL_BACKUPS,
+        flush_interval_sec: float = JSONL_FLUSH_INTERVAL_SEC,
+    ) -> None:
+        self.disable_jsonl()
+        self._writer = _JsonlWriter(
+            path,
+            max_bytes=max_bytes,
+            backups=backups,
+            flush_interval_sec=flush_interval_sec,
+            fallback=self._fallback,
+        )
+
+    def disable_jsonl(self, timeout: float = 2.0) -> None:
+        writer, self._writer = self._writer, None
+        if writer is not None:
+            writer.close(timeout)
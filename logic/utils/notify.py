@@ -738,8 +738,10 @@ class NotificationDebouncer:
 
     @staticmethod
     def _persist_min_interval_sec() -> float:
+        # Ten sam odstep co flusher segmentu "anti_spam"; timer tylko zbiera
+        # zmiany, zeby snapshot nie powstawal na sciezce wolajacego.
         try:
-            return max(0.5, float(config.get("anti_spam.persist_min_interval_sec", 2.0)))
+            return float(config.state_segment_min_interval_sec("anti_spam"))
         except Exception:
             return 2.0
 
@@ -868,8 +870,7 @@ class NotificationDebouncer:
 
         payload: dict[str, Any] = {}
         try:
-            anti_spam_state = config.get_anti_spam_state(default={})
-            raw = anti_spam_state.get(self._STATE_SECTION) if isinstance(anti_spam_state, dict) else {}
+            raw = config.get_anti_spam_section(self._STATE_SECTION, {})
             if isinstance(raw, dict):
                 payload = raw
         except Exception:
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import threading
+import time
+
+# Domyslne limity per provider: (tokeny/s, pojemnosc kubelka).
+# EDSM: 2 req/s jak dotychczasowy _throttle (500 ms), Spansh nieco luzniej.
+_PROVIDER_RATES: dict[str, tuple[float, float]] = {
+    "edsm": (2.0, 1.0),
+    "spansh": (4.0, 2.0),
+}
+_DEFAULT_RATE = (2.0, 1.0)
+
+_LIMITERS: dict[str, "TokenBucket"] = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. acquire() rezerwuje token i spi poza lockiem,
+    wiec wiele watkow dostaje kolejne sloty zamiast sie wyscigac.
+    """
+
+    def __init__(self, rate_per_sec: float, capacity: float = 1.0) -> None:
+        self.rate = max(0.001, float(rate_per_sec))
+        self.capacity = max(1.0, float(capacity))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, now: float) -> float:
+        elapsed = max(0.0, now - self._updated)
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated = now
+        self._tokens -= 1.0
+        if self._tokens >= 0.0:
+            return 0.0
+        return -self._tokens / self.rate
+
+    def acquire(self, timeout: float | None = None) -> bool:
+        """Czeka na token; False gdy czekanie przekroczyloby timeout (token nie jest wtedy zuzyty)."""
+        with self._lock:
+            now = time.monotonic()
+            wait = self._reserve(now)
+            if timeout is not None and wait > max(0.0, float(timeout)):
+                self._tokens += 1.0
+                return False
+        if wait > 0.0:
+            time.sleep(wait)
+        return True
+
+
+def provider_rate_limiter(provider: str) -> TokenBucket:
+    """Wspolny limiter dla providera (np. "edsm", "spansh") w calym procesie."""
+    key = str(provider or "").strip().lower() or "default"
+    with _LIMITERS_LOCK:
+        limiter = _LIMITERS.get(key)
+        if limiter is None:
+            rate, capacity = _PROVIDER_RATES.get(key, _DEFAULT_RATE)
+            limiter = TokenBucket(rate, capacity)
+            _LIMITERS[key] = limiter
+        return limiter
+
+
+def _reset_provider_rate_limiters_for_tests() -> None:
+    with _LIMITERS_LOCK:
+        _LIMITERS.clear()
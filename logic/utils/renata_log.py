@@ -7,15 +7,40 @@ import time
 import config
 
 from logic import utils
+from logic.utils.bounded_cache import BoundedCache
+from logic.utils.log_sink import (
+    DEFAULT_GUI_BURST,
+    DEFAULT_GUI_RATE_PER_SEC,
+    DEFAULT_RING_CAPACITY,
+    DEFAULT_SAMPLE_BURST,
+    DEFAULT_SAMPLE_RATE_PER_SEC,
+    DEFAULT_SUMMARY_INTERVAL_SEC,
+    LogSink,
+    level_for,
+)
 
 
 MAX_FIELD_LEN = 400
 MAX_COLLECTION_ITEMS = 12
 MAX_OBJECT_FIELDS = 10
 MAX_DEPTH = 3
+MAX_CODE_LEN = 120
+_PLAIN_FIELD_TYPES = frozenset((str, int, float, bool, type(None)))
+
+# Klucze throttla czesto zawieraja nazwy systemow/cial - mapa musi miec limit.
+# Wpis zyje tyle, ile okno throttla (TTL = interval), a nadmiar wypada LRU.
+THROTTLE_MAX_KEYS = 4096
 
 _THROTTLE_LOCK = threading.Lock()
-_THROTTLE_LAST: dict[str, float] = {}
+_THROTTLE_LAST = BoundedCache(
+    "renata_log.throttle",
+    ttl_sec=None,
+    max_items=THROTTLE_MAX_KEYS,
+    freeze_values=False,
+)
+
+_SINK: LogSink | None = None
+_SINK_LOCK = threading.Lock()
 
 
 def _now() -> float:
@@ -26,6 +51,78 @@ def _debug_logging_enabled() -> bool:
     return bool(config.get("debug_logging", False))
 
 
+def _log_fallback(text: str) -> None:
+    # Ostatnia deska ratunku, gdy log nie dotarl do kolejki/pliku: tylko w trybie debug.
+    if _debug_logging_enabled():
+        print(text)
+
+
+def _setting(key: str, default: Any) -> Any:
+    try:
+        return type(default)(config.get(key, default))
+    except Exception:
+        return default
+
+
+def _build_sink() -> LogSink:
+    sink = LogSink(
+        queue_getter=lambda: utils.MSG_QUEUE,
+        capacity=_setting("log_sink.ring_capacity", DEFAULT_RING_CAPACITY),
+        sample_rate_per_sec=_setting("log_sink.sample_rate_per_sec", DEFAULT_SAMPLE_RATE_PER_SEC),
+        sample_burst=_setting("log_sink.sample_burst", DEFAULT_SAMPLE_BURST),
+        gui_rate_per_sec=_setting("log_sink.gui_rate_per_sec", DEFAULT_GUI_RATE_PER_SEC),
+        gui_burst=_setting("log_sink.gui_burst", DEFAULT_GUI_BURST),
+        summary_interval_sec=_setting("log_sink.summary_interval_sec", DEFAULT_SUMMARY_INTERVAL_SEC),
+        fallback=_log_fallback,
+    )
+    # Zapis JSONL tylko przy jawnym True (post-mortem, domyslnie wylaczony).
+    if config.get("log_sink.jsonl_enabled", False) is True:
+        path = config.get("log_sink.jsonl_path", "")
+        if not isinstance(path, str) or not path.strip():
+            path = config.renata_user_home_file("renata_log.jsonl")
+        try:
+            sink.enable_jsonl(path, max_bytes=_setting("log_sink.jsonl_max_bytes", 5 * 1024 * 1024))
+        except Exception as exc:
+            _log_fallback(f"[LOG] jsonl writer disabled: {type(exc).__name__}: {exc}")
+    return sink
+
+
+def get_log_sink() -> LogSink:
+    global _SINK
+    sink = _SINK
+    if sink is None:
+        with _SINK_LOCK:
+            if _SINK is None:
+                _SINK = _build_sink()
+            sink = _SINK
+    return sink
+
+
+def dump_recent(n: int = 200) -> list[dict[str, Any]]:
+    """Ostatnie n rekordow logu (ts, level, source, code, fields, line) - do zgloszen bledow."""
+    return get_log_sink().dump_recent(n)
+
+
+def log_sink_stats() -> dict[str, Any]:
+    return get_log_sink().stats()
+
+
+def close_log_sink(timeout: float = 2.0) -> None:
+    sink = _SINK
+    if sink is not None:
+        sink.flush_summary()
+        sink.disable_jsonl(timeout)
+
+
+def _reset_log_sink_for_tests() -> None:
+    global _SINK
+    with _SINK_LOCK:
+        sink, _SINK = _SINK, None
+    if sink is not None:
+        sink.disable_jsonl()
+    _THROTTLE_LAST.clear()
+
+
 def safe_repr(value: Any, *, max_len: int = MAX_FIELD_LEN) -> str:
     seen: set[int] = set()
 
@@ -93,28 +190,35 @@ def safe_repr(value: Any, *, max_len: int = MAX_FIELD_LEN) -> str:
 
 
 def _format_value(value: Any) -> str:
+    # Szybka sciezka dla skalarow (wiekszosc pol) - wynik identyczny jak safe_repr.
+    if type(value) in _PLAIN_FIELD_TYPES:
+        text = str(value)
+        return f"{text[:MAX_FIELD_LEN]}..." if len(text) > MAX_FIELD_LEN else text
     return safe_repr(value, max_len=MAX_FIELD_LEN)
 
 
-def log_event(category: str, msg: str, **fields: Any) -> None:
+def log_event(category: str, msg: str, *, level: str | None = None, **fields: Any) -> None:
     """
     Emit a short, structured log line to the main log stream.
     Format: [CATEGORY] message key=value ...
+    Rekord trafia do ring buffera sinka (sampling debug/info per kategoria);
+    do kolejki GUI idzie tylko limitowany strumien linii. level="warning"
+    oznacza ostrzezenie pod kategoria domenowa (nie podlega samplingowi).
     """
     try:
         cat = str(category or "GENERAL").strip().upper()
+        sink = get_log_sink()
+        level = level_for(cat, fields, level)
+        if not sink.admit(cat, level):
+            return
         base = f"[{cat}] {msg}"
-        if fields:
-            parts = [
-                f"{key}={_format_value(value)}" for key, value in fields.items()
-            ]
-            line = f"{base} " + " ".join(parts)
+        formatted = {str(key): _format_value(value) for key, value in fields.items()}
+        if formatted:
+            line = f"{base} " + " ".join(f"{key}={value}" for key, value in formatted.items())
         else:
             line = base
-        try:
-            utils.MSG_QUEUE.put(("log", line))
-        except Exception:
-            print(line)
+        code = str(fields.get("code") or msg or "")[:MAX_CODE_LEN]
+        sink.record(level, cat, code, formatted, line)
     except Exception:
         if _debug_logging_enabled():
             print("logging failed")
@@ -128,6 +232,8 @@ def log_event_throttled(*args: Any, **fields: Any) -> bool:
     1) log_event_throttled(key, interval_ms, category, msg, **fields)
     2) legacy:
        log_event_throttled(category, code, msg, cooldown_sec=60.0, context="...", **fields)
+
+    level= jest przekazywany do log_event bez zmian.
     """
     try:
         category = "GENERAL"
@@ -166,7 +272,7 @@ def log_event_throttled(*args: Any, **fields: Any) -> bool:
             last = _THROTTLE_LAST.get(key)
             if last is not None and (now - last) < interval_sec:
                 return False
-            _THROTTLE_LAST[key] = now
+            _THROTTLE_LAST.set(key, now, ttl_sec=interval_sec)
         log_event(category, msg, **payload)
         return True
     except Exception:
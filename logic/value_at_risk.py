@@ -0,0 +1,230 @@
+"""
+Wspolny snapshot "value-at-risk" dla combat_awareness i survival_rebuy_awareness.
+
+Snapshot (wartosc sesji, systemu, ladunku) jest liczony tylko wtedy, gdy
+zmieni sie ktorys z licznikow wersji: SystemValueEngine.version,
+ExitSummaryGenerator.version, cargo_value_estimator.runtime_version(),
+albo system / tonaz / ustawienia wyceny ladunku. Powtorne wywolanie przy
+kazdym ticku Status.json to jedno porownanie krotki.
+
+Silnik bez atrybutu version (np. atrapa w testach) wylacza cache - snapshot
+jest wtedy liczony za kazdym razem, jak wczesniej.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from threading import RLock
+from typing import Any, Callable, Dict, List
+
+import config
+from app.state import app_state
+from logic import cargo_value_estimator
+from logic.utils.renata_log import log_event_throttled
+
+_CARGO_CONFIG_KEYS = (
+    "risk.cargo.default_unit_price_cr",
+    "risk.cargo.floor_factor.market",
+    "risk.cargo.floor_factor.cache",
+    "risk.cargo.floor_factor.fallback",
+)
+
+
+@dataclass(frozen=True)
+class ValueSnapshot:
+    session_value: float = 0.0
+    system_value: float = 0.0
+    cargo_tons: float = 0.0
+    exploration_value: float = 0.0
+    exobio_value: float = 0.0
+    cargo_floor_cr: float = 0.0
+    cargo_expected_cr: float = 0.0
+    cargo_value_confidence: str = "LOW"
+    cargo_value_source: str = "fallback"
+
+
+_LOCK = RLock()
+_STATE: Dict[str, Any] = {
+    "key": None,
+    "snapshot": None,
+    "hits": 0,
+    "misses": 0,
+    "changes": 0,
+}
+_SUBSCRIBERS: List[Callable[[ValueSnapshot], None]] = []
+
+
+def _as_text(value: Any) -> str:
+    return str(value or "").strip()
+
+
+def _cargo_config_fingerprint() -> tuple:
+    fallback = config.get("risk.cargo.fallback_prices", {})
+    if isinstance(fallback, dict):
+        fallback_key: Any = tuple(sorted((str(k), str(v)) for k, v in fallback.items()))
+    else:
+        fallback_key = None
+    return tuple(config.get(key) for key in _CARGO_CONFIG_KEYS) + (fallback_key,)
+
+
+def _ship_cargo_tons() -> float:
+    try:
+        return float(getattr(app_state.ship_state, "cargo_mass_t", 0.0) or 0.0)
+    except Exception:
+        return 0.0
+
+
+def _cache_key(system: str, cargo_tons: float) -> tuple | None:
+    engine = getattr(app_state, "system_value_engine", None)
+    summary = getattr(app_state, "exit_summary", None)
+    engine_version = getattr(engine, "version", None)
+    summary_version = getattr(summary, "version", None)
+    if not isinstance(engine_version, int) or not isinstance(summary_version, int):
+        return None
+    return (
+        id(engine),
+        engine_version,
+        id(summary),
+        summary_version,
+        cargo_value_estimator.runtime_version(),
+        system,
+        cargo_tons,
+        _cargo_config_fingerprint(),
+    )
+
+
+def compute_snapshot(system_name: str | None = None) -> ValueSnapshot:
+    """Liczy snapshot od zera (bez cache)."""
+    session_value = 0.0
+    system_value = 0.0
+    exploration_value = 0.0
+    exobio_value = 0.0
+    cargo_floor_cr = 0.0
+    cargo_expected_cr = 0.0
+    cargo_value_confidence = "LOW"
+    cargo_value_source = "fallback"
+
+    try:
+        totals = app_state.system_value_engine.calculate_totals()
+        totals = totals or {}
+        session_value = float(totals.get("total") or 0.0)
+        cartography_value = float(totals.get("c_cartography") or 0.0)
+        exobio_value = float(totals.get("c_exobiology") or 0.0)
+        discovery_bonus = float(totals.get("bonus_discovery") or 0.0)
+        exploration_value = max(0.0, cartography_value + discovery_bonus)
+    except Exception:
+        session_value = 0.0
+        exploration_value = 0.0
+        exobio_value = 0.0
+
+    try:
+        system = _as_text(system_name) or _as_text(getattr(app_state, "current_system", ""))
+        if system:
+            data = app_state.exit_summary.build_summary_data(system_name=system)
+            if data is not None:
+                system_value = float(getattr(data, "total_value", 0.0) or 0.0)
+    except Exception:
+        system_value = 0.0
+
+    cargo_tons = _ship_cargo_tons()
+
+    try:
+        cargo_estimate = cargo_value_estimator.estimate_cargo_value(cargo_tons=cargo_tons)
+        cargo_tons = max(cargo_tons, float(cargo_estimate.cargo_tons))
+        cargo_floor_cr = float(cargo_estimate.cargo_floor_cr)
+        cargo_expected_cr = float(cargo_estimate.cargo_expected_cr)
+        cargo_value_confidence = str(cargo_estimate.confidence or "LOW").upper()
+        cargo_value_source = str(cargo_estimate.source or "fallback").lower()
+    except Exception:
+        cargo_floor_cr = 0.0
+        cargo_expected_cr = 0.0
+        cargo_value_confidence = "LOW"
+        cargo_value_source = "fallback"
+
+    return ValueSnapshot(
+        session_value=max(0.0, session_value),
+        system_value=max(0.0, system_value),
+        cargo_tons=max(0.0, cargo_tons),
+        exploration_value=max(0.0, exploration_value),
+        exobio_value=max(0.0, exobio_value),
+        cargo_floor_cr=max(0.0, cargo_floor_cr),
+        cargo_expected_cr=max(0.0, cargo_expected_cr),
+        cargo_value_confidence=cargo_value_confidence,
+        cargo_value_source=cargo_value_source,
+    )
+
+
+def get_snapshot(system_name: str | None = None) -> ValueSnapshot:
+    """
+    Snapshot dla systemu (domyslnie app_state.current_system). Przeliczany
+    tylko po zmianie wersji wejsc; subskrybenci dostaja callback, gdy
+    przeliczony snapshot rozni sie od poprzedniego.
+    """
+    system = _as_text(system_name) or _as_text(getattr(app_state, "current_system", ""))
+    key = _cache_key(system, _ship_cargo_tons())
+    with _LOCK:
+        cached = _STATE["snapshot"]
+        if key is not None and key == _STATE["key"] and cached is not None:
+            _STATE["hits"] += 1
+            return cached
+        _STATE["misses"] += 1
+
+    snapshot = compute_snapshot(system)
+    with _LOCK:
+        previous = _STATE["snapshot"]
+        _STATE["key"] = key
+        _STATE["snapshot"] = snapshot
+        changed = snapshot != previous
+        if changed:
+            _STATE["changes"] += 1
+        subscribers = list(_SUBSCRIBERS) if changed else []
+
+    for callback in subscribers:
+        try:
+            callback(snapshot)
+        except Exception as exc:
+            log_event_throttled(
+                "value_at_risk.subscriber",
+                5000,
+                "WARN",
+                "value-at-risk subscriber failed",
+                error=f"{type(exc).__name__}: {exc}",
+            )
+    return snapshot
+
+
+def subscribe(callback: Callable[[ValueSnapshot], None]) -> Callable[[], None]:
+    """Rejestruje callback(snapshot) na realna zmiane snapshotu; zwraca unsubscribe."""
+    with _LOCK:
+        if callback not in _SUBSCRIBERS:
+            _SUBSCRIBERS.append(callback)
+
+    def _unsubscribe() -> None:
+        with _LOCK:
+            if callback in _SUBSCRIBERS:
+                _SUBSCRIBERS.remove(callback)
+
+    return _unsubscribe
+
+
+def invalidate() -> None:
+    """Wymusza przeliczenie przy nastepnym get_snapshot()."""
+    with _LOCK:
+        _STATE["key"] = None
+
+
+def snapshot_stats() -> Dict[str, Any]:
+    """Liczniki dla widoku debug."""
+    with _LOCK:
+        return {
+            "hits": int(_STATE["hits"]),
+            "misses": int(_STATE["misses"]),
+            "changes": int(_STATE["changes"]),
+            "subscribers": len(_SUBSCRIBERS),
+            "cached": _STATE["snapshot"] is not None and _STATE["key"] is not None,
+        }
+
+
+def _reset_value_at_risk_for_tests() -> None:
+    with _LOCK:
+        _STATE.update({"key": None, "snapshot": None, "hits": 0, "misses": 0, "changes": 0})
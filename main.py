@@ -1,12 +1,14 @@
 # main.py (v0.9.5 - FEEDBACK LOOP)
 
 import threading
+import time
 import tkinter as tk
 
-from app.main_loop import MainLoop
+from app.main_loop import DeferredGuiRef, MainLoop
 from config import APP_VERSION, config
 from gui import RenataApp
 from logic.utils import powiedz
+from logic.utils.renata_log import log_event
 
 MAIN_WINDOW_SHOW_DELAY_MS = 300
 
@@ -23,15 +25,18 @@ def _show_main_window_safe(root: tk.Tk) -> None:
 
 
 def run() -> None:
+    started = time.perf_counter()
     root = tk.Tk()
-    # Avoid startup flicker while all tabs/widgets are being built.
+    # Avoid startup flicker while the main window is being built.
     root.withdraw()
-    app = RenataApp(root)
 
+    # Komunikat startowy i MainLoop ruszaja przed budowa GUI; wszystko, co
+    # wyprodukuja w tym czasie, czeka w MSG_QUEUE na RenataApp.check_queue.
+    gui_ref = DeferredGuiRef()
     startup_text = f"Renata {APP_VERSION}: startuje wszystkie systemy."
     powiedz(
         startup_text,
-        app,
+        gui_ref,
         message_id="MSG.STARTUP_SYSTEMS",
         context={"version": APP_VERSION},
         force=True,
@@ -41,14 +46,32 @@ def run() -> None:
     log_dir = config.get("log_dir")
 
     th = threading.Thread(
-        target=MainLoop(app, log_dir).run,
+        target=MainLoop(gui_ref, log_dir).run,
         daemon=True,
     )
     th.start()
 
+    app = RenataApp(root)
+    gui_ref.attach(app)
+    _log_startup_timings(app, started)
+
     root.after(MAIN_WINDOW_SHOW_DELAY_MS, lambda: _show_main_window_safe(root))
     root.mainloop()
 
 
+def _log_startup_timings(app, started: float) -> None:
+    timings = getattr(app, "startup_timings", None)
+    fields = {
+        key.replace(".", "_") + "_ms": round(float(value), 1)
+        for key, value in (timings.items() if isinstance(timings, dict) else ())
+    }
+    log_event(
+        "APP",
+        "startup gui ready",
+        total_ms=round((time.perf_counter() - started) * 1000.0, 1),
+        **fields,
+    )
+
+
 if __name__ == "__main__":
     run()
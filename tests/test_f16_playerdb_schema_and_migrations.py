@@ -24,13 +24,13 @@ class F16PlayerDbSchemaAndMigrationsTests(unittest.TestCase):
             result = player_local_db.ensure_playerdb_schema(path=db_path)
 
             self.assertTrue(os.path.isfile(db_path))
-            self.assertEqual(int(result.get("schema_version") or 0), 4)
-            self.assertEqual(int(result.get("migrations_count") or 0), 4)
+            self.assertEqual(int(result.get("schema_version") or 0), 9)
+            self.assertEqual(int(result.get("migrations_count") or 0), 9)
 
             conn = sqlite3.connect(db_path)
             try:
                 user_version = int(conn.execute("PRAGMA user_version;").fetchone()[0])
-                self.assertEqual(user_version, 4)
+                self.assertEqual(user_version, 9)
 
                 tables = {
                     str(row[0])
@@ -47,6 +47,8 @@ class F16PlayerDbSchemaAndMigrationsTests(unittest.TestCase):
                     "trade_history",
                     "cashin_history",
                     "visited_nav_beacons",
+                    "journal_locations",
+                    "journal_import_progress",
                 }
                 self.assertTrue(expected.issubset(tables))
 
@@ -130,14 +132,14 @@ class F16PlayerDbSchemaAndMigrationsTests(unittest.TestCase):
             first = player_local_db.ensure_playerdb_schema(path=db_path)
             second = player_local_db.ensure_playerdb_schema(path=db_path)
 
-            self.assertEqual(int(first.get("schema_version") or 0), 4)
-            self.assertEqual(int(second.get("schema_version") or 0), 4)
-            self.assertEqual(int(second.get("migrations_count") or 0), 4)
+            self.assertEqual(int(first.get("schema_version") or 0), 9)
+            self.assertEqual(int(second.get("schema_version") or 0), 9)
+            self.assertEqual(int(second.get("migrations_count") or 0), 9)
 
             conn = sqlite3.connect(db_path)
             try:
                 row = conn.execute("SELECT COUNT(*) FROM schema_migrations;").fetchone()
-                self.assertEqual(int(row[0]), 4)
+                self.assertEqual(int(row[0]), 9)
             finally:
                 conn.close()
 
@@ -18,7 +18,7 @@ class F51RouteManagerWorkerLifecycleContractTests(unittest.TestCase):
         return bool(predicate())
 
     def test_start_route_thread_rejects_second_start_while_busy(self) -> None:
-        manager = RouteManager(route_job_timeout_s=2.0)
+        manager = RouteManager(route_job_timeout_s=2.0, max_parallel_jobs=1)
         gate = threading.Event()
         started = threading.Event()
 
@@ -26,13 +26,14 @@ class F51RouteManagerWorkerLifecycleContractTests(unittest.TestCase):
             started.set()
             gate.wait(1.0)
 
-        self.assertTrue(manager.start_route_thread("trade", _slow_job))
+        self.assertTrue(manager.start_route_thread("neutron", _slow_job))
         self.assertTrue(started.wait(0.3))
         self.assertTrue(manager.is_busy())
-        self.assertEqual(str(manager.current_mode() or ""), "trade")
+        self.assertEqual(str(manager.current_mode() or ""), "neutron")
 
-        self.assertFalse(manager.start_route_thread("neutron", lambda: None))
-        self.assertEqual(str(manager.current_mode() or ""), "trade")
+        self.assertFalse(manager.can_start("trade"))
+        self.assertFalse(manager.start_route_thread("trade", lambda: None))
+        self.assertEqual(str(manager.current_mode() or ""), "neutron")
 
         gate.set()
         self.assertTrue(self._wait_until(lambda: not manager.is_busy(), timeout=1.0))
@@ -1,9 +1,14 @@
 from __future__ import annotations
 
+import os
+import tempfile
 import unittest
+from types import SimpleNamespace
 from unittest.mock import patch
 
 from gui import app as gui_app
+from gui.tabs.logbook import LogbookTab
+from logic.logbook_feed_cache import LogbookFeedCacheWriter, load_logbook_feed_cache
 
 
 class _FakeRootTimers:
@@ -80,6 +85,30 @@ class F52GuiAfterTimerLifecycleContractTests(unittest.TestCase):
         self.assertIsNone(fake._debug_panel_after_id)
         self.assertIsNone(fake._queue_check_after_id)
 
+    def test_main_close_flushes_pending_logbook_feed_cache(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_path = os.path.join(tmp, "logbook_feed_cache.jsonl")
+            writer = LogbookFeedCacheWriter(path=cache_path)
+            tab = SimpleNamespace(_logbook_feed_cache_writer=writer, flush_timeouts=[])
+
+            def _flush(timeout=None):
+                tab.flush_timeouts.append(timeout)
+                return LogbookTab.flush_feed_cache(tab, timeout)
+
+            tab.flush_feed_cache = _flush
+            writer.submit({"event_name": "FSDJump", "system": "F52_SYS"})
+
+            fake = type("FakeApp", (), {})()
+            fake.root = _FakeRootTimers()
+            fake.tab_journal = tab
+            fake._cancel_debug_panel_update = lambda: None
+            fake._cancel_queue_check = lambda: None
+            with patch("gui.app.save_window_geometry"):
+                gui_app.RenataApp._on_main_close(fake)
+
+            self.assertEqual(tab.flush_timeouts, [gui_app._STATE_FLUSH_ON_CLOSE_TIMEOUT_SEC])
+            self.assertEqual([row["system"] for row in load_logbook_feed_cache(path=cache_path)], ["F52_SYS"])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import tempfile
+import unittest
+
+from logic.cash_in_offline_index_builder import (
+    _DumpRecordSplitter,
+    build_offline_index_from_spansh_dump,
+)
+
+
+def _system(idx: int, services: list[str] | None) -> dict:
+    stations = []
+    if services is not None:
+        stations.append(
+            {
+                "name": f"F63 Station {idx}",
+                "type": "Coriolis Starport",
+                "services": list(services),
+                "distanceToArrival": 100 + idx,
+                "updateTime": "2026-02-20 15:00:00+00",
+            }
+        )
+    return {
+        "name": f"F63 System {idx}",
+        "coords": {"x": float(idx), "y": 1.0, "z": -2.0},
+        "date": f"2026-02-{10 + (idx % 9):02d} 10:00:00+00",
+        "stations": stations,
+    }
+
+
+class F63CashInOfflineIndexParallelConverterTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self._tmp.name, name)
+
+    def _write_line_dump(self, name: str, systems: list[dict]) -> str:
+        # Format dumpa Spansh: jeden system na linie.
+        path = self._path(name)
+        with gzip.open(path, "wt", encoding="utf-8") as handle:
+            handle.write("[\n")
+            for idx, item in enumerate(systems):
+                handle.write(json.dumps(item, ensure_ascii=False))
+                handle.write(",\n" if idx < len(systems) - 1 else "\n")
+            handle.write("]\n")
+        return path
+
+    def _write_compact_dump(self, name: str, systems: list[dict]) -> str:
+        path = self._path(name)
+        with gzip.open(path, "wt", encoding="utf-8") as handle:
+            json.dump(systems, handle, ensure_ascii=False)
+        return path
+
+    @staticmethod
+    def _systems() -> list[dict]:
+        rows = []
+        for idx in range(300):
+            if idx % 10 == 0:
+                rows.append(_system(idx, ["Dock", "Universal Cartographics"]))
+            elif idx % 25 == 1:
+                rows.append(_system(idx, ["Dock", "Vista Genomics"]))
+            elif idx % 3 == 0:
+                rows.append(_system(idx, ["Dock", "Repair"]))
+            else:
+                rows.append(_system(idx, None))
+        return rows
+
+    @staticmethod
+    def _load_index(path: str) -> dict:
+        with open(path, "r", encoding="utf-8") as handle:
+            payload = json.load(handle)
+        meta = dict(payload.get("meta") or {})
+        meta.pop("built_at", None)
+        meta.pop("output_path", None)
+        meta.pop("build_id", None)
+        payload["meta"] = meta
+        return payload
+
+    def test_line_and_compact_dumps_produce_identical_index(self) -> None:
+        systems = self._systems()
+        line_dump = self._write_line_dump("line.json.gz", systems)
+        compact_dump = self._write_compact_dump("compact.json.gz", systems)
+
+        line_result = build_offline_index_from_spansh_dump(line_dump, self._path("a.json"), workers=1)
+        compact_result = build_offline_index_from_spansh_dump(compact_dump, self._path("b.json"), workers=1)
+
+        self.assertEqual(int(line_result.get("stations_written") or 0), 42)
+        self.assertEqual(int(line_result.get("systems_processed") or 0), 300)
+        self.assertEqual(str(line_result.get("index_date") or ""), "2026-02-18")
+        line_index = self._load_index(self._path("a.json"))
+        compact_index = self._load_index(self._path("b.json"))
+        line_index["meta"].pop("dump_path", None)
+        compact_index["meta"].pop("dump_path", None)
+        self.assertEqual(line_index, compact_index)
+        self.assertEqual(line_result.get("stations_written"), compact_result.get("stations_written"))
+
+    def test_process_pool_output_matches_in_process_output(self) -> None:
+        dump = self._write_line_dump("pool.json.gz", self._systems())
+
+        from logic import cash_in_offline_index_builder as builder
+
+        original_batch_bytes = builder._BATCH_TARGET_BYTES
+        builder._BATCH_TARGET_BYTES = 512
+        try:
+            serial = build_offline_index_from_spansh_dump(dump, self._path("serial.json"), workers=1)
+            pooled = build_offline_index_from_spansh_dump(dump, self._path("pooled.json"), workers=2)
+        finally:
+            builder._BATCH_TARGET_BYTES = original_batch_bytes
+
+        self.assertEqual(int(pooled.get("workers") or 0), 2)
+        serial_index = self._load_index(self._path("serial.json"))
+        pooled_index = self._load_index(self._path("pooled.json"))
+        self.assertEqual(serial_index, pooled_index)
+        self.assertEqual(
+            [row.get("name") for row in pooled_index.get("stations") or []],
+            [f"F63 Station {idx}" for idx in range(300) if idx % 10 == 0 or idx % 25 == 1],
+        )
+
+    def test_prescan_skips_systems_without_uc_or_vista_and_reports_throughput(self) -> None:
+        dump = self._write_line_dump("prescan.json.gz", self._systems())
+        progress: list[tuple[float, str]] = []
+
+        result = build_offline_index_from_spansh_dump(
+            dump,
+            self._path("prescan.json"),
+            progress_callback=lambda p, s: progress.append((float(p), str(s))),
+            workers=1,
+        )
+
+        self.assertEqual(int(result.get("systems_skipped_prescan") or 0), 258)
+        self.assertGreater(float(result.get("throughput_mb_s") or 0.0), 0.0)
+        self.assertGreater(float(result.get("systems_per_sec") or 0.0), 0.0)
+        self.assertTrue(any("MB/s" in message and "sys/s" in message for _, message in progress))
+        self.assertGreaterEqual(progress[-1][0], 99.0)
+
+    def test_truncated_dump_raises_value_error(self) -> None:
+        path = self._path("truncated.json.gz")
+        with gzip.open(path, "wt", encoding="utf-8") as handle:
+            handle.write('[{"name":"F63 Broken","stations":[{"name":"X","services":["Vista Genomics"]')
+        with self.assertRaises(ValueError):
+            build_offline_index_from_spansh_dump(path, self._path("broken.json"), workers=1)
+
+    def test_splitter_handles_braces_in_strings_and_byte_by_byte_feed(self) -> None:
+        items = [
+            {"name": 'Brace } "quoted" \\ {', "stations": []},
+            {"name": "Nested", "stations": [{"name": "[x]", "services": {"a": [1, {"b": "}"}]}}]},
+        ]
+        raw = json.dumps(items, ensure_ascii=False).encode("utf-8")
+
+        splitter = _DumpRecordSplitter()
+        records: list[bytes] = []
+        for idx in range(len(raw)):
+            records.extend(splitter.feed(raw[idx:idx + 1]))
+        records.extend(splitter.finish())
+
+        self.assertTrue(splitter.finished)
+        self.assertEqual([json.loads(item) for item in records], items)
+
+
+if __name__ == "__main__":
+    unittest.main()
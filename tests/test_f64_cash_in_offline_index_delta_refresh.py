@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import unittest
+
+from logic.cash_in_offline_index_builder import (
+    apply_offline_index_delta_from_spansh_dump,
+    build_offline_index_from_spansh_dump,
+    compact_offline_index_delta,
+    merge_offline_index_delta,
+    offline_index_delta_path,
+)
+from logic.cash_in_station_candidates import (
+    _reset_offline_index_cache_for_tests,
+    station_candidates_from_offline_index,
+)
+
+
+def _station(name: str, services: list[str], distance: float) -> dict:
+    return {
+        "name": name,
+        "type": "Coriolis Starport",
+        "services": list(services),
+        "distanceToArrival": distance,
+    }
+
+
+def _system(name: str, x: float, date: str, stations: list[dict]) -> dict:
+    return {
+        "name": name,
+        "coords": {"x": x, "y": 0.0, "z": 0.0},
+        "date": date,
+        "stations": stations,
+    }
+
+
+class F64CashInOfflineIndexDeltaRefreshTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.index_path = os.path.join(self._tmp.name, "offline_station_index.json")
+        _reset_offline_index_cache_for_tests()
+
+    def tearDown(self) -> None:
+        _reset_offline_index_cache_for_tests()
+        self._tmp.cleanup()
+
+    def _write_dump(self, name: str, systems: list[dict]) -> str:
+        path = os.path.join(self._tmp.name, name)
+        with gzip.open(path, "wt", encoding="utf-8") as handle:
+            handle.write("[\n")
+            handle.write(",\n".join(json.dumps(item) for item in systems))
+            handle.write("\n]\n")
+        return path
+
+    def _build_base(self) -> None:
+        dump = self._write_dump(
+            "full.json.gz",
+            [
+                _system(
+                    "F64 Alpha",
+                    10.0,
+                    "2026-02-01 10:00:00+00",
+                    [
+                        _station("Alpha One", ["Universal Cartographics"], 100),
+                        _station("Alpha Two", ["Universal Cartographics"], 200),
+                    ],
+                ),
+                _system("F64 Beta", 20.0, "2026-02-02 10:00:00+00", [_station("Beta Vista", ["Vista Genomics"], 50)]),
+                _system("F64 Gamma", 30.0, "2026-02-03 10:00:00+00", []),
+            ],
+        )
+        build_offline_index_from_spansh_dump(dump, self.index_path, workers=1)
+
+    def _file_digest(self, path: str) -> str:
+        with open(path, "rb") as handle:
+            return hashlib.sha256(handle.read()).hexdigest()
+
+    def _candidate_names(self) -> set[str]:
+        candidates, meta = station_candidates_from_offline_index(
+            "F64 Origin",
+            service="uc",
+            origin_coords=[0.0, 0.0, 0.0],
+            index_path=self.index_path,
+            limit=50,
+            non_carrier_only=True,
+        )
+        self.assertEqual(meta.get("lookup_status"), "offline_index")
+        return {str(item.get("name")) for item in candidates}
+
+    def test_delta_upserts_and_tombstones_without_rewriting_base(self) -> None:
+        self._build_base()
+        base_digest = self._file_digest(self.index_path)
+        self.assertEqual(self._candidate_names(), {"Alpha One", "Alpha Two"})
+
+        delta_dump = self._write_dump(
+            "delta.json.gz",
+            [
+                _system("F64 Alpha", 10.0, "2026-02-10 10:00:00+00", [_station("Alpha One", ["Universal Cartographics"], 120)]),
+                _system("F64 Beta", 20.0, "2026-02-02 10:00:00+00", [_station("Beta Vista", ["Vista Genomics"], 50)]),
+                _system("F64 Gamma", 30.0, "2026-02-11 10:00:00+00", []),
+                _system("F64 Delta", 40.0, "2026-02-12 10:00:00+00", [_station("Delta Port", ["Universal Cartographics"], 10)]),
+            ],
+        )
+        result = apply_offline_index_delta_from_spansh_dump(delta_dump, self.index_path, workers=1)
+
+        self.assertEqual(self._file_digest(self.index_path), base_digest)
+        self.assertTrue(os.path.isfile(offline_index_delta_path(self.index_path)))
+        self.assertEqual(int(result.get("generation") or 0), 1)
+        self.assertEqual(int(result.get("systems_processed") or 0), 4)
+        self.assertEqual(int(result.get("systems_updated") or 0), 2)
+        self.assertEqual(int(result.get("systems_unchanged") or 0), 1)
+        self.assertEqual(int(result.get("stations_upserted") or 0), 2)
+        self.assertEqual(int(result.get("stations_tombstoned") or 0), 1)
+        self.assertEqual(str(result.get("index_date") or ""), "2026-02-12")
+
+        self.assertEqual(self._candidate_names(), {"Alpha One", "Delta Port"})
+        candidates, meta = station_candidates_from_offline_index(
+            "F64 Origin",
+            service="uc",
+            origin_coords=[0.0, 0.0, 0.0],
+            index_path=self.index_path,
+        )
+        self.assertEqual(meta.get("index_date"), "2026-02-12")
+        alpha = next(item for item in candidates if item.get("name") == "Alpha One")
+        self.assertAlmostEqual(float(alpha.get("distance_ls") or 0.0), 120.0)
+
+    def test_second_delta_bumps_generation_and_keeps_previous_changes(self) -> None:
+        self._build_base()
+        first = self._write_dump(
+            "delta1.json.gz",
+            [_system("F64 Delta", 40.0, "2026-02-12 10:00:00+00", [_station("Delta Port", ["Universal Cartographics"], 10)])],
+        )
+        second = self._write_dump(
+            "delta2.json.gz",
+            [_system("F64 Alpha", 10.0, "2026-02-13 10:00:00+00", [])],
+        )
+        apply_offline_index_delta_from_spansh_dump(first, self.index_path, workers=1)
+        result = apply_offline_index_delta_from_spansh_dump(second, self.index_path, workers=1)
+
+        self.assertEqual(int(result.get("generation") or 0), 2)
+        self.assertEqual(int(result.get("stations_tombstoned") or 0), 2)
+        self.assertEqual(self._candidate_names(), {"Delta Port"})
+
+    def test_full_rebuild_discards_delta_and_stale_delta_is_ignored(self) -> None:
+        self._build_base()
+        with open(self.index_path, "r", encoding="utf-8") as handle:
+            old_base = json.load(handle)
+        delta_dump = self._write_dump(
+            "delta.json.gz",
+            [_system("F64 Alpha", 10.0, "2026-02-13 10:00:00+00", [])],
+        )
+        apply_offline_index_delta_from_spansh_dump(delta_dump, self.index_path, workers=1)
+        with open(offline_index_delta_path(self.index_path), "r", encoding="utf-8") as handle:
+            delta_payload = json.load(handle)
+
+        self._build_base()
+        self.assertFalse(os.path.isfile(offline_index_delta_path(self.index_path)))
+        with open(self.index_path, "r", encoding="utf-8") as handle:
+            new_base = json.load(handle)
+
+        self.assertEqual(len(merge_offline_index_delta(old_base, delta_payload)["stations"]), 1)
+        self.assertIs(merge_offline_index_delta(new_base, delta_payload), new_base)
+
+    def test_compaction_folds_delta_into_new_base_generation(self) -> None:
+        self._build_base()
+        with open(self.index_path, "r", encoding="utf-8") as handle:
+            old_build_id = json.load(handle)["meta"]["build_id"]
+        first = self._write_dump(
+            "delta1.json.gz",
+            [_system("F64 Delta", 40.0, "2026-02-12 10:00:00+00", [_station("Delta Port", ["Universal Cartographics"], 10)])],
+        )
+        second = self._write_dump(
+            "delta2.json.gz",
+            [_system("F64 Alpha", 10.0, "2026-02-13 10:00:00+00", [])],
+        )
+        self.assertFalse(apply_offline_index_delta_from_spansh_dump(first, self.index_path, workers=1)["compacted"])
+        result = apply_offline_index_delta_from_spansh_dump(second, self.index_path, workers=1, compact=True)
+
+        self.assertTrue(result["compacted"])
+        self.assertFalse(os.path.isfile(offline_index_delta_path(self.index_path)))
+        self.assertEqual([name for name in os.listdir(self._tmp.name) if name.endswith(".tmp")], [])
+        with open(self.index_path, "r", encoding="utf-8") as handle:
+            meta = json.load(handle)["meta"]
+        self.assertNotEqual(meta["build_id"], old_build_id)
+        self.assertEqual(meta["compacted_delta_generation"], 2)
+        self.assertEqual(meta["index_date"], "2026-02-13")
+        self.assertEqual(self._candidate_names(), {"Delta Port"})
+        self.assertFalse(compact_offline_index_delta(self.index_path)["compacted"])
+
+    def test_delta_requires_existing_index(self) -> None:
+        delta_dump = self._write_dump("delta.json.gz", [])
+        with self.assertRaises(FileNotFoundError):
+            apply_offline_index_delta_from_spansh_dump(delta_dump, self.index_path, workers=1)
+
+
+if __name__ == "__main__":
+    unittest.main()
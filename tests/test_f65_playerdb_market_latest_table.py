@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from logic import player_local_db
+from logic.personal_map_data_provider import MapDataProvider
+
+
+def _market(station: str, market_id: int | None, ts: str, gold_sell: int, *, silver: bool = True) -> dict:
+    items = [{"Name_Localised": "Gold", "BuyPrice": gold_sell - 3000, "SellPrice": gold_sell, "Stock": 50, "Demand": 10}]
+    if silver:
+        items.append({"Name_Localised": "Silver", "BuyPrice": 4000, "SellPrice": 7000, "Stock": 80, "Demand": 5})
+    payload = {"StationName": station, "StarSystem": "F65_SYS", "timestamp": ts, "Items": items}
+    if market_id is not None:
+        payload["MarketID"] = market_id
+    return payload
+
+
+class F65PlayerDbMarketLatestTableTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self._tmp.name, "db", "player_local.db")
+        self.provider = MapDataProvider(db_path=self.db_path)
+
+    def tearDown(self) -> None:
+        with player_local_db._PLAYERDB_SCHEMA_ENSURED_LOCK:
+            player_local_db._PLAYERDB_SCHEMA_ENSURED_PATHS.discard(
+                player_local_db._playerdb_schema_cache_key(self.db_path)
+            )
+        self._tmp.cleanup()
+
+    def _ingest(self, payload: dict, **kwargs) -> dict:
+        return player_local_db.ingest_market_json(payload, path=self.db_path, **kwargs)
+
+    def _latest_rows(self) -> list[sqlite3.Row]:
+        with player_local_db.playerdb_connection(path=self.db_path) as conn:
+            return conn.execute(
+                "SELECT station_key, commodity, sell_price, snapshot_id, freshness_ts FROM market_latest ORDER BY station_key, commodity;"
+            ).fetchall()
+
+    def test_latest_table_tracks_newest_snapshot_per_station(self) -> None:
+        self._ingest(_market("Alpha", 65001, "2026-02-20T10:00:00Z", 12000))
+        second = self._ingest(_market("Alpha", 65001, "2026-02-21T10:00:00Z", 9000, silver=False))
+        self._ingest(_market("Beta", None, "2026-02-21T11:00:00Z", 10000))
+
+        self.assertEqual(int(second.get("market_latest_rows") or 0), 1)
+        rows = self._latest_rows()
+        self.assertEqual(
+            [(r["station_key"], r["commodity"], r["sell_price"]) for r in rows],
+            [("mid:65001", "Gold", 9000), ("name:f65_sys::beta", "Gold", 10000), ("name:f65_sys::beta", "Silver", 7000)],
+        )
+
+        top_sell, meta = self.provider.get_top_prices("gold", "sell", limit=5)
+        self.assertEqual(int(meta.get("count") or 0), 2)
+        self.assertEqual([r["station_name"] for r in top_sell], ["Beta", "Alpha"])
+        self.assertEqual(int(top_sell[1]["snapshot_id"]), int(second["snapshot_id"]))
+
+        top_silver, _ = self.provider.get_top_prices("Silver", "buy", limit=5)
+        self.assertEqual([r["station_name"] for r in top_silver], ["Beta"])
+
+        scoped, _ = self.provider.get_top_prices("Gold", "buy", station_market_id=65001, limit=5)
+        self.assertEqual([(r["station_name"], r["price"]) for r in scoped], [("Alpha", 6000)])
+
+    def test_dedupe_refreshes_freshness_and_stale_payload_does_not_regress(self) -> None:
+        first = self._ingest(_market("Alpha", 65001, "2026-02-20T10:00:00Z", 12000))
+        self._ingest(_market("Alpha", 65001, "2026-02-22T10:00:00Z", 9000))
+        again = self._ingest(_market("Alpha", 65001, "2026-02-23T10:00:00Z", 12000))
+        self.assertTrue(bool(again.get("deduped")))
+
+        rows = self._latest_rows()
+        self.assertTrue(all(int(r["snapshot_id"]) == int(first["snapshot_id"]) for r in rows))
+        self.assertTrue(all(r["freshness_ts"] == "2026-02-23T10:00:00Z" for r in rows))
+
+        self._ingest(_market("Alpha", 65001, "2026-02-01T10:00:00Z", 5000))
+        top_sell, _ = self.provider.get_top_prices("Gold", "sell", limit=5)
+        self.assertEqual(int(top_sell[0]["price"]), 12000)
+
+    def test_retention_prunes_history_but_keeps_latest_snapshot(self) -> None:
+        for idx in range(5):
+            self._ingest(
+                _market("Alpha", 65001, f"2026-02-2{idx}T10:00:00Z", 10000 + idx),
+                snapshot_retention=2,
+            )
+        result = self._ingest(_market("Alpha", 65001, "2026-02-26T10:00:00Z", 20000), snapshot_retention=2)
+        self.assertEqual(int(result.get("snapshots_pruned") or 0), 1)
+
+        with player_local_db.playerdb_connection(path=self.db_path) as conn:
+            snapshots = conn.execute("SELECT COUNT(*) FROM market_snapshots;").fetchone()[0]
+            orphans = conn.execute(
+                "SELECT COUNT(*) FROM market_snapshot_items WHERE snapshot_id NOT IN (SELECT id FROM market_snapshots);"
+            ).fetchone()[0]
+        self.assertEqual(int(snapshots), 2)
+        self.assertEqual(int(orphans), 0)
+        top_sell, _ = self.provider.get_top_prices("Gold", "sell", limit=5)
+        self.assertEqual(int(top_sell[0]["price"]), 20000)
+
+    def test_v5_migration_backfills_and_top_k_uses_covering_index(self) -> None:
+        self._ingest(_market("Alpha", 65001, "2026-02-20T10:00:00Z", 12000))
+        self._ingest(_market("Alpha", 65001, "2026-02-21T10:00:00Z", 11000))
+        with player_local_db.playerdb_connection(path=self.db_path) as conn:
+            conn.execute("DELETE FROM market_latest;")
+            conn.execute("DELETE FROM schema_migrations WHERE version = 5;")
+            conn.execute("PRAGMA user_version = 4;")
+            conn.commit()
+
+        result = player_local_db.ensure_playerdb_schema(path=self.db_path)
+        self.assertEqual(int(result.get("schema_version") or 0), player_local_db.PLAYERDB_SCHEMA_VERSION)
+        rows = self._latest_rows()
+        self.assertEqual([(r["commodity"], r["sell_price"]) for r in rows], [("Gold", 11000), ("Silver", 7000)])
+
+        with player_local_db.playerdb_connection(path=self.db_path) as conn:
+            plan = " ".join(
+                str(r["detail"])
+                for r in conn.execute(
+                    """
+                    EXPLAIN QUERY PLAN
+                    SELECT station_key FROM market_latest
+                    WHERE commodity = ? COLLATE NOCASE AND sell_price IS NOT NULL
+                    ORDER BY sell_price DESC LIMIT 5;
+                    """,
+                    ("Gold",),
+                ).fetchall()
+            )
+        self.assertIn("idx_market_latest_best_sell", plan)
+
+
+if __name__ == "__main__":
+    unittest.main()
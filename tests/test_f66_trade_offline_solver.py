@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from logic import player_local_db
+from logic import trade
+from logic.spansh_client import spansh_error
+from logic.trade_offline_solver import OFFLINE_TRADE_SOURCE_STATUS, solve_trade_route_offline
+from logic.utils.cancellation import current_cancel_token
+
+
+class F66TradeOfflineSolverTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self._tmp.name, "db", "player_local.db")
+        self._market_id = 66000
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def _station(self, system: str, x: float, station: str, items: list[dict], *, station_type: str = "Coriolis") -> None:
+        self._market_id += 1
+        player_local_db.ingest_journal_event(
+            {
+                "event": "Docked",
+                "timestamp": "2026-02-20T10:00:00Z",
+                "StarSystem": system,
+                "StarPos": [x, 0.0, 0.0],
+                "StationName": station,
+                "StationType": station_type,
+                "MarketID": self._market_id,
+                "DistFromStarLS": 100.0,
+            },
+            path=self.db_path,
+        )
+        player_local_db.ingest_journal_event(
+            {"event": "FSDJump", "timestamp": "2026-02-20T10:00:00Z", "StarSystem": system, "StarPos": [x, 0.0, 0.0]},
+            path=self.db_path,
+        )
+        player_local_db.ingest_market_json(
+            {
+                "StationName": station,
+                "StarSystem": system,
+                "MarketID": self._market_id,
+                "timestamp": "2026-02-20T12:00:00Z",
+                "Items": items,
+            },
+            path=self.db_path,
+        )
+
+    def _seed_loop(self) -> None:
+        self._station(
+            "F66_A",
+            0.0,
+            "Alpha",
+            [
+                {"Name_Localised": "Gold", "BuyPrice": 9000, "SellPrice": 8800, "Stock": 500},
+                {"Name_Localised": "Silver", "BuyPrice": 0, "SellPrice": 3000, "Stock": 0},
+            ],
+        )
+        self._station(
+            "F66_B",
+            10.0,
+            "Beta",
+            [
+                {"Name_Localised": "Gold", "BuyPrice": 0, "SellPrice": 12000, "Stock": 0},
+                {"Name_Localised": "Silver", "BuyPrice": 4000, "SellPrice": 3900, "Stock": 500},
+            ],
+        )
+        self._station(
+            "F66_C",
+            18.0,
+            "Gamma",
+            [{"Name_Localised": "Silver", "BuyPrice": 0, "SellPrice": 9000, "Stock": 0}],
+        )
+        self._station(
+            "F66_FAR",
+            200.0,
+            "Far",
+            [{"Name_Localised": "Gold", "BuyPrice": 0, "SellPrice": 90000, "Stock": 0}],
+        )
+
+    def _solve(self, **overrides) -> tuple[list[str], list[dict]]:
+        params = {
+            "start_system": "F66_A",
+            "start_station": "Alpha",
+            "capital": 10_000_000,
+            "max_hop": 15.0,
+            "cargo": 100,
+            "max_hops": 2,
+            "max_dta": 1000,
+            "max_age": None,
+            "flags": {},
+        }
+        params.update(overrides)
+        return solve_trade_route_offline(db_path=self.db_path, **params)
+
+    def test_multi_hop_route_uses_normalized_trade_row_format(self) -> None:
+        self._seed_loop()
+        route, rows = self._solve()
+
+        self.assertEqual(route, ["F66_A", "F66_B", "F66_B", "F66_C"])
+        self.assertEqual([(r["from_station"], r["to_station"], r["commodity"]) for r in rows], [
+            ("Alpha", "Beta", "Gold"),
+            ("Beta", "Gamma", "Silver"),
+        ])
+        self.assertEqual(rows[0]["total_profit"], 300_000)
+        self.assertEqual(rows[1]["profit_per_ton"], 5000)
+        self.assertEqual(rows[1]["cumulative_profit"], 800_000)
+        self.assertAlmostEqual(float(rows[1]["distance_ly"]), 8.0)
+        self.assertEqual(rows[0]["source_status"], OFFLINE_TRADE_SOURCE_STATUS)
+        self.assertIn("updated_buy_ago", rows[0])
+
+    def test_capital_hop_distance_and_pad_constraints(self) -> None:
+        self._seed_loop()
+        _route, rows = self._solve(capital=90_000, max_hops=1)
+        self.assertEqual(rows[0]["amount"], 10)
+        self.assertEqual(rows[0]["total_profit"], 30_000)
+
+        _route, rows = self._solve(max_hop=5.0)
+        self.assertEqual(rows, [])
+
+        self._station(
+            "F66_A",
+            0.0,
+            "Alpha Outpost",
+            [{"Name_Localised": "Gold", "BuyPrice": 1000, "SellPrice": 900, "Stock": 500}],
+            station_type="Outpost",
+        )
+        _route, rows = self._solve(start_station="Alpha Outpost", max_hops=1)
+        self.assertEqual(rows[0]["total_profit"], 1_100_000)
+        _route, rows = self._solve(start_station="Alpha Outpost", max_hops=1, flags={"large_pad": True})
+        self.assertEqual(rows, [])
+
+    def test_solver_stays_fast_on_hundreds_of_markets(self) -> None:
+        commodities = [f"Good{idx}" for idx in range(25)]
+        for idx in range(120):
+            items = [
+                {
+                    "Name_Localised": name,
+                    "BuyPrice": 1000 + ((idx * 37 + c_idx * 11) % 900),
+                    "SellPrice": 1200 + ((idx * 53 + c_idx * 7) % 900),
+                    "Stock": 100,
+                }
+                for c_idx, name in enumerate(commodities)
+            ]
+            self._station(f"F66_GRID_{idx}", float(idx % 12) * 5.0, f"Port {idx}", items)
+
+        started = time.perf_counter()
+        _route, rows = self._solve(start_system="F66_GRID_0", start_station="Port 0", max_hops=5, max_hop=20.0)
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(len(rows), 5)
+        self.assertTrue(all(int(r["total_profit"] or 0) > 0 for r in rows))
+        self.assertLess(elapsed, 2.0)
+
+    def test_fallback_mode_uses_local_solver_when_spansh_returns_nothing(self) -> None:
+        local_rows = [{"from_system": "F66_A", "to_system": "F66_B"}]
+        with (
+            patch("logic.trade._spansh_trade_route", return_value=([], [])),
+            patch("logic.trade.solve_trade_route_offline", return_value=(["F66_A", "F66_B"], local_rows)),
+            patch("logic.trade.powiedz"),
+            patch("logic.trade.config.get", side_effect=lambda key, default=None: "fallback" if key == "features.trade.offline_solver_mode" else default),
+        ):
+            route, rows = trade.oblicz_trade("F66_A", "Alpha", 1000, 15.0, 10, 2, 1000, None, {})
+        self.assertEqual(route, ["F66_A", "F66_B"])
+        self.assertEqual(rows, local_rows)
+
+    def test_race_mode_returns_first_non_empty_result(self) -> None:
+        release = threading.Event()
+
+        def _slow_spansh(*_args, **_kwargs):
+            release.wait(5.0)
+            return ["SPANSH"], [{"from_system": "SPANSH"}]
+
+        try:
+            with (
+                patch("logic.trade._spansh_trade_route", side_effect=_slow_spansh),
+                patch("logic.trade.solve_trade_route_offline", return_value=(["LOCAL"], [{"from_system": "LOCAL"}])),
+                patch("logic.trade.powiedz"),
+                patch("logic.trade.config.get", side_effect=lambda key, default=None: "race" if key == "features.trade.offline_solver_mode" else default),
+            ):
+                route, rows = trade.oblicz_trade("F66_A", "Alpha", 1000, 15.0, 10, 2, 1000, None, {})
+        finally:
+            release.set()
+        self.assertEqual(route, ["LOCAL"])
+
+        winner, route, _rows = trade._race_trade_solvers(
+            lambda: (["SPANSH"], [{"from_system": "SPANSH"}]),
+            lambda: ([], []),
+        )
+        self.assertEqual((winner, route), ("spansh", ["SPANSH"]))
+
+    def test_race_cancels_losing_spansh_and_keeps_its_errors_quiet(self) -> None:
+        finished = threading.Event()
+        seen: dict[str, object] = {}
+
+        def _polling_spansh():
+            token = current_cancel_token()
+            seen["cancelled"] = token.wait(5.0)
+            seen["reason"] = token.reason
+            spansh_error("TRADE: SPANSH timeout", None, context="trade")
+            finished.set()
+            raise RuntimeError("spansh polling aborted")
+
+        with (
+            patch("logic.spansh_client.powiedz") as spoken,
+            patch("logic.trade.log_event_throttled") as logged,
+        ):
+            winner, route, _rows = trade._race_trade_solvers(
+                _polling_spansh,
+                lambda: (["LOCAL"], [{"from_system": "LOCAL"}]),
+            )
+            self.assertTrue(finished.wait(2.0))
+            time.sleep(0.05)
+        self.assertEqual((winner, route), ("local", ["LOCAL"]))
+        self.assertEqual(seen, {"cancelled": True, "reason": "trade_race_lost"})
+        spoken.assert_not_called()
+        self.assertEqual(logged.call_args.args[0], "trade.race.spansh_error")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,294 @@
+from __future__ import annotations
+
+import queue
+import threading
+import unittest
+from collections import deque
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import main
+from app.main_loop import DeferredGuiRef
+from gui.app import RenataApp
+from logic import utils
+from logic.events import exploration_dss_events, exploration_high_value_events
+
+try:
+    import tkinter as tk
+
+    from gui.lazy_tab import LazyTab
+except Exception:  # pragma: no cover - brak Tk w srodowisku
+    tk = None
+    LazyTab = None
+
+
+class _FakeSpanshTab:
+    def __init__(self) -> None:
+        self.start_labels: list[str] = []
+        self.jump_ranges: list[float] = []
+        self.statuses: list[tuple[str, str]] = []
+        self.tab_neutron = SimpleNamespace(lst_nav="lst_nav", set_status_text=lambda *a: self.statuses.append(a))
+
+    def update_start_label(self, value) -> None:
+        self.start_labels.append(value)
+
+    def update_jump_range(self, value) -> None:
+        self.jump_ranges.append(value)
+
+
+class _FakeJournalTab:
+    def __init__(self) -> None:
+        self.items: list[dict] = []
+
+    def append_logbook_feed_item(self, item) -> None:
+        self.items.append(item)
+
+
+class _FakeLazyApp:
+    _replay_pending_spansh_state = RenataApp._replay_pending_spansh_state
+    _replay_pending_journal_feed = RenataApp._replay_pending_journal_feed
+    _on_lazy_tab_built = RenataApp._on_lazy_tab_built
+    _apply_spansh_tab_message = RenataApp._apply_spansh_tab_message
+    check_queue = RenataApp.check_queue
+
+    def __init__(self) -> None:
+        self.tab_spansh = None
+        self.tab_journal = None
+        self.tab_pulpit = SimpleNamespace(
+            log=lambda _msg: None,
+            update_ship_state=lambda _state: None,
+            set_system_runtime_state=lambda *_a, **_k: None,
+        )
+        self.startup_timings: dict[str, float] = {}
+        self._lazy_tab_attrs = {"spansh": "tab_spansh", "journal": "tab_journal"}
+        self._pending_spansh_start_label = None
+        self._pending_spansh_jump_range = None
+        self._pending_spansh_messages: dict = {}
+        self._pending_journal_feed: deque = deque(maxlen=3)
+
+    def _overlay_update_jump_range(self, _content) -> None:
+        return None
+
+    def _schedule_queue_check(self, _delay_ms: int) -> None:
+        return None
+
+
+class F67GuiLazyTabsAndParallelStartupTests(unittest.TestCase):
+    def test_deferred_gui_ref_behaves_like_missing_gui_until_attached(self) -> None:
+        ref = DeferredGuiRef()
+        self.assertFalse(bool(ref))
+        self.assertFalse(hasattr(ref, "carto_df"))
+
+        app = SimpleNamespace(carto_df=[1], state="ok")
+        ref.attach(app)
+        self.assertTrue(bool(ref))
+        self.assertEqual(ref.carto_df, [1])
+        ref.state = "changed"
+        self.assertEqual(app.state, "changed")
+
+    def test_deferred_gui_ref_replays_calls_queued_before_attach(self) -> None:
+        ref = DeferredGuiRef()
+        seen: list[tuple[str, object]] = []
+
+        def _needs_gui(label: str, gui_ref) -> None:
+            seen.append((label, gui_ref.carto_df))
+
+        self.assertTrue(ref.defer_until_attached(_needs_gui, "first", ref))
+        self.assertTrue(ref.defer_until_attached(_needs_gui, "second", gui_ref=ref))
+        self.assertEqual(seen, [])
+
+        ref.attach(SimpleNamespace(carto_df="df"))
+        self.assertEqual(seen, [("first", "df"), ("second", "df")])
+        self.assertFalse(ref.defer_until_attached(_needs_gui, "late", ref))
+
+    def test_calls_arriving_during_replay_queue_behind_the_backlog(self) -> None:
+        ref = DeferredGuiRef()
+        seen: list[str] = []
+        first_running = threading.Event()
+        release_first = threading.Event()
+
+        def _call(label: str) -> None:
+            # Handler sam pyta o odroczenie - z watku replay musi isc od razu.
+            if ref.defer_until_attached(_call, label):
+                return
+            if label == "old-1":
+                first_running.set()
+                release_first.wait(2.0)
+            seen.append(label)
+
+        ref.defer_until_attached(_call, "old-1")
+        ref.defer_until_attached(_call, "old-2")
+        attach = threading.Thread(target=ref.attach, args=(SimpleNamespace(),))
+        attach.start()
+        self.assertTrue(first_running.wait(2.0))
+
+        # Zdarzenie MainLoop w trakcie odtwarzania nie wyprzedza starszych wywolan.
+        main_loop = threading.Thread(target=_call, args=("new",))
+        main_loop.start()
+        main_loop.join(2.0)
+        self.assertEqual(seen, [])
+        release_first.set()
+        attach.join(2.0)
+        self.assertEqual(seen, ["old-1", "old-2", "new"])
+        self.assertFalse(ref.defer_until_attached(_call, "after"))
+
+    def test_high_value_and_dss_checks_wait_for_gui_instead_of_skipping(self) -> None:
+        ref = DeferredGuiRef()
+        carto_reads: list[str] = []
+
+        class _App:
+            @property
+            def carto_df(self):
+                carto_reads.append("read")
+                return None
+
+        ev = {"event": "Scan", "StarSystem": "F67_SYS", "BodyName": "F67_SYS 1", "PlanetClass": "Earthlike body"}
+        with patch("logic.events.exploration_dss_events._is_worth_mapping", return_value=False) as worth:
+            exploration_high_value_events.check_high_value_planet(ev, ref)
+            exploration_dss_events.handle_dss_target_hint(ev, ref)
+            worth.assert_not_called()
+            self.assertEqual(carto_reads, [])
+
+            ref.attach(_App())
+            worth.assert_called_once_with(ev, ref)
+        self.assertTrue(carto_reads)
+
+    def test_main_loop_starts_before_gui_is_built(self) -> None:
+        order: list[str] = []
+        app = SimpleNamespace(startup_timings={"tab.pulpit": 12.5})
+        root = SimpleNamespace(
+            withdraw=lambda: None,
+            after=lambda *_a: None,
+            mainloop=lambda: order.append("mainloop"),
+        )
+        loops: list[object] = []
+
+        class _Thread:
+            def __init__(self, *, target=None, daemon=False) -> None:
+                self.daemon = daemon
+
+            def start(self) -> None:
+                order.append("thread")
+
+        def _loop(gui_ref, _log_dir):
+            loops.append(gui_ref)
+            return SimpleNamespace(run=lambda: None)
+
+        def _build_app(_root):
+            order.append("gui")
+            return app
+
+        with (
+            patch("main.tk.Tk", return_value=root),
+            patch("main.RenataApp", side_effect=_build_app),
+            patch("main.powiedz", side_effect=lambda *_a, **_k: order.append("powiedz")),
+            patch("main.MainLoop", side_effect=_loop),
+            patch("main.threading.Thread", side_effect=_Thread),
+            patch("main.log_event") as log_mock,
+            patch.object(main.config, "get", return_value="C:/tmp/journal"),
+        ):
+            main.run()
+
+        self.assertEqual(order, ["powiedz", "thread", "gui", "mainloop"])
+        self.assertIsInstance(loops[0], DeferredGuiRef)
+        self.assertTrue(bool(loops[0]))
+        self.assertEqual(log_mock.call_args.kwargs.get("tab_pulpit_ms"), 12.5)
+
+    def test_queue_buffers_tab_messages_until_tab_is_materialized(self) -> None:
+        app = _FakeLazyApp()
+        messages = [
+            ("start_label", "F67_SYS"),
+            ("ship_state", {"jump_range_current_ly": 42.0}),
+            ("status_neu", ("F67 busy", "orange")),
+            ("list_nav", ["A", "B"]),
+            ("status_neu", ("F67 ok", "green")),
+        ] + [("logbook_journal_feed", {"idx": idx}) for idx in range(5)]
+        fake_queue: queue.Queue = queue.Queue()
+        for msg in messages:
+            fake_queue.put(msg)
+
+        with (
+            patch.object(utils, "MSG_QUEUE", fake_queue),
+            patch("gui.app.app_state") as state_mock,
+        ):
+            state_mock.has_live_system_event_flag.return_value = True
+            app.check_queue()
+
+        self.assertTrue(fake_queue.empty())
+        self.assertEqual(app._pending_spansh_start_label, "F67_SYS")
+        self.assertEqual(app._pending_spansh_jump_range, 42.0)
+        self.assertEqual([item["idx"] for item in app._pending_journal_feed], [2, 3, 4])
+
+        spansh_tab = _FakeSpanshTab()
+        journal_tab = _FakeJournalTab()
+        listed: list[tuple[str, list[str]]] = []
+        with patch("gui.app.common.wypelnij_liste", side_effect=lambda lst, rows: listed.append((lst, rows))):
+            app._on_lazy_tab_built("spansh", spansh_tab, 15.0)
+        app._on_lazy_tab_built("journal", journal_tab, 30.0)
+
+        self.assertIs(app.tab_spansh, spansh_tab)
+        self.assertEqual(spansh_tab.start_labels, ["F67_SYS"])
+        self.assertEqual(spansh_tab.jump_ranges, [42.0])
+        self.assertEqual([item["idx"] for item in journal_tab.items], [2, 3, 4])
+        self.assertEqual(listed, [("lst_nav", ["A", "B"])])
+        self.assertEqual(spansh_tab.statuses, [("F67 ok", "green")])
+        self.assertEqual(app._pending_spansh_messages, {})
+        self.assertEqual(app.startup_timings, {"tab.spansh": 15.0, "tab.journal": 30.0})
+        self.assertEqual(len(app._pending_journal_feed), 0)
+
+
+@unittest.skipIf(LazyTab is None, "tkinter unavailable")
+class F67LazyTabWidgetTests(unittest.TestCase):
+    def setUp(self) -> None:
+        try:
+            self.root = tk.Tk()
+        except Exception as exc:
+            self.skipTest(f"Tk unavailable: {exc}")
+        self.root.withdraw()
+
+    def tearDown(self) -> None:
+        self.root.destroy()
+
+    def test_materialize_builds_once_and_reports_build_cost(self) -> None:
+        calls: list[tuple[str, float]] = []
+        built: list[object] = []
+
+        def _factory(parent):
+            frame = tk.Frame(parent)
+            built.append(frame)
+            return frame
+
+        tab = LazyTab(
+            self.root,
+            key="demo",
+            factory=_factory,
+            on_built=lambda key, _widget, build_ms: calls.append((key, build_ms)),
+        )
+        self.assertFalse(tab.is_materialized)
+
+        widget = tab.materialize()
+        again = tab.materialize()
+
+        self.assertIs(widget, again)
+        self.assertEqual(len(built), 1)
+        self.assertEqual(widget.winfo_manager(), "pack")
+        self.assertEqual([key for key, _ms in calls], ["demo"])
+        self.assertGreaterEqual(float(tab.build_ms or 0.0), 0.0)
+
+    def test_failed_factory_leaves_placeholder_retryable(self) -> None:
+        attempts = {"n": 0}
+
+        def _factory(parent):
+            attempts["n"] += 1
+            if attempts["n"] == 1:
+                raise RuntimeError("boom")
+            return tk.Frame(parent)
+
+        tab = LazyTab(self.root, key="retry", factory=_factory)
+        self.assertIsNone(tab.materialize())
+        self.assertFalse(tab.is_materialized)
+        self.assertIsNotNone(tab.materialize())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import os
+import random
+import tempfile
+import time
+import unittest
+
+from logic.logbook_feed import build_logbook_summary_snapshot, classify_logbook_event
+from logic.logbook_feed_cache import LogbookFeedCacheWriter, load_logbook_feed_cache
+from logic.logbook_feed_model import (
+    LOGBOOK_FEED_CLASS_ALL,
+    LogbookFeedModel,
+    logbook_feed_item_class,
+    logbook_feed_item_location,
+)
+
+_CLASS_ORDER = ("Nawigacja", "Eksploracja", "Exobio", "Handel", "Stacja", "Incydent", "Combat", "TECH")
+_EVENTS = ("FSDJump", "Docked", "SellExplorationData", "MarketSell", "Interdicted", "UnderAttack", "Touchdown", "Music")
+
+
+def _item(idx: int, rng: random.Random) -> dict:
+    event_name = rng.choice(_EVENTS)
+    row = {
+        "timestamp": f"2026-02-22T20:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}Z",
+        "event_name": event_name,
+        "event_class": classify_logbook_event(event_name),
+        "system_name": rng.choice(["Sol", "Achenar", "Colonia"]),
+        "station_name": rng.choice(["", "Abraham Lincoln", "Jaques"]),
+        "summary": f"event {idx}",
+    }
+    if event_name == "SellExplorationData":
+        row["raw_event"] = {"TotalEarnings": 1000 + idx}
+    return row
+
+
+def _reference_view(rows: list[dict], *, column: str, desc: bool, class_filter: str, show_tech: bool) -> list[dict]:
+    visible = []
+    for row in rows:
+        cls = logbook_feed_item_class(row)
+        if not show_tech and cls == "TECH":
+            continue
+        if class_filter != LOGBOOK_FEED_CLASS_ALL and cls != class_filter:
+            continue
+        visible.append(row)
+
+    def _key(row: dict) -> tuple:
+        ts = str(row.get("timestamp") or "")
+        if column == "time":
+            return (ts, str(row.get("event_name") or ""))
+        if column == "class":
+            cls = logbook_feed_item_class(row)
+            idx = _CLASS_ORDER.index(cls) if cls in _CLASS_ORDER else len(_CLASS_ORDER)
+            return (idx, cls, ts)
+        if column == "event":
+            return (str(row.get("event_name") or "").casefold(), ts)
+        if column == "system":
+            return (str(row.get("system_name") or "").casefold(), ts)
+        if column == "location":
+            return (logbook_feed_item_location(row).casefold(), ts)
+        return (str(row.get("summary") or "").casefold(), ts)
+
+    visible.sort(key=_key, reverse=desc)
+    return visible
+
+
+class F68LogbookIncrementalFeedModelTests(unittest.TestCase):
+    def test_incremental_inserts_match_full_sort_and_summary(self) -> None:
+        rng = random.Random(68)
+        for column in ("time", "class", "event", "system", "location", "summary"):
+            for desc in (True, False):
+                model = LogbookFeedModel(limit=40, sort_column=column, sort_desc=desc, class_order=_CLASS_ORDER)
+                shadow: list[str] = []
+                for idx in range(120):
+                    row = _item(idx, rng)
+                    change = model.add(row)
+                    self.assertTrue(change.added)
+                    # Odtworzenie widoku tylko z delt (usuniecie + wstawienie na indeks),
+                    # tak jak robi to Treeview.
+                    alive = {r["summary"] for r in model.items()}
+                    shadow = [summary for summary in shadow if summary in alive]
+                    if change.visible_index is not None:
+                        shadow.insert(change.visible_index, row["summary"])
+                    self.assertEqual(shadow, [r["summary"] for r in model.visible_rows()])
+
+                expected = _reference_view(
+                    model.items(), column=column, desc=desc, class_filter=LOGBOOK_FEED_CLASS_ALL, show_tech=False
+                )
+                self.assertEqual(model.visible_rows(), expected)
+                self.assertEqual(model.summary_snapshot(), build_logbook_summary_snapshot(expected))
+
+    def test_dedupe_eviction_and_filter_changes(self) -> None:
+        model = LogbookFeedModel(limit=3, class_order=_CLASS_ORDER)
+        rows = [
+            {"timestamp": f"2026-02-22T20:00:0{idx}Z", "event_name": "FSDJump", "event_class": "Nawigacja", "summary": f"j{idx}"}
+            for idx in range(4)
+        ]
+        for row in rows[:3]:
+            model.add(row)
+        self.assertFalse(model.add(dict(rows[1])).added)
+
+        change = model.add(rows[3])
+        self.assertEqual(len(change.evicted_seqs), 1)
+        self.assertEqual(change.visible_index, 0)
+        self.assertEqual([r["summary"] for r in model.visible_rows()], ["j3", "j2", "j1"])
+        # Po wypchnieciu z limitu ten sam event moze wrocic.
+        self.assertTrue(model.add(dict(rows[0])).added)
+
+        model.add({"timestamp": "2026-02-22T21:00:00Z", "event_name": "Music", "event_class": "TECH", "summary": "tech"})
+        self.assertNotIn("tech", [r["summary"] for r in model.visible_rows()])
+        self.assertTrue(model.configure(show_tech=True))
+        self.assertEqual(model.visible_rows()[0]["summary"], "tech")
+        self.assertTrue(model.configure(class_filter="TECH"))
+        self.assertEqual(model.summary_snapshot()["class_counts"], {"TECH": 1})
+        self.assertFalse(model.configure(class_filter="TECH"))
+
+    def test_five_thousand_item_feed_stays_cheap_per_event(self) -> None:
+        rng = random.Random(5000)
+        model = LogbookFeedModel(limit=5000, class_order=_CLASS_ORDER)
+        rows = [_item(idx, rng) for idx in range(5000)]
+        started = time.perf_counter()
+        for row in rows:
+            model.add(row)
+        elapsed = time.perf_counter() - started
+        self.assertEqual(len(model), 5000)
+        self.assertLess(elapsed, 2.0)
+
+    def test_cache_writer_persists_batches_off_caller_thread(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "logbook", "feed.jsonl")
+            writer = LogbookFeedCacheWriter(path=path, limit=3)
+            for idx in range(5):
+                writer.submit({"timestamp": f"2026-02-22T20:00:0{idx}Z", "event_name": "FSDJump", "summary": f"j{idx}"})
+            writer.submit({"timestamp": "2026-02-22T20:00:04Z", "event_name": "FSDJump", "summary": "j4"})
+            self.assertTrue(writer.flush(timeout=5.0))
+            rows = load_logbook_feed_cache(path=path, limit=10)
+            self.assertEqual([r["summary"] for r in rows], ["j2", "j3", "j4"])
+
+            writer.clear()
+            writer.submit({"timestamp": "2026-02-22T20:00:09Z", "event_name": "Docked", "summary": "d"})
+            self.assertTrue(writer.flush(timeout=5.0))
+            rows = load_logbook_feed_cache(path=path, limit=10)
+            self.assertEqual([r["summary"] for r in rows], ["d"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import json
+import os
+import random
+import tempfile
+import time
+import unittest
+
+from logic.entry_repository import EntryRepository
+
+
+def _reference_filter(entries: list[dict], filters: dict) -> list[str]:
+    text = str(filters.get("text") or "").lower()
+    tags = set(filters.get("tags") or [])
+    out = []
+    for item in entries:
+        loc = item.get("location") or {}
+        hay = " ".join(
+            [
+                item["title"],
+                item["body"],
+                " ".join(item["tags"]),
+                str(loc.get("system_name") or ""),
+                str(loc.get("station_name") or ""),
+                str(loc.get("body_name") or ""),
+            ]
+        ).lower()
+        if text and text not in hay:
+            continue
+        if tags:
+            if filters.get("tags_mode") == "any":
+                if not tags & set(item["tags"]):
+                    continue
+            elif not tags <= set(item["tags"]):
+                continue
+        prefix = filters.get("category_path_prefix")
+        if prefix and not item["category_path"].startswith(prefix):
+            continue
+        if filters.get("is_pinned") is True and not item["is_pinned"]:
+            continue
+        if filters.get("has_system") is True and not loc.get("system_name"):
+            continue
+        if filters.get("has_system") is False and loc.get("system_name"):
+            continue
+        out.append(item["id"])
+    return out
+
+
+class F69EntryRepositoryIndexesAndChangeLogTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, "entries.jsonl")
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def _seed(self, repo: EntryRepository, count: int, *, seed: int = 69) -> list[dict]:
+        rng = random.Random(seed)
+        created = []
+        for idx in range(count):
+            created.append(
+                repo.create_entry(
+                    {
+                        "category_path": rng.choice(["Handel/Trasy", "Handel/Rynki", "Eksploracja/Ziemie", "Gornictwo"]),
+                        "title": f"Wpis {idx} {rng.choice(['zloto', 'srebro', 'painite', 'neutron'])}",
+                        "body": rng.choice(["Dobra cena", "Pierscien metaliczny", "ELW do zmapowania", ""]),
+                        "tags": rng.sample(["trade", "mining", "exploration", "todo", "hot"], k=rng.randint(0, 3)),
+                        "location": {"system_name": rng.choice([None, "Sol", "Colonia", "Diagaundri"])},
+                        "created_at": f"2026-02-{1 + idx % 27:02d}T10:{idx % 60:02d}:00Z",
+                        "is_pinned": idx % 7 == 0,
+                    }
+                )
+            )
+        return created
+
+    def test_indexed_queries_match_reference_scan(self) -> None:
+        repo = EntryRepository(path=self.path)
+        self._seed(repo, 300)
+        all_entries = repo.list_entries(sort={"by": "created_at", "descending": False})
+        cases = [
+            {"text": "zloto"},
+            {"text": "ring"},
+            {"text": "co"},
+            {"text": "pierscien met"},
+            {"tags": ["trade", "hot"]},
+            {"tags": ["trade", "hot"], "tags_mode": "any"},
+            {"category_path_prefix": "Handel/"},
+            {"is_pinned": True, "has_system": True},
+            {"has_system": False, "text": "srebro"},
+            {"text": "brak-takiego-tekstu"},
+        ]
+        for filters in cases:
+            with self.subTest(filters=filters):
+                got = [e["id"] for e in repo.list_entries(filters=filters, sort={"by": "created_at", "descending": False})]
+                self.assertEqual(got, _reference_filter(all_entries, filters))
+
+        page = repo.list_entries(sort="oldest", limit=5, offset=10)
+        self.assertEqual([e["id"] for e in page], [e["id"] for e in all_entries[10:15]])
+
+        counts = repo.category_counts()
+        self.assertEqual(sum(counts.values()), repo.count_entries())
+
+    def test_mutations_are_appended_to_change_log_and_replayed(self) -> None:
+        repo = EntryRepository(path=self.path)
+        first, second = self._seed(repo, 2)
+        repo.update_entry(first["id"], {"title": "Zmieniony tytul", "tags": ["nowy"]})
+        repo.delete_entry(second["id"])
+
+        with open(self.path, "r", encoding="utf-8") as handle:
+            self.assertEqual(handle.read().strip(), "")
+        with open(repo.changes_path, "r", encoding="utf-8") as handle:
+            ops = [json.loads(line)["op"] for line in handle if line.strip()]
+        self.assertEqual(ops, ["upsert", "upsert", "upsert", "delete"])
+
+        reloaded = EntryRepository(path=self.path)
+        self.assertIsNone(reloaded.get_entry(second["id"]))
+        self.assertEqual(reloaded.get_entry(first["id"])["title"], "Zmieniony tytul")
+        self.assertEqual([e["id"] for e in reloaded.list_entries(filters={"tags": ["nowy"]})], [first["id"]])
+        self.assertEqual(reloaded.list_entries(filters={"text": "wpis 0"}), [])
+
+    def test_compaction_rewrites_snapshot_and_truncates_log(self) -> None:
+        repo = EntryRepository(path=self.path)
+        repo.COMPACT_MIN_CHANGES = 5
+        created = self._seed(repo, 6)
+
+        with open(repo.changes_path, "r", encoding="utf-8") as handle:
+            self.assertLess(len([line for line in handle if line.strip()]), 5)
+        with open(self.path, "r", encoding="utf-8") as handle:
+            snapshot_ids = [json.loads(line)["id"] for line in handle if line.strip()]
+        self.assertEqual(snapshot_ids, [e["id"] for e in created[:5]])
+
+        reloaded = EntryRepository(path=self.path)
+        self.assertEqual(reloaded.count_entries(), 6)
+
+    def test_text_search_stays_fast_with_tens_of_thousands_of_entries(self) -> None:
+        repo = EntryRepository(path=self.path)
+        # Zasilenie indeksow bez I/O - mierzymy tylko zapytania.
+        for idx in range(20_000):
+            repo._index_put(
+                {
+                    "id": f"e{idx}",
+                    "category_path": "Handel" if idx % 2 else "Eksploracja",
+                    "title": f"Wpis {idx}",
+                    "body": "unikalny-znacznik" if idx == 12_345 else "zwykla notatka",
+                    "tags": ["trade"] if idx % 3 == 0 else [],
+                    "location": {"system_name": "Sol"},
+                    "created_at": "2026-02-20T10:00:00Z",
+                    "updated_at": "2026-02-20T10:00:00Z",
+                    "is_pinned": False,
+                }
+            )
+        started = time.perf_counter()
+        for _ in range(20):
+            hits = repo.list_entries(filters={"text": "unikalny-znacznik"}, limit=50)
+            tagged = repo.list_entries(filters={"tags": ["trade"], "category_path_prefix": "Handel"}, limit=50)
+        elapsed = time.perf_counter() - started
+        self.assertEqual([e["id"] for e in hits], ["e12345"])
+        self.assertEqual(len(tagged), 50)
+        self.assertLess(elapsed, 3.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
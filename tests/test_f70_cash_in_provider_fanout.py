@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from logic.cash_in_station_candidates import (
+    station_candidates_cross_system_from_providers,
+    station_candidates_for_system_from_providers,
+)
+from logic.provider_fanout import fan_out, hedged_first
+from logic.utils.rate_limiter import TokenBucket
+
+
+def _station(system: str, name: str, distance: float = 10.0) -> dict:
+    return {
+        "name": name,
+        "system_name": system,
+        "type": "Coriolis Starport",
+        "services": {"has_uc": True, "has_vista": True},
+        "distance_ly": distance,
+    }
+
+
+class F70CashInProviderFanoutTests(unittest.TestCase):
+    def test_token_bucket_spaces_calls_and_refuses_past_timeout(self) -> None:
+        bucket = TokenBucket(rate_per_sec=20.0, capacity=1.0)
+        started = time.monotonic()
+        for _ in range(4):
+            self.assertTrue(bucket.acquire())
+        elapsed = time.monotonic() - started
+        self.assertGreaterEqual(elapsed, 0.14)
+
+        slow = TokenBucket(rate_per_sec=1.0, capacity=1.0)
+        self.assertTrue(slow.acquire(timeout=0.0))
+        self.assertFalse(slow.acquire(timeout=0.05))
+
+    def test_hedged_first_prefers_fast_answer_and_skips_empty(self) -> None:
+        def _slow() -> list:
+            time.sleep(0.5)
+            return ["edsm"]
+
+        started = time.monotonic()
+        name, value = hedged_first([("edsm", _slow), ("spansh", lambda: ["spansh"])], hedge_after_s=0.05)
+        self.assertEqual((name, value), ("spansh", ["spansh"]))
+        self.assertLess(time.monotonic() - started, 0.4)
+
+        name, value = hedged_first([("edsm", lambda: []), ("spansh", lambda: ["s"])], hedge_after_s=5.0)
+        self.assertEqual((name, value), ("spansh", ["s"]))
+
+        name, value = hedged_first([("edsm", _slow)], hedge_after_s=0.01, timeout_s=0.05)
+        self.assertEqual((name, value), (None, None))
+
+    def test_fan_out_stops_on_enough_results_and_deadline(self) -> None:
+        seen: list[int] = []
+
+        def _task(idx: int):
+            time.sleep(0.02 * (idx % 3))
+            return idx
+
+        stats = fan_out(
+            [(idx, (lambda idx=idx: _task(idx))) for idx in range(40)],
+            max_workers=2,
+            on_result=lambda _key, value: seen.append(value),
+            should_stop=lambda: len(seen) >= 3,
+        )
+        self.assertEqual(stats["stop_reason"], "enough_results")
+        self.assertLess(len(seen), 40)
+        self.assertGreater(stats["cancelled"], 0)
+
+        started = time.monotonic()
+        stats = fan_out([("slow", lambda: time.sleep(1.0))], deadline_s=0.05)
+        self.assertEqual(stats["stop_reason"], "deadline")
+        self.assertLess(time.monotonic() - started, 0.5)
+
+    def test_cross_system_lookup_runs_systems_concurrently_and_streams_partials(self) -> None:
+        nearby = [{"name": f"Sys {idx}", "distance": float(idx + 1)} for idx in range(8)]
+        active = {"now": 0, "max": 0}
+        lock = threading.Lock()
+
+        def _per_system(system_name: str, **_kwargs):
+            with lock:
+                active["now"] += 1
+                active["max"] = max(active["max"], active["now"])
+            time.sleep(0.1)
+            with lock:
+                active["now"] -= 1
+            return [_station(system_name, f"{system_name} Port")]
+
+        partials: list[int] = []
+        with (
+            patch("logic.cash_in_station_candidates.edsm_nearby_systems", return_value=nearby),
+            patch(
+                "logic.cash_in_station_candidates.station_candidates_for_system_from_providers",
+                side_effect=_per_system,
+            ),
+        ):
+            started = time.monotonic()
+            candidates, meta = station_candidates_cross_system_from_providers(
+                "Origin",
+                include_spansh=False,
+                limit=24,
+                max_workers=4,
+                on_partial=lambda rows, _meta: partials.append(len(rows)),
+            )
+            elapsed = time.monotonic() - started
+
+        self.assertEqual(len(candidates), 8)
+        self.assertEqual(meta["systems_requested"], 8)
+        self.assertEqual(meta["systems_with_candidates"], 8)
+        self.assertEqual(meta["fanout_stop_reason"], "done")
+        self.assertGreater(active["max"], 1)
+        self.assertLessEqual(active["max"], 4)
+        self.assertLess(elapsed, 0.6)
+        self.assertEqual(partials, sorted(partials))
+        self.assertEqual(partials[-1], 8)
+        self.assertEqual(meta["fanout_partial_updates"], 8)
+
+    def test_single_system_hedge_uses_spansh_when_edsm_is_slow(self) -> None:
+        def _slow_edsm(system_name: str):
+            time.sleep(0.5)
+            return [_station(system_name, "EDSM Port")]
+
+        with (
+            patch("logic.cash_in_station_candidates.edsm_station_details_for_system", side_effect=_slow_edsm),
+            patch(
+                "logic.cash_in_station_candidates.spansh_client.stations_for_system_details",
+                return_value=[_station("Sol", "Spansh Port")],
+            ),
+        ):
+            started = time.monotonic()
+            rows = station_candidates_for_system_from_providers("Sol", hedge_after_s=0.05, timeout_s=2.0)
+            elapsed = time.monotonic() - started
+
+        self.assertEqual([row.get("name") for row in rows], ["Spansh Port"])
+        self.assertLess(elapsed, 0.4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+import config
+from app.state import app_state
+from logic import utils
+from logic.cash_in_provider_race import (
+    ProviderRace,
+    _reset_provider_race_telemetry_for_tests,
+    provider_race_telemetry_snapshot,
+)
+from logic.events import cash_in_assistant
+from logic.provider_fanout import fan_out
+from logic.utils.cancellation import current_cancel_token
+
+
+def _station(name: str, system: str = "F71_ORIGIN") -> dict:
+    return {
+        "name": name,
+        "system_name": system,
+        "type": "Coriolis Starport",
+        "services": {"has_uc": True, "has_vista": True},
+        "distance_ly": 0.0,
+        "distance_ls": 500.0,
+        "max_landing_pad_size": "L",
+        "source": "EDSM",
+    }
+
+
+def _drain_cash_in_messages() -> list[dict]:
+    out = []
+    while True:
+        try:
+            msg_type, content = utils.MSG_QUEUE.get_nowait()
+        except queue.Empty:
+            return out
+        if msg_type == "cash_in_assistant":
+            out.append(content)
+
+
+class F71CashInProviderRaceDeadlineTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._orig_settings = dict(config.config._settings)
+        self._saved_system = getattr(app_state, "current_system", None)
+        self._saved_station = getattr(app_state, "current_station", None)
+        self._saved_star_pos = getattr(app_state, "current_star_pos", None)
+        self._saved_last_sig = getattr(app_state, "last_cash_in_signature", None)
+        self._saved_skip_sig = getattr(app_state, "cash_in_skip_signature", None)
+
+        app_state.current_system = "F71_ORIGIN"
+        app_state.current_station = ""
+        app_state.current_star_pos = [0.0, 0.0, 0.0]
+        app_state.last_cash_in_signature = None
+        app_state.cash_in_skip_signature = None
+
+        config.config._settings["cash_in_assistant_enabled"] = True
+        config.config._settings["cash_in.station_candidates_lookup_enabled"] = True
+        config.config._settings["cash_in.cross_system_discovery_enabled"] = False
+        config.config._settings["cash_in.swr_cache_enabled"] = False
+        config.config._settings["cash_in.local_known_fallback_enabled"] = False
+        config.config._settings["cash_in.offline_index_fallback_enabled"] = False
+        config.config._settings["cash_in.provider_race_deadline_sec"] = 0.15
+        config.config._settings["cash_in.provider_race_deadline_manual_sec"] = 5.0
+        config.config._settings["features.providers.edsm_enabled"] = True
+
+        cash_in_assistant._reset_cash_in_swr_cache_for_tests()
+        cash_in_assistant._reset_cash_in_local_known_cache_for_tests()
+        _reset_provider_race_telemetry_for_tests()
+        _drain_cash_in_messages()
+
+    def tearDown(self) -> None:
+        config.config._settings = self._orig_settings
+        app_state.current_system = self._saved_system
+        app_state.current_station = self._saved_station
+        app_state.current_star_pos = self._saved_star_pos
+        app_state.last_cash_in_signature = self._saved_last_sig
+        app_state.cash_in_skip_signature = self._saved_skip_sig
+        cash_in_assistant._reset_cash_in_swr_cache_for_tests()
+        cash_in_assistant._reset_cash_in_local_known_cache_for_tests()
+        _reset_provider_race_telemetry_for_tests()
+        _drain_cash_in_messages()
+
+    @staticmethod
+    def _payload() -> dict:
+        return {
+            "system": "F71_ORIGIN",
+            "cash_in_signal": "wysoki",
+            "cash_in_system_estimated": 8_000_000.0,
+            "cash_in_session_estimated": 28_000_000.0,
+            "service": "uc",
+            "confidence": "high",
+        }
+
+    def test_race_returns_at_deadline_and_delivers_late_result(self) -> None:
+        race = ProviderRace(deadline_s=0.05)
+        race.start("fast", lambda: ["a"])
+        race.start("slow", lambda: (time.sleep(0.3), ["b"])[1])
+        self.assertEqual(race.wait("fast"), (True, ["a"]))
+
+        started = time.monotonic()
+        self.assertEqual(race.wait("slow"), (False, None))
+        self.assertLess(time.monotonic() - started, 0.2)
+
+        late = threading.Event()
+        received: list = []
+        race.on_late("slow", lambda value: (received.append(value), late.set()))
+        self.assertTrue(late.wait(2.0))
+        self.assertEqual(received, [["b"]])
+
+        snap = provider_race_telemetry_snapshot()["sources"]
+        self.assertEqual(snap["fast"]["hits"], 1)
+        self.assertEqual(snap["slow"]["late"], 1)
+        self.assertGreaterEqual(snap["slow"]["latency_ms_last"], 250.0)
+
+    def test_cancel_stops_abandoned_source_and_nested_fan_out(self) -> None:
+        race = ProviderRace(deadline_s=0.05)
+        nested_reasons: list[str] = []
+
+        def _nested_task() -> None:
+            token = current_cancel_token()
+            token.wait(2.0)
+            nested_reasons.append(token.reason)
+
+        def _slow_source():
+            return fan_out([("nested", _nested_task)], deadline_s=5.0)
+
+        race.start("slow", _slow_source)
+        self.assertEqual(race.wait("slow"), (False, None))
+        started = time.monotonic()
+        race.cancel("deadline")
+        self.assertTrue(race._entries["slow"].done.wait(1.0))
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertEqual(nested_reasons, ["deadline"])
+
+    def test_slow_providers_fall_back_to_local_source_then_refine_panel(self) -> None:
+        def _slow_providers(*_args, **_kwargs):
+            time.sleep(0.5)
+            return [_station("F71 Provider Port")]
+
+        playerdb_row = dict(_station("F71 PlayerDB Port"), source="PLAYERDB")
+        with (
+            patch(
+                "logic.events.cash_in_assistant.station_candidates_for_system_from_providers",
+                side_effect=_slow_providers,
+            ),
+            patch(
+                "logic.events.cash_in_assistant.station_candidates_from_playerdb",
+                return_value=([playerdb_row], {"lookup_status": "playerdb_hit", "query_mode": "coords"}),
+            ),
+            patch("logic.events.cash_in_assistant.emit_insight") as emit_mock,
+        ):
+            started = time.monotonic()
+            ok = cash_in_assistant.trigger_cash_in_assistant(mode="auto", summary_payload=self._payload())
+            elapsed = time.monotonic() - started
+
+            self.assertTrue(ok)
+            self.assertLess(elapsed, 0.45)
+            ctx = dict(emit_mock.call_args.kwargs.get("context") or {})
+            structured = dict(ctx.get("cash_in_payload") or {})
+            meta = dict(structured.get("station_candidates_meta") or {})
+            self.assertEqual(meta.get("provider_lookup_status"), "providers_deadline")
+            self.assertTrue(meta.get("provider_race_timed_out"))
+            self.assertEqual(meta.get("source_status"), "playerdb")
+            self.assertIn("playerdb", meta.get("provider_race_latency_ms") or {})
+
+            refined: list[dict] = []
+            deadline = time.monotonic() + 3.0
+            while not refined and time.monotonic() < deadline:
+                refined = _drain_cash_in_messages()
+                time.sleep(0.02)
+
+        self.assertEqual(emit_mock.call_count, 1)
+        self.assertEqual(len(refined), 1)
+        refined_meta = dict(refined[0].get("station_candidates_meta") or {})
+        self.assertEqual(refined_meta.get("provider_lookup_status"), "providers")
+        names = [row.get("name") for row in refined[0].get("station_candidates") or []]
+        self.assertIn("F71 Provider Port", names)
+
+        telemetry = provider_race_telemetry_snapshot()
+        self.assertEqual(telemetry["sources"]["providers"]["late"], 1)
+        self.assertGreaterEqual(telemetry["winners"].get("playerdb", 0), 1)
+        self.assertGreaterEqual(telemetry["winners"].get("providers", 0), 1)
+
+    def test_partial_cross_system_results_reach_panel_before_final(self) -> None:
+        config.config._settings["cash_in.cross_system_discovery_enabled"] = True
+        config.config._settings["features.providers.system_lookup_online"] = True
+        near = dict(_station("F71 Near Port", system="F71_NEAR"), distance_ly=8.0)
+        far = dict(_station("F71 Far Port", system="F71_FAR"), distance_ly=30.0)
+
+        def _cross(*_args, on_partial=None, **_kwargs):
+            time.sleep(0.3)
+            on_partial([near], {"systems_requested": 2, "systems_with_candidates": 1, "partial": True})
+            time.sleep(0.2)
+            return [near, far], {"systems_requested": 2, "systems_with_candidates": 2}
+
+        with (
+            patch("logic.events.cash_in_assistant.station_candidates_for_system_from_providers", return_value=[]),
+            patch("logic.events.cash_in_assistant.station_candidates_cross_system_from_providers", side_effect=_cross),
+            patch("logic.events.cash_in_assistant.emit_insight") as emit_mock,
+        ):
+            self.assertTrue(cash_in_assistant.trigger_cash_in_assistant(mode="auto", summary_payload=self._payload()))
+            ctx = dict(emit_mock.call_args.kwargs.get("context") or {})
+            main_meta = dict((ctx.get("cash_in_payload") or {}).get("station_candidates_meta") or {})
+            self.assertEqual(main_meta.get("cross_system_lookup_status"), "providers_deadline")
+
+            updates: list[dict] = []
+            deadline = time.monotonic() + 3.0
+            while len(updates) < 2 and time.monotonic() < deadline:
+                updates.extend(_drain_cash_in_messages())
+                time.sleep(0.02)
+
+        self.assertEqual(emit_mock.call_count, 1)
+        self.assertEqual(len(updates), 2)
+        partial_meta = dict(updates[0].get("station_candidates_meta") or {})
+        final_meta = dict(updates[1].get("station_candidates_meta") or {})
+        self.assertTrue(partial_meta.get("cross_system_partial"))
+        self.assertFalse(final_meta.get("cross_system_partial"))
+        partial_names = {row.get("name") for row in updates[0].get("station_candidates") or []}
+        final_names = {row.get("name") for row in updates[1].get("station_candidates") or []}
+        self.assertIn("F71 Near Port", partial_names)
+        self.assertNotIn("F71 Far Port", partial_names)
+        self.assertIn("F71 Far Port", final_names)
+
+    def test_fast_providers_are_used_without_refinement(self) -> None:
+        with (
+            patch(
+                "logic.events.cash_in_assistant.station_candidates_for_system_from_providers",
+                return_value=[_station("F71 Provider Port")],
+            ),
+            patch("logic.events.cash_in_assistant.emit_insight") as emit_mock,
+        ):
+            ok = cash_in_assistant.trigger_cash_in_assistant(mode="manual", summary_payload=self._payload())
+
+        self.assertTrue(ok)
+        ctx = dict(emit_mock.call_args.kwargs.get("context") or {})
+        meta = dict((ctx.get("cash_in_payload") or {}).get("station_candidates_meta") or {})
+        self.assertEqual(meta.get("provider_lookup_status"), "providers")
+        self.assertFalse(meta.get("provider_race_timed_out"))
+        time.sleep(0.05)
+        self.assertEqual(_drain_cash_in_messages(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
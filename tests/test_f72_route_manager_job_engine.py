@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from app.route_manager import RouteManager
+from logic.provider_fanout import fan_out
+from logic.spansh_client import SpanshClient
+from logic.utils.cancellation import CancelToken, current_cancel_token
+
+
+class F72RouteManagerJobEngineTests(unittest.TestCase):
+    @staticmethod
+    def _wait_until(predicate, *, timeout: float = 1.5, step: float = 0.01) -> bool:
+        deadline = time.time() + float(timeout)
+        while time.time() < deadline:
+            if bool(predicate()):
+                return True
+            time.sleep(step)
+        return bool(predicate())
+
+    def _blocking_job(self, tokens: dict, key: str, gate: threading.Event, started: threading.Event):
+        def _job() -> None:
+            token = current_cancel_token()
+            tokens[key] = token
+            started.set()
+            # Kooperacyjnie: worker konczy sie po anulowaniu albo po gate.
+            while not gate.is_set():
+                if token is not None and token.wait(0.01):
+                    return
+
+        return _job
+
+    def test_neutron_and_trade_run_in_parallel(self) -> None:
+        manager = RouteManager(route_job_timeout_s=2.0, max_parallel_jobs=2)
+        gate = threading.Event()
+        tokens: dict = {}
+        trade_started = threading.Event()
+        neutron_started = threading.Event()
+
+        self.assertTrue(manager.start_route_thread("trade", self._blocking_job(tokens, "trade", gate, trade_started)))
+        self.assertTrue(manager.start_route_thread("neutron", self._blocking_job(tokens, "neutron", gate, neutron_started)))
+        self.assertTrue(trade_started.wait(0.3))
+        self.assertTrue(neutron_started.wait(0.3))
+
+        self.assertTrue(manager.is_busy("trade"))
+        self.assertTrue(manager.is_busy("neutron"))
+        self.assertEqual(manager.current_mode(), "neutron")
+        self.assertEqual(manager.active_modes(), ["trade", "neutron"])
+        self.assertFalse(tokens["trade"].cancelled)
+
+        gate.set()
+        self.assertTrue(self._wait_until(lambda: not manager.is_busy(), timeout=1.0))
+        states = [row["state"] for row in manager.jobs_snapshot()]
+        self.assertEqual(states, ["done", "done"])
+
+    def test_new_neutron_request_supersedes_previous(self) -> None:
+        manager = RouteManager(route_job_timeout_s=2.0)
+        gate = threading.Event()
+        tokens: dict = {}
+        first_started = threading.Event()
+        second_started = threading.Event()
+
+        self.assertTrue(manager.start_route_thread("neutron", self._blocking_job(tokens, "first", gate, first_started)))
+        self.assertTrue(first_started.wait(0.3))
+        self.assertTrue(manager.can_start("neutron"))
+        self.assertTrue(manager.start_route_thread("neutron", self._blocking_job(tokens, "second", gate, second_started)))
+        self.assertTrue(second_started.wait(0.3))
+
+        self.assertTrue(tokens["first"].cancelled)
+        self.assertEqual(tokens["first"].reason, "superseded")
+        self.assertFalse(tokens["second"].cancelled)
+        self.assertEqual(manager.active_modes(), ["neutron"])
+
+        snapshot = manager.jobs_snapshot()
+        self.assertEqual(snapshot[0]["state"], "cancelled")
+        self.assertEqual(snapshot[0]["cancel_reason"], "superseded")
+        self.assertEqual(snapshot[-1]["state"], "running")
+
+        gate.set()
+        self.assertTrue(self._wait_until(lambda: not manager.is_busy(), timeout=1.0))
+
+    def test_higher_priority_job_preempts_when_capacity_is_full(self) -> None:
+        manager = RouteManager(route_job_timeout_s=2.0, max_parallel_jobs=1)
+        gate = threading.Event()
+        tokens: dict = {}
+        trade_started = threading.Event()
+        neutron_started = threading.Event()
+
+        self.assertTrue(manager.start_route_thread("trade", self._blocking_job(tokens, "trade", gate, trade_started)))
+        self.assertTrue(trade_started.wait(0.3))
+        self.assertFalse(manager.can_start("riches"))
+        self.assertFalse(manager.start_route_thread("riches", lambda: None))
+
+        self.assertTrue(manager.start_route_thread("neutron", self._blocking_job(tokens, "neutron", gate, neutron_started)))
+        self.assertTrue(neutron_started.wait(0.3))
+        self.assertEqual(tokens["trade"].reason, "preempted")
+        self.assertFalse(manager.is_busy("trade"))
+        self.assertEqual(manager.current_mode(), "neutron")
+
+        gate.set()
+        self.assertTrue(self._wait_until(lambda: not manager.is_busy(), timeout=1.0))
+
+    def test_watchdog_cancels_token_of_hung_job(self) -> None:
+        manager = RouteManager(route_job_timeout_s=0.06)
+        gate = threading.Event()
+        tokens: dict = {}
+        started = threading.Event()
+
+        self.assertTrue(manager.start_route_thread("trade", self._blocking_job(tokens, "trade", gate, started)))
+        self.assertTrue(started.wait(0.3))
+        worker = manager._worker_thread
+
+        self.assertTrue(self._wait_until(lambda: not manager.is_busy(), timeout=0.8))
+        self.assertEqual(tokens["trade"].reason, "timeout")
+        if worker is not None:
+            worker.join(timeout=0.5)
+            self.assertFalse(worker.is_alive())
+
+        snapshot = manager.jobs_snapshot()
+        self.assertEqual(snapshot[-1]["state"], "timed_out")
+        self.assertGreaterEqual(snapshot[-1]["duration_ms"], 50)
+        gate.set()
+
+    def test_cancel_route_reports_count_and_failed_state(self) -> None:
+        manager = RouteManager(route_job_timeout_s=2.0)
+        gate = threading.Event()
+        tokens: dict = {}
+        started = threading.Event()
+
+        self.assertEqual(manager.cancel_route(), 0)
+        self.assertTrue(manager.start_route_thread("trade", self._blocking_job(tokens, "trade", gate, started)))
+        self.assertTrue(started.wait(0.3))
+        self.assertEqual(manager.cancel_route("trade"), 1)
+        self.assertEqual(tokens["trade"].reason, "user")
+        self.assertFalse(manager.is_busy())
+
+        def _boom() -> None:
+            raise RuntimeError("boom")
+
+        self.assertTrue(manager.start_route_thread("neutron", _boom))
+        self.assertTrue(self._wait_until(lambda: not manager.is_busy(), timeout=1.0))
+        states = [row["state"] for row in manager.jobs_snapshot()]
+        self.assertEqual(states, ["cancelled", "failed"])
+        gate.set()
+
+    def test_spansh_polling_wakes_up_and_stops_when_token_is_cancelled(self) -> None:
+        client = SpanshClient()
+        token = CancelToken()
+        pending = MagicMock(status_code=202)
+        calls = {"n": 0}
+
+        def _fake_get(*_args, **_kwargs):
+            calls["n"] += 1
+            return pending
+
+        timer = threading.Timer(0.1, lambda: token.cancel("superseded"))
+        with patch("logic.spansh_client.requests.get", side_effect=_fake_get):
+            started = time.monotonic()
+            timer.start()
+            result = client._poll_results(
+                "F72JOB",
+                mode="neutron",
+                gui_ref=None,
+                poll_seconds=5.0,
+                polls=10,
+                cancel_token=token,
+            )
+            elapsed = time.monotonic() - started
+        timer.join()
+
+        self.assertIsNone(result)
+        self.assertEqual(calls["n"], 1)
+        self.assertLess(elapsed, 1.0)
+
+
+    def test_fan_out_cancels_token_of_abandoned_tasks(self) -> None:
+        seen: list = []
+        finished = threading.Event()
+
+        def _slow_task() -> str:
+            token = current_cancel_token()
+            seen.append(token)
+            cancelled = token is not None and token.wait(2.0)
+            finished.set()
+            return "cancelled" if cancelled else "done"
+
+        stats = fan_out([("slow", _slow_task)], deadline_s=0.05)
+        self.assertEqual(stats["stop_reason"], "deadline")
+        self.assertTrue(finished.wait(0.5))
+        self.assertEqual(seen[0].reason, "fanout_deadline")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+import tempfile
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import config
+from logic.cache_store import CacheStore
+from logic.spansh_client import SpanshClient
+from logic.speculative_routes import SpeculativeRoutePlanner
+from logic.utils import DEBOUNCER
+from logic.utils.cancellation import CancelToken
+
+
+class _DummyResponse:
+    def __init__(self, status_code: int, payload) -> None:
+        self.status_code = status_code
+        self._payload = payload
+        self.text = str(payload)
+
+    def json(self):
+        return self._payload
+
+
+class _FakeState:
+    def __init__(self) -> None:
+        self.current_system = "Sol"
+        self.nav_route = {"endpoint": "Colonia", "systems": []}
+        self.ship_state = SimpleNamespace(jump_range_current_ly=42.5)
+        self.pending = {"active": False, "target_system": ""}
+
+    def get_current_system_name(self) -> str:
+        return self.current_system
+
+    def get_pending_station_clipboard_snapshot(self) -> dict:
+        return dict(self.pending)
+
+
+class _FakeRouteManager:
+    def __init__(self) -> None:
+        self.busy = False
+
+    def is_busy(self, mode=None) -> bool:
+        return self.busy
+
+
+def _route_result(target: str) -> dict:
+    return {"system_jumps": [{"system": "Sol", "distance": 0}, {"system": target, "distance": 42.0}]}
+
+
+class F73SpeculativeNeutronRoutesTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._orig = config.config._settings.copy()
+        config.config._settings["spansh_base_url"] = "https://example.test/api"
+        config.config._settings["features.spansh.form_urlencoded_enabled"] = True
+        config.config._settings["features.spansh.speculative_neutron_enabled"] = True
+        config.config._settings["spansh.speculative.max_concurrent"] = 2
+        config.config._settings["spansh.speculative.max_per_hour"] = 6
+        config.config._settings["spansh.speculative.eval_interval_sec"] = 0.0
+        config.config._settings["spansh.speculative.idle_after_sec"] = 0.0
+        config.config._settings["debug_cache"] = False
+
+        self._tmp = tempfile.TemporaryDirectory()
+        self.client = SpanshClient()
+        self.client.cache = CacheStore(namespace="spansh_f73", base_dir=self._tmp.name, provider="spansh")
+        self.state = _FakeState()
+        self.manager = _FakeRouteManager()
+        self.planner = SpeculativeRoutePlanner(spansh=self.client, state=self.state, route_manager=self.manager)
+        last = getattr(DEBOUNCER, "_last", None)
+        if isinstance(last, dict):
+            last.clear()
+
+    def tearDown(self) -> None:
+        self.planner.invalidate_all(reason="test_teardown")
+        self._tmp.cleanup()
+        config.config._settings = self._orig
+
+    def _wait_idle(self, timeout: float = 2.0) -> bool:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if not self.planner.snapshot()["active"]:
+                return True
+            time.sleep(0.01)
+        return False
+
+    def test_prefetched_route_is_cache_hit_for_neutron_tab_request(self) -> None:
+        with (
+            patch("logic.spansh_client.requests.post", return_value=_DummyResponse(200, {"job": "f73-job"})),
+            patch(
+                "logic.spansh_client.requests.get",
+                return_value=_DummyResponse(200, {"status": "ok", "result": _route_result("Colonia")}),
+            ),
+        ):
+            self.assertEqual(self.planner.maybe_run(), 1)
+            self.assertTrue(self._wait_idle())
+        self.assertEqual(self.planner.snapshot()["stats"]["stored"], 1)
+
+        # To samo zapytanie co zakladka Neutron z domyslnymi ustawieniami.
+        with patch("logic.spansh_client.requests.post") as post_mock:
+            systems, _details = self.client.neutron_route(
+                start="Sol",
+                cel="Colonia",
+                zasieg=42.5,
+                eff=60.0,
+                supercharge_mode="normal",
+                via=[],
+                return_details=True,
+            )
+        post_mock.assert_not_called()
+        self.assertEqual(systems, ["Sol", "Colonia"])
+        self.assertEqual(self.client.get_last_request().get("status"), "CACHE_HIT")
+
+    def test_user_route_does_not_join_speculative_job_that_gets_cancelled(self) -> None:
+        self.client.default_poll_interval = 0.05
+        posted: list[str] = []
+
+        def _post(*_args, **_kwargs):
+            posted.append("spec" if not posted else "user")
+            return _DummyResponse(200, {"job": f"f73-{posted[-1]}"})
+
+        def _get(url, *_args, **_kwargs):
+            if url.endswith("/f73-spec"):
+                return _DummyResponse(202, {})
+            return _DummyResponse(200, {"status": "ok", "result": _route_result("Colonia")})
+
+        token = CancelToken()
+        outcome: list[str] = []
+        payload = {"from": "Sol", "to": "Colonia", "range": "42.5"}
+        referer = "https://spansh.co.uk/plotter"
+        with (
+            patch("logic.spansh_client.requests.post", side_effect=_post),
+            patch("logic.spansh_client.requests.get", side_effect=_get),
+        ):
+            worker = threading.Thread(
+                target=lambda: outcome.append(
+                    self.client.prefetch_route("neutron", payload, referer, cancel_token=token)
+                ),
+                daemon=True,
+            )
+            worker.start()
+            deadline = time.monotonic() + 1.0
+            while not posted and time.monotonic() < deadline:
+                time.sleep(0.01)
+            # Spekulatywne zadanie zostaje anulowane, gdy uzytkownik juz czeka.
+            threading.Timer(0.1, token.cancel, kwargs={"reason": "test"}).start()
+            result = self.client.route(mode="neutron", payload=payload, referer=referer)
+            worker.join(2.0)
+
+        self.assertEqual(posted, ["spec", "user"])
+        self.assertEqual(outcome, ["cancelled"])
+        self.assertEqual(result, _route_result("Colonia"))
+
+    def test_budget_limits_concurrency_and_hourly_starts(self) -> None:
+        config.config._settings["spansh.speculative.max_concurrent"] = 1
+        config.config._settings["spansh.speculative.max_per_hour"] = 1
+        self.state.pending = {"active": True, "target_system": "Shinrarta Dezhra"}
+        gate = threading.Event()
+
+        def _slow_get(*_args, **_kwargs):
+            gate.wait(2.0)
+            return _DummyResponse(200, {"status": "ok", "result": _route_result("Colonia")})
+
+        with (
+            patch("logic.spansh_client.requests.post", return_value=_DummyResponse(200, {"job": "f73-job"})),
+            patch("logic.spansh_client.requests.get", side_effect=_slow_get),
+        ):
+            self.assertEqual(self.planner.plan(), 1)
+            self.assertEqual(self.planner.snapshot()["stats"]["budget_skipped"], 1)
+            gate.set()
+            self.assertTrue(self._wait_idle())
+            self.assertEqual(self.planner.plan(), 0)
+
+        snap = self.planner.snapshot()
+        self.assertEqual(snap["starts_last_hour"], 1)
+        self.assertEqual(snap["stats"]["budget_skipped"], 2)
+
+    def test_replanning_cached_destination_does_not_consume_budget(self) -> None:
+        with (
+            patch("logic.spansh_client.requests.post", return_value=_DummyResponse(200, {"job": "f73-job"})),
+            patch(
+                "logic.spansh_client.requests.get",
+                return_value=_DummyResponse(200, {"status": "ok", "result": _route_result("Colonia")}),
+            ),
+        ):
+            self.assertEqual(self.planner.plan(), 1)
+            self.assertTrue(self._wait_idle())
+        self.assertEqual(self.planner.snapshot()["starts_last_hour"], 1)
+
+        with patch("logic.spansh_client.requests.post") as post_mock:
+            for _ in range(10):
+                self.assertEqual(self.planner.plan(), 0)
+        post_mock.assert_not_called()
+
+        snap = self.planner.snapshot()
+        self.assertEqual(snap["starts_last_hour"], 1)
+        self.assertEqual(snap["stats"]["started"], 1)
+        self.assertEqual(snap["stats"]["budget_skipped"], 0)
+
+    def test_jump_range_change_cancels_running_job_and_replans(self) -> None:
+        config.config._settings["spansh.speculative.max_concurrent"] = 1
+        posted_ranges: list[str] = []
+
+        def _post(*_args, **kwargs):
+            posted_ranges.append(dict(kwargs.get("data") or []).get("range"))
+            return _DummyResponse(200, {"job": f"f73-job-{len(posted_ranges)}"})
+
+        with (
+            patch("logic.spansh_client.requests.post", side_effect=_post),
+            patch("logic.spansh_client.requests.get", return_value=_DummyResponse(202, {})),
+        ):
+            self.assertEqual(self.planner.plan(), 1)
+            deadline = time.monotonic() + 1.0
+            while not posted_ranges and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+            self.state.ship_state.jump_range_current_ly = 55.0
+            self.assertEqual(self.planner.plan(), 1)
+            active = self.planner.snapshot()["active"]
+            self.assertEqual([row["jump_range"] for row in active], [55.0])
+            self.planner.invalidate_all(reason="test")
+            deadline = time.monotonic() + 2.0
+            while self.planner.snapshot()["stats"]["cancelled"] < 2 and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+        stats = self.planner.snapshot()["stats"]
+        self.assertEqual(stats["invalidated"], 1)
+        self.assertEqual(stats["cancelled"], 2)
+        self.assertEqual(posted_ranges[0], "42.5")
+
+    def test_maybe_run_waits_for_idle_planner_and_journal(self) -> None:
+        self.manager.busy = True
+        self.assertEqual(self.planner.maybe_run(), 0)
+        self.manager.busy = False
+        config.config._settings["spansh.speculative.idle_after_sec"] = 60.0
+        self.planner.note_activity()
+        self.assertEqual(self.planner.maybe_run(), 0)
+        self.assertEqual(self.planner.snapshot()["stats"]["started"], 0)
+
+        self.state.current_system = "Colonia"
+        self.assertEqual(self.planner.candidate_targets(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
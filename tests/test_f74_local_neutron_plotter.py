@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import gzip
+import json
+import math
+import os
+import random
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+import config
+from logic import neutron
+from logic.neutron_local_plotter import plot_neutron_route_local
+from logic.rows_normalizer import normalize_neutron_rows
+from logic.star_catalogue import (
+    STAR_FIELD,
+    STAR_NEUTRON,
+    STAR_WHITE_DWARF,
+    StarCatalogue,
+    build_star_catalogue_from_spansh_dump,
+)
+
+SOL = (0.0, 0.0, 0.0)
+COLONIA = (-9530.5, -910.28125, 19808.125)
+
+
+def _corridor_stars(seed: int = 37, count: int = 20_000) -> list[tuple[str, float, float, float, int]]:
+    """Syntetyczny korytarz bubble -> Colonia: gesty bubble + NS i zwykle gwiazdy w tubie 300 ly."""
+    rng = random.Random(seed)
+    stars = [("Sol", *SOL, STAR_FIELD), ("Colonia", *COLONIA, STAR_FIELD)]
+    for idx in range(1500):
+        stars.append((f"F74 Bubble {idx}", *(rng.uniform(-150.0, 150.0) for _ in range(3)), STAR_FIELD))
+    for idx in range(count):
+        t = rng.random()
+        base = [SOL[i] + (COLONIA[i] - SOL[i]) * t for i in range(3)]
+        offset = [rng.uniform(-300.0, 300.0) for _ in range(3)]
+        kind = STAR_NEUTRON if idx % 2 == 0 else STAR_FIELD
+        stars.append((f"F74 {idx}", base[0] + offset[0], base[1] + offset[1], base[2] + offset[2], kind))
+    return stars
+
+
+class F74LocalNeutronPlotterTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._orig = config.config._settings.copy()
+        self._tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+        config.config._settings = self._orig
+
+    def test_catalogue_round_trip_and_grid_query(self) -> None:
+        stars = [
+            ("Alpha", 0.0, 0.0, 0.0, STAR_NEUTRON),
+            ("Beta", 30.0, 0.0, 0.0, STAR_WHITE_DWARF),
+            ("Gamma", 0.0, -120.0, 0.0, STAR_FIELD),
+            ("Delta", 250.0, 250.0, 250.0, STAR_FIELD),
+        ]
+        catalogue = StarCatalogue.from_stars(stars, cell_size=50.0)
+        path = os.path.join(self._tmp.name, "catalogue.bin")
+        catalogue.save(path)
+        loaded = StarCatalogue.load(path)
+
+        self.assertEqual(len(loaded), 4)
+        self.assertEqual(loaded.counts(), {"total": 4, "neutron": 1, "white_dwarf": 1, "field": 2})
+        gamma = loaded.find("gamma")
+        self.assertIsNotNone(gamma)
+        self.assertEqual(loaded.name(gamma), "Gamma")
+        self.assertEqual(loaded.coords(gamma), (0.0, -120.0, 0.0))
+        near = sorted(loaded.name(idx) for idx, _dist in loaded.within((5.0, 0.0, 0.0), 130.0))
+        self.assertEqual(near, ["Alpha", "Beta", "Gamma"])
+
+    def test_bubble_to_colonia_plot_is_fast_and_normalizes(self) -> None:
+        catalogue = StarCatalogue.from_stars(_corridor_stars())
+        started = time.perf_counter()
+        systems, details = plot_neutron_route_local("Sol", "Colonia", 40.0, catalogue=catalogue)
+        elapsed = time.perf_counter() - started
+
+        self.assertLess(elapsed, 1.0)
+        self.assertEqual(systems[0], "Sol")
+        self.assertEqual(systems[-1], "Colonia")
+        total = math.dist(SOL, COLONIA)
+        # Prawie same skoki z supercharge: blisko minimum dystans / (4 * zasieg).
+        self.assertLess(len(systems) - 1, total / 160.0 * 1.6)
+        for prev, row in zip(details, details[1:]):
+            reach = 160.0 if prev["neutron"] else 40.0
+            self.assertLessEqual(row["distance"], reach + 0.01)
+        self.assertEqual(details[-1]["remaining"], 0.0)
+
+        rows = normalize_neutron_rows(details)
+        self.assertEqual(len(rows), len(systems))
+        self.assertEqual([row.get("system_name") or row.get("system") for row in rows], systems)
+
+    def test_unreachable_target_returns_empty(self) -> None:
+        catalogue = StarCatalogue.from_stars(
+            [("A", 0.0, 0.0, 0.0, STAR_FIELD), ("B", 500.0, 0.0, 0.0, STAR_FIELD)]
+        )
+        self.assertEqual(plot_neutron_route_local("A", "B", 40.0, catalogue=catalogue), ([], []))
+        self.assertEqual(plot_neutron_route_local("A", "Nowhere", 40.0, catalogue=catalogue), ([], []))
+
+    def test_dump_extraction_keeps_boost_stars_and_samples_field(self) -> None:
+        dump_path = os.path.join(self._tmp.name, "galaxy.json.gz")
+        payload = [
+            {"name": "NS One", "coords": {"x": 1, "y": 2, "z": 3}, "primaryStar": {"type": "Neutron Star"}},
+            {
+                "name": "WD One",
+                "coords": {"x": 4, "y": 5, "z": 6},
+                "bodies": [{"name": "WD One A", "type": "Star", "subType": "White Dwarf (DA) Star", "mainStar": True}],
+            },
+            {
+                "name": "Secondary NS",
+                "coords": {"x": 7, "y": 8, "z": 9},
+                "primaryStar": {"type": "K (Yellow-Orange) Star"},
+                "bodies": [{"name": "Secondary NS B", "subType": "Neutron Star"}],
+            },
+        ]
+        payload += [
+            {"name": f"Field {idx}", "coords": {"x": idx, "y": 0, "z": 0}, "primaryStar": {"type": "M (Red dwarf) Star"}}
+            for idx in range(200)
+        ]
+        with gzip.open(dump_path, "wt", encoding="utf-8") as handle:
+            json.dump(payload, handle)
+
+        out_path = os.path.join(self._tmp.name, "catalogue.bin")
+        result = build_star_catalogue_from_spansh_dump(dump_path, out_path, field_sample_rate=0.25)
+        catalogue = StarCatalogue.load(out_path)
+
+        self.assertEqual(result["neutron"], 1)
+        self.assertEqual(result["white_dwarf"], 1)
+        self.assertEqual(result["systems_processed"], 203)
+        self.assertGreater(result["field"], 20)
+        self.assertLess(result["field"], 90)
+        self.assertEqual(catalogue.kinds[catalogue.find("NS One")], STAR_NEUTRON)
+        self.assertEqual(catalogue.kinds[catalogue.find("WD One")], STAR_WHITE_DWARF)
+
+        again = build_star_catalogue_from_spansh_dump(
+            dump_path, os.path.join(self._tmp.name, "again.bin"), field_sample_rate=0.25
+        )
+        self.assertEqual(again["field"], result["field"])
+
+    def test_oblicz_spansh_falls_back_to_local_catalogue(self) -> None:
+        path = os.path.join(self._tmp.name, "catalogue.bin")
+        StarCatalogue.from_stars(
+            [
+                ("Start", 0.0, 0.0, 0.0, STAR_FIELD),
+                ("Hop", 35.0, 0.0, 0.0, STAR_NEUTRON),
+                ("End", 190.0, 0.0, 0.0, STAR_FIELD),
+            ]
+        ).save(path)
+        config.config._settings["neutron.local_plotter_enabled"] = True
+        config.config._settings["neutron.local_catalogue_path"] = path
+
+        with (
+            patch.object(neutron.client, "neutron_route", return_value=([], [])),
+            patch("logic.neutron.resolve_planner_jump_range", return_value=40.0),
+            patch("logic.neutron.powiedz"),
+            patch("logic.neutron.spansh_error") as error_mock,
+        ):
+            systems, details = neutron.oblicz_spansh_with_details("Start", "End", 40.0, 60.0)
+
+        error_mock.assert_not_called()
+        self.assertEqual(systems, ["Start", "Hop", "End"])
+        self.assertTrue(details[1]["neutron"])
+
+        config.config._settings["neutron.local_plotter_enabled"] = False
+        with (
+            patch.object(neutron.client, "neutron_route", return_value=([], [])),
+            patch("logic.neutron.resolve_planner_jump_range", return_value=40.0),
+            patch("logic.neutron.powiedz"),
+            patch("logic.neutron.spansh_error") as error_mock,
+        ):
+            self.assertEqual(neutron.oblicz_spansh_with_details("Start", "End", 40.0, 60.0), ([], []))
+        error_mock.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
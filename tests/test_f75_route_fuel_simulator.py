@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import config
+from logic.jump_range_engine import clear_jump_range_curve_cache
+from logic.route_fuel_simulator import simulate_route_fuel
+from logic.ship_state import ShipState
+from logic.spansh_client import SpanshClient
+
+
+def _modules_data() -> dict:
+    return {
+        "fsd": [
+            {
+                "class": 5,
+                "rating": "A",
+                "name": "5A Frame Shift Drive",
+                "symbol": "Int_FSD_Size5_Class5",
+                "opt_mass": 1050.0,
+                "max_fuel": 5.0,
+                "fuel_power": 2.45,
+                "fuel_multiplier": 0.012,
+            }
+        ]
+    }
+
+
+def _ship(*, fuel=32.0, cargo=0.0, tank=32.0):
+    return SimpleNamespace(
+        fsd={"class": 5, "rating": "A", "item": "Frame Shift Drive", "engineering": None, "experimental": None},
+        fsd_booster={"bonus_ly": 0.0},
+        unladen_mass_t=400.0,
+        cargo_mass_t=cargo,
+        fuel_main_t=fuel,
+        fuel_reservoir_t=0.0,
+        fuel_capacity_main_t=tank,
+    )
+
+
+def _line_route(hops: int, step_ly: float, **row_fields) -> list[dict]:
+    return [
+        {"system": f"F75 {idx}", "x": idx * step_ly, "y": 0.0, "z": 0.0, **row_fields}
+        for idx in range(hops + 1)
+    ]
+
+
+def _neutron_result() -> dict:
+    # Ksztalt result z /api/results dla neutron plottera: bez klasy gwiazdy
+    # i bez flag tankowania; "jumps" to skoki potrzebne do dojscia do systemu.
+    rows = [
+        ("Sol", 0.0, 0.0, 0.0, 0, 0.0, False),
+        ("Wregoe FS-A d1-2", 74.3, -12.4, -68.9, 3, 102.1, True),
+        ("Col 285 Sector TT-P c6-13", 151.7, -30.2, -141.5, 2, 209.8, True),
+        ("Wregoe HF-Y b17-0", 243.9, -44.8, -229.3, 3, 336.7, True),
+        ("Praea Euq PJ-T c20-5", 332.2, -61.9, -312.4, 3, 460.1, True),
+        ("Praea Euq WZ-Q b22-1", 416.5, -79.0, -395.8, 3, 578.9, True),
+        ("Praea Euq DV-Y e7", 505.1, -95.6, -479.2, 3, 703.1, True),
+        ("Eos Chraea KR-W d1-45", 589.7, -112.3, -561.0, 3, 822.5, False),
+    ]
+    total = rows[-1][5]
+    return {
+        "destination_system": rows[-1][0],
+        "source_system": rows[0][0],
+        "efficiency": 60,
+        "range": 28.5,
+        "total_jumps": sum(row[4] for row in rows),
+        "via": [],
+        "system_jumps": [
+            {
+                "distance_jumped": round(row[5] - (rows[idx - 1][5] if idx else 0.0), 2),
+                "distance_left": round(total - row[5], 2),
+                "id64": 10477373803 + idx,
+                "jumps": row[4],
+                "neutron_star": row[6],
+                "system": row[0],
+                "x": row[1],
+                "y": row[2],
+                "z": row[3],
+            }
+            for idx, row in enumerate(rows)
+        ],
+    }
+
+
+class F75RouteFuelSimulatorTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._orig = config.config._settings.copy()
+        config.config._settings["jump_range_include_reservoir_mass"] = True
+        config.config._settings["jump_range_engineering_enabled"] = True
+        clear_jump_range_curve_cache()
+        self.modules = _modules_data()
+
+    def tearDown(self) -> None:
+        clear_jump_range_curve_cache()
+        config.config._settings = self._orig
+
+    def test_fuel_per_jump_follows_fsd_formula(self) -> None:
+        sim = simulate_route_fuel(_line_route(10, 20.0), ship_state=_ship(), modules_data=self.modules)
+
+        self.assertTrue(sim.ok)
+        self.assertEqual(sim.total_jumps, 10)
+        first = sim.hops[0]
+        expected = 0.012 * (20.0 * (400.0 + 32.0) / 1050.0) ** 2.45
+        self.assertAlmostEqual(first["fuel_used_t"], round(expected, 3), places=3)
+        self.assertGreater(first["range_ly"], 28.0)
+        # Lzejszy statek pali mniej na kolejnych skokach.
+        self.assertLess(sim.hops[-1]["fuel_used_t"], first["fuel_used_t"])
+        self.assertAlmostEqual(sim.fuel_used_t, sum(row["fuel_used_t"] for row in sim.hops), places=2)
+
+    def test_route_without_scoopable_stars_runs_dry(self) -> None:
+        sim = simulate_route_fuel(
+            _line_route(20, 25.0, star_class="N"),
+            ship_state=_ship(fuel=12.0),
+            modules_data=self.modules,
+        )
+
+        self.assertFalse(sim.ok)
+        self.assertIsNotNone(sim.runs_dry_at)
+        self.assertEqual(sim.runs_dry_system, f"F75 {sim.runs_dry_at + 1}")
+        self.assertFalse(sim.hops[-1]["ok"])
+        self.assertEqual(sim.refuel_points, [])
+
+    def test_scoopable_stars_become_refuel_points(self) -> None:
+        sim = simulate_route_fuel(
+            _line_route(20, 25.0, star_class="K"),
+            ship_state=_ship(fuel=12.0),
+            modules_data=self.modules,
+            refuel_threshold=0.5,
+        )
+
+        self.assertTrue(sim.ok)
+        self.assertTrue(sim.refuel_points)
+        refuel_row = next(row for row in sim.hops if row["refuel"])
+        self.assertEqual(refuel_row["fuel_after_t"], 32.0)
+        self.assertGreater(refuel_row["scooped_t"], 0.0)
+
+    def test_spansh_neutron_details_without_star_data_do_not_report_shortage(self) -> None:
+        client = SpanshClient()
+        with patch.object(SpanshClient, "route", return_value=_neutron_result()):
+            systems, details = client.neutron_route("Sol", "Eos Chraea KR-W d1-45", 28.5, 60, return_details=True)
+
+        self.assertEqual(len(systems), 8)
+        self.assertIsNone(details[1]["scoopable"])
+        self.assertIsNone(details[1]["star_class"])
+        self.assertTrue(details[1]["neutron"])
+
+        sim = simulate_route_fuel(details, ship_state=_ship(fuel=12.0), modules_data=self.modules)
+        # Scoopowalnosc nieznana != nie-scoopowalna: bez falszywego braku paliwa.
+        self.assertTrue(sim.ok)
+        self.assertIsNone(sim.runs_dry_at)
+        self.assertTrue(sim.fuel_unknown)
+        self.assertEqual(sim.refuel_points, [])
+        self.assertTrue(any(row["refuel_assumed"] for row in sim.hops))
+
+    def test_multi_jump_hop_tops_up_between_listed_systems(self) -> None:
+        route = [
+            {"system": "A", "x": 0.0, "y": 0.0, "z": 0.0, "star_class": "N"},
+            {"system": "B", "x": 200.0, "y": 0.0, "z": 0.0, "star_class": "N"},
+        ]
+        sim = simulate_route_fuel(route, ship_state=_ship(fuel=6.0), modules_data=self.modules)
+
+        self.assertTrue(sim.ok)
+        self.assertGreater(sim.hops[0]["jumps"], 1)
+        self.assertTrue(sim.hops[0]["refuel_assumed"])
+        self.assertGreater(sim.hops[0]["scooped_t"], 0.0)
+        self.assertTrue(sim.fuel_unknown)
+
+    def test_spansh_refuel_and_scoopable_fields_reach_the_simulation(self) -> None:
+        payload = _neutron_result()
+        for entry in payload["system_jumps"]:
+            entry["is_scoopable"] = entry["system"].startswith("Praea")
+        client = SpanshClient()
+        with patch.object(SpanshClient, "route", return_value=payload):
+            _systems, details = client.neutron_route("Sol", "Eos Chraea KR-W d1-45", 28.5, 60, return_details=True)
+
+        self.assertIs(details[4]["scoopable"], True)
+        self.assertIs(details[1]["scoopable"], False)
+        sim = simulate_route_fuel(details, ship_state=_ship(fuel=12.0), modules_data=self.modules)
+        self.assertTrue(set(sim.refuel_points) <= {"Praea Euq PJ-T c20-5", "Praea Euq WZ-Q b22-1", "Praea Euq DV-Y e7"})
+        self.assertTrue(sim.refuel_points)
+
+    def test_neutron_supercharge_and_multi_jump_hops(self) -> None:
+        route = [
+            {"system": "Start", "x": 0.0, "y": 0.0, "z": 0.0, "neutron": True},
+            {"system": "Boosted", "x": 100.0, "y": 0.0, "z": 0.0, "neutron": True},
+            {"system": "Far", "x": 250.0, "y": 0.0, "z": 0.0, "neutron": False},
+        ]
+        sim = simulate_route_fuel(route, ship_state=_ship(), modules_data=self.modules)
+
+        self.assertTrue(sim.ok)
+        self.assertEqual(sim.hops[0]["jumps"], 1)
+        self.assertEqual(sim.hops[0]["boost"], 4.0)
+        # 150 ly: jeden skok z supercharge (~114 ly) i jeszcze dwa zwykle.
+        self.assertEqual(sim.hops[1]["jumps"], 3)
+        self.assertEqual(sim.total_jumps, 4)
+
+    def test_thousand_hops_simulate_fast_and_follow_live_fuel(self) -> None:
+        route = _line_route(1000, 20.0, star_class="G")
+        started = time.perf_counter()
+        sim = simulate_route_fuel(route, ship_state=_ship(), modules_data=self.modules)
+        elapsed = time.perf_counter() - started
+
+        self.assertTrue(sim.ok)
+        self.assertEqual(len(sim.hops), 1000)
+        self.assertLess(elapsed, 0.25)
+
+        ship = _ship(fuel=32.0)
+        full = simulate_route_fuel(route[:5], ship_state=ship, modules_data=self.modules)
+        ship.fuel_main_t = 1.0
+        low = simulate_route_fuel(route[:5], ship_state=ship, modules_data=self.modules)
+        self.assertEqual(full.hops[0]["fuel_before_t"], 32.0)
+        self.assertEqual(low.hops[0]["fuel_before_t"], 1.0)
+        # 1 t nie starczy nawet na pierwszy odcinek 20 ly.
+        self.assertFalse(low.ok)
+        self.assertEqual(low.runs_dry_at, 0)
+
+    def test_missing_inputs_and_loadout_fuel_capacity(self) -> None:
+        self.assertEqual(
+            simulate_route_fuel(_line_route(2, 10.0), ship_state=_ship(), modules_data={"fsd": []}).error,
+            "missing_jump_range_curve",
+        )
+        self.assertEqual(
+            simulate_route_fuel([{"system": "A"}, {"system": "B"}], ship_state=_ship(), modules_data=self.modules).error,
+            "missing_coords",
+        )
+
+        ship = ShipState()
+        with (
+            patch("logic.ship_state.MSG_QUEUE"),
+            patch.object(ShipState, "recompute_jump_range"),
+        ):
+            ship.update_from_loadout({"ShipID": 7, "FuelCapacity": {"Main": 64.0, "Reserve": 0.77}})
+        self.assertEqual(ship.fuel_capacity_main_t, 64.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
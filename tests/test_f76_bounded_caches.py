@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import copy
+import json
+import time
+import unittest
+
+import config
+from logic.events import cash_in_assistant
+from logic.utils import edsm_client
+from logic.utils.bounded_cache import BoundedCache, FrozenList, FrozenRow, cache_stats, freeze
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class F76BoundedCachesTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._orig = config.config._settings.copy()
+        self.clock = _Clock()
+
+    def tearDown(self) -> None:
+        config.config._settings = self._orig
+        cash_in_assistant._reset_cash_in_swr_cache_for_tests()
+        cash_in_assistant._reset_cash_in_local_known_cache_for_tests()
+
+    def _cache(self, **kwargs) -> BoundedCache:
+        kwargs.setdefault("ttl_sec", 60.0)
+        kwargs.setdefault("max_items", 4)
+        return BoundedCache("f76.test", clock=self.clock, register=False, **kwargs)
+
+    def test_ttl_expiry_and_lru_eviction(self) -> None:
+        cache = self._cache()
+        for idx in range(4):
+            cache.set(f"k{idx}", idx)
+        self.assertEqual(cache.get("k0"), 0)  # k0 swiezo uzyty - k1 najstarszy
+        cache.set("k4", 4)
+        self.assertNotIn("k1", cache)
+        self.assertIn("k0", cache)
+
+        self.clock.now += 30.0
+        cache.set("late", "x")
+        self.clock.now += 31.0
+        self.assertIsNone(cache.get("k0"))
+        self.assertEqual(cache.get_entry("late"), (31.0, "x"))
+        stats = cache.stats()
+        self.assertEqual(stats["evicted_lru"], 2)
+        self.assertEqual(stats["expired"], 3)
+        self.assertEqual(stats["items"], 1)
+
+    def test_overwrite_keeps_new_expiry_and_heap_stays_bounded(self) -> None:
+        cache = self._cache(max_items=8)
+        for _ in range(500):
+            cache.set("hot", 1, ttl_sec=10.0)
+            self.clock.now += 1.0
+        self.assertEqual(cache.get("hot"), 1)
+        self.assertLessEqual(len(cache._expiry_heap), 4 * 16 + 1)
+
+    def test_memory_budget_evicts_oldest(self) -> None:
+        cache = self._cache(max_items=100, max_bytes=20_000)
+        for idx in range(50):
+            cache.set(idx, [{"name": f"Station {idx}-{n}", "dist": n} for n in range(10)])
+        stats = cache.stats()
+        self.assertGreater(stats["evicted_budget"], 0)
+        self.assertLessEqual(stats["bytes"], 20_000)
+        self.assertIn(49, cache)
+        self.assertNotIn(0, cache)
+
+    def test_frozen_rows_are_shared_and_read_only(self) -> None:
+        cache = self._cache()
+        stored = cache.set("rows", [{"name": "Jameson", "services": ["dock", "market"]}])
+        self.assertIs(cache.get("rows"), stored)
+        row = stored[0]
+        self.assertIsInstance(row, FrozenRow)
+        self.assertIsInstance(row["services"], FrozenList)
+        self.assertIsInstance(row["services"], list)
+        with self.assertRaises(TypeError):
+            row["name"] = "x"
+        with self.assertRaises(TypeError):
+            row["services"].append("x")
+        with self.assertRaises(TypeError):
+            stored.append({})
+
+        editable = copy.deepcopy(row)
+        editable["services"].append("x")
+        self.assertEqual(type(editable), dict)
+        self.assertEqual(json.loads(json.dumps(stored)), [{"name": "Jameson", "services": ["dock", "market"]}])
+        self.assertEqual(freeze(("a", ["b"])), ("a", ["b"]))
+
+    def test_edsm_nearby_cache_hit_shares_rows_and_reports_stats(self) -> None:
+        edsm_client._NEARBY_SYSTEMS_CACHE.clear()
+        edsm_client._nearby_systems_cache_set("f76", [{"name": "Sol", "distance": 0.0}, "junk"])
+        first = edsm_client._nearby_systems_cache_get("f76")
+        second = edsm_client._nearby_systems_cache_get("f76")
+        self.assertIs(first[0], second[0])
+        self.assertEqual(len(first), 1)
+        self.assertIn("edsm.nearby_systems", cache_stats())
+        self.assertGreaterEqual(cache_stats()["edsm.nearby_systems"]["hits"], 2)
+        edsm_client._NEARBY_SYSTEMS_CACHE.clear()
+
+    def test_swr_snapshot_fresh_stale_expired(self) -> None:
+        config.config._settings["cash_in.swr_cache_enabled"] = True
+        config.config._settings["cash_in.swr_cache_fresh_ttl_sec"] = 0.02
+        config.config._settings["cash_in.swr_cache_stale_ttl_sec"] = 0.08
+        cash_in_assistant._reset_cash_in_swr_cache_for_tests()
+        cash_in_assistant._store_swr_snapshot(
+            cache_key="f76",
+            candidates=[{"name": "Jameson Memorial", "system_name": "Shinrarta Dezhra", "services": {"has_uc": True}}],
+            source_status="providers",
+            service="uc",
+            radius_ly=50.0,
+            max_systems=10,
+        )
+        fresh = cash_in_assistant._load_swr_snapshot(cache_key="f76")
+        self.assertEqual(fresh["status"], "FRESH")
+        self.assertEqual(fresh["entry"]["candidates"][0]["name"], "Jameson Memorial")
+        time.sleep(0.04)
+        self.assertEqual(cash_in_assistant._load_swr_snapshot(cache_key="f76")["status"], "STALE")
+        time.sleep(0.06)
+        self.assertEqual(cash_in_assistant._load_swr_snapshot(cache_key="f76")["status"], "EXPIRED")
+        self.assertEqual(cash_in_assistant._load_swr_snapshot(cache_key="f76")["status"], "MISSING")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import random
+import unittest
+from dataclasses import astuple
+from unittest.mock import patch
+
+import pandas as pd
+
+import config
+from app.state import app_state
+from logic import cargo_value_estimator, value_at_risk
+from logic.events import combat_awareness, survival_rebuy_awareness
+from logic.exit_summary import ExitSummaryGenerator
+from logic.system_value_engine import SystemValueEngine
+
+
+def _science_data():
+    exobio_df = pd.DataFrame(
+        [
+            {
+                "Species_Name": "Aleoida Arcus",
+                "Base_Value": 7_252_500.0,
+                "First_Discovery_Bonus": 7_252_500.0,
+                "Total_First_Footfall": 36_262_500.0,
+            }
+        ]
+    )
+    carto_df = pd.DataFrame(
+        [
+            {
+                "Body_Type": "Water World",
+                "Terraformable": "Yes",
+                "FSS_Base_Value": 1_000_000.0,
+                "DSS_Mapped_Value": 1_500_000.0,
+                "First_Discovery_Mapped_Value": 3_000_000.0,
+            },
+            {
+                "Body_Type": "High Metal Content Planet",
+                "Terraformable": "Yes",
+                "FSS_Base_Value": 700_000.0,
+                "DSS_Mapped_Value": 1_000_000.0,
+                "First_Discovery_Mapped_Value": 2_000_000.0,
+            },
+        ]
+    )
+    return exobio_df, carto_df
+
+
+def _reference_snapshot(system_name: str) -> tuple:
+    """Stara, niecachowana wersja _value_snapshot() z modulow awareness."""
+    session_value = system_value = cargo_tons = exploration_value = exobio_value = 0.0
+    cargo_floor_cr = cargo_expected_cr = 0.0
+    totals = app_state.system_value_engine.calculate_totals() or {}
+    session_value = float(totals.get("total") or 0.0)
+    exobio_value = float(totals.get("c_exobiology") or 0.0)
+    exploration_value = max(0.0, float(totals.get("c_cartography") or 0.0) + float(totals.get("bonus_discovery") or 0.0))
+    system = system_name or str(getattr(app_state, "current_system", "") or "").strip()
+    if system:
+        data = app_state.exit_summary.build_summary_data(system_name=system)
+        if data is not None:
+            system_value = float(getattr(data, "total_value", 0.0) or 0.0)
+    cargo_tons = float(getattr(app_state.ship_state, "cargo_mass_t", 0.0) or 0.0)
+    estimate = cargo_value_estimator.estimate_cargo_value(cargo_tons=cargo_tons)
+    cargo_tons = max(cargo_tons, float(estimate.cargo_tons))
+    cargo_floor_cr = float(estimate.cargo_floor_cr)
+    cargo_expected_cr = float(estimate.cargo_expected_cr)
+    return (
+        max(0.0, session_value),
+        max(0.0, system_value),
+        max(0.0, cargo_tons),
+        max(0.0, exploration_value),
+        max(0.0, exobio_value),
+        max(0.0, cargo_floor_cr),
+        max(0.0, cargo_expected_cr),
+        str(estimate.confidence or "LOW").upper(),
+        str(estimate.source or "fallback").lower(),
+    )
+
+
+def _scan(system: str, idx: int) -> dict:
+    return {
+        "event": "Scan",
+        "StarSystem": system,
+        "BodyName": f"{system} {idx}",
+        "PlanetClass": "Water world" if idx % 2 else "High metal content body",
+        "TerraformState": "Terraformable",
+        "WasDiscovered": False,
+        "WasMapped": False,
+    }
+
+
+class F77ValueAtRiskSnapshotTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._orig = config.config._settings.copy()
+        self._saved = {
+            name: getattr(app_state, name, None)
+            for name in ("system_value_engine", "exit_summary", "current_system")
+        }
+        self._saved_cargo = getattr(app_state.ship_state, "cargo_mass_t", None)
+        self.engine = SystemValueEngine(_science_data())
+        app_state.system_value_engine = self.engine
+        app_state.exit_summary = ExitSummaryGenerator(self.engine)
+        app_state.current_system = "F77 Alpha"
+        app_state.ship_state.cargo_mass_t = 0.0
+        cargo_value_estimator.reset_runtime()
+        value_at_risk._reset_value_at_risk_for_tests()
+        survival_rebuy_awareness.reset_survival_rebuy_state()
+        combat_awareness.reset_combat_awareness_state()
+
+    def tearDown(self) -> None:
+        for name, value in self._saved.items():
+            setattr(app_state, name, value)
+        app_state.ship_state.cargo_mass_t = self._saved_cargo
+        cargo_value_estimator.reset_runtime()
+        value_at_risk._reset_value_at_risk_for_tests()
+        survival_rebuy_awareness.reset_survival_rebuy_state()
+        combat_awareness.reset_combat_awareness_state()
+        config.config._settings = self._orig
+
+    def test_status_ticks_recompute_only_on_version_change(self) -> None:
+        rng = random.Random(77)
+        calls = {"n": 0}
+        real_totals = self.engine.calculate_totals
+
+        def _counting_totals():
+            calls["n"] += 1
+            return real_totals()
+
+        versions = set()
+        with (
+            patch.object(self.engine, "calculate_totals", side_effect=_counting_totals),
+            patch("logic.events.survival_rebuy_awareness.emit_insight"),
+            patch("logic.events.combat_awareness.emit_insight"),
+        ):
+            for tick in range(10_000):
+                if tick % 1000 == 0:
+                    self.engine.analyze_scan_event(_scan("F77 Alpha", tick))
+                versions.add(self.engine.version)
+                status = {
+                    "StarSystem": "F77 Alpha",
+                    "Hull": rng.choice((1.0, 0.9, 0.5, 0.2)),
+                    "Flags": rng.choice((0, 1 << 22)),
+                    "Balance": 1_000_000,
+                }
+                survival_rebuy_awareness.handle_status_update(status, gui_ref=None)
+                combat_awareness.handle_status_update(status, gui_ref=None)
+
+        self.assertEqual(calls["n"], len(versions))
+        stats = value_at_risk.snapshot_stats()
+        self.assertEqual(stats["misses"], len(versions))
+        self.assertGreater(stats["hits"], 10_000)
+
+    def test_cached_snapshot_matches_uncached_reference_across_replay(self) -> None:
+        journal = []
+        for idx in range(6):
+            journal.append(("scan", _scan("F77 Alpha", idx)))
+        journal.append(("organic", {"event": "ScanOrganic", "StarSystem": "F77 Alpha", "Body": "F77 Alpha 1", "Species_Localised": "Aleoida Arcus"}))
+        journal.append(("cargo", {"Inventory": [{"Name": "gold", "Count": 12}, {"Name": "painite", "Count": 4}]}))
+        journal.append(("tons", 16.0))
+        journal.append(("market", {"Items": [{"Name": "Gold", "SellPrice": 50_000, "MeanPrice": 47_000}]}))
+        journal.append(("jump", "F77 Beta"))
+        for idx in range(3):
+            journal.append(("scan", _scan("F77 Beta", idx)))
+        journal.append(("sell", "F77 Alpha"))
+        journal.append(("tons", 30.0))
+        journal.append(("config", 35_000.0))
+        journal.append(("jump", "F77 Alpha"))
+
+        for kind, payload in journal:
+            if kind == "scan":
+                self.engine.analyze_scan_event(payload)
+            elif kind == "organic":
+                self.engine.analyze_biology_event(payload)
+            elif kind == "cargo":
+                cargo_value_estimator.update_cargo_snapshot(payload)
+            elif kind == "market":
+                cargo_value_estimator.update_market_snapshot(payload)
+            elif kind == "tons":
+                app_state.ship_state.cargo_mass_t = payload
+            elif kind == "jump":
+                app_state.current_system = payload
+            elif kind == "sell":
+                self.engine.clear_value_domain(domain="all", system_name=payload)
+            elif kind == "config":
+                config.config._settings["risk.cargo.default_unit_price_cr"] = payload
+            for _ in range(3):
+                snapshot = value_at_risk.get_snapshot()
+                self.assertEqual(astuple(snapshot), _reference_snapshot(""), kind)
+
+        self.assertGreater(value_at_risk.get_snapshot().session_value, 0.0)
+
+    def test_subscribers_fire_only_on_real_change(self) -> None:
+        seen = []
+        unsubscribe = value_at_risk.subscribe(seen.append)
+        try:
+            value_at_risk.get_snapshot()
+            value_at_risk.get_snapshot()
+            self.assertEqual(len(seen), 1)
+            self.engine.analyze_discovery_meta_event({"event": "FSSDiscoveryScan", "StarSystem": "F77 Alpha"})
+            value_at_risk.get_snapshot()
+            self.assertEqual(len(seen), 1)  # nowa wersja, ta sama wartosc
+            self.engine.analyze_scan_event(_scan("F77 Alpha", 1))
+            value_at_risk.get_snapshot()
+            self.assertEqual(len(seen), 2)
+            self.assertGreater(seen[-1].session_value, 0.0)
+        finally:
+            unsubscribe()
+        self.engine.analyze_scan_event(_scan("F77 Alpha", 2))
+        value_at_risk.get_snapshot()
+        self.assertEqual(len(seen), 2)
+
+    def test_engine_without_version_is_never_cached(self) -> None:
+        from types import SimpleNamespace
+
+        values = iter((1_000.0, 2_000.0))
+        app_state.system_value_engine = SimpleNamespace(calculate_totals=lambda: {"total": next(values)})
+        self.assertEqual(value_at_risk.get_snapshot().session_value, 1_000.0)
+        self.assertEqual(value_at_risk.get_snapshot().session_value, 2_000.0)
+        self.assertEqual(value_at_risk.snapshot_stats()["hits"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import queue
+import random
+import unittest
+from unittest.mock import patch
+
+import config
+from app.state import app_state
+from logic import jump_range_engine
+from logic.jump_range_engine import clear_jump_range_curve_cache, compute_jump_range_current
+from logic.ship_state import ShipState
+
+
+def _modules_data() -> dict:
+    return {
+        "fsd": [
+            {
+                "class": 5,
+                "rating": "A",
+                "name": "5A Frame Shift Drive",
+                "symbol": "Int_FSD_Size5_Class5",
+                "opt_mass": 1050.0,
+                "max_fuel": 5.0,
+                "fuel_power": 2.45,
+                "fuel_multiplier": 0.012,
+            }
+        ]
+    }
+
+
+def _ship() -> ShipState:
+    ship = ShipState(
+        ship_id=7,
+        ship_type="asp",
+        unladen_mass_t=330.0,
+        cargo_mass_t=0.0,
+        fuel_main_t=32.0,
+        fuel_reservoir_t=0.63,
+        fuel_capacity_main_t=32.0,
+    )
+    ship.fsd = {
+        "present": True,
+        "class": 5,
+        "rating": "A",
+        "item": "Frame Shift Drive",
+        "engineering": None,
+        "experimental": None,
+    }
+    ship.fsd_booster = {"present": False, "class": None, "bonus_ly": 0.0, "item": ""}
+    ship.fit_ready_for_jr = True
+    return ship
+
+
+def _payloads(q: queue.Queue) -> list:
+    out = []
+    while True:
+        try:
+            kind, payload = q.get_nowait()
+        except queue.Empty:
+            return out
+        if kind == "ship_state":
+            out.append(payload)
+
+
+class F78ShipStateJumpRangeMemoTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._orig = config.config._settings.copy()
+        self._saved = (getattr(app_state, "modules_data", None), getattr(app_state, "modules_data_loaded", False))
+        config.config._settings["jump_range_engine_enabled"] = True
+        config.config._settings["jump_range_compute_on"] = "both"
+        config.config._settings["jump_range_include_reservoir_mass"] = True
+        config.config._settings["jump_range_rounding"] = 2
+        config.config._settings["ship_state_emit_max_per_sec"] = 4.0
+        self.modules = _modules_data()
+        app_state.modules_data = self.modules
+        app_state.modules_data_loaded = True
+        clear_jump_range_curve_cache()
+        self.queue: queue.Queue = queue.Queue()
+        self._patches = [
+            patch("logic.ship_state.MSG_QUEUE", self.queue),
+            patch.object(ShipState, "_emit_jump_range_status"),
+        ]
+        for item in self._patches:
+            item.start()
+
+    def tearDown(self) -> None:
+        for item in reversed(self._patches):
+            item.stop()
+        app_state.modules_data, app_state.modules_data_loaded = self._saved
+        clear_jump_range_curve_cache()
+        config.config._settings = self._orig
+
+    def _scooping_ticks(self, ship: ShipState, ticks: int) -> None:
+        """20 min Status.json @ 5 Hz: dryf rezerwuaru, skoki i dolewanie ze slonca."""
+        rng = random.Random(78)
+        main = 32.0
+        reservoir = 0.63
+        for tick in range(ticks):
+            if tick % 1500 == 300:
+                main -= 2.0  # skok
+            elif main < 32.0:
+                main = min(32.0, main + 0.01)  # scooping
+            reservoir -= 0.0004
+            if reservoir < 0.5:
+                reservoir = 0.63
+                main -= 0.13
+            jitter = rng.choice((0.0, 0.0005, -0.0005))
+            ship.update_from_status_json(
+                {"Fuel": {"FuelMain": round(main, 4), "FuelReservoir": round(reservoir + jitter, 4)}}
+            )
+
+    def test_scooping_session_cuts_engine_calls_and_settles_exactly(self) -> None:
+        ship = _ship()
+        ship.recompute_jump_range("loadout")
+        ticks = 6000
+        with patch.object(
+            jump_range_engine,
+            "compute_jump_range_current",
+            wraps=jump_range_engine.compute_jump_range_current,
+        ) as engine_call:
+            self._scooping_ticks(ship, ticks)
+            ship.flush_pending_update(force=True)
+
+        self.assertLess(engine_call.call_count, ticks * 0.10)
+        stats = ship.get_jump_range_stats()
+        self.assertGreater(stats["cache_hits"], ticks * 0.9)
+        self.assertGreater(stats["suppressed_emits"], 0)
+
+        payloads = _payloads(self.queue)
+        self.assertLess(len(payloads), ticks * 0.10)
+        final = payloads[-1]
+        uncached = compute_jump_range_current(ship, self.modules)
+        self.assertTrue(uncached.ok)
+        self.assertEqual(final["jump_range_current_ly"], uncached.jump_range_ly)
+        self.assertEqual(final["fuel_main_t"], ship.fuel_main_t)
+        self.assertEqual(final["fuel_reservoir_t"], ship.fuel_reservoir_t)
+
+    def test_completeness_flip_is_emitted_immediately(self) -> None:
+        ship = _ship()
+        ship.fuel_reservoir_t = None
+        ship.recompute_jump_range("loadout")
+        ship._emit_update()
+        _payloads(self.queue)
+        ship._emit_last_mono = 0.0
+        ship.update_from_status_json({"Fuel": {"FuelMain": 32.0, "FuelReservoir": 0.6}})
+        payloads = _payloads(self.queue)
+        self.assertEqual(len(payloads), 1)
+        self.assertTrue(all(payloads[0]["completeness"].values()))
+        self.assertIsNotNone(payloads[0]["jump_range_current_ly"])
+
+    def test_loadout_change_invalidates_memo(self) -> None:
+        config.config._settings["ship_state_debug"] = True
+        ship = _ship()
+        ship.recompute_jump_range("loadout")
+        ship.update_from_status_json({"Fuel": {"FuelMain": 31.0, "FuelReservoir": 0.6}})
+        ship.update_from_status_json({"Fuel": {"FuelMain": 31.001, "FuelReservoir": 0.6}})
+        self.assertEqual(ship.jump_range_cache_hits, 1)
+        before = ship.jump_range_current_ly
+        computes = ship.jump_range_computes
+
+        ship.fsd_booster = {"present": True, "class": 3, "bonus_ly": 7.75, "item": "guardian fsd booster"}
+        ship.recompute_jump_range("loadout")
+        self.assertEqual(ship.jump_range_computes, computes + 1)
+        self.assertAlmostEqual(ship.jump_range_current_ly, before + 7.75, places=1)
+        self.assertEqual(len(ship._jr_memo), 1)
+        logs = [item[1] for item in list(self.queue.queue) if item[0] == "log"]
+        self.assertTrue(any("JR cache: loadout changed" in line for line in logs))
+
+        ship.update_from_status_json({"Fuel": {"FuelMain": 31.0, "FuelReservoir": 0.6}})
+        self.assertEqual(
+            ship.jump_range_current_ly,
+            compute_jump_range_current(ship, self.modules).jump_range_ly,
+        )
+        ship.flush_pending_update(force=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import hashlib
+import random
+import unittest
+from typing import Any, Dict, List, Optional, Tuple
+
+from logic.tts import text_preprocessor
+from logic.tts.text_preprocessor import ALLOWED_MESSAGES, prepare_tts, warm_cache
+
+_CORPUS_SIZE = 5000
+_CORPUS_SEED = 4343
+
+_SYSTEM_BASES = (
+    "Col 285 Sector",
+    "Synuefe",
+    "HIP",
+    "Praea Euq",
+    "Shinrarta Dezhra",
+    "Wregoe",
+    "Eol Prou",
+    "Sol",
+    "Ćwierć_Drogi",
+    "Kraków/Nowa",
+    "Å‚odź",
+    "Ĺ›wiat",
+)
+_WORDS = (
+    "Rozwaz",
+    "ladunek",
+    "okolo",
+    "Nastepny",
+    "trase",
+    "pewnosc",
+    "Dane",
+    "warte",
+    "system",
+    "sprawdz",
+    "Å‚adunek",
+    "Ä…",
+    "â€ž",
+    "cel",
+    "teraz,",
+    "albo",
+    "pozniej",
+)
+_PUNCT = (".", "?", "!", ";", "...", " . ", "; .", ";;", " ;", ",", "", " ", "  ")
+
+
+def _grouped(rng: random.Random, value: int) -> str:
+    sep = rng.choice((",", " ", " ", " ", ".", "'", ""))
+    text = f"{value:,}"
+    return text.replace(",", sep)
+
+
+def _system(rng: random.Random) -> str:
+    base = rng.choice(_SYSTEM_BASES)
+    letters = "ABCDEFGHXYZ"
+    suffix = rng.choice(
+        (
+            "",
+            f" {rng.choice(letters)}{rng.choice(letters)}-{rng.choice(letters)} "
+            f"d{rng.randint(1, 200)}-{rng.randint(0, 999)}",
+            f" {rng.randint(1, 99999)}",
+            f"-{rng.randint(1, 9)}{rng.choice('abc')}",
+            f"_{rng.randint(1, 20)}",
+            f"  {rng.choice(letters)}{rng.randint(1, 9)}",
+        )
+    )
+    return base + suffix
+
+
+def _number_phrase(rng: random.Random) -> str:
+    kind = rng.randrange(7)
+    if kind == 0:
+        return f"{_grouped(rng, rng.randint(0, 9_999_999_999))} {rng.choice(('Cr', 'CR', 'cr'))}"
+    if kind == 1:
+        return f"{rng.randint(0, 100)}{rng.choice(('', ',5', '.25'))}{rng.choice(('%', ' %'))}"
+    if kind == 2:
+        return f"{rng.randint(0, 500)}{rng.choice(('', '.9', ',75'))} {rng.choice(('LY', 'ly'))}"
+    if kind == 3:
+        return f"{rng.randint(0, 999)}.{rng.randint(0, 99)}"
+    if kind == 4:
+        return _grouped(rng, rng.randint(0, 2_000_000_000))
+    if kind == 5:
+        return f"{rng.randint(1, 9)};.{rng.randint(1, 9)}"
+    return str(rng.randint(0, 10**13))
+
+
+def _raw_text(rng: random.Random) -> str:
+    parts: List[str] = []
+    for _ in range(rng.randint(1, 8)):
+        roll = rng.random()
+        if roll < 0.45:
+            parts.append(rng.choice(_WORDS))
+        elif roll < 0.8:
+            parts.append(_number_phrase(rng))
+        else:
+            parts.append(rng.choice(_PUNCT))
+    return rng.choice((" ", "", " ; ")).join(parts) + rng.choice(_PUNCT)
+
+
+def _maybe(rng: random.Random, value: Any, chance: float = 0.6) -> Any:
+    return value if rng.random() < chance else rng.choice((None, "", "  "))
+
+
+def _context(rng: random.Random) -> Optional[Dict[str, Any]]:
+    if rng.random() < 0.05:
+        return None
+    ctx: Dict[str, Any] = {
+        "risk_status": "RISK_LOW",
+        "confidence": rng.choice(("high", "low")),
+    }
+    if rng.random() < 0.5:
+        ctx["raw_text"] = _maybe(rng, _raw_text(rng), 0.8)
+    for key in ("system", "target", "next_target"):
+        if rng.random() < 0.7:
+            ctx[key] = _maybe(rng, _system(rng))
+    if rng.random() < 0.5:
+        ctx["station"] = _maybe(rng, f"{rng.choice(_SYSTEM_BASES)}  {rng.choice(('Port', 'Hub', 'Ring'))}")
+    if rng.random() < 0.5:
+        ctx["body"] = _maybe(rng, f"{_system(rng)} {rng.choice(('A 1', 'B 3 a', 'AB 12'))}")
+    if rng.random() < 0.6:
+        ctx["percent"] = rng.choice((rng.randint(0, 100), str(rng.randint(0, 100)), 42.7, "abc", None, True))
+    if rng.random() < 0.5:
+        ctx["milestone_phase"] = rng.choice(("boost", "BOOST", "cel", "", None))
+    if rng.random() < 0.3:
+        ctx["version"] = rng.choice(("v1.2.3", "", None, 1, 1.0, True, "wersja 5.12"))
+    return ctx
+
+
+def _corpus() -> List[Tuple[str, Optional[Dict[str, Any]]]]:
+    rng = random.Random(_CORPUS_SEED)
+    message_ids = sorted(ALLOWED_MESSAGES) + ["MSG.UNKNOWN_F79"]
+    return [(message_ids[idx % len(message_ids)], _context(rng)) for idx in range(_CORPUS_SIZE)]
+
+
+def _digests(outputs: List[Tuple[str, Optional[str]]]) -> Dict[str, str]:
+    grouped: Dict[str, List[str]] = {}
+    for message_id, text in outputs:
+        grouped.setdefault(message_id, []).append(repr(text))
+    return {
+        message_id: hashlib.sha256("\n".join(rows).encode("utf-8")).hexdigest()[:16]
+        for message_id, rows in sorted(grouped.items())
+    }
+
+
+# Skroty wyjsc prepare_tts() sprzed przebudowy na skompilowany pipeline
+# (per message_id, korpus _corpus()). Zmiana szablonow = swiadoma regeneracja.
+_GOLDEN_DIGESTS: Dict[str, str] = {
+    "MSG.BIO_SIGNALS_HIGH": "934b8b5d7b905fb3",
+    "MSG.BODY_NO_PREV_DISCOVERY": "db233ee617c3012a",
+    "MSG.CASH_IN_ASSISTANT": "9423906d18968423",
+    "MSG.CASH_IN_STARTJUMP": "dd1142488b56be1d",
+    "MSG.COMBAT_AWARENESS_CRITICAL": "2bbcc2b10193b601",
+    "MSG.COMBAT_AWARENESS_HIGH": "71a49e93887038d5",
+    "MSG.DOCKED": "98b63d32455b2420",
+    "MSG.DSS_COMPLETED": "4e839277e36e9698",
+    "MSG.DSS_PROGRESS": "a8d9e0a207870dee",
+    "MSG.DSS_TARGET_HINT": "58ec159c584b4bbb",
+    "MSG.ELW_DETECTED": "221d5891115d39db",
+    "MSG.EXOBIO_NEW_ENTRY": "d1d84a23a2a875bf",
+    "MSG.EXOBIO_RANGE_READY": "ba1c2519588c2a4d",
+    "MSG.EXOBIO_SAMPLE_LOGGED": "c203b91d1f4d959a",
+    "MSG.EXOBIO_SPECIES_COMPLETE": "3a781adc73c63ad9",
+    "MSG.EXPLORATION_AWARENESS_SUMMARY": "7f81510a3e70d99e",
+    "MSG.EXPLORATION_SYSTEM_SUMMARY": "cef34dd865adc41e",
+    "MSG.FIRST_DISCOVERY": "d0104ad9f77037db",
+    "MSG.FIRST_DISCOVERY_OPPORTUNITY": "28e5ba557b1ae789",
+    "MSG.FIRST_MAPPED": "a4dd615e65bea973",
+    "MSG.FOOTFALL": "aa8fa7e794784fa6",
+    "MSG.FSS_BODYCOUNT_SYNCED": "958b922fdb2c79ff",
+    "MSG.FSS_LAST_BODY": "5b2348ecfbd3ee69",
+    "MSG.FSS_PASSIVE_DATA_INGESTED": "a9153162bb7e37df",
+    "MSG.FSS_PASSIVE_DATA_OFFLINE_MAP": "aadff80482beba7a",
+    "MSG.FSS_PASSIVE_SYSTEM_COMPLETE": "aa12bd8dff331b48",
+    "MSG.FSS_PROGRESS_25": "7a686bd64d219f03",
+    "MSG.FSS_PROGRESS_50": "c9dce17b432c9244",
+    "MSG.FSS_PROGRESS_75": "6217057915cfaf7b",
+    "MSG.FSS_SIGNALS_COMPLETE_PENDING_CLASSIFY": "0f8afa87fcab46c1",
+    "MSG.FUEL_CRITICAL": "716025e78329ec33",
+    "MSG.HIGH_G_WARNING": "9ab7d2e949d738e8",
+    "MSG.HIGH_VALUE_DSS_HINT": "0370d4197611d0a1",
+    "MSG.HIGH_VALUE_FIRST_LOGGED_ALERT": "3acd92aa5e6fb093",
+    "MSG.JUMPED_SYSTEM": "c75bb29a5cf3aa88",
+    "MSG.MILESTONE_PROGRESS": "467bde3c31f44ba5",
+    "MSG.MILESTONE_REACHED": "f78e3af2938ce6cd",
+    "MSG.NEXT_HOP": "2a13be698b48da7a",
+    "MSG.NEXT_HOP_COPIED": "a66ec5ccaf82890e",
+    "MSG.PPM_COPY_SYSTEM": "ffb3ae4d3c14739c",
+    "MSG.PPM_PIN_ACTION": "0b4808eb249f5693",
+    "MSG.PPM_SET_TARGET": "cc93c1550be578dc",
+    "MSG.ROUTE_COMPLETE": "d350f70efba27d4d",
+    "MSG.ROUTE_DESYNC": "1b9b9850043962fa",
+    "MSG.ROUTE_FOUND": "38607e552591613a",
+    "MSG.RUNTIME_CRITICAL": "18b814ec9a7b51dc",
+    "MSG.SMUGGLER_ILLEGAL_CARGO": "80b172c649205a5f",
+    "MSG.STARTUP_SYSTEMS": "bc5244627591313d",
+    "MSG.SURVIVAL_REBUY_CRITICAL": "5761634dcd547aad",
+    "MSG.SURVIVAL_REBUY_HIGH": "bc14f8eaf9efc6f8",
+    "MSG.SYSTEM_FULLY_SCANNED": "bbc8607661a7f0d7",
+    "MSG.TERRAFORMABLE_DETECTED": "8ff541d282a704d3",
+    "MSG.TRADE_DATA_STALE": "0e7d850cfea054f0",
+    "MSG.TRADE_JACKPOT": "9b5125be72aa7490",
+    "MSG.UNDOCKED": "7211d9b7e876918c",
+    "MSG.UNKNOWN_F79": "55414b5b0479bfb2",
+    "MSG.WW_DETECTED": "d97bbdbeafd9457b",
+}
+
+
+class F79TtsPreprocessorGoldenAndCacheTests(unittest.TestCase):
+    def setUp(self) -> None:
+        text_preprocessor._reset_tts_caches_for_tests()
+
+    def tearDown(self) -> None:
+        text_preprocessor._reset_tts_caches_for_tests()
+
+    def test_outputs_match_pre_pipeline_golden_cold_and_warm(self) -> None:
+        corpus = _corpus()
+        cold = [(message_id, prepare_tts(message_id, ctx)) for message_id, ctx in corpus]
+        warm = [(message_id, prepare_tts(message_id, ctx)) for message_id, ctx in corpus]
+        self.assertEqual(cold, warm)
+        digests = _digests(cold)
+        self.assertEqual(set(digests), set(_GOLDEN_DIGESTS))
+        mismatched = sorted(key for key, value in digests.items() if _GOLDEN_DIGESTS[key] != value)
+        self.assertEqual(mismatched, [])
+        stats = text_preprocessor.tts_cache_stats()
+        self.assertGreater(stats["prepared"]["hits"], 0)
+
+    def test_cached_text_is_keyed_only_by_fields_prepare_tts_reads(self) -> None:
+        hits = text_preprocessor.tts_cache_stats()["prepared"]["hits"]
+        first = prepare_tts("MSG.NEXT_HOP", {"system": "Synuefe XR-H d11-102", "confidence": "high"})
+        second = prepare_tts("MSG.NEXT_HOP", {"system": "Synuefe XR-H d11-102", "confidence": "low"})
+        self.assertEqual(first, second)
+        self.assertEqual(text_preprocessor.tts_cache_stats()["prepared"]["hits"], hits + 1)
+        self.assertNotEqual(
+            prepare_tts("MSG.STARTUP_SYSTEMS", {"version": 1}),
+            prepare_tts("MSG.STARTUP_SYSTEMS", {"version": True}),
+        )
+        self.assertIsNotNone(prepare_tts("MSG.NEXT_HOP", {"system": "Sol", "extra": ["unhashable"]}))
+        self.assertIsNotNone(prepare_tts("MSG.CASH_IN_ASSISTANT", {"raw_text": ["x", "y"]}))
+
+    def test_warm_cache_prerenders_route_hops(self) -> None:
+        route = ["Sol", "Col 285 Sector AB-C d12-3", "HIP 12345", "", None, "Sol"]
+        self.assertEqual(warm_cache(route), 3)
+        before = text_preprocessor.tts_cache_stats()["prepared"]["hits"]
+        text = prepare_tts("MSG.NEXT_HOP", {"system": "HIP 12345", "risk_status": "RISK_LOW"})
+        self.assertEqual(text_preprocessor.tts_cache_stats()["prepared"]["hits"], before + 1)
+        self.assertIn("HIP", text or "")
+        self.assertGreaterEqual(text_preprocessor.tts_cache_stats()["names"]["items"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,310 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from logic import player_db_bulk_import, player_local_db
+from logic.personal_map_data_provider import MapDataProvider
+from tools.playerdb_backfill_jumps import run_backfill
+
+# Pelna skala i progi czasowe tylko z RENATA_PERF_TESTS=1; domyslny przebieg
+# sprawdza te same sciezki na malej historii, bez asercji na milisekundy.
+PERF_TESTS = os.getenv("RENATA_PERF_TESTS") == "1"
+BACKFILL_JUMPS = 200_000 if PERF_TESTS else 4_000
+BACKFILL_SYSTEMS = 20_000 if PERF_TESTS else 400
+BACKFILL_JUMPS_PER_FILE = 500
+BBOX_JUMPS = 1_000_000 if PERF_TESTS else 50_000
+# Podloga celowo ostrozna (wolne, jednordzeniowe maszyny CI); cel z zamowienia
+# to ~50k skokow/s na laptopie.
+BACKFILL_FLOOR_JUMPS_PER_SEC = 10_000
+BBOX_QUERY_BUDGET_MS = 50.0
+
+
+def _jump(system: int, ts: str, *, event: str = "FSDJump", taxi: bool = False) -> dict:
+    return {
+        "timestamp": ts,
+        "event": event,
+        "Taxi": taxi,
+        "StarSystem": f"F80_SYS_{system}",
+        "SystemAddress": 80_000 + system,
+        "StarPos": [float(system % 100) * 5.0, 0.0, float(system // 100) * 5.0],
+        "JumpDist": 12.5,
+        "FuelUsed": 0.8,
+    }
+
+
+def _ts(idx: int) -> str:
+    day, rest = divmod(idx, 86_400)
+    return f"2026-01-{day + 1:02d}T{rest // 3600:02d}:{rest // 60 % 60:02d}:{rest % 60:02d}Z"
+
+
+def _write_journals(log_dir: str, *, jumps: int, per_file: int, systems: int) -> list[str]:
+    os.makedirs(log_dir, exist_ok=True)
+    paths = []
+    step = 7919 % systems or 1
+    for file_idx in range(0, jumps, per_file):
+        path = os.path.join(log_dir, f"Journal.2026-01-01T{file_idx // per_file:06d}.01.log")
+        with open(path, "w", encoding="utf-8") as handle:
+            for idx in range(file_idx, min(jumps, file_idx + per_file)):
+                handle.write(json.dumps(_jump((idx * step) % systems, _ts(idx))) + "\n")
+                handle.write(json.dumps({"timestamp": _ts(idx), "event": "FSSDiscoveryScan", "BodyCount": 3}) + "\n")
+        paths.append(path)
+    return paths
+
+
+def _edge_counts(db_path: str) -> dict[tuple[int, int], int]:
+    conn = sqlite3.connect(db_path)
+    try:
+        return {(int(a), int(b)): int(c) for a, b, c in conn.execute("SELECT a_system_id, b_system_id, count FROM jump_edges")}
+    finally:
+        conn.close()
+
+
+class F80PlayerDbJumpEdgesTravelGraphTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self._tmp.name, "db", "player_local.db")
+        self.provider = MapDataProvider(db_path=self.db_path)
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def _ingest(self, events: list[dict]) -> list[dict]:
+        return [player_local_db.ingest_journal_event(ev, path=self.db_path) for ev in events]
+
+    def test_live_ingest_builds_edges_and_reingest_does_not_double_counts(self) -> None:
+        journal = [
+            _jump(1, "2026-03-01T10:00:00Z"),
+            _jump(2, "2026-03-01T10:01:00Z"),
+            _jump(1, "2026-03-01T10:02:00Z", event="CarrierJump"),
+            _jump(3, "2026-03-01T10:03:00Z", taxi=True),
+        ]
+        first = self._ingest(journal)
+        self.assertEqual([bool(r.get("ingested_jump")) for r in first], [True] * 4)
+        before = _edge_counts(self.db_path)
+        self.assertEqual(sorted(before.values()), [1, 2])
+
+        again = self._ingest(journal)
+        self.assertEqual([bool(r.get("ingested_jump")) for r in again], [False] * 4)
+        self.assertEqual(_edge_counts(self.db_path), before)
+
+        rows, meta = self.provider.get_edges(time_range="all")
+        self.assertTrue(meta["available"])
+        by_pair = {frozenset((r["from_key"], r["to_key"])): r for r in rows}
+        pair = by_pair[frozenset(("80001", "80002"))]
+        self.assertEqual(pair["count"], 2)
+        self.assertEqual(pair["first_ts"], "2026-03-01T10:01:00Z")
+        self.assertEqual(pair["last_ts"], "2026-03-01T10:02:00Z")
+        self.assertIn(frozenset(("80001", "80003")), by_pair)
+
+        conn = sqlite3.connect(self.db_path)
+        try:
+            types = [r[0] for r in conn.execute("SELECT jump_type FROM jumps ORDER BY ts")]
+        finally:
+            conn.close()
+        self.assertEqual(types, ["hyperspace", "hyperspace", "carrier", "taxi"])
+
+    def test_location_resets_jump_origin_in_live_ingest_and_backfill(self) -> None:
+        location = dict(_jump(7, "2026-03-01T10:01:00Z"), event="Location")
+        journal = [
+            _jump(1, "2026-03-01T10:00:00Z"),
+            location,
+            _jump(2, "2026-03-01T10:02:00Z"),
+            _jump(3, "2026-03-01T10:03:00Z"),
+        ]
+        self._ingest(journal)
+        live = {frozenset(("80007", "80002")), frozenset(("80002", "80003"))}
+        rows, _ = self.provider.get_edges(time_range="all")
+        self.assertEqual({frozenset((r["from_key"], r["to_key"])) for r in rows}, live)
+
+        log_dir = os.path.join(self._tmp.name, "logs")
+        os.makedirs(log_dir)
+        with open(os.path.join(log_dir, "Journal.2026-03-01T100000.01.log"), "w", encoding="utf-8") as handle:
+            handle.write("".join(json.dumps(ev) + "\n" for ev in journal))
+        backfill_db = os.path.join(self._tmp.name, "backfill", "player_local.db")
+        run_backfill(db_path=backfill_db, log_dir=log_dir, chunk_size=1)
+        rows, _ = MapDataProvider(db_path=backfill_db).get_edges(time_range="all")
+        self.assertEqual({frozenset((r["from_key"], r["to_key"])) for r in rows}, live)
+
+    def test_out_of_order_jump_and_location_rederive_later_origins(self) -> None:
+        in_order = [
+            _jump(1, "2026-03-01T10:00:00Z"),
+            _jump(4, "2026-03-01T10:01:00Z"),
+            _jump(2, "2026-03-01T10:02:00Z"),
+            dict(_jump(7, "2026-03-01T10:03:00Z"), event="Location"),
+            _jump(3, "2026-03-01T10:04:00Z"),
+            _jump(2, "2026-03-01T10:05:00Z"),
+        ]
+        reference_db = os.path.join(self._tmp.name, "ref", "player_local.db")
+        for ev in in_order:
+            player_local_db.ingest_journal_event(ev, path=reference_db)
+
+        # Skok 10:01 i Location 10:03 przychodza po pozniejszych skokach.
+        self._ingest([in_order[0], in_order[2], in_order[4], in_order[5]])
+        self.assertIn((80_001, 80_002), self._edge_addresses())
+        late_jump = self._ingest([in_order[1]])[0]
+        late_location = self._ingest([in_order[3]])[0]
+
+        self.assertEqual(self._edge_rows(self.db_path), self._edge_rows(reference_db))
+        self.assertEqual(
+            self._edge_addresses(),
+            {(80_001, 80_004), (80_002, 80_004), (80_003, 80_007), (80_002, 80_003)},
+        )
+        # Delta mapy rozdziela pary zmienione od tych, z ktorych odszedl ostatni skok.
+        conn = sqlite3.connect(self.db_path)
+        try:
+            ids = {int(addr): int(sid) for sid, addr in conn.execute("SELECT id, system_address FROM systems")}
+        finally:
+            conn.close()
+
+        def pair(a: int, b: int) -> tuple[int, int]:
+            return (min(ids[a], ids[b]), max(ids[a], ids[b]))
+
+        self.assertEqual(late_jump["changes"].edges, {pair(80_001, 80_004), pair(80_002, 80_004)})
+        self.assertEqual(late_jump["changes"].edges_removed, {pair(80_001, 80_002)})
+        # Para (2, 3) zostaje dzieki skokowi 10:05 - tylko licznik sie zmienia.
+        self.assertEqual(late_location["changes"].edges, {pair(80_002, 80_003), pair(80_003, 80_007)})
+        self.assertEqual(late_location["changes"].edges_removed, set())
+
+    def _edge_rows(self, db_path: str) -> list[tuple]:
+        conn = sqlite3.connect(db_path)
+        try:
+            rows = conn.execute(
+                """
+                SELECT sa.system_address, sb.system_address, e.count, e.first_ts, e.last_ts
+                FROM jump_edges e
+                JOIN systems sa ON sa.id = e.a_system_id
+                JOIN systems sb ON sb.id = e.b_system_id
+                """
+            ).fetchall()
+            # Id systemow zaleza od kolejnosci ingestu; para po adresach.
+            return sorted((min(a, b), max(a, b), *rest) for a, b, *rest in rows)
+        finally:
+            conn.close()
+
+    def _edge_addresses(self) -> set[tuple[int, int]]:
+        return {(a, b) for a, b, *_rest in self._edge_rows(self.db_path)}
+
+    def test_get_edges_filters_by_min_count_time_and_bbox(self) -> None:
+        self._ingest(
+            [
+                _jump(1, "2026-01-01T10:00:00Z"),
+                _jump(2, "2026-01-01T10:01:00Z"),
+                _jump(1, "2026-01-01T10:02:00Z"),
+                _jump(200, "2026-01-01T10:03:00Z"),
+            ]
+        )
+        rows, _ = self.provider.get_edges(min_count=2)
+        self.assertEqual([(r["from_key"], r["to_key"]) for r in rows], [("80001", "80002")])
+
+        rows, meta = self.provider.get_edges(time_range="7d")
+        self.assertEqual(rows, [])
+        self.assertTrue(meta["available"])
+
+        # System 200 lezy na (0, 0, 10); boks obejmuje tylko jego okolice.
+        rows, meta = self.provider.get_edges(bbox=(-1.0, -1.0, 9.0, 1.0, 1.0, 11.0))
+        self.assertEqual([(r["from_key"], r["to_key"]) for r in rows], [("80001", "80200")])
+        self.assertEqual(meta["bbox"], [-1.0, 1.0, -1.0, 1.0, 9.0, 11.0])
+
+    def test_backfill_throughput_and_idempotent_rerun(self) -> None:
+        log_dir = os.path.join(self._tmp.name, "logs")
+        _write_journals(log_dir, jumps=BACKFILL_JUMPS, per_file=BACKFILL_JUMPS_PER_FILE, systems=BACKFILL_SYSTEMS)
+
+        out = run_backfill(db_path=self.db_path, log_dir=log_dir)
+        self.assertTrue(out["ok"])
+        self.assertEqual(out["inserted_jumps"], BACKFILL_JUMPS)
+        if PERF_TESTS:
+            self.assertGreater(out["jumps_per_sec"], BACKFILL_FLOOR_JUMPS_PER_SEC, out)
+        edges = _edge_counts(self.db_path)
+        self.assertEqual(sum(edges.values()), BACKFILL_JUMPS - 1)
+
+        again = run_backfill(db_path=self.db_path, log_dir=log_dir)
+        self.assertEqual(again["inserted_jumps"], 0)
+        self.assertEqual(again["skipped_files"], BACKFILL_JUMPS // BACKFILL_JUMPS_PER_FILE)
+        self.assertEqual(_edge_counts(self.db_path), edges)
+
+        # Live ingest tego samego skoku po backfillu tez nie dubluje.
+        last = BACKFILL_JUMPS - 1
+        result = player_local_db.ingest_journal_event(
+            _jump(last * (7919 % BACKFILL_SYSTEMS) % BACKFILL_SYSTEMS, _ts(last)), path=self.db_path
+        )
+        self.assertFalse(result["ingested_jump"])
+        self.assertEqual(_edge_counts(self.db_path), edges)
+
+    def test_backfill_resumes_from_file_offset_after_interruption(self) -> None:
+        log_dir = os.path.join(self._tmp.name, "logs")
+        files = _write_journals(log_dir, jumps=1_000, per_file=300, systems=50)
+        reference_db = os.path.join(self._tmp.name, "ref", "player_local.db")
+        player_local_db.backfill_jumps_from_journals(files, path=reference_db, chunk_size=256)
+
+        real_flush = player_db_bulk_import._BulkWriter.flush
+        calls = {"n": 0}
+
+        def _crashing_flush(writer):
+            calls["n"] += 1
+            if calls["n"] == 4:
+                raise RuntimeError("simulated crash")
+            return real_flush(writer)
+
+        with patch.object(player_db_bulk_import._BulkWriter, "flush", _crashing_flush):
+            with self.assertRaises(RuntimeError):
+                player_local_db.backfill_jumps_from_journals(files, path=self.db_path, chunk_size=256)
+        conn = sqlite3.connect(self.db_path)
+        try:
+            partial = int(conn.execute("SELECT COUNT(*) FROM jumps").fetchone()[0])
+        finally:
+            conn.close()
+        self.assertTrue(0 < partial < 1_000, partial)
+
+        # Journal dopisany w trakcie: niedokonczona ostatnia linia nie jest konsumowana.
+        with open(files[-1], "a", encoding="utf-8") as handle:
+            handle.write('{ "timestamp":"2026-02-01T00:00:00Z", "event":"FSDJump", "StarSys')
+        out = player_local_db.backfill_jumps_from_journals(files, path=self.db_path, chunk_size=256)
+        self.assertEqual(out["resumed_files"], 1)
+        self.assertEqual(out["inserted_jumps"], 1_000 - partial)
+        self.assertEqual(_edge_counts(self.db_path), _edge_counts(reference_db))
+
+    def test_bbox_query_over_large_jump_history(self) -> None:
+        with player_local_db.playerdb_connection(path=self.db_path) as conn:
+            conn.execute("BEGIN;")
+            conn.execute(
+                """
+                INSERT INTO systems(system_name, system_address, x, y, z, first_seen_ts, last_seen_ts)
+                WITH RECURSIVE n(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM n WHERE i < 49999)
+                SELECT 'F80_GRID_' || i, 800000 + i, (i % 250) * 10.0, (i % 7) * 1.0, (i / 250) * 10.0,
+                       '2025-01-01T00:00:00Z', '2025-01-01T00:00:00Z'
+                FROM n;
+                """
+            )
+            conn.execute(
+                """
+                INSERT INTO jumps(from_system_id, to_system_id, ts, jump_dist, fuel_used, jump_type)
+                WITH RECURSIVE n(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM n WHERE i < ?)
+                SELECT (i * 7919) % 49000 + 1, (i * 7919) % 49000 + 2 + (i % 3) * 250,
+                       strftime('%Y-%m-%dT%H:%M:%SZ', 1735689600 + i, 'unixepoch'), 10.0, 0.5, 'hyperspace'
+                FROM n;
+                """,
+                (BBOX_JUMPS - 1,),
+            )
+            player_local_db._rollup_jump_edges_since(conn, after_jump_id=0)
+            conn.commit()
+            self.assertEqual(conn.execute("SELECT SUM(count) FROM jump_edges").fetchone()[0], BBOX_JUMPS)
+
+        timings = []
+        for _ in range(3):
+            started = time.perf_counter()
+            rows, meta = self.provider.get_edges(bbox=(100.0, -10.0, 100.0, 400.0, 10.0, 400.0))
+            timings.append((time.perf_counter() - started) * 1000.0)
+        self.assertTrue(meta["available"])
+        self.assertGreater(len(rows), BBOX_JUMPS // 1000)
+        if PERF_TESTS:
+            self.assertLess(min(timings), BBOX_QUERY_BUDGET_MS, timings)
+
+
+if __name__ == "__main__":
+    unittest.main()
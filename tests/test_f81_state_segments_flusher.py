@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+import config
+from logic import context_state_contract
+from logic.context_state_contract import (
+    default_state_contract,
+    load_state_contract_file,
+    state_segment_path,
+    state_segments_dir,
+)
+from logic.state_segments import StateSegmentStore
+from logic.utils import notify as notify_module
+
+UPDATES = 1000
+
+
+def _big_contract() -> dict:
+    contract = default_state_contract()
+    filler = "x" * 400
+    contract["domain_state"]["trasa"] = [f"F81_SYSTEM_{idx}_{filler}" for idx in range(400)]
+    contract["anti_spam_state"]["trade_jackpot_cache"] = {
+        "station_entries": [{"station": f"F81_ST_{idx}", "note": filler, "ts": 1.0} for idx in range(400)],
+    }
+    contract["anti_spam_state"]["exobio"] = {
+        "sample_count_by_key": {f"f81||body {idx}||species": idx for idx in range(400)},
+    }
+    contract["anti_spam_state"]["dispatcher_debouncer_windows"] = {"schema_version": 1, "entries": []}
+    return contract
+
+
+class F81StateSegmentsFlusherTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._orig = config.config._settings.copy()
+        self._old_state_file = config.STATE_FILE
+        self._old_contract = config.get_state_contract()
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, "app_state.json")
+        config.STATE_FILE = self.path
+
+    def tearDown(self) -> None:
+        config.STATE_FILE = self._old_state_file
+        config.save_state_contract(self._old_contract)
+        config.config._settings = self._orig
+        self._tmp.cleanup()
+
+    def _store(self) -> StateSegmentStore:
+        return StateSegmentStore(lambda: self.path, min_interval_provider=lambda _domain: 0.0)
+
+    def test_debouncer_updates_write_domain_bytes_not_contract_bytes(self) -> None:
+        contract = _big_contract()
+        config.save_state_contract(contract)
+        contract_bytes = len(json.dumps(load_state_contract_file(self.path), indent=2, ensure_ascii=False))
+        before = config.get_state_store_stats()["bytes_written"]
+
+        debouncer = notify_module.NotificationDebouncer()
+        with debouncer._lock:
+            debouncer._loaded_from_contract = True
+        with patch.object(notify_module.NotificationDebouncer, "_ensure_persist_timer"):
+            # Najgorszy przypadek: zapis po kazdej zmianie (bez koalescencji flushera).
+            for idx in range(UPDATES):
+                self.assertTrue(debouncer.can_send(f"F81_KEY_{idx % 20}", 0.0, context="f81"))
+                debouncer.persist_to_contract(force=True)
+                self.assertTrue(config.flush_state(timeout=5.0))
+        debouncer.reset()
+
+        written = config.get_state_store_stats()["bytes_written"] - before
+        domain_bytes = os.path.getsize(state_segment_path(self.path, "anti_spam"))
+        per_update = written / UPDATES
+        self.assertLess(per_update, domain_bytes * 1.5, (per_update, domain_bytes))
+        self.assertLess(per_update * 20, contract_bytes, (per_update, contract_bytes))
+
+    def test_untouched_domains_keep_mtime(self) -> None:
+        config.save_state_contract(_big_contract())
+        names = ("runtime", "exobio", "jackpot", "route_milestones", "smuggler")
+        stamp = time.time() - 3600.0
+        for name in names:
+            os.utime(state_segment_path(self.path, name), (stamp, stamp))
+        os.utime(self.path, (stamp, stamp))
+
+        config.update_anti_spam_state({"dispatcher_debouncer_windows": {"entries": [{"key": "F81"}]}}, flush=True)
+        config.update_ui_state({"main": {"active_tab_key": "journal"}})
+
+        for name in names:
+            self.assertEqual(os.path.getmtime(state_segment_path(self.path, name)), stamp, name)
+        self.assertNotEqual(os.path.getmtime(self.path), stamp)
+        self.assertNotEqual(os.path.getmtime(state_segment_path(self.path, "anti_spam")), stamp)
+        loaded = load_state_contract_file(self.path)
+        self.assertEqual(loaded["anti_spam_state"]["dispatcher_debouncer_windows"]["entries"], [{"key": "F81"}])
+        self.assertEqual(loaded["ui_state"]["main"]["active_tab_key"], "journal")
+        self.assertEqual(len(loaded["domain_state"]["trasa"]), 400)
+
+    def test_flusher_killed_mid_write_leaves_previous_segment(self) -> None:
+        store = self._store()
+        store.put("anti_spam", {"dispatcher_debouncer_windows": {"version": 1}})
+        self.assertTrue(store.flush_all(timeout=5.0))
+
+        in_rename = threading.Event()
+        release = threading.Event()
+        real_replace = os.replace
+
+        def _stuck_replace(src, dst):
+            # Flusher zapisal tmp i "umiera" przed rename: proces znika w tym miejscu.
+            in_rename.set()
+            release.wait(5.0)
+            raise OSError("flusher killed")
+
+        segment = state_segment_path(self.path, "anti_spam")
+        with patch.object(context_state_contract.os, "replace", side_effect=_stuck_replace):
+            store.put("anti_spam", {"dispatcher_debouncer_windows": {"version": 2}})
+            self.assertTrue(in_rename.wait(5.0))
+            leftovers = [name for name in os.listdir(os.path.dirname(segment)) if name.endswith(".tmp")]
+            self.assertEqual(len(leftovers), 1)
+
+            # "Restart" w tym momencie: nowy proces widzi poprzednia, spojna wersje.
+            reloaded = StateSegmentStore(lambda: self.path)
+            self.assertEqual(reloaded.get("anti_spam"), {"dispatcher_debouncer_windows": {"version": 1}})
+            self.assertEqual(
+                load_state_contract_file(self.path)["anti_spam_state"],
+                {"dispatcher_debouncer_windows": {"version": 1}},
+            )
+            release.set()
+            deadline = time.monotonic() + 5.0
+            while store.stats()["write_errors"] < 1 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        self.assertIs(os.replace, real_replace)
+        self.assertEqual(store.dirty_domains(), ["anti_spam"])
+
+        # Shutdown flush dopisuje najnowsza wersje mimo nieudanego zapisu w tle.
+        store.put("anti_spam", {"dispatcher_debouncer_windows": {"version": 3}})
+        self.assertTrue(store.close(timeout=5.0))
+        self.assertEqual(self._store().get("anti_spam"), {"dispatcher_debouncer_windows": {"version": 3}})
+        self.assertEqual([name for name in os.listdir(os.path.dirname(segment)) if name.endswith(".tmp")], [])
+
+        # Rozerwany plik segmentu (utrata zasilania) -> pusty segment, bez wyjatku.
+        with open(segment, "r+", encoding="utf-8") as handle:
+            handle.truncate(20)
+        self.assertEqual(self._store().get("anti_spam"), {})
+        self.assertEqual(load_state_contract_file(self.path)["anti_spam_state"], {})
+
+    def test_background_flusher_coalesces_with_min_interval(self) -> None:
+        store = StateSegmentStore(lambda: self.path, min_interval_provider=lambda _domain: 0.3)
+        for idx in range(200):
+            store.put("jackpot", {"trade_jackpot_cache": {"n": idx}})
+        deadline = time.monotonic() + 5.0
+        while store.dirty_domains() and time.monotonic() < deadline:
+            time.sleep(0.02)
+        stats = store.stats()
+        self.assertEqual(stats["dirty"], [])
+        self.assertLessEqual(stats["writes"], 3)
+        self.assertEqual(self._store().get("jackpot"), {"trade_jackpot_cache": {"n": 199}})
+        self.assertFalse(os.path.exists(state_segment_path(self.path, "exobio")))
+        store.close(timeout=1.0)
+
+    def test_monolithic_contract_is_split_once_with_backup(self) -> None:
+        monolith = _big_contract()
+        monolith["ui_state"]["main"] = {"active_tab_key": "pulpit"}
+        with open(self.path, "w", encoding="utf-8") as handle:
+            json.dump(monolith, handle)
+        expected = load_state_contract_file(self.path)
+
+        store = self._store()
+        self.assertEqual(store.get("core")["ui_state"], {"main": {"active_tab_key": "pulpit"}})
+        self.assertTrue(os.path.isfile(f"{self.path}.monolith.bak"))
+        self.assertTrue(os.path.isdir(state_segments_dir(self.path)))
+        with open(self.path, "r", encoding="utf-8") as handle:
+            self.assertNotIn("domain_state", json.load(handle))
+        self.assertEqual(load_state_contract_file(self.path), expected)
+
+        shutil.rmtree(state_segments_dir(self.path))
+        self.assertEqual(load_state_contract_file(self.path)["domain_state"]["sys"], "Nieznany")
+
+
+if __name__ == "__main__":
+    unittest.main()
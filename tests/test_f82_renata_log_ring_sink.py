@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+import unittest
+from unittest.mock import patch
+
+import config
+from logic import utils
+from logic.utils import renata_log
+
+THREADS = 4
+EVENTS_PER_THREAD = 250_000
+WARNING_EVERY = 1000
+
+
+class _CountingQueue:
+    def __init__(self) -> None:
+        self.items: list = []
+
+    def put(self, item) -> None:
+        self.items.append(item)
+
+
+class F82RenataLogRingSinkTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._orig = config.config._settings.copy()
+        self._orig_queue = utils.MSG_QUEUE
+        self.queue = _CountingQueue()
+        utils.MSG_QUEUE = self.queue
+        renata_log._reset_log_sink_for_tests()
+
+    def tearDown(self) -> None:
+        renata_log._reset_log_sink_for_tests()
+        utils.MSG_QUEUE = self._orig_queue
+        config.config._settings = self._orig
+
+    def test_flood_from_four_threads_keeps_gui_queue_bounded_and_all_warnings(self) -> None:
+        sink = renata_log.get_log_sink()
+        started = time.monotonic()
+
+        def _worker(idx: int) -> None:
+            for n in range(EVENTS_PER_THREAD):
+                if n % WARNING_EVERY == 0:
+                    renata_log.log_event("WARN", "f82 warning", thread=idx, n=n)
+                else:
+                    renata_log.log_event(f"F82_SRC_{idx}", "f82 debug burst", thread=idx, n=n)
+
+        threads = [threading.Thread(target=_worker, args=(idx,)) for idx in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+        sink.flush_summary()
+
+        stats = sink.stats()
+        total = THREADS * EVENTS_PER_THREAD
+        warnings = THREADS * (EVENTS_PER_THREAD // WARNING_EVERY)
+        self.assertEqual(stats["emitted"], total)
+        self.assertEqual(stats["warnings_recorded"], warnings)
+        self.assertGreater(stats["sampled_out"], total * 0.9)
+
+        # Ostrzezenia ida do GUI zawsze, limit dotyczy tylko debug/info.
+        gui_warnings = [line for _kind, line in self.queue.items if line.startswith("[WARN] f82 warning")]
+        self.assertEqual(len(gui_warnings), warnings)
+        bound = (
+            warnings
+            + config.get("log_sink.gui_burst")
+            + config.get("log_sink.gui_rate_per_sec") * (elapsed + 1.0)
+            + elapsed / config.get("log_sink.summary_interval_sec")
+            + 2
+        )
+        self.assertLessEqual(len(self.queue.items), bound, (len(self.queue.items), elapsed))
+        self.assertTrue(any("messages suppressed" in line for _kind, line in self.queue.items))
+        self.assertLessEqual(len(sink), sink.capacity)
+
+        recent = renata_log.dump_recent(5)
+        self.assertEqual(len(recent), 5)
+        self.assertEqual(set(recent[0]), {"ts", "level", "source", "code", "fields", "line"})
+
+    def test_ring_buffer_memory_stays_flat(self) -> None:
+        config.config._settings["log_sink.sample_burst"] = 10**9
+        renata_log._reset_log_sink_for_tests()
+
+        def _burst(count: int, offset: int) -> None:
+            for n in range(count):
+                renata_log.log_event("F82_MEM", "ring record", n=offset + n, payload="x" * 64)
+
+        tracemalloc.start()
+        try:
+            # Rozgrzewka pod tracemalloc: ring jest juz pelny sledzonymi rekordami.
+            _burst(20_000, 0)
+            baseline = tracemalloc.take_snapshot()
+            _burst(60_000, 20_000)
+            after = tracemalloc.take_snapshot()
+        finally:
+            tracemalloc.stop()
+        growth = sum(stat.size_diff for stat in after.compare_to(baseline, "filename"))
+        self.assertLess(growth, 256 * 1024, growth)
+        self.assertEqual(len(renata_log.get_log_sink()), renata_log.get_log_sink().capacity)
+
+    def test_throttle_map_never_exceeds_capacity(self) -> None:
+        for n in range(renata_log.THROTTLE_MAX_KEYS * 5):
+            renata_log.log_event_throttled(f"f82:body:F82 SYSTEM {n} A 1", 60_000, "F82", "throttled")
+            self.assertLessEqual(len(renata_log._THROTTLE_LAST), renata_log.THROTTLE_MAX_KEYS)
+        self.assertTrue(renata_log.log_event_throttled("f82:fresh", 60_000, "F82", "fresh"))
+        self.assertFalse(renata_log.log_event_throttled("f82:fresh", 60_000, "F82", "fresh"))
+
+    def test_explicit_warning_level_under_domain_category_is_never_sampled(self) -> None:
+        config.config._settings["log_sink.sample_burst"] = 1
+        config.config._settings["log_sink.sample_rate_per_sec"] = 0.0
+        renata_log._reset_log_sink_for_tests()
+        for n in range(50):
+            renata_log.log_event("CASHIN", "f82 provider failed", reason="timeout", n=n, level="warning")
+            renata_log.log_event_throttled(f"f82:cashin:{n}", 60_000, "CASHIN", "f82 throttled", level="WARN")
+            renata_log.log_event("CASHIN", "f82 info burst", reason="skip", n=n)
+
+        stats = renata_log.get_log_sink().stats()
+        self.assertEqual(stats["warnings_recorded"], 100)
+        self.assertEqual(stats["sampled_out"], 49)
+        warning = next(
+            row for row in renata_log.dump_recent(300) if row["code"] == "f82 provider failed"
+        )
+        self.assertEqual(warning["level"], "warning")
+        self.assertNotIn("level", warning["fields"])
+
+    def test_warnings_bypass_gui_line_limit(self) -> None:
+        config.config._settings["log_sink.gui_burst"] = 1
+        config.config._settings["log_sink.gui_rate_per_sec"] = 0.0
+        renata_log._reset_log_sink_for_tests()
+        for n in range(20):
+            renata_log.log_event("F82_GUI", "f82 info", n=n)
+            renata_log.log_event("WARN", "f82 gui warning", n=n)
+            renata_log.log_event("ERROR", "f82 gui error", n=n)
+
+        lines = [line for _kind, line in self.queue.items]
+        self.assertEqual(sum(1 for line in lines if line.startswith("[WARN] f82 gui warning")), 20)
+        self.assertEqual(sum(1 for line in lines if line.startswith("[ERROR] f82 gui error")), 20)
+        self.assertEqual(sum(1 for line in lines if line.startswith("[F82_GUI] f82 info")), 1)
+        self.assertEqual(renata_log.get_log_sink().stats()["gui_suppressed"], 19)
+
+    def test_gui_queue_failure_uses_debug_gated_fallback(self) -> None:
+        class _BrokenQueue:
+            def put(self, item) -> None:
+                raise RuntimeError("queue closed")
+
+        utils.MSG_QUEUE = _BrokenQueue()
+        renata_log._reset_log_sink_for_tests()
+        with patch("builtins.print") as print_mock:
+            renata_log.log_event("WARN", "f82 quiet fallback")
+            print_mock.assert_not_called()
+            config.config._settings["debug_logging"] = True
+            renata_log.log_event("WARN", "f82 debug fallback")
+        print_mock.assert_called_once_with("[WARN] f82 debug fallback")
+
+    def test_jsonl_writer_batches_and_rotates(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "logs", "renata_log.jsonl")
+            config.config._settings["log_sink.jsonl_enabled"] = True
+            config.config._settings["log_sink.jsonl_path"] = path
+            config.config._settings["log_sink.jsonl_max_bytes"] = 64 * 1024
+            renata_log._reset_log_sink_for_tests()
+            for n in range(3000):
+                renata_log.log_event("WARN", "f82 post-mortem", n=n)
+            writer = renata_log.get_log_sink()._writer
+            renata_log.close_log_sink()
+
+            files = sorted(name for name in os.listdir(os.path.dirname(path)))
+            self.assertIn("renata_log.jsonl.1", files)
+            self.assertLessEqual(len(files), 4)
+            self.assertLess(writer.batches, writer.records_written)
+            with open(path, "r", encoding="utf-8") as handle:
+                rows = [json.loads(line) for line in handle]
+            self.assertEqual(rows[-1]["fields"]["n"], "2999")
+            self.assertEqual(rows[-1]["level"], "warning")
+
+
+if __name__ == "__main__":
+    unittest.main()
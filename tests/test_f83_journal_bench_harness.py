@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
+import unittest
+from collections import Counter
+from unittest.mock import patch
+
+from app.bench import generate_session, headless_runtime, iter_session_lines, run_bench
+from app.bench.harness import MODE_BURST, MODE_REALTIME
+from logic.events import exploration_fss_events
+from logic.utils import renata_log
+from tools.journal_bench import run_cli
+
+# Sesja 10k zdarzen i budzet czasu tylko z RENATA_PERF_TESTS=1 (raport ten sam).
+PERF_TESTS = os.getenv("RENATA_PERF_TESTS") == "1"
+SESSION_EVENTS = 10_000 if PERF_TESTS else 1_500
+SESSION_BUDGET_SEC = 60.0
+COMPARE_EVENTS = "2000" if PERF_TESTS else "600"
+TIMING_KEYS = {"count", "total_ms", "mean_us", "p50_us", "p95_us", "p99_us", "max_us"}
+
+
+class F83JournalBenchHarnessTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        # Replay zalewa logami wspolny sink; nastepne testy startuja z pelnym limitem GUI.
+        renata_log._reset_log_sink_for_tests()
+        self._tmp.cleanup()
+
+    def _cli(self, *argv: str) -> dict:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return run_cli(list(argv))
+
+    def test_synthetic_session_is_deterministic_with_realistic_mix(self) -> None:
+        first = generate_session(events=3000, seed=7)
+        self.assertEqual(first, generate_session(events=3000, seed=7))
+        self.assertNotEqual(first, generate_session(events=3000, seed=8))
+        self.assertEqual(len(first), 3000)
+
+        counts = Counter(row["event"] for row in first)
+        for name in ("FSDJump", "Scan", "ScanOrganic", "MarketSell", "Bounty", "Docked"):
+            self.assertGreater(counts[name], 0, name)
+        self.assertGreater(counts["Scan"], counts["FSDJump"])
+        self.assertGreater(counts["FSDJump"], counts["Docked"])
+
+        hours = generate_session(hours=2.0, seed=1)
+        span = time.mktime(time.strptime(hours[-1]["timestamp"], "%Y-%m-%dT%H:%M:%SZ")) - time.mktime(
+            time.strptime(hours[0]["timestamp"], "%Y-%m-%dT%H:%M:%SZ")
+        )
+        self.assertGreaterEqual(span, 2 * 3600)
+        self.assertLess(span, 2 * 3600 + 3600)
+
+    def test_session_runs_headless_with_full_report(self) -> None:
+        lines = list(iter_session_lines(generate_session(events=SESSION_EVENTS, seed=3)))
+        started = time.monotonic()
+        with headless_runtime(os.path.join(self._tmp.name, "run")) as sinks:
+            report = run_bench(lines, sinks=sinks)
+        if PERF_TESTS:
+            self.assertLess(time.monotonic() - started, SESSION_BUDGET_SEC)
+
+        self.assertEqual(report["events"], SESSION_EVENTS)
+        self.assertEqual(report["mode"], "fast")
+        self.assertGreater(report["events_per_sec"], 0.0)
+        self.assertEqual(sum(row["count"] for row in report["event_types"].values()), SESSION_EVENTS)
+        for row in report["event_types"].values():
+            self.assertEqual(set(row), TIMING_KEYS)
+            self.assertLessEqual(row["p50_us"], row["p95_us"])
+            self.assertLessEqual(row["p95_us"], row["p99_us"])
+        self.assertGreater(report["playerdb"]["total"]["count"], 0)
+        self.assertIn("ingest_journal_event", report["playerdb"]["by_call"])
+        self.assertGreater(report["state"]["puts"], 0)
+        self.assertEqual(set(report["sinks"]), {"tts_calls", "network_calls", "gui_messages"})
+        self.assertGreater(sum(report["sinks"]["gui_messages"].values()), 0)
+        self.assertTrue(os.path.isfile(os.path.join(self._tmp.name, "run", "player_local.db")))
+        json.dumps(report)
+
+    def test_realtime_and_burst_modes(self) -> None:
+        lines = list(iter_session_lines(generate_session(events=200, seed=5)))
+        slept: list[float] = []
+        with headless_runtime(os.path.join(self._tmp.name, "modes")) as sinks:
+            realtime = run_bench(lines, mode=MODE_REALTIME, speed=1e6, sinks=sinks, sleep=slept.append)
+            burst = run_bench(lines, mode=MODE_BURST, burst=64, sinks=sinks)
+        self.assertEqual(realtime["speed"], 1e6)
+        self.assertEqual(realtime["realtime_lag"]["count"], 200)
+        self.assertTrue(all(delay < 1.0 for delay in slept))
+        self.assertEqual(burst["bursts"]["count"], 4)
+        self.assertEqual(burst["burst"], 64)
+        self.assertNotIn("realtime_lag", burst)
+
+    def test_compare_flags_deliberately_slowed_handler(self) -> None:
+        baseline_path = os.path.join(self._tmp.name, "baseline.json")
+        baseline = self._cli("--events", COMPARE_EVENTS, "--seed", "11", "--json", baseline_path)
+        self.assertEqual(baseline.get("regressions"), None)
+        with open(baseline_path, "r", encoding="utf-8") as handle:
+            self.assertEqual(json.load(handle)["events"], int(COMPARE_EVENTS))
+
+        real_handler = exploration_fss_events.handle_fss_discovery_scan
+
+        def _slow_handler(*args, **kwargs):
+            time.sleep(0.003)
+            return real_handler(*args, **kwargs)
+
+        with patch.object(exploration_fss_events, "handle_fss_discovery_scan", side_effect=_slow_handler):
+            current = self._cli("--events", COMPARE_EVENTS, "--seed", "11", "--compare", baseline_path)
+        flagged = {row["event"] for row in current["regressions"]}
+        self.assertIn("FSSDiscoveryScan", flagged)
+        row = next(r for r in current["regressions"] if r["event"] == "FSSDiscoveryScan")
+        self.assertGreater(row["current"] - row["baseline"], 2000.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
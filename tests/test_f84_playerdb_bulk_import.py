@@ -0,0 +1,413 @@
+from __future__ import annotations
+
+import os
+import random
+import signal
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+from logic import player_db_bulk_import, player_local_db
+
+# Korpus 500 plikow i podloga przepustowosci tylko z RENATA_PERF_TESTS=1.
+PERF_TESTS = os.getenv("RENATA_PERF_TESTS") == "1"
+# Podloga celowo ostrozna (jednordzeniowa maszyna CI, parsowanie w jednym
+# rdzeniu); na laptopie z pula workerow wychodzi kilka razy wiecej.
+BULK_IMPORT_FLOOR_EVENTS_PER_SEC = 40_000
+CORPUS_FILES = 500 if PERF_TESTS else 30
+CORPUS_LINES_PER_FILE = 4_000
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_NOISE = (
+    '{{ "timestamp":"{ts}", "event":"Music", "MusicTrack":"Exploration" }}\n',
+    '{{ "timestamp":"{ts}", "event":"ReceiveText", "From":"", "Message":"$COMMS_entered:#name=F84;", "Channel":"npc" }}\n',
+    '{{ "timestamp":"{ts}", "event":"FSSSignalDiscovered", "SystemAddress":{addr}, "SignalName":"F84 Beacon" }}\n',
+    '{{ "timestamp":"{ts}", "event":"ReservoirReplenished", "FuelMain":30.0, "FuelReservoir":0.9 }}\n',
+    '{{ "timestamp":"{ts}", "event":"FSDTarget", "Name":"F84 Target", "SystemAddress":{addr}, "RemainingJumpsInRoute":3 }}\n',
+    '{{ "timestamp":"{ts}", "event":"NavBeaconScan", "SystemAddress":{addr}, "NumBodies":12 }}\n',
+)
+_STAR_CLASSES = ("K", "G", "M", "F", "N", "H", "A")
+
+
+def _ts(second: int) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(1_600_000_000 + second))
+
+
+class _Corpus:
+    """Szybki generator journali w formacie gry (f-stringi, bez json.dumps)."""
+
+    def __init__(self, *, seed: int, systems: int = 3_000, stations: int = 400) -> None:
+        self.rng = random.Random(seed)
+        self.systems = [
+            (f"F84 Sys {idx}", 84_000_000 + idx, idx % 211 * 3.5, idx % 7 * 1.25, idx // 211 * 4.0, _STAR_CLASSES[idx % 7])
+            for idx in range(systems)
+        ]
+        # Stacja ma stale atrybuty (system, MarketID, typ, dystans) jak w grze.
+        self.stations = [
+            (f"F84 Port {idx}", self.rng.randrange(systems), 3_840_000_000 + idx, ("Coriolis", "Outpost", "Orbis")[idx % 3], 100.0 + idx)
+            for idx in range(stations)
+        ]
+        self.clock = 0
+
+    def _tick(self) -> str:
+        self.clock += self.rng.randint(1, 4)
+        return _ts(self.clock)
+
+    def _jump_line(self, sys_idx: int, *, event: str = "FSDJump") -> str:
+        name, addr, x, y, z, star = self.systems[sys_idx]
+        return (
+            f'{{ "timestamp":"{self._tick()}", "event":"{event}", "Taxi":false, "StarSystem":"{name}", '
+            f'"SystemAddress":{addr}, "StarPos":[{x:.2f},{y:.2f},{z:.2f}], "StarClass":"{star}", '
+            f'"Body":"{name}", "JumpDist":{self.rng.uniform(5, 60):.3f}, "FuelUsed":{self.rng.uniform(0.5, 5):.3f} }}\n'
+        )
+
+    def write(self, log_dir: str, *, files: int, lines_per_file: int) -> list[str]:
+        os.makedirs(log_dir, exist_ok=True)
+        rng = self.rng
+        paths = []
+        sys_idx = rng.randrange(len(self.systems))
+        for file_idx in range(files):
+            # Stary format nazwy dla pierwszych plikow: sortowanie musi byc chronologiczne.
+            stamp = _ts(self.clock)
+            if file_idx < files // 10:
+                file_name = f"Journal.{stamp[2:4]}{stamp[5:7]}{stamp[8:10]}{stamp[11:13]}{stamp[14:16]}{stamp[17:19]}.01.log"
+            else:
+                file_name = f"Journal.{stamp[:10]}T{stamp[11:13]}{stamp[14:16]}{stamp[17:19]}.01.log"
+            out = [
+                f'{{ "timestamp":"{self._tick()}", "event":"Fileheader", "part":1, "gameversion":"4.0", "build":"f84-{file_idx}" }}\n'
+            ]
+            s_name, s_addr, x, y, z, star = self.systems[sys_idx]
+            out.append(
+                f'{{ "timestamp":"{self._tick()}", "event":"Location", "Docked":false, "StarSystem":"{s_name}", '
+                f'"SystemAddress":{s_addr}, "StarPos":[{x:.2f},{y:.2f},{z:.2f}], "StarClass":"{star}" }}\n'
+            )
+            while len(out) < lines_per_file:
+                roll = rng.random()
+                if roll < 0.06:
+                    sys_idx = rng.randrange(len(self.systems))
+                    out.append(self._jump_line(sys_idx, event="CarrierJump" if roll < 0.003 else "FSDJump"))
+                    name, addr = self.systems[sys_idx][:2]
+                    out.append(
+                        f'{{ "timestamp":"{self._tick()}", "event":"Scan", "ScanType":"AutoScan", "BodyName":"{name}", '
+                        f'"StarSystem":"{name}", "SystemAddress":{addr}, "DistanceFromArrivalLS":0.0, '
+                        f'"StarType":"{self.systems[sys_idx][5]}", "Subclass":5 }}\n'
+                    )
+                elif roll < 0.075:
+                    st_name, st_sys, market_id, st_type, dist = self.stations[rng.randrange(len(self.stations))]
+                    sys_idx = st_sys
+                    out.append(self._jump_line(sys_idx))
+                    name, addr = self.systems[sys_idx][:2]
+                    services = '"dock","commodities","carrier_management"'
+                    if market_id % 2:
+                        services += ',"exploration","cartographics"'
+                    if market_id % 3 == 0:
+                        services += ',"vistagenomics"'
+                    tick = self._tick()
+                    out.append(
+                        f'{{ "timestamp":"{tick}", "event":"Docked", "StationName":"{st_name}", "StationType":"{st_type}", '
+                        f'"StarSystem":"{name}", "SystemAddress":{addr}, "MarketID":{market_id}, '
+                        f'"StationServices":[{services}], "DistFromStarLS":{dist:.1f} }}\n'
+                    )
+                    out.append(
+                        f'{{ "timestamp":"{tick}", "event":"Market", "MarketID":{market_id}, "StationName":"{st_name}", '
+                        f'"StationType":"{st_type}", "StarSystem":"{name}" }}\n'
+                    )
+                    if rng.random() < 0.5:
+                        out.append(
+                            f'{{ "timestamp":"{self._tick()}", "event":"SellExplorationData", "Systems":["{name}"], '
+                            f'"BaseValue":{rng.randint(1000, 90000)}, "Bonus":0, "TotalEarnings":{rng.randint(1000, 900000)} }}\n'
+                        )
+                    if rng.random() < 0.2:
+                        out.append(
+                            f'{{ "timestamp":"{self._tick()}", "event":"SellOrganicData", "MarketID":{market_id}, '
+                            f'"BioData":[], "TotalEarnings":{rng.randint(100000, 9000000)} }}\n'
+                        )
+                    out.append(
+                        f'{{ "timestamp":"{self._tick()}", "event":"Undocked", "StationName":"{st_name}", "MarketID":{market_id} }}\n'
+                    )
+                else:
+                    template = _NOISE[rng.randrange(len(_NOISE))]
+                    out.append(template.format(ts=self._tick(), addr=self.systems[sys_idx][1]))
+            path = os.path.join(log_dir, file_name)
+            with open(path, "w", encoding="utf-8") as handle:
+                handle.writelines(out[:lines_per_file])
+            paths.append(path)
+        return paths
+
+
+def _snapshot(db_path: str) -> dict[str, list[tuple]]:
+    """Zawartosc tabel po kluczach naturalnych (id i created/updated_at pomijamy)."""
+    conn = sqlite3.connect(db_path)
+    try:
+        return {
+            "systems": conn.execute(
+                """
+                SELECT system_name, system_address, system_id64, x, y, z, primary_star_type,
+                       is_neutron, is_black_hole, first_seen_ts, last_seen_ts
+                FROM systems ORDER BY system_address
+                """
+            ).fetchall(),
+            "stations": conn.execute(
+                """
+                SELECT system_name, system_address, station_name, market_id, station_type, is_fleet_carrier,
+                       distance_ls, has_uc, has_vista, has_market, first_seen_ts, last_seen_ts, services_freshness_ts
+                FROM stations ORDER BY market_id
+                """
+            ).fetchall(),
+            "jumps": conn.execute(
+                """
+                SELECT j.ts, t.system_address, f.system_address, j.jump_dist, j.fuel_used, j.jump_type
+                FROM jumps j JOIN systems t ON t.id = j.to_system_id LEFT JOIN systems f ON f.id = j.from_system_id
+                ORDER BY j.ts, t.system_address
+                """
+            ).fetchall(),
+            "jump_edges": conn.execute(
+                """
+                SELECT MIN(a.system_address, b.system_address), MAX(a.system_address, b.system_address),
+                       e.count, e.first_ts, e.last_ts
+                FROM jump_edges e JOIN systems a ON a.id = e.a_system_id JOIN systems b ON b.id = e.b_system_id
+                ORDER BY 1, 2
+                """
+            ).fetchall(),
+            "cashin_history": conn.execute(
+                "SELECT event_ts, system_name, station_name, service, total_earnings FROM cashin_history ORDER BY 1, 4, 5"
+            ).fetchall(),
+            "indexes": conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' ORDER BY name").fetchall(),
+        }
+    finally:
+        conn.close()
+
+
+class F84PlayerDbBulkImportTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def _db(self, name: str) -> str:
+        return os.path.join(self.root, name, "player_local.db")
+
+    def test_corpus_imports_above_throughput_floor(self) -> None:
+        paths = _Corpus(seed=84).write(
+            os.path.join(self.root, "journals"), files=CORPUS_FILES, lines_per_file=CORPUS_LINES_PER_FILE
+        )
+        progress: list[dict] = []
+        # Maly korpus nie przekracza progu zdejmowania indeksow - wymuszamy te sciezke.
+        result = player_db_bulk_import.bulk_import_journals(
+            paths, path=self._db("big"), processes=2, defer_indexes=None if PERF_TESTS else True, progress=progress.append
+        )
+
+        self.assertTrue(result["ok"])
+        self.assertEqual(result["files_processed"], CORPUS_FILES)
+        self.assertEqual(result["lines"], CORPUS_FILES * CORPUS_LINES_PER_FILE)
+        if PERF_TESTS:
+            self.assertGreater(result["events_per_sec"], BULK_IMPORT_FLOOR_EVENTS_PER_SEC)
+        self.assertGreater(result["deferred_indexes"], 0)
+        self.assertEqual(result["restored_indexes"], result["deferred_indexes"])
+        self.assertTrue(result["finalized_jumps"])
+
+        import_rows = [row for row in progress if row.get("phase") == "import"]
+        self.assertEqual(len(import_rows), CORPUS_FILES)
+        self.assertEqual(import_rows[-1]["files_done"], CORPUS_FILES)
+        self.assertEqual(import_rows[-1]["eta_sec"], 0.0)
+        self.assertTrue({"files_total", "events", "events_per_sec", "eta_sec"} <= set(import_rows[0]))
+        self.assertEqual(progress[-1]["phase"], "finalize")
+
+        again = player_db_bulk_import.bulk_import_journals(paths, path=self._db("big"), processes=2)
+        self.assertEqual(again["files_processed"], 0)
+        self.assertEqual(again["skipped_files"], CORPUS_FILES)
+
+    def test_parallel_import_matches_single_process_reference(self) -> None:
+        paths = _Corpus(seed=7).write(os.path.join(self.root, "journals"), files=40, lines_per_file=1_500)
+        reference = player_db_bulk_import.bulk_import_journals(paths, path=self._db("ref"), processes=1, txn_records=3_000)
+        parallel = player_db_bulk_import.bulk_import_journals(paths, path=self._db("par"), processes=3)
+
+        for key in ("inserted_systems", "inserted_stations", "inserted_jumps", "inserted_cashin", "lines"):
+            self.assertEqual(parallel[key], reference[key], key)
+        ref_rows = _snapshot(self._db("ref"))
+        par_rows = _snapshot(self._db("par"))
+        for table, rows in ref_rows.items():
+            self.assertEqual(par_rows[table], rows, table)
+        self.assertGreater(len(ref_rows["jump_edges"]), 0)
+        self.assertGreater(len(ref_rows["cashin_history"]), 0)
+
+    def test_bulk_import_agrees_with_live_ingest(self) -> None:
+        paths = _Corpus(seed=3, systems=60, stations=12).write(
+            os.path.join(self.root, "journals"), files=3, lines_per_file=400
+        )
+        player_db_bulk_import.bulk_import_journals(paths, path=self._db("bulk"), processes=1, defer_indexes=False)
+        state = {"system": "", "station": ""}
+        for path in paths:
+            with open(path, "r", encoding="utf-8") as handle:
+                for line in handle:
+                    ev = player_db_bulk_import.json.loads(line)
+                    name = ev.get("event")
+                    if name in ("Location", "FSDJump", "CarrierJump", "Docked"):
+                        state["system"] = ev.get("StarSystem") or state["system"]
+                        state["station"] = ev.get("StationName", "") if name == "Docked" else ""
+                    elif name == "Undocked":
+                        state["station"] = ""
+                    if name in player_db_bulk_import.BULK_IMPORT_EVENTS and name != "Market":
+                        player_local_db.ingest_journal_event(
+                            ev,
+                            path=self._db("live"),
+                            fallback_system_name=state["system"],
+                            fallback_station_name=state["station"],
+                        )
+        bulk = _snapshot(self._db("bulk"))
+        live = _snapshot(self._db("live"))
+        for table in ("systems", "jumps", "jump_edges", "cashin_history"):
+            self.assertEqual(bulk[table], live[table], table)
+        # Live nie zapisuje stacji z eventu Market ani nie zna MarketID przy Sell - porownujemy reszte.
+        self.assertEqual(
+            [row[:4] + row[5:7] + row[10:] for row in bulk["stations"]],
+            [row[:4] + row[5:7] + row[10:] for row in live["stations"]],
+        )
+
+    def test_killed_import_resumes_to_identical_database(self) -> None:
+        paths = _Corpus(seed=11).write(os.path.join(self.root, "journals"), files=60, lines_per_file=2_000)
+        log_dir = os.path.dirname(paths[0])
+        player_db_bulk_import.bulk_import_journals(paths, path=self._db("clean"), processes=1, txn_records=2_000)
+
+        killed_db = self._db("killed")
+        cmd = [
+            sys.executable,
+            os.path.join(PROJECT_ROOT, "tools", "playerdb_bulk_import.py"),
+            "--db-path",
+            killed_db,
+            "--log-dir",
+            log_dir,
+            "--processes",
+            "1",
+            "--txn-records",
+            "2000",
+            "--defer-indexes",
+            "--quiet",
+        ]
+        proc = subprocess.Popen(
+            cmd, cwd=PROJECT_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True
+        )
+        checkpoints = 0
+        try:
+            deadline = time.monotonic() + 60.0
+            while time.monotonic() < deadline and proc.poll() is None:
+                if os.path.isfile(killed_db):
+                    try:
+                        conn = sqlite3.connect(killed_db, timeout=0.1)
+                        try:
+                            checkpoints = int(conn.execute("SELECT COUNT(*) FROM journal_import_progress").fetchone()[0])
+                        finally:
+                            conn.close()
+                    except sqlite3.Error:
+                        checkpoints = 0
+                if checkpoints:
+                    break
+                time.sleep(0.01)
+            self.assertIsNone(proc.poll(), "import finished before it could be killed")
+            os.killpg(proc.pid, signal.SIGKILL)
+        finally:
+            proc.wait(timeout=30)
+        self.assertGreater(checkpoints, 0)
+
+        conn = sqlite3.connect(killed_db)
+        try:
+            done = int(conn.execute("SELECT COUNT(*) FROM journal_import_progress").fetchone()[0])
+        finally:
+            conn.close()
+        self.assertLess(done, len(paths))
+
+        rerun = player_db_bulk_import.bulk_import_journals(paths, path=killed_db, processes=1, txn_records=2_000)
+        self.assertTrue(rerun["ok"])
+        self.assertLess(rerun["files_processed"], len(paths))
+        self.assertEqual(_snapshot(killed_db), _snapshot(self._db("clean")))
+
+    def test_rerun_picks_up_appended_and_new_files_only(self) -> None:
+        corpus = _Corpus(seed=5, systems=200, stations=30)
+        log_dir = os.path.join(self.root, "journals")
+        paths = corpus.write(log_dir, files=4, lines_per_file=600)
+        first = player_db_bulk_import.bulk_import_journals(paths, path=self._db("inc"), processes=1)
+        self.assertEqual(first["files_processed"], 4)
+
+        with open(paths[-1], "a", encoding="utf-8") as handle:
+            handle.write(corpus._jump_line(7))
+            handle.write('{ "timestamp":"2099-01-01T00:00:00Z", "event":"FSDJump", "StarSys')  # niedopisana linia
+        appended_ts = _ts(corpus.clock)
+        more = corpus.write(log_dir, files=1, lines_per_file=300)
+        second = player_db_bulk_import.bulk_import_journals(paths + more, path=self._db("inc"), processes=1)
+        self.assertEqual(second["files_processed"], 2)
+        self.assertEqual(second["resumed_files"], 1)
+        self.assertEqual(second["skipped_files"], 3)
+        self.assertEqual(second["lines"], 1 + 300)
+
+        conn = sqlite3.connect(self._db("inc"))
+        try:
+            jumps = int(conn.execute("SELECT COUNT(*) FROM jumps WHERE ts LIKE '2099%'").fetchone()[0])
+            appended = conn.execute("SELECT from_system_id FROM jumps WHERE ts = ?", (appended_ts,)).fetchone()
+        finally:
+            conn.close()
+        self.assertEqual(jumps, 0)
+        self.assertIsNotNone(appended)
+        self.assertIsNotNone(appended[0])
+
+    def test_v7_upgrades_v6_progress_rows_and_reimports_them_once(self) -> None:
+        corpus = _Corpus(seed=6, systems=100, stations=20)
+        paths = corpus.write(os.path.join(self.root, "journals"), files=2, lines_per_file=200)
+        db_path = self._db("v6")
+        player_local_db.ensure_playerdb_schema(path=db_path)
+        # Baza z v6: tabela postepu bez podpisu naglowka, checkpoint po starym backfillu.
+        conn = sqlite3.connect(db_path)
+        try:
+            conn.execute("DROP TABLE journal_import_progress;")
+            conn.execute("DROP TABLE bulk_import_state;")
+            conn.execute(
+                """
+                CREATE TABLE journal_import_progress (
+                    file_name TEXT PRIMARY KEY,
+                    file_offset INTEGER NOT NULL DEFAULT 0,
+                    updated_at TEXT NOT NULL
+                );
+                """
+            )
+            conn.execute(
+                "INSERT INTO journal_import_progress VALUES (?, ?, '2026-01-01T00:00:00Z');",
+                (os.path.basename(paths[0]), os.path.getsize(paths[0])),
+            )
+            conn.execute("DELETE FROM schema_migrations WHERE version >= 7;")
+            conn.execute("PRAGMA user_version = 6;")
+            conn.commit()
+        finally:
+            conn.close()
+
+        result = player_local_db.ensure_playerdb_schema(path=db_path)
+        self.assertEqual(int(result.get("schema_version") or 0), player_local_db.PLAYERDB_SCHEMA_VERSION)
+        first = player_db_bulk_import.bulk_import_journals(paths, path=db_path, processes=1)
+        self.assertEqual(first["replaced_files"], 1)
+        self.assertEqual(first["files_processed"], 2)
+        again = player_db_bulk_import.bulk_import_journals(paths, path=db_path, processes=1)
+        self.assertEqual(again["skipped_files"], 2)
+
+    def test_journal_sort_key_orders_old_and_new_names_chronologically(self) -> None:
+        names = [
+            "Journal.2022-11-01T100000.01.log",
+            "Journal.221030120000.02.log",
+            "Journal.221030120000.01.log",
+            "Journal.170101000000.01.log",
+        ]
+        self.assertEqual(
+            sorted(names, key=player_db_bulk_import.journal_sort_key),
+            [
+                "Journal.170101000000.01.log",
+                "Journal.221030120000.01.log",
+                "Journal.221030120000.02.log",
+                "Journal.2022-11-01T100000.01.log",
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+import os
+import random
+import statistics
+import tempfile
+import time
+import unittest
+
+from logic import player_local_db
+from logic.personal_map_data_provider import MapDataProvider
+from logic.personal_map_model import MapNodeModel, node_key_from_row
+
+# Baza 50k systemow, 1000 losowych delt i budzety ms tylko z RENATA_PERF_TESTS=1;
+# domyslnie mniejsza baza (nadal wieksza niz limit 5k nodow mapy).
+PERF_TESTS = os.getenv("RENATA_PERF_TESTS") == "1"
+SEED_SYSTEMS = 50_000 if PERF_TESTS else 10_000
+SEED_STATIONS = 6_000
+# Delta po pojedynczym FSDJump ma zostac ponizej 10 ms takze na wolnym CI.
+DELTA_APPLY_BUDGET_MS = 10.0
+RANDOM_DELTAS = 1_000 if PERF_TESTS else 200
+
+
+def _ts(second: int) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(1_700_000_000 + second))
+
+
+def _full_model(provider: MapDataProvider) -> MapNodeModel:
+    rows, meta = provider.get_system_nodes(time_range="all", source_filter="observed_only")
+    flags_by_id, _ = provider.get_layer_flags_for([row["system_id"] for row in rows])
+    flags_by_key = {node_key_from_row(row): flags_by_id[row["system_id"]] for row in rows}
+    edges, _ = provider.get_edges(time_range="all")
+    model = MapNodeModel()
+    ok = model.load(rows, edges=edges, flags_by_key=flags_by_key, limit=meta["limit"])
+    assert ok
+    return model
+
+
+class F85MapDeltaUpdatesTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self._tmp.name, "player_local.db")
+        self.provider = MapDataProvider(db_path=self.db_path)
+        self.rng = random.Random(85)
+        self.clock = SEED_SYSTEMS + 10
+        with player_local_db.playerdb_connection(path=self.db_path, ensure_schema=True) as conn:
+            # Seed jak import masowy: flagi warstw przeliczane raz po wstawieniu.
+            player_local_db.defer_layer_flags(conn)
+            conn.commit()
+            conn.executemany(
+                """
+                INSERT INTO systems (system_name, system_address, x, y, z, primary_star_type, first_seen_ts, last_seen_ts)
+                VALUES (?, ?, ?, ?, ?, 'K', ?, ?)
+                """,
+                [
+                    (f"F85 Seed {idx}", 85_000_000 + idx, idx % 317 * 2.0, idx % 5 * 1.0, idx // 317 * 3.0, _ts(idx), _ts(idx))
+                    for idx in range(SEED_SYSTEMS)
+                ],
+            )
+            # Czesc stacji bez adresu systemu (jak z Market.json) - dopasowanie po nazwie.
+            conn.executemany(
+                """
+                INSERT INTO stations (system_name, system_address, station_name, has_uc, has_vista, has_market, last_seen_ts)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (
+                        f"F85 Seed {sys_idx}",
+                        None if idx % 4 == 0 else 85_000_000 + sys_idx,
+                        f"F85 Port {idx}",
+                        idx % 3 == 0,
+                        idx % 5 == 0,
+                        idx % 2 == 0,
+                        _ts(sys_idx),
+                    )
+                    for idx, sys_idx in enumerate(
+                        SEED_SYSTEMS - 1 - (k * 7) % 9_000 for k in range(SEED_STATIONS)
+                    )
+                ],
+            )
+            conn.executemany(
+                "INSERT INTO cashin_history (event_ts, system_name, service, total_earnings) VALUES (?, ?, ?, ?)",
+                [
+                    (_ts(SEED_SYSTEMS - idx), f"F85 Seed {SEED_SYSTEMS - 1 - idx * 3}", ("UC", "VISTA")[idx % 2], 1000)
+                    for idx in range(1_500)
+                ],
+            )
+            conn.commit()
+        player_local_db.rebuild_layer_flags(path=self.db_path)
+        self.current = SEED_SYSTEMS - 1
+        self.new_systems = 0
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def _tick(self) -> str:
+        self.clock += 1
+        return _ts(self.clock)
+
+    def _system(self, idx: int) -> tuple[str, int]:
+        if idx >= SEED_SYSTEMS:
+            return f"F85 New {idx}", 86_000_000 + idx
+        return f"F85 Seed {idx}", 85_000_000 + idx
+
+    def _ingest(self, ev: dict) -> player_local_db.PlayerDbChangeSet:
+        out = player_local_db.ingest_journal_event(ev, path=self.db_path)
+        self.assertTrue(out.get("ok"), out)
+        return out["changes"]
+
+    def _jump(self, idx: int) -> player_local_db.PlayerDbChangeSet:
+        name, addr = self._system(idx)
+        self.current = idx
+        return self._ingest(
+            {
+                "timestamp": self._tick(),
+                "event": "FSDJump",
+                "StarSystem": name,
+                "SystemAddress": addr,
+                "StarPos": [idx % 101 * 1.5, 2.0, idx % 13 * 4.0],
+                "JumpDist": 12.5,
+                "FuelUsed": 1.0,
+            }
+        )
+
+    def _random_delta(self) -> player_local_db.PlayerDbChangeSet:
+        roll = self.rng.random()
+        if roll < 0.25:
+            self.new_systems += 1
+            return self._jump(SEED_SYSTEMS + self.new_systems)
+        if roll < 0.45:
+            return self._jump(self.rng.randrange(SEED_SYSTEMS))
+        name, addr = self._system(self.current)
+        if roll < 0.6:
+            return self._ingest(
+                {
+                    "timestamp": self._tick(),
+                    "event": "Docked",
+                    "StarSystem": name,
+                    "SystemAddress": addr,
+                    "StationName": f"F85 Dock {self.rng.randrange(400)}",
+                    "MarketID": None,
+                    "DistFromStarLS": float(self.rng.randrange(10, 5000)),
+                    "StationServices": self.rng.sample(
+                        ["commodities", "universalcartographics", "vistagenomics", "refuel"], 2
+                    ),
+                }
+            )
+        if roll < 0.72:
+            out = player_local_db.ingest_market_json(
+                {
+                    "timestamp": self._tick(),
+                    "StarSystem": name,
+                    "StationName": f"F85 Market {self.rng.randrange(200)}",
+                    "Items": [{"Name": "gold", "BuyPrice": self.rng.randrange(9000, 9900), "SellPrice": 9000}],
+                },
+                path=self.db_path,
+            )
+            self.assertTrue(out.get("ok"), out)
+            return out["changes"]
+        if roll < 0.88:
+            sell_name, _ = self._system(self.rng.choice([self.current, self.rng.randrange(SEED_SYSTEMS)]))
+            return self._ingest(
+                {
+                    "timestamp": self._tick(),
+                    "event": self.rng.choice(["SellExplorationData", "SellOrganicData"]),
+                    "StarSystem": sell_name,
+                    "TotalEarnings": 12345,
+                }
+            )
+        out = player_local_db.ingest_star_metadata_event(
+            {
+                "timestamp": self._tick(),
+                "event": "Scan",
+                "StarSystem": name,
+                "SystemAddress": addr,
+                "DistanceFromArrivalLS": 0.0,
+                "StarType": self.rng.choice(["N", "H", "M"]),
+            },
+            path=self.db_path,
+        )
+        return out.get("changes") or player_local_db.PlayerDbChangeSet()
+
+    def test_fsdjump_delta_touches_few_systems_and_beats_full_reload(self) -> None:
+        t0 = time.perf_counter()
+        model = _full_model(self.provider)
+        full_reload_ms = (time.perf_counter() - t0) * 1000.0
+        self.assertEqual(len(model.ordered_rows()), 5000)
+
+        durations: list[float] = []
+        for step in range(15):
+            target = SEED_SYSTEMS + 1 + step if step % 3 else self.rng.randrange(SEED_SYSTEMS // 2)
+            changes = self._jump(target)
+            t0 = time.perf_counter()
+            result = model.apply_changes(self.provider, changes)
+            durations.append((time.perf_counter() - t0) * 1000.0)
+            self.assertFalse(result["full_reload"], result)
+            self.assertLessEqual(result["fetched_nodes"], 2)
+            self.assertLessEqual(result["flag_systems"], 2)
+            self.assertIn(str(self._system(target)[1]), result["touched_keys"])
+        if PERF_TESTS:
+            median_ms = statistics.median(durations)
+            self.assertLess(median_ms, DELTA_APPLY_BUDGET_MS, durations)
+            self.assertLess(median_ms * 5, full_reload_ms, (median_ms, full_reload_ms))
+
+    def test_random_deltas_match_fresh_full_reload(self) -> None:
+        model = _full_model(self.provider)
+        for step in range(1, RANDOM_DELTAS + 1):
+            result = model.apply_changes(self.provider, self._random_delta())
+            self.assertFalse(result["full_reload"], (step, result))
+            if step % (RANDOM_DELTAS // 4) == 0:
+                self.assertEqual(model.snapshot(), _full_model(self.provider).snapshot(), step)
+
+    def test_schema_change_requests_full_reload(self) -> None:
+        model = _full_model(self.provider)
+        changes = self._jump(SEED_SYSTEMS + 1)
+        changes.schema_version = player_local_db.PLAYERDB_SCHEMA_VERSION + 1
+        result = model.apply_changes(self.provider, changes)
+        self.assertTrue(result["full_reload"])
+        self.assertEqual(result["reason"], "schema_changed")
+        self.assertFalse(model.loaded)
+
+    def test_late_jump_that_removes_an_edge_requests_full_reload(self) -> None:
+        self._jump(SEED_SYSTEMS + 1)
+        self.clock += 10
+        self._jump(SEED_SYSTEMS + 2)
+        model = _full_model(self.provider)
+
+        # Skok sprzed ostatniego dochodzi pozno: para (+1, +2) traci swoj jedyny skok.
+        name, addr = self._system(SEED_SYSTEMS + 3)
+        changes = self._ingest(
+            {
+                "timestamp": _ts(self.clock - 5),
+                "event": "FSDJump",
+                "StarSystem": name,
+                "SystemAddress": addr,
+                "StarPos": [1.0, 2.0, 3.0],
+            }
+        )
+        self.assertEqual(len(changes.edges_removed), 1)
+        result = model.apply_changes(self.provider, changes)
+        self.assertTrue(result["full_reload"])
+        self.assertEqual(result["reason"], "edges_removed")
+
+        restored = player_local_db.PlayerDbChangeSet.from_payload(changes.to_payload())
+        self.assertEqual(restored.edges_removed, changes.edges_removed)
+        # Pozniejsza delta wygrywa: para usunieta po dodaniu zostaje usunieta.
+        pair = next(iter(changes.edges_removed))
+        merged = player_local_db.PlayerDbChangeSet(edges={pair}).merge(changes)
+        self.assertNotIn(pair, merged.edges)
+        self.assertIn(pair, merged.edges_removed)
+        readded = changes.merge(player_local_db.PlayerDbChangeSet(edges={pair}))
+        self.assertIn(pair, readded.edges)
+        self.assertNotIn(pair, readded.edges_removed)
+
+    def test_change_set_round_trips_through_payload(self) -> None:
+        changes = self._jump(SEED_SYSTEMS + 1)
+        payload = changes.to_payload()
+        restored = player_local_db.PlayerDbChangeSet.from_payload(payload)
+        self.assertEqual(restored, changes)
+        self.assertIs(player_local_db.PlayerDbChangeSet.from_payload(changes), changes)
+        self.assertIsNone(player_local_db.PlayerDbChangeSet.from_payload(None))
+
+    def test_layer_flags_for_match_legacy_station_and_action_flags(self) -> None:
+        rows, _ = self.provider.get_system_nodes(limit=600)
+        flags_by_id, _ = self.provider.get_layer_flags_for([row["system_id"] for row in rows])
+        stations, _ = self.provider.get_station_layer_flags_for_systems(systems=rows)
+        actions, _ = self.provider.get_system_action_flags(system_names=[row["system_name"] for row in rows])
+        for row in rows:
+            flags = flags_by_id[row["system_id"]]
+            # Systemy z adresem: stacje tylko po adresie (jak batch i `get_stations_for_system`).
+            legacy = stations.get(f"addr:{row['system_address']}") or {}
+            activity = actions.get(row["system_name"].casefold()) or {}
+            self.assertEqual(flags["stations_count"], int(legacy.get("stations_count") or 0), row)
+            self.assertEqual(flags["has_market"], bool(legacy.get("has_market")), row)
+            self.assertEqual(flags["has_cashin"], bool(legacy.get("has_cashin")), row)
+            self.assertEqual(flags["has_exobio"], bool(activity.get("has_exobio")), row)
+            self.assertEqual(flags["has_exploration"], bool(activity.get("has_exploration")), row)
+
+
+if __name__ == "__main__":
+    unittest.main()
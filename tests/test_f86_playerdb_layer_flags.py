@@ -0,0 +1,313 @@
+from __future__ import annotations
+
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from gui.tabs.journal_map import JournalMapTab
+from logic import player_db_bulk_import, player_local_db
+from logic.personal_map_data_provider import MapDataProvider, decode_layer_flags
+
+# Pelna baza (100k systemow, 300k stacji) i budzety ms tylko z RENATA_PERF_TESTS=1.
+PERF_TESTS = os.getenv("RENATA_PERF_TESTS") == "1"
+PERF_SYSTEMS = 100_000 if PERF_TESTS else 10_000
+PERF_STATIONS = 300_000 if PERF_TESTS else 30_000
+PERF_NODES = 5_000
+# Odczyt flag 5k nodow z `system_layer_flags` (lookup po PK + dekodowanie).
+FLAGS_QUERY_BUDGET_MS = 30.0
+
+
+def _iso(dt: datetime) -> str:
+    return dt.isoformat().replace("+00:00", "Z")
+
+
+class _Var:
+    def __init__(self, value: object) -> None:
+        self.value = value
+
+    def get(self) -> object:
+        return self.value
+
+
+class _LegacyFlagsHost:
+    """Minimalny host starej sciezki `_compute_layer_flags_for_nodes` (bez Tk)."""
+
+    _compute_layer_flags_for_nodes = JournalMapTab._compute_layer_flags_for_nodes
+    _effective_time_range_filter = JournalMapTab._effective_time_range_filter
+    _effective_freshness_filter = JournalMapTab._effective_freshness_filter
+    _filter_rows_by_freshness = JournalMapTab._filter_rows_by_freshness
+    _passes_freshness_filter = JournalMapTab._passes_freshness_filter
+    _node_key_from_row = JournalMapTab._node_key_from_row
+
+    def __init__(self, provider: MapDataProvider, *, time_range: str) -> None:
+        self.data_provider = provider
+        self.last_session_only_var = _Var(False)
+        self.time_range_var = _Var(time_range)
+        self.freshness_var = _Var("any")
+        self._action_layers_meta = {}
+
+
+class F86PlayerDbLayerFlagsTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self._tmp.name, "player_local.db")
+        self.provider = MapDataProvider(db_path=self.db_path)
+        self.rng = random.Random(86)
+        self.now = datetime.now(timezone.utc)
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def _ago(self, hours: float) -> str:
+        return _iso(self.now - timedelta(hours=hours))
+
+    def _seed_random_fixture(self, conn: sqlite3.Connection, *, systems: int = 300) -> None:
+        rng = self.rng
+        conn.executemany(
+            "INSERT INTO systems (system_name, system_address, x, y, z, last_seen_ts) VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (f"F86 Sys {idx}", None if idx % 9 == 0 else 86_000_000 + idx, 1.0 * idx, 0.0, 2.0 * idx, self._ago(idx))
+                for idx in range(systems)
+            ],
+        )
+        stations = []
+        for idx in range(systems * 3):
+            sys_idx = rng.randrange(systems)
+            no_address = sys_idx % 9 == 0 or rng.random() < 0.2
+            stations.append(
+                (
+                    f"F86 Sys {sys_idx}",
+                    None if no_address else 86_000_000 + sys_idx,
+                    f"F86 Port {idx}",
+                    rng.random() < 0.3,
+                    rng.random() < 0.2,
+                    rng.random() < 0.5,
+                    rng.choice([None, float(rng.randrange(10, 9000))]),
+                    self._ago(rng.uniform(0, 2000)),
+                )
+            )
+        conn.executemany(
+            """
+            INSERT INTO stations (system_name, system_address, station_name, has_uc, has_vista, has_market, distance_ls, last_seen_ts)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            stations,
+        )
+        conn.executemany(
+            "INSERT INTO cashin_history (event_ts, system_name, service, total_earnings) VALUES (?, ?, ?, 1000)",
+            [
+                (
+                    self._ago(rng.uniform(0, 24 * 60)),
+                    f"F86 Sys {rng.randrange(systems)}".upper() if rng.random() < 0.1 else f"F86 Sys {rng.randrange(systems)}",
+                    rng.choice(["UC", "VISTA", "uc"]),
+                )
+                for _ in range(systems)
+            ],
+        )
+        conn.executemany(
+            "INSERT INTO trade_history (event_ts, system_name, station_name, action) VALUES (?, ?, 'F86 Port', 'buy')",
+            [(self._ago(1), f"F86 Sys {rng.randrange(systems)}") for _ in range(systems // 10)],
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO visited_nav_beacons (system_address, system_name, last_scan_utc) VALUES (?, ?, ?)",
+            [(86_000_000 + idx, f"F86 Sys {idx}", self._ago(2)) for idx in range(1, systems, 7) if idx % 9],
+        )
+        conn.commit()
+
+    def _flags_stored(self) -> dict[int, int]:
+        with player_local_db.playerdb_connection(path=self.db_path) as conn:
+            return {int(r[0]): int(r[1]) for r in conn.execute("SELECT system_id, flags FROM system_layer_flags;")}
+
+    def test_flag_query_for_5k_nodes_is_an_indexed_lookup(self) -> None:
+        with player_local_db.playerdb_connection(path=self.db_path) as conn:
+            # Seed jak import masowy: triggery odroczone, na koniec jeden rebuild.
+            player_local_db.defer_layer_flags(conn)
+            conn.commit()
+            conn.executemany(
+                "INSERT INTO systems (system_name, system_address, x, y, z, last_seen_ts) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (f"F86 Big {idx}", 87_000_000 + idx, idx % 317 * 2.0, 0.0, idx // 317 * 2.0, _iso(self.now - timedelta(minutes=idx)))
+                    for idx in range(PERF_SYSTEMS)
+                ],
+            )
+            conn.executemany(
+                "INSERT INTO stations (system_name, system_address, station_name, has_market, has_uc) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (f"F86 Big {idx % PERF_SYSTEMS}", 87_000_000 + idx % PERF_SYSTEMS, f"F86 Big Port {idx}", idx % 2, idx % 3 == 0)
+                    for idx in range(PERF_STATIONS)
+                ],
+            )
+            conn.commit()
+        rebuild = player_local_db.rebuild_layer_flags(path=self.db_path)
+        self.assertEqual(rebuild["systems"], PERF_SYSTEMS)
+
+        rows, meta = self.provider.get_system_nodes_with_flags(limit=PERF_NODES)
+        self.assertTrue(meta["layer_flags_available"])
+        self.assertEqual(len(rows), PERF_NODES)
+        self.assertTrue(all(row["layer_mask"] & player_local_db.LAYER_FLAG_STATION for row in rows))
+        ids = [row["system_id"] for row in rows]
+
+        durations: list[float] = []
+        for _ in range(5):
+            t0 = time.perf_counter()
+            flags, flags_meta = self.provider.get_layer_flags_for(ids)
+            durations.append((time.perf_counter() - t0) * 1000.0)
+        self.assertEqual(flags_meta["source"], "system_layer_flags")
+        self.assertEqual(len(flags), PERF_NODES)
+        if PERF_TESTS:
+            self.assertLess(statistics.median(durations), FLAGS_QUERY_BUDGET_MS, durations)
+
+            # Jeden round trip nodes+maski wyprzedza nody + agregacje flag w locie.
+            t0 = time.perf_counter()
+            self.provider.get_system_nodes_with_flags(limit=PERF_NODES)
+            with_flags_ms = (time.perf_counter() - t0) * 1000.0
+            t0 = time.perf_counter()
+            self.provider.get_system_nodes(limit=PERF_NODES)
+            self.provider.get_layer_flags_for(ids, freshness_filter="<=7d")
+            two_queries_ms = (time.perf_counter() - t0) * 1000.0
+            self.assertLess(with_flags_ms, two_queries_ms, (with_flags_ms, two_queries_ms))
+
+    def test_bitmasks_match_old_per_node_computation(self) -> None:
+        with player_local_db.playerdb_connection(path=self.db_path) as conn:
+            self._seed_random_fixture(conn)
+        for time_range in ("all", "30d", "7d"):
+            rows, meta = self.provider.get_system_nodes_with_flags(limit=5000, time_range=time_range)
+            self.assertTrue(meta["layer_flags_available"])
+            host = _LegacyFlagsHost(self.provider, time_range=time_range)
+            legacy = host._compute_layer_flags_for_nodes(rows)
+            for row in rows:
+                decoded = decode_layer_flags(
+                    row["layer_mask"],
+                    stations_count=row["layer_stations_count"],
+                    last_exploration_ts=row["layer_last_exploration_ts"],
+                    last_exobio_ts=row["layer_last_exobio_ts"],
+                    time_range=time_range,
+                )
+                self.assertEqual(decoded, legacy[host._node_key_from_row(row)], (time_range, row["system_name"]))
+
+    def test_incremental_maintenance_matches_rebuild_after_random_ingest(self) -> None:
+        with player_local_db.playerdb_connection(path=self.db_path) as conn:
+            self._seed_random_fixture(conn, systems=80)
+        rng = self.rng
+        clock = [0]
+
+        def _ts() -> str:
+            clock[0] += 1
+            return self._ago(48 - clock[0] / 100.0)
+
+        for _step in range(400):
+            idx = rng.randrange(120)
+            name = f"F86 Sys {idx}"
+            addr = 86_000_000 + idx if idx % 9 else None
+            roll = rng.random()
+            if roll < 0.25:
+                player_local_db.ingest_journal_event(
+                    {"timestamp": _ts(), "event": "FSDJump", "StarSystem": name, "SystemAddress": addr, "StarPos": [1.0, 2.0, 3.0]},
+                    path=self.db_path,
+                )
+            elif roll < 0.45:
+                player_local_db.ingest_journal_event(
+                    {
+                        "timestamp": _ts(),
+                        "event": "Docked",
+                        "StarSystem": name,
+                        "SystemAddress": addr,
+                        "StationName": f"F86 Dock {rng.randrange(60)}",
+                        "DistFromStarLS": float(rng.randrange(10, 900)),
+                        "StationServices": rng.sample(["commodities", "universalcartographics", "vistagenomics", "refuel"], 2),
+                    },
+                    path=self.db_path,
+                )
+            elif roll < 0.6:
+                player_local_db.ingest_journal_event(
+                    {"timestamp": _ts(), "event": rng.choice(["SellExplorationData", "SellOrganicData"]), "StarSystem": name},
+                    path=self.db_path,
+                )
+            elif roll < 0.72:
+                player_local_db.ingest_market_json(
+                    {
+                        "timestamp": _ts(),
+                        "StarSystem": name,
+                        "StationName": f"F86 Market {rng.randrange(30)}",
+                        "Items": [{"Name": "gold", "BuyPrice": rng.randrange(9000, 9900), "SellPrice": 9000}],
+                    },
+                    path=self.db_path,
+                )
+            elif roll < 0.8 and addr is not None:
+                player_local_db.mark_nav_beacon_as_scanned(addr, name, path=self.db_path, last_scan_utc=_ts())
+            elif roll < 0.88:
+                player_local_db.ingest_star_metadata_event(
+                    {"timestamp": _ts(), "event": "Scan", "StarSystem": name, "SystemAddress": addr, "DistanceFromArrivalLS": 0.0, "StarType": "N"},
+                    path=self.db_path,
+                )
+            else:
+                with player_local_db.playerdb_connection(path=self.db_path) as conn:
+                    table = rng.choice(["stations", "cashin_history", "market_snapshots", "visited_nav_beacons", "trade_history"])
+                    conn.execute(f"DELETE FROM {table} WHERE rowid IN (SELECT rowid FROM {table} ORDER BY random() LIMIT 3);")
+                    if rng.random() < 0.3:
+                        conn.execute(
+                            "UPDATE systems SET system_name = 'F86 Renamed ' || id "
+                            "WHERE id = (SELECT id FROM systems ORDER BY random() LIMIT 1);"
+                        )
+                    conn.commit()
+
+        report = player_local_db.check_layer_flags_consistency(path=self.db_path)
+        self.assertTrue(report["ok"], report)
+        self.assertGreater(report["systems"], 80)
+        incremental = self._flags_stored()
+        player_local_db.rebuild_layer_flags(path=self.db_path)
+        self.assertEqual(incremental, self._flags_stored())
+
+    def test_deferred_flags_fall_back_to_query_and_rebuild_restores(self) -> None:
+        with player_local_db.playerdb_connection(path=self.db_path) as conn:
+            player_local_db.defer_layer_flags(conn)
+            conn.commit()
+            self._seed_random_fixture(conn, systems=40)
+        report = player_local_db.check_layer_flags_consistency(path=self.db_path)
+        self.assertTrue(report["deferred"])
+        self.assertFalse(report["ok"])
+        rows, meta = self.provider.get_system_nodes_with_flags()
+        self.assertFalse(meta["layer_flags_available"])
+        self.assertIsNone(rows[0]["layer_mask"])
+        _flags, flags_meta = self.provider.get_layer_flags_for([row["system_id"] for row in rows])
+        self.assertEqual(flags_meta["source"], "query")
+
+        player_local_db.rebuild_layer_flags(path=self.db_path)
+        report = player_local_db.check_layer_flags_consistency(path=self.db_path)
+        self.assertTrue(report["ok"], report)
+        self.assertFalse(report["deferred"])
+
+    def test_bulk_import_rebuilds_flags_once_at_the_end(self) -> None:
+        journal = os.path.join(self._tmp.name, "Journal.2026-01-01T000000.01.log")
+        lines = []
+        for idx in range(30):
+            lines.append(
+                f'{{ "timestamp":"2026-01-01T00:{idx:02d}:00Z", "event":"FSDJump", "StarSystem":"F86 Bulk {idx}", '
+                f'"SystemAddress":{88_000_000 + idx}, "StarPos":[{idx}.0,0.0,0.0], "JumpDist":5.0, "FuelUsed":1.0 }}'
+            )
+            if idx % 3 == 0:
+                lines.append(
+                    f'{{ "timestamp":"2026-01-01T00:{idx:02d}:30Z", "event":"Docked", "StarSystem":"F86 Bulk {idx}", '
+                    f'"SystemAddress":{88_000_000 + idx}, "StationName":"F86 Bulk Port {idx}", "MarketID":{89_000_000 + idx}, '
+                    '"StationServices":["commodities","universalcartographics"], "DistFromStarLS":120.0 }'
+                )
+        with open(journal, "w", encoding="utf-8") as handle:
+            handle.write("\n".join(lines) + "\n")
+
+        summary = player_db_bulk_import.bulk_import_journals([journal], path=self.db_path, processes=1)
+        self.assertTrue(summary["rebuilt_layer_flags"])
+        report = player_local_db.check_layer_flags_consistency(path=self.db_path)
+        self.assertTrue(report["ok"], report)
+        stored = self._flags_stored()
+        docked = [flags for flags in stored.values() if flags & player_local_db.LAYER_FLAG_STATION]
+        self.assertEqual(len(docked), 10)
+        self.assertTrue(all(flags & player_local_db.LAYER_FLAG_MARKET for flags in docked))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,10 +1,15 @@
 import unittest
 from types import SimpleNamespace
+from unittest.mock import patch
 
 import config
+from logic import jump_range_engine
 from logic.jump_range_engine import (
+    clear_jump_range_curve_cache,
+    compute_jump_range_batch,
     compute_jump_range_current,
     compute_jump_range_loadout_max,
+    get_jump_range_curve,
 )
 
 
@@ -57,8 +62,10 @@ class JumpRangeEngineTests(unittest.TestCase):
         config.config._settings["jump_range_include_reservoir_mass"] = True
         config.config._settings["jump_range_engineering_enabled"] = True
         config.config._settings["jump_range_rounding"] = 2
+        clear_jump_range_curve_cache()
 
     def tearDown(self) -> None:
+        clear_jump_range_curve_cache()
         config.config._settings = self._orig
 
     def test_compute_jump_range_current_success(self) -> None:
@@ -116,6 +123,62 @@ class JumpRangeEngineTests(unittest.TestCase):
         self.assertGreater(mass_manager.jump_range_ly, base.jump_range_ly)
         self.assertEqual(mass_manager.details.get("engineering_source"), "experimental")
 
+    def test_curve_is_resolved_once_per_loadout(self) -> None:
+        modules = _modules_data()
+        ship = _ship_state()
+        with patch.object(
+            jump_range_engine, "_resolve_fsd_params", wraps=jump_range_engine._resolve_fsd_params
+        ) as resolve_mock:
+            first = compute_jump_range_current(ship, modules)
+            ship.fuel_main_t = 2.0
+            ship.cargo_mass_t = 50.0
+            second = compute_jump_range_current(ship, modules)
+            self.assertEqual(resolve_mock.call_count, 1)
+
+            ship.fsd["experimental"] = "Mass Manager"
+            compute_jump_range_current(ship, modules)
+            self.assertEqual(resolve_mock.call_count, 2)
+
+        self.assertAlmostEqual(first.jump_range_ly, 60.0, places=2)
+        self.assertLess(second.jump_range_ly, first.jump_range_ly)
+
+    def test_curve_cache_evicts_least_recently_used_loadout(self) -> None:
+        modules = _modules_data()
+        limit = jump_range_engine._CURVE_CACHE_LIMIT
+        hot = _ship_state(unladen=100.0)
+        get_jump_range_curve(hot, modules)
+        with patch.object(
+            jump_range_engine, "_resolve_fsd_params", wraps=jump_range_engine._resolve_fsd_params
+        ) as resolve_mock:
+            for idx in range(limit):
+                get_jump_range_curve(_ship_state(unladen=200.0 + idx), modules)
+                # Aktywny loadout trafia w cache przy kazdym odswiezeniu.
+                get_jump_range_curve(hot, modules)
+            self.assertEqual(resolve_mock.call_count, limit)
+
+        self.assertEqual(len(jump_range_engine._CURVE_CACHE), limit)
+        self.assertIn(jump_range_engine._loadout_curve_key(hot), jump_range_engine._CURVE_CACHE)
+
+    def test_batch_matches_single_state_results(self) -> None:
+        modules = _modules_data()
+        fuel_states = [8.0, 5.0, 4.0, 1.5, 0.0]
+        cargo_states = [10.0, 10.0, 0.0, 30.0, 10.0]
+        batch = compute_jump_range_batch(_ship_state(), modules, fuel_states, cargo_states)
+
+        expected = []
+        for fuel, cargo in zip(fuel_states, cargo_states):
+            result = compute_jump_range_current(_ship_state(fuel_main=fuel, cargo=cargo), modules)
+            expected.append(result.jump_range_ly)
+        self.assertEqual(batch, expected)
+
+        # cargo None -> biezacy ladunek statku; krzywa bez zaokraglen.
+        self.assertEqual(compute_jump_range_batch(_ship_state(cargo=10.0), modules, [4.0]), [60.0])
+        curve = get_jump_range_curve(_ship_state(), modules)
+        self.assertAlmostEqual(curve.ranges([4.0], 10.0, fuel_reservoir_t=1.0)[0], 59.9961, places=4)
+        with self.assertRaises(ValueError):
+            curve.ranges([1.0, 2.0], [0.0])
+        self.assertIsNone(compute_jump_range_batch(_ship_state(), {"fsd": []}, [1.0]))
+
 
 if __name__ == "__main__":
     unittest.main()
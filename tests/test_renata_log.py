@@ -29,12 +29,12 @@ class RenataLogTests(unittest.TestCase):
         self._dummy_queue = DummyQueue()
         utils.MSG_QUEUE = self._dummy_queue
         self._orig_now = renata_log._now
-        renata_log._THROTTLE_LAST.clear()
+        renata_log._reset_log_sink_for_tests()
 
     def tearDown(self) -> None:
         utils.MSG_QUEUE = self._orig_queue
         renata_log._now = self._orig_now
-        renata_log._THROTTLE_LAST.clear()
+        renata_log._reset_log_sink_for_tests()
 
     def test_log_event_accepts_unserializable_object(self) -> None:
         obj = BadRepr()
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import config
+from logic.star_catalogue import DEFAULT_FIELD_SAMPLE_RATE, build_star_catalogue_from_spansh_dump
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Build the compact star catalogue (neutron stars, white dwarfs, sampled field) for the local neutron plotter."
+    )
+    parser.add_argument("dump_path", help="Path to a Spansh galaxy dump (.json.gz) with systems and bodies.")
+    parser.add_argument(
+        "--output",
+        default=config.get("neutron.local_catalogue_path"),
+        help="Output catalogue path (default: neutron.local_catalogue_path).",
+    )
+    parser.add_argument(
+        "--field-sample-rate",
+        type=float,
+        default=DEFAULT_FIELD_SAMPLE_RATE,
+        help="Fraction of ordinary stars kept as stepping stones (0..1).",
+    )
+    args = parser.parse_args()
+
+    def _progress(percent: float, message: str) -> None:
+        print(f"[{percent:5.1f}%] {message}", file=sys.stderr)
+
+    result = build_star_catalogue_from_spansh_dump(
+        str(args.dump_path),
+        str(args.output),
+        field_sample_rate=float(args.field_sample_rate),
+        progress_callback=_progress,
+    )
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
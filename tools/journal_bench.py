@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+from typing import Any
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from app.bench import (
+    compare_reports,
+    format_report_table,
+    generate_session,
+    headless_runtime,
+    iter_session_lines,
+    run_bench,
+)
+from app.bench.harness import (
+    DEFAULT_COMPARE_MIN_DELTA_US,
+    DEFAULT_COMPARE_THRESHOLD_PCT,
+    MODE_BURST,
+    MODE_FAST,
+    MODE_REALTIME,
+)
+
+
+def _read_lines(path: str) -> list[str]:
+    with open(path, "r", encoding="utf-8") as handle:
+        return [line for line in handle if line.strip()]
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Journal replay benchmark: throughput and per-event handler latency.")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--journal", help="Journal.*.log to replay (default: synthetic session).")
+    source.add_argument("--synthetic-hours", type=float, default=None, help="Synthetic session length in game hours.")
+    parser.add_argument("--events", type=int, default=None, help="Cap on synthetic events (default 10000 when no hours given).")
+    parser.add_argument("--seed", type=int, default=0, help="Synthetic journal seed.")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--as-fast-as-possible", dest="mode", action="store_const", const=MODE_FAST)
+    mode.add_argument("--realtime", dest="mode", action="store_const", const=MODE_REALTIME)
+    mode.add_argument("--burst", type=int, default=0, metavar="N", help="Feed lines in bursts of N.")
+    parser.add_argument("--speed", type=float, default=1.0, help="Realtime speed multiplier.")
+    parser.add_argument("--json", dest="json_out", help="Write the JSON report here.")
+    parser.add_argument("--compare", help="Baseline JSON report; exit 1 on regressions.")
+    parser.add_argument("--threshold-pct", type=float, default=DEFAULT_COMPARE_THRESHOLD_PCT)
+    parser.add_argument("--min-delta-us", type=float, default=DEFAULT_COMPARE_MIN_DELTA_US)
+    parser.add_argument("--work-dir", help="Directory for the bench PlayerDB/state (default: temp dir).")
+    parser.add_argument("--verbose", action="store_true", help="Do not silence handler stdout.")
+    return parser
+
+
+def run_cli(argv: list[str] | None = None) -> dict[str, Any]:
+    args = build_parser().parse_args(argv)
+    mode = MODE_BURST if args.burst else (args.mode or MODE_FAST)
+    if args.journal:
+        lines = _read_lines(args.journal)
+        label = os.path.basename(args.journal)
+    else:
+        events = args.events
+        if args.synthetic_hours is None and events is None:
+            events = 10_000
+        rows = generate_session(hours=args.synthetic_hours, events=events, seed=args.seed)
+        lines = list(iter_session_lines(rows))
+        label = f"synthetic seed={args.seed} events={len(lines)}"
+
+    with tempfile.TemporaryDirectory(prefix="renata_bench_") as tmp_dir:
+        work_dir = args.work_dir or tmp_dir
+        with headless_runtime(work_dir, quiet=not args.verbose) as sinks:
+            report = run_bench(lines, mode=mode, speed=args.speed, burst=args.burst, sinks=sinks, label=label)
+
+    regressions: list[dict[str, Any]] = []
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as handle:
+            baseline = json.load(handle)
+        regressions = compare_reports(
+            report,
+            baseline,
+            threshold_pct=args.threshold_pct,
+            min_delta_us=args.min_delta_us,
+        )
+        report["regressions"] = regressions
+
+    print(format_report_table(report, regressions=regressions))
+    for row in regressions:
+        print(
+            f"REGRESSION {row['event']} {row['metric']}: "
+            f"{row['baseline']:.1f} -> {row['current']:.1f} us (x{row['ratio']})"
+        )
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2, ensure_ascii=False)
+    return report
+
+
+def main() -> None:
+    report = run_cli()
+    sys.exit(1 if report.get("regressions") else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import argparse
+import os
+import queue
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from logic import utils
+from logic.utils import renata_log
+
+
+def _legacy_log_event(category: str, msg: str, **fields) -> None:
+    # Stara sciezka: formatowanie + put do kolejki GUI przy kazdym wywolaniu.
+    cat = str(category or "GENERAL").strip().upper()
+    base = f"[{cat}] {msg}"
+    if fields:
+        line = f"{base} " + " ".join(f"{key}={renata_log._format_value(value)}" for key, value in fields.items())
+    else:
+        line = base
+    utils.MSG_QUEUE.put(("log", line))
+
+
+def _per_call_us(fn, calls: int, category: str) -> float:
+    started = time.perf_counter()
+    for idx in range(calls):
+        fn(category, "bench event", n=idx, system="Bench System", ok=True)
+    return (time.perf_counter() - started) / calls * 1_000_000.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Per-call latency of log_event: legacy queue path vs ring sink.")
+    parser.add_argument("--calls", type=int, default=200_000, help="log_event calls per scenario.")
+    args = parser.parse_args()
+
+    # Prawdziwa kolejka: po starej sciezce kazde wywolanie placi put() i pozniej drenaz w GUI.
+    utils.MSG_QUEUE = queue.Queue()
+    calls = max(1, int(args.calls))
+    renata_log._reset_log_sink_for_tests()
+
+    legacy = _per_call_us(_legacy_log_event, calls, "BENCH")
+    legacy_queued = utils.MSG_QUEUE.qsize()
+    utils.MSG_QUEUE = queue.Queue()
+    flood = _per_call_us(renata_log.log_event, calls, "BENCH")
+    warnings = _per_call_us(renata_log.log_event, calls, "WARN")
+
+    print(f"calls={calls}")
+    print(f"legacy (format + queue):   {legacy:7.2f} us/call")
+    print(f"sink, info flood (sampled): {flood:7.2f} us/call")
+    print(f"sink, warnings (recorded):  {warnings:7.2f} us/call")
+    print(f"GUI queue lines: legacy={legacy_queued} sink={utils.MSG_QUEUE.qsize()}")
+    print(renata_log.log_sink_stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import argparse
+import glob
+import json
+import os
+import sys
+from typing import Any
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import config
+from logic import player_local_db
+
+
+def _iter_journal_files(log_dir: str, *, limit_files: int | None = None) -> list[str]:
+    files = sorted(glob.glob(os.path.join(log_dir, "Journal.*.log")))
+    if limit_files is not None and limit_files > 0:
+        return files[-int(limit_files):]
+    return files
+
+
+def run_backfill(
+    *,
+    db_path: str,
+    log_dir: str,
+    limit_files: int | None = None,
+    chunk_size: int | None = None,
+) -> dict[str, Any]:
+    files = _iter_journal_files(log_dir, limit_files=limit_files)
+    if not files:
+        return {
+            "ok": False,
+            "reason": "no_journal_files",
+            "log_dir": log_dir,
+            "db_path": db_path,
+        }
+    result = player_local_db.backfill_jumps_from_journals(files, path=db_path, chunk_size=chunk_size)
+    result["log_dir"] = log_dir
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Backfill playerdb jumps / jump_edges (travel graph) from Journal logs. Resumable."
+    )
+    parser.add_argument(
+        "--db-path",
+        default=player_local_db.default_playerdb_path(),
+        help="Path to player_local.db (default: appdata RenataAI db).",
+    )
+    parser.add_argument(
+        "--log-dir",
+        default=config.get("log_dir"),
+        help="Directory with Journal.*.log files.",
+    )
+    parser.add_argument(
+        "--limit-files",
+        type=int,
+        default=None,
+        help="Only process newest N journal files (optional).",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=player_local_db.JUMP_BACKFILL_CHUNK_SIZE,
+        help="Jumps per transaction.",
+    )
+    args = parser.parse_args()
+
+    result = run_backfill(
+        db_path=str(args.db_path),
+        log_dir=str(args.log_dir),
+        limit_files=args.limit_files,
+        chunk_size=args.chunk_size,
+    )
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
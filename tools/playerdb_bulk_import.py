@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from typing import Any
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import config
+from logic import player_db_bulk_import, player_local_db
+
+
+def _print_progress(info: dict[str, Any]) -> None:
+    if info.get("phase") == "finalize":
+        sys.stderr.write("\nfinalize: jump graph + deferred indexes...\n")
+        sys.stderr.flush()
+        return
+    eta = info.get("eta_sec")
+    sys.stderr.write(
+        f"\r{info.get('files_done')}/{info.get('files_total')} files, "
+        f"{info.get('events')} events, {info.get('events_per_sec')} ev/s, "
+        f"ETA {'?' if eta is None else f'{eta:.0f}s'}   "
+    )
+    sys.stderr.flush()
+
+
+def run_import(
+    *,
+    db_path: str,
+    log_dir: str,
+    limit_files: int | None = None,
+    processes: int | None = None,
+    txn_records: int = player_db_bulk_import.BULK_IMPORT_TXN_RECORDS,
+    defer_indexes: bool | None = None,
+    unsafe_journal: bool = False,
+    quiet: bool = False,
+) -> dict[str, Any]:
+    files = player_db_bulk_import.list_journal_files(log_dir)
+    if limit_files is not None and limit_files > 0:
+        files = files[-int(limit_files):]
+    if not files:
+        return {
+            "ok": False,
+            "reason": "no_journal_files",
+            "log_dir": log_dir,
+            "db_path": db_path,
+        }
+    result = player_db_bulk_import.bulk_import_journals(
+        files,
+        path=db_path,
+        processes=processes,
+        txn_records=txn_records,
+        defer_indexes=defer_indexes,
+        unsafe_memory_journal=unsafe_journal,
+        progress=None if quiet else _print_progress,
+    )
+    result["log_dir"] = log_dir
+    return result
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Bulk import of the full Journal history into playerdb: systems, stations, cash-in and "
+            "jumps / jump_edges (travel graph). Parallel parse, single writer. Resumable."
+        )
+    )
+    parser.add_argument(
+        "--db-path",
+        default=player_local_db.default_playerdb_path(),
+        help="Path to player_local.db (default: appdata RenataAI db).",
+    )
+    parser.add_argument(
+        "--log-dir",
+        default=config.get("log_dir"),
+        help="Directory with Journal.*.log files.",
+    )
+    parser.add_argument(
+        "--limit-files",
+        type=int,
+        default=None,
+        help="Only process newest N journal files (optional).",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=None,
+        help="Parser worker processes (default: CPU count - 1; 1 = single-process reference import).",
+    )
+    parser.add_argument(
+        "--txn-records",
+        type=int,
+        default=player_db_bulk_import.BULK_IMPORT_TXN_RECORDS,
+        help="Parsed records per writer transaction (= checkpoint granularity).",
+    )
+    index_group = parser.add_mutually_exclusive_group()
+    index_group.add_argument("--defer-indexes", dest="defer_indexes", action="store_const", const=True)
+    index_group.add_argument("--no-defer-indexes", dest="defer_indexes", action="store_const", const=False)
+    parser.add_argument(
+        "--unsafe-journal",
+        action="store_true",
+        help="journal_mode=MEMORY during import (faster; killing the process mid-commit may corrupt the db).",
+    )
+    parser.add_argument("--quiet", action="store_true", help="No progress line on stderr.")
+    args = parser.parse_args(argv)
+
+    result = run_import(
+        db_path=str(args.db_path),
+        log_dir=str(args.log_dir),
+        limit_files=args.limit_files,
+        processes=args.processes,
+        txn_records=args.txn_records,
+        defer_indexes=args.defer_indexes,
+        unsafe_journal=bool(args.unsafe_journal),
+        quiet=bool(args.quiet),
+    )
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from logic import player_local_db
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Check or rebuild playerdb system_layer_flags (personal map layer bitmasks)."
+    )
+    parser.add_argument(
+        "--db-path",
+        default=player_local_db.default_playerdb_path(),
+        help="Path to player_local.db (default: appdata RenataAI db).",
+    )
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Recompute the whole table (also clears a deferred bulk-import state).",
+    )
+    parser.add_argument(
+        "--max-samples",
+        type=int,
+        default=20,
+        help="Mismatched systems listed in the check report.",
+    )
+    args = parser.parse_args()
+
+    result: dict = {"db_path": str(args.db_path)}
+    if args.rebuild:
+        result["rebuild"] = player_local_db.rebuild_layer_flags(path=str(args.db_path))
+    result["check"] = player_local_db.check_layer_flags_consistency(
+        path=str(args.db_path),
+        max_samples=args.max_samples,
+    )
+    result["ok"] = bool(result["check"].get("ok"))
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if not result["ok"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
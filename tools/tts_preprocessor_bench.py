@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from logic.tts import text_preprocessor
+from logic.tts.text_preprocessor import prepare_tts, warm_cache
+
+
+def _route(count: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    letters = "ABCDEFGHXYZ"
+    return [
+        f"Synuefe {rng.choice(letters)}{rng.choice(letters)}-{rng.choice(letters)} "
+        f"d{rng.randint(1, 200)}-{rng.randint(0, 999)}"
+        for _ in range(count)
+    ]
+
+
+def _calls(route: list[str], seed: int) -> list[tuple[str, dict]]:
+    rng = random.Random(seed)
+    calls: list[tuple[str, dict]] = []
+    for system in route:
+        calls.append(("MSG.NEXT_HOP", {"system": system, "risk_status": "RISK_LOW", "confidence": "high"}))
+        credits = rng.randint(1, 400) * 250_000
+        calls.append(
+            (
+                "MSG.CASH_IN_ASSISTANT",
+                {"raw_text": f"Dane warte {credits:,} Cr. Skok {rng.randint(20, 80)}.{rng.randint(0, 9)} LY."},
+            )
+        )
+    return calls
+
+
+def _per_call_us(calls: list[tuple[str, dict]]) -> float:
+    started = time.perf_counter()
+    for message_id, ctx in calls:
+        prepare_tts(message_id, ctx)
+    return (time.perf_counter() - started) / max(1, len(calls)) * 1_000_000.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Cost of prepare_tts() per call, cold vs warm cache.")
+    parser.add_argument("--route", type=int, default=300, help="Systems on the simulated route.")
+    parser.add_argument("--seed", type=int, default=43)
+    args = parser.parse_args()
+
+    route = _route(max(1, int(args.route)), args.seed)
+    calls = _calls(route, args.seed)
+
+    text_preprocessor._reset_tts_caches_for_tests()
+    cold = _per_call_us(calls)
+    warm = _per_call_us(calls)
+
+    text_preprocessor._reset_tts_caches_for_tests()
+    started = time.perf_counter()
+    warmed = warm_cache(route)
+    warm_up_ms = (time.perf_counter() - started) * 1000.0
+    next_hops = [call for call in calls if call[0] == "MSG.NEXT_HOP"]
+    after_route_warm = _per_call_us(next_hops)
+
+    print(f"route={len(route)} calls={len(calls)}")
+    print(f"cold:              {cold:9.2f} us/call")
+    print(f"warm:              {warm:9.2f} us/call")
+    print(f"speedup:           {cold / max(warm, 1e-9):9.1f}x")
+    print(f"warm_cache(route): {warm_up_ms:9.2f} ms for {warmed} systems")
+    print(f"next-hop after warm_cache: {after_route_warm:9.2f} us/call")
+    stats = text_preprocessor.tts_cache_stats()
+    print({name: {k: stats[name][k] for k in ("hits", "misses")} for name in ("prepared", "names")})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from app.state import app_state
+from logic import value_at_risk
+from logic.exit_summary import ExitSummaryGenerator
+from logic.system_value_engine import SystemStats, SystemValueEngine
+
+
+def _engine_with_systems(count: int) -> SystemValueEngine:
+    engine = SystemValueEngine((app_state.system_value_engine.exobio_df, app_state.system_value_engine.carto_df))
+    for idx in range(count):
+        engine.systems[f"Bench {idx}"] = SystemStats(
+            name=f"Bench {idx}",
+            c_cartography=1_000_000.0 + idx,
+            c_exobiology=250_000.0,
+        )
+    engine.version += 1
+    return engine
+
+
+def _per_tick_us(fn, ticks: int) -> float:
+    started = time.perf_counter()
+    for _ in range(ticks):
+        fn("Bench 0")
+    return (time.perf_counter() - started) / ticks * 1_000_000.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Per-status-tick cost of the value-at-risk snapshot.")
+    parser.add_argument("--systems", type=int, default=2000, help="Systems visited in the session.")
+    parser.add_argument("--ticks", type=int, default=5000, help="Simulated Status.json ticks.")
+    args = parser.parse_args()
+
+    engine = _engine_with_systems(max(1, int(args.systems)))
+    app_state.system_value_engine = engine
+    app_state.exit_summary = ExitSummaryGenerator(engine)
+    app_state.current_system = "Bench 0"
+
+    ticks = max(1, int(args.ticks))
+    uncached = _per_tick_us(value_at_risk.compute_snapshot, ticks)
+    value_at_risk.get_snapshot("Bench 0")
+    cached = _per_tick_us(value_at_risk.get_snapshot, ticks)
+
+    print(f"systems={args.systems} ticks={ticks}")
+    print(f"uncached: {uncached:9.2f} us/tick (old path, paid once per awareness module)")
+    print(f"cached:   {cached:9.2f} us/tick")
+    print(f"speedup:  {uncached / max(cached, 1e-9):9.1f}x")
+    print(value_at_risk.snapshot_stats())
+
+
+if __name__ == "__main__":
+    main()